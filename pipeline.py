@@ -105,6 +105,8 @@ ERROR HANDLING & DEBUGGING:
 - Normal Mode: Continues on non-critical failures for production
 - Data Validation: Use --validate-data for quality checks after each step
 - Enhanced Logging: Timestamps, progress tracking, and context
+- Step Logs: Full child output in output/step_logs/<script>.log (console echo is rate-limited)
+- Run Report: Per-step wall time, peak RSS, CPU and I/O in output/pipeline_run_report.json
 
 STEP CONTROL SYSTEM:
 ===================
@@ -125,6 +127,10 @@ import signal
 import argparse
 import shutil
 import glob
+import json
+import platform
+import threading
+from collections import deque
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 import pandas as pd
@@ -858,10 +864,103 @@ def validate_data_quality(step_info: Dict[str, Any]) -> bool:
 
 # ——— PIPELINE EXECUTION ———
 
+# ——— STEP OUTPUT AND RESOURCE ACCOUNTING ———
+
+# Full child output goes to one log file per step; the console only gets a
+# rate-limited echo so chatty steps (per-row DEBUG lines) cannot flood it.
+STEP_LOG_DIR = os.path.join(OUTPUT_DIR, "step_logs")
+# Machine-readable per-step metrics, next to pipeline_manifest.json
+RUN_REPORT_PATH = os.path.join(OUTPUT_DIR, "pipeline_run_report.json")
+ECHO_MAX_LINES_PER_SECOND = int(os.environ.get("PIPELINE_ECHO_LINES_PER_SECOND", "50"))
+FAILURE_TAIL_LINES = 40
+PROC_IO_POLL_SECONDS = 0.2
+
+_run_report: Optional[Dict[str, Any]] = None
+
+
+def start_run_report(**context: Any) -> None:
+    """Begin a new run report (one per pipeline run); context is stored as-is."""
+    global _run_report
+    _run_report = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'context': context,
+        'steps': [],
+    }
+
+
+def record_step_report(entry: Dict[str, Any]) -> None:
+    """Append one step's metrics and rewrite the report atomically (survives a crash mid-run)."""
+    if _run_report is None:
+        start_run_report()
+    _run_report['steps'].append(entry)
+    _run_report['updated_at'] = datetime.now().isoformat(timespec='seconds')
+    try:
+        os.makedirs(os.path.dirname(RUN_REPORT_PATH) or '.', exist_ok=True)
+        tmp_path = RUN_REPORT_PATH + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(_run_report, f, indent=2)
+        os.replace(tmp_path, RUN_REPORT_PATH)
+    except OSError as e:
+        log_warning(f"Could not write run report {RUN_REPORT_PATH}: {e}")
+
+
+def _read_proc_io(pid: int) -> Optional[Dict[str, int]]:
+    """Cumulative I/O counters of a live process from /proc/<pid>/io (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/io") as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+        return {key: int(fields[key]) for key in ('rchar', 'wchar', 'read_bytes', 'write_bytes') if key in fields}
+    except (OSError, ValueError):
+        return None
+
+
+class _OutputPump:
+    """
+    Copy child output line by line to a log file, echoing at most
+    ECHO_MAX_LINES_PER_SECOND lines per second to the console.
+    """
+
+    def __init__(self, stream, log_file, echo_limit: Optional[int] = None):
+        self.stream = stream
+        self.log_file = log_file
+        self.echo_limit = ECHO_MAX_LINES_PER_SECOND if echo_limit is None else echo_limit
+        self.lines = 0
+        self.suppressed = 0
+        self.tail = deque(maxlen=FAILURE_TAIL_LINES)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        window_start, window_lines, window_suppressed = time.monotonic(), 0, 0
+        for line in self.stream:
+            self.log_file.write(line)
+            self.lines += 1
+            self.tail.append(line)
+            now = time.monotonic()
+            if now - window_start >= 1.0:
+                if window_suppressed:
+                    print(f"    ... {window_suppressed} line(s) not echoed (see step log)", flush=True)
+                window_start, window_lines, window_suppressed = now, 0, 0
+            if window_lines < self.echo_limit:
+                print(line, end='', flush=True)
+                window_lines += 1
+            else:
+                window_suppressed += 1
+                self.suppressed += 1
+        if window_suppressed:
+            print(f"    ... {window_suppressed} line(s) not echoed (see step log)", flush=True)
+        self.log_file.flush()
+
+
 def run_script(script_name: str, description: str, extra_args: list = None, timeout_minutes: Optional[int] = None, env: Optional[dict] = None) -> bool:
     """
     Run a Python script and return success status.
     
+    Child output is streamed to STEP_LOG_DIR/<script>.log (echoed to the
+    console with a rate limit), and the step's wall time, peak RSS, CPU
+    user/sys time and I/O bytes are appended to RUN_REPORT_PATH.
+    
     Args:
         script_name: Name of the script file in src/ directory
         description: Human-readable description for logging
@@ -888,60 +987,105 @@ def run_script(script_name: str, description: str, extra_args: list = None, time
     if timeout_minutes:
         log_message(f"Timeout set: {timeout_minutes} minute(s)")
     
+    os.makedirs(STEP_LOG_DIR, exist_ok=True)
+    log_path = os.path.join(STEP_LOG_DIR, os.path.splitext(script_name)[0] + ".log")
+    report = {
+        'script': script_name,
+        'description': description,
+        'command': cmd,
+        'log_file': log_path,
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    
     start_time = time.time()
     timeout_seconds = timeout_minutes * 60 if timeout_minutes else None
+    timed_out = threading.Event()
     try:
-        # Start child in its own process group so we can terminate the whole group on timeout
-        proc = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            preexec_fn=os.setsid,
-            env=(env or os.environ),
-        )
+        with open(log_path, 'w', encoding='utf-8', errors='replace') as log_file:
+            # Start child in its own process group so we can terminate the whole group on timeout
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors='replace',
+                bufsize=1,
+                preexec_fn=os.setsid,
+                env=(env or os.environ),
+            )
+            pump = _OutputPump(proc.stdout, log_file)
+            pump.thread.start()
 
-        try:
-            stdout, stderr = proc.communicate(timeout=timeout_seconds)
-        except subprocess.TimeoutExpired:
-            elapsed = time.time() - start_time
-            log_error(f"{description} timed out after {elapsed/60:.1f} minutes (limit={timeout_minutes}m). Terminating process group...")
-            # Kill the entire process group
-            try:
-                os.killpg(os.getpgid(proc.pid), signal.SIGKILL)
-            except Exception as kill_err:
-                log_warning(f"Failed to kill process group directly: {kill_err}. Killing main process...")
+            def kill_group() -> None:
+                timed_out.set()
                 try:
-                    proc.kill()
-                except Exception:
-                    pass
-            # Collect any remaining output
-            stdout, stderr = proc.communicate()
-            if stdout:
-                print(stdout)
-            if stderr:
-                print(stderr)
-            return False
-
-        elapsed = time.time() - start_time
-        if proc.returncode != 0:
-            log_error(f"{description} failed (exit code {proc.returncode}) after {elapsed/60:.1f} minutes")
-            if stdout:
-                print(stdout)
-            if stderr:
-                print(stderr)
-            return False
-        else:
-            if stdout:
-                print(stdout)
-            log_success(f"{description} completed successfully in {elapsed/60:.1f} minutes")
-            return True
-
+                    os.killpg(os.getpgid(proc.pid), signal.SIGKILL)
+                except Exception as kill_err:
+                    log_warning(f"Failed to kill process group directly: {kill_err}. Killing main process...")
+                    try:
+                        proc.kill()
+                    except Exception:
+                        pass
+
+            timer = threading.Timer(timeout_seconds, kill_group) if timeout_seconds else None
+            if timer:
+                timer.start()
+
+            # /proc/<pid>/io disappears once the child is reaped, so sample it while it runs
+            io_sample: Dict[str, int] = {}
+            # (os.wait4 rather than proc.wait so the child's own rusage comes back with its status)
+            while True:
+                waited_pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+                if waited_pid:
+                    break
+                io_sample = _read_proc_io(proc.pid) or io_sample
+                time.sleep(PROC_IO_POLL_SECONDS)
+            if timer:
+                timer.cancel()
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            pump.thread.join()
+            proc.stdout.close()
     except Exception as e:
         elapsed = time.time() - start_time
         log_error(f"{description} crashed after {elapsed/60:.1f} minutes: {e}")
+        report.update({'status': 'crashed', 'error': str(e), 'wall_s': round(elapsed, 3)})
+        record_step_report(report)
         return False
 
+    elapsed = time.time() - start_time
+    # ru_maxrss is KiB on Linux, bytes on macOS; ru_inblock/ru_oublock count 512-byte blocks
+    rss_divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    report.update({
+        'status': 'timeout' if timed_out.is_set() else ('success' if proc.returncode == 0 else 'failed'),
+        'returncode': proc.returncode,
+        'wall_s': round(elapsed, 3),
+        'peak_rss_mb': round(usage.ru_maxrss / rss_divisor, 1),
+        'cpu_user_s': round(usage.ru_utime, 3),
+        'cpu_sys_s': round(usage.ru_stime, 3),
+        'block_read_bytes': usage.ru_inblock * 512,
+        'block_write_bytes': usage.ru_oublock * 512,
+        'io_read_chars': io_sample.get('rchar'),
+        'io_write_chars': io_sample.get('wchar'),
+        'output_lines': pump.lines,
+        'output_lines_not_echoed': pump.suppressed,
+    })
+    record_step_report(report)
+
+    if timed_out.is_set():
+        log_error(f"{description} timed out after {elapsed/60:.1f} minutes (limit={timeout_minutes}m). Process group terminated.")
+    elif proc.returncode != 0:
+        log_error(f"{description} failed (exit code {proc.returncode}) after {elapsed/60:.1f} minutes")
+    else:
+        log_success(f"{description} completed successfully in {elapsed/60:.1f} minutes "
+                    f"(peak RSS {report['peak_rss_mb']:.0f} MB, CPU {usage.ru_utime + usage.ru_stime:.1f}s)")
+        return True
+    if pump.suppressed:
+        # The echo dropped lines, so the error may not be on screen yet
+        log_message(f"Last {len(pump.tail)} line(s) of {log_path}:")
+        print(''.join(pump.tail), end='', flush=True)
+    log_message(f"Full output: {log_path}")
+    return False
+
 def create_sample_data_files() -> bool:
     """Create sample data files for demonstration when API data doesn't exist"""
     log_message("Creating sample data files for demonstration...")
@@ -1188,6 +1332,9 @@ def run_pipeline(start_step: Optional[int] = None, end_step: Optional[int] = Non
         True if pipeline succeeded, False otherwise
     """
     log_section("PRODUCT MIX CLUSTERING & RULE ANALYSIS PIPELINE")
+    current_yyyymm, current_period = get_current_period()
+    start_run_report(yyyymm=current_yyyymm, period=current_period, start_step=start_step, end_step=end_step,
+                     fresh_run=fresh_run, strict_mode=strict_mode)
     if fresh_run:
         log_message("Fresh run mode enabled: all steps will execute from scratch (no skipping)")
     
@@ -1376,6 +1523,7 @@ def run_pipeline(start_step: Optional[int] = None, end_step: Optional[int] = Non
     # Log pipeline summary
     log_section("PIPELINE EXECUTION SUMMARY")
     log_message(f"Steps executed: {completed_steps}/{total_steps}")
+    log_message(f"Per-step resource report: {RUN_REPORT_PATH}")
     
     if skipped_steps:
         log_message(f"Steps skipped: {skipped_steps}")
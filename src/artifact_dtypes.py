@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Artifact Dtype Registry
+=======================
+
+Memory-compact dtypes for the pipeline's tabular artifacts. Every artifact
+(complete_spu_sales, store_config, rule*_results, ...) declares which columns
+are keys (kept as str), low-cardinality dimensions (category), measures that
+fit in float32 and small integers (nullable Int*). Sales amounts stay float64:
+they are summed across stores and periods, where float32 loses cents.
+
+read_artifact() is the shared loader; compact_dtypes() applies the same policy
+to a frame that is already in memory, and concat_artifact_frames() concatenates
+per-period frames without falling back to object columns. Every load records
+its legacy vs compact footprint, and the per-step totals are merged into
+output/dtype_memory_report.json when a step script exits.
+
+Categorical dimensions change two pandas defaults that callers must handle:
+groupby/pivot_table need observed=True (otherwise every unobserved category
+combination becomes a row), and assigning a value that is not yet a category
+raises. PIPELINE_DTYPE_POLICY=legacy turns compaction off.
+"""
+
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+DTYPE_POLICY = os.environ.get("PIPELINE_DTYPE_POLICY", "compact").lower()
+MEMORY_REPORT_PATH = os.path.join("output", "dtype_memory_report.json")
+
+
+@dataclass(frozen=True)
+class ArtifactSchema:
+    """Column dtype policy for one artifact family (matched on the file name)."""
+    name: str
+    pattern: str
+    keys: Tuple[str, ...] = ('str_code',)
+    categories: Tuple[str, ...] = ()
+    float32: Tuple[str, ...] = ()
+    ints: Mapping[str, str] = field(default_factory=dict)
+
+    def matches(self, path: str) -> bool:
+        return re.match(self.pattern, os.path.basename(path)) is not None
+
+    def read_dtypes(self) -> Dict[str, str]:
+        """dtype map for read_csv: only the keys, which must never be parsed as numbers."""
+        return {column: str for column in self.keys}
+
+
+DIMENSIONS = ('str_name', 'cate_name', 'sub_cate_name', 'big_class_name', 'season_name',
+              'sex_name', 'display_location_name', 'mm_type')
+
+ARTIFACT_SCHEMAS: Dict[str, ArtifactSchema] = {schema.name: schema for schema in (
+    ArtifactSchema(
+        'complete_spu_sales', r'^complete_spu_sales_',
+        keys=('str_code', 'spu_code'),
+        categories=('str_name', 'cate_name', 'sub_cate_name'),
+        float32=('quantity', 'unit_price', 'investment_per_unit'),
+    ),
+    ArtifactSchema(
+        'complete_category_sales', r'^complete_category_sales_',
+        categories=('str_name', 'cate_name', 'sub_cate_name'),
+        float32=('store_unit_price', 'estimated_quantity'),
+    ),
+    ArtifactSchema(
+        'store_config', r'^store_config_',
+        categories=DIMENSIONS,
+        float32=('ext_sty_cnt_avg', 'target_sty_cnt_avg'),
+        ints={'yyyy': 'Int16', 'mm': 'Int8'},
+    ),
+    ArtifactSchema(
+        'store_sales', r'^store_sales_',
+        categories=('str_name', 'mm_type'),
+        float32=('base_sal_qty', 'fashion_sal_qty'),
+        ints={'yyyy': 'Int16', 'mm': 'Int8'},
+    ),
+    ArtifactSchema(
+        'rule_results', r'^rule\d+_.*results',
+        keys=('str_code', 'spu_code'),
+        categories=DIMENSIONS + ('category', 'subcategory', 'rule_type'),
+        ints={'cluster_id': 'Int32', 'Cluster': 'Int32'},
+    ),
+)}
+
+
+def artifact_for_path(path: str) -> Optional[str]:
+    """Registry name of the artifact a file belongs to, or None."""
+    for schema in ARTIFACT_SCHEMAS.values():
+        if schema.matches(path):
+            return schema.name
+    return None
+
+
+def compact_dtypes(df: pd.DataFrame, artifact: str) -> pd.DataFrame:
+    """
+    Apply the artifact's dtype policy in place (and return df). Columns that are
+    missing or fail to convert (e.g. a fractional value in an integer column)
+    keep their loaded dtype.
+    """
+    if DTYPE_POLICY == 'legacy':
+        return df
+    schema = ARTIFACT_SCHEMAS[artifact]
+    targets = [(c, 'category') for c in schema.categories]
+    targets += [(c, 'float32') for c in schema.float32]
+    targets += list(schema.ints.items())
+    for column, dtype in targets:
+        if column not in df.columns or str(df[column].dtype) == dtype:
+            continue
+        try:
+            df[column] = df[column].astype(dtype)
+        except (TypeError, ValueError):
+            continue
+    return df
+
+
+def concat_artifact_frames(frames: Sequence[pd.DataFrame], **kwargs) -> pd.DataFrame:
+    """
+    pd.concat that keeps categorical columns categorical: per-period frames
+    carry different category sets, which plain concat turns into object.
+    """
+    frames = [f for f in frames if f is not None]
+    if len(frames) > 1:
+        shared = set.intersection(*(set(f.columns) for f in frames))
+        for column in sorted(shared):
+            if all(isinstance(f[column].dtype, pd.CategoricalDtype) for f in frames):
+                categories = union_categoricals([f[column] for f in frames], sort_categories=True).categories
+                frames = [f.assign(**{column: f[column].cat.set_categories(categories)}) for f in frames]
+    return pd.concat(frames, **kwargs)
+
+
+class DtypeMemoryReport:
+    """Legacy vs compact footprint of every artifact loaded in this process."""
+
+    def __init__(self):
+        self.loads: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()  # Files may be decoded on reader threads
+
+    def record(self, artifact: str, legacy_bytes: int, compact_bytes: int, rows: int) -> None:
+        with self._lock:
+            self._record(artifact, legacy_bytes, compact_bytes, rows)
+
+    def _record(self, artifact: str, legacy_bytes: int, compact_bytes: int, rows: int) -> None:
+        entry = self.loads.setdefault(artifact, {'files': 0, 'rows': 0, 'legacy_mb': 0.0, 'compact_mb': 0.0})
+        entry['files'] += 1
+        entry['rows'] += int(rows)
+        entry['legacy_mb'] += legacy_bytes / 1024 ** 2
+        entry['compact_mb'] += compact_bytes / 1024 ** 2
+
+    def totals(self) -> Dict[str, float]:
+        legacy = sum(e['legacy_mb'] for e in self.loads.values())
+        compact = sum(e['compact_mb'] for e in self.loads.values())
+        return {'legacy_mb': round(legacy, 2), 'compact_mb': round(compact, 2), 'saved_mb': round(legacy - compact, 2)}
+
+    def write(self, step: Optional[str] = None, path: Optional[str] = None) -> Optional[str]:
+        """Merge this process's totals into the report under the step's name."""
+        if not self.loads:
+            return None
+        path = path or MEMORY_REPORT_PATH
+        step = step or os.path.splitext(os.path.basename(sys.argv[0] or 'interactive'))[0]
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            report = {}
+        report[step] = {
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'policy': DTYPE_POLICY,
+            **self.totals(),
+            'artifacts': {name: {k: round(v, 2) if isinstance(v, float) else v for k, v in entry.items()}
+                          for name, entry in self.loads.items()},
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+
+
+_REPORT: Optional[DtypeMemoryReport] = None
+
+
+def _write_report_at_exit() -> None:
+    try:
+        path = _REPORT.write()
+    except OSError:
+        return
+    if path:
+        totals = _REPORT.totals()
+        print(f"[dtype] Loaded {totals['compact_mb']:.1f} MB instead of {totals['legacy_mb']:.1f} MB "
+              f"(saved {totals['saved_mb']:.1f} MB) - see {path}")
+
+
+def get_memory_report() -> DtypeMemoryReport:
+    global _REPORT
+    if _REPORT is None:
+        _REPORT = DtypeMemoryReport()
+        # Only step scripts (python src/stepN_*.py) report; library/test use stays silent
+        if os.path.basename(sys.argv[0] or '').startswith('step'):
+            atexit.register(_write_report_at_exit)
+    return _REPORT
+
+
+def compact_and_record(df: pd.DataFrame, artifact: str) -> pd.DataFrame:
+    """compact_dtypes plus a memory-report entry for one loaded file."""
+    legacy_bytes = int(df.memory_usage(index=True, deep=True).sum())
+    compact_dtypes(df, artifact)
+    compact_bytes = int(df.memory_usage(index=True, deep=True).sum())
+    get_memory_report().record(artifact, legacy_bytes, compact_bytes, len(df))
+    return df
+
+
+def read_artifact(path: str, artifact: Optional[str] = None, usecols: Optional[List[str]] = None,
+                  **read_csv_kwargs) -> pd.DataFrame:
+    """
+    Shared loader: read a CSV/Parquet artifact with string keys and compact dtypes.
+
+    artifact defaults to the registry entry matching the file name; files that
+    match nothing are read with str_code as str, like the existing loaders.
+    """
+    artifact = artifact or artifact_for_path(path)
+    dtype = ARTIFACT_SCHEMAS[artifact].read_dtypes() if artifact else {'str_code': str}
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path, columns=usecols)
+        for column in set(dtype) & set(df.columns):
+            # Keys as text like read_csv(dtype=str): nulls stay NaN instead of becoming 'nan'/'None'
+            values = df[column]
+            df[column] = values.astype(str).where(values.notna())
+    else:
+        if usecols is not None:
+            dtype = {k: v for k, v in dtype.items() if k in usecols}
+        read_csv_kwargs.setdefault('low_memory', False)
+        df = pd.read_csv(path, usecols=usecols, dtype=dtype, **read_csv_kwargs)
+    return compact_and_record(df, artifact) if artifact else df
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Batch Dataset Writer
+====================
+
+Out-of-core assembly of Step 1's per-period datasets. Each downloaded batch is
+deduplicated against everything appended before it and spooled to disk as one
+part file; the final CSV is then streamed part by part, written once, and
+linked into its second location. Peak memory is one batch plus 8 bytes per
+kept row for the dedup hash index, whatever the store count.
+
+The result matches pd.concat(batches).drop_duplicates(subset=...) with
+keep='first': the same rows, order, columns (in first-seen order) and column
+dtypes (each column's part dtypes promoted together, as concat does). Rows are compared by
+a 64-bit hash of their non-null cells, with integer columns hashed as floats,
+so 1 and 1.0 or a missing column and NaN match as they do after concat's
+upcasting; subset keys are compared as text.
+
+Key Functions:
+- BatchDatasetWriter.append: Deduplicate and spool one batch
+- BatchDatasetWriter.finalize: Stream the parts into the final CSV
+- link_copy: Hardlink (or symlink, or copy) a finished file elsewhere
+"""
+
+import os
+import shutil
+from typing import Collection, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+SPOOL_DIRNAME = ".spool"
+READ_CHUNK_ROWS = 100_000
+
+
+def _row_hashes(df: pd.DataFrame, subset: Optional[Sequence[str]]) -> np.ndarray:
+    if subset is not None:
+        # Keys compare as text, so an int 11003 and a '11003' read back from CSV match
+        return pd.util.hash_pandas_object(df[list(subset)].astype(str), index=False).to_numpy()
+    # Order-free sum of per-cell (column, value) hashes over the non-null cells:
+    # a column a batch lacks then hashes like the NaN it becomes after concat
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_integer_dtype(values) or pd.api.types.is_bool_dtype(values):
+            values = values.astype('float64')
+        name = pd.util.hash_array(np.array([str(column)], dtype=object))[0]
+        cells = pd.util.hash_array(pd.util.hash_pandas_object(values, index=False).to_numpy() ^ name)
+        cells[values.isna().to_numpy()] = 0
+        hashes += cells
+    return hashes
+
+
+def promote_dtypes(dtypes: Iterable[object], missing: bool = False) -> object:
+    """
+    Common dtype of one column across parts, as pd.concat would give it.
+
+    missing means some part lacks the column (NaN there, so integers become
+    float64). Numeric numpy dtypes promote with np.result_type; bools mixed with
+    anything else, and differing extension dtypes, fall back to object.
+    """
+    dtypes = list(dict.fromkeys(dtypes))
+    if missing:
+        dtypes.append(np.dtype('float64'))
+    if len(dtypes) == 1:
+        return dtypes[0]
+    if not all(isinstance(d, np.dtype) for d in dtypes) or any(d == np.dtype(bool) for d in dtypes):
+        return np.dtype(object)
+    return np.result_type(*dtypes)
+
+
+def link_copy(source: str, target: str) -> str:
+    """
+    Make target refer to source's content without a second write: a hardlink,
+    else a relative symlink, else a copy. Returns the method used.
+    """
+    if os.path.lexists(target):
+        os.remove(target)
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    try:
+        os.link(source, target)
+        return 'hardlink'
+    except OSError:
+        pass
+    try:
+        os.symlink(os.path.relpath(source, os.path.dirname(target) or '.'), target)
+        return 'symlink'
+    except OSError:
+        shutil.copyfile(source, target)
+        return 'copy'
+
+
+class BatchDatasetWriter:
+    """Spool of deduplicated batches for one dataset, finalized into a single CSV."""
+
+    def __init__(self, spool_dir: str, subset: Optional[Sequence[str]] = None, store_column: str = 'str_code',
+                 resume: bool = False, keep: Optional[Collection[str]] = None):
+        """
+        Parts left in spool_dir by an interrupted run are discarded, or with
+        resume=True re-indexed (in order) so that finalize() still writes them;
+        keep then limits the resumed parts to those names (e.g. the parts of
+        batches a download journal committed).
+        """
+        self.spool_dir = spool_dir
+        self.subset = list(subset) if subset is not None else None
+        self.store_column = store_column
+        self.rows_in = 0
+        self.rows_kept = 0
+        self.stores = set()
+        self._seen = np.empty(0, dtype=np.uint64)  # Sorted hashes of every kept row
+        self._columns: List[str] = []
+        self._part_dtypes: List[Dict[str, object]] = []
+        self._part_names: List[str] = []
+        self._next_part = 0
+        os.makedirs(spool_dir, exist_ok=True)
+        leftovers = sorted(name for name in os.listdir(spool_dir) if name.startswith('part-'))
+        for name in leftovers:
+            if resume and name.endswith('.pkl') and (keep is None or name in keep):
+                self._index(pd.read_pickle(os.path.join(spool_dir, name)))
+                self._part_names.append(name)
+                self._next_part = int(name[5:10]) + 1
+            else:
+                os.remove(os.path.join(spool_dir, name))
+
+    @property
+    def part_names(self) -> List[str]:
+        """Spooled part file names, in append order."""
+        return list(self._part_names)
+
+    @property
+    def duplicates_removed(self) -> int:
+        return self.rows_in - self.rows_kept
+
+    def _index(self, kept: pd.DataFrame, hashes: Optional[np.ndarray] = None) -> None:
+        if hashes is None:
+            hashes = _row_hashes(kept, self.subset)
+        # Merge the batch's sorted hashes into the index (one copy, no re-sort of what is there)
+        hashes = np.sort(hashes)
+        self._seen = np.insert(self._seen, np.searchsorted(self._seen, hashes), hashes)
+        self._columns.extend(c for c in kept.columns if c not in self._columns)
+        self._part_dtypes.append(kept.dtypes.to_dict())
+        if self.store_column in kept.columns:
+            self.stores.update(kept[self.store_column].dropna().astype(str).unique())
+        self.rows_in += len(kept)
+        self.rows_kept += len(kept)
+
+    def append(self, df: pd.DataFrame) -> int:
+        """Drop rows already seen (in this batch or earlier ones) and spool the rest; returns rows kept."""
+        if df is None or df.empty:
+            return 0
+        hashes = _row_hashes(df, self.subset)
+        first = np.zeros(len(df), dtype=bool)
+        first[np.unique(hashes, return_index=True)[1]] = True
+        if len(self._seen):
+            pos = np.minimum(np.searchsorted(self._seen, hashes), len(self._seen) - 1)
+            first &= self._seen[pos] != hashes
+        kept = df[first] if not first.all() else df
+        self.rows_in += len(df) - len(kept)
+        if kept.empty:
+            return 0
+        name = f"part-{self._next_part:05d}.pkl"
+        path = os.path.join(self.spool_dir, name)
+        kept.to_pickle(path + '.tmp')
+        os.replace(path + '.tmp', path)  # A part is either complete or absent
+        self._index(kept, hashes[first])
+        self._part_names.append(name)
+        self._next_part += 1
+        return len(kept)
+
+    def append_csv(self, path: str, chunksize: int = READ_CHUNK_ROWS, **read_csv_kwargs) -> int:
+        """Append an existing CSV chunk by chunk (never holding the whole file)."""
+        kept = 0
+        for chunk in pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs):
+            kept += self.append(chunk)
+        return kept
+
+    def _part_paths(self) -> List[str]:
+        return [os.path.join(self.spool_dir, name) for name in self._part_names]
+
+    def finalize(self, path: str, link_paths: Sequence[str] = ()) -> Dict[str, object]:
+        """
+        Stream every part into path (written to a temp file, then renamed), link
+        it to link_paths and clear the spool. Returns row/store counts and link methods.
+        """
+        if not self._part_names:
+            return {'rows': 0, 'stores': 0, 'duplicates_removed': self.duplicates_removed, 'links': {}}
+        dtypes = {
+            column: promote_dtypes((part[column] for part in self._part_dtypes if column in part),
+                                   missing=any(column not in part for part in self._part_dtypes))
+            for column in self._columns
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            for i, part_path in enumerate(self._part_paths()):
+                part = pd.read_pickle(part_path).reindex(columns=self._columns)
+                try:
+                    part = part.astype(dtypes)
+                except (TypeError, ValueError):
+                    pass
+                part.to_csv(f, index=False, header=(i == 0))
+        os.replace(tmp_path, path)
+        links = {target: link_copy(path, target) for target in link_paths}
+        self.clear()
+        return {'rows': self.rows_kept, 'stores': len(self.stores),
+                'duplicates_removed': self.duplicates_removed, 'links': links}
+
+    def clear(self) -> None:
+        for part_path in self._part_paths():
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        self._part_names = []
+        try:
+            os.rmdir(self.spool_dir)
+        except OSError:
+            pass
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+import pandas as pd
+
+from .context import StepContext
+
+# Comma-separated modes: "cprofile", "memory" (tracemalloc), "frames" (deep
+# DataFrame footprint) or "all". Phase timers are always recorded.
+PROFILE_ENV_VAR = "STEP_PROFILE"
+# Directory of the per-run profile bundle; one is created under
+# output/profiles/ when unset (pipeline runs can share one by exporting it).
+PROFILE_DIR_ENV_VAR = "STEP_PROFILE_DIR"
+PROFILE_MODES = ("cprofile", "memory", "frames")
+TOP_ALLOCATIONS = 15
+TOP_FUNCTIONS = 40
+
+
+def profile_modes(value: Optional[str] = None) -> Set[str]:
+    """Parse a STEP_PROFILE value (defaults to the environment)."""
+    if value is None:
+        value = os.environ.get(PROFILE_ENV_VAR, "")
+    modes = {m.strip().lower() for m in value.split(",") if m.strip()}
+    if modes & {"1", "true", "yes", "all"}:
+        return set(PROFILE_MODES)
+    return modes & set(PROFILE_MODES)
+
+
+def enable_profiling(modes: str = "all", output_dir: Optional[str] = None) -> None:
+    """Turn profiling on for every step run in this process (used by --profile flags)."""
+    os.environ[PROFILE_ENV_VAR] = modes
+    if output_dir:
+        os.environ[PROFILE_DIR_ENV_VAR] = output_dir
+
+
+def profile_bundle_dir() -> str:
+    path = os.environ.get(PROFILE_DIR_ENV_VAR)
+    if not path:
+        path = os.path.join("output", "profiles", datetime.now().strftime("%Y%m%d_%H%M%S"))
+        os.environ[PROFILE_DIR_ENV_VAR] = path  # Later steps in this run share the bundle
+    return path
+
+
+def describe_context(context: StepContext, deep: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Shape and memory footprint of every DataFrame held by a StepContext."""
+    candidates = {"data": context._data}
+    candidates.update({f"state.{k}": v for k, v in context._state.items()})
+    candidates.update({f"data.{k}": v for k, v in context.data.items()})
+    frames = {}
+    for name, value in candidates.items():
+        if isinstance(value, pd.DataFrame):
+            frames[name] = {
+                "rows": int(value.shape[0]),
+                "columns": int(value.shape[1]),
+                "memory_mb": round(value.memory_usage(index=True, deep=deep).sum() / 1024 ** 2, 3),
+            }
+    return frames
+
+
+class StepProfiler:
+    """Collects per-phase timings, allocations and context footprints for one step run."""
+
+    def __init__(self, step_name: str, step_number: int, class_name: str, modes: Optional[Set[str]] = None):
+        self.step_name = step_name
+        self.step_number = step_number
+        self.class_name = class_name
+        self.modes = profile_modes() if modes is None else modes
+        self.phases: List[Dict[str, Any]] = []
+        self._profiler = cProfile.Profile() if "cprofile" in self.modes else None
+        self._started_tracemalloc = False
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.modes)
+
+    def start(self) -> None:
+        if "memory" in self.modes and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextmanager
+    def phase(self, name: str, context: StepContext) -> Iterator[Dict[str, Any]]:
+        record: Dict[str, Any] = {"phase": name}
+        if self._started_tracemalloc:
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        wall, cpu = time.perf_counter(), time.process_time()
+        if self._profiler:
+            self._profiler.enable()
+        try:
+            yield record
+            record["status"] = "ok"
+        except BaseException as e:
+            record["status"] = f"error: {type(e).__name__}"
+            raise
+        finally:
+            if self._profiler:
+                self._profiler.disable()
+            record["wall_s"] = round(time.perf_counter() - wall, 4)
+            record["cpu_s"] = round(time.process_time() - cpu, 4)
+            if self._started_tracemalloc:
+                current, peak = tracemalloc.get_traced_memory()
+                record["traced_current_mb"] = round(current / 1024 ** 2, 3)
+                record["traced_peak_mb"] = round(peak / 1024 ** 2, 3)
+                diff = tracemalloc.take_snapshot().compare_to(before, "lineno")
+                record["top_allocations"] = [
+                    {"location": str(stat.traceback), "size_diff_mb": round(stat.size_diff / 1024 ** 2, 3),
+                     "count_diff": stat.count_diff}
+                    for stat in diff[:TOP_ALLOCATIONS]
+                ]
+            if self.enabled:
+                record["context_frames"] = describe_context(context, deep="frames" in self.modes)
+            self.phases.append(record)
+
+    def summary(self) -> str:
+        return ", ".join(f"{p['phase']} {p['wall_s']:.2f}s" for p in self.phases)
+
+    def write_bundle(self, output_dir: Optional[str] = None) -> Optional[str]:
+        """Write <dir>/stepNN_<Class>.json (+ .prof/.txt with cProfile); returns the JSON path."""
+        if not self.enabled:
+            return None
+        output_dir = output_dir or profile_bundle_dir()
+        os.makedirs(output_dir, exist_ok=True)
+        stem = os.path.join(output_dir, f"step{self.step_number:02d}_{re.sub(r'[^A-Za-z0-9_]+', '_', self.class_name)}")
+        report: Dict[str, Any] = {
+            "step_name": self.step_name,
+            "step_number": self.step_number,
+            "class_name": self.class_name,
+            "modes": sorted(self.modes),
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "total_wall_s": round(sum(p["wall_s"] for p in self.phases), 4),
+            "phases": self.phases,
+        }
+        if self._profiler:
+            self._profiler.dump_stats(stem + ".prof")
+            text = io.StringIO()
+            pstats.Stats(self._profiler, stream=text).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            with open(stem + "_cprofile.txt", "w", encoding="utf-8") as f:
+                f.write(text.getvalue())
+            report["cprofile"] = {"stats": stem + ".prof", "summary": stem + "_cprofile.txt"}
+        with open(stem + ".json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return stem + ".json"
@@ -4,6 +4,7 @@ from abc import ABC, abstractmethod
 
 from .context import StepContext
 from .logger import PipelineLogger
+from .profiling import StepProfiler
 
 
 class Step(ABC):
@@ -19,19 +20,43 @@ class Step(ABC):
         self.class_name = self.__class__.__name__
 
     def execute(self, context: StepContext) -> StepContext:
+        """Run the four phases, timing each one.
+
+        With STEP_PROFILE set (see core.profiling) the run also captures
+        cProfile stats, tracemalloc snapshots at phase boundaries and the
+        DataFrames held by the context, written to the run's profile bundle.
+        """
         self.logger.info(
             f"Starting step #{self.step_number}: {self.step_name}", self.class_name
         )
-        context = self.setup(context)
-        context = self.apply(context)
+        profiler = StepProfiler(self.step_name, self.step_number, self.class_name)
+        profiler.start()
+        try:
+            with profiler.phase("setup", context):
+                context = self.setup(context)
+            with profiler.phase("apply", context):
+                context = self.apply(context)
 
-        self.logger.info(
-            f"Validating results for step #{self.step_number}: {self.step_name}",
-            self.class_name,
-        )
-        self.validate(context)
+            self.logger.info(
+                f"Validating results for step #{self.step_number}: {self.step_name}",
+                self.class_name,
+            )
+            with profiler.phase("validate", context):
+                self.validate(context)
+
+            with profiler.phase("persist", context):
+                context = self.persist(context)
+        finally:
+            profiler.stop()
+            self.logger.info(f"Phase timings: {profiler.summary()}", self.class_name)
+            try:
+                bundle = profiler.write_bundle()
+            except OSError as e:
+                self.logger.warning(f"Could not write profile bundle: {e}", self.class_name)
+            else:
+                if bundle:
+                    self.logger.info(f"Profile written to {bundle}", self.class_name)
 
-        context = self.persist(context)
         self.logger.info(
             f"Step #{self.step_number}: {self.step_name} finished successfully",
             self.class_name,
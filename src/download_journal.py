@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Download Journal
+================
+
+Transactional record of Step 1's downloads in a SQLite database (WAL mode),
+one row per (period, store, endpoint): status, attempts, row and byte counts
+and a SHA-256 of the store's slice of the payload. Each API batch is
+committed in a single transaction together with the spool parts
+(BatchDatasetWriter) holding its data, so after a crash:
+
+- completed stores are an index lookup, and are never downloaded again
+- spool parts written by a batch that never committed are discarded
+- the committed parts are finalized by the next run (or --recover)
+
+Endpoints are "config" and "sales" (the two API calls) plus "output", the
+store's merged category/SPU rows; a store is complete when all three are done.
+
+Key Functions:
+- DownloadJournal.record_batch: Commit one batch's per-store outcomes and parts
+- DownloadJournal.completed_stores: Stores that need no download
+- DownloadJournal.committed_parts: Spool parts that belong to committed batches
+- DownloadJournal.mark_finalized: The period's final files now hold the data
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+import pandas as pd
+
+ENDPOINTS = ("config", "sales", "output")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    period TEXT NOT NULL,
+    batch_id INTEGER NOT NULL,
+    parts TEXT NOT NULL,
+    finalized INTEGER NOT NULL DEFAULT 0,
+    committed_at TEXT NOT NULL,
+    PRIMARY KEY (period, batch_id)
+);
+CREATE TABLE IF NOT EXISTS downloads (
+    period TEXT NOT NULL,
+    str_code TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    rows INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    checksum TEXT,
+    batch_id INTEGER,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (period, str_code, endpoint)
+);
+CREATE INDEX IF NOT EXISTS downloads_status ON downloads (period, endpoint, status);
+"""
+
+
+def payload_digests(*frames: Optional[pd.DataFrame], store_column: str = "str_code") -> Dict[str, tuple]:
+    """Per store: (rows, bytes, sha256) of its records in the frames, serialized as JSON."""
+    totals: Dict[str, list] = {}
+    for df in frames:
+        if df is None or df.empty or store_column not in df.columns:
+            continue
+        for store, rows in df.groupby(df[store_column].astype(str).str.strip(), sort=False):
+            payload = rows.to_json(orient="records", force_ascii=False).encode("utf-8")
+            entry = totals.setdefault(store, [0, 0, hashlib.sha256()])
+            entry[0] += len(rows)
+            entry[1] += len(payload)
+            entry[2].update(payload)
+    return {store: (rows, size, digest.hexdigest()) for store, (rows, size, digest) in totals.items()}
+
+
+class DownloadJournal:
+    """SQLite journal of per-(period, store, endpoint) download state."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "DownloadJournal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def record_batch(self, period: str, stores: Sequence[str], endpoint_frames: Mapping[str, Optional[pd.DataFrame]],
+                     output_stores: Iterable[str], parts: Sequence[str] = (),
+                     output_frames: Sequence[Optional[pd.DataFrame]] = ()) -> int:
+        """
+        Commit one batch atomically: the outcome of every requested store on each
+        endpoint (done when it returned rows, else missing) and the spool parts
+        written for it. Returns the batch id.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        stores = [str(s).strip() for s in stores]
+        outcomes = {endpoint: payload_digests(endpoint_frames.get(endpoint)) for endpoint in ("config", "sales")}
+        output_digests = payload_digests(*output_frames)
+        outcomes["output"] = {store: output_digests.get(store, (0, 0, None))
+                              for store in (str(s).strip() for s in output_stores)}
+
+        with self._conn:
+            batch_id = self._conn.execute(
+                "SELECT COALESCE(MAX(batch_id), 0) + 1 FROM batches WHERE period = ?", (period,)).fetchone()[0]
+            self._conn.execute("INSERT INTO batches (period, batch_id, parts, committed_at) VALUES (?, ?, ?, ?)",
+                               (period, batch_id, json.dumps(list(parts)), now))
+            rows = []
+            for endpoint in ENDPOINTS:
+                for store in stores:
+                    found = outcomes[endpoint].get(store)
+                    status = "done" if found is not None else "missing"
+                    n_rows, size, digest = found if found is not None else (0, 0, None)
+                    rows.append((period, store, endpoint, status, n_rows, size, digest, batch_id, now))
+            self._conn.executemany(
+                """INSERT INTO downloads (period, str_code, endpoint, status, attempts, rows, bytes, checksum, batch_id, updated_at)
+                   VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?)
+                   ON CONFLICT (period, str_code, endpoint) DO UPDATE SET
+                       status = excluded.status, attempts = attempts + 1, rows = excluded.rows,
+                       bytes = excluded.bytes, checksum = excluded.checksum,
+                       batch_id = excluded.batch_id, updated_at = excluded.updated_at""",
+                rows)
+        return batch_id
+
+    def record_parts(self, period: str, parts: Sequence[str]) -> Optional[int]:
+        """Commit spool parts that belong to no download (e.g. existing final files re-read)."""
+        if not parts:
+            return None
+        return self.record_batch(period, [], {}, [], parts=parts)
+
+    def completed_stores(self, period: str, include_unfinalized: bool = True) -> Set[str]:
+        """
+        Stores done on every endpoint. include_unfinalized=False leaves out stores
+        whose data only lives in spool parts not yet written to the final files.
+        """
+        query = """
+            SELECT d.str_code FROM downloads d JOIN batches b ON b.period = d.period AND b.batch_id = d.batch_id
+            WHERE d.period = ? AND d.status = 'done' {finalized}
+            GROUP BY d.str_code HAVING COUNT(DISTINCT d.endpoint) = ?"""
+        finalized = "" if include_unfinalized else "AND b.finalized = 1"
+        rows = self._conn.execute(query.format(finalized=finalized), (period, len(ENDPOINTS))).fetchall()
+        return {row[0] for row in rows}
+
+    def finalized_stores(self, period: str) -> Set[str]:
+        """Completed stores whose data was written to the final files."""
+        return self.completed_stores(period, include_unfinalized=False)
+
+    def failed_stores(self, period: str) -> Set[str]:
+        """Stores attempted at least once that are not complete."""
+        attempted = {row[0] for row in self._conn.execute(
+            "SELECT DISTINCT str_code FROM downloads WHERE period = ?", (period,))}
+        return attempted - self.completed_stores(period)
+
+    def committed_parts(self, period: str) -> List[str]:
+        """Spool parts of committed batches not yet finalized, in commit order."""
+        parts: List[str] = []
+        for (encoded,) in self._conn.execute(
+                "SELECT parts FROM batches WHERE period = ? AND finalized = 0 ORDER BY batch_id", (period,)):
+            parts.extend(json.loads(encoded))
+        return parts
+
+    def mark_finalized(self, period: str) -> None:
+        with self._conn:
+            self._conn.execute("UPDATE batches SET finalized = 1, parts = '[]' WHERE period = ? AND finalized = 0",
+                               (period,))
+
+    def reset(self, period: str) -> None:
+        """Forget everything recorded for a period (forced full re-download)."""
+        with self._conn:
+            self._conn.execute("DELETE FROM downloads WHERE period = ?", (period,))
+            self._conn.execute("DELETE FROM batches WHERE period = ?", (period,))
+
+    def summary(self, period: str) -> Dict[str, Dict[str, int]]:
+        """{endpoint: {status: stores}} for a period."""
+        result: Dict[str, Dict[str, int]] = {}
+        for endpoint, status, count in self._conn.execute(
+                "SELECT endpoint, status, COUNT(*) FROM downloads WHERE period = ? GROUP BY endpoint, status", (period,)):
+            result.setdefault(endpoint, {})[status] = count
+        return result
+
+    def import_store_lists(self, period: str, processed: Iterable[str], failed: Iterable[str] = ()) -> int:
+        """
+        One-time import of the processed_stores/failed_stores text lists of
+        earlier runs; processed stores count as complete and already finalized.
+        """
+        processed = {str(s).strip() for s in processed if str(s).strip()}
+        failed = {str(s).strip() for s in failed if str(s).strip()} - processed
+        if not processed and not failed:
+            return 0
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._conn:
+            batch_id = self._conn.execute(
+                "SELECT COALESCE(MAX(batch_id), 0) + 1 FROM batches WHERE period = ?", (period,)).fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO batches (period, batch_id, parts, finalized, committed_at) VALUES (?, ?, '[]', 1, ?)",
+                (period, batch_id, now))
+            self._conn.executemany(
+                """INSERT OR IGNORE INTO downloads (period, str_code, endpoint, status, attempts, batch_id, updated_at)
+                   VALUES (?, ?, ?, ?, 1, ?, ?)""",
+                [(period, store, endpoint, "done" if store in processed else "missing", batch_id, now)
+                 for store in processed | failed for endpoint in ENDPOINTS])
+        return len(processed) + len(failed)
@@ -0,0 +1,322 @@
+"""
+Streaming Excel Export for Large Pipeline Workbooks
+===================================================
+
+Shared writer for the deliverable workbooks (Steps 16, 21, 27, 31, 37).
+
+Workbooks are built with openpyxl's write-only mode, so rows are streamed to
+disk as they are appended instead of being held as a grid of cell objects.
+Formatting is declared up front per sheet (header style, column styles and
+widths, freeze panes, auto-filter, conditional formats over whole column
+ranges) rather than applied by looping over finished cells afterwards.
+
+Sheets larger than Excel's row limit are split automatically into
+"<title> (2)", "<title> (3)", ... with the header row repeated.
+
+Usage:
+    from src.excel_export import StreamingWorkbook, CellStyle
+
+    with StreamingWorkbook("output/report.xlsx") as wb:
+        wb.write_dataframe("Summary", df, header_style=CellStyle(bold=True),
+                           freeze_header=True, autofilter=True)
+        sheet = wb.sheet("Notes", column_widths={"A": 60})
+        sheet.append(["Report notes"], style=CellStyle(bold=True, size=14))
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+import pandas as pd
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+# Excel hard limits
+MAX_SHEET_ROWS = 1_048_576
+MAX_SHEET_TITLE = 31
+
+# Rows converted to Python values per batch when streaming a DataFrame
+WRITE_CHUNK_ROWS = 50_000
+
+# Rows sampled when sizing columns automatically
+WIDTH_SAMPLE_ROWS = 200
+
+
+@dataclass(frozen=True)
+class CellStyle:
+    """Declarative cell style; converted to openpyxl objects once per workbook."""
+    bold: bool = False
+    size: Optional[float] = None
+    color: Optional[str] = None
+    fill: Optional[str] = None
+    horizontal: Optional[str] = None
+    vertical: Optional[str] = None
+    number_format: Optional[str] = None
+
+
+# Header look of ``DataFrame.to_excel`` for sheets that used to be written by pandas
+DEFAULT_HEADER_STYLE = CellStyle(bold=True, horizontal="center", vertical="top")
+
+
+@dataclass(frozen=True)
+class ConditionalFormat:
+    """
+    Conditional format applied to the data range of one or more columns.
+
+    ``rule`` is either an openpyxl rule object or a callable taking a mapping of
+    column name -> column letter and the first data row and returning one, for
+    formula rules that reference another column (e.g. ``'$C2="CRITICAL"'``).
+    """
+    columns: Sequence[str]
+    rule: Any
+
+
+def fit_column_widths(df: pd.DataFrame, padding: int = 2, min_width: float = 0,
+                      max_width: Optional[float] = None,
+                      sample_rows: Optional[int] = WIDTH_SAMPLE_ROWS) -> Dict[str, float]:
+    """Column widths from header and value string lengths of the first rows (missing values count as empty)."""
+    sample = df if sample_rows is None else df.head(sample_rows)
+    widths = {}
+    for name in df.columns:
+        longest = len(str(name))
+        if len(sample):
+            text = sample[name].astype(str).where(sample[name].notna(), "")
+            longest = max(longest, int(text.str.len().max()))
+        width = max(min_width, longest + padding)
+        if max_width is not None:
+            width = min(width, max_width)
+        widths[name] = width
+    return widths
+
+
+def _part_title(title: str, part: int) -> str:
+    if part == 1:
+        return title[:MAX_SHEET_TITLE]
+    suffix = f" ({part})"
+    return title[:MAX_SHEET_TITLE - len(suffix)] + suffix
+
+
+def _python_rows(frame: pd.DataFrame) -> Iterable[tuple]:
+    """Rows of plain values with missing values as empty cells."""
+    values = frame.astype(object).where(frame.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+class StreamingSheet:
+    """
+    Write-only sheet that rolls over into a continuation sheet when full.
+
+    Column widths, freeze panes and the repeated header are fixed when the
+    sheet is created, because write-only sheets cannot be changed once rows
+    have been written.
+    """
+
+    def __init__(self, workbook: 'StreamingWorkbook', title: str,
+                 column_widths: Optional[Mapping[Union[str, int], float]] = None,
+                 freeze_panes: Optional[str] = None,
+                 header: Optional[Sequence[Any]] = None,
+                 header_style: Optional[CellStyle] = None,
+                 max_rows: int = MAX_SHEET_ROWS):
+        self.workbook = workbook
+        self.title = title
+        self.column_widths = dict(column_widths or {})
+        self.freeze_panes = freeze_panes
+        self.header = list(header) if header is not None else None
+        self.header_style = header_style
+        self.max_rows = max_rows
+        self.parts: List[Any] = []
+        self.part_rows: List[int] = []
+        self._new_part()
+
+    @property
+    def worksheet(self):
+        """Worksheet currently being written."""
+        return self.parts[-1]
+
+    @property
+    def row_count(self) -> int:
+        """Rows written to the current worksheet, header included."""
+        return self.part_rows[-1]
+
+    def _new_part(self) -> None:
+        ws = self.workbook.workbook.create_sheet(_part_title(self.title, len(self.parts) + 1))
+        for column, width in self.column_widths.items():
+            letter = get_column_letter(column) if isinstance(column, int) else column
+            ws.column_dimensions[letter].width = width
+        if self.freeze_panes:
+            ws.freeze_panes = self.freeze_panes
+        self.parts.append(ws)
+        self.part_rows.append(0)
+        if self.header is not None:
+            self._write(self.header, self.header_style)
+
+    def _write(self, values: Sequence[Any], style: Optional[CellStyle] = None,
+               column_styles: Optional[Sequence[Optional[CellStyle]]] = None) -> None:
+        if style is not None or column_styles is not None:
+            row = []
+            for i, value in enumerate(values):
+                cell_style = style
+                if column_styles is not None and column_styles[i] is not None:
+                    cell_style = column_styles[i]
+                row.append(self.workbook.cell(self.worksheet, value, cell_style))
+            values = row
+        self.worksheet.append(values)
+        self.part_rows[-1] += 1
+
+    def append(self, values: Sequence[Any], style: Optional[CellStyle] = None,
+               column_styles: Optional[Sequence[Optional[CellStyle]]] = None) -> None:
+        """Append one row, styling every cell with ``style`` and/or per column."""
+        if self.row_count >= self.max_rows:
+            self._new_part()
+        self._write(values, style, column_styles)
+
+    def append_cells(self, cells: Sequence[Any]) -> None:
+        """Append one row of ``value`` or ``(value, CellStyle)`` entries."""
+        values, styles = [], []
+        for cell in cells:
+            if isinstance(cell, tuple):
+                values.append(cell[0])
+                styles.append(cell[1])
+            else:
+                values.append(cell)
+                styles.append(None)
+        self.append(values, column_styles=styles)
+
+    def blank(self, rows: int = 1) -> None:
+        """Append empty rows."""
+        for _ in range(rows):
+            self.append([])
+
+
+class StreamingWorkbook:
+    """
+    Write-only workbook; use as a context manager or call ``save()``.
+
+    Styles are cached so each distinct ``CellStyle`` maps to one set of
+    openpyxl style objects regardless of how many cells use it.
+    """
+
+    def __init__(self, path: str):
+        if not OPENPYXL_AVAILABLE:
+            raise ImportError("openpyxl is required for Excel export")
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self._styles: Dict[CellStyle, Dict[str, Any]] = {}
+
+    def __enter__(self) -> 'StreamingWorkbook':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.save()
+
+    def save(self) -> str:
+        if not self.workbook.sheetnames:
+            self.workbook.create_sheet("Sheet1")
+        self.workbook.save(self.path)
+        return self.path
+
+    def _style_parts(self, style: CellStyle) -> Dict[str, Any]:
+        parts = self._styles.get(style)
+        if parts is None:
+            parts = {}
+            if style.bold or style.size or style.color:
+                parts['font'] = Font(bold=style.bold, size=style.size, color=style.color)
+            if style.fill:
+                parts['fill'] = PatternFill(start_color=style.fill, end_color=style.fill, fill_type='solid')
+            if style.horizontal or style.vertical:
+                parts['alignment'] = Alignment(horizontal=style.horizontal, vertical=style.vertical)
+            if style.number_format:
+                parts['number_format'] = style.number_format
+            self._styles[style] = parts
+        return parts
+
+    def cell(self, worksheet, value: Any, style: Optional[CellStyle] = None):
+        """Styled write-only cell (or the bare value when unstyled)."""
+        if style is None:
+            return value
+        cell = WriteOnlyCell(worksheet, value=value)
+        for attr, obj in self._style_parts(style).items():
+            setattr(cell, attr, obj)
+        return cell
+
+    def sheet(self, title: str, **kwargs) -> StreamingSheet:
+        """Create a free-form sheet; see ``StreamingSheet`` for options."""
+        return StreamingSheet(self, title, **kwargs)
+
+    def write_dataframe(self, title: str, df: pd.DataFrame,
+                        header_style: Optional[CellStyle] = None,
+                        column_styles: Optional[Mapping[str, CellStyle]] = None,
+                        column_widths: Union[None, str, Mapping[str, float]] = None,
+                        freeze_header: bool = False,
+                        autofilter: bool = False,
+                        conditional_formats: Sequence[ConditionalFormat] = (),
+                        title_rows: Sequence[Sequence[Any]] = (),
+                        max_rows: int = MAX_SHEET_ROWS) -> StreamingSheet:
+        """
+        Stream a DataFrame (index dropped) into one or more sheets.
+
+        ``column_widths`` is a mapping of column name -> width, or ``'auto'`` to
+        fit the header and first rows. ``title_rows`` are ``append_cells`` rows
+        written above the table on the first sheet only. Freeze panes,
+        auto-filter and conditional formats are applied to every part.
+        """
+        columns = list(df.columns)
+        letters = {name: get_column_letter(i + 1) for i, name in enumerate(columns)}
+
+        if isinstance(column_widths, str):
+            column_widths = fit_column_widths(df)
+        widths = {letters[name]: width for name, width in (column_widths or {}).items() if name in letters}
+
+        header_row = len(title_rows) + 1
+        freeze = f"A{header_row + 1}" if freeze_header and len(df) else None
+        styles = None
+        if column_styles:
+            styles = [column_styles.get(name) for name in columns]
+
+        sheet = StreamingSheet(self, title, column_widths=widths, freeze_panes=freeze,
+                               max_rows=max_rows)
+        for row in title_rows:
+            sheet.append_cells(row)
+        sheet.header = [str(name) for name in columns]
+        sheet.header_style = header_style
+        sheet.append(sheet.header, style=header_style)
+        first_data_row = sheet.row_count + 1
+        if freeze:
+            sheet.freeze_panes = "A2"  # continuation parts start at the header
+
+        # Continuation parts carry the header only; work out their sizes up front
+        # so ranges can be declared before the rows are streamed.
+        remaining = len(df)
+        spans = []
+        capacity = max_rows - sheet.row_count
+        while True:
+            rows = min(remaining, capacity)
+            spans.append((first_data_row if not spans else 2, rows))
+            remaining -= rows
+            if remaining <= 0:
+                break
+            capacity = max_rows - 1
+
+        for start in range(0, len(df), WRITE_CHUNK_ROWS):
+            for values in _python_rows(df.iloc[start:start + WRITE_CHUNK_ROWS]):
+                sheet.append(values, column_styles=styles)
+
+        for ws, (first, rows) in zip(sheet.parts, spans):
+            last = first + rows - 1
+            if columns and autofilter:
+                ws.auto_filter.ref = f"A{first - 1}:{letters[columns[-1]]}{max(last, first - 1)}"
+            if rows <= 0:
+                continue
+            for fmt in conditional_formats:
+                rule = fmt.rule(letters, first) if callable(fmt.rule) else fmt.rule
+                for name in fmt.columns:
+                    if name in letters:
+                        ws.conditional_formatting.add(f"{letters[name]}{first}:{letters[name]}{last}", rule)
+        return sheet
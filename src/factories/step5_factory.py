@@ -14,17 +14,19 @@ from pathlib import Path
 from steps.feels_like_temperature_step import FeelsLikeTemperatureStep, FeelsLikeConfig
 from repositories.weather_data_repository import WeatherDataRepository
 from repositories.weather_file_repository import WeatherFileRepository
-from repositories.weather_api_repository import WeatherApiRepository
+from repositories.weather_api_repository import AsyncWeatherApiRepository, WeatherApiRepository
 from repositories.csv_repository import CsvFileRepository
 from repositories.json_repository import ProgressTrackingRepository
 from core.logger import PipelineLogger
+from src.http_response_cache import get_default_cache
 
 
 def create_feels_like_temperature_step(
     target_yyyymm: Optional[str] = None,
     target_period: Optional[str] = None,
     coordinates_file: Optional[str] = None,
-    logger: Optional[PipelineLogger] = None
+    logger: Optional[PipelineLogger] = None,
+    download_concurrency: int = 1
 ) -> FeelsLikeTemperatureStep:
     """
     Create FeelsLikeTemperatureStep with all dependencies injected.
@@ -45,6 +47,7 @@ def create_feels_like_temperature_step(
         target_period: Target period ("A" or "B")
         coordinates_file: Path to coordinates CSV (default: 2stores)
         logger: Pipeline logger (creates new if None)
+        download_concurrency: Weather downloads in flight at once (1 = sequential)
         
     Returns:
         Configured FeelsLikeTemperatureStep instance ready to execute
@@ -69,7 +72,8 @@ def create_feels_like_temperature_step(
     )
     
     weather_api_repo = WeatherApiRepository(
-        logger=logger
+        logger=logger,
+        cache=get_default_cache()
     )
     
     weather_file_repo = WeatherFileRepository(
@@ -94,7 +98,11 @@ def create_feels_like_temperature_step(
         weather_file_repo=weather_file_repo,
         altitude_repo=altitude_repo,
         progress_repo=progress_repo,
-        logger=logger
+        logger=logger,
+        async_weather_api_repo=(
+            AsyncWeatherApiRepository.from_repository(weather_api_repo, max_concurrency=download_concurrency)
+            if download_concurrency > 1 else None
+        )
     )
     
     # Create output repositories (one per output file, following Steps 1 & 2 pattern)
@@ -12,3 +12,7 @@ class FireducksCompat:
 
 # Register fireducks.pandas as a module
 sys.modules['fireducks.pandas'] = FireducksCompat()
+
+# Expose the submodule as an attribute too, as a real package would once
+# imported (libraries probing ``fireducks.pandas`` via sys.modules rely on it)
+pandas = sys.modules['fireducks.pandas']
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+HTTP Response Cache
+===================
+
+Persistent cache for the pipeline's API calls (Fast Fish store config/sales,
+Open-Meteo archive and elevation), kept in one SQLite file
+(data/http_cache/responses.sqlite by default):
+
+- entries are keyed by the SHA-256 of (method, endpoint URL, normalized
+  payload): query params and JSON body with sorted keys and None values
+  dropped, so equal requests hit whatever the argument order
+- bodies are stored zlib-compressed and content-addressed (SHA-256 of the
+  raw body), so identical responses share one blob
+- every entry has a TTL; None means immutable, used for closed periods
+  whose answers never change (period_ttl, date_range_ttl)
+- total compressed size is bounded (HTTP_CACHE_MAX_MB): expired entries go
+  first, then the least recently used. The running total lives in a meta row
+  and a body is deleted when the last entry using it is replaced or evicted,
+  so a store costs the same whatever the cache size
+
+HTTP_CACHE_MODE selects the behaviour: "readwrite" (default) serves fresh
+entries and stores new successful responses, "offline" replays from the
+cache only (a miss raises CacheMissError, a requests ConnectionError, so
+existing error handling applies), "refresh" always asks the network and
+re-stores, "off" bypasses the cache. A pipeline run with --fresh-repull-api
+(PIPELINE_FRESH_REPULL_API=1) defaults to "refresh".
+
+Key Functions:
+- HttpResponseCache.request: Drop-in for session.get/post with caching
+- period_ttl / date_range_ttl: TTL rules for Fast Fish periods and date ranges
+- get_default_cache: Process-wide cache configured from the environment
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+CACHE_MODES = ("readwrite", "offline", "refresh", "off")
+DEFAULT_CACHE_PATH = os.path.join("data", "http_cache", "responses.sqlite")
+DEFAULT_MAX_MB = 2048
+OPEN_PERIOD_TTL_SECONDS = 6 * 3600  # Answers for a period still in progress change during the day
+CLOSED_PERIOD_GRACE_DAYS = 7  # Late corrections (returns, archive reanalysis) settle within a week
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (
+    sha TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    raw_size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    method TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    request TEXT NOT NULL,
+    body_sha TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    content_type TEXT,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS entries_body ON entries (body_sha);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class CacheMissError(requests.exceptions.ConnectionError):
+    """Raised in offline mode when a request has no cached response."""
+    pass
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items(), key=lambda item: str(item[0])) if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if hasattr(value, 'item'):  # numpy scalars
+        return value.item()
+    return value
+
+
+def request_key(method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                json_body: Any = None) -> str:
+    """SHA-256 of (method, endpoint, normalized params and JSON body)."""
+    canonical = json.dumps([method.upper(), url.rstrip('/'), _normalize(params or {}), _normalize(json_body)],
+                           sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def period_ttl(yyyymm: str, period: Optional[str] = None, today: Optional[date] = None) -> Optional[int]:
+    """
+    TTL for a Fast Fish period (A = days 1-15, B = 16-end, None = whole month):
+    None (immutable) once it ended more than CLOSED_PERIOD_GRACE_DAYS ago.
+    """
+    year, month = int(yyyymm[:4]), int(yyyymm[4:6])
+    if period == "A":
+        end = date(year, month, 15)
+    else:
+        end = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return date_range_ttl(end, today)
+
+
+def date_range_ttl(end_date, today: Optional[date] = None) -> Optional[int]:
+    """TTL for data up to end_date (date or YYYY-MM-DD): None once the range is closed."""
+    if isinstance(end_date, str):
+        end_date = datetime.strptime(end_date[:10], "%Y-%m-%d").date()
+    today = today or date.today()
+    return None if (today - end_date).days > CLOSED_PERIOD_GRACE_DAYS else OPEN_PERIOD_TTL_SECONDS
+
+
+def _successful(response: requests.Response) -> bool:
+    return response.status_code == 200
+
+
+def has_response_data(response: requests.Response) -> bool:
+    """Fast Fish answers worth caching: HTTP 200 with records (an empty one may be a transient API gap)."""
+    try:
+        return response.status_code == 200 and bool(response.json().get("data"))
+    except ValueError:
+        return False
+
+
+class HttpResponseCache:
+    """SQLite-backed, compressed, size-bounded cache of HTTP responses."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, mode: str = "readwrite",
+                 max_bytes: int = DEFAULT_MAX_MB * 1024 ** 2):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown HTTP cache mode '{mode}' (expected one of {', '.join(CACHE_MODES)})")
+        self.path = path
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()  # Repositories may share one cache across threads
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use, so a cache that is never consulted leaves no file behind
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            with self._conn:
+                # Caches written before the running total existed start from one full sum
+                self._conn.execute("""INSERT OR IGNORE INTO meta (name, value)
+                                      SELECT 'total_size', COALESCE(SUM(size), 0) FROM bodies""")
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self) -> "HttpResponseCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def lookup(self, key: str, url: str = "") -> Optional[requests.Response]:
+        """The cached response for key if present and not expired."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                """SELECT b.data, e.status, e.content_type, e.expires_at FROM entries e
+                   JOIN bodies b ON b.sha = e.body_sha WHERE e.key = ?""", (key,)).fetchone()
+            if row is None or (row[3] is not None and row[3] <= now):
+                return None
+            with conn:
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        data, status, content_type, _ = row
+        response = requests.Response()
+        response.status_code = status
+        response._content = zlib.decompress(data)
+        response.headers['Content-Type'] = content_type or 'application/json'
+        response.headers['X-Cache'] = 'HIT'
+        response.encoding = 'utf-8'
+        response.url = url
+        return response
+
+    def store(self, key: str, method: str, url: str, request_payload: Dict[str, Any],
+              response: requests.Response, ttl: Optional[int]) -> None:
+        """Store a response body under key; ttl None = never expires."""
+        body = response.content or b''
+        sha = hashlib.sha256(body).hexdigest()
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                if conn.execute("SELECT 1 FROM bodies WHERE sha = ?", (sha,)).fetchone() is None:
+                    data = zlib.compress(body, 6)
+                    # OR IGNORE: another process may have stored the same body since the check
+                    if conn.execute("INSERT OR IGNORE INTO bodies (sha, data, size, raw_size) VALUES (?, ?, ?, ?)",
+                                    (sha, data, len(data), len(body))).rowcount:
+                        self._add_to_total(conn, len(data))
+                replaced = conn.execute("SELECT body_sha FROM entries WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    """INSERT OR REPLACE INTO entries
+                       (key, method, endpoint, request, body_sha, status, content_type, created_at, accessed_at, expires_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (key, method.upper(), url, json.dumps(_normalize(request_payload), ensure_ascii=False, default=str),
+                     sha, response.status_code, response.headers.get('Content-Type'), now, now,
+                     None if ttl is None else now + ttl))
+                if replaced is not None and replaced[0] != sha:
+                    self._release_bodies(conn, [replaced[0]])
+            self._evict(conn)
+        self.stored += 1
+
+    @staticmethod
+    def _add_to_total(conn: sqlite3.Connection, delta: int) -> None:
+        conn.execute("UPDATE meta SET value = value + ? WHERE name = 'total_size'", (delta,))
+
+    @staticmethod
+    def _total(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT value FROM meta WHERE name = 'total_size'").fetchone()[0]
+
+    def _release_bodies(self, conn: sqlite3.Connection, shas) -> None:
+        """Delete the given bodies that no entry refers to any more (an indexed lookup each)."""
+        freed = 0
+        for sha in set(shas):
+            if conn.execute("SELECT 1 FROM entries WHERE body_sha = ? LIMIT 1", (sha,)).fetchone() is None:
+                row = conn.execute("SELECT size FROM bodies WHERE sha = ?", (sha,)).fetchone()
+                if row is not None:
+                    conn.execute("DELETE FROM bodies WHERE sha = ?", (sha,))
+                    freed += row[0]
+        if freed:
+            self._add_to_total(conn, -freed)
+
+    def _delete_entries(self, conn: sqlite3.Connection, rows) -> None:
+        """Delete (key, body_sha) entries and the bodies only they used."""
+        conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in rows])
+        self._release_bodies(conn, [sha for _, sha in rows])
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Bring the stored size under max_bytes: expired entries first, then least recently used."""
+        if self._total(conn) <= self.max_bytes:
+            return
+        with conn:
+            expired = conn.execute("SELECT key, body_sha FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                                   (time.time(),)).fetchall()
+            self._delete_entries(conn, expired)
+        target = int(self.max_bytes * 0.9)  # Headroom so every insert does not evict again
+        while self._total(conn) > target:
+            with conn:
+                oldest = conn.execute("SELECT key, body_sha FROM entries ORDER BY accessed_at LIMIT 64").fetchall()
+                if not oldest:
+                    break
+                self._delete_entries(conn, oldest)
+
+    def request(self, session: Any, method: str, url: str, *, params: Optional[Dict[str, Any]] = None,
+                json: Any = None, ttl: Optional[int] = OPEN_PERIOD_TTL_SECONDS,
+                cacheable: Callable[[requests.Response], bool] = _successful,
+                **kwargs) -> requests.Response:
+        """
+        session.get/post(url, params=..., json=..., **kwargs) through the cache.
+        session may be a requests.Session or the requests module; only
+        responses accepted by cacheable (default: HTTP 200) are stored.
+        """
+        send = getattr(session, method.lower())
+        if params is not None:
+            kwargs['params'] = params
+        if json is not None:
+            kwargs['json'] = json
+        if self.mode == "off":
+            return send(url, **kwargs)
+
+        key = request_key(method, url, params, json)
+        if self.mode in ("readwrite", "offline"):
+            cached = self.lookup(key, url)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            if self.mode == "offline":
+                self.misses += 1
+                raise CacheMissError(f"No cached response for {method.upper()} {url} (HTTP_CACHE_MODE=offline)")
+        self.misses += 1
+        response = send(url, **kwargs)
+        if cacheable(response):
+            self.store(key, method, url, {'params': params, 'json': json}, response, ttl)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and sizes on disk, plus this process's hit/miss/store counts."""
+        with self._lock:
+            conn = self._connection()
+            entries, immutable = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(expires_at IS NULL), 0) FROM entries").fetchone()
+            size, raw_size = conn.execute("SELECT COALESCE(SUM(size), 0), COALESCE(SUM(raw_size), 0) FROM bodies").fetchone()
+        return {'mode': self.mode, 'entries': entries, 'immutable_entries': immutable,
+                'stored_mb': round(size / 1024 ** 2, 2), 'raw_mb': round(raw_size / 1024 ** 2, 2),
+                'hits': self.hits, 'misses': self.misses, 'stored': self.stored}
+
+    def summary(self) -> str:
+        """One log line: this process's hits and misses."""
+        return f"HTTP cache ({self.mode}): {self.hits} hits, {self.misses} misses, {self.stored} stored"
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM entries")
+                conn.execute("DELETE FROM bodies")
+                conn.execute("UPDATE meta SET value = 0 WHERE name = 'total_size'")
+
+
+def cache_mode_from_env() -> str:
+    mode = os.environ.get("HTTP_CACHE_MODE", "").strip().lower()
+    if not mode:
+        fresh_repull = os.environ.get("PIPELINE_FRESH_REPULL_API", "").strip().lower() in ("1", "true", "yes", "on")
+        mode = "refresh" if fresh_repull else "readwrite"
+    return mode
+
+
+_DEFAULT_CACHE: Optional[HttpResponseCache] = None
+
+
+def get_default_cache() -> HttpResponseCache:
+    """Process-wide cache from HTTP_CACHE_PATH / HTTP_CACHE_MODE / HTTP_CACHE_MAX_MB."""
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = HttpResponseCache(
+            path=os.environ.get("HTTP_CACHE_PATH", DEFAULT_CACHE_PATH),
+            mode=cache_mode_from_env(),
+            max_bytes=int(float(os.environ.get("HTTP_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 ** 2),
+        )
+    return _DEFAULT_CACHE
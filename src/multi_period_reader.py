@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Multi-Period Dataset Reader
+===========================
+
+Shared loader for the year-over-year period scans of Steps 2 and 3. Candidate
+paths for every period are resolved in one pass, the chosen CSVs are decoded
+in parallel (thread pool; pandas' pyarrow CSV engine when pyarrow is
+installed and a dtype map covers every column read, the C parser otherwise),
+with optional column projection and dtype maps, and decoded files are memoized
+(LRU, bounded in bytes) so a second scan of the same window (e.g. Step 3's
+subcategory and SPU loaders) does not re-parse anything.
+
+Key Functions:
+- resolve_period_paths: Existing candidate paths per period label
+- MultiPeriodReader.read_files: Parallel, memoized decode of a set of files
+- MultiPeriodReader.read_periods: First readable candidate per period
+- MultiPeriodReader.load: One concatenated, period-tagged frame
+"""
+
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from artifact_dtypes import compact_and_record, concat_artifact_frames
+except ImportError:  # Imported as src.multi_period_reader without src/ on sys.path
+    from src.artifact_dtypes import compact_and_record, concat_artifact_frames
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    from pandas._libs.parsers import STR_NA_VALUES  # The C parser's default NA tokens
+except ImportError:  # pragma: no cover
+    STR_NA_VALUES = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+                     '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+
+MULTI_PERIOD_READ_WORKERS = int(os.environ.get("MULTI_PERIOD_READ_WORKERS", min(8, os.cpu_count() or 1)))
+MULTI_PERIOD_CSV_ENGINE = os.environ.get("MULTI_PERIOD_CSV_ENGINE", "pyarrow" if PYARROW_AVAILABLE else "c")
+MULTI_PERIOD_MEMO_MAX_BYTES = int(os.environ.get("MULTI_PERIOD_MEMO_MAX_BYTES", 2 * 1024 ** 3))
+MULTI_PERIOD_MEMO_MAX_ENTRIES = int(os.environ.get("MULTI_PERIOD_MEMO_MAX_ENTRIES", 256))
+
+ErrorCallback = Callable[[str, Exception], None]
+
+
+def resolve_period_paths(period_labels: Sequence[str], templates: Sequence[str]) -> Dict[str, List[str]]:
+    """
+    Existing candidate paths per period label, in template order.
+
+    templates are format strings with a '{period_label}' field, e.g.
+    'data/api_data/complete_spu_sales_{period_label}.csv'.
+    """
+    return {
+        label: [path for path in (t.format(period_label=label) for t in templates) if os.path.exists(path)]
+        for label in period_labels
+    }
+
+
+class MultiPeriodReader:
+    """
+    Parallel CSV reader with a per-run memo keyed by file identity and projection.
+
+    columns projects onto the listed columns that exist in a file (missing ones
+    are skipped, not an error); dtype maps are applied to the columns present.
+    With artifact set (an artifact_dtypes registry name) each file is compacted
+    before it is memoized. Callers receive copies, so mutating a returned frame
+    never leaks into the memo.
+
+    The memo is a least-recently-used cache holding at most memo_max_bytes of
+    decoded frames (and memo_max_entries entries); a frame larger than the byte
+    budget is returned but not memoized.
+    """
+
+    def __init__(self, engine: Optional[str] = None, max_workers: Optional[int] = None,
+                 memo_max_bytes: Optional[int] = None, memo_max_entries: Optional[int] = None):
+        self.engine = engine or MULTI_PERIOD_CSV_ENGINE
+        if self.engine == 'pyarrow' and not PYARROW_AVAILABLE:
+            self.engine = 'c'
+        self.max_workers = max(1, max_workers or MULTI_PERIOD_READ_WORKERS)
+        self.memo_max_bytes = MULTI_PERIOD_MEMO_MAX_BYTES if memo_max_bytes is None else memo_max_bytes
+        self.memo_max_entries = MULTI_PERIOD_MEMO_MAX_ENTRIES if memo_max_entries is None else memo_max_entries
+        self._memo: "OrderedDict[tuple, Tuple[object, int]]" = OrderedDict()
+        self._memo_bytes = 0
+
+    def clear(self) -> None:
+        self._memo.clear()
+        self._memo_bytes = 0
+
+    @property
+    def memo_bytes(self) -> int:
+        return self._memo_bytes
+
+    def _recall(self, key: tuple) -> Optional[object]:
+        entry = self._memo.get(key)
+        if entry is None:
+            return None
+        self._memo.move_to_end(key)
+        return entry[0]
+
+    def _remember(self, key: tuple, frame: object) -> None:
+        size = int(frame.memory_usage(deep=True).sum()) if isinstance(frame, pd.DataFrame) else 0
+        if size > self.memo_max_bytes or self.memo_max_entries < 1:
+            return
+        self._memo[key] = (frame, size)
+        self._memo_bytes += size
+        while self._memo_bytes > self.memo_max_bytes or len(self._memo) > self.memo_max_entries:
+            _, (_, evicted) = self._memo.popitem(last=False)
+            self._memo_bytes -= evicted
+
+    @staticmethod
+    def _key(path: str, columns: Optional[Sequence[str]], dtype: Optional[Mapping[str, object]],
+             artifact: Optional[str] = None) -> tuple:
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size,
+                tuple(columns) if columns is not None else None,
+                tuple(sorted((k, str(v)) for k, v in dtype.items())) if dtype else None, artifact)
+
+    def _decode(self, path: str, columns: Optional[Sequence[str]], dtype: Optional[Mapping[str, object]]) -> pd.DataFrame:
+        usecols = None
+        engine = 'c'
+        if columns is not None or dtype:
+            header = list(pd.read_csv(path, nrows=0).columns)
+            if columns is not None:
+                usecols = [c for c in header if c in set(columns)]
+            present = usecols if usecols is not None else header
+            dtype = {k: v for k, v in (dtype or {}).items() if k in present} or None
+            # pyarrow infers types differently from the C parser (datetime64 for
+            # date-like text, float64 for some integer columns), so it only decodes
+            # files whose every column has an explicit dtype
+            if self.engine == 'pyarrow' and dtype and all(c in dtype for c in present):
+                engine = 'pyarrow'
+        if engine == 'pyarrow':
+            try:
+                return self._decode_pyarrow(path, present, dtype)
+            except Exception:
+                pass  # Let the C parser decide (and report) on files pyarrow rejects
+        return pd.read_csv(path, usecols=usecols, dtype=dtype, low_memory=False)
+
+    @staticmethod
+    def _decode_pyarrow(path: str, columns: Sequence[str], dtype: Mapping[str, object]) -> pd.DataFrame:
+        """
+        Decode with pyarrow's CSV reader, matching the C parser for a full dtype map.
+
+        Text-like targets (str, object, string, category) are read as strings, so
+        keys keep their leading zeros and date-like text is never inferred as a
+        timestamp; numeric targets are parsed by pyarrow. Every column is then cast
+        to its requested dtype, with the C parser's NA tokens and NaN for nulls.
+        """
+        column_types = {c: pa.string() for c in columns
+                        if not pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(dtype[c]))}
+        table = pa_csv.read_csv(path, convert_options=pa_csv.ConvertOptions(
+            include_columns=list(columns), column_types=column_types, null_values=sorted(STR_NA_VALUES),
+            strings_can_be_null=True, quoted_strings_can_be_null=True))
+        frame = table.to_pandas()
+        # pyarrow leaves None in string columns where the C parser puts NaN
+        text_cols = frame.columns[frame.dtypes == object]
+        if len(text_cols):
+            frame[text_cols] = frame[text_cols].where(frame[text_cols].notna(), np.nan)
+        return frame.astype({c: dtype[c] for c in columns})
+
+    def read_files(self, paths: Sequence[str], columns: Optional[Sequence[str]] = None,
+                   dtype: Optional[Mapping[str, object]] = None, artifact: Optional[str] = None) -> Dict[str, object]:
+        """
+        Decode paths in parallel; returns {path: DataFrame or the Exception raised}.
+        """
+        results: Dict[str, object] = {}
+        pending: Dict[str, tuple] = {}
+        for path in dict.fromkeys(paths):
+            try:
+                key = self._key(path, columns, dtype, artifact)
+            except OSError as e:
+                results[path] = e
+                continue
+            cached = self._recall(key)
+            if cached is not None:
+                results[path] = cached.copy() if isinstance(cached, pd.DataFrame) else cached
+            else:
+                pending[path] = key
+
+        def decode(path: str):
+            try:
+                frame = self._decode(path, columns, dtype)
+                return compact_and_record(frame, artifact) if artifact else frame
+            except Exception as e:
+                return e
+
+        if pending:
+            workers = min(self.max_workers, len(pending))
+            if workers == 1:
+                decoded = [decode(p) for p in pending]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    decoded = list(pool.map(decode, pending))
+            for (path, key), frame in zip(pending.items(), decoded):
+                self._remember(key, frame)  # Parse failures are memoized too
+                if isinstance(frame, pd.DataFrame):
+                    frame = frame.copy()
+                results[path] = frame
+        return {path: results[path] for path in dict.fromkeys(paths)}
+
+    def read_periods(self, period_labels: Sequence[str], templates: Sequence[str],
+                     columns: Optional[Sequence[str]] = None, dtype: Optional[Mapping[str, object]] = None,
+                     on_error: Optional[ErrorCallback] = None,
+                     artifact: Optional[str] = None) -> Dict[str, Tuple[str, pd.DataFrame]]:
+        """
+        First readable candidate per period: {period_label: (path, frame)}.
+
+        The first existing candidate of every period is decoded in one parallel
+        batch; a period whose file fails to parse falls through to its next
+        candidate (reported via on_error), as the serial scans did.
+        """
+        candidates = resolve_period_paths(period_labels, templates)
+        found: Dict[str, Tuple[str, pd.DataFrame]] = {}
+        depth = 0
+        while True:
+            batch = {label: paths[depth] for label, paths in candidates.items()
+                     if label not in found and depth < len(paths)}
+            if not batch:
+                break
+            frames = self.read_files(list(batch.values()), columns=columns, dtype=dtype, artifact=artifact)
+            for label, path in batch.items():
+                frame = frames[path]
+                if isinstance(frame, pd.DataFrame):
+                    found[label] = (path, frame)
+                elif on_error is not None:
+                    on_error(path, frame)
+            depth += 1
+        return {label: found[label] for label in period_labels if label in found}
+
+    def load(self, period_labels: Sequence[str], templates: Sequence[str],
+             columns: Optional[Sequence[str]] = None, dtype: Optional[Mapping[str, object]] = None,
+             period_column: Optional[str] = 'period', on_error: Optional[ErrorCallback] = None,
+             artifact: Optional[str] = None) -> pd.DataFrame:
+        """All periods found as one frame (in period order), tagged with period_column"""
+        found = self.read_periods(period_labels, templates, columns=columns, dtype=dtype, on_error=on_error,
+                                  artifact=artifact)
+        if not found:
+            return pd.DataFrame()
+        frames = []
+        for label, (_, frame) in found.items():
+            if period_column:
+                frame[period_column] = label
+            frames.append(frame)
+        return concat_artifact_frames(frames, ignore_index=True)
+
+
+# One reader per process: each pipeline step runs as its own script, so the
+# memo lives exactly as long as the run.
+_DEFAULT_READER: Optional[MultiPeriodReader] = None
+
+
+def get_multi_period_reader() -> MultiPeriodReader:
+    global _DEFAULT_READER
+    if _DEFAULT_READER is None:
+        _DEFAULT_READER = MultiPeriodReader()
+    return _DEFAULT_READER
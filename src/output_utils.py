@@ -81,6 +81,32 @@ def create_output_with_symlinks(
     else:
         raise ValueError(f"Unsupported file extension: {file_extension}")
     
+    return link_output_with_symlinks(timestamped_file, base_path, period_label, file_extension, create_generic)
+
+
+def link_output_with_symlinks(
+    timestamped_file: str,
+    base_path: str,
+    period_label: str,
+    file_extension: str = ".csv",
+    create_generic: bool = True
+) -> Tuple[str, str, Optional[str]]:
+    """
+    Create period-labeled and generic symlinks for an already-written timestamped file.
+    
+    Used by writers that stream their output to disk incrementally and therefore
+    cannot hand a complete DataFrame to create_output_with_symlinks.
+    
+    Args:
+        timestamped_file: Existing timestamped output file
+        base_path: Base path without extension
+        period_label: Period label (e.g., "202510A")
+        file_extension: File extension (default: ".csv")
+        create_generic: Whether to create generic symlink (default: True)
+    
+    Returns:
+        tuple: (timestamped_file, period_file, generic_file)
+    """
     # 2. Create period-labeled symlink (for downstream steps)
     period_file = f"{base_path}_{period_label}{file_extension}"
     _create_symlink(timestamped_file, period_file)
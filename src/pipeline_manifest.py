@@ -12,25 +12,67 @@ Date: 2025-07-24
 
 import json
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List, Tuple
 import logging
 
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows: only writers within one process are serialized
+    FCNTL_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Synthetic combined files must never be registered or resolved
+FORBIDDEN_SUFFIXES = [
+    "complete_spu_sales_2025Q2_combined.csv",
+    "complete_category_sales_2025Q2_combined.csv",
+    "store_config_2025Q2_combined.csv",
+    "_combined.csv",
+]
+
+
+def _file_signature(stat: os.stat_result) -> Tuple[int, int, int]:
+    # Atomic replacement gives the manifest a new inode, so this changes on every write
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
 class PipelineManifest:
-    """Manages explicit file paths between pipeline steps"""
+    """Manages explicit file paths between pipeline steps.
+    
+    Safe for concurrent writers: every write happens under an exclusive lock
+    file, re-reads the manifest, merges this instance's new registrations into
+    it and atomically replaces the file, so steps running in parallel (threads
+    or processes) never drop each other's outputs. Use batch() to register
+    several outputs with a single write.
+    """
     
     def __init__(self, manifest_path: str = "output/pipeline_manifest.json"):
         self.manifest_path = manifest_path
+        self.lock_path = manifest_path + ".lock"
+        self._lock = threading.RLock()
+        self._local = threading.local()  # Per-thread batch depth
+        self._pending: Dict[int, Dict[Tuple[str, str], Dict]] = {}  # Thread id -> unflushed registrations
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._index: Dict[str, Dict[str, Tuple[str, str, str]]] = {}  # step -> output -> (created, path, period)
+        self._by_created: Dict[str, List[str]] = {}  # step -> output keys sorted by created (built on demand)
         self.manifest = self._load_manifest()
+        self._rebuild_index()
     
     def _load_manifest(self) -> Dict:
         """Load existing manifest or create new one"""
+        self._signature = None
         if os.path.exists(self.manifest_path):
             try:
                 with open(self.manifest_path, 'r') as f:
-                    return json.load(f)
+                    signature = _file_signature(os.fstat(f.fileno()))
+                    manifest = json.load(f)
+                manifest.setdefault("steps", {})
+                self._signature = signature
+                return manifest
             except Exception as e:
                 logger.warning(f"Failed to load manifest: {e}, creating new one")
         
@@ -41,66 +83,164 @@ class PipelineManifest:
             "current_session": datetime.now().strftime("%Y%m%d_%H%M%S")
         }
     
-    def _save_manifest(self):
-        """Save manifest to disk"""
-        self.manifest["last_updated"] = datetime.now().isoformat()
-        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive access to the manifest file across threads and processes."""
+        with self._lock:
+            if not FCNTL_AVAILABLE:
+                yield
+                return
+            os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    
+    def _apply_pending(self) -> None:
+        for pending in self._pending.values():
+            for (step_name, output_type), entry in pending.items():
+                self.manifest["steps"].setdefault(step_name, {}).setdefault("outputs", {})[output_type] = entry
+    
+    def _save_manifest(self, registrations: Dict[Tuple[str, str], Dict]):
+        """Merge registrations into the manifest on disk and replace it atomically"""
+        with self._file_lock():
+            self.manifest = self._load_manifest()  # Pick up other writers' outputs
+            for (step_name, output_type), entry in registrations.items():
+                self.manifest["steps"].setdefault(step_name, {}).setdefault("outputs", {})[output_type] = entry
+            self.manifest["last_updated"] = datetime.now().isoformat()
+            os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+            
+            # Written in full next to the manifest, then renamed over it: readers see
+            # the old or the new manifest, never a partial one
+            tmp_path = f"{self.manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(self.manifest, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.manifest_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self._signature = _file_signature(os.stat(self.manifest_path))
+            self._apply_pending()  # Other threads' open batches stay visible, unwritten
+            self._rebuild_index()
         
-        with open(self.manifest_path, 'w') as f:
-            json.dump(self.manifest, f, indent=2)
+        logger.info(f"Pipeline manifest updated: {self.manifest_path} ({len(registrations)} outputs)")
+    
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the manifest if another writer replaced it since it was last read or written."""
+        try:
+            signature = _file_signature(os.stat(self.manifest_path))
+        except OSError:
+            signature = None
+        with self._lock:
+            if signature == self._signature and not force:
+                return False
+            self.manifest = self._load_manifest()
+            self._apply_pending()
+            self._rebuild_index()
+            return True
+    
+    @contextmanager
+    def batch(self) -> Iterator["PipelineManifest"]:
+        """Register several outputs with one manifest write.
         
-        logger.info(f"Pipeline manifest updated: {self.manifest_path}")
+        Registrations made in this thread inside the block are visible to
+        queries immediately and written when the outermost batch exits. If the
+        block raises, they are discarded instead.
+        """
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        ok = False
+        try:
+            yield self
+            ok = True
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                with self._lock:
+                    registrations = self._pending.pop(threading.get_ident(), {})
+                    if ok and registrations:
+                        self._save_manifest(registrations)
+                    elif registrations:
+                        logger.warning(f"Discarded {len(registrations)} manifest registrations of a failed batch")
+                        self.refresh(force=True)
     
     def register_output(self, step_name: str, output_type: str, file_path: str, metadata: Optional[Dict] = None):
         """Register an output file from a pipeline step"""
         # Global guard: forbid synthetic combined files anywhere in manifest
-        forbidden_suffixes = [
-            "complete_spu_sales_2025Q2_combined.csv",
-            "complete_category_sales_2025Q2_combined.csv",
-            "store_config_2025Q2_combined.csv",
-            "_combined.csv",
-        ]
-        if any(str(file_path).endswith(suf) for suf in forbidden_suffixes):
+        if any(str(file_path).endswith(suf) for suf in FORBIDDEN_SUFFIXES):
             raise ValueError(f"Refusing to register forbidden combined file in manifest: {file_path}")
-        if step_name not in self.manifest["steps"]:
-            self.manifest["steps"][step_name] = {}
         
-        if "outputs" not in self.manifest["steps"][step_name]:
-            self.manifest["steps"][step_name]["outputs"] = {}
-        
-        self.manifest["steps"][step_name]["outputs"][output_type] = {
+        try:
+            size = os.stat(file_path).st_size
+            exists = True
+        except OSError:
+            size, exists = 0, False
+        entry = {
             "file_path": file_path,
             "created": datetime.now().isoformat(),
-            "exists": os.path.exists(file_path),
-            "size_mb": round(os.path.getsize(file_path) / (1024*1024), 2) if os.path.exists(file_path) else 0,
+            "exists": exists,
+            "size_mb": round(size / (1024*1024), 2),
             "metadata": metadata or {}
         }
-        
-        self._save_manifest()
+        self.register_entry(step_name, output_type, entry)
         logger.info(f"Registered {step_name} output: {output_type} -> {file_path}")
     
+    def register_entry(self, step_name: str, output_type: str, entry: Dict):
+        """Store a caller-built output entry as is (for steps that keep their own entry fields).
+        
+        The entry needs at least file_path and created; like register_output it
+        is written now, or when the enclosing batch() exits.
+        """
+        with self._lock:
+            self.manifest["steps"].setdefault(step_name, {}).setdefault("outputs", {})[output_type] = entry
+            self._index_output(step_name, output_type, entry)
+            if getattr(self._local, "depth", 0):
+                self._pending.setdefault(threading.get_ident(), {})[(step_name, output_type)] = entry
+            else:
+                self._save_manifest({(step_name, output_type): entry})
+    
+    def _rebuild_index(self) -> None:
+        self._index = {}
+        self._by_created = {}
+        for step_name, step in self.manifest.get("steps", {}).items():
+            if not isinstance(step, dict):
+                continue
+            for key, val in step.get("outputs", {}).items():
+                self._index_output(step_name, key, val)
+    
+    def _index_output(self, step_name: str, key: str, val) -> None:
+        if not isinstance(val, dict):
+            return
+        metadata = val.get("metadata")
+        period = str(metadata.get("period_label", "")) if isinstance(metadata, dict) else ""
+        self._index.setdefault(step_name, {})[key] = (val.get("created") or "", val.get("file_path"), period)
+        self._by_created.pop(step_name, None)
+    
     def get_latest_output(self, step_name: str, key_prefix: Optional[str] = None, period_label: Optional[str] = None) -> Optional[str]:
         """Return the newest output path for a step, optionally filtered by key prefix and period.
         - key_prefix: e.g., 'enhanced_fast_fish_format' or 'enriched_store_attributes'
         - period_label: e.g., '202509A'
         """
-        step = self.manifest.get("steps", {}).get(step_name, {})
-        outputs: Dict = step.get("outputs", {})
-        candidates = []
-        for key, val in outputs.items():
-            if not isinstance(val, dict):
-                continue
-            if key_prefix and not key.startswith(key_prefix):
-                continue
-            if period_label and not (key.endswith(period_label) or str(val.get("metadata", {}).get("period_label", "")).endswith(period_label)):
-                continue
-            created = val.get("created") or ""
-            candidates.append((created, val.get("file_path")))
-        candidates = [c for c in candidates if c[1]]
-        if not candidates:
-            return None
-        candidates.sort(key=lambda x: x[0])
-        return candidates[-1][1]
+        with self._lock:
+            outputs = self._index.get(step_name, {})
+            ordered = self._by_created.get(step_name)
+            if ordered is None:
+                ordered = self._by_created[step_name] = sorted(outputs, key=lambda key: outputs[key][0])
+            for key in reversed(ordered):
+                created, file_path, period = outputs[key]
+                if not file_path:
+                    continue
+                if key_prefix and not key.startswith(key_prefix):
+                    continue
+                if period_label and not (key.endswith(period_label) or period.endswith(period_label)):
+                    continue
+                return file_path
+        return None
     
     def get_input(self, step_name: str, input_type: str) -> Optional[str]:
         """Get the exact file path for a required input"""
@@ -156,12 +296,7 @@ class PipelineManifest:
         
         file_path = self.manifest["steps"][source_step]["outputs"][source_output]["file_path"]
         # Guard against combined synthetic files
-        if any(str(file_path).endswith(suf) for suf in [
-            "complete_spu_sales_2025Q2_combined.csv",
-            "complete_category_sales_2025Q2_combined.csv",
-            "store_config_2025Q2_combined.csv",
-            "_combined.csv",
-        ]):
+        if any(str(file_path).endswith(suf) for suf in FORBIDDEN_SUFFIXES):
             logger.error(f"Manifest refers to forbidden combined file: {file_path}")
             return None
         
@@ -209,6 +344,8 @@ def get_manifest() -> PipelineManifest:
     global _manifest
     if _manifest is None:
         _manifest = PipelineManifest()
+    else:
+        _manifest.refresh()
     return _manifest
 
 def reset_manifest(delete_file: bool = True, manifest_path: Optional[str] = None) -> None:
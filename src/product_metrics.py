@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Product Metrics Kernel
+======================
+
+Shared, vectorized product metrics for the product-structure steps (25-30).
+Every metric is computed with groupby/np.select over the whole SPU catalog in
+one pass and cached per period, so Steps 25, 26, 27 and 30 read the same
+numbers instead of each re-deriving them row by row.
+
+Key Functions:
+- sales_amount_quantity: Per-row sales amount/quantity (split or aggregate columns)
+- store_product_prices: Per-(store, SPU) unit prices (Step 26)
+- product_metrics: Per-SPU sales, coverage, fashion mix and consistency (Step 25)
+- classify_product_roles: CORE / SEASONAL / FILLER / CLEARANCE rules via np.select (Step 25)
+- cluster_product_metrics: Per-(cluster, SPU) sales and store counts (Steps 25, 27)
+- cluster_context: Dominant cluster and cluster spread per SPU (Step 25)
+- sell_through_rates: SPU-store-day sell-through for any grouping (Step 30)
+- get_product_metrics: All of the above for a period, cached on disk
+- get_sell_through_rates: sell_through_rates for a period, cached on disk
+"""
+
+import hashlib
+import os
+import pickle
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+PRODUCT_METRICS_CACHE_DIR = os.environ.get("PRODUCT_METRICS_CACHE_DIR", "output/cache")
+KERNEL_VERSION = 1  # Bump when metric definitions change so cached periods are recomputed
+
+ROLES = ['CORE', 'SEASONAL', 'FILLER', 'CLEARANCE']
+
+# Same thresholds as Step 25's PRODUCT_ROLE_THRESHOLDS
+PRODUCT_ROLE_THRESHOLDS = {
+    'CORE': {'min_total_sales': 14000},
+    'SEASONAL': {'fashion_basic_ratio_threshold': 0.6, 'min_total_sales': 10000},
+    'CLEARANCE': {'low_sales_threshold': 5000},
+}
+
+AMOUNT_COLUMNS = ['total_amount', 'spu_sales_amt', 'sales_amt', 'sal_amt']
+QUANTITY_COLUMNS = ['total_quantity', 'quantity', 'sales_qty', 'sal_qty']
+UNIT_PRICE_RANGE = (1, 1000)  # Reasonable price range for retail items
+
+
+def _column(df: pd.DataFrame, column: str) -> pd.Series:
+    """Numeric column (non-numeric → NaN), or zeros when absent"""
+    if column in df.columns:
+        return pd.to_numeric(df[column], errors='coerce')
+    return pd.Series(0.0, index=df.index)
+
+
+def sales_amount_quantity(sales_df: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    """
+    Per-row total sales amount and quantity.
+
+    Uses the fashion/basic split when both halves are present, otherwise the
+    first aggregate column found. Missing values stay NaN so callers can drop them.
+    """
+    def pick(split: List[str], aggregates: List[str]) -> pd.Series:
+        if set(split).issubset(sales_df.columns):
+            return _column(sales_df, split[0]) + _column(sales_df, split[1])
+        for column in aggregates:
+            if column in sales_df.columns:
+                return _column(sales_df, column)
+        return pd.Series(0.0, index=sales_df.index)
+
+    amount = pick(['fashion_sal_amt', 'basic_sal_amt'], AMOUNT_COLUMNS)
+    quantity = pick(['fashion_sal_qty', 'basic_sal_qty'], QUANTITY_COLUMNS)
+    return amount.astype(float), quantity.astype(float)
+
+
+def store_product_prices(sales_df: pd.DataFrame) -> pd.DataFrame:
+    """Unit price per (store, SPU) row, keeping rows with positive sales inside UNIT_PRICE_RANGE"""
+    amount, quantity = sales_amount_quantity(sales_df)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        unit_price = amount / quantity
+    valid = (quantity > 0) & (amount > 0) & unit_price.between(*UNIT_PRICE_RANGE)
+
+    prices = pd.DataFrame({
+        'str_code': sales_df['str_code'],
+        'spu_code': sales_df['spu_code'],
+        'unit_price': unit_price,
+        'total_amount': amount,
+        'total_quantity': quantity,
+        'fashion_amount': _column(sales_df, 'fashion_sal_amt').astype(float),
+        'basic_amount': _column(sales_df, 'basic_sal_amt').astype(float),
+        'fashion_quantity': _column(sales_df, 'fashion_sal_qty').astype(float),
+        'basic_quantity': _column(sales_df, 'basic_sal_qty').astype(float),
+    })
+    return prices[valid].reset_index(drop=True)
+
+
+def product_metrics(sales_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-SPU sales, store coverage, fashion/basic mix and consistency.
+
+    One row per SPU in first-appearance order. stores_selling counts SPU-store
+    records; consistency is 1 - std/mean of per-record sales (population std),
+    bounded to [0, 1] and 0 for single-record SPUs or records with missing sales.
+    """
+    fashion = _column(sales_df, 'fashion_sal_amt')
+    basic = _column(sales_df, 'basic_sal_amt')
+    record_sales = fashion + basic
+    by_spu = pd.DataFrame({
+        'spu_code': sales_df['spu_code'],
+        'fashion': fashion,
+        'basic': basic,
+        'record_sales': record_sales,
+        'missing': record_sales.isna(),
+    }).groupby('spu_code', sort=False)
+
+    metrics = by_spu.agg(
+        fashion_sales=('fashion', 'sum'),
+        basic_sales=('basic', 'sum'),
+        stores_selling=('record_sales', 'size'),
+        mean_sales=('record_sales', 'mean'),
+        std_sales=('record_sales', lambda s: s.std(ddof=0)),
+        any_missing=('missing', 'any'),
+    )
+    metrics['total_sales'] = metrics['fashion_sales'] + metrics['basic_sales']
+    has_sales = metrics['total_sales'] > 0
+    metrics['fashion_ratio'] = np.where(has_sales, metrics['fashion_sales'] / metrics['total_sales'].where(has_sales), 0.0)
+    metrics['basic_ratio'] = np.where(has_sales, metrics['basic_sales'] / metrics['total_sales'].where(has_sales), 0.0)
+
+    total_stores = sales_df['str_code'].nunique()
+    metrics['total_stores'] = total_stores
+    metrics['store_coverage'] = metrics['stores_selling'] / total_stores
+
+    consistent = (metrics['stores_selling'] > 1) & (metrics['mean_sales'] > 0) & ~metrics['any_missing']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        raw_consistency = (1 - metrics['std_sales'] / metrics['mean_sales']).clip(0, 1)
+    metrics['consistency_score'] = np.where(consistent, raw_consistency, 0.0)
+
+    # Category labels come from each SPU's first record, as the per-SPU scan used
+    first = sales_df.drop_duplicates('spu_code').set_index('spu_code')
+    metrics['category'] = first['cate_name'].reindex(metrics.index) if 'cate_name' in first else 'Unknown'
+    metrics['subcategory'] = first['sub_cate_name'].reindex(metrics.index) if 'sub_cate_name' in first else 'Unknown'
+
+    columns = ['total_sales', 'fashion_sales', 'basic_sales', 'fashion_ratio', 'basic_ratio', 'stores_selling',
+               'total_stores', 'store_coverage', 'consistency_score', 'category', 'subcategory']
+    return metrics[columns].reset_index()
+
+
+def _join_parts(parts: List[Tuple[np.ndarray, Any]], n: int) -> np.ndarray:
+    """'; '-join text fragments whose masks are set (fragments may be per-row arrays)"""
+    text = np.full(n, '', dtype=object)
+    for mask, fragment in parts:
+        text = np.where(mask, np.where(text == '', fragment, text + '; ' + fragment), text)
+    return text
+
+
+def classify_product_roles(metrics: pd.DataFrame, thresholds: Dict[str, Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Assign CORE / SEASONAL / FILLER / CLEARANCE with np.select (first matching rule wins).
+
+    - CORE: total_sales ≥ CORE.min_total_sales
+    - SEASONAL: fashion_ratio ≥ threshold and total_sales ≥ SEASONAL.min_total_sales
+    - CLEARANCE: total_sales < CLEARANCE.low_sales_threshold
+    - FILLER: everything else (higher confidence when the fashion mix is balanced)
+    """
+    thresholds = PRODUCT_ROLE_THRESHOLDS if thresholds is None else thresholds
+    sales = metrics['total_sales'].to_numpy(dtype=float)
+    fashion_ratio = metrics['fashion_ratio'].to_numpy(dtype=float)
+    n = len(metrics)
+
+    is_core = sales >= thresholds['CORE']['min_total_sales']
+    is_seasonal = ~is_core & (fashion_ratio >= thresholds['SEASONAL']['fashion_basic_ratio_threshold']) & \
+        (sales >= thresholds['SEASONAL']['min_total_sales'])
+    is_clearance = ~is_core & ~is_seasonal & (sales < thresholds['CLEARANCE']['low_sales_threshold'])
+    is_filler = ~(is_core | is_seasonal | is_clearance)
+    balanced = is_filler & (fashion_ratio > 0.4) & (fashion_ratio < 0.6)
+
+    role = np.select([is_core, is_seasonal, is_clearance], ['CORE', 'SEASONAL', 'CLEARANCE'], 'FILLER')
+    confidence = np.select([is_core, is_seasonal, is_clearance, balanced], [0.95, 0.90, 0.85, 0.85], 0.80)
+
+    amount = np.char.mod('%.0f', sales).astype(object)
+    share = np.char.mod('%.0f%%', fashion_ratio * 100).astype(object)
+    rationale = _join_parts([
+        (is_core, "Excellent sales performance (¥" + amount + ")"),
+        (is_core, "Store-level top performer"),
+        (is_seasonal, "Fashion-focused (" + share + ")"),
+        (is_seasonal, "Strong sales (¥" + amount + ")"),
+        (is_seasonal, "Seasonal appeal product"),
+        (is_clearance, "Below-average sales (¥" + amount + ")"),
+        (is_clearance, "Clearance candidate"),
+        (is_filler, "Solid middle-tier performance"),
+        (is_filler, "Steady sales (¥" + amount + ")"),
+        (balanced, "Balanced fashion-basic mix"),
+    ], n)
+
+    return pd.DataFrame({
+        'spu_code': metrics['spu_code'].to_numpy(),
+        'product_role': role,
+        'confidence_score': confidence,
+        'rationale': rationale,
+        'total_sales': metrics['total_sales'].to_numpy(),
+        'store_coverage': metrics['store_coverage'].to_numpy(),
+        'fashion_ratio': metrics['fashion_ratio'].to_numpy(),
+        'consistency_score': metrics['consistency_score'].to_numpy(),
+        'category': metrics['category'].to_numpy(),
+        'subcategory': metrics['subcategory'].to_numpy(),
+    })
+
+
+def cluster_product_metrics(sales_df: pd.DataFrame, cluster_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-(cluster, SPU) sales and coverage.
+
+    records counts SPU-store rows (the unit Step 27's role mix is measured in);
+    stores_selling counts distinct stores. Stores without a cluster are dropped.
+    """
+    clusters = cluster_df[['str_code', 'cluster_id']]
+    clusters = clusters.assign(str_code=clusters['str_code'].astype(str))
+    joined = pd.DataFrame({
+        'str_code': sales_df['str_code'].astype(str),
+        'spu_code': sales_df['spu_code'],
+        'fashion_sales': _column(sales_df, 'fashion_sal_amt'),
+        'basic_sales': _column(sales_df, 'basic_sal_amt'),
+    }).merge(clusters, on='str_code', how='inner')
+
+    per_cluster = joined.groupby(['cluster_id', 'spu_code'], sort=True).agg(
+        fashion_sales=('fashion_sales', 'sum'),
+        basic_sales=('basic_sales', 'sum'),
+        records=('str_code', 'size'),
+        stores_selling=('str_code', 'nunique'),
+    ).reset_index()
+    per_cluster['total_sales'] = per_cluster['fashion_sales'] + per_cluster['basic_sales']
+    return per_cluster
+
+
+def cluster_context(cluster_products: pd.DataFrame, spu_codes: pd.Series) -> pd.DataFrame:
+    """Dominant cluster (highest sales, lowest id on ties), clusters present and spread for each SPU"""
+    ordered = cluster_products.sort_values(['spu_code', 'total_sales', 'cluster_id'],
+                                           ascending=[True, False, True], kind='mergesort')
+    dominant = ordered.drop_duplicates('spu_code').set_index('spu_code')['cluster_id']
+    present = cluster_products.groupby('spu_code')['cluster_id'].nunique()
+
+    context = pd.DataFrame({'spu_code': spu_codes.to_numpy()})
+    context['dominant_cluster'] = context['spu_code'].map(dominant).fillna(0)
+    context['clusters_present'] = context['spu_code'].map(present).fillna(0).astype(int)
+    context['cluster_distribution'] = np.where(context['clusters_present'] >= 3, 'wide', 'narrow')
+    if pd.api.types.is_float_dtype(context['dominant_cluster']) and \
+            (context['dominant_cluster'] == context['dominant_cluster'].round()).all():
+        context['dominant_cluster'] = context['dominant_cluster'].astype(int)
+    return context
+
+
+def sell_through_rates(df: pd.DataFrame, keys: List[str], period_days: int = 15) -> pd.DataFrame:
+    """
+    SPU-store-day sell-through (sales ÷ inventory, clipped to [0, 1]) for each key group.
+
+    Sales are inventory × historical_st_frac when that column exists, otherwise
+    total_sales_qty. Groups keep first-appearance order; rows with a null key are dropped.
+    """
+    inventory = _column(df, 'total_inventory_qty').fillna(0)
+    if 'historical_st_frac' in df.columns:
+        sold = inventory * _column(df, 'historical_st_frac').fillna(0)
+    else:
+        sold = _column(df, 'total_sales_qty').fillna(0)
+    frame = df[keys].assign(_inventory=inventory, _sold=sold)
+    totals = frame.groupby(keys, sort=False)[['_inventory', '_sold']].sum()
+
+    rates = pd.DataFrame(index=totals.index)
+    rates['spu_store_days_inventory'] = totals['_inventory'] * period_days
+    rates['spu_store_days_sales'] = totals['_sold'] * period_days
+    stocked = rates['spu_store_days_inventory'] > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = rates['spu_store_days_sales'] / rates['spu_store_days_inventory']
+    rates['sell_through_rate'] = np.where(stocked, ratio.clip(0, 1), 0.0)
+    return rates.reset_index()
+
+
+def _fingerprint(frame: pd.DataFrame) -> str:
+    """Content hash of a kernel input, so a cached period is only reused for identical data"""
+    digest = hashlib.sha1(str(KERNEL_VERSION).encode())
+    digest.update(','.join(map(str, frame.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def compute_product_metrics(sales_df: pd.DataFrame, cluster_df: Optional[pd.DataFrame] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Compute every kernel output for one sales frame.
+
+    Returns a dict of frames:
+    - 'products': product_metrics per SPU
+    - 'roles': classify_product_roles, plus cluster_context columns when clusters are given
+    - 'store_prices': store_product_prices
+    - 'cluster_products': cluster_product_metrics (only when clusters are given)
+    """
+    products = product_metrics(sales_df)
+    roles = classify_product_roles(products)
+    outputs = {
+        'products': products,
+        'roles': roles,
+        'store_prices': store_product_prices(sales_df),
+    }
+    if cluster_df is not None:
+        cluster_products = cluster_product_metrics(sales_df, cluster_df)
+        context = cluster_context(cluster_products, roles['spu_code'])
+        outputs['roles'] = pd.concat([roles, context.drop(columns='spu_code')], axis=1)
+        outputs['cluster_products'] = cluster_products
+    return outputs
+
+
+def _read_cache(cache_path: str) -> Optional[Dict[str, Any]]:
+    """Cached payload, or None when absent or unreadable"""
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        return None  # Unreadable or stale cache: caller recomputes
+
+
+def _write_cache(cache_path: str, payload: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+
+
+def get_product_metrics(sales_df: pd.DataFrame, cluster_df: Optional[pd.DataFrame] = None,
+                        period_label: Optional[str] = None,
+                        cache_dir: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Kernel outputs for a period, computed once and cached on disk.
+
+    The cache file (product_metrics_<period>.pkl) stores fingerprints of the
+    sales and cluster inputs. A later step on the same period and sales reuses
+    it; cluster-level outputs are reused only when the cluster mapping also
+    matches. Changed inputs recompute and overwrite the cache. Without a period
+    label nothing is cached.
+    """
+    if not period_label:
+        return compute_product_metrics(sales_df, cluster_df)
+
+    cache_dir = PRODUCT_METRICS_CACHE_DIR if cache_dir is None else cache_dir
+    cache_path = os.path.join(cache_dir, f"product_metrics_{period_label}.pkl")
+    key_columns = [c for c in sales_df.columns if c in (
+        ['str_code', 'spu_code', 'cate_name', 'sub_cate_name', 'fashion_sal_amt', 'basic_sal_amt',
+         'fashion_sal_qty', 'basic_sal_qty'] + AMOUNT_COLUMNS + QUANTITY_COLUMNS)]
+    sales_fingerprint = _fingerprint(sales_df[key_columns])
+    cluster_fingerprint = _fingerprint(cluster_df[['str_code', 'cluster_id']]) if cluster_df is not None else None
+
+    cached = _read_cache(cache_path)
+    if cached is not None and cached.get('sales_fingerprint') == sales_fingerprint and \
+            (cluster_df is None or cached.get('cluster_fingerprint') == cluster_fingerprint):
+        return cached['outputs']
+
+    outputs = compute_product_metrics(sales_df, cluster_df)
+    _write_cache(cache_path, {'sales_fingerprint': sales_fingerprint, 'cluster_fingerprint': cluster_fingerprint,
+                              'outputs': outputs})
+    return outputs
+
+
+def get_sell_through_rates(df: pd.DataFrame, keys: List[str], period_days: int = 15,
+                           period_label: Optional[str] = None,
+                           cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    sell_through_rates for a period, computed once and cached on disk.
+
+    The cache file (sell_through_<period>_<keys>_<days>d.pkl) stores a
+    fingerprint of the key, inventory and sales columns, so a rerun on the same
+    period reuses the rates and changed inputs recompute them. Without a period
+    label nothing is cached.
+    """
+    if not period_label:
+        return sell_through_rates(df, keys, period_days=period_days)
+
+    cache_dir = PRODUCT_METRICS_CACHE_DIR if cache_dir is None else cache_dir
+    cache_path = os.path.join(cache_dir, f"sell_through_{period_label}_{'-'.join(keys)}_{period_days}d.pkl")
+    input_columns = keys + [c for c in ['total_inventory_qty', 'historical_st_frac', 'total_sales_qty']
+                            if c in df.columns]
+    fingerprint = _fingerprint(df[input_columns])
+
+    cached = _read_cache(cache_path)
+    if cached is not None and cached.get('fingerprint') == fingerprint:
+        return cached['rates'].copy()
+
+    rates = sell_through_rates(df, keys, period_days=period_days)
+    _write_cache(cache_path, {'fingerprint': fingerprint, 'rates': rates})
+    return rates
@@ -8,7 +8,8 @@ from .csv_repository import (
     SPUMappingRepository,
     SPUMetadataRepository
 )
-from .api_repository import FastFishApiRepository
+from .async_http import AsyncHttpClient, BackoffPolicy, RetryPolicy
+from .api_repository import AsyncFastFishApiRepository, FastFishApiRepository
 from .tracking_repository import StoreTrackingRepository
 from .period_discovery_repository import PeriodDiscoveryRepository
 from .coordinate_extraction_repository import (
@@ -18,7 +19,7 @@ from .coordinate_extraction_repository import (
 )
 from .spu_aggregation_repository import SpuAggregationRepository
 from .validation_repository import ValidationRepository
-from .weather_api_repository import WeatherApiRepository
+from .weather_api_repository import AsyncWeatherApiRepository, WeatherApiRepository
 from .json_repository import JsonFileRepository, ProgressTrackingRepository
 from .matrix_repository import MatrixRepository
 from .temperature_repository import TemperatureRepository
@@ -33,6 +34,10 @@ __all__ = [
     "SPUMappingRepository",
     "SPUMetadataRepository",
     "FastFishApiRepository",
+    "AsyncFastFishApiRepository",
+    "AsyncHttpClient",
+    "RetryPolicy",
+    "BackoffPolicy",
     "StoreTrackingRepository",
     "PeriodDiscoveryRepository",
     "CoordinateExtractionRepository",
@@ -41,6 +46,7 @@ __all__ = [
     "SpuAggregationRepository",
     "ValidationRepository",
     "WeatherApiRepository",
+    "AsyncWeatherApiRepository",
     "JsonFileRepository",
     "ProgressTrackingRepository",
     "MatrixRepository",
@@ -7,9 +7,28 @@ from urllib3.util.retry import Retry
 import pandas as pd
 
 from src.core.logger import PipelineLogger
+from src.http_response_cache import HttpResponseCache, has_response_data, period_ttl
+from .async_http import AsyncHttpClient, RetryPolicy
 from .base import Repository
 
 
+def _store_payload(store_codes: List[str], yyyymm: str, period: Optional[str]) -> Dict[str, Any]:
+    payload = {"strCodes": store_codes, "yyyymm": yyyymm}
+    if period:
+        payload["period"] = period
+    return payload
+
+
+def _parse_records(response: requests.Response) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """(records, distinct store codes in them) of an API response; raises on HTTP errors."""
+    response.raise_for_status()
+    data = response.json().get("data", [])
+    if not data:
+        return [], []
+    processed_codes = [str(record["str_code"]) for record in data if "str_code" in record]
+    return data, list(set(processed_codes))
+
+
 class FastFishApiRepository(Repository):
     """Repository for accessing FastFish API endpoints."""
     
@@ -20,7 +39,8 @@ class FastFishApiRepository(Repository):
                  headers: Dict[str, str],
                  timeout: int,
                  retry_config: Dict[str, Any],
-                 logger: PipelineLogger):
+                 logger: PipelineLogger,
+                 cache: Optional[HttpResponseCache] = None):
         Repository.__init__(self, logger)
         self.base_url = base_url
         self.config_endpoint = config_endpoint
@@ -28,6 +48,7 @@ class FastFishApiRepository(Repository):
         self.headers = headers
         self.timeout = timeout
         self.retry_config = retry_config
+        self.cache = cache  # Optional response cache; closed periods are cached indefinitely
         self._session = None
     
     def get_all(self) -> List[Dict[str, Any]]:
@@ -53,6 +74,15 @@ class FastFishApiRepository(Repository):
             self._session.mount("https://", adapter)
         return self._session
     
+    def _post(self, endpoint: str, payload: Dict[str, Any], yyyymm: str, period: Optional[str]) -> requests.Response:
+        """POST a payload, through the response cache when one is configured."""
+        session = self._get_session()
+        if self.cache is None:
+            return session.post(endpoint, json=payload, headers=self.headers, timeout=self.timeout)
+        return self.cache.request(session, "POST", endpoint, json=payload, headers=self.headers,
+                                  timeout=self.timeout, ttl=period_ttl(yyyymm, period),
+                                  cacheable=has_response_data)
+    
     def fetch_store_config(self, 
                           store_codes: List[str], 
                           yyyymm: str, 
@@ -70,32 +100,11 @@ class FastFishApiRepository(Repository):
                 - List of store configuration records
                 - List of successfully processed store codes
         """
-        payload = {"strCodes": store_codes, "yyyymm": yyyymm}
-        if period:
-            payload["period"] = period
-        
-        session = self._get_session()
+        payload = _store_payload(store_codes, yyyymm, period)
         
         try:
-            response = session.post(
-                self.config_endpoint, 
-                json=payload, 
-                headers=self.headers, 
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            
-            data = response.json().get("data", [])
-            if not data:
-                return [], []
-            
-            # Extract successfully processed store codes
-            processed_codes = []
-            for record in data:
-                if "str_code" in record:
-                    processed_codes.append(str(record["str_code"]))
-            
-            return data, list(set(processed_codes))
+            response = self._post(self.config_endpoint, payload, yyyymm, period)
+            return _parse_records(response)
             
         except Exception as e:
             self.logger.error(f"Failed to fetch store configuration: {e}", self.repo_name)
@@ -118,33 +127,78 @@ class FastFishApiRepository(Repository):
                 - List of store sales records
                 - List of successfully processed store codes
         """
-        payload = {"strCodes": store_codes, "yyyymm": yyyymm}
-        if period:
-            payload["period"] = period
-        
-        session = self._get_session()
+        payload = _store_payload(store_codes, yyyymm, period)
         
         try:
-            response = session.post(
-                self.sales_endpoint, 
-                json=payload, 
-                headers=self.headers, 
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            
-            data = response.json().get("data", [])
-            if not data:
-                return [], []
-            
-            # Extract successfully processed store codes
-            processed_codes = []
-            for record in data:
-                if "str_code" in record:
-                    processed_codes.append(str(record["str_code"]))
-            
-            return data, list(set(processed_codes))
+            response = self._post(self.sales_endpoint, payload, yyyymm, period)
+            return _parse_records(response)
             
         except Exception as e:
             self.logger.error(f"Failed to fetch store sales: {e}", self.repo_name)
             return [], []
+
+
+
+class AsyncFastFishApiRepository(Repository):
+    """
+    Async variant of FastFishApiRepository: same endpoints, payloads and
+    results, with many store batches in flight over one AsyncHttpClient.
+    """
+    
+    def __init__(self,
+                 config_endpoint: str,
+                 sales_endpoint: str,
+                 headers: Dict[str, str],
+                 timeout: int,
+                 logger: PipelineLogger,
+                 client: AsyncHttpClient):
+        Repository.__init__(self, logger)
+        self.config_endpoint = config_endpoint
+        self.sales_endpoint = sales_endpoint
+        self.headers = headers
+        self.timeout = timeout
+        self.client = client
+    
+    @classmethod
+    def from_repository(cls, repo: FastFishApiRepository, max_concurrency: int = 4) -> "AsyncFastFishApiRepository":
+        """Async twin of a configured FastFishApiRepository (same retry settings and cache)."""
+        client = AsyncHttpClient(max_concurrency=max_concurrency,
+                                 retry=RetryPolicy.from_config(repo.retry_config),
+                                 cache=repo.cache)
+        return cls(repo.config_endpoint, repo.sales_endpoint, repo.headers, repo.timeout, repo.logger, client)
+    
+    def get_all(self) -> List[Dict[str, Any]]:
+        """Not applicable for API repository - use specific fetch methods instead."""
+        raise NotImplementedError("Use fetch_store_config or fetch_store_sales methods")
+    
+    def save(self, data: pd.DataFrame) -> None:
+        """Not applicable for API repository - this is read-only."""
+        raise NotImplementedError("API repository is read-only")
+    
+    async def _fetch(self, endpoint: str, label: str, store_codes: List[str], yyyymm: str,
+                     period: Optional[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        try:
+            response = await self.client.post(endpoint, json=_store_payload(store_codes, yyyymm, period),
+                                              headers=self.headers, timeout=self.timeout,
+                                              ttl=period_ttl(yyyymm, period), cacheable=has_response_data)
+            return _parse_records(response)
+        except Exception as e:
+            self.logger.error(f"Failed to fetch {label}: {e}", self.repo_name)
+            return [], []
+    
+    async def fetch_store_config(self, 
+                                 store_codes: List[str], 
+                                 yyyymm: str, 
+                                 period: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Async FastFishApiRepository.fetch_store_config."""
+        return await self._fetch(self.config_endpoint, "store configuration", store_codes, yyyymm, period)
+    
+    async def fetch_store_sales(self, 
+                                store_codes: List[str], 
+                                yyyymm: str, 
+                                period: Optional[str] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Async FastFishApiRepository.fetch_store_sales."""
+        return await self._fetch(self.sales_endpoint, "store sales", store_codes, yyyymm, period)
+    
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Async HTTP Client for the API repositories
+
+Shared transport of AsyncFastFishApiRepository and AsyncWeatherApiRepository.
+The pipeline has no async HTTP dependency, so each request runs on a bounded
+worker pool over one pooled requests.Session and is awaited from asyncio:
+
+- Connection pooling: one keep-alive pool sized to the concurrency limit
+- Concurrency limit: at most max_concurrency requests in flight; a request
+  backing off before a retry does not hold a slot
+- Retries: RetryPolicy (which statuses/errors, how often) with a BackoffPolicy
+  (exponential, jittered, honoring Retry-After) replace urllib3's Retry
+- Cancellation: cancelling a task drops its queued request before it is sent;
+  one already on the wire completes in its worker and is discarded
+
+Responses go through the HttpResponseCache when one is given, so the sync and
+async repositories share cached payloads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import random
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.http_response_cache import CacheMissError, HttpResponseCache, OPEN_PERIOD_TTL_SECONDS
+
+DEFAULT_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+@dataclass(frozen=True)
+class BackoffPolicy:
+    """Delay before retry n: base * factor ** (n - 1), capped at max_delay, +/- jitter."""
+    base: float = 1.0
+    factor: float = 2.0
+    max_delay: float = 60.0
+    jitter: float = 0.2
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(self.max_delay, max(retry_after, 0.0))
+        delay = self.base * self.factor ** max(attempt - 1, 0)
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return min(self.max_delay, delay)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Which failures are retried and how often (max_attempts counts the first try)."""
+    max_attempts: int = 3
+    retry_statuses: Tuple[int, ...] = DEFAULT_RETRY_STATUSES
+    retry_exceptions: Tuple[Type[BaseException], ...] = (requests.exceptions.ConnectionError,
+                                                         requests.exceptions.Timeout)
+    backoff: BackoffPolicy = field(default_factory=BackoffPolicy)
+    respect_retry_after: bool = True
+
+    @classmethod
+    def from_config(cls, retry_config: Dict[str, Any]) -> "RetryPolicy":
+        """Policy equivalent to a FastFishApiRepository retry_config (urllib3 Retry arguments)."""
+        return cls(max_attempts=retry_config.get('total', 3) + 1,
+                   retry_statuses=tuple(retry_config.get('status_forcelist', DEFAULT_RETRY_STATUSES)),
+                   backoff=BackoffPolicy(base=retry_config.get('backoff_factor', 2)))
+
+    def should_retry_error(self, error: BaseException) -> bool:
+        # An offline cache miss is a ConnectionError too, but retrying cannot help
+        return isinstance(error, self.retry_exceptions) and not isinstance(error, CacheMissError)
+
+    def should_retry_response(self, response: requests.Response) -> bool:
+        return response.status_code in self.retry_statuses
+
+    def retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        retry_after = None
+        if self.respect_retry_after and response is not None:
+            try:
+                retry_after = float(response.headers.get('Retry-After'))
+            except (TypeError, ValueError):
+                pass
+        return self.backoff.delay(attempt, retry_after)
+
+
+class AsyncHttpClient:
+    """Pooled, concurrency-limited, retrying HTTP client with an asyncio interface."""
+
+    def __init__(self, max_concurrency: int = 8, retry: Optional[RetryPolicy] = None,
+                 cache: Optional[HttpResponseCache] = None, session: Optional[Any] = None):
+        """
+        Args:
+            max_concurrency: Requests in flight at once (also the connection pool size)
+            retry: Retry/backoff policy (default: 3 attempts on connection errors and 429/5xx)
+            cache: Optional response cache consulted before the network
+            session: Session to use instead of a pooled requests.Session (e.g. in tests)
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.retry = retry or RetryPolicy()
+        self.cache = cache
+        self.requests_sent = 0
+        self.retries = 0
+        self._session = session
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._limit: Optional[asyncio.Semaphore] = None
+        self._limit_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def session(self) -> Any:
+        if self._session is None:
+            adapter = HTTPAdapter(pool_connections=self.max_concurrency, pool_maxsize=self.max_concurrency,
+                                  max_retries=0)  # Retries are the RetryPolicy's job
+            self._session = requests.Session()
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+        return self._session
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="async-http")
+        return self._executor
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # A semaphore belongs to one event loop; each asyncio.run() gets a fresh one
+        loop = asyncio.get_running_loop()
+        if self._limit is None or self._limit_loop is not loop:
+            self._limit = asyncio.Semaphore(self.max_concurrency)
+            self._limit_loop = loop
+        return self._limit
+
+    def _send(self, method: str, url: str, ttl: Optional[int],
+              cacheable: Optional[Callable[[requests.Response], bool]], kwargs: Dict[str, Any]) -> requests.Response:
+        """Blocking request, run on a worker thread."""
+        if self.cache is None:
+            return getattr(self.session, method.lower())(url, **kwargs)
+        if cacheable is not None:
+            kwargs['cacheable'] = cacheable
+        return self.cache.request(self.session, method, url, ttl=ttl, **kwargs)
+
+    async def request(self, method: str, url: str, *, ttl: Optional[int] = OPEN_PERIOD_TTL_SECONDS,
+                      cacheable: Optional[Callable[[requests.Response], bool]] = None,
+                      **kwargs) -> requests.Response:
+        """
+        Send a request (kwargs as for requests: params, json, timeout, ...) and
+        return the response, retried per the RetryPolicy. After the last
+        attempt the final response is returned (callers raise_for_status) or the
+        final error raised. ttl and cacheable apply when a cache is configured.
+        """
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            attempt += 1
+            async with self._semaphore():
+                self.requests_sent += 1
+                call = functools.partial(self._send, method, url, ttl, cacheable, dict(kwargs))
+                try:
+                    response = await loop.run_in_executor(self._pool(), call)
+                except Exception as e:
+                    if attempt >= self.retry.max_attempts or not self.retry.should_retry_error(e):
+                        raise
+                    delay = self.retry.retry_delay(attempt)
+                else:
+                    if attempt >= self.retry.max_attempts or not self.retry.should_retry_response(response):
+                        return response
+                    delay = self.retry.retry_delay(attempt, response)
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> requests.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> requests.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        """Drop queued requests, release the worker pool and the connection pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if isinstance(self._session, requests.Session):
+            self._session.close()
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
@@ -11,6 +11,8 @@ from typing import Dict, Optional
 import requests
 import pandas as pd
 from src.core.logger import PipelineLogger
+from src.http_response_cache import HttpResponseCache, date_range_ttl
+from .async_http import AsyncHttpClient, RetryPolicy
 from .base import Repository
 
 
@@ -47,16 +49,25 @@ class WeatherApiRepository(Repository):
         'et0_fao_evapotranspiration'
     ]
     
-    def __init__(self, logger: PipelineLogger, timezone: str = 'Asia/Shanghai'):
+    def __init__(self, logger: PipelineLogger, timezone: str = 'Asia/Shanghai',
+                 cache: Optional[HttpResponseCache] = None):
         """
         Initialize Weather API repository.
         
         Args:
             logger: PipelineLogger instance for logging
             timezone: Timezone for weather data (default: Asia/Shanghai)
+            cache: Optional response cache (closed date ranges and elevations never expire)
         """
         super().__init__(logger)
         self.timezone = timezone
+        self.cache = cache
+    
+    def _get(self, url: str, params: Dict, timeout: int, ttl: Optional[int]) -> requests.Response:
+        """GET through the response cache when one is configured."""
+        if self.cache is None:
+            return requests.get(url, params=params, timeout=timeout)
+        return self.cache.request(requests, "GET", url, params=params, timeout=timeout, ttl=ttl)
     
     def fetch_weather_data(
         self,
@@ -88,7 +99,16 @@ class WeatherApiRepository(Repository):
             self.repo_name
         )
         
-        params = {
+        params = self._weather_params(latitude, longitude, start_date, end_date)
+        
+        try:
+            response = self._get(self.WEATHER_API_URL, params, self.DEFAULT_TIMEOUT, date_range_ttl(end_date))
+            return self._weather_frame(response, latitude, longitude, store_code)
+        except Exception as e:
+            raise self._weather_error(e) from e
+    
+    def _weather_params(self, latitude: float, longitude: float, start_date: str, end_date: str) -> Dict:
+        return {
             'latitude': latitude,
             'longitude': longitude,
             'hourly': ','.join(self.HOURLY_VARIABLES),
@@ -97,56 +117,59 @@ class WeatherApiRepository(Repository):
             'end_date': end_date,
             'models': 'best_match'
         }
+    
+    def _weather_frame(
+        self,
+        response: requests.Response,
+        latitude: float,
+        longitude: float,
+        store_code: Optional[str]
+    ) -> pd.DataFrame:
+        """Parse an archive API response into the hourly DataFrame."""
+        response.raise_for_status()
         
-        try:
-            response = requests.get(
-                self.WEATHER_API_URL,
-                params=params,
-                timeout=self.DEFAULT_TIMEOUT
-            )
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if 'hourly' not in data:
-                raise WeatherApiError("No hourly data in API response")
-            
-            df = pd.DataFrame(data['hourly'])
-            
-            # Verify all required columns are present
-            missing_columns = [col for col in self.HOURLY_VARIABLES if col not in df.columns]
-            if missing_columns:
-                raise WeatherApiError(f"Missing required columns: {missing_columns}")
-            
-            # Add store information if provided
-            if store_code:
-                df['store_code'] = store_code
-            df['latitude'] = latitude
-            df['longitude'] = longitude
-            
-            self.logger.info(
-                f"Successfully fetched {len(df)} hourly records",
-                self.repo_name
-            )
-            
-            return df
-            
-        except requests.exceptions.HTTPError as e:
+        data = response.json()
+        
+        if 'hourly' not in data:
+            raise WeatherApiError("No hourly data in API response")
+        
+        df = pd.DataFrame(data['hourly'])
+        
+        # Verify all required columns are present
+        missing_columns = [col for col in self.HOURLY_VARIABLES if col not in df.columns]
+        if missing_columns:
+            raise WeatherApiError(f"Missing required columns: {missing_columns}")
+        
+        # Add store information if provided
+        if store_code:
+            df['store_code'] = store_code
+        df['latitude'] = latitude
+        df['longitude'] = longitude
+        
+        self.logger.info(
+            f"Successfully fetched {len(df)} hourly records",
+            self.repo_name
+        )
+        
+        return df
+    
+    def _weather_error(self, e: Exception) -> WeatherApiError:
+        """Log a failed weather fetch and return the WeatherApiError to raise."""
+        if isinstance(e, requests.exceptions.HTTPError):
             status = e.response.status_code if hasattr(e, 'response') else 'unknown'
             body = e.response.text[:500] if hasattr(e, 'response') else ''
             self.logger.error(
                 f"HTTP error {status} fetching weather data: {body}",
                 self.repo_name
             )
-            raise WeatherApiError(f"HTTP {status}: {body}") from e
-            
-        except requests.exceptions.RequestException as e:
+            return WeatherApiError(f"HTTP {status}: {body}")
+        
+        if isinstance(e, requests.exceptions.RequestException):
             self.logger.error(f"Request failed: {str(e)}", self.repo_name)
-            raise WeatherApiError(f"Request failed: {str(e)}") from e
-            
-        except Exception as e:
-            self.logger.error(f"Unexpected error: {str(e)}", self.repo_name)
-            raise WeatherApiError(f"Unexpected error: {str(e)}") from e
+            return WeatherApiError(f"Request failed: {str(e)}")
+        
+        self.logger.error(f"Unexpected error: {str(e)}", self.repo_name)
+        return WeatherApiError(f"Unexpected error: {str(e)}")
     
     def get_elevation(self, latitude: float, longitude: float) -> float:
         """
@@ -173,29 +196,8 @@ class WeatherApiRepository(Repository):
         }
         
         try:
-            response = requests.get(
-                self.ELEVATION_API_URL,
-                params=params,
-                timeout=15
-            )
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if 'elevation' in data and data['elevation']:
-                elevation = data['elevation'][0]
-                self.logger.debug(
-                    f"Retrieved elevation: {elevation}m",
-                    self.repo_name
-                )
-                return elevation
-            else:
-                self.logger.warning(
-                    f"No elevation data in response, returning 0.0",
-                    self.repo_name
-                )
-                return 0.0
-                
+            response = self._get(self.ELEVATION_API_URL, params, 15, ttl=None)
+            return self._elevation(response)
         except Exception as e:
             self.logger.warning(
                 f"Could not get elevation: {str(e)}, returning 0.0",
@@ -203,6 +205,25 @@ class WeatherApiRepository(Repository):
             )
             return 0.0
     
+    def _elevation(self, response: requests.Response) -> float:
+        response.raise_for_status()
+        
+        data = response.json()
+        
+        if 'elevation' in data and data['elevation']:
+            elevation = data['elevation'][0]
+            self.logger.debug(
+                f"Retrieved elevation: {elevation}m",
+                self.repo_name
+            )
+            return elevation
+        else:
+            self.logger.warning(
+                f"No elevation data in response, returning 0.0",
+                self.repo_name
+            )
+            return 0.0
+    
     def check_rate_limit(self, response: requests.Response) -> bool:
         """
         Check if response indicates rate limiting.
@@ -222,3 +243,92 @@ class WeatherApiRepository(Repository):
     def save(self, data: pd.DataFrame) -> None:
         """Not applicable for API repository - data is not persisted here."""
         raise NotImplementedError("WeatherApiRepository does not support save()")
+
+
+
+
+class AsyncWeatherApiRepository(Repository):
+    """
+    Async variant of WeatherApiRepository: the same requests and parsing, with
+    many locations in flight over one AsyncHttpClient (pooled connections and a
+    concurrency limit).
+    """
+    
+    def __init__(self, api_repo: WeatherApiRepository, client: AsyncHttpClient):
+        """
+        Initialize async Weather API repository.
+        
+        Args:
+            api_repo: Sync repository whose settings (timezone) and parsing are reused
+            client: Async HTTP client the requests go through
+        """
+        super().__init__(api_repo.logger)
+        self.api_repo = api_repo
+        self.client = client
+    
+    @classmethod
+    def from_repository(cls, api_repo: WeatherApiRepository, max_concurrency: int = 4,
+                        retry: Optional[RetryPolicy] = None) -> "AsyncWeatherApiRepository":
+        """
+        Async twin of a configured WeatherApiRepository (sharing its response cache).
+        
+        The client sends each request once by default: WeatherDataRepository
+        already retries every store (with its own 429 backoff), and a client
+        policy on top would multiply the attempts.
+        """
+        retry = retry or RetryPolicy(max_attempts=1)
+        return cls(api_repo, AsyncHttpClient(max_concurrency=max_concurrency, retry=retry, cache=api_repo.cache))
+    
+    async def fetch_weather_data(
+        self,
+        latitude: float,
+        longitude: float,
+        start_date: str,
+        end_date: str,
+        store_code: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Async WeatherApiRepository.fetch_weather_data."""
+        self.logger.info(
+            f"Fetching weather data for lat={latitude:.4f}, lon={longitude:.4f}, "
+            f"dates={start_date} to {end_date}",
+            self.repo_name
+        )
+        
+        params = self.api_repo._weather_params(latitude, longitude, start_date, end_date)
+        
+        try:
+            response = await self.client.get(WeatherApiRepository.WEATHER_API_URL, params=params,
+                                              timeout=WeatherApiRepository.DEFAULT_TIMEOUT,
+                                              ttl=date_range_ttl(end_date))
+            return self.api_repo._weather_frame(response, latitude, longitude, store_code)
+        except Exception as e:
+            raise self.api_repo._weather_error(e) from e
+    
+    async def get_elevation(self, latitude: float, longitude: float) -> float:
+        """Async WeatherApiRepository.get_elevation."""
+        params = {
+            'latitude': latitude,
+            'longitude': longitude
+        }
+        
+        try:
+            response = await self.client.get(WeatherApiRepository.ELEVATION_API_URL, params=params,
+                                              timeout=15, ttl=None)
+            return self.api_repo._elevation(response)
+        except Exception as e:
+            self.logger.warning(
+                f"Could not get elevation: {str(e)}, returning 0.0",
+                self.repo_name
+            )
+            return 0.0
+    
+    def close(self) -> None:
+        self.client.close()
+    
+    def get_all(self):
+        """Not applicable for API repository - data is fetched on demand."""
+        raise NotImplementedError("AsyncWeatherApiRepository does not support get_all()")
+    
+    def save(self, data: pd.DataFrame) -> None:
+        """Not applicable for API repository - data is not persisted here."""
+        raise NotImplementedError("AsyncWeatherApiRepository does not support save()")
@@ -59,9 +59,10 @@ Updated: 2025-10-28 (Changed from multi-period to single-period design)
 """
 
 from __future__ import annotations
-from typing import Dict, List, Set, Optional, Tuple, Any
+from typing import Dict, List, Set, Optional, Tuple, Any, Callable
 from dataclasses import dataclass
 from datetime import datetime, date
+import asyncio
 import calendar
 import time
 import random
@@ -70,6 +71,7 @@ import pandas as pd
 from src.core.logger import PipelineLogger
 from repositories.base import Repository
 from repositories import (
+    AsyncWeatherApiRepository,
     WeatherApiRepository,
     CsvFileRepository,
     JsonFileRepository,
@@ -151,7 +153,8 @@ class WeatherDataRepository(Repository):
         weather_file_repo: WeatherFileRepository,
         altitude_repo: CsvFileRepository,
         progress_repo: ProgressTrackingRepository,
-        logger: PipelineLogger
+        logger: PipelineLogger,
+        async_weather_api_repo: Optional[AsyncWeatherApiRepository] = None
     ):
         """
         Initialize Weather Data Repository.
@@ -163,10 +166,13 @@ class WeatherDataRepository(Repository):
             altitude_repo: Repository for altitude data
             progress_repo: Repository for progress tracking
             logger: Pipeline logger
+            async_weather_api_repo: Optional async API repository; when set, stores
+                download concurrently and each file is written while others download
         """
         super().__init__(logger)
         self.coordinates_repo = coordinates_repo
         self.weather_api_repo = weather_api_repo
+        self.async_weather_api_repo = async_weather_api_repo
         self.weather_file_repo = weather_file_repo
         self.altitude_repo = altitude_repo
         self.progress_repo = progress_repo
@@ -883,12 +889,15 @@ class WeatherDataRepository(Repository):
             self.repo_name
         )
         
+        progress['current_period'] = period_info.period_label
+        
+        if self.async_weather_api_repo is not None:
+            return asyncio.run(self._download_period_concurrently(period_info, to_download, progress, config))
+        
         # Download stats
         stats = DownloadStats()
         weather_data_list = []
         
-        progress['current_period'] = period_info.period_label
-        
         for idx, (_, store) in enumerate(to_download.iterrows()):
             store_code = str(store['str_code'])
             
@@ -915,45 +924,137 @@ class WeatherDataRepository(Repository):
                 
                 if weather_df is not None:
                     weather_data_list.append(weather_df)
-                    stats.successful_downloads += 1
-                    stats.consecutive_failures = 0
-                    
-                    if store_code not in progress['completed_stores']:
-                        progress['completed_stores'].append(store_code)
-                else:
-                    stats.failed_downloads += 1
-                    stats.consecutive_failures += 1
-                    
-                    if store_code not in progress['failed_stores']:
-                        progress['failed_stores'].append(store_code)
-                        
+                
             except Exception as e:
                 self.logger.error(
                     f"Error downloading {store_code}: {str(e)}",
                     self.repo_name
                 )
-                stats.failed_downloads += 1
-                stats.consecutive_failures += 1
-                
-                if store_code not in progress['failed_stores']:
-                    progress['failed_stores'].append(store_code)
+                weather_df = None
             
-            stats.stores_processed_since_vpn += 1
-            total_processed = stats.successful_downloads + stats.failed_downloads
+            self._record_store_download(store_code, weather_df is not None, stats, progress, len(to_download))
+        
+        self._log_period_summary(period_info, stats, len(to_download))
+        
+        return weather_data_list
+    
+    async def _download_period_concurrently(
+        self,
+        period_info: PeriodInfo,
+        to_download: pd.DataFrame,
+        progress: Dict,
+        config: WeatherDataConfig
+    ) -> List[pd.DataFrame]:
+        """
+        Download a period's stores through the async API repository, up to its
+        client's concurrency limit at a time. Each store's file is written on a
+        worker thread as soon as its response is parsed, so writes overlap with
+        the downloads still in flight. Before a VPN prompt the stores in flight
+        are cancelled, and restarted once the switch is confirmed; stores still
+        pending when the download is aborted (prompt declined, interrupt) are
+        cancelled.
+        
+        Args:
+            period_info: Period information
+            to_download: Coordinates of the stores to download
+            progress: Progress tracking dictionary
+            config: Configuration object
             
-            # Log progress periodically
-            if total_processed % self.LOG_INTERVAL == 0:
-                self.logger.info(
-                    f"Progress: {total_processed}/{len(to_download)} stores "
-                    f"({stats.successful_downloads} success, {stats.failed_downloads} failed)",
-                    self.repo_name
-                )
+        Returns:
+            List of weather DataFrames, in store order
+        """
+        stats = DownloadStats()
+        results: Dict[str, pd.DataFrame] = {}
+        store_codes = [str(code) for code in to_download['str_code']]
+        coordinates = {
+            store_code: (store['latitude'], store['longitude'])
+            for store_code, (_, store) in zip(store_codes, to_download.iterrows())
+        }
+        
+        def start(codes: List[str]) -> Dict[asyncio.Future, str]:
+            return {
+                asyncio.ensure_future(self._download_weather_for_store_async(
+                    code, *coordinates[code], period_info, config)): code
+                for code in codes
+            }
+        
+        def record(task: asyncio.Future) -> None:
+            store_code, weather_df = task.result()
+            if weather_df is not None:
+                results[store_code] = weather_df
+            self._record_store_download(store_code, weather_df is not None, stats, progress, len(to_download))
+        
+        tasks = start(store_codes)
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in [task for task in tasks if task in done]:  # Store order
+                    del tasks[task]
+                    record(task)
+                
+                if config.enable_vpn_switching and self._check_vpn_switch_needed(stats.consecutive_failures, config):
+                    # Pause before prompting: stop sending on the blocked connection while the user decides
+                    paused = await self._cancel_store_downloads(tasks, record)
+                    tasks = {}
+                    if not self._prompt_vpn_switch(period_info, stats.successful_downloads, len(to_download)):
+                        self.logger.warning("Download aborted by user", self.repo_name)
+                        if paused:
+                            self.logger.warning(f"Cancelled {len(paused)} pending store downloads", self.repo_name)
+                        break
+                    
+                    stats.consecutive_failures = 0
+                    stats.stores_processed_since_vpn = 0
+                    progress['vpn_switches'] += 1
+                    self.progress_repo.save(progress)
+                    tasks = start(paused)  # Resume the paused stores
+        finally:
+            pending = await self._cancel_store_downloads(tasks, record)
+            if pending:
+                self.logger.warning(f"Cancelled {len(pending)} pending store downloads", self.repo_name)
+        
+        self._log_period_summary(period_info, stats, len(to_download))
+        
+        return [results[code] for code in store_codes if code in results]
+    
+    def _record_store_download(
+        self,
+        store_code: str,
+        succeeded: bool,
+        stats: DownloadStats,
+        progress: Dict,
+        total_stores: int
+    ) -> None:
+        """Count one store's outcome, and log/save progress at the configured intervals."""
+        if succeeded:
+            stats.successful_downloads += 1
+            stats.consecutive_failures = 0
             
-            # Save progress periodically
-            if total_processed % self.PROGRESS_SAVE_INTERVAL == 0:
-                progress['last_update'] = datetime.now().isoformat()
-                self.progress_repo.save(progress)
+            if store_code not in progress['completed_stores']:
+                progress['completed_stores'].append(store_code)
+        else:
+            stats.failed_downloads += 1
+            stats.consecutive_failures += 1
+            
+            if store_code not in progress['failed_stores']:
+                progress['failed_stores'].append(store_code)
+        
+        stats.stores_processed_since_vpn += 1
+        total_processed = stats.successful_downloads + stats.failed_downloads
         
+        # Log progress periodically
+        if total_processed % self.LOG_INTERVAL == 0:
+            self.logger.info(
+                f"Progress: {total_processed}/{total_stores} stores "
+                f"({stats.successful_downloads} success, {stats.failed_downloads} failed)",
+                self.repo_name
+            )
+        
+        # Save progress periodically
+        if total_processed % self.PROGRESS_SAVE_INTERVAL == 0:
+            progress['last_update'] = datetime.now().isoformat()
+            self.progress_repo.save(progress)
+    
+    def _log_period_summary(self, period_info: PeriodInfo, stats: DownloadStats, total_stores: int) -> None:
         # Period completion summary
         success_rate = (
             stats.successful_downloads / (stats.successful_downloads + stats.failed_downloads) * 100
@@ -963,11 +1064,9 @@ class WeatherDataRepository(Repository):
         
         self.logger.info(
             f"Period {period_info.period_label} completed: "
-            f"{stats.successful_downloads}/{len(to_download)} successful ({success_rate:.1f}%)",
+            f"{stats.successful_downloads}/{total_stores} successful ({success_rate:.1f}%)",
             self.repo_name
         )
-        
-        return weather_data_list
     
     def _download_weather_for_store(
         self,
@@ -1048,6 +1147,95 @@ class WeatherDataRepository(Repository):
         
         return None
     
+    @staticmethod
+    async def _cancel_store_downloads(
+        tasks: Dict[asyncio.Future, str],
+        record: Callable[[asyncio.Future], None]
+    ) -> List[str]:
+        """
+        Cancel in-flight store downloads and wait for them to stop. Stores that
+        finished meanwhile are recorded; the cancelled ones are returned, in order.
+        """
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        cancelled = []
+        for task, store_code in tasks.items():
+            if task.cancelled():
+                cancelled.append(store_code)
+            else:
+                record(task)
+        return cancelled
+    
+    async def _download_weather_for_store_async(
+        self,
+        store_code: str,
+        latitude: float,
+        longitude: float,
+        period_info: PeriodInfo,
+        config: WeatherDataConfig
+    ) -> Tuple[str, Optional[pd.DataFrame]]:
+        """
+        Async _download_weather_for_store: the same store-level retries, minus
+        the fixed delay between requests (the client's concurrency limit and
+        its retry policy pace the API instead).
+        
+        Returns:
+            (store_code, weather DataFrame or None if failed)
+        """
+        consecutive_rate_limits = 0
+        
+        for attempt in range(config.max_retries):
+            try:
+                if attempt > 0:
+                    delay = self._get_random_delay(config) * (1.5 ** attempt)
+                    self.logger.info(
+                        f"Retry attempt {attempt + 1} for {store_code}, waiting {delay:.1f}s",
+                        self.repo_name
+                    )
+                    await asyncio.sleep(delay)
+                
+                weather_df = await self.async_weather_api_repo.fetch_weather_data(
+                    latitude=latitude,
+                    longitude=longitude,
+                    start_date=period_info.start_date,
+                    end_date=period_info.end_date,
+                    store_code=store_code
+                )
+                
+                # Save immediately (incremental persistence), off the event loop
+                await asyncio.to_thread(self._save_weather_file, weather_df, store_code, latitude, longitude, period_info)
+                
+                return store_code, weather_df
+                
+            except Exception as e:
+                error_msg = str(e)
+                
+                # Check for rate limiting
+                if '429' in error_msg or 'rate limit' in error_msg.lower():
+                    consecutive_rate_limits += 1
+                    backoff_time = self._get_rate_limit_backoff(consecutive_rate_limits, config)
+                    self.logger.warning(
+                        f"Rate limit hit, backing off for {backoff_time:.1f}s",
+                        self.repo_name
+                    )
+                    await asyncio.sleep(backoff_time)
+                    continue
+                
+                self.logger.error(
+                    f"API error for {store_code}: {error_msg}",
+                    self.repo_name
+                )
+                
+                if attempt == config.max_retries - 1:
+                    self.logger.error(
+                        f"Failed to download {store_code} after {config.max_retries} attempts",
+                        self.repo_name
+                    )
+                    return store_code, None
+        
+        return store_code, None
+    
     def _save_weather_file(
         self,
         weather_df: pd.DataFrame,
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Rolling Aggregate Store
+=======================
+
+Shared look-back windows for the rule steps (7-12). Each half-month source file
+is reduced once to per-(store, key) running sums and non-null counts and kept
+in an on-disk store, one file per source; a later run only reads files it has
+not seen (or that changed on disk), and any look-back window is a groupby-sum
+over the cached partials of the sources it names instead of a re-read and
+regroup of every CSV.
+
+Key Functions:
+- source_partials: Per-key sums and counts for one source frame
+- RollingAggregateStore.update: Ingest new or changed source files
+- RollingAggregateStore.window: Average any set of ingested sources
+- RollingAggregateStore.recent_window: update + window in one call
+- RollingFrameStore: Cached column projections for row-union windows (Step 9)
+"""
+
+import hashlib
+import os
+import pickle
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+ROLLING_AGGREGATE_CACHE_DIR = "output/cache/rolling"  # Overridden by $ROLLING_AGGREGATE_CACHE_DIR
+STORE_VERSION = 2  # Bump when the partial layout changes so stores are rebuilt
+
+SUM_SUFFIX = '::sum'
+COUNT_SUFFIX = '::count'
+
+ColumnSpec = Union[Sequence[str], Callable[[pd.DataFrame], List[str]]]
+
+
+def _resolve_columns(spec: ColumnSpec, frame: pd.DataFrame) -> List[str]:
+    columns = spec(frame) if callable(spec) else spec
+    return [c for c in columns if c in frame.columns]
+
+
+def _spec_repr(spec: ColumnSpec) -> str:
+    if callable(spec):
+        return f"{getattr(spec, '__module__', '')}.{getattr(spec, '__qualname__', type(spec).__name__)}"
+    return repr(list(spec))
+
+
+def default_cache_dir() -> str:
+    """Store directory, read from the environment when a store is opened (tests point it at a tmp dir)"""
+    return os.environ.get("ROLLING_AGGREGATE_CACHE_DIR") or ROLLING_AGGREGATE_CACHE_DIR
+
+
+def source_partials(frame: pd.DataFrame, keys: List[str], values: List[str], dropna_keys: bool = True) -> pd.DataFrame:
+    """
+    Reduce one source frame to key columns plus '<col>::sum' and '<col>::count'.
+
+    Values are coerced to numeric first (unparseable → NaN), and counts only
+    include non-null values, so sum/count over any set of partials equals the
+    mean over the concatenated rows.
+    """
+    values = [c for c in values if c not in keys]
+    numeric = frame[keys].copy()
+    for col in values:
+        numeric[col] = pd.to_numeric(frame[col], errors='coerce')
+    grouped = numeric.groupby(keys, dropna=dropna_keys, sort=False)[values]
+    return pd.concat([grouped.sum().add_suffix(SUM_SUFFIX), grouped.count().add_suffix(COUNT_SUFFIX)],
+                     axis=1).reset_index()
+
+
+class RollingAggregateStore:
+    """
+    Per-source partial aggregates for one dataset, persisted one file per source
+    at <cache_dir>/<name>/<hash(source path)>.pkl and loaded only when a window
+    or update names that source.
+
+    keys/values are column lists or callables that pick them from a source frame
+    (columns missing from a file are skipped for that file). divisor='rows'
+    averages over the non-null values in the window (a concat + groupby().mean()),
+    divisor='sources' divides the window sum by the number of sources.
+    """
+
+    def __init__(self, name: str, keys: ColumnSpec, values: ColumnSpec,
+                 reader: Optional[Callable[[str], pd.DataFrame]] = None,
+                 dropna_keys: bool = True, cache_dir: Optional[str] = None):
+        self.name = name
+        self.keys = keys
+        self.values = values
+        self.reader = reader or (lambda path: pd.read_csv(path, dtype={'str_code': str}, low_memory=False))
+        self.dropna_keys = dropna_keys
+        cache_root = default_cache_dir() if cache_dir is None else cache_dir
+        self.cache_dir = os.path.join(cache_root, name)
+        self.spec = f"v{STORE_VERSION}|{_spec_repr(keys)}|{_spec_repr(values)}|dropna={dropna_keys}"
+        self.partials: Dict[str, Optional[Dict]] = {}  # Sources loaded this run (None: not in the store)
+        legacy_path = os.path.join(cache_root, f"{name}.pkl")  # v1 kept every source in one pickle
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+
+    def _part_path(self, source: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(source.encode('utf-8')).hexdigest()[:20] + '.pkl')
+
+    def part(self, source: str) -> Optional[Dict]:
+        """The stored partial for one source, read from its file on first use (None when absent)"""
+        if source not in self.partials:
+            self.partials[source] = self._load(source)
+        return self.partials[source]
+
+    def _load(self, source: str) -> Optional[Dict]:
+        path = self._part_path(source)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                header = pickle.load(f)  # Small header (spec, source, signature), then the partial
+                if header.get('spec') != self.spec or header.get('source') != source:
+                    return None
+                body = pickle.load(f)
+        except Exception:
+            return None  # Unreadable partial: rebuild from the source
+        return {'signature': header['signature'], **body}
+
+    def _save(self, source: str) -> None:
+        part = self.partials[source]
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._part_path(source)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'spec': self.spec, 'source': source, 'signature': part['signature']}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump({k: part[k] for k in ('keys', 'values', 'frame')}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _forget(self, source: str) -> None:
+        self.partials[source] = None
+        try:
+            os.remove(self._part_path(source))
+        except OSError:
+            pass
+
+    def prune(self) -> List[str]:
+        """Delete stored partials whose source file is gone or whose spec is outdated; returns their sources"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        pruned = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.pkl'):
+                continue
+            try:
+                with open(entry.path, 'rb') as f:
+                    header = pickle.load(f)  # The partial after the header is never read here
+            except Exception:
+                header = {}
+            source = header.get('source')
+            if header.get('spec') == self.spec and source is not None and self._signature(source) is not None:
+                continue
+            os.remove(entry.path)
+            if source is not None:
+                self.partials.pop(source, None)
+                pruned.append(source)
+        return pruned
+
+    @staticmethod
+    def _signature(path: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def add_frame(self, source: str, frame: pd.DataFrame, signature: Optional[tuple] = None) -> bool:
+        """Ingest an already-loaded source frame; returns False when it has no key or value columns"""
+        keys = _resolve_columns(self.keys, frame)
+        values = [c for c in _resolve_columns(self.values, frame) if c not in keys]
+        if frame.empty or not keys or not values:
+            self.partials[source] = {'signature': signature, 'keys': keys, 'values': values, 'frame': None}
+            return False
+        self.partials[source] = {
+            'signature': signature,
+            'keys': keys,
+            'values': values,
+            'frame': self._reduce(frame, keys, values),
+        }
+        return True
+
+    def _reduce(self, frame: pd.DataFrame, keys: List[str], values: List[str]) -> pd.DataFrame:
+        return source_partials(frame, keys, values, self.dropna_keys)
+
+    def update(self, paths: Sequence[str]) -> List[str]:
+        """
+        Read and ingest only the sources that are new or changed on disk; returns their paths.
+
+        Only the partials of the given paths are loaded. Whenever a source is
+        ingested the store is pruned of partials whose source file is gone.
+        """
+        ingested = []
+        for path in paths:
+            signature = self._signature(path)
+            if signature is None:
+                if self.part(path) is not None:
+                    self._forget(path)
+                continue
+            cached = self.part(path)
+            if cached is not None and cached['signature'] == signature:
+                continue
+            self.add_frame(path, self.reader(path), signature)
+            self._save(path)
+            ingested.append(path)
+        if ingested:
+            self.prune()
+        return ingested
+
+    def window(self, sources: Sequence[str], divisor: str = 'rows') -> Optional[pd.DataFrame]:
+        """
+        Average the given sources at the union of their key columns (sorted by key).
+
+        Returns None when any source is missing from the store or had no key/value
+        columns, so the caller can fall back to its frame-based path.
+        """
+        parts = [self.part(s) for s in sources]
+        if not parts or any(part is None or part['frame'] is None for part in parts):
+            return None
+
+        keys: List[str] = []
+        values: List[str] = []
+        for part in parts:
+            keys += [c for c in part['keys'] if c not in keys]
+            values += [c for c in part['values'] if c not in values]
+        values = [c for c in values if c not in keys]
+        sum_cols = [c + SUM_SUFFIX for c in values]
+        count_cols = [c + COUNT_SUFFIX for c in values]
+
+        combined = pd.concat([part['frame'] for part in parts], ignore_index=True)
+        combined = combined.reindex(columns=keys + sum_cols + count_cols)
+        totals = combined.groupby(keys, dropna=self.dropna_keys, sort=True)[sum_cols + count_cols].sum()
+
+        averaged = pd.DataFrame(index=totals.index)
+        for col, sum_col, count_col in zip(values, sum_cols, count_cols):
+            if divisor == 'sources':
+                averaged[col] = totals[sum_col] / len(parts)
+            else:
+                counts = totals[count_col].to_numpy()
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    averaged[col] = np.where(counts > 0, totals[sum_col].to_numpy() / counts, np.nan)
+        return averaged.reset_index()
+
+    def recent_window(self, paths: Sequence[str], divisor: str = 'rows') -> Optional[pd.DataFrame]:
+        """Ingest any new files among paths, then average over the ones that exist with usable columns"""
+        self.update(paths)
+        present = [p for p in paths if self.part(p) is not None and self.part(p)['frame'] is not None]
+        return self.window(present, divisor=divisor) if present else None
+
+
+class RollingFrameStore(RollingAggregateStore):
+    """
+    Per-source projections (key and value columns, rows as read) instead of sums.
+
+    For windows that are row unions rather than averages, such as Step 9's
+    config blend whose sty_sal_amt is a JSON string: each source is read and
+    projected once, and later runs load the small projection from the store.
+    Sources are ingested with update() exactly like RollingAggregateStore.
+    """
+
+    def _reduce(self, frame: pd.DataFrame, keys: List[str], values: List[str]) -> pd.DataFrame:
+        return frame[keys + values].reset_index(drop=True)
+
+    def window(self, sources: Sequence[str], divisor: str = 'rows') -> Optional[pd.DataFrame]:
+        """Row union of the given sources' projections (None when any is missing or unusable)"""
+        parts = [self.part(s) for s in sources]
+        if not parts or any(part is None or part['frame'] is None for part in parts):
+            return None
+        return pd.concat([part['frame'] for part in parts], ignore_index=True)
+
+    def frames(self, paths: Sequence[str]) -> List[pd.DataFrame]:
+        """Ingest any new files among paths; returns the projections of those with usable columns, in order"""
+        self.update(paths)
+        return [self.part(p)['frame'] for p in paths
+                if self.part(p) is not None and self.part(p)['frame'] is not None]
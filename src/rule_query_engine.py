@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Rule Query Engine (DuckDB backend)
+==================================
+
+Set-based versions of the peer-comparison queries in the rule steps, run on
+an embedded DuckDB against the in-memory DataFrames (DuckDB scans them in
+place with projection pushdown and executes on all cores):
+
+- cluster_top_performers: Step 11's per cluster-category SPU aggregates,
+  percentile rank within the group and the top-performer cut
+- expected_spu_gaps: Step 11's expected (store x top performer) matrix and
+  its left join to what every store actually sells
+- cluster_quantile_gaps: Step 12's per cluster-category top-quartile
+  benchmark and each store's gap to it
+
+Every function returns the same columns, row order and pandas semantics
+(NaN-skipping aggregates, groupby dropping null keys, average-rank
+percentiles, numpy's linear percentile) as the pandas path it replaces, so
+the steps can switch with --engine duckdb (or RULE_QUERY_ENGINE=duckdb).
+DuckDB is optional; resolve_engine() falls back to pandas without it.
+"""
+
+import os
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+ENGINES = ('pandas', 'duckdb')
+RULE_QUERY_ENGINE = os.environ.get("RULE_QUERY_ENGINE", "pandas")
+RULE_QUERY_THREADS = int(os.environ.get("RULE_QUERY_THREADS", os.cpu_count() or 1))
+
+
+def resolve_engine(requested: Optional[str] = None, log=print) -> str:
+    """The engine to use: requested (or RULE_QUERY_ENGINE), pandas when DuckDB is missing."""
+    engine = (requested or RULE_QUERY_ENGINE or 'pandas').lower()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown query engine '{engine}' (expected one of {', '.join(ENGINES)})")
+    if engine == 'duckdb' and not DUCKDB_AVAILABLE:
+        log("⚠️ DuckDB not installed - falling back to the pandas engine")
+        return 'pandas'
+    return engine
+
+
+def _connect(**frames: pd.DataFrame) -> "duckdb.DuckDBPyConnection":
+    con = duckdb.connect()
+    con.execute(f"SET threads = {max(1, RULE_QUERY_THREADS)}")
+    for name, frame in frames.items():
+        con.register(name, frame)
+    return con
+
+
+def _q(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _not_null(columns: Sequence[str], alias: str = '') -> str:
+    prefix = f"{alias}." if alias else ''
+    return ' AND '.join(f"{prefix}{_q(c)} IS NOT NULL" for c in columns)
+
+
+def _first(column: str) -> str:
+    """pandas groupby 'first': first non-null value in row order."""
+    return f"arg_min({_q(column)}, _row) FILTER (WHERE {_q(column)} IS NOT NULL) AS {_q(column)}"
+
+
+def _mean(column: str, alias: str) -> str:
+    # Compensated sum / non-null count, like pandas' groupby mean
+    return f"fsum({_q(column)}) / count({_q(column)}) AS {alias}"
+
+
+def _with_row(df: pd.DataFrame, columns: Sequence[str]) -> pd.DataFrame:
+    frame = df[list(columns)].copy()
+    frame['_row'] = np.arange(len(frame))
+    return frame
+
+
+def _restore_key_dtypes(result: pd.DataFrame, source: pd.DataFrame, mapping: dict) -> pd.DataFrame:
+    for out_col, src_col in mapping.items():
+        if out_col in result.columns and result[out_col].dtype != source[src_col].dtype and len(result):
+            try:
+                result[out_col] = result[out_col].astype(source[src_col].dtype)
+            except (TypeError, ValueError):
+                pass
+    return result
+
+
+def cluster_top_performers(df: pd.DataFrame, min_cluster_stores: int, min_stores_selling: int,
+                           threshold: float) -> pd.DataFrame:
+    """Step 11 identify_cluster_category_top_performers_optimized as one query."""
+    keys = ['Cluster', 'category_key', 'spu_code']
+    measures = ['spu_sales', 'estimated_spu_qty', 'spu_to_category_sales_ratio', 'spu_to_category_qty_ratio',
+                'store_category_total_sales', 'store_category_total_qty', 'avg_unit_price']
+    base = _with_row(df, ['str_code'] + keys + measures)
+    sql = f"""
+    WITH sizes AS (
+        SELECT Cluster, category_key, count(DISTINCT str_code) AS total_stores_in_cluster
+        FROM base WHERE {_not_null(['Cluster', 'category_key'])}
+        GROUP BY Cluster, category_key
+    ), perf AS (
+        SELECT b.Cluster AS cluster, b.category_key, b.spu_code,
+               coalesce(fsum(spu_sales), 0) AS total_sales,
+               {_mean('spu_sales', 'avg_sales')},
+               count(spu_sales) AS transaction_count,
+               coalesce(fsum(estimated_spu_qty), 0) AS total_qty,
+               {_mean('estimated_spu_qty', 'avg_qty')},
+               count(DISTINCT str_code) AS stores_selling,
+               {_mean('spu_to_category_sales_ratio', 'avg_spu_to_category_sales_ratio')},
+               {_mean('spu_to_category_qty_ratio', 'avg_spu_to_category_qty_ratio')},
+               {_mean('store_category_total_sales', 'avg_category_sales_size')},
+               {_mean('store_category_total_qty', 'avg_category_qty_size')},
+               {_mean('avg_unit_price', 'avg_unit_price')}
+        FROM base b
+        JOIN sizes s ON s.Cluster = b.Cluster AND s.category_key = b.category_key
+        WHERE s.total_stores_in_cluster >= {int(min_cluster_stores)} AND {_not_null(keys, 'b')}
+        GROUP BY b.Cluster, b.category_key, b.spu_code
+        HAVING count(DISTINCT str_code) >= {int(min_stores_selling)}
+    ), ranked AS (
+        -- pandas rank(pct=True): average rank of ties / group size
+        SELECT *, (rank() OVER g + (count(*) OVER (PARTITION BY cluster, category_key, total_sales) - 1) / 2.0)
+                  / count(*) OVER (PARTITION BY cluster, category_key) AS sales_percentile
+        FROM perf
+        WINDOW g AS (PARTITION BY cluster, category_key ORDER BY total_sales)
+    )
+    SELECT r.*, s.Cluster AS _merged_cluster, s.total_stores_in_cluster,
+           r.stores_selling / s.total_stores_in_cluster AS adoption_rate
+    FROM ranked r
+    LEFT JOIN sizes s ON s.Cluster = r.cluster AND s.category_key = r.category_key
+    WHERE r.sales_percentile >= {float(threshold)!r}
+      AND r.avg_spu_to_category_qty_ratio > 0 AND r.avg_spu_to_category_sales_ratio > 0
+    ORDER BY r.cluster, r.category_key, r.spu_code
+    """
+    with _connect(base=base) as con:
+        # Identifiers are case-insensitive in DuckDB, so the merged "Cluster" is renamed here
+        result = con.execute(sql).df().rename(columns={'_merged_cluster': 'Cluster'})
+    return _restore_key_dtypes(result, df, {'cluster': 'Cluster', 'Cluster': 'Cluster', 'spu_code': 'spu_code'})
+
+
+def expected_spu_gaps(df: pd.DataFrame, top_performers: pd.DataFrame, scaling_factor: float) -> pd.DataFrame:
+    """
+    Step 11's expected matrix (every store of a cluster-category x that group's
+    top performers, with target sales/qty) left-joined to each store's current
+    SPU sales - the frame the pandas path builds with nested iterrows + merge.
+    """
+    if len(top_performers) == 0:
+        return pd.DataFrame()
+    keys = ['str_code', 'Cluster', 'category_key']
+    base = _with_row(df, keys + ['spu_code', 'spu_sales', 'estimated_spu_qty',
+                                 'store_category_total_sales', 'store_category_total_qty'])
+    top = top_performers[['cluster', 'category_key', 'spu_code', 'avg_spu_to_category_sales_ratio',
+                          'avg_spu_to_category_qty_ratio', 'avg_unit_price']].copy()
+    top['_tp_row'] = np.arange(len(top))
+    factor = float(scaling_factor)
+    sql = f"""
+    WITH stores AS (
+        SELECT str_code, Cluster, category_key,
+               {_first('store_category_total_sales')}, {_first('store_category_total_qty')}
+        FROM base WHERE {_not_null(keys)}
+        GROUP BY str_code, Cluster, category_key
+    ), current AS (
+        SELECT str_code, Cluster, category_key, spu_code, 1 AS has_spu,
+               {_first('spu_sales')}, {_first('estimated_spu_qty')}
+        FROM base WHERE {_not_null(keys + ['spu_code'])}
+        GROUP BY str_code, Cluster, category_key, spu_code
+    ), expected AS (
+        SELECT s.str_code, t.cluster AS Cluster, t.category_key, t.spu_code, 1 AS should_have,
+               s.store_category_total_sales, s.store_category_total_qty,
+               t.avg_spu_to_category_sales_ratio, t.avg_spu_to_category_qty_ratio,
+               s.store_category_total_sales * t.avg_spu_to_category_sales_ratio * {factor!r} AS raw_sales,
+               s.store_category_total_qty * t.avg_spu_to_category_qty_ratio * {factor!r} AS raw_qty,
+               t.avg_unit_price AS spu_unit_price, t._tp_row
+        FROM top t
+        JOIN stores s ON s.Cluster = t.cluster AND s.category_key = t.category_key
+        WHERE t.cluster IS NOT NULL AND t.category_key IS NOT NULL
+    )
+    SELECT e.str_code, e.Cluster, e.category_key, e.spu_code, e.should_have,
+           e.store_category_total_sales, e.store_category_total_qty,
+           e.avg_spu_to_category_sales_ratio, e.avg_spu_to_category_qty_ratio,
+           CASE WHEN e.raw_qty > 0 THEN e.raw_qty * e.spu_unit_price ELSE e.raw_sales END AS target_period_sales,
+           CASE WHEN e.raw_qty > 0 THEN e.raw_qty ELSE e.raw_sales / e.spu_unit_price END AS target_period_qty,
+           e.spu_unit_price, c.has_spu, c.spu_sales, c.estimated_spu_qty
+    FROM expected e
+    LEFT JOIN current c ON c.str_code = e.str_code AND c.Cluster = e.Cluster
+        AND c.category_key = e.category_key AND c.spu_code = e.spu_code
+    ORDER BY e.Cluster, e.category_key, e.str_code, e._tp_row
+    """
+    with _connect(base=base, top=top) as con:
+        result = con.execute(sql).df()
+    result['has_spu'] = result['has_spu'].astype(float)
+    return _restore_key_dtypes(result, df, {'Cluster': 'Cluster'})
+
+
+def cluster_quantile_gaps(sales_data: pd.DataFrame, group_cols: List[str], value_col: str,
+                          percentile: float, min_group_size: int) -> pd.DataFrame:
+    """
+    Step 12 calculate_opportunity_gaps: rows of every cluster-category group with
+    at least min_group_size rows, plus cluster_top_quartile (numpy's linear
+    percentile), opportunity_gap and cluster_size. Group-sorted, original index.
+    """
+    base = sales_data[list(group_cols) + [value_col]].copy()
+    base['_row'] = np.arange(len(base))
+    key_list = ', '.join(_q(c) for c in group_cols)
+    sql = f"""
+    WITH stats AS (
+        SELECT {key_list}, count(*) AS cluster_size,
+               -- np.percentile is NaN as soon as one value is
+               CASE WHEN count({_q(value_col)}) = count(*)
+                    THEN quantile_cont({_q(value_col)}, {float(percentile) / 100.0!r}) END AS cluster_top_quartile
+        FROM base WHERE {_not_null(group_cols)}
+        GROUP BY {key_list}
+        HAVING count(*) >= {int(min_group_size)}
+    )
+    SELECT b._row, s.cluster_top_quartile, s.cluster_size
+    FROM base b JOIN stats s ON {' AND '.join(f'b.{_q(c)} = s.{_q(c)}' for c in group_cols)}
+    ORDER BY {', '.join(f'b.{_q(c)}' for c in group_cols)}, b._row
+    """
+    with _connect(base=base) as con:
+        stats = con.execute(sql).df()
+    result = sales_data.iloc[stats['_row'].to_numpy()].copy()
+    result['opportunity_gap'] = stats['cluster_top_quartile'].to_numpy() - result[value_col].to_numpy(dtype=float)
+    result['cluster_top_quartile'] = stats['cluster_top_quartile'].to_numpy()
+    result['cluster_size'] = stats['cluster_size'].to_numpy()
+    return result
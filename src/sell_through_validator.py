@@ -30,6 +30,7 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional, Any
 from datetime import datetime
+from functools import lru_cache
 import warnings
 from src.config import API_DATA_DIR, COMPLETE_SPU_SALES_FILE, get_api_data_files, get_current_period, get_period_label
 
@@ -40,8 +41,29 @@ class SellThroughValidator:
     CORRECTED Sell-Through Validator for Fast Fish compliance.
     
     Uses the OFFICIAL Fast Fish definition: SPUs Sold ÷ SPUs In Stock
+    
+    Historical performance is indexed once per (store, category) on first use, so
+    single lookups are a dict hit (fronted by an LRU) and batch validation is a
+    single merge instead of one table scan per recommendation.
     """
     
+    # Category columns probed in order when indexing historical data
+    CATEGORY_COLUMNS = ['category', 'cate_name', 'sub_cate_name', 'big_class_name']
+    
+    # Action groups used by the approval rules
+    DECREASE_ACTIONS = ['DECREASE', 'REDUCE', 'REMOVE']
+    INCREASE_ACTIONS = ['INCREASE', 'ADD', 'EXPAND', 'IMPROVE', 'REBALANCE']
+    
+    # Default performance metrics (Fast Fish realistic baselines)
+    DEFAULT_PERFORMANCE = {
+        'spus_sold_rate': 60.0,        # 60% of SPUs typically sell
+        'avg_spus_in_stock': 25.0,     # Average SPUs in stock
+        'avg_spus_sold': 15.0,         # Average SPUs that sell
+        'performance_tier': 'medium'    # Store performance level
+    }
+    
+    PERFORMANCE_LRU_SIZE = 65536
+    
     def __init__(self, historical_data: Optional[pd.DataFrame] = None):
         """
         Initialize the sell-through validator.
@@ -103,77 +125,86 @@ class SellThroughValidator:
             # Conservative default: assume 50% of SPUs will sell
             return 50.0
     
-    def _get_historical_performance(self, store_code: str, category: str) -> Dict:
-        """Get historical SPU sell-through performance for store-category combination."""
-        
-        # Default performance metrics (Fast Fish realistic baselines)
-        default_performance = {
-            'spus_sold_rate': 60.0,        # 60% of SPUs typically sell
-            'avg_spus_in_stock': 25.0,     # Average SPUs in stock
-            'avg_spus_sold': 15.0,         # Average SPUs that sell
-            'performance_tier': 'medium'    # Store performance level
-        }
+    @property
+    def historical_data(self) -> Optional[pd.DataFrame]:
+        return self._historical_data
+    
+    @historical_data.setter
+    def historical_data(self, value: Optional[pd.DataFrame]) -> None:
+        # Replacing the data invalidates the performance index and every cached lookup
+        self._historical_data = value
+        self._performance_index = None
+        self._category_col = None
+        self._lookup_performance = lru_cache(maxsize=self.PERFORMANCE_LRU_SIZE)(self._lookup_performance_uncached)
+        self.sell_through_cache = {}
+    
+    def _build_performance_index(self) -> pd.DataFrame:
+        """
+        Build the per-(store, category) historical performance table in one groupby pass.
         
-        if self.historical_data is None:
-            return default_performance
+        Falls back to a per-store index when no category column is present. Returns an
+        empty frame when there is nothing to index (callers then use the defaults).
+        """
+        if self._performance_index is not None:
+            return self._performance_index
         
+        data = self._historical_data
+        index = pd.DataFrame()
         try:
-            # Filter historical data for this store-category
-            # Determine appropriate category column present in the historical data
-            category_col = None
-            for col in ['category', 'cate_name', 'sub_cate_name', 'big_class_name']:
-                if col in self.historical_data.columns:
-                    category_col = col
-                    break
-
-            if category_col:
-                hist_data = self.historical_data[
-                    (self.historical_data['str_code'] == store_code) &
-                    (self.historical_data[category_col] == category)
-                ]
-            else:
-                # Fallback: filter by store only
-                hist_data = self.historical_data[self.historical_data['str_code'] == store_code]
-            
-            if len(hist_data) == 0:
-                return default_performance
-            
-            # Calculate ACTUAL SPU sell-through metrics with light smoothing to avoid extremes
-            if 'spu_code' in hist_data.columns:
+            if data is not None and 'str_code' in data.columns and 'spu_code' in data.columns:
+                self._category_col = next((c for c in self.CATEGORY_COLUMNS if c in data.columns), None)
+                keys = ['str_code'] + ([self._category_col] if self._category_col else [])
+                
                 # Choose quantity-like column if available
-                if 'quantity' in hist_data.columns:
-                    qty_col = 'quantity'
-                elif 'spu_sales_amt' in hist_data.columns:
-                    qty_col = 'spu_sales_amt'
-                else:
-                    qty_col = None
-
+                qty_col = 'quantity' if 'quantity' in data.columns else 'spu_sales_amt' if 'spu_sales_amt' in data.columns else None
+                
+                grouped = data.groupby(keys, sort=False)
+                index = grouped['spu_code'].nunique().to_frame('avg_spus_in_stock')
                 if qty_col is not None:
-                    spus_with_sales = hist_data[hist_data[qty_col] > 0]['spu_code'].nunique()
+                    sold = data[data[qty_col] > 0].groupby(keys, sort=False)['spu_code'].nunique()
+                    index['avg_spus_sold'] = sold.reindex(index.index).fillna(0).astype(int)
                 else:
-                    spus_with_sales = 0
-
-                total_spus = hist_data['spu_code'].nunique()
+                    index['avg_spus_sold'] = 0
                 
-                if total_spus > 0:
-                    # Beta prior smoothing (α=1, β=1) to avoid 0%/100% extremes
-                    actual_sellthrough_rate = ((spus_with_sales + 1) / (total_spus + 2)) * 100.0
-                else:
-                    actual_sellthrough_rate = default_performance['spus_sold_rate']
-            else:
-                actual_sellthrough_rate = default_performance['spus_sold_rate']
-            
-            performance = {
-                'spus_sold_rate': actual_sellthrough_rate,
-                'avg_spus_in_stock': total_spus if 'total_spus' in locals() else default_performance['avg_spus_in_stock'],
-                'avg_spus_sold': spus_with_sales if 'spus_with_sales' in locals() else default_performance['avg_spus_sold'],
-                'performance_tier': 'high' if actual_sellthrough_rate > 70 else 'medium' if actual_sellthrough_rate > 50 else 'low'
-            }
-            
-            return performance
-            
+                # Beta prior smoothing (α=1, β=1) to avoid 0%/100% extremes
+                total = index['avg_spus_in_stock']
+                index['spus_sold_rate'] = np.where(
+                    total > 0,
+                    (index['avg_spus_sold'] + 1) / (total + 2) * 100.0,
+                    self.DEFAULT_PERFORMANCE['spus_sold_rate']
+                )
+                index['performance_tier'] = np.select(
+                    [index['spus_sold_rate'] > 70, index['spus_sold_rate'] > 50], ['high', 'medium'], default='low'
+                )
+                index = index[['spus_sold_rate', 'avg_spus_in_stock', 'avg_spus_sold', 'performance_tier']]
+        except Exception:
+            index = pd.DataFrame()
+        
+        self._performance_index = index
+        return index
+    
+    def _lookup_performance_uncached(self, store_code: str, category: str) -> Dict:
+        index = self._build_performance_index()
+        if index.empty:
+            return dict(self.DEFAULT_PERFORMANCE)
+        key = (store_code, category) if self._category_col else store_code
+        try:
+            row = index.loc[key]
+        except (KeyError, TypeError):
+            return dict(self.DEFAULT_PERFORMANCE)
+        return {
+            'spus_sold_rate': float(row['spus_sold_rate']),
+            'avg_spus_in_stock': int(row['avg_spus_in_stock']),
+            'avg_spus_sold': int(row['avg_spus_sold']),
+            'performance_tier': row['performance_tier']
+        }
+    
+    def _get_historical_performance(self, store_code: str, category: str) -> Dict:
+        """Get historical SPU sell-through performance for store-category combination."""
+        try:
+            return dict(self._lookup_performance(store_code, category))
         except Exception:
-            return default_performance
+            return dict(self.DEFAULT_PERFORMANCE)
     
     def _predict_spus_sold(self, store_code: str, category: str, spu_count: int, performance: Dict) -> float:
         """
@@ -288,13 +319,13 @@ class SellThroughValidator:
             return False
         
         # Rule 2: For DECREASE actions, require positive improvement (reducing SKUs should improve sell-through)
-        if action in ['DECREASE', 'REDUCE', 'REMOVE']:
+        if action in self.DECREASE_ACTIONS:
             return improvement >= 0  # Any improvement is good for reductions
         
         # Rule 3: For INCREASE actions, accept reasonable sell-through degradation
         # INCREASE actions naturally decrease sell-through, so we allow negative improvement
         # as long as the final sell-through rate stays reasonable
-        if action in ['INCREASE', 'ADD', 'EXPAND', 'IMPROVE', 'REBALANCE']:
+        if action in self.INCREASE_ACTIONS:
             # Special handling for very small SPU counts (Step 12 edge case)
             # When current SPU count is very small (1-3), allow larger degradation
             # because the sell-through math behaves differently at low numbers
@@ -339,27 +370,156 @@ class SellThroughValidator:
                     f"sell-through {current_st:.1f}%→{predicted_st:.1f}% ({improvement:+.1f}pp) "
                     f"fails Fast Fish criteria")
     
+    def _performance_rates(self, store_codes: pd.Series, categories: pd.Series) -> np.ndarray:
+        """Historical spus_sold_rate for each (store, category) pair via one merge on the index."""
+        default_rate = self.DEFAULT_PERFORMANCE['spus_sold_rate']
+        index = self._build_performance_index()
+        if index.empty:
+            return np.full(len(store_codes), default_rate)
+        if self._category_col:
+            keys = pd.MultiIndex.from_arrays([store_codes.to_numpy(), categories.to_numpy()])
+        else:
+            keys = pd.Index(store_codes.to_numpy())
+        rates = index['spus_sold_rate'].reindex(keys)
+        return rates.fillna(default_rate).to_numpy(dtype=float)
+    
+    @staticmethod
+    def _vectorized_sell_through(base_rate: np.ndarray, spu_count: np.ndarray) -> np.ndarray:
+        """Array form of calculate_sell_through_rate/_predict_spus_sold (same diminishing-returns model)."""
+        optimal_spu_count = 30
+        efficiency_factor = np.where(
+            spu_count <= optimal_spu_count, 1.0, 1.0 / (1.0 + 0.02 * (spu_count - optimal_spu_count))
+        )
+        predicted_spus_sold = np.maximum(0.0, (base_rate * efficiency_factor / 100.0) * spu_count)
+        safe_count = np.where(spu_count > 0, spu_count, 1)
+        rate = np.minimum(100.0, (predicted_spus_sold / safe_count) * 100.0)
+        return np.where(spu_count <= 0, 0.0, rate)
+    
+    def validate_dataframe(self,
+                           store_code: pd.Series,
+                           category: pd.Series,
+                           current_spu_count: pd.Series,
+                           recommended_spu_count: pd.Series,
+                           action: Any = 'UNKNOWN',
+                           rule_name: Any = 'Unknown Rule') -> pd.DataFrame:
+        """
+        Vectorized validate_recommendation over aligned columns.
+        
+        Args:
+            store_code: Store identifiers
+            category: Product categories
+            current_spu_count: Current SPU counts
+            recommended_spu_count: Recommended SPU counts
+            action: Action per row (Series) or one action for every row
+            rule_name: Rule name per row (Series) or one name for every row
+            
+        Returns:
+            DataFrame on the same index with the validate_recommendation result columns
+        """
+        index = store_code.index
+        n = len(index)
+        action = (action if isinstance(action, pd.Series) else pd.Series(action, index=index)).astype(str)
+        rule_name = (rule_name if isinstance(rule_name, pd.Series) else pd.Series(rule_name, index=index)).astype(str)
+        current_spus = pd.to_numeric(current_spu_count).to_numpy()
+        recommended_spus = pd.to_numeric(recommended_spu_count).to_numpy()
+        
+        # Sell-through before/after from the (store, category) performance index
+        base_rate = self._performance_rates(store_code, category)
+        current_st = self._vectorized_sell_through(base_rate, current_spus)
+        predicted_st = self._vectorized_sell_through(base_rate, recommended_spus)
+        improvement = predicted_st - current_st
+        
+        # Approval rules (see _should_approve_recommendation)
+        is_decrease = action.isin(self.DECREASE_ACTIONS).to_numpy()
+        is_increase = action.isin(self.INCREASE_ACTIONS).to_numpy()
+        max_degradation = np.where(current_st >= 90.0, -50.0, -10.0)
+        approved = np.select(
+            [predicted_st < self.MIN_SELL_THROUGH_THRESHOLD, is_decrease, is_increase],
+            [False,
+             improvement >= 0,
+             (predicted_st <= self.MAX_SELL_THROUGH_THRESHOLD) & (improvement >= max_degradation)],
+            default=improvement >= self.MIN_IMPROVEMENT_THRESHOLD
+        ).astype(bool)
+        
+        improves = improvement > 0.1
+        maintains = improvement >= -0.1
+        approval_reason = np.select(
+            [approved & improves, approved & maintains, approved],
+            ['Improves SPU sell-through rate',
+             'Maintains sell-through rate and meets threshold',
+             'Meets Fast Fish threshold (sell-through decrease within allowed bounds)'],
+            default='Fails Fast Fish threshold/criteria'
+        )
+        
+        # Business rationale (see _generate_business_rationale), formatted column-wise
+        cur_txt = pd.Series(np.char.mod('%.1f', current_st), index=index)
+        pred_txt = pd.Series(np.char.mod('%.1f', predicted_st), index=index)
+        imp_txt = pd.Series(np.char.mod('%+.1f', improvement), index=index)
+        cur_cnt, rec_cnt = np.nan_to_num(current_spus), np.nan_to_num(recommended_spus)
+        spu_txt = (pd.Series(np.char.mod('%d', cur_cnt), index=index) + '→'
+                   + pd.Series(np.char.mod('%d', rec_cnt), index=index)
+                   + ' (' + pd.Series(np.char.mod('%+d', rec_cnt - cur_cnt), index=index) + ')')
+        head = rule_name + ': ' + action
+        approved_head = '✅ ' + head + ' approved. SPU count ' + spu_txt
+        rationale = np.select(
+            [approved & improves, approved & maintains, approved],
+            [approved_head + ' improves sell-through ' + cur_txt + '%→' + pred_txt + '% (' + imp_txt + 'pp)',
+             approved_head + ' maintains sell-through around ' + pred_txt + '% (' + imp_txt + 'pp)',
+             approved_head + ' decreases sell-through to ' + pred_txt + '% (' + imp_txt + 'pp) but remains above threshold'],
+            default=('❌ ' + head + ' rejected. SPU count ' + spu_txt + ' sell-through ' + cur_txt + '%→'
+                     + pred_txt + '% (' + imp_txt + 'pp) fails Fast Fish criteria')
+        )
+        
+        return pd.DataFrame({
+            'store_code': store_code,
+            'category': category,
+            'rule_name': rule_name,
+            'action': action,
+            'current_spu_count': current_spus,
+            'recommended_spu_count': recommended_spus,
+            'current_sell_through_rate': current_st,
+            'predicted_sell_through_rate': predicted_st,
+            'sell_through_improvement': improvement,
+            'fast_fish_compliant': approved,
+            'business_rationale': rationale,
+            'validation_method': np.full(n, 'Fast Fish Official: SPUs Sold ÷ SPUs In Stock'),
+            'approval_reason': approval_reason
+        }, index=index)
+    
     def batch_validate_recommendations(self, recommendations: List[Dict]) -> pd.DataFrame:
         """
         Validate multiple recommendations using CORRECT Fast Fish definition.
+        
+        Produces the same columns as calling validate_recommendation per record, but
+        evaluates the whole batch with validate_dataframe.
         """
-        validated_recs = []
-        
-        for rec in recommendations:
-            validation = self.validate_recommendation(
-                store_code=rec['store_code'],
-                category=rec['category'],
-                current_spu_count=rec.get('current_spu_count', rec.get('current_quantity', 0)),
-                recommended_spu_count=rec.get('recommended_spu_count', rec.get('recommended_quantity', 0)),
-                action=rec.get('action', 'UNKNOWN'),
-                rule_name=rec.get('rule_name', 'Unknown Rule')
-            )
-            
-            # Merge original recommendation with validation results
-            validated_rec = {**rec, **validation}
-            validated_recs.append(validated_rec)
+        if len(recommendations) == 0:
+            return pd.DataFrame()
+        
+        df = pd.DataFrame(recommendations)
+        
+        def _first_present(*cols, default):
+            out = pd.Series(default, index=df.index, dtype=object)
+            for col in reversed(cols):
+                if col in df.columns:
+                    out = df[col].where(df[col].notna(), out)
+            return out
+        
+        validation = self.validate_dataframe(
+            store_code=df['store_code'],
+            category=df['category'],
+            current_spu_count=_first_present('current_spu_count', 'current_quantity', default=0),
+            recommended_spu_count=_first_present('recommended_spu_count', 'recommended_quantity', default=0),
+            action=_first_present('action', default='UNKNOWN'),
+            rule_name=_first_present('rule_name', default='Unknown Rule')
+        )
         
-        return pd.DataFrame(validated_recs)
+        # Merge original recommendation with validation results
+        for col in validation.columns:
+            df[col] = validation[col]
+        # Same column order as building the frame from {**rec, **validation} dicts
+        leading = list(dict.fromkeys(list(recommendations[0].keys()) + list(validation.columns)))
+        return df[leading + [c for c in df.columns if c not in leading]]
 
 def load_historical_data_for_validation() -> Optional[pd.DataFrame]:
     """
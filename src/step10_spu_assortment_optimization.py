@@ -8,29 +8,29 @@ def apply_per_store_cap(df: 'pd.DataFrame', max_per_store: int) -> 'Tuple[pd.Dat
     if df is None or len(df) == 0 or max_per_store is None or max_per_store <= 0:
         return df, {"stores_capped": 0, "dropped": 0}
 
-    def _sort_key(sub: pd.DataFrame) -> pd.DataFrame:
-        # Prepare sorting columns with NA-safe handling
-        sub = sub.copy()
-        if 'sell_through_improvement' not in sub.columns:
-            sub['sell_through_improvement'] = pd.NA
-        sub['_sti'] = pd.to_numeric(sub['sell_through_improvement'], errors='coerce')
-        sub['_sti'] = sub['_sti'].fillna(-np.inf)
-        sub['_excess'] = pd.to_numeric(sub.get('category_excess_spu_count', pd.Series(index=sub.index)), errors='coerce').fillna(0)
-        sub['_pct'] = pd.to_numeric(sub.get('category_overcapacity_percentage', pd.Series(index=sub.index)), errors='coerce').fillna(0)
-        sub['_absred'] = pd.to_numeric(sub.get('recommended_quantity_change', pd.Series(index=sub.index)), errors='coerce').fillna(0).abs()
-        return sub.sort_values(by=['_sti', '_excess', '_pct', '_absred'], ascending=[False, False, False, False])
-
-    kept_frames = []
-    stores_capped = 0
-    dropped_total = 0
-    for store_code, group in df.groupby('str_code'):
-        sorted_group = _sort_key(group)
-        if len(sorted_group) > max_per_store:
-            stores_capped += 1
-            dropped_total += (len(sorted_group) - max_per_store)
-        kept_frames.append(sorted_group.head(max_per_store))
-
-    trimmed = pd.concat(kept_frames, ignore_index=True) if kept_frames else df
+    # Prepare sorting columns once for the whole frame with NA-safe handling
+    ranked = df.copy()
+    if 'sell_through_improvement' not in ranked.columns:
+        ranked['sell_through_improvement'] = pd.NA
+    ranked['_sti'] = pd.to_numeric(ranked['sell_through_improvement'], errors='coerce').fillna(-np.inf)
+    ranked['_excess'] = pd.to_numeric(ranked.get('category_excess_spu_count', pd.Series(index=ranked.index)), errors='coerce').fillna(0)
+    ranked['_pct'] = pd.to_numeric(ranked.get('category_overcapacity_percentage', pd.Series(index=ranked.index)), errors='coerce').fillna(0)
+    ranked['_absred'] = pd.to_numeric(ranked.get('recommended_quantity_change', pd.Series(index=ranked.index)), errors='coerce').fillna(0).abs()
+
+    # Rank within each store by priority and keep the top rows (stores without a code are dropped, as in groupby)
+    ranked = ranked[ranked['str_code'].notna()].sort_values(
+        by=['str_code', '_sti', '_excess', '_pct', '_absred'],
+        ascending=[True, False, False, False, False],
+        kind='mergesort',
+    )
+    store_sizes = ranked.groupby('str_code', sort=False)['str_code'].transform('size')
+    keep = ranked.groupby('str_code', sort=False).cumcount() < max_per_store
+
+    over_cap = store_sizes > max_per_store
+    stores_capped = int(ranked.loc[over_cap, 'str_code'].nunique())
+    dropped_total = int((~keep).sum())
+
+    trimmed = ranked[keep].reset_index(drop=True) if len(ranked) > 0 else df
     return trimmed, {"stores_capped": stores_capped, "dropped": dropped_total}
 
 #!/usr/bin/env python3
@@ -67,6 +67,9 @@ Date: 2025-06-24 (Optimized Fast Version)
  - Test: Run preceding steps for one cluster (e.g., Cluster 22) to accelerate iteration. Step 10 will expand and compute only for what exists in your source data.
  - Production: Ensure API data and clustering are complete for ALL clusters to produce comprehensive results.
 
+ Large Periods
+ - The SPU JSON expansion can be sharded by cluster across processes with --workers N (or STEP10_WORKERS=N); it only engages above PARALLEL_MIN_RECORDS source records and yields identical output.
+
  Why these configurations work (and when they don't)
  - Real quantities and unit prices (from base/fashion qty/amt) prevent unrealistic investment math and allow ROI metrics; if these columns are missing, unit-price derivation collapses.
  - Blended seasonal mode (August) combines recent and prior-year seasonal patterns to avoid the "no autumn in August" gap; if seasonal sources are missing, the step falls back to recent-only with a warning.
@@ -106,10 +109,9 @@ try:
     import ujson as json  # faster if available
 except Exception:  # pragma: no cover
     import json
-import gc
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
-from tqdm import tqdm
 import warnings
 import sys
 import argparse
@@ -121,6 +123,7 @@ from src.config import (
 )
 from src.pipeline_manifest import register_step_output
 from src.output_utils import create_output_with_symlinks
+from src.rolling_aggregates import RollingAggregateStore
 
 # Defer Fast Fish validator import until after configuration is initialized
 SELLTHROUGH_VALIDATION_AVAILABLE = False
@@ -193,6 +196,10 @@ QUANTITY_USECOLS: List[str] = [
     'str_code', 'spu_code', 'base_sal_qty', 'fashion_sal_qty', 'sal_qty', 'quantity', 'spu_sales_amt'
 ]
 
+# Optional process-pool sharding of the SPU JSON expansion (by cluster) for the largest periods
+EXPAND_WORKERS: int = int(os.environ.get("STEP10_WORKERS", "1") or 1)
+PARALLEL_MIN_RECORDS: int = 50000  # Below this many source records a single process is faster
+
 # Debug and validation toggles
 DEBUG_LIMIT: Optional[int] = None
 SKIP_SELLTHROUGH: bool = False
@@ -373,13 +380,38 @@ def average_recent_dataframe(frames: List[pd.DataFrame], data_type: str) -> pd.D
     )
     # Preserve JSON-like detail fields for config (e.g., 'sty_sal_amt') from the most recent frame
     if data_type == "config" and group_cols:
-        json_cols = ['sty_sal_amt']
-        latest = frames[0] if len(frames) > 0 else None
-        if latest is not None:
-            keep = [c for c in json_cols if c in latest.columns]
-            if keep:
-                attach = latest[group_cols + keep].drop_duplicates()
-                averaged = averaged.merge(attach, on=group_cols, how='left')
+        averaged = _attach_latest_json(averaged, frames[0] if len(frames) > 0 else None, group_cols)
+    return averaged
+
+def _attach_latest_json(averaged: pd.DataFrame, latest: Optional[pd.DataFrame], group_cols: List[str]) -> pd.DataFrame:
+    """Left-merge JSON-like detail fields (e.g., 'sty_sal_amt') from the most recent frame."""
+    if latest is None:
+        return averaged
+    keep = [c for c in ['sty_sal_amt'] if c in latest.columns]
+    if not keep:
+        return averaged
+    attach = latest[group_cols + keep].drop_duplicates()
+    return averaged.merge(attach, on=group_cols, how='left')
+
+def average_recent_files(paths: List[str], data_type: str, usecols: Optional[List[str]] = None) -> pd.DataFrame:
+    """Average recent source files like average_recent_dataframe, reading only files not seen before.
+
+    Per-file sums and counts are kept in a rolling aggregate store, so a new
+    half-month costs one file read and the window is a groupby over the cached partials.
+    """
+    store = RollingAggregateStore(
+        f"step10_{data_type}",
+        keys=lambda df: _infer_group_cols(df, data_type),
+        values=lambda df: _infer_value_cols(df, data_type),
+        reader=lambda path: _read_csvs(path, usecols=usecols),
+        dropna_keys=False,
+    )
+    averaged = store.recent_window(paths)
+    if averaged is None:
+        return average_recent_dataframe([_read_csvs(p, usecols=usecols) for p in paths], data_type=data_type)
+    if data_type == "config" and paths:
+        averaged = _attach_latest_json(averaged, _read_csvs(paths[0], usecols=usecols),
+                                       _infer_group_cols(averaged, data_type))
     return averaged
 
 def load_blended_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
@@ -401,9 +433,8 @@ def load_blended_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
         log_progress(f"   Recent config sources: {recent_cfg_paths}")
         # Read recent frames, then average window
         if isinstance(recent_cfg_paths, list):
-            recent_cfg_frames = [ _read_csvs(p, usecols=CONFIG_USECOLS) for p in recent_cfg_paths ]
-            recent_cfg_df = average_recent_dataframe(recent_cfg_frames, data_type="config")
-            log_progress(f"   Averaged recent config across {len([f for f in recent_cfg_frames if len(f)>0])} sources -> {len(recent_cfg_df)} rows")
+            recent_cfg_df = average_recent_files(recent_cfg_paths, data_type="config", usecols=CONFIG_USECOLS)
+            log_progress(f"   Averaged recent config across {len(recent_cfg_paths)} sources -> {len(recent_cfg_df)} rows")
         else:
             recent_cfg_df = _read_csvs(recent_cfg_paths, usecols=CONFIG_USECOLS)
         
@@ -414,9 +445,8 @@ def load_blended_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
         # Quantity side (recent potentially multi-file averaged, plus seasonal)
         recent_qty_paths = RECENT_QUANTITY_FILES or QUANTITY_DATA_FILE
         if isinstance(recent_qty_paths, list):
-            recent_qty_frames = [ _read_csvs(p, usecols=QUANTITY_USECOLS) for p in recent_qty_paths ]
-            recent_qty_df = average_recent_dataframe(recent_qty_frames, data_type="quantity")
-            log_progress(f"   Averaged recent quantity across {len([f for f in recent_qty_frames if len(f)>0])} sources -> {len(recent_qty_df)} rows")
+            recent_qty_df = average_recent_files(recent_qty_paths, data_type="quantity", usecols=QUANTITY_USECOLS)
+            log_progress(f"   Averaged recent quantity across {len(recent_qty_paths)} sources -> {len(recent_qty_df)} rows")
         else:
             recent_qty_df = _read_csvs(recent_qty_paths, usecols=QUANTITY_USECOLS)
         seasonal_qty_path = os.environ.get("SEASONAL_QUANTITY_FILE")
@@ -454,22 +484,102 @@ def load_blended_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
         recent_cfg_paths = config.get('data_files') or config.get('data_file')
         log_progress(f"Loading standard data from {recent_cfg_paths}")
         if isinstance(recent_cfg_paths, list):
-            frames = [ _read_csvs(p, usecols=CONFIG_USECOLS) for p in recent_cfg_paths ]
-            config_data = average_recent_dataframe(frames, data_type="config")
-            log_progress(f"   Averaged recent config across {len([f for f in frames if len(f)>0])} sources -> {len(config_data)} rows")
+            config_data = average_recent_files(recent_cfg_paths, data_type="config", usecols=CONFIG_USECOLS)
+            log_progress(f"   Averaged recent config across {len(recent_cfg_paths)} sources -> {len(config_data)} rows")
         else:
             config_data = _read_csvs(recent_cfg_paths, usecols=CONFIG_USECOLS)
         recent_qty_paths = RECENT_QUANTITY_FILES or QUANTITY_DATA_FILE
         if isinstance(recent_qty_paths, list):
-            qframes = [ _read_csvs(p, usecols=QUANTITY_USECOLS) for p in recent_qty_paths ]
-            quantity_data = average_recent_dataframe(qframes, data_type="quantity")
-            log_progress(f"   Averaged recent quantity across {len([f for f in qframes if len(f)>0])} sources -> {len(quantity_data)} rows")
+            quantity_data = average_recent_files(recent_qty_paths, data_type="quantity", usecols=QUANTITY_USECOLS)
+            log_progress(f"   Averaged recent quantity across {len(recent_qty_paths)} sources -> {len(quantity_data)} rows")
         else:
             quantity_data = _read_csvs(recent_qty_paths, usecols=QUANTITY_USECOLS)
         log_progress(f"Loaded {len(config_data)} config records, {len(quantity_data)} quantity records")
         
         return config_data, quantity_data
 
+def _strict_float(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Convert a column with float() semantics; returns (values, convertible mask)."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float), pd.Series(True, index=values.index)
+    converted = pd.to_numeric(values, errors='coerce')
+    # float(nan) is valid; anything else that failed to convert (None, text) is not
+    ok = converted.notna() | values.map(lambda v: isinstance(v, float))
+    return converted.astype(float), ok
+
+
+def _explode_spu_json(json_values: List, positions: List[int]) -> Tuple[List[int], List[str], List[float], List[int]]:
+    """
+    Flatten sty_sal_amt JSON payloads into parallel (position, spu_code, sales) lists.
+    
+    Records whose payload is empty or not an object are skipped silently; payloads
+    that fail to parse or contain non-numeric sales are reported in the last list.
+    Module-level so it can run in worker processes.
+    """
+    owners: List[int] = []
+    codes: List[str] = []
+    sales: List[float] = []
+    failed: List[int] = []
+    for pos, payload in zip(positions, json_values):
+        try:
+            spu_data = json.loads(payload)
+            if not spu_data or not isinstance(spu_data, dict):
+                continue
+            amounts = [float(v) for v in spu_data.values()]
+        except (json.JSONDecodeError, TypeError, ValueError):
+            failed.append(pos)
+            continue
+        owners.extend([pos] * len(amounts))
+        codes.extend(spu_data.keys())
+        sales.extend(amounts)
+    return owners, codes, sales, failed
+
+
+def _explode_spu_json_sharded(json_values: np.ndarray, shard_keys: Optional[pd.Series]) -> Tuple[List[int], List[str], List[float], List[int]]:
+    """
+    Run _explode_spu_json, sharded by cluster across a process pool when enabled.
+    
+    Shards are balanced by record count and results are put back in source order,
+    so the output is identical to the single-process path.
+    """
+    positions = np.arange(len(json_values))
+    if EXPAND_WORKERS <= 1 or len(json_values) < PARALLEL_MIN_RECORDS or shard_keys is None:
+        return _explode_spu_json(list(json_values), positions.tolist())
+
+    # Greedily assign whole clusters to the least-loaded shard
+    cluster_sizes = shard_keys.astype(str).value_counts()
+    loads = [0] * EXPAND_WORKERS
+    shard_of_cluster = {}
+    for cluster, size in cluster_sizes.items():
+        target = loads.index(min(loads))
+        shard_of_cluster[cluster] = target
+        loads[target] += int(size)
+    shard_ids = shard_keys.astype(str).map(shard_of_cluster).to_numpy()
+
+    log_progress(f"🧩 Expanding SPU JSON in {EXPAND_WORKERS} processes ({len(cluster_sizes)} clusters)")
+    owners: List[int] = []
+    codes: List[str] = []
+    sales: List[float] = []
+    failed: List[int] = []
+    with ProcessPoolExecutor(max_workers=EXPAND_WORKERS) as pool:
+        futures = [
+            pool.submit(_explode_spu_json, list(json_values[shard_ids == shard]), positions[shard_ids == shard].tolist())
+            for shard in range(EXPAND_WORKERS) if loads[shard] > 0
+        ]
+        for future in futures:
+            o, c, v, f = future.result()
+            owners.extend(o)
+            codes.extend(c)
+            sales.extend(v)
+            failed.extend(f)
+
+    # Restore source order (stable, so SPU order within a record is kept)
+    order = np.argsort(np.asarray(owners, dtype=np.int64), kind='stable')
+    codes_arr = np.asarray(codes, dtype=object)[order]
+    return (np.asarray(owners)[order].tolist(), codes_arr.tolist(),
+            np.asarray(sales, dtype=float)[order].tolist(), sorted(failed))
+
+
 def fast_expand_spu_data(df: pd.DataFrame, quantity_df: pd.DataFrame) -> pd.DataFrame:
     """
     Fast expansion of subcategory data to REAL SPU-level overcapacity analysis.
@@ -500,102 +610,94 @@ def fast_expand_spu_data(df: pd.DataFrame, quantity_df: pd.DataFrame) -> pd.Data
 
     log_progress("🔧 EXTRACTING REAL SPU codes from JSON data...")
     
-    expanded_records = []
+    # Category-level overcapacity filter runs column-wise before any JSON is parsed.
+    # A missing count column counts as unreadable (None) for every record, not as an error.
+    missing_counts = [c for c in ('ext_sty_cnt_avg', 'target_sty_cnt_avg') if c not in spu_records.columns]
+    if missing_counts:
+        log_progress(f"Warning: SPU count columns missing from config data: {missing_counts}")
+    counts = spu_records.reindex(columns=['ext_sty_cnt_avg', 'target_sty_cnt_avg'])
+    for column in missing_counts:
+        counts[column] = np.full(len(counts), None, dtype=object)
+    current_spu_count, current_ok = _strict_float(counts['ext_sty_cnt_avg'])
+    target_spu_count, target_ok = _strict_float(counts['target_sty_cnt_avg'])
+    bad_counts = ~(current_ok & target_ok)
+    if bad_counts.any():
+        log_progress(f"Warning: Could not process {int(bad_counts.sum())} records with non-numeric SPU counts")
+    overcapacity_mask = ~bad_counts & ~(current_spu_count <= target_spu_count)
+    spu_records = spu_records[overcapacity_mask.to_numpy()]
+    current_spu_count = current_spu_count[overcapacity_mask].to_numpy()
+    target_spu_count = target_spu_count[overcapacity_mask].to_numpy()
+    log_progress(f"Found {len(spu_records):,} overcapacity categories to expand")
     
-    # Process all records and expand to individual SPU level
-    for n, (idx, row) in enumerate(tqdm(
-        spu_records.iterrows(),
-        total=len(spu_records),
-        desc="Processing SPU records",
-        mininterval=5,
-        miniters=100,
-        dynamic_ncols=True,
-        file=sys.stdout,
-    )):
-        try:
-            # Parse the JSON containing real SPU sales data
-            spu_data = json.loads(row['sty_sal_amt'])
-            
-            # Skip if no SPU data
-            if not spu_data or not isinstance(spu_data, dict):
-                continue
-                
-            # Get category-level metrics
-            current_spu_count = float(row['ext_sty_cnt_avg'])
-            target_spu_count = float(row['target_sty_cnt_avg'])
-            
-            # Only process overcapacity cases (more SPUs than target)
-            if current_spu_count <= target_spu_count:
-                continue
-            
-            # Calculate category-level overcapacity metrics
-            excess_spu_count = current_spu_count - target_spu_count
-            overcapacity_percentage = (excess_spu_count / max(target_spu_count, 1)) * 100
-            total_category_sales = sum(float(v) for v in spu_data.values() if float(v) > 0)
-            
-            # Skip if insufficient sales volume
-            if total_category_sales < MIN_SALES_VOLUME:
-                continue
-            
-            # Create individual records for each REAL SPU in the category
-            for spu_code, spu_sales in spu_data.items():
-                spu_sales = float(spu_sales)
-                
-                # Skip SPUs with no sales
-                if spu_sales <= 0:
-                    continue
-                
-                # Calculate this SPU's share of category sales
-                spu_sales_share = spu_sales / total_category_sales
-
-                # Create base record for this REAL SPU (quantities/prices computed after join)
-                expanded_record = {
-                    'str_code': row['str_code'],
-                    'str_name': row.get('str_name', pd.NA),
-                    'Cluster': row.get('Cluster', row.get('cluster_id', pd.NA)),
-                    'season_name': row.get('season_name', pd.NA),
-                    'sex_name': row.get('sex_name', pd.NA),
-                    'display_location_name': row.get('display_location_name', pd.NA),
-                    'big_class_name': row.get('big_class_name', pd.NA),
-                    'sub_cate_name': row.get('sub_cate_name', pd.NA),
-                    'yyyy': row.get('yyyy', pd.NA),
-                    'mm': row.get('mm', pd.NA),
-                    'mm_type': row.get('mm_type', pd.NA),
-                    'sal_amt': row.get('sal_amt', pd.NA),
-                    'sty_sal_amt': spu_sales,  # Individual SPU sales (from JSON)
-                    
-                    # Category-level overcapacity context
-                    'category_current_spu_count': current_spu_count,
-                    'category_target_spu_count': target_spu_count,
-                    'category_excess_spu_count': excess_spu_count,
-                    'category_overcapacity_percentage': overcapacity_percentage,
-                    'category_total_sales': total_category_sales,
-                    
-                    # Individual SPU metrics using REAL SPU code
-                    'spu_code': spu_code,  # REAL SPU CODE (e.g., "75T0001")
-                    'spu_sales': spu_sales,
-                    'spu_sales_share': spu_sales_share,
-                    # Legacy compatibility columns at SPU level
-                    'overcapacity_percentage': overcapacity_percentage,
-                    'excess_spu_count': excess_spu_count,
-                }
-                
-                expanded_records.append(expanded_record)
-            # Periodic progress logging and memory cleanup
-            if (n + 1) % 500 == 0 or (len(expanded_records) % 50000 == 0 and len(expanded_records) > 0):
-                log_progress(f"   … processed {n+1:,}/{len(spu_records):,} records; expanded {len(expanded_records):,} SPUs so far")
-            if (n + 1) % 2000 == 0:
-                gc.collect()
-                
-        except (json.JSONDecodeError, TypeError, ValueError, ZeroDivisionError) as e:
-            log_progress(f"Warning: Could not process record {idx}: {str(e)}")
-            continue
+    if len(spu_records) == 0:
+        log_progress("No valid overcapacity SPU records found")
+        return pd.DataFrame()
+    
+    # Explode the SPU JSON into one row per (category record, SPU)
+    cluster_source = next((c for c in ['Cluster', 'cluster_id'] if c in spu_records.columns), None)
+    owners, spu_codes, spu_sales, failed = _explode_spu_json_sharded(
+        spu_records['sty_sal_amt'].to_numpy(),
+        spu_records[cluster_source].reset_index(drop=True) if cluster_source else None,
+    )
+    if failed:
+        log_progress(f"Warning: Could not parse SPU JSON for {len(failed)} records (e.g. record {spu_records.index[failed[0]]})")
+    owners = np.asarray(owners, dtype=np.int64)
+    spu_sales = np.asarray(spu_sales, dtype=float)
+    spu_codes = np.asarray(spu_codes, dtype=object)
+    
+    # Category sales totals from positive SPU sales; drop low-volume categories and non-selling SPUs
+    positive = spu_sales > 0
+    total_category_sales = np.bincount(owners[positive], weights=spu_sales[positive], minlength=len(spu_records))
+    keep = positive & (total_category_sales[owners] >= MIN_SALES_VOLUME)
+    owners, spu_sales, spu_codes = owners[keep], spu_sales[keep], spu_codes[keep]
     
-    if not expanded_records:
+    if len(owners) == 0:
         log_progress("No valid overcapacity SPU records found")
         return pd.DataFrame()
     
-    expanded_df = pd.DataFrame(expanded_records)
+    # Category-level overcapacity metrics broadcast to each SPU
+    current_spu_count = current_spu_count[owners]
+    target_spu_count = target_spu_count[owners]
+    excess_spu_count = current_spu_count - target_spu_count
+    overcapacity_percentage = (excess_spu_count / np.maximum(target_spu_count, 1)) * 100
+    category_total_sales = total_category_sales[owners]
+    
+    def _take(column: Optional[str]):
+        if column is None or column not in spu_records.columns:
+            return pd.NA
+        return spu_records[column].to_numpy()[owners]
+    
+    expanded_df = pd.DataFrame({
+        'str_code': _take('str_code'),
+        'str_name': _take('str_name'),
+        'Cluster': _take(cluster_source),
+        'season_name': _take('season_name'),
+        'sex_name': _take('sex_name'),
+        'display_location_name': _take('display_location_name'),
+        'big_class_name': _take('big_class_name'),
+        'sub_cate_name': _take('sub_cate_name'),
+        'yyyy': _take('yyyy'),
+        'mm': _take('mm'),
+        'mm_type': _take('mm_type'),
+        'sal_amt': _take('sal_amt'),
+        'sty_sal_amt': spu_sales,  # Individual SPU sales (from JSON)
+        
+        # Category-level overcapacity context
+        'category_current_spu_count': current_spu_count,
+        'category_target_spu_count': target_spu_count,
+        'category_excess_spu_count': excess_spu_count,
+        'category_overcapacity_percentage': overcapacity_percentage,
+        'category_total_sales': category_total_sales,
+        
+        # Individual SPU metrics using REAL SPU code
+        'spu_code': spu_codes,  # REAL SPU CODE (e.g., "75T0001")
+        'spu_sales': spu_sales,
+        'spu_sales_share': spu_sales / category_total_sales,
+        # Legacy compatibility columns at SPU level
+        'overcapacity_percentage': overcapacity_percentage,
+        'excess_spu_count': excess_spu_count,
+    })
+    log_progress(f"   … expanded {len(spu_records):,} records into {len(expanded_df):,} SPU rows")
     
     # Summary of SPU presence across stores for diagnostics
     try:
@@ -721,10 +823,14 @@ def fast_expand_spu_data(df: pd.DataFrame, quantity_df: pd.DataFrame) -> pd.Data
 
         # Recommendation text
         try:
+            spu_txt = expanded_df['spu_code'].astype(str)
+            reduction_txt = np.char.mod('%.1f', expanded_df['constrained_reduction'].to_numpy(dtype=float))
+            pct_txt = np.char.mod('%.1f', expanded_df['category_overcapacity_percentage'].to_numpy(dtype=float))
             expanded_df['recommendation_text'] = np.where(
                 expanded_df['recommend_reduction'],
-                expanded_df.apply(lambda r: f"REDUCE {float(r['constrained_reduction']):.1f} units/15-days for SPU {r['spu_code']} (overcapacity: {float(r['category_overcapacity_percentage']):.1f}%)", axis=1),
-                expanded_df.apply(lambda r: f"Monitor SPU {r['spu_code']} (below reduction threshold)", axis=1)
+                "REDUCE " + pd.Series(reduction_txt, index=expanded_df.index) + " units/15-days for SPU " + spu_txt
+                + " (overcapacity: " + pd.Series(pct_txt, index=expanded_df.index) + "%)",
+                "Monitor SPU " + spu_txt + " (below reduction threshold)"
             )
         except Exception:
             pass
@@ -831,43 +937,25 @@ def fast_detect_overcapacity(df: pd.DataFrame, quantity_df: pd.DataFrame) -> pd.
         key_cols = ['str_code', 'sub_cate_name', '_v_curr_cnt', '_v_rec_cnt']
         unique_keys = valid_cases[key_cols].drop_duplicates()
 
-        # Validate once per key and broadcast
-        results = []
-        # Use dict records to avoid itertuples field-name mangling for columns starting with '_'
-        for rec in unique_keys.to_dict('records'):
+        # Validate once per key in a single vectorized pass and broadcast
+        validation_cols = ['current_sell_through_rate', 'predicted_sell_through_rate', 'sell_through_improvement',
+                           'fast_fish_compliant', 'business_rationale', 'approval_reason']
+        if len(unique_keys) > 0:
+            val_df = unique_keys.reset_index(drop=True)
             try:
-                v = validator.validate_recommendation(
-                    store_code=str(rec['str_code']),
-                    category=str(rec['sub_cate_name']),
-                    current_spu_count=int(rec['_v_curr_cnt']),
-                    recommended_spu_count=int(rec['_v_rec_cnt']),
+                v = validator.validate_dataframe(
+                    store_code=val_df['str_code'].astype(str),
+                    category=val_df['sub_cate_name'].astype(str),
+                    current_spu_count=val_df['_v_curr_cnt'],
+                    recommended_spu_count=val_df['_v_rec_cnt'],
                     action='DECREASE',
                     rule_name='Rule 10: Overcapacity'
                 )
-                v_row = {
-                    'str_code': rec['str_code'],
-                    'sub_cate_name': rec['sub_cate_name'],
-                    '_v_curr_cnt': int(rec['_v_curr_cnt']),
-                    '_v_rec_cnt': int(rec['_v_rec_cnt']),
-                    'current_sell_through_rate': v.get('current_sell_through_rate'),
-                    'predicted_sell_through_rate': v.get('predicted_sell_through_rate'),
-                    'sell_through_improvement': v.get('sell_through_improvement'),
-                    'fast_fish_compliant': v.get('fast_fish_compliant'),
-                    'business_rationale': v.get('business_rationale'),
-                    'approval_reason': v.get('approval_reason'),
-                }
-            except Exception:
-                v_row = {
-                    'str_code': rec['str_code'],
-                    'sub_cate_name': rec['sub_cate_name'],
-                    '_v_curr_cnt': int(rec['_v_curr_cnt']),
-                    '_v_rec_cnt': int(rec['_v_rec_cnt']),
-                    'fast_fish_compliant': False,
-                }
-            results.append(v_row)
-
-        if results:
-            val_df = pd.DataFrame(results)
+                for col in validation_cols:
+                    val_df[col] = v[col]
+            except Exception as e:
+                log_progress(f"⚠️ Sell-through validation failed; treating cases as non-compliant: {e}")
+                val_df['fast_fish_compliant'] = False
             merged = valid_cases.merge(val_df, on=key_cols, how='left')
         else:
             merged = valid_cases.copy()
@@ -938,7 +1026,7 @@ def apply_runtime_configuration(args) -> None:
     global RECENT_CONFIG_FILES, RECENT_QUANTITY_FILES, DEBUG_LIMIT, SKIP_SELLTHROUGH
     global MAX_TOTAL_ADJUSTMENTS_PER_STORE
     global MIN_SALES_VOLUME, MIN_REDUCTION_QUANTITY, MAX_REDUCTION_PERCENTAGE, MIN_CLUSTER_SIZE
-    global JOIN_MODE
+    global JOIN_MODE, EXPAND_WORKERS
     # analysis level
     if getattr(args, "analysis_level", None):
         ANALYSIS_LEVEL = args.analysis_level
@@ -1088,6 +1176,9 @@ def apply_runtime_configuration(args) -> None:
     # join mode
     if getattr(args, "join_mode", None) in ("left", "inner"):
         JOIN_MODE = args.join_mode
+    # expansion workers
+    if getattr(args, "workers", None) is not None:
+        EXPAND_WORKERS = max(1, int(args.workers))
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Step 10 - Smart Overcapacity (SPU) with labeled outputs")
@@ -1107,6 +1198,7 @@ def parse_args():
     parser.add_argument("--min-reduction-qty", type=float, help="Minimum units to recommend reduction for a SPU")
     parser.add_argument("--max-reduction-pct", type=float, help="Maximum percentage of current quantity reduction per SPU (0-1)")
     parser.add_argument("--min-cluster-size", type=int, help="Minimum number of stores required in a cluster (if applicable)")
+    parser.add_argument("--workers", type=int, help="Processes for cluster-sharded SPU expansion on large periods (default: STEP10_WORKERS or 1)")
     return parser.parse_args()
 
 def fast_pipeline_analysis(args=None) -> None:
@@ -1226,16 +1318,19 @@ def fast_pipeline_analysis(args=None) -> None:
         # Convert recommended_quantity_change (negative) to positive for reporting
         store_summary['total_reduction'] = -store_summary['total_reduction']
         
-        # Update results
-        for _, row in store_summary.iterrows():
-            store_idx = results_df['str_code'] == row['str_code']
-            results_df.loc[store_idx, 'rule10_spu_overcapacity'] = 1
-            results_df.loc[store_idx, 'rule10_overcapacity_count'] = row['opp_count']
-            results_df.loc[store_idx, 'rule10_total_excess_spus'] = row['total_excess']
-            results_df.loc[store_idx, 'rule10_avg_overcapacity_pct'] = row['avg_pct']
-            results_df.loc[store_idx, 'rule10_reduction_recommended_count'] = row['reduction_count']
-            results_df.loc[store_idx, 'rule10_total_quantity_reduction'] = row['total_reduction']
-            results_df.loc[store_idx, 'rule10_total_cost_savings'] = row['total_savings']
+        # Update results (map store aggregates onto every matching results row)
+        summary_by_store = store_summary.set_index('str_code')
+        flagged = results_df['str_code'].isin(summary_by_store.index)
+        results_df.loc[flagged, 'rule10_spu_overcapacity'] = 1
+        for target_col, summary_col in [
+            ('rule10_overcapacity_count', 'opp_count'),
+            ('rule10_total_excess_spus', 'total_excess'),
+            ('rule10_avg_overcapacity_pct', 'avg_pct'),
+            ('rule10_reduction_recommended_count', 'reduction_count'),
+            ('rule10_total_quantity_reduction', 'total_reduction'),
+            ('rule10_total_cost_savings', 'total_savings'),
+        ]:
+            results_df.loc[flagged, target_col] = results_df.loc[flagged, 'str_code'].map(summary_by_store[summary_col])
         
         # STANDARDIZATION FIX: Add missing standard columns for pipeline compatibility
         # Map rule10_total_quantity_reduction to recommended_quantity_change (standard column name)
@@ -1245,9 +1340,10 @@ def fast_pipeline_analysis(args=None) -> None:
         results_df['investment_required'] = -results_df['rule10_total_cost_savings']  # Negative = savings
         
         # Add standard business rationale and approval columns
-        results_df['business_rationale'] = results_df.apply(
-            lambda row: f"Overcapacity detected: {row['rule10_overcapacity_count']} SPUs need reduction" 
-                       if row['rule10_spu_overcapacity'] > 0 else "No overcapacity issues", axis=1
+        results_df['business_rationale'] = np.where(
+            results_df['rule10_spu_overcapacity'] > 0,
+            "Overcapacity detected: " + results_df['rule10_overcapacity_count'].astype(str) + " SPUs need reduction",
+            "No overcapacity issues"
         )
         results_df['approval_reason'] = 'Automatic approval for overcapacity reduction'
         results_df['fast_fish_compliant'] = True  # Overcapacity reductions are validated
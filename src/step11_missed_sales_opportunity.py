@@ -81,12 +81,18 @@ try:
     # Prefer package import when running as module: `python -m src.step11_missed_sales_opportunity`
     from src.pipeline_manifest import register_step_output
     from src.output_utils import create_output_with_symlinks
+    from src.rolling_aggregates import RollingAggregateStore
+    from src.rule_query_engine import (DUCKDB_AVAILABLE, RULE_QUERY_ENGINE, resolve_engine,
+                                       cluster_top_performers, expected_spu_gaps)
 except ModuleNotFoundError:
     # Fallback for direct script execution: `python src/step11_missed_sales_opportunity.py`
     import sys
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from src.pipeline_manifest import register_step_output
     from src.output_utils import create_output_with_symlinks
+    from src.rolling_aggregates import RollingAggregateStore
+    from src.rule_query_engine import (DUCKDB_AVAILABLE, RULE_QUERY_ENGINE, resolve_engine,
+                                       cluster_top_performers, expected_spu_gaps)
 
 # FAST FISH ENHANCEMENT: Import sell-through validation
 try:
@@ -136,6 +142,7 @@ MIN_QTY_GAP = 2.0   # Minimum quantity gap to recommend action (was 0.5)
 MIN_ADOPTION_RATE = 0.70  # Minimum adoption rate for SPU to be recommended (new)
 MIN_INVESTMENT_THRESHOLD = 150  # Minimum investment per recommendation (new)
 JOIN_MODE = "left"  # Cluster join mode: left (inclusive, default) or inner (stricter)
+QUERY_ENGINE = RULE_QUERY_ENGINE  # pandas (default) or duckdb for the top-performer/gap queries
 
 # Testing mode - set to True for fast testing, False for full analysis
 TESTING_MODE = False  # Can be overridden by command line argument
@@ -279,14 +286,17 @@ def blend_seasonal_data(recent_df: pd.DataFrame, seasonal_df: pd.DataFrame,
         # Aggregate seasonal values by merge_key to handle potential duplicate rows
         seasonal_values = seasonal_clean.groupby('merge_key')[numeric_columns].mean()
         
-        for idx, row in blended_df.iterrows():
-            merge_key = str(row['str_code']) + '_' + str(row['spu_code'])
-            if merge_key in seasonal_values.index:
-                # Blend numeric values
-                for col in numeric_columns:
-                    recent_val = row[col] if pd.notna(row[col]) else 0
-                    seasonal_val = seasonal_values.loc[merge_key, col] if pd.notna(seasonal_values.loc[merge_key, col]) else 0
-                    blended_df.at[idx, col] = (recent_val * recent_weight) + (seasonal_val * seasonal_weight)
+        # Blend numeric values for store-SPU pairs present in both (missing values count as 0);
+        # recent-only pairs keep their recent values
+        matched = blended_df['merge_key'].isin(seasonal_values.index).to_numpy()
+        if matched.any():
+            seasonal_aligned = seasonal_values.reindex(blended_df.loc[matched, 'merge_key'])
+            for col in numeric_columns:
+                recent_vals = blended_df.loc[matched, col].fillna(0).to_numpy()
+                seasonal_vals = seasonal_aligned[col].fillna(0).to_numpy()
+                blended_col = blended_df[col].astype(float)
+                blended_col[matched] = (recent_vals * recent_weight) + (seasonal_vals * seasonal_weight)
+                blended_df[col] = blended_col
     
     # Add seasonal items that don't exist in recent data
     seasonal_only = seasonal_clean[~seasonal_clean['merge_key'].isin(recent_clean['merge_key'])].copy()
@@ -325,8 +335,14 @@ def load_and_prepare_data(sample_size: Optional[int] = None, args: Optional[argp
     recent_paths = resolve_recent_spu_files(str(source_yyyymm), str(source_period))
     if not recent_paths:
         raise FileNotFoundError("No recent SPU files found for Step 11")
-    recent_frames = [pd.read_csv(p, dtype={'str_code': str}) for p in recent_paths]
-    recent_spu_df = average_recent_dataframe(recent_frames)
+    # Per-file store×SPU sums/counts are cached, so only half-months not seen before are read
+    store = RollingAggregateStore("step11_spu_sales", keys=_infer_group_cols, values=_infer_value_cols,
+                                  reader=lambda path: pd.read_csv(path, dtype={'str_code': str}),
+                                  dropna_keys=False)
+    recent_spu_df = store.recent_window(recent_paths)
+    if recent_spu_df is None:
+        recent_frames = [pd.read_csv(p, dtype={'str_code': str}) for p in recent_paths]
+        recent_spu_df = average_recent_dataframe(recent_frames)
     log_progress(f"Averaged recent window: {len(recent_spu_df):,} records from {len(recent_paths)} half-month files")
 
     # Seasonal anchor
@@ -458,12 +474,20 @@ def load_and_prepare_data(sample_size: Optional[int] = None, args: Optional[argp
     
     return df
 
+def _use_duckdb() -> bool:
+    return QUERY_ENGINE == 'duckdb' and DUCKDB_AVAILABLE
+
 def identify_cluster_category_top_performers_optimized(df: pd.DataFrame) -> pd.DataFrame:
     """
     OPTIMIZED: Identify top 20% performing SPUs with quantity ratios and unit prices
     """
     log_progress("Identifying top performers with UNIT QUANTITY ratios (OPTIMIZED)...")
     
+    if _use_duckdb():
+        top_performers = cluster_top_performers(df, MIN_CLUSTER_STORES, MIN_STORES_SELLING, TOP_PERFORMER_THRESHOLD)
+        log_progress(f"Identified {len(top_performers):,} top-performing SPUs with UNIT QUANTITY ratios (DuckDB engine)")
+        return top_performers
+    
     # Calculate cluster sizes first
     cluster_sizes = df.groupby(['Cluster', 'category_key'])['str_code'].nunique().reset_index()
     cluster_sizes.columns = ['Cluster', 'category_key', 'total_stores_in_cluster']
@@ -542,13 +566,8 @@ def identify_cluster_category_top_performers_optimized(df: pd.DataFrame) -> pd.D
     
     return top_performers
 
-def find_missing_top_performers_with_quantities_optimized(df: pd.DataFrame, top_performers: pd.DataFrame) -> pd.DataFrame:
-    """
-    OPTIMIZED: Find stores missing top-performing SPUs with INCREMENTAL UNIT QUANTITY recommendations
-    Now accounts for existing SPU inventory levels!
-    """
-    log_progress("Identifying stores missing top-performing SPUs with INCREMENTAL UNIT QUANTITY recommendations (OPTIMIZED)...")
-    
+def _expected_spu_gaps_pandas(df: pd.DataFrame, top_performers: pd.DataFrame) -> pd.DataFrame:
+    """Expected store x top-performer matrix with targets, left-joined to current SPU sales"""
     # Create a comprehensive store-cluster-category matrix WITH category totals
     store_cluster_category = df.groupby(['str_code', 'Cluster', 'category_key']).agg({
         'spu_code': 'count',
@@ -635,6 +654,22 @@ def find_missing_top_performers_with_quantities_optimized(df: pd.DataFrame, top_
         on=['str_code', 'Cluster', 'category_key', 'spu_code'], 
         how='left'
     )
+    return gap_analysis
+
+def find_missing_top_performers_with_quantities_optimized(df: pd.DataFrame, top_performers: pd.DataFrame) -> pd.DataFrame:
+    """
+    OPTIMIZED: Find stores missing top-performing SPUs with INCREMENTAL UNIT QUANTITY recommendations
+    Now accounts for existing SPU inventory levels!
+    """
+    log_progress("Identifying stores missing top-performing SPUs with INCREMENTAL UNIT QUANTITY recommendations (OPTIMIZED)...")
+    
+    if _use_duckdb():
+        gap_analysis = expected_spu_gaps(df, top_performers, SCALING_FACTOR)
+        log_progress(f"Built expected matrix and store-SPU join with TARGET QUANTITIES (DuckDB engine): {len(gap_analysis):,} store-SPU expectations")
+    else:
+        gap_analysis = _expected_spu_gaps_pandas(df, top_performers)
+    if len(gap_analysis) == 0:
+        return pd.DataFrame()
     
     # Calculate current vs target gaps (preserve missingness; no synthetic imputation)
     missing_sales = gap_analysis['spu_sales'].isna().sum()
@@ -1240,6 +1275,7 @@ if __name__ == "__main__":
     parser.add_argument("--min-qty-gap", dest="min_qty_gap", type=float, help="Minimum unit gap to recommend action")
     parser.add_argument("--min-adoption-rate", dest="min_adoption_rate", type=float, help="Minimum adoption rate to recommend (0-1)")
     parser.add_argument("--min-investment", dest="min_investment", type=float, help="Minimum investment per recommendation")
+    parser.add_argument("--engine", dest="engine", choices=["pandas", "duckdb"], help="Query engine for top performers and expected gaps (default: RULE_QUERY_ENGINE or pandas)")
     parser.set_defaults(seasonal_blending=None, test=False)
     args = parser.parse_args()
 
@@ -1281,6 +1317,7 @@ if __name__ == "__main__":
             MIN_INVESTMENT_THRESHOLD = float(args.min_investment)
         if args.join_mode in ("left","inner"):
             JOIN_MODE = args.join_mode
+        QUERY_ENGINE = resolve_engine(args.engine, log_progress)
     except Exception as _e:
         pass
 
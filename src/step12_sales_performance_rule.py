@@ -81,6 +81,8 @@ import warnings
 from src.pipeline_manifest import register_step_output
 from src.config import get_output_files, get_current_period, get_api_data_files
 from src.output_utils import create_output_with_symlinks
+from src.rolling_aggregates import RollingAggregateStore
+from src.rule_query_engine import DUCKDB_AVAILABLE, RULE_QUERY_ENGINE, resolve_engine, cluster_quantile_gaps
 
 # FAST FISH ENHANCEMENT: Import sell-through validation
 try:
@@ -170,6 +172,7 @@ MIN_OPPORTUNITY_SCORE = 0.05  # Minimum opportunity score (reduced from 0.10 for
 MIN_INVESTMENT_THRESHOLD = 15   # Minimum investment per recommendation (¥15, reduced from ¥30 for more inclusivity)
 MIN_Z_SCORE_THRESHOLD = 0.5   # Only recommend for Z-score > 0.5 (reduced from 0.8 for more inclusivity)
 JOIN_MODE = "left"  # Inclusive by default; allow 'inner' for stricter precision
+QUERY_ENGINE = RULE_QUERY_ENGINE  # pandas (default) or duckdb for the cluster quartile benchmarks
 
 # Performance classification thresholds (Z-score based) - Adapted for analysis level
 if ANALYSIS_LEVEL == "subcategory":
@@ -250,13 +253,33 @@ def average_recent_dataframe(frames: List[pd.DataFrame], data_type: str) -> pd.D
     )
     # Preserve JSON-like detail fields for config (e.g., 'sty_sal_amt') from the most recent frame
     if data_type == "config" and group_cols:
-        json_cols = ['sty_sal_amt']
-        latest = frames[0] if len(frames) > 0 else None
-        if latest is not None:
-            keep = [c for c in json_cols if c in latest.columns]
-            if keep:
-                attach = latest[group_cols + keep].drop_duplicates()
-                averaged = averaged.merge(attach, on=group_cols, how='left')
+        averaged = _attach_latest_json(averaged, frames[0] if len(frames) > 0 else None, group_cols)
+    return averaged
+
+def _attach_latest_json(averaged: pd.DataFrame, latest: Optional[pd.DataFrame], group_cols: List[str]) -> pd.DataFrame:
+    if latest is None:
+        return averaged
+    keep = [c for c in ['sty_sal_amt'] if c in latest.columns]
+    if not keep:
+        return averaged
+    attach = latest[group_cols + keep].drop_duplicates()
+    return averaged.merge(attach, on=group_cols, how='left')
+
+def average_recent_files(paths: List[str], data_type: str) -> pd.DataFrame:
+    # Same result as average_recent_dataframe, but per-file sums/counts are kept in a
+    # rolling aggregate store so only half-months not seen before are read
+    store = RollingAggregateStore(
+        f"step12_{data_type}",
+        keys=lambda df: _infer_group_cols(df, data_type),
+        values=lambda df: _infer_value_cols(df, data_type),
+        reader=_read_csvs,
+        dropna_keys=False,
+    )
+    averaged = store.recent_window(paths)
+    if averaged is None:
+        return average_recent_dataframe([_read_csvs(p) for p in paths], data_type=data_type)
+    if data_type == "config" and paths:
+        averaged = _attach_latest_json(averaged, _read_csvs(paths[0]), _infer_group_cols(averaged, data_type))
     return averaged
 
 def _prev_periods(n: int, yyyymm: str, period: str) -> List[Tuple[str,str]]:
@@ -313,10 +336,8 @@ def load_blended_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
             if qty and os.path.exists(qty):
                 recent_qty_paths = [qty]
 
-    recent_cfg_frames = [_read_csvs(p) for p in recent_cfg_paths]
-    recent_qty_frames = [_read_csvs(p) for p in recent_qty_paths]
-    recent_cfg_df = average_recent_dataframe(recent_cfg_frames, data_type="config")
-    recent_qty_df = average_recent_dataframe(recent_qty_frames, data_type="quantity")
+    recent_cfg_df = average_recent_files(recent_cfg_paths, data_type="config")
+    recent_qty_df = average_recent_files(recent_qty_paths, data_type="quantity")
 
     if not USE_BLENDED_SEASONAL:
         return recent_cfg_df, recent_qty_df
@@ -703,30 +724,10 @@ def prepare_sales_data(category_df: pd.DataFrame, cluster_df: pd.DataFrame, quan
     
     return store_category_sales
 
-def calculate_opportunity_gaps(sales_data: pd.DataFrame) -> pd.DataFrame:
-    """
-    Calculate opportunity gaps by comparing each store's category performance
-    against cluster top quartile performers.
-    
-    Args:
-        sales_data: Store-category sales data with clusters
-        
-    Returns:
-        DataFrame with opportunity gap analysis
-    """
-    log_progress("Calculating opportunity gaps vs cluster top performers...")
-    
-    config = ANALYSIS_CONFIGS[ANALYSIS_LEVEL]
-    sales_col = config["sales_column"] if ANALYSIS_LEVEL == "subcategory" else "spu_sales"
-    
+def _opportunity_gaps_pandas(sales_data: pd.DataFrame, groupby_cols: List[str], sales_col: str) -> pd.DataFrame:
+    """Per cluster-category top-quartile benchmark and gap, one group at a time."""
     results = []
     
-    # Group by cluster and category to analyze peer performance
-    if ANALYSIS_LEVEL == "subcategory":
-        groupby_cols = ['cluster_id', 'sub_cate_name']
-    else:
-        groupby_cols = ['cluster_id', 'category_key']
-    
     for group_key, group in sales_data.groupby(groupby_cols):
         
         # Skip if cluster too small for meaningful analysis
@@ -757,6 +758,38 @@ def calculate_opportunity_gaps(sales_data: pd.DataFrame) -> pd.DataFrame:
         log_progress(f"Calculated opportunity gaps for {len(opportunity_data):,} store-category combinations across {len(results):,} valid cluster-category groups")
     else:
         opportunity_data = pd.DataFrame()
+    return opportunity_data
+
+def calculate_opportunity_gaps(sales_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calculate opportunity gaps by comparing each store's category performance
+    against cluster top quartile performers.
+    
+    Args:
+        sales_data: Store-category sales data with clusters
+        
+    Returns:
+        DataFrame with opportunity gap analysis
+    """
+    log_progress("Calculating opportunity gaps vs cluster top performers...")
+    
+    config = ANALYSIS_CONFIGS[ANALYSIS_LEVEL]
+    sales_col = config["sales_column"] if ANALYSIS_LEVEL == "subcategory" else "spu_sales"
+    
+    # Group by cluster and category to analyze peer performance
+    if ANALYSIS_LEVEL == "subcategory":
+        groupby_cols = ['cluster_id', 'sub_cate_name']
+    else:
+        groupby_cols = ['cluster_id', 'category_key']
+    
+    if QUERY_ENGINE == 'duckdb' and DUCKDB_AVAILABLE:
+        opportunity_data = cluster_quantile_gaps(sales_data, groupby_cols, sales_col,
+                                                 TOP_QUARTILE_PERCENTILE, MIN_CLUSTER_SIZE)
+        log_progress(f"Calculated opportunity gaps for {len(opportunity_data):,} store-category combinations (DuckDB engine)")
+        if len(opportunity_data) == 0:
+            opportunity_data = pd.DataFrame()
+    else:
+        opportunity_data = _opportunity_gaps_pandas(sales_data, groupby_cols, sales_col)
     
     # DEBUG: Show sample of opportunity gap data
     if len(opportunity_data) > 0:
@@ -1740,6 +1773,7 @@ def _parse_args() -> argparse.Namespace:
     parser.add_argument("--min-opportunity-score", type=float, help="Minimum opportunity score (0-1)")
     parser.add_argument("--min-z", type=float, help="Minimum Z-score for actionability")
     parser.add_argument("--max-total-qty-per-store", dest="max_total_qty_per_store", type=float, help="Optional total unit cap per store; omit for no cap")
+    parser.add_argument("--engine", choices=["pandas", "duckdb"], help="Query engine for the cluster quartile benchmarks (default: RULE_QUERY_ENGINE or pandas)")
     return parser.parse_args()
 
 def _derive_period_label(args: argparse.Namespace) -> str:
@@ -1803,6 +1837,7 @@ if __name__ == "__main__":
             MIN_OPPORTUNITY_SCORE = float(args.min_opportunity_score)
         if getattr(args, 'min_z', None) is not None:
             MIN_Z_SCORE_THRESHOLD = float(args.min_z)
+        QUERY_ENGINE = resolve_engine(getattr(args, 'engine', None), log_progress)
     except Exception:
         pass
     main(testing_mode=getattr(args, 'test', False), args=args, period_label=label)
\ No newline at end of file
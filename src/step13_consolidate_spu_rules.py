@@ -54,6 +54,22 @@ Full Trending (slower; requires real data sources present)
       --target-period {A|B} \
       --enable-trend-utils
 
+Streaming Consolidation (very large periods; bounded memory)
+  ENV:
+    STEP13_STREAMING=1   (or pass --streaming)
+
+  Command:
+    PYTHONPATH=. python3 src/step13_consolidate_spu_rules.py \
+      --target-yyyymm YYYYMM \
+      --target-period {A|B} \
+      --streaming [--stream-chunk-size 200000]
+
+  Reads each rule file chunk by chunk, reduces it into store and cluster-subcategory
+  totals and appends detail rows to the same
+  output/consolidated_spu_rule_results_detailed_<period>.csv artifact as the default mode.
+  Whole-frame corrections (no-sales enforcement, share alignment) and trend utilities
+  are skipped in this mode.
+
 Inputs (expected to exist before Step 13)
 - Rule outputs from Steps 7–12 under `output/` (e.g., Rule 7/9 details).
 - Weather and clustering may be used for trend utilities when enabled.
@@ -102,7 +118,7 @@ import json
 import argparse
 from src.config import get_current_period, get_period_label, get_output_files, get_api_data_files
 from src.pipeline_manifest import get_manifest
-from src.output_utils import create_output_with_symlinks
+from src.output_utils import create_output_with_symlinks, link_output_with_symlinks
 
 # Suppress pandas warnings
 warnings.filterwarnings('ignore')
@@ -111,6 +127,9 @@ warnings.filterwarnings('ignore')
 FAST_MODE = True  # Set to False for full trending analysis
 TREND_SAMPLE_SIZE = 1000  # Process only top N suggestions for trending (when FAST_MODE=True)
 CHUNK_SIZE_SMALL = 5000   # Smaller chunks for faster processing
+# Single-pass chunked consolidation: bounded memory, skips full-frame quality corrections
+STREAMING_MODE = os.environ.get("STEP13_STREAMING", "false").lower() in ("1", "true", "yes")
+STREAM_CHUNK_SIZE = 200000  # Rows per chunk when STREAMING_MODE is enabled
 # Gate all non-essential trend/enhancement utilities by default (consolidation-only contract)
 ENABLE_TREND_UTILS = False
 
@@ -218,21 +237,17 @@ def calculate_real_fashion_ratios(df: pd.DataFrame) -> pd.DataFrame:
         return df_na
     
     # Calculate real ratios per subcategory from sales data
-    ratio_map = _calculate_subcategory_ratios(sales_data)
+    ratio_table = _calculate_subcategory_ratio_table(sales_data)
     
-    # Apply calculated ratios to the dataframe
+    # Join the subcategory ratio table onto every row (hash lookup on sub_cate_name)
     df_with_ratios = df.copy()
-    
-    for idx, row in df_with_ratios.iterrows():
-        subcategory = row.get('sub_cate_name', None)
-        ratios = ratio_map.get(subcategory) if subcategory is not None else None
-        if ratios is None:
-            df_with_ratios.at[idx, 'basic_ratio'] = pd.NA
-            df_with_ratios.at[idx, 'fashion_ratio'] = pd.NA
-            continue
-        basic_ratio, fashion_ratio = ratios
-        df_with_ratios.at[idx, 'basic_ratio'] = f"{basic_ratio:.1f}%"
-        df_with_ratios.at[idx, 'fashion_ratio'] = f"{fashion_ratio:.1f}%"
+    if 'sub_cate_name' in df_with_ratios.columns and not ratio_table.empty:
+        labels = ratio_table.set_index('sub_cate_name')
+        df_with_ratios['basic_ratio'] = df_with_ratios['sub_cate_name'].map(_format_ratio_labels(labels['basic_ratio']))
+        df_with_ratios['fashion_ratio'] = df_with_ratios['sub_cate_name'].map(_format_ratio_labels(labels['fashion_ratio']))
+    else:
+        df_with_ratios['basic_ratio'] = pd.NA
+        df_with_ratios['fashion_ratio'] = pd.NA
     
     # Log the diversity achieved
     unique_basic = df_with_ratios['basic_ratio'].nunique()
@@ -241,7 +256,12 @@ def calculate_real_fashion_ratios(df: pd.DataFrame) -> pd.DataFrame:
     
     return df_with_ratios
 
-def _calculate_subcategory_ratios(sales_data: pd.DataFrame) -> Dict[str, Tuple[float, float]]:
+def _format_ratio_labels(values: pd.Series) -> pd.Series:
+    """Format percentage floats as 'xx.x%' labels, formatting each distinct value once."""
+    uniques = pd.unique(values.dropna())
+    return values.map({v: f"{v:.1f}%" for v in uniques})
+
+def _calculate_subcategory_ratio_table(sales_data: pd.DataFrame) -> pd.DataFrame:
     """
     Calculate basic vs fashion ratios per subcategory from real sales data.
     
@@ -249,51 +269,54 @@ def _calculate_subcategory_ratios(sales_data: pd.DataFrame) -> Dict[str, Tuple[f
     - Higher quantity/sales = more basic/core items
     - Lower quantity/sales = more fashion/trendy items
     - Different subcategories have different basic/fashion splits
-    """
-    ratio_map = {}
     
+    Returns:
+        pd.DataFrame: One row per subcategory with basic_ratio and fashion_ratio (percent floats)
+    """
     if 'sub_cate_name' not in sales_data.columns:
         print("⚠ No subcategory data in sales file, using category-based defaults")
-        return _get_category_based_defaults()
+        defaults = _get_category_based_defaults()
+        return pd.DataFrame(
+            [(k, b, f) for k, (b, f) in defaults.items()],
+            columns=['sub_cate_name', 'basic_ratio', 'fashion_ratio']
+        )
     
     # Group by subcategory and calculate metrics
-    subcat_stats = sales_data.groupby('sub_cate_name').agg({
-        'quantity': ['sum', 'mean', 'std'],
-        'spu_code': 'nunique'  # Number of unique SPUs
-    }).round(2)
-    
-    subcat_stats.columns = ['total_qty', 'avg_qty', 'qty_std', 'spu_count']
-    subcat_stats = subcat_stats.fillna(0)
-    
-    # Calculate ratios based on real patterns
-    for subcategory, stats in subcat_stats.iterrows():
-        total_qty = stats['total_qty']
-        avg_qty = stats['avg_qty']
-        spu_count = stats['spu_count']
-        
-        # Logic: Higher volume categories are more "basic"
-        # Lower volume, more diverse categories are more "fashion"
-        if total_qty > 10000:  # High volume = basic-heavy
-            basic_ratio = 75.0 + min(15.0, total_qty / 50000)  # 75-90%
-        elif total_qty > 1000:  # Medium volume = balanced
-            basic_ratio = 60.0 + (total_qty / 10000) * 15  # 60-75%
-        else:  # Low volume = fashion-heavy
-            basic_ratio = 40.0 + (total_qty / 1000) * 20  # 40-60%
-        
-        # Adjust based on SPU diversity (more SPUs = more fashion)
-        if spu_count > 50:
-            basic_ratio -= 5.0  # More diverse = less basic
-        elif spu_count < 10:
-            basic_ratio += 5.0  # Less diverse = more basic
-        
-        # Ensure valid range
-        basic_ratio = max(30.0, min(90.0, basic_ratio))
-        fashion_ratio = 100.0 - basic_ratio
-        
-        ratio_map[subcategory] = (basic_ratio, fashion_ratio)
-    
-    print(f"✓ Calculated ratios for {len(ratio_map)} subcategories from real sales data")
-    return ratio_map
+    subcat_stats = sales_data.groupby('sub_cate_name').agg(
+        total_qty=('quantity', 'sum'),
+        spu_count=('spu_code', 'nunique')  # Number of unique SPUs
+    ).round(2).fillna(0)
+    total_qty = subcat_stats['total_qty'].to_numpy(dtype=float)
+    spu_count = subcat_stats['spu_count'].to_numpy(dtype=float)
+    
+    # Logic: Higher volume categories are more "basic"
+    # Lower volume, more diverse categories are more "fashion"
+    basic_ratio = np.select(
+        [total_qty > 10000, total_qty > 1000],
+        [75.0 + np.minimum(15.0, total_qty / 50000),   # High volume = basic-heavy (75-90%)
+         60.0 + (total_qty / 10000) * 15],             # Medium volume = balanced (60-75%)
+        default=40.0 + (total_qty / 1000) * 20         # Low volume = fashion-heavy (40-60%)
+    )
+    
+    # Adjust based on SPU diversity (more SPUs = more fashion)
+    basic_ratio = basic_ratio + np.select([spu_count > 50, spu_count < 10], [-5.0, 5.0], default=0.0)
+    
+    # Ensure valid range
+    basic_ratio = np.clip(basic_ratio, 30.0, 90.0)
+    
+    ratio_table = pd.DataFrame({
+        'sub_cate_name': subcat_stats.index,
+        'basic_ratio': basic_ratio,
+        'fashion_ratio': 100.0 - basic_ratio,
+    })
+    print(f"✓ Calculated ratios for {len(ratio_table)} subcategories from real sales data")
+    return ratio_table
+
+def _calculate_subcategory_ratios(sales_data: pd.DataFrame) -> Dict[str, Tuple[float, float]]:
+    """Dictionary view of _calculate_subcategory_ratio_table: subcategory -> (basic_ratio, fashion_ratio)."""
+    ratio_table = _calculate_subcategory_ratio_table(sales_data)
+    return dict(zip(ratio_table['sub_cate_name'],
+                    zip(ratio_table['basic_ratio'].tolist(), ratio_table['fashion_ratio'].tolist())))
 
 def _get_category_based_defaults() -> Dict[str, Tuple[float, float]]:
     """
@@ -313,22 +336,26 @@ def _apply_enhanced_default_ratios(df: pd.DataFrame) -> pd.DataFrame:
     defaults = _get_category_based_defaults()
     df_with_ratios = df.copy()
     
-    for idx, row in df_with_ratios.iterrows():
-        subcategory = row.get('sub_cate_name', 'Unknown')
-        store_code = str(row.get('str_code', ''))
-        
-        # Get base ratios for subcategory
-        basic_ratio, fashion_ratio = defaults.get(subcategory, (65.0, 35.0))
-        
-        # Add store-based variability
-        if store_code:
-            store_hash = hash(store_code) % 100
-            adjustment = (store_hash - 50) * 0.15  # ±7.5% adjustment
-            basic_ratio = max(30.0, min(90.0, basic_ratio + adjustment))
-            fashion_ratio = 100.0 - basic_ratio
-        
-        df_with_ratios.at[idx, 'basic_ratio'] = f"{basic_ratio:.1f}%"
-        df_with_ratios.at[idx, 'fashion_ratio'] = f"{fashion_ratio:.1f}%"
+    # Get base ratios for subcategory
+    if 'sub_cate_name' in df_with_ratios.columns:
+        subcategory = df_with_ratios['sub_cate_name']
+    else:
+        subcategory = pd.Series('Unknown', index=df_with_ratios.index)
+    basic_ratio = subcategory.map({k: v[0] for k, v in defaults.items()}).fillna(65.0).astype(float)
+    fashion_ratio = subcategory.map({k: v[1] for k, v in defaults.items()}).fillna(35.0).astype(float)
+    
+    # Add store-based variability (hash each distinct store once)
+    if 'str_code' in df_with_ratios.columns:
+        store_code = df_with_ratios['str_code'].astype(str)
+        has_store = store_code != ''
+        store_hash = store_code.map({c: hash(c) % 100 for c in pd.unique(store_code)}).astype(float)
+        adjustment = (store_hash - 50) * 0.15  # ±7.5% adjustment
+        adjusted = (basic_ratio + adjustment).clip(lower=30.0, upper=90.0)
+        basic_ratio = basic_ratio.where(~has_store, adjusted)
+        fashion_ratio = fashion_ratio.where(~has_store, 100.0 - adjusted)
+    
+    df_with_ratios['basic_ratio'] = _format_ratio_labels(basic_ratio)
+    df_with_ratios['fashion_ratio'] = _format_ratio_labels(fashion_ratio)
     
     unique_basic = df_with_ratios['basic_ratio'].nunique()
     unique_fashion = df_with_ratios['fashion_ratio'].nunique()
@@ -1160,6 +1187,25 @@ def generate_comprehensive_trend_suggestions(suggestions_df: pd.DataFrame) -> pd
     log_progress(f"Generated comprehensive trend suggestions: {len(comprehensive_df)} records")
     return comprehensive_df
 
+def _parse_ratio_series(values: pd.Series) -> pd.Series:
+    """
+    Convert fashion/basic ratio values to fractions in one vectorized pass.
+    
+    - 'xx.x%' strings become xx.x / 100
+    - numbers (or numeric strings) above 1 are treated as percentages, in [0, 1] as fractions
+    - anything else (unparseable strings, missing values) becomes 0.0
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        nums = values.astype(float)
+        return nums.where(~(nums > 1), nums / 100.0)
+    
+    text = values.astype('string').str.strip()
+    has_pct = text.str.contains('%', regex=False).fillna(False).astype(bool)
+    pct = pd.to_numeric(text.where(has_pct).str.replace('%', '', regex=False), errors='coerce') / 100.0
+    nums = pd.to_numeric(text.where(~has_pct), errors='coerce')
+    nums = nums.where(~(nums > 1), nums / 100.0)
+    return pct.fillna(nums).fillna(0.0).astype(float)
+
 def generate_granular_trend_data(fashion_df: pd.DataFrame) -> pd.DataFrame:
     """
     Generate granular trend data for Step 17 aggregation with proper fashion ratio columns.
@@ -1208,28 +1254,16 @@ def generate_granular_trend_data(fashion_df: pd.DataFrame) -> pd.DataFrame:
     # Start with fashion data as base
     granular_df = fashion_df.copy()
     
-    # Convert fashion ratios from percentage strings to floats
-    def parse_ratio(ratio_str):
-        try:
-            if isinstance(ratio_str, str) and '%' in ratio_str:
-                return float(ratio_str.replace('%', '')) / 100.0
-            elif isinstance(ratio_str, (int, float)):
-                return float(ratio_str) / 100.0 if ratio_str > 1 else float(ratio_str)
-            else:
-                return 0.0
-        except:
-            return 0.0
-    
     # Fix the missing avg_fashion_ratio and avg_basic_ratio columns
     if 'basic_ratio' in granular_df.columns:
-        granular_df['avg_basic_ratio'] = granular_df['basic_ratio'].apply(parse_ratio)
+        granular_df['avg_basic_ratio'] = _parse_ratio_series(granular_df['basic_ratio'])
         log_progress("✓ Converted basic_ratio to avg_basic_ratio (float)")
     else:
         granular_df['avg_basic_ratio'] = 0.65  # Default 65%
         log_progress("⚠ Added default avg_basic_ratio (65%)")
     
     if 'fashion_ratio' in granular_df.columns:
-        granular_df['avg_fashion_ratio'] = granular_df['fashion_ratio'].apply(parse_ratio)
+        granular_df['avg_fashion_ratio'] = _parse_ratio_series(granular_df['fashion_ratio'])
         log_progress("✓ Converted fashion_ratio to avg_fashion_ratio (float)")
     else:
         granular_df['avg_fashion_ratio'] = 0.35  # Default 35%
@@ -1314,12 +1348,9 @@ def generate_granular_trend_data(fashion_df: pd.DataFrame) -> pd.DataFrame:
         '针织防晒衣': (45, 'MID_RANGE'), '休闲衬衣': (35, 'MID_RANGE'), '未维护': (25, 'LOW_RANGE')
     }
     
-    def get_price_info(subcategory):
-        return pd.NA, pd.NA
-    
-    price_info = granular_df['sub_cate_name'].apply(get_price_info)
-    granular_df['unit_price'] = [info[0] for info in price_info]
-    granular_df['dominant_price_tier'] = [info[1] for info in price_info]
+    # Real-data policy: no synthetic price info, leave NA
+    granular_df['unit_price'] = pd.NA
+    granular_df['dominant_price_tier'] = pd.NA
     
     # 3. Regional analysis data - elevation and cluster_size (varies by cluster)
     granular_df['elevation'] = pd.NA
@@ -1382,6 +1413,10 @@ def process_rule_in_chunks(file_path: str, chunk_size: int = 10000) -> pd.DataFr
     Memory-efficient processing of large rule files using chunks.
     Standardizes output format for consolidation.
     
+    Each chunk is reduced into per-store partial sums as soon as it is read, so
+    only the store-level accumulator (and the distinct store/SPU pairs needed for
+    spu_count) is held in memory instead of the whole file.
+    
     Args:
         file_path: Path to the CSV file to process
         chunk_size: Number of rows to process at a time
@@ -1400,54 +1435,44 @@ def process_rule_in_chunks(file_path: str, chunk_size: int = 10000) -> pd.DataFr
         # Extract rule name from file path
         rule_name = os.path.basename(file_path).replace('.csv', '').replace('_opportunities', '').replace('_cases', '').replace('_details', '')
         
-        # Read file in chunks to handle large files
-        chunks = []
-        total_rows = 0
-        
         # Use smaller chunk size in FAST_MODE for quicker processing
         effective_chunk_size = CHUNK_SIZE_SMALL if FAST_MODE else chunk_size
         
+        summary_df = None
+        spu_pairs = None
+        quantity_col = None
+        investment_col = None
+        has_spu = False
+        total_rows = 0
+        
         for chunk in tqdm(pd.read_csv(file_path, chunksize=effective_chunk_size, dtype={'str_code': str}), 
                          desc=f"Processing {os.path.basename(file_path)}"):
-            # Process chunk if needed (filtering, transformations, etc.)
-            chunks.append(chunk)
+            if total_rows == 0:
+                # Standardize columns for consolidation - Map actual columns to expected ones
+                # Handle different column names across rule files
+                for col in ('total_quantity_needed', 'total_adjustment_needed', 'recommended_quantity_change'):
+                    if col in chunk.columns:
+                        quantity_col = col
+                        break
+                for col in ('total_investment_required', 'investment_required', 'total_investment'):
+                    if col in chunk.columns:
+                        investment_col = col
+                        break
+                has_spu = 'spu_code' in chunk.columns
             total_rows += len(chunk)
-        
-        if chunks:
-            # Combine all chunks
-            result_df = pd.concat(chunks, ignore_index=True)
-            log_progress(f"✓ Processed {total_rows:,} rows from {os.path.basename(file_path)}")
-            
-            # Standardize columns for consolidation - Map actual columns to expected ones
-            # Handle different column names across rule files
-            quantity_col = None
-            investment_col = None
-            
-            # Check for quantity columns
-            if 'total_quantity_needed' in result_df.columns:
-                quantity_col = 'total_quantity_needed'
-            elif 'total_adjustment_needed' in result_df.columns:
-                quantity_col = 'total_adjustment_needed'
-            elif 'recommended_quantity_change' in result_df.columns:
-                quantity_col = 'recommended_quantity_change'
             
-            # Check for investment columns
-            if 'total_investment_required' in result_df.columns:
-                investment_col = 'total_investment_required'
-            elif 'investment_required' in result_df.columns:
-                investment_col = 'investment_required'
-            elif 'total_investment' in result_df.columns:
-                investment_col = 'total_investment'
+            # Reduce the chunk to per-store partial sums
+            value_cols = [c for c in (quantity_col, investment_col) if c]
+            partial = chunk.groupby('str_code')[value_cols].sum() if value_cols else chunk.groupby('str_code').size().to_frame('_rows')[[]]
+            summary_df = partial if summary_df is None else summary_df.add(partial, fill_value=0)
             
-            # Create aggregation based on available columns
-            agg_dict = {}
-            if quantity_col:
-                agg_dict[quantity_col] = 'sum'
-            if investment_col:
-                agg_dict[investment_col] = 'sum'
-            
-            # Always count stores
-            summary_df = result_df.groupby('str_code').agg(agg_dict).reset_index()
+            if has_spu:
+                pairs = chunk[['str_code', 'spu_code']].drop_duplicates()
+                spu_pairs = pairs if spu_pairs is None else pd.concat([spu_pairs, pairs], ignore_index=True).drop_duplicates()
+        
+        if summary_df is not None:
+            log_progress(f"✓ Processed {total_rows:,} rows from {os.path.basename(file_path)}")
+            summary_df = summary_df.reset_index()
             
             # Rename columns to match consolidation expectations
             column_mapping = {'str_code': 'str_code'}
@@ -1460,9 +1485,9 @@ def process_rule_in_chunks(file_path: str, chunk_size: int = 10000) -> pd.DataFr
             
             # Add spu_count column if not present
             # Do not fabricate counts; leave NA unless present upstream
-            if 'spu_code' in result_df.columns:
+            if spu_pairs is not None:
                 # If chunk has SPU rows, count unique SPUs per store
-                spu_counts = result_df.groupby('str_code')['spu_code'].nunique().reindex(summary_df['str_code']).fillna(0).astype(int).values
+                spu_counts = spu_pairs.groupby('str_code')['spu_code'].nunique().reindex(summary_df['str_code']).fillna(0).astype(int).values
                 summary_df['spu_count'] = spu_counts
             else:
                 summary_df['spu_count'] = pd.NA
@@ -1478,7 +1503,7 @@ def process_rule_in_chunks(file_path: str, chunk_size: int = 10000) -> pd.DataFr
             log_progress(f"✓ Summarized to {len(summary_df):,} stores for {rule_name}")
             
             # Memory cleanup
-            del chunks, result_df
+            del spu_pairs
             gc.collect()
             
             return summary_df
@@ -1490,6 +1515,413 @@ def process_rule_in_chunks(file_path: str, chunk_size: int = 10000) -> pd.DataFr
         log_progress(f"Error processing {file_path}: {str(e)}")
         return pd.DataFrame()
 
+def _standardize_rule_frame(rule_df: pd.DataFrame, rule_name: str, cluster_mapping: Dict[str, Any],
+                            verbose: bool = True) -> pd.DataFrame:
+    """
+    Standardize one rule's detail rows (or one chunk of them) to the consolidation schema.
+
+    Args:
+        rule_df: Raw rule rows as read from the Step 7-12 output
+        rule_name: Rule key used as rule_source (e.g. 'rule7')
+        cluster_mapping: str_code -> Cluster fallback when the rule has no cluster_id
+        verbose: Log column repairs (disabled after the first chunk in streaming mode)
+
+    Returns:
+        pd.DataFrame: SPU-level recommendations with standardized columns
+    """
+    # Ensure we have the required columns
+    required_cols = ['str_code', 'spu_code', 'sub_cate_name', 'recommended_quantity_change']
+    missing_cols = [col for col in required_cols if col not in rule_df.columns]
+
+    if missing_cols:
+        if verbose:
+            log_progress(f"   ⚠️ {rule_name}: Missing columns {missing_cols}, attempting to fix...")
+
+        # Try to fix missing columns
+        if 'sub_cate_name' not in rule_df.columns:
+            # Try to get subcategory from other sources
+            if 'category_key' in rule_df.columns:
+                rule_df['sub_cate_name'] = rule_df['category_key']
+            else:
+                rule_df['sub_cate_name'] = pd.NA
+                if verbose:
+                    log_progress(f"   ⚠️ {rule_name}: 'sub_cate_name' missing; leaving as NA")
+
+        if 'recommended_quantity_change' not in rule_df.columns:
+            # Look for alternative quantity columns
+            qty_cols = [col for col in rule_df.columns if 'quantity' in col.lower() and 'change' in col.lower()]
+            if qty_cols:
+                rule_df['recommended_quantity_change'] = rule_df[qty_cols[0]]
+            else:
+                rule_df['recommended_quantity_change'] = pd.NA
+                if verbose:
+                    log_progress(f"   ⚠️ {rule_name}: 'recommended_quantity_change' missing; leaving as NA")
+
+    # Add rule source and cluster info
+    rule_df['rule_source'] = rule_name
+
+    # Preserve cluster_id from rule file if it exists (Steps 7-12 already assign it)
+    # Only map from clustering file if cluster_id is missing
+    if 'cluster_id' in rule_df.columns:
+        # Rule file already has cluster_id - use it and create cluster for compatibility
+        rule_df['cluster'] = rule_df['cluster_id']
+    else:
+        # No cluster_id in rule file - map from clustering and create both columns
+        rule_df['cluster'] = rule_df['str_code'].map(cluster_mapping)
+        rule_df['cluster_id'] = rule_df['cluster']
+
+    # Select and standardize columns
+    standard_cols = {
+        'str_code': 'str_code',
+        'spu_code': 'spu_code', 
+        'sub_cate_name': 'sub_cate_name',
+        'recommended_quantity_change': 'recommended_quantity_change',
+        'rule_source': 'rule_source',
+        'cluster': 'cluster'
+    }
+
+    # Add cluster_id if it exists in rule data
+    if 'cluster_id' in rule_df.columns:
+        standard_cols['cluster_id'] = 'cluster_id'
+
+    # Add optional columns if they exist
+    optional_cols = {
+        'current_quantity': 'current_quantity',
+        'investment_required': 'investment_required',
+        'unit_price': 'unit_price',
+        'opportunity_score': 'opportunity_score',
+        'business_rationale': 'business_rationale'
+    }
+
+    for old_col, new_col in optional_cols.items():
+        if old_col in rule_df.columns:
+            standard_cols[old_col] = new_col
+
+    # Create standardized dataframe
+    detailed_recs = rule_df[list(standard_cols.keys())].copy()
+    detailed_recs.columns = list(standard_cols.values())
+
+    # Fill missing investment_required if not present
+    if 'investment_required' not in detailed_recs.columns:
+        if 'unit_price' in detailed_recs.columns:
+            detailed_recs['investment_required'] = (detailed_recs['recommended_quantity_change'] * 
+                                                   detailed_recs['unit_price'])
+        else:
+            detailed_recs['investment_required'] = pd.NA
+    
+    return detailed_recs
+
+CLUSTER_AGG_COLUMNS = ['cluster', 'subcategory', 'stores_affected', 'unique_spus',
+                       'total_quantity_change', 'total_investment']
+
+
+def _aggregate_cluster_subcategories(detailed: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cluster-subcategory totals of the (non-negative filtered) SPU-level detail rows.
+
+    Args:
+        detailed: Standardized detail rows with cluster_id (or cluster) and sub_cate_name
+
+    Returns:
+        pd.DataFrame: One row per cluster and subcategory with CLUSTER_AGG_COLUMNS
+    """
+    cluster_col = 'cluster_id' if 'cluster_id' in detailed.columns else 'cluster'
+    frame = pd.DataFrame({
+        'cluster': detailed[cluster_col],
+        'subcategory': detailed['sub_cate_name'],
+        'str_code': detailed['str_code'],
+        'spu_code': detailed['spu_code'],
+        'total_quantity_change': pd.to_numeric(detailed['recommended_quantity_change'], errors='coerce'),
+        'total_investment': pd.to_numeric(detailed['investment_required'], errors='coerce').fillna(0),
+    })
+    return (
+        frame.groupby(['cluster', 'subcategory'])
+        .agg(stores_affected=('str_code', 'nunique'), unique_spus=('spu_code', 'nunique'),
+             total_quantity_change=('total_quantity_change', 'sum'),
+             total_investment=('total_investment', 'sum'))
+        .reset_index()[CLUSTER_AGG_COLUMNS]
+    )
+
+# ===== STREAMING CONSOLIDATION =====
+# Fixed detail schema so every chunk (from every rule) lands in one CSV with one header
+STREAM_DETAIL_NUMERIC_COLS = ['recommended_quantity_change', 'cluster', 'cluster_id', 'current_quantity',
+                              'investment_required', 'unit_price', 'opportunity_score']
+STREAM_DETAIL_COLUMNS = ['str_code', 'spu_code', 'sub_cate_name', 'recommended_quantity_change', 'rule_source',
+                         'cluster', 'cluster_id', 'current_quantity', 'investment_required', 'unit_price',
+                         'opportunity_score', 'business_rationale']
+
+
+class _StreamingDetailWriter:
+    """Append-only CSV writer for SPU-level detail rows (same artifact and symlinks as the in-memory path)."""
+
+    def __init__(self, base_path: str, period_label: str, extra_columns: Dict[str, str]):
+        self.base_path = base_path
+        self.period_label = period_label
+        self.extra_columns = extra_columns
+        self.file_extension = ".csv"
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = f"{base_path}_{period_label}_{timestamp}{self.file_extension}"
+        self.rows_written = 0
+        os.makedirs(os.path.dirname(base_path) or ".", exist_ok=True)
+
+    def _conform(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Fixed column order: the header is written once, by the first chunk
+        out = df.reindex(columns=STREAM_DETAIL_COLUMNS)
+        for col in STREAM_DETAIL_NUMERIC_COLS:
+            out[col] = pd.to_numeric(out[col], errors='coerce')
+        for col, value in self.extra_columns.items():
+            out[col] = value
+        return out
+
+    def write(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        out = self._conform(df)
+        out.to_csv(self.path, mode='a', header=self.rows_written == 0, index=False)
+        self.rows_written += len(out)
+
+    def close(self) -> str:
+        """Point the period-labeled/generic symlinks at the file ('' when nothing was written)."""
+        if self.rows_written == 0:
+            return ""
+        link_output_with_symlinks(self.path, self.base_path, self.period_label, self.file_extension)
+        return self.path
+
+
+class _StreamingRuleReducer:
+    """
+    Reduce standardized rule chunks into store and cluster-subcategory accumulators.
+
+    Mirrors the in-memory path: first occurrence of (str_code, spu_code) wins across
+    rules, store totals count adds only, and the cluster-subcategory totals are
+    computed after the non-negative filter. Duplicate detection keeps a sorted array
+    of 64-bit key hashes, so memory grows by 8 bytes per distinct key rather than by
+    the full row width. The stores_affected/unique_spus counts keep the distinct
+    (cluster, subcategory, store) and (cluster, subcategory, SPU) pairs, which are
+    bounded by the group count times the store or SPU count, not by the row count.
+    """
+
+    def __init__(self):
+        self._seen = np.empty(0, dtype=np.uint64)
+        self._store_parts: List[pd.DataFrame] = []
+        self._cluster_parts: List[pd.DataFrame] = []
+        self._pair_parts: Dict[str, List[pd.DataFrame]] = {'str_code': [], 'spu_code': []}
+        self.store_acc = pd.DataFrame()
+        self.cluster_acc = pd.DataFrame()
+        self.pair_acc: Dict[str, pd.DataFrame] = {'str_code': pd.DataFrame(), 'spu_code': pd.DataFrame()}
+        self.rows_in = 0
+        self.duplicates_removed = 0
+        self.negatives_removed = 0
+
+    def _drop_seen(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        keys = pd.util.hash_pandas_object(
+            chunk[['str_code', 'spu_code']].astype(str), index=False
+        ).to_numpy()
+        fresh = ~pd.Series(keys).duplicated().to_numpy() & ~np.isin(keys, self._seen, assume_unique=False)
+        self._seen = np.union1d(self._seen, keys[fresh])
+        self.duplicates_removed += int((~fresh).sum())
+        return chunk.loc[fresh]
+
+    def _fold(self, parts: List[pd.DataFrame], acc: pd.DataFrame) -> pd.DataFrame:
+        # Fold pending partials once they pile up so the accumulator stays O(groups)
+        combined = pd.concat([acc] + parts) if not acc.empty else pd.concat(parts)
+        return combined.groupby(level=list(range(combined.index.nlevels))).sum()
+
+    def _fold_pairs(self, col: str) -> None:
+        parts = self._pair_parts[col]
+        if parts:
+            acc = self.pair_acc[col]
+            combined = pd.concat([acc] + parts) if not acc.empty else pd.concat(parts)
+            self.pair_acc[col] = combined.drop_duplicates(ignore_index=True)
+            self._pair_parts[col] = []
+
+    def update(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Reduce one standardized chunk; returns the rows that survive for the detail output."""
+        self.rows_in += len(chunk)
+        chunk = self._drop_seen(chunk)
+        if chunk.empty:
+            return chunk
+
+        qty = pd.to_numeric(chunk['recommended_quantity_change'], errors='coerce')
+        investment = pd.to_numeric(chunk['investment_required'], errors='coerce').fillna(0.0)
+        store_frame = pd.DataFrame({
+            'str_code': chunk['str_code'].astype(str),
+            'rule_source': chunk['rule_source'],
+            'total_quantity_change': qty.fillna(0).clip(lower=0),
+            'total_investment': investment,
+            'affected_spus': chunk['spu_code'].notna().astype('int64'),
+        })
+        if 'current_quantity' in chunk.columns:
+            store_frame['total_current_quantity'] = pd.to_numeric(chunk['current_quantity'], errors='coerce').fillna(0)
+        self._store_parts.append(store_frame.groupby(['str_code', 'rule_source']).sum())
+
+        keep = qty.fillna(0) >= 0
+        self.negatives_removed += int((~keep).sum())
+        chunk = chunk.loc[keep]
+
+        cluster_col = 'cluster_id' if 'cluster_id' in chunk.columns else 'cluster'
+        cluster_frame = pd.DataFrame({
+            'cluster': chunk[cluster_col],
+            'subcategory': chunk['sub_cate_name'],
+            'total_quantity_change': qty.loc[keep],
+            'total_investment': investment.loc[keep],
+        })
+        self._cluster_parts.append(cluster_frame.groupby(['cluster', 'subcategory']).sum())
+        for col in self._pair_parts:
+            pairs = pd.DataFrame({'cluster': chunk[cluster_col], 'subcategory': chunk['sub_cate_name'],
+                                  col: chunk[col]})
+            self._pair_parts[col].append(pairs.dropna().drop_duplicates())
+
+        if len(self._store_parts) >= 16:
+            self.store_acc = self._fold(self._store_parts, self.store_acc)
+            self._store_parts = []
+        if len(self._cluster_parts) >= 16:
+            self.cluster_acc = self._fold(self._cluster_parts, self.cluster_acc)
+            self._cluster_parts = []
+            for col in self._pair_parts:
+                self._fold_pairs(col)
+        return chunk
+
+    def results(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Return (store_agg, cluster_agg); cluster_agg has the CLUSTER_AGG_COLUMNS of the in-memory path."""
+        if self._store_parts:
+            self.store_acc = self._fold(self._store_parts, self.store_acc)
+            self._store_parts = []
+        if self._cluster_parts:
+            self.cluster_acc = self._fold(self._cluster_parts, self.cluster_acc)
+            self._cluster_parts = []
+        for col in self._pair_parts:
+            self._fold_pairs(col)
+        store_agg = self.store_acc.reset_index() if not self.store_acc.empty else pd.DataFrame(
+            columns=['str_code', 'rule_source', 'total_quantity_change', 'total_investment', 'affected_spus'])
+        if 'affected_spus' in store_agg.columns:
+            store_agg['affected_spus'] = store_agg['affected_spus'].astype('int64')
+        if self.cluster_acc.empty:
+            return store_agg, pd.DataFrame(columns=CLUSTER_AGG_COLUMNS)
+        cluster_agg = self.cluster_acc
+        for col, name in (('str_code', 'stores_affected'), ('spu_code', 'unique_spus')):
+            pairs = self.pair_acc[col]
+            counts = pairs.groupby(['cluster', 'subcategory']).size() if not pairs.empty else pd.Series(dtype='int64')
+            cluster_agg[name] = counts.reindex(cluster_agg.index, fill_value=0).astype('int64')
+        return store_agg, cluster_agg.reset_index()[CLUSTER_AGG_COLUMNS]
+
+
+def consolidate_rules_streaming(rule_files: Dict[str, str], cluster_mapping: Dict[str, Any],
+                                period_label: str, yyyymm: str, period: Any,
+                                chunk_size: Optional[int] = None,
+                                detail_base: str = "output/consolidated_spu_rule_results_detailed") -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+    """
+    Single-pass, bounded-memory consolidation of the Step 7-12 rule detail files.
+
+    Each rule file is read chunk by chunk, standardized, de-duplicated against the
+    keys already seen, reduced into the store and cluster-subcategory accumulators
+    and appended straight to the detail CSV. No full frame is ever built.
+
+    The whole-frame corrections of apply_data_quality_corrections (no-sales
+    enforcement, share alignment, zero-add store removal) are not applied here;
+    use the default in-memory mode when those are required.
+
+    Args:
+        rule_files: Mapping of rule name to detail file path
+        cluster_mapping: str_code -> Cluster fallback for rules without cluster_id
+        period_label: Period label used for the detail file name and metadata columns
+        yyyymm: Target YYYYMM embedded in outputs
+        period: Target period ('A', 'B' or None)
+        chunk_size: Rows per chunk (defaults to STREAM_CHUNK_SIZE)
+        detail_base: Base path of the detail output (timestamp and extension appended)
+
+    Returns:
+        Tuple of (store_agg, cluster_agg, stats)
+    """
+    chunk_size = int(chunk_size or STREAM_CHUNK_SIZE)
+    extra_columns = {
+        'period_label': str(period_label),
+        'target_yyyymm': str(yyyymm),
+        'target_period': None if period in (None, "", "full") else str(period),
+    }
+    writer = _StreamingDetailWriter(detail_base, period_label, extra_columns)
+    reducer = _StreamingRuleReducer()
+    rule_rows: Dict[str, int] = {}
+
+    for rule_name, file_path in rule_files.items():
+        if not file_path or not os.path.exists(file_path):
+            log_progress(f"⚠️ {rule_name}: File not found")
+            continue
+        log_progress(f"Streaming {rule_name}: {os.path.getsize(file_path) / (1024*1024):.1f}MB in chunks of {chunk_size:,}")
+        written_before = writer.rows_written
+        try:
+            reader = pd.read_csv(file_path, chunksize=chunk_size, dtype={'str_code': str, 'spu_code': str})
+            for i, chunk in enumerate(reader):
+                detailed = _standardize_rule_frame(chunk, rule_name, cluster_mapping, verbose=(i == 0))
+                writer.write(reducer.update(detailed))
+        except Exception as e:
+            log_progress(f"   ❌ {rule_name}: Error processing - {str(e)}")
+            continue
+        rule_rows[rule_name] = writer.rows_written - written_before
+        log_progress(f"   ✅ {rule_name}: {rule_rows[rule_name]:,} SPU-level recommendations streamed")
+
+    detail_file = writer.close()
+    store_agg, cluster_agg = reducer.results()
+    stats = {
+        'detail_file': detail_file,
+        'rows_read': reducer.rows_in,
+        'rows_written': writer.rows_written,
+        'duplicates_removed': reducer.duplicates_removed,
+        'negatives_removed': reducer.negatives_removed,
+        'rule_rows': rule_rows,
+    }
+    log_progress(f"✓ Streamed {stats['rows_read']:,} rule rows → {stats['rows_written']:,} detail rows "
+                 f"({stats['duplicates_removed']:,} duplicates, {stats['negatives_removed']:,} negative adds dropped)")
+    return store_agg, cluster_agg, stats
+
+
+def _run_streaming_consolidation(rule_files: Dict[str, str], cluster_mapping: Dict[str, Any],
+                                 period_label: str, yyyymm: str, period: Any, start_time: datetime) -> None:
+    """Write Step 13 outputs from the streaming reducer (STREAMING_MODE)."""
+    log_progress("🌊 STREAMING_MODE: single-pass chunked consolidation (full-frame corrections skipped)")
+    store_agg, cluster_agg, stats = consolidate_rules_streaming(
+        rule_files, cluster_mapping, period_label, yyyymm, period
+    )
+    if stats['rows_written'] == 0:
+        log_progress("❌ No detailed recommendations found - check rule files")
+        return
+
+    detail_file = stats['detail_file']
+    try:
+        from src.pipeline_manifest import register_step_output
+        metadata = {
+            "records": int(stats['rows_written']),
+            "columns": STREAM_DETAIL_COLUMNS + ['period_label', 'target_yyyymm', 'target_period'],
+            "target_year": int(yyyymm[:4]),
+            "target_month": int(yyyymm[4:6]),
+            "target_period": period
+        }
+        register_step_output("step13", "consolidated_rules", detail_file, metadata)
+        register_step_output("step13", f"consolidated_rules_{period_label}", detail_file, metadata)
+        log_progress("✅ Registered consolidated_rules in pipeline manifest")
+    except Exception as e:
+        log_progress(f"⚠️ Manifest registration failed for consolidated_rules: {e}")
+
+    store_agg_with_period = _embed_period_metadata_columns(store_agg, period_label, yyyymm, period)
+    store_agg_with_period.to_csv(OUTPUT_FILE, index=False)
+    log_progress(f"✅ Saved store-level summary to {OUTPUT_FILE}")
+
+    cluster_output_file = "output/consolidated_cluster_subcategory_results.csv"
+    cluster_agg_with_period = _embed_period_metadata_columns(cluster_agg, period_label, yyyymm, period)
+    cluster_agg_with_period.to_csv(cluster_output_file, index=False)
+    log_progress(f"✅ Saved cluster-subcategory aggregation to {cluster_output_file}")
+
+    if ENABLE_TREND_UTILS:
+        log_progress("⚠️ Trend utilities need the in-memory consolidated frame; skipped in STREAMING_MODE")
+
+    duration = (datetime.now() - start_time).total_seconds()
+    log_progress(f"\n📈 STREAMING SUMMARY:")
+    log_progress(f"✓ Detail file: {detail_file} ({stats['rows_written']:,} rows)")
+    log_progress(f"✓ Stores: {store_agg['str_code'].nunique():,}")
+    log_progress(f"✓ Total quantity changes: {store_agg['total_quantity_change'].sum():,.1f} units")
+    log_progress(f"✓ Total investment required: {CURRENCY_SYMBOL}{store_agg['total_investment'].sum():,.0f} {CURRENCY_LABEL}")
+    log_progress(f"Process completed in {duration:.2f} seconds")
+
 def main():
     """Main execution function with SPU-level detail preservation"""
     start_time = datetime.now()
@@ -1505,6 +1937,8 @@ def main():
     parser.add_argument("--full-mode", dest="full_mode", action="store_true", help="Force FULL mode (disable FAST)")
     parser.add_argument("--trend-sample-size", dest="trend_sample_size", type=int, help="Override trend sample size when FAST mode enabled")
     parser.add_argument("--chunk-size", dest="chunk_size_small", type=int, help="Override small chunk size for CSV processing")
+    parser.add_argument("--streaming", dest="streaming", action="store_true", help="Single-pass chunked consolidation with bounded memory (skips full-frame corrections)")
+    parser.add_argument("--stream-chunk-size", dest="stream_chunk_size", type=int, help="Rows per chunk in streaming mode")
     args, _ = parser.parse_known_args()
     if args.target_yyyymm or args.target_period is not None:
         yyyymm = args.target_yyyymm or get_current_period()[0]
@@ -1517,7 +1951,7 @@ def main():
     log_progress(f"[CONFIG] Step 13 configured for period: {period_label}")
     
     # Apply runtime toggles
-    global ENABLE_TREND_UTILS, FAST_MODE, TREND_SAMPLE_SIZE, CHUNK_SIZE_SMALL
+    global ENABLE_TREND_UTILS, FAST_MODE, TREND_SAMPLE_SIZE, CHUNK_SIZE_SMALL, STREAMING_MODE, STREAM_CHUNK_SIZE
     if getattr(args, 'enable_trend_utils', False):
         ENABLE_TREND_UTILS = True
         log_progress("Trend utilities ENABLED (real-data only; gaps remain NA)")
@@ -1532,6 +1966,10 @@ def main():
         TREND_SAMPLE_SIZE = int(args.trend_sample_size)
     if getattr(args, 'chunk_size_small', None) is not None:
         CHUNK_SIZE_SMALL = int(args.chunk_size_small)
+    if getattr(args, 'streaming', False):
+        STREAMING_MODE = True
+    if getattr(args, 'stream_chunk_size', None) is not None:
+        STREAM_CHUNK_SIZE = int(args.stream_chunk_size)
 
     # Performance mode notification
     if FAST_MODE:
@@ -1666,6 +2104,10 @@ def main():
         else:
             log_progress("⚠️ Cluster file not found, proceeding without cluster info")
         
+        if STREAMING_MODE:
+            _run_streaming_consolidation(rule_files, cluster_mapping, period_label, yyyymm, period, start_time)
+            return
+        
         # NEW APPROACH: Consolidate at SPU level, not store level
         all_detailed_recommendations = []
         
@@ -1679,82 +2121,7 @@ def main():
                     # Load the detailed rule results
                     rule_df = pd.read_csv(file_path, dtype={'str_code': str})
                     
-                    # Ensure we have the required columns
-                    required_cols = ['str_code', 'spu_code', 'sub_cate_name', 'recommended_quantity_change']
-                    missing_cols = [col for col in required_cols if col not in rule_df.columns]
-                    
-                    if missing_cols:
-                        log_progress(f"   ⚠️ {rule_name}: Missing columns {missing_cols}, attempting to fix...")
-                        
-                        # Try to fix missing columns
-                        if 'sub_cate_name' not in rule_df.columns:
-                            # Try to get subcategory from other sources
-                            if 'category_key' in rule_df.columns:
-                                rule_df['sub_cate_name'] = rule_df['category_key']
-                            else:
-                                rule_df['sub_cate_name'] = pd.NA
-                                log_progress(f"   ⚠️ {rule_name}: 'sub_cate_name' missing; leaving as NA")
-                        
-                        if 'recommended_quantity_change' not in rule_df.columns:
-                            # Look for alternative quantity columns
-                            qty_cols = [col for col in rule_df.columns if 'quantity' in col.lower() and 'change' in col.lower()]
-                            if qty_cols:
-                                rule_df['recommended_quantity_change'] = rule_df[qty_cols[0]]
-                            else:
-                                rule_df['recommended_quantity_change'] = pd.NA
-                                log_progress(f"   ⚠️ {rule_name}: 'recommended_quantity_change' missing; leaving as NA")
-                    
-                    # Add rule source and cluster info
-                    rule_df['rule_source'] = rule_name
-                    
-                    # Preserve cluster_id from rule file if it exists (Steps 7-12 already assign it)
-                    # Only map from clustering file if cluster_id is missing
-                    if 'cluster_id' in rule_df.columns:
-                        # Rule file already has cluster_id - use it and create cluster for compatibility
-                        rule_df['cluster'] = rule_df['cluster_id']
-                    else:
-                        # No cluster_id in rule file - map from clustering and create both columns
-                        rule_df['cluster'] = rule_df['str_code'].map(cluster_mapping)
-                        rule_df['cluster_id'] = rule_df['cluster']
-                    
-                    # Select and standardize columns
-                    standard_cols = {
-                        'str_code': 'str_code',
-                        'spu_code': 'spu_code', 
-                        'sub_cate_name': 'sub_cate_name',
-                        'recommended_quantity_change': 'recommended_quantity_change',
-                        'rule_source': 'rule_source',
-                        'cluster': 'cluster'
-                    }
-                    
-                    # Add cluster_id if it exists in rule data
-                    if 'cluster_id' in rule_df.columns:
-                        standard_cols['cluster_id'] = 'cluster_id'
-                    
-                    # Add optional columns if they exist
-                    optional_cols = {
-                        'current_quantity': 'current_quantity',
-                        'investment_required': 'investment_required',
-                        'unit_price': 'unit_price',
-                        'opportunity_score': 'opportunity_score',
-                        'business_rationale': 'business_rationale'
-                    }
-                    
-                    for old_col, new_col in optional_cols.items():
-                        if old_col in rule_df.columns:
-                            standard_cols[old_col] = new_col
-                    
-                    # Create standardized dataframe
-                    detailed_recs = rule_df[list(standard_cols.keys())].copy()
-                    detailed_recs.columns = list(standard_cols.values())
-                    
-                    # Fill missing investment_required if not present
-                    if 'investment_required' not in detailed_recs.columns:
-                        if 'unit_price' in detailed_recs.columns:
-                            detailed_recs['investment_required'] = (detailed_recs['recommended_quantity_change'] * 
-                                                                   detailed_recs['unit_price'])
-                        else:
-                            detailed_recs['investment_required'] = pd.NA
+                    detailed_recs = _standardize_rule_frame(rule_df, rule_name, cluster_mapping)
                     
                     all_detailed_recommendations.append(detailed_recs)
                     log_progress(f"   ✅ {rule_name}: {len(detailed_recs):,} SPU-level recommendations preserved")
@@ -1831,22 +2198,7 @@ def main():
                         consolidated_detailed['investment_required'], errors='coerce'
                     ).fillna(0)
 
-                    # Use the correct cluster column name
-                    cluster_col = 'cluster_id' if 'cluster_id' in consolidated_detailed.columns else 'cluster'
-                    cluster_agg_filtered = (
-                        consolidated_detailed
-                        .groupby([cluster_col, 'sub_cate_name'], as_index=False)
-                        .agg({
-                            'recommended_quantity_change': 'sum',
-                            'investment_required': 'sum'
-                        })
-                        .rename(columns={
-                            cluster_col: 'cluster',
-                            'sub_cate_name': 'subcategory',
-                            'recommended_quantity_change': 'total_quantity_change',
-                            'investment_required': 'total_investment'
-                        })
-                    )
+                    cluster_agg_filtered = _aggregate_cluster_subcategories(consolidated_detailed)
                     cluster_agg_with_period = _embed_period_metadata_columns(cluster_agg_filtered, period_label, yyyymm, period)
                     cluster_agg_with_period.to_csv(cluster_output_file, index=False)
                     log_progress(f"✅ Saved cluster-subcategory aggregation to {cluster_output_file} (post-filter recompute)")
@@ -1936,9 +2288,7 @@ def main():
             log_progress(f"Process completed in {duration:.2f} seconds")
             
             log_progress("\n📊 OUTPUT FILES GENERATED:")
-            if os.path.exists(OUTPUT_FILE):
-                consolidated_df = pd.read_csv(OUTPUT_FILE)
-                log_progress(f"✓ Consolidated results: {OUTPUT_FILE} ({len(consolidated_df):,} stores)")
+            log_progress(f"✓ Consolidated results: {OUTPUT_FILE} ({len(store_agg_with_period):,} stores)")
             
             log_progress("\n🎯 BUSINESS IMPACT:")
             log_progress("✓ Memory-efficient processing preserved")
@@ -1950,8 +2300,9 @@ def main():
             log_progress("✓ Multiple output formats for different use cases")
             
             # Performance summary
-            if os.path.exists(OUTPUT_FILE):
-                final_consolidation = pd.read_csv(OUTPUT_FILE)
+            # Summarize from the in-memory store aggregation instead of re-reading OUTPUT_FILE
+            final_consolidation = store_agg_with_period
+            if not final_consolidation.empty:
                 stores_with_recs = (final_consolidation['total_quantity_change'] > 0).sum()
                 log_progress(f"\n📈 PERFORMANCE SUMMARY:")
                 log_progress(f"✓ Total stores processed: {len(final_consolidation):,}")
@@ -56,9 +56,9 @@ import argparse
 from typing import Dict, List, Tuple, Optional
 from pipeline_manifest import get_manifest, register_step_output
 from config import get_api_data_files
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.formatting.rule import ColorScaleRule, CellIsRule
+from openpyxl.styles import PatternFill
+from openpyxl.formatting.rule import CellIsRule
+from excel_export import StreamingWorkbook, CellStyle, ConditionalFormat, fit_column_widths
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -721,53 +721,31 @@ def build_segment_summary(segment_df: pd.DataFrame) -> pd.DataFrame:
     seg = seg.sort_values('Segment')
     return seg
 
-def _polish_excel_sheet(ws):
-    """Apply common polish to a worksheet: freeze panes, header style, autofilter, column widths, number formats, conditional formatting."""
-    if ws.max_row >= 2:
-        ws.freeze_panes = 'A2'
-    # Header style
-    header_font = Font(bold=True)
-    header_fill = PatternFill(start_color="FFEFEFEF", end_color="FFEFEFEF", fill_type="solid")
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(vertical="center")
-    # AutoFilter
-    ws.auto_filter.ref = ws.dimensions
-    # Auto width (cap width)
-    for col_idx in range(1, ws.max_column + 1):
-        col_letter = get_column_letter(col_idx)
-        max_len = 0
-        for row_idx in range(1, min(ws.max_row, 200) + 1):
-            val = ws.cell(row=row_idx, column=col_idx).value
-            val_str = str(val) if val is not None else ""
-            max_len = max(max_len, len(val_str))
-        ws.column_dimensions[col_letter].width = max(10, min(max_len + 2, 40))
-    # Number formats and conditional formatting on change columns
-    header_map = {cell.value: idx + 1 for idx, cell in enumerate(ws[1])}
-    for name, col_idx in header_map.items():
+def _excel_sheet_format(df: pd.DataFrame) -> Dict:
+    """Common sheet polish declared up front: frozen and filtered header, capped column widths, number formats, change colouring."""
+    column_styles = {}
+    change_columns = []
+    for name in df.columns:
         name_str = str(name) if name is not None else ""
         name_lower = name_str.lower()
-        col_letter = get_column_letter(col_idx)
-        data_range = f"{col_letter}2:{col_letter}{ws.max_row}"
-        if any(token in name_lower for token in ["sales", "amount", "revenue"]):
-            for r in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=col_idx, max_col=col_idx):
-                for cell in r:
-                    cell.number_format = '#,##0'
-        if any(token in name_lower for token in ["quantity", "count", "stores"]):
-            for r in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=col_idx, max_col=col_idx):
-                for cell in r:
-                    cell.number_format = '#,##0'
+        if any(token in name_lower for token in ["sales", "amount", "revenue", "quantity", "count", "stores"]):
+            column_styles[name] = CellStyle(number_format='#,##0')
         if name_lower.endswith('_pct') or 'pct' in name_lower or name_str.endswith('%'):
-            for r in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=col_idx, max_col=col_idx):
-                for cell in r:
-                    cell.number_format = '0.0'
+            column_styles[name] = CellStyle(number_format='0.0')
         if 'change' in name_lower:
-            try:
-                ws.conditional_formatting.add(data_range, CellIsRule(operator='lessThan', formula=['0'], fill=PatternFill(start_color='FFFFC7CE', end_color='FFFFC7CE', fill_type='solid')))
-                ws.conditional_formatting.add(data_range, CellIsRule(operator='greaterThan', formula=['0'], fill=PatternFill(start_color='FFC6EFCE', end_color='FFC6EFCE', fill_type='solid')))
-            except Exception:
-                pass
+            change_columns.append(name)
+    return {
+        'header_style': CellStyle(bold=True, fill="FFEFEFEF", vertical="center"),
+        'column_styles': column_styles,
+        # Widths from the header plus the first 199 data rows, clamped to 10..40
+        'column_widths': fit_column_widths(df, min_width=10, max_width=40, sample_rows=199),
+        'freeze_header': True,
+        'autofilter': True,
+        'conditional_formats': [
+            ConditionalFormat(change_columns, CellIsRule(operator='lessThan', formula=['0'], fill=PatternFill(start_color='FFFFC7CE', end_color='FFFFC7CE', fill_type='solid'))),
+            ConditionalFormat(change_columns, CellIsRule(operator='greaterThan', formula=['0'], fill=PatternFill(start_color='FFC6EFCE', end_color='FFC6EFCE', fill_type='solid'))),
+        ],
+    }
 
 
 def save_excel_analysis(
@@ -789,26 +767,25 @@ def save_excel_analysis(
 
     logger.info(f"Saving Excel analysis to: {timestamped_excel_file}")
 
-    # Save timestamped version (for backup/inspection)
-    with pd.ExcelWriter(timestamped_excel_file, engine='openpyxl') as writer:
-        summary_df.to_excel(writer, sheet_name='Summary', index=False)
-        category_df.to_excel(writer, sheet_name='Category_Comparison', index=False)
-        store_group_df.to_excel(writer, sheet_name='Store_Group_Comparison', index=False)
-        yoy_df.to_excel(writer, sheet_name='YOY_Comparison_Raw', index=False)
-        historical_ref_df.to_excel(writer, sheet_name='Historical_Reference_Raw', index=False)
+    # Save timestamped version (for backup/inspection); rows are streamed with
+    # formatting declared per sheet, so large raw sheets stay cheap to write.
+    with StreamingWorkbook(timestamped_excel_file) as wb:
+        sheets = [
+            ('Summary', summary_df),
+            ('Category_Comparison', category_df),
+            ('Store_Group_Comparison', store_group_df),
+            ('YOY_Comparison_Raw', yoy_df),
+            ('Historical_Reference_Raw', historical_ref_df),
+        ]
+        for sheet_name, df in sheets:
+            wb.write_dataframe(sheet_name, df, **_excel_sheet_format(df))
         # Extra sheets
         if extra_sheets:
             for sheet_name, df in extra_sheets.items():
                 try:
-                    df.to_excel(writer, sheet_name=sheet_name[:31], index=False)
+                    wb.write_dataframe(sheet_name[:31], df, **_excel_sheet_format(df))
                 except Exception as e:
                     logger.warning(f"Could not write extra sheet '{sheet_name}': {e}")
-        # Polish all sheets
-        try:
-            for ws in writer.book.worksheets:
-                _polish_excel_sheet(ws)
-        except Exception as e:
-            logger.warning(f"Excel polish step encountered an issue: {e}")
 
     logger.info(f"Timestamped Excel analysis saved: {timestamped_excel_file}")
     
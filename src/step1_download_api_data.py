@@ -78,6 +78,7 @@ import os
 import json
 import sys
 import time
+import shutil
 from datetime import datetime
 import traceback
 from typing import List, Dict, Any, Optional, Tuple
@@ -96,8 +97,18 @@ except ImportError:
     def ensure_backward_compatibility():
         pass
 
+# Out-of-core assembly of the final datasets
+try:
+    from batch_dataset_writer import BatchDatasetWriter, SPOOL_DIRNAME
+    from download_journal import DownloadJournal
+    from http_response_cache import CACHE_MODES, get_default_cache, has_response_data, period_ttl
+except ImportError:
+    from src.batch_dataset_writer import BatchDatasetWriter, SPOOL_DIRNAME
+    from src.download_journal import DownloadJournal
+    from src.http_response_cache import CACHE_MODES, get_default_cache, has_response_data, period_ttl
+
 # ——— CONFIGURATION ———
-API_BASE = "https://fdapidb.fastfish.com:8089/api/sale"
+API_BASE = os.environ.get("FAST_FISH_API_BASE", "https://fdapidb.fastfish.com:8089/api/sale")  # Override to point at a stub API (benchmarks)
 
 # Using the correct endpoints from the API documentation
 CONFIG_ENDPOINT = f"{API_BASE}/getAdsAiStrCfg"  # Store configuration
@@ -124,13 +135,22 @@ RETRY_COUNT = 3
 RETRY_DELAY = 5  # seconds
 RETRY_BACKOFF = 2  # seconds
 
-# Track which stores have already been processed
-PROCESSED_STORES = set()
-FAILED_STORES = set()  # Track stores that failed to download
-
 # Output directories
 OUTPUT_DIR = "data/api_data"
 ERROR_DIR = os.path.join(OUTPUT_DIR, "notes")
+JOURNAL_FILENAME = "download_journal.sqlite"  # Per-store download state (see open_download_journal)
+
+# Final save: "streaming" spools each batch to disk and writes every file once
+# (the output/ copy is a hardlink); "memory" keeps all batches and concatenates
+SAVE_MODE = os.environ.get("STEP1_SAVE_MODE", "streaming").lower()
+
+# Final datasets: file prefix, log label and dedup key (None = whole row)
+FINAL_DATASETS = {
+    'config': ("store_config", "configuration", None),
+    'sales': ("store_sales", "sales", None),
+    'category': ("complete_category_sales", "category sales", None),
+    'spu': ("complete_spu_sales", "SPU sales", ['str_code', 'spu_code']),
+}
 
 # Create required directories
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -473,12 +493,11 @@ def clear_previous_data(yyyymm: str, period: Optional[str] = None, keep_notes: b
     else:
         log_progress(f"No previous data files found for period {period_label}")
     
-    # Clear the processed and failed stores sets
-    global PROCESSED_STORES, FAILED_STORES # global variables 
-    PROCESSED_STORES.clear()
-    FAILED_STORES.clear()
-    print(f"[DEBUG] Cleared processed and failed stores tracking")
-    # 변수 유지하지만 안에 들어있는 원소 전부 삭제 
+    # Forget the period's download journal entries and spooled batches
+    with open_download_journal() as journal:
+        journal.reset(period_label)
+    shutil.rmtree(os.path.join(OUTPUT_DIR, SPOOL_DIRNAME, period_label), ignore_errors=True)
+    print(f"[DEBUG] Cleared download journal and spool for {period_label}")
 
 def get_unique_store_codes(input_file: str = "data/store_codes.csv") -> List[str]:
     """
@@ -517,21 +536,6 @@ def get_unique_store_codes(input_file: str = "data/store_codes.csv") -> List[str
         log_progress(f"Found {len(store_codes)} unique store codes in {used_path}")
         # unique한 store code 리스트업 및 정렬 후 로그 기록 
         
-        # Check for previously processed and failed stores if resuming
-        period_label = get_period_label(TARGET_YYYYMM, TARGET_PERIOD)
-        processed_stores_file = os.path.join(OUTPUT_DIR, f"processed_stores_{period_label}.txt")
-        failed_stores_file = os.path.join(OUTPUT_DIR, f"failed_stores_{period_label}.txt")
-        
-        if os.path.exists(processed_stores_file):
-            with open(processed_stores_file, 'r') as f:
-                PROCESSED_STORES.update([line.strip() for line in f.readlines()])
-            log_progress(f"Found {len(PROCESSED_STORES)} previously processed stores for period {period_label}")
-        
-        if os.path.exists(failed_stores_file):
-            with open(failed_stores_file, 'r') as f:
-                FAILED_STORES.update([line.strip() for line in f.readlines()])
-            log_progress(f"Found {len(FAILED_STORES)} previously failed stores for period {period_label}")
-        
         return store_codes
     
     except Exception as e: # 에러 핸들링 
@@ -566,7 +570,8 @@ def fetch_store_config(store_codes: List[str], yyyymm: str, period: Optional[str
         log_progress(f"Fetching store configuration for {len(store_codes)} stores ({period_desc})...")
         print(f"[DEBUG] API payload: {payload}")
         
-        resp = session.post(CONFIG_ENDPOINT, json=payload, headers=HEADERS, timeout=TIMEOUT)
+        resp = get_default_cache().request(session, "POST", CONFIG_ENDPOINT, json=payload, headers=HEADERS, timeout=TIMEOUT,
+                                           ttl=period_ttl(yyyymm, period), cacheable=has_response_data)
         resp.raise_for_status()
         data = resp.json().get("data", [])
         
@@ -640,7 +645,8 @@ def fetch_store_sales(store_codes: List[str], yyyymm: str, period: Optional[str]
         log_progress(f"Fetching store sales data for {len(store_codes)} stores ({period_desc})...")
         print(f"[DEBUG] API payload: {payload}")
         
-        resp = session.post(STORE_SALES_ENDPOINT, json=payload, headers=HEADERS, timeout=TIMEOUT)
+        resp = get_default_cache().request(session, "POST", STORE_SALES_ENDPOINT, json=payload, headers=HEADERS, timeout=TIMEOUT,
+                                           ttl=period_ttl(yyyymm, period), cacheable=has_response_data)
         resp.raise_for_status()
         data = resp.json().get("data", [])
         
@@ -893,79 +899,26 @@ def estimate_category_unit_price(category: str, store_avg_price: float) -> float
     else:
         return store_avg_price  # Default to store average
 
-def get_already_processed_stores(period_label: str) -> set:
-    """
-    Get the set of stores that were already successfully processed.
-    
-    Args:
-        period_label: Period label (e.g., "202506A")
-        
-    Returns:
-        Set of store codes that were successfully processed
-    """
-    processed_stores_file = os.path.join(OUTPUT_DIR, f"processed_stores_{period_label}.txt")
-    processed_stores = set()
-    
-    if os.path.exists(processed_stores_file):
-        try:
-            with open(processed_stores_file, 'r') as f:
-                processed_stores = {line.strip() for line in f if line.strip()}
-            log_progress(f"Found {len(processed_stores)} previously processed stores")
-        except Exception as e:
-            log_progress(f"Warning: Could not read processed stores file: {e}")
-    
-    return processed_stores
-
-def get_failed_stores(period_label: str) -> set:
-    """
-    Get the set of stores that failed to download (should be retried).
-    
-    Args:
-        period_label: Period label (e.g., "202506A")
-        
-    Returns:
-        Set of store codes that failed to download
-    """
-    failed_stores_file = os.path.join(OUTPUT_DIR, f"failed_stores_{period_label}.txt")
-    failed_stores = set()
-    
-    if os.path.exists(failed_stores_file):
-        try:
-            with open(failed_stores_file, 'r') as f:
-                failed_stores = {line.strip() for line in f if line.strip()}
-            log_progress(f"Found {len(failed_stores)} previously failed stores (will retry)")
-        except Exception as e:
-            log_progress(f"Warning: Could not read failed stores file: {e}")
-    
-    return failed_stores
-
-def save_successful_stores(period_label: str, successful_stores: List[str]) -> None:
-    """
-    Save successfully processed stores to tracking file.
-    
-    Args:
-        period_label: Period label (e.g., "202506A")
-        successful_stores: List of successfully processed store codes
-    """
-    processed_stores_file = os.path.join(OUTPUT_DIR, f"processed_stores_{period_label}.txt")
-    with open(processed_stores_file, 'a') as f:
-        for store in successful_stores:
-            f.write(f"{store}\n")
-            PROCESSED_STORES.add(store)
+def open_download_journal() -> DownloadJournal:
+    """The SQLite download journal shared by every period (data/api_data/download_journal.sqlite)."""
+    return DownloadJournal(os.path.join(OUTPUT_DIR, JOURNAL_FILENAME))
 
-def save_failed_stores(period_label: str, failed_stores: List[str]) -> None:
+def import_legacy_store_lists(journal: DownloadJournal, period_label: str) -> None:
     """
-    Save failed stores to tracking file (these will be retried).
-    
-    Args:
-        period_label: Period label (e.g., "202506A")
-        failed_stores: List of failed store codes
+    Seed the journal from the processed_stores/failed_stores text files written by
+    earlier versions, so upgrading does not re-download finished stores.
     """
-    failed_stores_file = os.path.join(OUTPUT_DIR, f"failed_stores_{period_label}.txt")
-    with open(failed_stores_file, 'a') as f:
-        for store in failed_stores:
-            f.write(f"{store}\n")
-            FAILED_STORES.add(store)
+    if journal.summary(period_label):
+        return
+    lists = {}
+    for kind in ("processed", "failed"):
+        path = os.path.join(OUTPUT_DIR, f"{kind}_stores_{period_label}.txt")
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                lists[kind] = [line.strip() for line in f if line.strip()]
+    if lists:
+        imported = journal.import_store_lists(period_label, lists.get("processed", []), lists.get("failed", []))
+        log_progress(f"Imported {imported} stores from legacy tracking files into the download journal")
 
 def validate_data_completeness(period_label: str, expected_stores: set) -> Tuple[bool, set, Dict[str, str]]:
     """
@@ -1122,6 +1075,18 @@ def recover_from_partial_files(period_label: str) -> bool:
     
     log_progress(f"🔄 Attempting recovery from partial files for period {period_label}...")
     
+    # Batches spooled by an interrupted streaming run: only the parts of batches
+    # the download journal committed (a batch that died mid-write is discarded)
+    if os.path.isdir(os.path.join(OUTPUT_DIR, SPOOL_DIRNAME, period_label)):
+        with open_download_journal() as journal:
+            writers = open_dataset_writers(period_label, resume=True, keep=journal.committed_parts(period_label))
+            if any(writer.rows_in for writer in writers.values()):
+                log_progress(f"Found spooled batches: " + ", ".join(f"{kind} {writer.rows_kept} records" for kind, writer in writers.items()))
+                if save_streamed_results(writers, period_label):
+                    journal.mark_finalized(period_label)
+                    log_progress("✅ Recovery completed! Final files have been created.")
+                    return True
+    
     # Check for partial files
     partial_patterns = {
         'config': f"partial_config_{period_label}_*.csv",
@@ -1187,16 +1152,18 @@ def process_stores_in_batches(store_codes: List[str], yyyymm: str, period: Optio
     period_label = get_period_label(yyyymm, period)
     log_progress(f"Processing stores for period {period_label} (force_full_download={force_full_download})...")
     
+    streaming = SAVE_MODE != "memory"
+    journal = open_download_journal()
+    import_legacy_store_lists(journal, period_label)
+    
     # Smart downloading logic
     if not force_full_download:
-        # Check what we already have processed and what failed
-        processed_stores = get_already_processed_stores(period_label)
-        failed_stores = get_failed_stores(period_label)
+        # Journal lookup: completed stores whose data is in the final files, or
+        # (streaming) still in the spool of an interrupted run
         expected_stores = set(store_codes)
-        
-        # For smart download: skip successfully processed stores, but retry failed ones
-        stores_to_skip = processed_stores - failed_stores  # Don't retry successful stores
-        missing_stores = expected_stores - stores_to_skip  # Include failed stores for retry
+        finalized_stores = journal.completed_stores(period_label, include_unfinalized=False)
+        spooled_stores = (journal.completed_stores(period_label) - finalized_stores) if streaming else set()
+        failed_stores = journal.failed_stores(period_label)
         
         # Check if final files exist and are complete
         is_complete, final_missing_stores, validation_report = validate_data_completeness(period_label, expected_stores)
@@ -1207,51 +1174,36 @@ def process_stores_in_batches(store_codes: List[str], yyyymm: str, period: Optio
             for filename, report in validation_report.items():
                 if report.get('exists'):
                     log_progress(f"  • {filename}: {report.get('records', 0)} records, {report.get('stores', 0)} stores")
+            journal.close()
             # Return completion status for early exit
             return True, 100.0, 0
         
-        # Auto-recovery: Check if we have enough partial data to recover
-        if len(processed_stores) > 100:  # Arbitrary threshold - if significant progress exists
-            log_progress(f"🔄 Auto-recovery check: {len(processed_stores)} stores processed but no final files found")
-            # DISABLED: Auto-recovery was corrupting good data by overwriting complete files with partials
-            # if recover_from_partial_files(period_label):
-            #     log_progress("✅ Auto-recovery successful! Checking completion...")
-            #     # Re-validate after recovery
-            #     is_complete_after_recovery, final_missing_after_recovery, _ = validate_data_completeness(period_label, expected_stores)
-            #     if is_complete_after_recovery:
-            #         log_progress("✅ Data is now complete after auto-recovery!")
-            #         return True, 100.0, 0
-            #     else:
-            #         log_progress(f"⚠️ Partial recovery: {len(expected_stores) - len(final_missing_after_recovery)} stores recovered, continuing with remaining downloads")
-            #         missing_stores = final_missing_after_recovery  # Update missing stores after recovery
-            log_progress("🔄 Auto-recovery disabled to prevent data corruption. Use --recover flag if needed.")
-        
-        # Use processed stores for smart download decision
+        # Finalized stores only count while the final files still hold them
+        stores_to_skip = (finalized_stores & (expected_stores - final_missing_stores)) | spooled_stores
+        missing_stores = expected_stores - stores_to_skip
+        
         retry_count = len(failed_stores & missing_stores)  # Failed stores that will be retried
         new_count = len(missing_stores - failed_stores)     # New stores never attempted
         
-        log_progress(f"Smart download analysis:")
-        log_progress(f"  • Successfully processed: {len(processed_stores - failed_stores)} stores (will skip)")
+        log_progress(f"Smart download analysis (download journal):")
+        log_progress(f"  • Successfully processed: {len(stores_to_skip)} stores (will skip, {len(spooled_stores)} from an interrupted run)")
         log_progress(f"  • Previously failed: {retry_count} stores (will retry)")
         log_progress(f"  • Never attempted: {new_count} stores (will download)")
         log_progress(f"  • Total to process: {len(missing_stores)} stores")
         
         # Determine which stores to process
         if len(missing_stores) < len(expected_stores) * 0.5:  # Less than 50% missing
-            store_codes_to_process = list(missing_stores)
+            store_codes_to_process = sorted(missing_stores)
             log_progress(f"Smart incremental download: Processing {len(store_codes_to_process)} stores")
-            log_progress(f"Stores to process: {sorted(list(missing_stores))[:10]}{'...' if len(missing_stores) > 10 else ''}")
+            log_progress(f"Stores to process: {store_codes_to_process[:10]}{'...' if len(missing_stores) > 10 else ''}")
         else:
             log_progress(f"Many stores needed ({len(missing_stores)}/{len(expected_stores)}). Consider using --force-full flag.")
             log_progress("For safety, performing incremental download of needed stores only.")
-            store_codes_to_process = list(missing_stores)
+            store_codes_to_process = sorted(missing_stores)
     else:
         store_codes_to_process = store_codes
         log_progress(f"Force full download: Processing all {len(store_codes_to_process)} stores")
     
-    # Create/reset tracking file
-    processed_stores_file = os.path.join(OUTPUT_DIR, f"processed_stores_{period_label}.txt")
-    
     if force_full_download:
         # Only clear when explicitly requested by user
         if clear_data:
@@ -1259,19 +1211,27 @@ def process_stores_in_batches(store_codes: List[str], yyyymm: str, period: Optio
         else:
             log_progress("Force full download mode: Will regenerate all data files")
         
-        # Clear all existing data for complete regeneration
+        # Clear all existing data (and the period's journal) for complete regeneration
         clear_previous_data(yyyymm, period, keep_notes=True)
-        with open(processed_stores_file, 'w') as f:
-            pass  # Create empty file
     
-    # Lists to store batch results
-    config_data_list = []
-    sales_data_list = []
-    category_sales_list = []
-    spu_sales_list = []
+    # Batch results: spooled to disk as they arrive, or kept in lists (SAVE_MODE=memory).
+    # Spool parts of batches the journal committed before an interruption are resumed.
+    resumed_parts = journal.committed_parts(period_label) if streaming and not force_full_download else []
+    writers = open_dataset_writers(period_label, resume=bool(resumed_parts), keep=resumed_parts) if streaming else None
+    batch_lists = {kind: [] for kind in FINAL_DATASETS}
+    resumed_records = sum(writer.rows_kept for writer in writers.values()) if streaming else 0
+    if resumed_records:
+        log_progress(f"Resumed {resumed_records} spooled records committed by an interrupted run")
+    
+    def collect(kind: str, df: pd.DataFrame) -> None:
+        if streaming:
+            writers[kind].append(df)
+        else:
+            batch_lists[kind].append(df)
     
-    if not force_full_download:
-        # Load existing complete files if they exist
+    # Load existing complete files (already part of the resumed spool after an interruption)
+    if not force_full_download and not resumed_records:
+        marks = spool_marks(writers) if streaming else {}
         existing_files = {
             'config': f"store_config_{period_label}.csv",
             'sales': f"store_sales_{period_label}.csv",
@@ -1283,18 +1243,17 @@ def process_stores_in_batches(store_codes: List[str], yyyymm: str, period: Optio
             filepath = os.path.join(OUTPUT_DIR, filename)
             if os.path.exists(filepath):
                 try:
-                    df = pd.read_csv(filepath)
-                    if file_type == 'config':
-                        config_data_list.append(df)
-                    elif file_type == 'sales':
-                        sales_data_list.append(df)
-                    elif file_type == 'category':
-                        category_sales_list.append(df)
-                    elif file_type == 'spu':
-                        spu_sales_list.append(df)
-                    log_progress(f"Loaded existing {filename}: {len(df)} records")
+                    if streaming:
+                        records = writers[file_type].append_csv(filepath)
+                    else:
+                        df = pd.read_csv(filepath)
+                        batch_lists[file_type].append(df)
+                        records = len(df)
+                    log_progress(f"Loaded existing {filename}: {records} records")
                 except Exception as e:
                     log_progress(f"Warning: Could not load {filename}: {e}")
+        if streaming:
+            journal.record_parts(period_label, spool_parts_since(writers, marks))
     
     # Process stores in batches
     log_progress(f"Processing {len(store_codes_to_process)} stores in batches of {batch_size}...")
@@ -1303,51 +1262,53 @@ def process_stores_in_batches(store_codes: List[str], yyyymm: str, period: Optio
         batch = store_codes_to_process[i:i+batch_size]
         print(f"[DEBUG] Processing batch {i//batch_size + 1}/{(len(store_codes_to_process) + batch_size - 1)//batch_size} ({len(batch)} stores)...")
         
+        marks = spool_marks(writers) if streaming else {}
+        
         # Fetch data for this batch
         config_df, config_stores = fetch_store_config(batch, yyyymm, period)
         if not config_df.empty:
-            config_data_list.append(config_df)
+            collect('config', config_df)
         
         sales_df, sales_stores = fetch_store_sales(batch, yyyymm, period)
         if not sales_df.empty:
-            sales_data_list.append(sales_df)
+            collect('sales', sales_df)
         
-        # Determine successful and failed stores for this batch
+        # Determine successful stores for this batch
         successful_stores_batch = []
-        failed_stores_batch = []
+        category_df, spu_df = None, None
         
         # Process and merge data
         if not config_df.empty and not sales_df.empty:
             category_df, spu_df, processed_stores_batch = process_and_merge_data(sales_df, config_df)
             if not category_df.empty:
-                category_sales_list.append(category_df)
+                collect('category', category_df)
             if not spu_df.empty:
-                spu_sales_list.append(spu_df)
+                collect('spu', spu_df)
             
             successful_stores_batch = processed_stores_batch
         
-        # Identify failed stores (attempted but no data)
-        attempted_stores = set(batch)
-        successful_stores_set = set(successful_stores_batch)
-        failed_stores_batch = list(attempted_stores - successful_stores_set)
-        
-        # Update tracking files separately
-        if successful_stores_batch:
-            save_successful_stores(period_label, successful_stores_batch)
-        
-        if failed_stores_batch:
-            save_failed_stores(period_label, failed_stores_batch)
+        # Commit the batch: per-store outcome on each endpoint plus its spool parts.
+        # Stores attempted without merged output stay incomplete and are retried.
+        journal.record_batch(period_label, batch, {'config': config_df, 'sales': sales_df}, successful_stores_batch,
+                             parts=spool_parts_since(writers, marks) if streaming else [],
+                             output_frames=[category_df, spu_df])
         
-        # Save intermediate results periodically
-        if i % (batch_size * 5) == 0 and i > 0:
-            save_intermediate_results(config_data_list, sales_data_list, category_sales_list, spu_sales_list, period_label)
+        # Save intermediate results periodically (the streaming spool is already on disk)
+        if not streaming and i % (batch_size * 5) == 0 and i > 0:
+            save_intermediate_results(batch_lists['config'], batch_lists['sales'], batch_lists['category'], batch_lists['spu'], period_label)
         
         # Rate limiting
         if i + batch_size < len(store_codes_to_process):
             time.sleep(1)
     
     # Save final consolidated results
-    save_final_results(config_data_list, sales_data_list, category_sales_list, spu_sales_list, period_label)
+    if streaming:
+        saved = save_streamed_results(writers, period_label)
+    else:
+        saved = save_final_results(batch_lists['config'], batch_lists['sales'], batch_lists['category'], batch_lists['spu'], period_label)
+    if saved:
+        journal.mark_finalized(period_label)
+    journal.close()
     
     # Clean up partial files
     clean_partial_files(period_label)
@@ -1390,8 +1351,62 @@ def save_intermediate_results(config_data: List[pd.DataFrame], sales_data: List[
         pd.concat(spu_sales).to_csv(os.path.join(OUTPUT_DIR, f"partial_spu_sales_{period_label}_{timestamp}.csv"), index=False)
     print(f"[DEBUG] Saved intermediate results for period {period_label}")
 
-def save_final_results(config_data: List[pd.DataFrame], sales_data: List[pd.DataFrame], category_sales: List[pd.DataFrame], spu_sales: List[pd.DataFrame], period_label: str) -> None:
-    """Save final combined results to CSV files with period-specific naming"""
+def open_dataset_writers(period_label: str, resume: bool = False, keep: Optional[List[str]] = None) -> Dict[str, BatchDatasetWriter]:
+    """
+    On-disk batch spools for the four final datasets of a period. resume=True
+    keeps leftover parts; keep ("<prefix>/<part>" names, as recorded in the
+    download journal) limits them to the parts of committed batches.
+    """
+    spool_root = os.path.join(OUTPUT_DIR, SPOOL_DIRNAME, period_label)
+    writers = {}
+    for kind, (prefix, _, subset) in FINAL_DATASETS.items():
+        kept = None if keep is None else {name.split("/", 1)[1] for name in keep if name.startswith(prefix + "/")}
+        writers[kind] = BatchDatasetWriter(os.path.join(spool_root, prefix), subset=subset, resume=resume, keep=kept)
+    return writers
+
+def spool_marks(writers: Dict[str, BatchDatasetWriter]) -> Dict[str, int]:
+    """Part counts per dataset, to find the parts a batch adds (spool_parts_since)."""
+    return {kind: len(writer.part_names) for kind, writer in writers.items()}
+
+def spool_parts_since(writers: Dict[str, BatchDatasetWriter], marks: Dict[str, int]) -> List[str]:
+    """Parts spooled since marks, as "<prefix>/<part>" names for the download journal."""
+    return [f"{FINAL_DATASETS[kind][0]}/{name}"
+            for kind, writer in writers.items() for name in writer.part_names[marks.get(kind, 0):]]
+
+def save_streamed_results(writers: Dict[str, BatchDatasetWriter], period_label: str) -> bool:
+    """Write each spooled dataset once to data/api_data and hardlink it into output/ (True on success)"""
+    try:
+        for kind, (prefix, label, subset) in FINAL_DATASETS.items():
+            writer = writers[kind]
+            if writer.rows_in == 0:
+                writer.clear()
+                continue
+            api_file = os.path.join(OUTPUT_DIR, f"{prefix}_{period_label}.csv")
+            final_file = os.path.join("output", f"{prefix}_{period_label}.csv")
+            result = writer.finalize(api_file, link_paths=[final_file])
+            if result['duplicates_removed']:
+                key = f" by {'/'.join(subset)}" if subset else ""
+                log_progress(f"[DEDUP] Removed {result['duplicates_removed']} duplicate {label} records{key} ({result['rows']} clean records remaining)")
+            log_progress(f"Saved {label} data: {api_file} and {final_file} [{result['links'][final_file]}] ({result['rows']} rows, {result['stores']} stores)")
+        for spool_dir in (os.path.join(OUTPUT_DIR, SPOOL_DIRNAME, period_label), os.path.join(OUTPUT_DIR, SPOOL_DIRNAME)):
+            if os.path.isdir(spool_dir) and not os.listdir(spool_dir):
+                os.rmdir(spool_dir)
+        
+        log_progress(f"Data download and processing complete for period {period_label}")
+        return True
+        
+    except Exception as e:
+        log_error("Failed to save final results", traceback.format_exc())
+        return False
+
+def save_final_results(config_data: List[pd.DataFrame], sales_data: List[pd.DataFrame], category_sales: List[pd.DataFrame], spu_sales: List[pd.DataFrame], period_label: str) -> bool:
+    """Save final combined results to CSV files with period-specific naming (True on success)"""
+    if SAVE_MODE != "memory":
+        writers = open_dataset_writers(period_label)
+        for kind, frames in zip(FINAL_DATASETS, (config_data, sales_data, category_sales, spu_sales)):
+            for df in frames:
+                writers[kind].append(df)
+        return save_streamed_results(writers, period_label)
     try:
         # Save to both data/api_data (for pipeline steps) and output (for final results)
         api_output_dir = OUTPUT_DIR  # data/api_data
@@ -1470,9 +1485,11 @@ def save_final_results(config_data: List[pd.DataFrame], sales_data: List[pd.Data
             log_progress(f"Saved SPU sales data: {spu_file_api} and {spu_file_final} ({len(spu_df)} rows, {len(spu_df['str_code'].unique())} stores)")
         
         log_progress(f"Data download and processing complete for period {period_label}")
+        return True
         
     except Exception as e:
         log_error("Failed to save final results", traceback.format_exc())
+        return False
 
 def process_multi_period_data_collection(target_yyyymm: str, target_period: str, n_months: int = 3, batch_size: int = 10, force_full_download: bool = False, clear_data: bool = False) -> Tuple[bool, float, int]:
     """
@@ -1584,8 +1601,12 @@ def main() -> None:
                        help='Download both current 3 months AND same period last year for seasonal clustering')
     parser.add_argument('--months-back', type=int, default=MONTHS_FOR_CLUSTERING,
                        help=f'Number of months to look back for multi-period collection (default: {MONTHS_FOR_CLUSTERING})')
+    parser.add_argument('--http-cache', choices=CACHE_MODES,
+                       help='API response cache: readwrite (default), offline (replay only), refresh, off (env HTTP_CACHE_MODE)')
     
     args = parser.parse_args()
+    if args.http_cache:
+        get_default_cache().mode = args.http_cache
     
     # Set variables based on arguments early so they're available for all modes
     target_yyyymm = args.month
@@ -1780,6 +1801,7 @@ def main() -> None:
             if os.path.exists(filepath):
                 size_mb = os.path.getsize(filepath) / (1024 * 1024)
                 log_progress(f"  • {filename} ({size_mb:.1f} MB)")
+        log_progress(get_default_cache().summary())
         
     except Exception as e:
         error_msg = "Unexpected error in main process"
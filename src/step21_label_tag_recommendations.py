@@ -76,10 +76,12 @@ import os as _os
 try:
     from src.config import get_period_label, get_current_period  # when running with -m src.module
     from src.pipeline_manifest import register_step_output, get_step_input
+    from src.excel_export import StreamingWorkbook, DEFAULT_HEADER_STYLE, fit_column_widths
 except Exception:
     try:
         from config import get_period_label, get_current_period  # when running from src/ directly
         from pipeline_manifest import register_step_output, get_step_input
+        from excel_export import StreamingWorkbook, DEFAULT_HEADER_STYLE, fit_column_widths
     except Exception:
         # Final fallback: adjust sys.path relative to this file
         _HERE = _os.path.dirname(__file__)
@@ -88,6 +90,7 @@ except Exception:
                 sys.path.append(p)
         from config import get_period_label, get_current_period
         from pipeline_manifest import register_step_output, get_step_input
+        from excel_export import StreamingWorkbook, DEFAULT_HEADER_STYLE, fit_column_widths
 
 # Suppress warnings
 warnings.filterwarnings('ignore')
@@ -626,26 +629,10 @@ def create_df_excel_output(recommendations_df: pd.DataFrame, period_label: Optio
     
     # Create Excel file with formatting
     try:
-        with pd.ExcelWriter(excel_output_file, engine='openpyxl') as writer:
-            # Main recommendations sheet
-            final_df.to_excel(writer, sheet_name='Tag Recommendations', index=False)
-            
-            # Get the workbook and worksheet
-            workbook = writer.book
-            worksheet = writer.sheets['Tag Recommendations']
-            
-            # Auto-adjust column widths
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)  # Cap at 50 characters
-                worksheet.column_dimensions[column_letter].width = adjusted_width
+        with StreamingWorkbook(excel_output_file) as wb:
+            # Main recommendations sheet, widths fitted to content (capped at 50 characters)
+            wb.write_dataframe('Tag Recommendations', final_df, header_style=DEFAULT_HEADER_STYLE,
+                               column_widths=fit_column_widths(final_df, max_width=50, sample_rows=None))
             
             # Add summary sheet
             summary_data = {
@@ -659,7 +646,7 @@ def create_df_excel_output(recommendations_df: pd.DataFrame, period_label: Optio
                                 datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
             }
             summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
+            wb.write_dataframe('Summary', summary_df, header_style=DEFAULT_HEADER_STYLE)
         
         # Also emit a CSV alongside Excel for convenience
         try:
@@ -671,8 +658,8 @@ def create_df_excel_output(recommendations_df: pd.DataFrame, period_label: Optio
         log_progress(f"   ✓ Timestamped D-F Excel file created: {excel_output_file}")
         
         # Save generic Excel version (for pipeline flow)
-        with pd.ExcelWriter(generic_excel_file, engine='openpyxl') as writer:
-            final_df.to_excel(writer, sheet_name='Tag Recommendations', index=False)
+        with StreamingWorkbook(generic_excel_file) as wb:
+            wb.write_dataframe('Tag Recommendations', final_df, header_style=DEFAULT_HEADER_STYLE)
         log_progress(f"   ✓ Generic D-F Excel file created: {generic_excel_file}")
         
         # Create symlink for generic CSV version (for pipeline flow)
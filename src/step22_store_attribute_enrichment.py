@@ -41,6 +41,8 @@ Version: 1.0 - Real Data Only Implementation
  Options you may need
  - --force-taxonomy-split: recomputes fashion/basic ratios when API splits look constant or noisy
  - --subcategory-mapping <CSV>: optional mapping to improve taxonomy-based split
+ - --previous-attributes <CSV>: previous enriched attributes output; stores whose sales are unchanged
+   (same sales_fingerprint) are carried over and only changed stores are recomputed
 
  Period Handling Patterns
  - Target label: use --target-yyyymm/--target-period
@@ -55,10 +57,10 @@ Version: 1.0 - Real Data Only Implementation
 import pandas as pd
 import numpy as np
 import os
+import re
 from datetime import datetime
 from typing import Dict, Tuple, Any, Optional
 import warnings
-from tqdm import tqdm
 import argparse
 
 # Period and manifest utilities (resilient imports for module vs script execution)
@@ -116,6 +118,7 @@ def _parse_args():
     parser.add_argument("--source-period", choices=["A", "B"], required=False, help="Source period for real store splits (defaults to target period)")
     parser.add_argument("--force-taxonomy-split", action="store_true", help="Ignore API fashion/basic split and recompute from taxonomy")
     parser.add_argument("--subcategory-mapping", default=os.environ.get("STEP22_SUBCATEGORY_MAPPING_FILE", "data/api_data/subcategory_fashion_mapping.csv"), help="Optional CSV mapping of sub_cate_name to fashion/basic/neutral")
+    parser.add_argument("--previous-attributes", default=os.environ.get("STEP22_PREVIOUS_ATTRIBUTES_FILE"), help=f"Optional previous enriched attributes CSV (e.g. {ENRICHED_STORE_ATTRIBUTES_FILE}); only stores whose sales changed are recomputed")
     return parser.parse_args()
 
 # ===== STORE TYPE CLASSIFICATION LOGIC =====
@@ -365,20 +368,24 @@ def load_clustering_data(target_yyyymm: Optional[str] = None, target_period: Opt
     print("✗ Clustering results file not found")
     return pd.DataFrame()
 
-# ===== MAIN ENRICHMENT FUNCTION =====
-def calculate_store_attributes_from_real_data(sales_df: pd.DataFrame, *, force_taxonomy_split: bool = False, subcategory_mapping_file: Optional[str] = None) -> pd.DataFrame:
-    """
-    Calculate comprehensive store attributes using only real sales data.
-    
-    Args:
-        sales_df: Real sales data from API
-        
-    Returns:
-        DataFrame with enriched store attributes
-    """
-    print("Calculating store attributes from real data...")
-    
-    # Detect if API provides a constant 50/50 split; if so we will recompute from taxonomy
+# ===== GROUPED ENRICHMENT ENGINE =====
+# Attribute columns produced per store (also the columns reused from a previous run)
+STORE_ATTRIBUTE_COLUMNS = [
+    'str_code', 'store_type', 'store_style_profile', 'fashion_ratio', 'basic_ratio',
+    'size_tier', 'estimated_rack_capacity', 'capacity_rationale', 'total_sales_amt',
+    'total_sales_qty', 'sku_diversity', 'category_count', 'subcategory_count',
+    'avg_price_per_unit', 'sales_per_sku', 'type_confidence_score', 'data_source',
+    'calculation_date', 'sales_fingerprint',
+]
+
+_FASHION_PATTERN = '|'.join(re.escape(k) for k in FASHION_KEYWORDS)
+
+def _is_fashion_subcategory_series(names: pd.Series) -> pd.Series:
+    """Vectorized ``_is_fashion_subcategory`` over a column of subcategory names."""
+    return names.astype(str).str.contains(_FASHION_PATTERN, regex=True)
+
+def _detect_constant_api_split(sales_df: pd.DataFrame, force_taxonomy_split: bool) -> bool:
+    """Detect if API provides a constant 50/50 split; if so ratios are recomputed from taxonomy."""
     constant_api_split = False
     try:
         if force_taxonomy_split:
@@ -392,7 +399,6 @@ def calculate_store_attributes_from_real_data(sales_df: pd.DataFrame, *, force_t
             # Support either 'basic' or 'base' naming from Step 1
             cols = set(sales_df.columns)
             has_amt = ('fashion_sal_amt' in cols) and (('basic_sal_amt' in cols) or ('base_sal_amt' in cols))
-            has_qty = ('fashion_sal_qty' in cols) and (('basic_sal_qty' in cols) or ('base_sal_qty' in cols))
             if has_amt:
                 fa = pd.to_numeric(sales_df['fashion_sal_amt'], errors='coerce').fillna(0)
                 ba_col = 'basic_sal_amt' if 'basic_sal_amt' in cols else 'base_sal_amt'
@@ -401,267 +407,361 @@ def calculate_store_attributes_from_real_data(sales_df: pd.DataFrame, *, force_t
                 constant_api_split = True
     except Exception:
         constant_api_split = False
+    return constant_api_split
 
-    # Build subcategory-level fashion propensity (data-driven) for taxonomy-based recomputation
-    subcat_fashion_flag = {}
+def _subcategory_fashion_flags(sales_df: pd.DataFrame, constant_api_split: bool,
+                               subcategory_mapping_file: Optional[str]) -> pd.Series:
+    """
+    Subcategory -> 'fashion'/'basic'/'neutral' tag from the optional mapping file,
+    overridden by data-driven propensity (price and SPU diversity ranks) when the
+    API split is constant or forced.
+    """
+    flags = pd.Series(dtype=object)
     try:
-        # Load explicit mapping if provided
         if subcategory_mapping_file and os.path.exists(subcategory_mapping_file):
             try:
                 map_df = pd.read_csv(subcategory_mapping_file)
-                if {'sub_cate_name','tag'}.issubset(set(map_df.columns)):
-                    for _, r in map_df.iterrows():
-                        subcat_fashion_flag[r['sub_cate_name']] = str(r['tag']).strip().lower()  # fashion/basic/neutral
+                if {'sub_cate_name', 'tag'}.issubset(set(map_df.columns)):
+                    tags = map_df['tag'].astype(str).str.strip().str.lower()
+                    flags = pd.Series(tags.values, index=map_df['sub_cate_name'].values)
             except Exception:
                 pass
-        # Derive data-driven propensity if API split is constant or forced
         if constant_api_split and {'sub_cate_name', 'unit_price', 'spu_code'}.issubset(set(sales_df.columns)):
             tmp = sales_df[['sub_cate_name', 'unit_price', 'spu_code']].copy()
             tmp['unit_price'] = pd.to_numeric(tmp['unit_price'], errors='coerce')
-            # Aggregate metrics per subcategory
             agg = tmp.groupby('sub_cate_name').agg(
                 median_price=('unit_price', 'median'),
                 spu_diversity=('spu_code', 'nunique'),
-                obs=('spu_code', 'size')
-            ).reset_index()
-            # Rank metrics into [0,1]
-            agg['price_rank'] = agg['median_price'].rank(pct=True)
-            agg['div_rank'] = agg['spu_diversity'].rank(pct=True)
-            agg['fashion_score'] = (agg['price_rank'] + agg['div_rank']) / 2.0
-            # Thresholds derived from data percentiles
-            hi = agg['fashion_score'].quantile(0.7)
-            lo = agg['fashion_score'].quantile(0.3)
-            for _, r in agg.iterrows():
-                score = float(r['fashion_score']) if pd.notna(r['fashion_score']) else 0.0
-                if score >= hi:
-                    subcat_fashion_flag[r['sub_cate_name']] = 'fashion'
-                elif score <= lo:
-                    subcat_fashion_flag[r['sub_cate_name']] = 'basic'
-                else:
-                    subcat_fashion_flag[r['sub_cate_name']] = 'basic'  # neutral -> basic for conservative split
+            )
+            # Rank metrics into [0,1]; thresholds derived from data percentiles
+            score = (agg['median_price'].rank(pct=True) + agg['spu_diversity'].rank(pct=True)) / 2.0
+            hi = score.quantile(0.7)
+            # neutral (between the 30th and 70th percentiles) -> basic for a conservative split
+            derived = pd.Series(np.where(score.fillna(0.0) >= hi, 'fashion', 'basic'), index=agg.index)
+            flags = pd.concat([flags, derived])
+        flags = flags[~flags.index.duplicated(keep='last')]
     except Exception:
-        subcat_fashion_flag = {}
-
-    # Group by store to calculate store-level metrics
-    store_metrics = []
-    
-    # Get unique stores
-    unique_stores = sales_df['str_code'].unique()
-    print(f"Processing {len(unique_stores):,} unique stores...")
-    
-    for store_code in tqdm(unique_stores, desc="Calculating store attributes"):
-        store_data = sales_df[sales_df['str_code'] == store_code]
-
-        # Calculate real fashion/basic ratios (store-level only for splits)
-        lower_cols = {c.lower(): c for c in store_data.columns}
-        fashion_amt = 0.0
-        basic_amt = 0.0
-        fashion_qty = 0.0
-        basic_qty = 0.0
-
-        # Identify store-level split rows to avoid contamination from SPU rows
-        split_amt_fashion_col = lower_cols.get('fashion_sal_amt')
-        split_amt_basic_col = lower_cols.get('basic_sal_amt') or lower_cols.get('base_sal_amt')
-        split_qty_fashion_col = lower_cols.get('fashion_sal_qty')
-        split_qty_basic_col = lower_cols.get('basic_sal_qty') or lower_cols.get('base_sal_qty')
-        has_store_split = (
-            (split_amt_fashion_col is not None and split_amt_basic_col is not None) or
-            (split_qty_fashion_col is not None and split_qty_basic_col is not None)
-        )
-
-        if has_store_split:
-            if split_amt_fashion_col and split_amt_basic_col:
-                fashion_amt = pd.to_numeric(store_data[split_amt_fashion_col], errors='coerce').fillna(0).sum()
-                basic_amt = pd.to_numeric(store_data[split_amt_basic_col], errors='coerce').fillna(0).sum()
-            if split_qty_fashion_col and split_qty_basic_col:
-                fashion_qty = pd.to_numeric(store_data[split_qty_fashion_col], errors='coerce').fillna(0).sum()
-                basic_qty = pd.to_numeric(store_data[split_qty_basic_col], errors='coerce').fillna(0).sum()
-        elif constant_api_split:
-            # Recompute by taxonomy: allocate by subcategory using real amounts/qty
-            sales_amt_col = lower_cols.get('spu_sales_amt') or lower_cols.get('sales_amt') or lower_cols.get('sal_amt')
-            qty_col = lower_cols.get('quantity') or lower_cols.get('sales_qty') or lower_cols.get('sal_qty')
-            if 'sub_cate_name' in store_data.columns and (sales_amt_col or qty_col):
-                if sales_amt_col:
-                    for _, r in store_data.iterrows():
-                        amt_f = float(r.get(sales_amt_col, 0) or 0)
-                        subname = r.get('sub_cate_name')
-                        flag = subcat_fashion_flag.get(subname)
-                        if flag == 'fashion' or (flag is None and _is_fashion_subcategory(subname)):
-                            fashion_amt += amt_f
-                        else:
-                            basic_amt += amt_f
-                if qty_col and fashion_amt == 0.0 and basic_amt == 0.0:
-                    for _, r in store_data.iterrows():
-                        qty_f = float(r.get(qty_col, 0) or 0)
-                        subname = r.get('sub_cate_name')
-                        flag = subcat_fashion_flag.get(subname)
-                        if flag == 'fashion' or (flag is None and _is_fashion_subcategory(subname)):
-                            fashion_qty += qty_f
-                        else:
-                            basic_qty += qty_f
-            else:
-                # Fallback to sums of any explicit columns (last resort)
-                for col in store_data.columns:
-                    col_l = col.lower()
-                    if 'fashion' in col_l and ('amt' in col_l or 'sales_amt' in col_l):
-                        fashion_amt += pd.to_numeric(store_data[col], errors='coerce').fillna(0).sum()
-                    elif 'basic' in col_l and ('amt' in col_l or 'sales_amt' in col_l):
-                        basic_amt += pd.to_numeric(store_data[col], errors='coerce').fillna(0).sum()
-                    elif 'fashion' in col_l and ('qty' in col_l or 'quantity' in col_l):
-                        fashion_qty += pd.to_numeric(store_data[col], errors='coerce').fillna(0).sum()
-                    elif 'basic' in col_l and ('qty' in col_l or 'quantity' in col_l):
-                        basic_qty += pd.to_numeric(store_data[col], errors='coerce').fillna(0).sum()
-        else:
-            # Use any explicit column naming variants (amt/qty)
-            for col in store_data.columns:
-                col_l = col.lower()
-                if 'fashion' in col_l and ('amt' in col_l or 'sales_amt' in col_l):
-                    fashion_amt += pd.to_numeric(store_data[col], errors='coerce').fillna(0).sum()
-                elif (('basic' in col_l) or ('base' in col_l)) and ('amt' in col_l or 'sales_amt' in col_l):
-                    basic_amt += pd.to_numeric(store_data[col], errors='coerce').fillna(0).sum()
-                elif 'fashion' in col_l and ('qty' in col_l or 'quantity' in col_l):
-                    fashion_qty += pd.to_numeric(store_data[col], errors='coerce').fillna(0).sum()
-                elif (('basic' in col_l) or ('base' in col_l)) and ('qty' in col_l or 'quantity' in col_l):
-                    basic_qty += pd.to_numeric(store_data[col], errors='coerce').fillna(0).sum()
-            # Heuristic fallback via subcategory when explicit columns are missing or zero
-            if fashion_amt == 0.0 and basic_amt == 0.0 and 'sub_cate_name' in store_data.columns:
-                sales_amt_col = None
-                for probe in ['spu_sales_amt', 'sales_amt', 'sal_amt']:
-                    if probe in lower_cols:
-                        sales_amt_col = lower_cols[probe]
-                        break
-                qty_col = None
-                for probe in ['quantity', 'sales_qty', 'sal_qty']:
-                    if probe in lower_cols:
-                        qty_col = lower_cols[probe]
-                        break
-                if sales_amt_col is not None:
-                    for _, r in store_data.iterrows():
-                        amt = float(r.get(sales_amt_col, 0) or 0)
-                        if _is_fashion_subcategory(r.get('sub_cate_name')):
-                            fashion_amt += amt
-                        else:
-                            basic_amt += amt
-                if (fashion_qty == 0.0 and basic_qty == 0.0) and qty_col is not None:
-                    for _, r in store_data.iterrows():
-                        qty = float(r.get(qty_col, 0) or 0)
-                        if _is_fashion_subcategory(r.get('sub_cate_name')):
-                            fashion_qty += qty
-                        else:
-                            basic_qty += qty
-        
-        total_qty = basic_qty + fashion_qty
-        total_amt = basic_amt + fashion_amt
-        
-        # Calculate blended ratios (amount and quantity) to avoid price bias
-        amt_ratio = None
-        qty_ratio = None
-        if total_amt > 0:
-            amt_ratio = fashion_amt / total_amt
-        if total_qty > 0:
-            qty_ratio = fashion_qty / total_qty
-        if amt_ratio is not None and qty_ratio is not None:
-            blended = 0.5 * amt_ratio + 0.5 * qty_ratio
-        elif amt_ratio is not None:
-            blended = amt_ratio
-        elif qty_ratio is not None:
-            blended = qty_ratio
-        else:
-            blended = 0.0
-        fashion_ratio = blended * 100.0
-        basic_ratio = 100.0 - fashion_ratio
-        
-        # Calculate SKU diversity metrics
-        sku_count = store_data['spu_code'].nunique() if 'spu_code' in store_data.columns else 0
-        category_count = store_data['cate_name'].nunique() if 'cate_name' in store_data.columns else 0
-        subcategory_count = store_data['sub_cate_name'].nunique() if 'sub_cate_name' in store_data.columns else 0
-        
-        # Primary classification policy (NO synthetic/fallback):
-        # 1) Compute ratio-based class using blended fashion_ratio with symmetric thresholds.
-        # 2) Use API label 'str_type' (基础=Basic, 流行=Fashion) only as a tie-breaker in the gray band.
-        # 3) Balanced is assigned for blended ratios in [35, 65].
-        # 4) Profiles are derived from final class and ratio magnitude.
-        #    This ensures Fashion/Basic/Balanced all appear when supported by actual data.
-        #    API label does not override a strong opposing ratio.
-
-        # Derive API class (if present)
-        api_class = None
-        if 'str_type' in store_data.columns:
-            try:
-                hint_mode = store_data['str_type'].dropna().astype(str).mode().iat[0]
-                hint_l = hint_mode.lower()
-                if ('基础' in hint_mode) or ('basic' in hint_l):
-                    api_class = 'Basic'
-                elif ('流行' in hint_mode) or ('fashion' in hint_l):
-                    api_class = 'Fashion'
-            except Exception:
-                api_class = None
-
-        # Classification policy: ratio-first with explicit Balanced band; API label only breaks ties near boundaries
-        upper_fashion_cut = 65.0
-        lower_basic_cut = 35.0
-        if fashion_ratio >= upper_fashion_cut:
-            store_type = 'Fashion'
-        elif fashion_ratio <= lower_basic_cut:
-            store_type = 'Basic'
-        else:
-            store_type = 'Balanced'
-        # Tie-breaker: if within 5% of a boundary, align to API label when present
-        if api_class in ['Fashion','Basic']:
-            near_upper = abs(fashion_ratio - upper_fashion_cut) <= 5.0
-            near_lower = abs(fashion_ratio - lower_basic_cut) <= 5.0
-            if store_type == 'Balanced' and (near_upper or near_lower):
-                store_type = api_class
-
-        # Derive profile from final class and ratio
-        if store_type == 'Fashion':
-            store_style_profile = 'Fashion-Heavy' if fashion_ratio >= 80.0 else 'Fashion-Focused'
-        elif store_type == 'Basic':
-            store_style_profile = 'Basic-Heavy' if basic_ratio >= 80.0 else 'Basic-Focused'
-        else:
-            if abs(fashion_ratio - 50.0) <= 10.0:
-                store_style_profile = 'Perfectly-Balanced'
-            else:
-                store_style_profile = 'Fashion-Leaning' if fashion_ratio > 50.0 else 'Basic-Leaning'
-
-        # Compute confidence: higher when API label present and when ratio far from 50%
-        distance = abs(fashion_ratio - 50.0) / 50.0  # 0..1
-        if api_class in ['Fashion', 'Basic']:
-            type_confidence = min(1.0, 0.6 + 0.4 * distance)
-        else:
-            type_confidence = min(1.0, 0.4 + 0.6 * distance)
-        
-        # Estimate capacity using real data
-        size_tier, estimated_capacity, capacity_rationale = estimate_store_capacity_from_real_data(
-            total_amt, total_qty, sku_count, category_count
-        )
-        
-        # Calculate additional metrics
-        avg_price_per_unit = total_amt / total_qty if total_qty > 0 else 0
-        sales_per_sku = total_amt / sku_count if sku_count > 0 else 0
-        
-        store_metrics.append({
-            'str_code': store_code,
-            'store_type': store_type,
-            'store_style_profile': store_style_profile,
-            'fashion_ratio': round(fashion_ratio, 2),
-            'basic_ratio': round(basic_ratio, 2),
-            'size_tier': size_tier,
-            'estimated_rack_capacity': estimated_capacity,
-            'capacity_rationale': capacity_rationale,
-            'total_sales_amt': round(total_amt, 2),
-            'total_sales_qty': round(total_qty, 2),
-            'sku_diversity': sku_count,
-            'category_count': category_count,
-            'subcategory_count': subcategory_count,
-            'avg_price_per_unit': round(avg_price_per_unit, 2),
-            'sales_per_sku': round(sales_per_sku, 2),
-            'type_confidence_score': round(type_confidence, 3),
-            'data_source': 'Real API Sales Data',
-            'calculation_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
-    
-    return pd.DataFrame(store_metrics)
+        flags = pd.Series(dtype=object)
+    return flags
+
+def _store_split_components(sales_df: pd.DataFrame, constant_api_split: bool,
+                            flags: pd.Series) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Per-row fashion/basic amount and quantity components for one grouped sum.
+
+    Returns the component frame and the per-row fashion flag that was applied
+    (False where no taxonomy allocation is involved). Columns prefixed ``alt_``
+    only take effect for stores whose primary amounts sum to zero; they are
+    resolved after aggregation by ``_resolve_store_split``.
+    """
+    lower_cols = {c.lower(): c for c in sales_df.columns}
+
+    def num(col: str) -> pd.Series:
+        return pd.to_numeric(sales_df[col], errors='coerce').fillna(0)
+
+    parts = pd.DataFrame(index=sales_df.index)
+    row_is_fashion = pd.Series(False, index=sales_df.index)
+
+    # Store-level split columns from Step 1 take precedence over SPU rows
+    split_amt_fashion_col = lower_cols.get('fashion_sal_amt')
+    split_amt_basic_col = lower_cols.get('basic_sal_amt') or lower_cols.get('base_sal_amt')
+    split_qty_fashion_col = lower_cols.get('fashion_sal_qty')
+    split_qty_basic_col = lower_cols.get('basic_sal_qty') or lower_cols.get('base_sal_qty')
+    has_amt_split = split_amt_fashion_col is not None and split_amt_basic_col is not None
+    has_qty_split = split_qty_fashion_col is not None and split_qty_basic_col is not None
+    if has_amt_split or has_qty_split:
+        if has_amt_split:
+            parts['fashion_amt'] = num(split_amt_fashion_col)
+            parts['basic_amt'] = num(split_amt_basic_col)
+        if has_qty_split:
+            parts['fashion_qty'] = num(split_qty_fashion_col)
+            parts['basic_qty'] = num(split_qty_basic_col)
+        return parts, row_is_fashion
+
+    sales_amt_col = lower_cols.get('spu_sales_amt') or lower_cols.get('sales_amt') or lower_cols.get('sal_amt')
+    qty_col = lower_cols.get('quantity') or lower_cols.get('sales_qty') or lower_cols.get('sal_qty')
+    has_subcategory = 'sub_cate_name' in sales_df.columns
+
+    if constant_api_split and has_subcategory and (sales_amt_col or qty_col):
+        # Recompute by taxonomy: allocate real amounts/qty by subcategory tag,
+        # falling back to keywords for untagged subcategories
+        flag = sales_df['sub_cate_name'].map(flags) if len(flags) else pd.Series(np.nan, index=sales_df.index)
+        row_is_fashion = (flag == 'fashion') | (flag.isna() & _is_fashion_subcategory_series(sales_df['sub_cate_name']))
+        if sales_amt_col:
+            amt = num(sales_amt_col)
+            parts['fashion_amt'] = amt.where(row_is_fashion, 0.0)
+            parts['basic_amt'] = amt.where(~row_is_fashion, 0.0)
+        if qty_col:
+            qty = num(qty_col)
+            parts['alt_fashion_qty'] = qty.where(row_is_fashion, 0.0)
+            parts['alt_basic_qty'] = qty.where(~row_is_fashion, 0.0)
+        return parts, row_is_fashion
+
+    # Sums of any explicit fashion/basic column naming variants
+    basic_tokens = ('basic',) if constant_api_split else ('basic', 'base')
+    for target in ['fashion_amt', 'basic_amt', 'fashion_qty', 'basic_qty']:
+        parts[target] = 0.0
+    for col in sales_df.columns:
+        col_l = col.lower()
+        is_basic = any(t in col_l for t in basic_tokens)
+        if 'fashion' in col_l and ('amt' in col_l or 'sales_amt' in col_l):
+            parts['fashion_amt'] += num(col)
+        elif is_basic and ('amt' in col_l or 'sales_amt' in col_l):
+            parts['basic_amt'] += num(col)
+        elif 'fashion' in col_l and ('qty' in col_l or 'quantity' in col_l):
+            parts['fashion_qty'] += num(col)
+        elif is_basic and ('qty' in col_l or 'quantity' in col_l):
+            parts['basic_qty'] += num(col)
+
+    # Keyword heuristic via subcategory when explicit columns are missing or zero
+    if not constant_api_split and has_subcategory and (sales_amt_col or qty_col):
+        row_is_fashion = _is_fashion_subcategory_series(sales_df['sub_cate_name'])
+        if sales_amt_col:
+            amt = num(sales_amt_col)
+            parts['alt_fashion_amt'] = amt.where(row_is_fashion, 0.0)
+            parts['alt_basic_amt'] = amt.where(~row_is_fashion, 0.0)
+        if qty_col:
+            qty = num(qty_col)
+            parts['alt_fashion_qty'] = qty.where(row_is_fashion, 0.0)
+            parts['alt_basic_qty'] = qty.where(~row_is_fashion, 0.0)
+    return parts, row_is_fashion
+
+def _resolve_store_split(sums: pd.DataFrame) -> pd.DataFrame:
+    """Per-store fashion/basic amount and quantity from the summed components."""
+    zeros = pd.Series(0.0, index=sums.index)
+    fashion_amt = sums.get('fashion_amt', zeros)
+    basic_amt = sums.get('basic_amt', zeros)
+    fashion_qty = sums.get('fashion_qty', zeros)
+    basic_qty = sums.get('basic_qty', zeros)
+
+    amt_zero = (fashion_amt == 0.0) & (basic_amt == 0.0)
+    qty_zero = (fashion_qty == 0.0) & (basic_qty == 0.0)
+    if 'alt_fashion_amt' in sums:
+        fashion_amt = fashion_amt.where(~amt_zero, sums['alt_fashion_amt'])
+        basic_amt = basic_amt.where(~amt_zero, sums['alt_basic_amt'])
+    if 'alt_fashion_qty' in sums:
+        use_alt = amt_zero & qty_zero
+        fashion_qty = fashion_qty.where(~use_alt, sums['alt_fashion_qty'])
+        basic_qty = basic_qty.where(~use_alt, sums['alt_basic_qty'])
+
+    return pd.DataFrame({
+        'fashion_amt': fashion_amt,
+        'basic_amt': basic_amt,
+        'fashion_qty': fashion_qty,
+        'basic_qty': basic_qty,
+    })
+
+def _api_store_class(sales_df: pd.DataFrame, stores: pd.Index) -> pd.Series:
+    """Most frequent API ``str_type`` per store mapped to 'Basic'/'Fashion' (None when absent)."""
+    api_class = pd.Series(None, index=stores, dtype=object)
+    if 'str_type' not in sales_df.columns:
+        return api_class
+    hints = pd.DataFrame({
+        'str_code': sales_df['str_code'],
+        'hint': sales_df['str_type'],
+    }).dropna(subset=['hint'])
+    if hints.empty:
+        return api_class
+    hints['hint'] = hints['hint'].astype(str)
+    counts = hints.groupby(['str_code', 'hint'], dropna=False).size().reset_index(name='n')
+    # Mode with ties resolved to the smallest value, as Series.mode() does
+    mode = (counts.sort_values(['n', 'hint'], ascending=[False, True], kind='mergesort')
+                  .drop_duplicates('str_code')
+                  .set_index('str_code')['hint'])
+    lowered = mode.str.lower()
+    is_basic = mode.str.contains('基础', regex=False) | lowered.str.contains('basic', regex=False)
+    is_fashion = mode.str.contains('流行', regex=False) | lowered.str.contains('fashion', regex=False)
+    mapped = pd.Series(np.select([is_basic, is_fashion], ['Basic', 'Fashion'], default=''), index=mode.index)
+    mapped = mapped.reindex(stores)
+    return api_class.where(~mapped.isin(['Basic', 'Fashion']), mapped)
+
+def _estimate_capacity_vectorized(total_sales: pd.Series, sku_count: pd.Series) -> pd.DataFrame:
+    """Column-wise ``estimate_store_capacity_from_real_data`` (size tier, capacity, rationale)."""
+    sales_per_sku = (total_sales / sku_count.where(sku_count > 0)).fillna(0.0)
+    capacity_multiplier = np.select([sales_per_sku > 1000, sales_per_sku > 500], [1.5, 1.2], default=1.0)
+    estimated_capacity = (sku_count * 2 * capacity_multiplier).astype(np.int64)
+
+    large = estimated_capacity >= 500
+    medium = estimated_capacity >= 200
+    skus = sku_count.astype(str)
+    rationale = np.select(
+        [large, medium],
+        ["High SKU diversity (" + skus + " SKUs) + strong sales velocity",
+         "Moderate SKU diversity (" + skus + " SKUs) + decent sales"],
+        default="Limited SKU diversity (" + skus + " SKUs) + lower sales volume",
+    )
+    return pd.DataFrame({
+        'size_tier': np.select([large, medium], ['Large', 'Medium'], default='Small'),
+        'estimated_rack_capacity': estimated_capacity,
+        'capacity_rationale': rationale,
+    }, index=sku_count.index)
+
+def _store_fingerprints(sales_df: pd.DataFrame, row_is_fashion: pd.Series) -> pd.Series:
+    """
+    Order-insensitive hash of each store's rows (plus the taxonomy flag applied
+    to them), used to detect stores whose sales changed since a previous run.
+    """
+    hashed = sales_df.assign(_row_is_fashion=row_is_fashion.values)
+    row_hash = pd.util.hash_pandas_object(hashed, index=False)
+    sums = row_hash.groupby(sales_df['str_code'].values, sort=False, dropna=False).sum()
+    return sums.map(lambda h: f"{int(h):016x}")
+
+def _classify_stores(stores: pd.DataFrame, api_class: pd.Series) -> pd.DataFrame:
+    """Ratio-first store type with API tie-breaks, style profile and confidence."""
+    fashion_ratio = stores['fashion_ratio']
+    basic_ratio = stores['basic_ratio']
+
+    # Primary classification policy (NO synthetic/fallback):
+    # 1) Compute ratio-based class using blended fashion_ratio with symmetric thresholds.
+    # 2) Use API label 'str_type' (基础=Basic, 流行=Fashion) only as a tie-breaker in the gray band.
+    # 3) Balanced is assigned for blended ratios in [35, 65].
+    # 4) Profiles are derived from final class and ratio magnitude.
+    #    API label does not override a strong opposing ratio.
+    upper_fashion_cut = 65.0
+    lower_basic_cut = 35.0
+    store_type = pd.Series(
+        np.select([fashion_ratio >= upper_fashion_cut, fashion_ratio <= lower_basic_cut],
+                  ['Fashion', 'Basic'], default='Balanced'),
+        index=stores.index,
+    )
+    # Tie-breaker: if within 5% of a boundary, align to API label when present
+    has_api = api_class.isin(['Fashion', 'Basic'])
+    near_boundary = ((fashion_ratio - upper_fashion_cut).abs() <= 5.0) | ((fashion_ratio - lower_basic_cut).abs() <= 5.0)
+    store_type = store_type.where(~(has_api & (store_type == 'Balanced') & near_boundary), api_class)
+
+    profile = np.select(
+        [
+            (store_type == 'Fashion') & (fashion_ratio >= 80.0),
+            store_type == 'Fashion',
+            (store_type == 'Basic') & (basic_ratio >= 80.0),
+            store_type == 'Basic',
+            (fashion_ratio - 50.0).abs() <= 10.0,
+            fashion_ratio > 50.0,
+        ],
+        ['Fashion-Heavy', 'Fashion-Focused', 'Basic-Heavy', 'Basic-Focused',
+         'Perfectly-Balanced', 'Fashion-Leaning'],
+        default='Basic-Leaning',
+    )
+
+    # Confidence: higher when API label present and when ratio far from 50%
+    distance = (fashion_ratio - 50.0).abs() / 50.0
+    confidence = np.minimum(1.0, np.where(has_api, 0.6 + 0.4 * distance, 0.4 + 0.6 * distance))
+
+    return pd.DataFrame({
+        'store_type': store_type,
+        'store_style_profile': profile,
+        'type_confidence_score': confidence,
+    }, index=stores.index)
+
+def _aggregate_store_attributes(sales_df: pd.DataFrame, parts: pd.DataFrame) -> pd.DataFrame:
+    """All store attributes for the given rows in one grouped aggregation."""
+    work = parts.copy()
+    work['str_code'] = sales_df['str_code'].values
+    spec = {col: (col, 'sum') for col in parts.columns}
+    for source, name in [('spu_code', 'sku_diversity'), ('cate_name', 'category_count'),
+                         ('sub_cate_name', 'subcategory_count')]:
+        if source in sales_df.columns:
+            work[source] = sales_df[source].values
+            spec[name] = (source, 'nunique')
+    grouped = work.groupby('str_code', sort=False, dropna=False)
+    sums = grouped.agg(**spec) if spec else pd.DataFrame(index=grouped.size().index)
+    for name in ['sku_diversity', 'category_count', 'subcategory_count']:
+        if name not in sums:
+            sums[name] = 0
+
+    split = _resolve_store_split(sums)
+    total_qty = split['basic_qty'] + split['fashion_qty']
+    total_amt = split['basic_amt'] + split['fashion_amt']
+
+    # Blended ratios (amount and quantity) to avoid price bias
+    amt_ratio = split['fashion_amt'] / total_amt.where(total_amt > 0)
+    qty_ratio = split['fashion_qty'] / total_qty.where(total_qty > 0)
+    blended = np.where(
+        amt_ratio.notna() & qty_ratio.notna(),
+        0.5 * amt_ratio + 0.5 * qty_ratio,
+        amt_ratio.fillna(qty_ratio).fillna(0.0),
+    )
+    stores = pd.DataFrame({
+        'fashion_ratio': blended * 100.0,
+        'total_sales_amt': total_amt,
+        'total_sales_qty': total_qty,
+        'sku_diversity': sums['sku_diversity'].astype(int),
+        'category_count': sums['category_count'].astype(int),
+        'subcategory_count': sums['subcategory_count'].astype(int),
+    }, index=sums.index)
+    stores['basic_ratio'] = 100.0 - stores['fashion_ratio']
+
+    classes = _classify_stores(stores, _api_store_class(sales_df, stores.index))
+    capacity = _estimate_capacity_vectorized(total_amt, stores['sku_diversity'])
+    sku = stores['sku_diversity']
+
+    out = pd.concat([stores, classes, capacity], axis=1)
+    out['avg_price_per_unit'] = (total_amt / total_qty.where(total_qty > 0)).fillna(0.0)
+    out['sales_per_sku'] = (total_amt / sku.where(sku > 0)).fillna(0.0)
+    for col in ['fashion_ratio', 'basic_ratio', 'total_sales_amt', 'total_sales_qty',
+                'avg_price_per_unit', 'sales_per_sku']:
+        out[col] = out[col].round(2)
+    out['type_confidence_score'] = out['type_confidence_score'].round(3)
+    out['data_source'] = 'Real API Sales Data'
+    out['calculation_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return out.rename_axis('str_code').reset_index()
+
+# ===== MAIN ENRICHMENT FUNCTION =====
+def calculate_store_attributes_from_real_data(sales_df: pd.DataFrame, *, force_taxonomy_split: bool = False,
+                                              subcategory_mapping_file: Optional[str] = None,
+                                              previous_attributes: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Calculate comprehensive store attributes using only real sales data.
+
+    All stores are computed together: per-row fashion/basic components are
+    built column-wise (store-level Step 1 splits, taxonomy allocation or keyword
+    heuristic), then summed and counted in a single groupby on ``str_code``.
+
+    Args:
+        sales_df: Real sales data from API (store-level splits and/or SPU rows)
+        force_taxonomy_split: Ignore API fashion/basic split and recompute from taxonomy
+        subcategory_mapping_file: Optional CSV of sub_cate_name -> fashion/basic/neutral tag
+        previous_attributes: Output of a previous run; stores whose ``sales_fingerprint``
+            is unchanged are carried over and only the remaining stores are recomputed
+
+    Returns:
+        DataFrame with enriched store attributes (one row per store, in order of appearance)
+    """
+    print("Calculating store attributes from real data...")
+
+    constant_api_split = _detect_constant_api_split(sales_df, force_taxonomy_split)
+    flags = _subcategory_fashion_flags(sales_df, constant_api_split, subcategory_mapping_file)
+    parts, row_is_fashion = _store_split_components(sales_df, constant_api_split, flags)
+    fingerprints = _store_fingerprints(sales_df, row_is_fashion)
+    print(f"Processing {len(fingerprints):,} unique stores...")
+
+    reused = pd.DataFrame(columns=STORE_ATTRIBUTE_COLUMNS)
+    if previous_attributes is not None and not previous_attributes.empty \
+            and {'str_code', 'sales_fingerprint'}.issubset(previous_attributes.columns):
+        previous = previous_attributes[[c for c in STORE_ATTRIBUTE_COLUMNS if c in previous_attributes.columns]].copy()
+        previous['str_code'] = previous['str_code'].astype(str)
+        previous['sales_fingerprint'] = previous['sales_fingerprint'].astype(str).str.zfill(16)
+        previous = previous.drop_duplicates('str_code', keep='last').set_index('str_code')
+        current = pd.Series(fingerprints.values, index=fingerprints.index.astype(str))
+        unchanged = current[current == previous['sales_fingerprint'].reindex(current.index)].index
+        reused = previous.loc[unchanged].rename_axis('str_code').reset_index()
+        print(f"  Incremental update: {len(reused):,} unchanged stores reused, "
+              f"{len(fingerprints) - len(reused):,} recomputed")
+
+    if len(reused):
+        changed = ~sales_df['str_code'].astype(str).isin(reused['str_code'])
+        computed = _aggregate_store_attributes(sales_df[changed], parts[changed])
+    else:
+        computed = _aggregate_store_attributes(sales_df, parts)
+    computed['sales_fingerprint'] = computed['str_code'].map(fingerprints)
+
+    if len(reused):
+        order = pd.Series(range(len(fingerprints)), index=fingerprints.index.astype(str))
+        computed = pd.concat([computed, reused], ignore_index=True)
+        computed = computed.iloc[np.argsort(computed['str_code'].astype(str).map(order).values, kind='stable')]
+        computed = computed.reset_index(drop=True)
+
+    return computed[STORE_ATTRIBUTE_COLUMNS]
 
 def merge_with_existing_data(enriched_df: pd.DataFrame, temp_df: pd.DataFrame, 
                            cluster_df: pd.DataFrame) -> pd.DataFrame:
@@ -796,11 +896,18 @@ def main():
     temp_df = load_temperature_data()
     cluster_df = load_clustering_data(target_yyyymm, target_period)
     
+    previous_df = None
+    previous_file = getattr(args, 'previous_attributes', None)
+    if previous_file and os.path.exists(previous_file):
+        print(f"✓ Loading previous store attributes for incremental update: {previous_file}")
+        previous_df = pd.read_csv(previous_file, dtype={'str_code': str, 'sales_fingerprint': str})
+
     # Calculate store attributes from real data
     enriched_df = calculate_store_attributes_from_real_data(
         sales_df,
         force_taxonomy_split=getattr(args, 'force_taxonomy_split', False),
-        subcategory_mapping_file=getattr(args, 'subcategory_mapping', None)
+        subcategory_mapping_file=getattr(args, 'subcategory_mapping', None),
+        previous_attributes=previous_df,
     )
     
     if enriched_df.empty:
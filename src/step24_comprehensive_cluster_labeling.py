@@ -22,8 +22,14 @@ import json
 from datetime import datetime
 from typing import Dict, Tuple, Any, Optional, List
 import warnings
-from tqdm import tqdm
 from collections import Counter
+
+try:
+    from sklearn.metrics import silhouette_samples
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
 # Resilient imports for module vs script execution
 try:
     from src.config import get_period_label
@@ -506,282 +512,404 @@ def calculate_fashion_basic_makeup(cluster_stores: List[str], fashion_basic_df:
         'data_source': data_source
     }
 
-def calculate_temperature_profile(cluster_stores: List[str], temperature_df: pd.DataFrame) -> Dict[str, Any]:
-    """Calculate temperature characteristics for a cluster"""
-    
+# ===== VECTORIZED LABELING ENGINE =====
+# Store→cluster membership is joined once onto each source; every profile is
+# then one groupby over the joined rows instead of an isin filter per cluster.
+
+# Per-cluster silhouette metrics written by Step 6 (first file listing a cluster wins)
+SILHOUETTE_METRICS_FILES = [
+    "output/per_cluster_metrics_spu.csv",
+    "output/per_cluster_metrics_subcategory.csv",
+    "output/cluster_quality_metrics.csv"
+]
+
+# Store × feature matrices Step 6 clusters on; used to compute silhouette
+# samples for clusters that have no Step 6 metrics
+FEATURE_MATRIX_FILES = [
+    "data/normalized_spu_limited_matrix.csv",
+    "data/normalized_subcategory_matrix.csv",
+]
+
+NO_FASHION_SOURCES = ['no data available', 'no sales data', 'stores not in sales data']
+
+def _cluster_membership(clustering_df: pd.DataFrame, cluster_col: str) -> pd.DataFrame:
+    """Unique (str_code, cluster_id) pairs from the clustering results."""
+    membership = pd.DataFrame({
+        'str_code': clustering_df['str_code'].astype(str).values,
+        'cluster_id': clustering_df[cluster_col].values,
+    })
+    return membership.drop_duplicates()
+
+def _join_clusters(source: pd.DataFrame, membership: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """Rows of ``source`` (selected columns) tagged with the cluster of their store, in source order."""
+    keep = ['str_code'] + [c for c in dict.fromkeys(columns) if c != 'str_code']
+    rows = source[keep].copy()
+    rows['str_code'] = rows['str_code'].astype(str)
+    return rows.merge(membership, on='str_code', how='inner')
+
+def _classify_fashion_basic(fashion_ratio: pd.Series, basic_ratio: pd.Series) -> np.ndarray:
+    return np.select(
+        [fashion_ratio >= 60, basic_ratio >= 60, (fashion_ratio - basic_ratio).abs() <= 15, fashion_ratio > basic_ratio],
+        ['Fashion-Focused', 'Basic-Focused', 'Balanced', 'Fashion-Leaning'],
+        default='Basic-Leaning',
+    )
+
+def fashion_basic_profiles(membership: pd.DataFrame, fashion_basic_df: pd.DataFrame,
+                           clusters: pd.Index) -> pd.DataFrame:
+    """
+    Fashion/basic makeup of every cluster (same rules as ``calculate_fashion_basic_makeup``).
+
+    Sales-weighted enriched ratios are used where available, then summed
+    fashion/basic amounts or quantities. Clusters left without a signal go
+    through ``calculate_fashion_basic_makeup`` for its API/precomputed-ratio fallbacks.
+    """
+    profiles = pd.DataFrame({
+        'fashion_ratio': 0.0,
+        'basic_ratio': 0.0,
+        'fashion_basic_classification': 'Unknown',
+        'data_source': 'No data available',
+    }, index=clusters)
+    if fashion_basic_df.empty:
+        return profiles
+    profiles['fashion_basic_classification'] = 'No cluster data'
+    profiles['data_source'] = 'Stores not in sales data'
+
+    columns = fashion_basic_df.columns
+    split_cols: Dict[str, str] = {}
+    for col in columns:
+        col_l = col.lower()
+        if 'fashion' in col_l and 'amt' in col_l:
+            split_cols[col] = 'fashion_amt'
+        elif 'fashion' in col_l and 'qty' in col_l:
+            split_cols[col] = 'fashion_qty'
+        elif 'basic' in col_l and 'amt' in col_l:
+            split_cols[col] = 'basic_amt'
+        elif 'basic' in col_l and 'qty' in col_l:
+            split_cols[col] = 'basic_qty'
+    ratio_cols = ['fashion_ratio', 'total_sales_amt'] if {'fashion_ratio', 'total_sales_amt'}.issubset(columns) else []
+
+    joined = _join_clusters(fashion_basic_df, membership, ratio_cols + list(split_cols))
+    with_rows = clusters[clusters.isin(joined['cluster_id'].unique())]
+    resolved = pd.Series(False, index=clusters)
+
+    # 1) Enriched store attributes ratios: per-store sales-weighted, then across stores
+    if ratio_cols:
+        fr = pd.to_numeric(joined['fashion_ratio'], errors='coerce')
+        rated = joined.loc[fr.notna(), ['cluster_id', 'str_code']]
+        weight = pd.to_numeric(joined.loc[fr.notna(), 'total_sales_amt'], errors='coerce').fillna(0)
+        rated = rated.assign(fw=fr[fr.notna()] * (weight + 1e-6), wp=weight + 1e-6, w=weight)
+        stores = rated.groupby(['cluster_id', 'str_code']).agg(fw=('fw', 'sum'), wp=('wp', 'sum'), w=('w', 'sum'))
+        stores['ratio'] = stores['fw'] / stores['wp']
+        stores['rw'] = stores['ratio'] * (stores['w'] + 1e-6)
+        stores['sw'] = stores['w'] + 1e-6
+        per = stores.groupby(level='cluster_id').agg(rw=('rw', 'sum'), sw=('sw', 'sum'), w=('w', 'sum'),
+                                                     mean=('ratio', 'mean'))
+        value = pd.Series(np.where(per['w'] > 0, per['rw'] / per['sw'], per['mean']), index=per.index)
+        value = value.where(value > 1.0, value * 100.0)
+        value = value.reindex(clusters).dropna()
+        profiles.loc[value.index, 'fashion_ratio'] = value
+        profiles.loc[value.index, 'basic_ratio'] = 100.0 - value
+        profiles.loc[value.index, 'data_source'] = 'Enriched store attributes ratios'
+        resolved[value.index] = True
+
+    # 2) Real fashion/basic sales amounts (primary) or quantities (fallback)
+    pending = with_rows[~resolved[with_rows].values]
+    if len(pending):
+        parts = pd.DataFrame({'cluster_id': joined['cluster_id']})
+        for target in ['fashion_amt', 'fashion_qty', 'basic_amt', 'basic_qty']:
+            parts[target] = 0.0
+        for col, target in split_cols.items():
+            parts[target] += pd.to_numeric(joined[col], errors='coerce').fillna(0)
+        sums = parts.groupby('cluster_id').sum().reindex(pending)
+        total_amt = sums['fashion_amt'] + sums['basic_amt']
+        total_qty = sums['fashion_qty'] + sums['basic_qty']
+        by_amt = total_amt > 0
+        by_qty = ~by_amt & (total_qty > 0)
+
+        amt_ids = sums.index[by_amt]
+        profiles.loc[amt_ids, 'fashion_ratio'] = (sums['fashion_amt'] / total_amt * 100)[by_amt]
+        profiles.loc[amt_ids, 'basic_ratio'] = (sums['basic_amt'] / total_amt * 100)[by_amt]
+        profiles.loc[amt_ids, 'data_source'] = 'Real sales amount data'
+        qty_ids = sums.index[by_qty]
+        profiles.loc[qty_ids, 'fashion_ratio'] = (sums['fashion_qty'] / total_qty * 100)[by_qty]
+        profiles.loc[qty_ids, 'basic_ratio'] = (sums['basic_qty'] / total_qty * 100)[by_qty]
+        profiles.loc[qty_ids, 'data_source'] = 'Real sales quantity data'
+        resolved[amt_ids] = True
+        resolved[qty_ids] = True
+
+    profiles['fashion_ratio'] = profiles['fashion_ratio'].astype(float)
+    profiles['basic_ratio'] = profiles['basic_ratio'].astype(float)
+    done = resolved[resolved].index
+    profiles.loc[done, 'fashion_basic_classification'] = _classify_fashion_basic(
+        profiles.loc[done, 'fashion_ratio'], profiles.loc[done, 'basic_ratio'])
+    profiles[['fashion_ratio', 'basic_ratio']] = profiles[['fashion_ratio', 'basic_ratio']].round(1)
+
+    # 3) Rare fallbacks (API split file, precomputed ratio columns) per remaining cluster
+    for cluster_id in with_rows[~resolved[with_rows].values]:
+        cluster_stores = membership.loc[membership['cluster_id'] == cluster_id, 'str_code'].tolist()
+        profile = calculate_fashion_basic_makeup(cluster_stores, fashion_basic_df)
+        profiles.loc[cluster_id, list(profile)] = list(profile.values())
+    return profiles
+
+def temperature_profiles(membership: pd.DataFrame, temperature_df: pd.DataFrame,
+                         clusters: pd.Index) -> pd.DataFrame:
+    """Average/range of feels-like temperature, dominant band and climate class per cluster."""
+    profiles = pd.DataFrame({
+        'avg_feels_like_temp': 0.0,
+        'temp_range': 'Unknown',
+        'dominant_temp_band': 'Unknown',
+        'temperature_classification': 'No data',
+        'data_source': 'Unknown',
+    }, index=clusters)
     if temperature_df.empty:
-        return {
-            'avg_feels_like_temp': 0.0,
-            'temp_range': 'Unknown',
-            'dominant_temp_band': 'Unknown',
-            'temperature_classification': 'No data'
-        }
-    
-    # Filter temperature data for cluster stores
-    cluster_temp = temperature_df[temperature_df['str_code'].isin(cluster_stores)]
-    
-    if cluster_temp.empty:
-        return {
-            'avg_feels_like_temp': 0.0,
-            'temp_range': 'Unknown',
-            'dominant_temp_band': 'Unknown',
-            'temperature_classification': 'No cluster data'
-        }
-    
-    # Calculate temperature metrics
+        return profiles
+    profiles['temperature_classification'] = 'No cluster data'
+
     feels_like_col = 'feels_like_temperature'
-    if feels_like_col not in cluster_temp.columns:
-        feels_like_col = [col for col in cluster_temp.columns if 'feels_like' in col.lower()]
-        feels_like_col = feels_like_col[0] if feels_like_col else None
-    
+    if feels_like_col not in temperature_df.columns:
+        candidates = [col for col in temperature_df.columns if 'feels_like' in col.lower()]
+        feels_like_col = candidates[0] if candidates else None
+    band_col = 'temperature_band' if 'temperature_band' in temperature_df.columns else None
+
+    joined = _join_clusters(temperature_df, membership, [c for c in [feels_like_col, band_col] if c])
+    present = clusters[clusters.isin(joined['cluster_id'].unique())]
+    if not len(present):
+        return profiles
+
     if feels_like_col:
-        avg_temp = cluster_temp[feels_like_col].mean()
-        min_temp = cluster_temp[feels_like_col].min()
-        max_temp = cluster_temp[feels_like_col].max()
-        temp_range = f"{min_temp:.1f}°C to {max_temp:.1f}°C"
+        temps = pd.to_numeric(joined[feels_like_col], errors='coerce').groupby(joined['cluster_id'])
+        stats = pd.DataFrame({'avg': temps.mean(), 'min': temps.min(), 'max': temps.max()}).reindex(present)
+        avg_temp = stats['avg']
+        temp_range = [f"{lo:.1f}°C to {hi:.1f}°C" for lo, hi in zip(stats['min'], stats['max'])]
+        data_source = 'Temperature data'
     else:
-        avg_temp = 0.0
+        avg_temp = pd.Series(0.0, index=present)
         temp_range = "No temperature data"
-    
-    # Determine dominant temperature band
-    temp_band_col = 'temperature_band'
-    if temp_band_col in cluster_temp.columns:
-        band_counts = cluster_temp[temp_band_col].value_counts()
-        dominant_band = band_counts.index[0] if len(band_counts) > 0 else 'Unknown'
-    else:
-        dominant_band = 'Unknown'
-    
-    # Classify temperature profile
-    if avg_temp >= 25:
-        temp_classification = 'Hot Climate'
-    elif avg_temp <= 10:
-        temp_classification = 'Cold Climate'
-    elif 15 <= avg_temp <= 25:
-        temp_classification = 'Moderate Climate'
-    elif 10 < avg_temp < 15:
-        temp_classification = 'Cool Climate'
-    else:
-        temp_classification = 'Unknown'
-    
-    return {
-        'avg_feels_like_temp': round(avg_temp, 1),
-        'temp_range': temp_range,
-        'dominant_temp_band': dominant_band,
-        'temperature_classification': temp_classification,
-        'data_source': 'Temperature data' if feels_like_col else 'No data available'
-    }
-
-def calculate_capacity_profile(cluster_stores: List[str], capacity_df: pd.DataFrame, sales_df: pd.DataFrame) -> Dict[str, Any]:
-    """Calculate capacity characteristics for a cluster"""
-    
-    # Try to get capacity from existing capacity data
-    if not capacity_df.empty:
-        cluster_capacity = capacity_df[capacity_df['str_code'].isin(cluster_stores)]
-        
-        if not cluster_capacity.empty:
-            capacity_col = None
-            for col in ['estimated_rack_capacity', 'estimated_capacity', 'capacity']:
-                if col in cluster_capacity.columns:
-                    capacity_col = col
-                    break
-            
-            if capacity_col:
-                avg_capacity = cluster_capacity[capacity_col].mean()
-                total_capacity = cluster_capacity[capacity_col].sum()
-                
-                # Classify capacity tier
-                if avg_capacity >= 500:
-                    capacity_tier = 'Large'
-                elif avg_capacity >= 200:
-                    capacity_tier = 'Medium'
-                else:
-                    capacity_tier = 'Small'
-                
-                return {
-                    'avg_estimated_capacity': round(avg_capacity, 0),
-                    'total_cluster_capacity': round(total_capacity, 0),
-                    'capacity_tier': capacity_tier,
-                    'data_source': 'Real capacity estimates'
-                }
-    
-    # Fallback: estimate from sales data
-    if not sales_df.empty:
-        cluster_sales = sales_df[sales_df['str_code'].isin(cluster_stores)]
-        
-        if not cluster_sales.empty:
-            # Calculate capacity indicators from sales
-            sales_cols = [col for col in cluster_sales.columns if 'sal_amt' in col or 'sales_amt' in col]
-            qty_cols = [col for col in cluster_sales.columns if 'sal_qty' in col or 'sales_qty' in col]
-            
-            if sales_cols:
-                total_sales = cluster_sales[sales_cols].fillna(0).sum().sum()
-                avg_sales_per_store = total_sales / len(cluster_stores)
-                
-                # Estimate capacity based on sales volume (rough heuristic)
-                estimated_capacity = max(50, min(1000, avg_sales_per_store / 100))
-                
-                if estimated_capacity >= 500:
-                    capacity_tier = 'Large'
-                elif estimated_capacity >= 200:
-                    capacity_tier = 'Medium'
-                else:
-                    capacity_tier = 'Small'
-                
-                return {
-                    'avg_estimated_capacity': round(estimated_capacity, 0),
-                    'total_cluster_capacity': round(estimated_capacity * len(cluster_stores), 0),
-                    'capacity_tier': capacity_tier,
-                    'data_source': 'Sales-based estimate'
-                }
-    
-    # No data available
-    return {
+        data_source = 'No data available'
+
+    dominant = pd.Series('Unknown', index=present, dtype=object)
+    if band_col:
+        bands = joined[['cluster_id', band_col]].dropna()
+        # value_counts() order: most frequent first, ties in order of first appearance
+        counts = bands.groupby(['cluster_id', band_col], sort=False).size().reset_index(name='n')
+        top = (counts.sort_values('n', ascending=False, kind='mergesort')
+                     .drop_duplicates('cluster_id')
+                     .set_index('cluster_id')[band_col])
+        dominant = top.reindex(present).where(lambda s: s.notna(), 'Unknown')
+
+    profiles.loc[present, 'avg_feels_like_temp'] = avg_temp.round(1).values
+    profiles.loc[present, 'temp_range'] = temp_range
+    profiles.loc[present, 'dominant_temp_band'] = dominant.values
+    profiles.loc[present, 'temperature_classification'] = np.select(
+        [avg_temp >= 25, avg_temp <= 10, (avg_temp >= 15) & (avg_temp <= 25), (avg_temp > 10) & (avg_temp < 15)],
+        ['Hot Climate', 'Cold Climate', 'Moderate Climate', 'Cool Climate'],
+        default='Unknown',
+    )
+    profiles.loc[present, 'data_source'] = data_source
+    return profiles
+
+def _capacity_tier(capacity: pd.Series) -> np.ndarray:
+    return np.select([capacity >= 500, capacity >= 200], ['Large', 'Medium'], default='Small')
+
+def capacity_profiles(membership: pd.DataFrame, capacity_df: pd.DataFrame, sales_df: pd.DataFrame,
+                      clusters: pd.Index, cluster_sizes: pd.Series) -> pd.DataFrame:
+    """Average store capacity and tier per cluster, estimated from sales where no capacity data exists."""
+    profiles = pd.DataFrame({
         'avg_estimated_capacity': 0,
-        'total_cluster_capacity': 0,
         'capacity_tier': 'Unknown',
-        'data_source': 'No data available'
-    }
+        'data_source': 'No data available',
+    }, index=clusters, dtype=object)
+    resolved = pd.Series(False, index=clusters)
 
-def calculate_cluster_silhouette_score(cluster_df: pd.DataFrame, cluster_id: int) -> Dict[str, Any]:
-    """Get silhouette score for a specific cluster from clustering metrics"""
-    
-    # Look for per-cluster metrics file
-    metrics_files = [
-        "output/per_cluster_metrics_spu.csv",
-        "output/per_cluster_metrics_subcategory.csv",
-        "output/cluster_quality_metrics.csv"
-    ]
-    
-    for metrics_file in metrics_files:
-        if os.path.exists(metrics_file):
+    if not capacity_df.empty:
+        capacity_col = next((c for c in ['estimated_rack_capacity', 'estimated_capacity', 'capacity']
+                             if c in capacity_df.columns), None)
+        if capacity_col:
+            joined = _join_clusters(capacity_df, membership, [capacity_col])
+            avg = pd.to_numeric(joined[capacity_col], errors='coerce').groupby(joined['cluster_id']).mean()
+            avg = avg.reindex(clusters[clusters.isin(avg.index)])
+            profiles.loc[avg.index, 'avg_estimated_capacity'] = avg.round(0).values
+            profiles.loc[avg.index, 'capacity_tier'] = _capacity_tier(avg)
+            profiles.loc[avg.index, 'data_source'] = 'Real capacity estimates'
+            resolved[avg.index] = True
+
+    if not sales_df.empty and not resolved.all():
+        sales_cols = [col for col in sales_df.columns if 'sal_amt' in col or 'sales_amt' in col]
+        if sales_cols:
+            joined = _join_clusters(sales_df, membership, sales_cols)
+            row_sales = joined[sales_cols].apply(pd.to_numeric, errors='coerce').fillna(0).sum(axis=1)
+            total = row_sales.groupby(joined['cluster_id']).sum()
+            pending = clusters[~resolved.values & clusters.isin(total.index)]
+            avg_sales_per_store = total.reindex(pending) / cluster_sizes.reindex(pending)
+            # Rough heuristic: capacity from sales volume, clipped to [50, 1000]
+            estimated = (avg_sales_per_store / 100).clip(lower=50, upper=1000)
+            profiles.loc[pending, 'avg_estimated_capacity'] = estimated.round(0).values
+            profiles.loc[pending, 'capacity_tier'] = _capacity_tier(estimated)
+            profiles.loc[pending, 'data_source'] = 'Sales-based estimate'
+    return profiles
+
+def _load_feature_matrix() -> Optional[pd.DataFrame]:
+    for path in FEATURE_MATRIX_FILES:
+        if os.path.exists(path):
             try:
-                metrics_df = pd.read_csv(metrics_file)
-                if 'Cluster' in metrics_df.columns and 'Avg_Silhouette' in metrics_df.columns:
-                    cluster_metrics = metrics_df[metrics_df['Cluster'] == cluster_id]
-                    if not cluster_metrics.empty:
-                        silhouette_score = cluster_metrics['Avg_Silhouette'].iloc[0]
-                        
-                        # Classify silhouette quality
-                        if silhouette_score >= 0.7:
-                            quality = 'Excellent'
-                        elif silhouette_score >= 0.5:
-                            quality = 'Good'
-                        elif silhouette_score >= 0.3:
-                            quality = 'Fair'
-                        else:
-                            quality = 'Poor'
-                        
-                        return {
-                            'silhouette_score': round(silhouette_score, 3),
-                            'silhouette_quality': quality,
-                            'data_source': metrics_file
-                        }
+                features = pd.read_csv(path, index_col=0)
+                features.index = features.index.astype(str)
+                log_progress(f"   ✓ Loaded feature matrix for silhouette samples: {path}")
+                return features
             except Exception as e:
-                log_progress(f"   ✗ Error reading {metrics_file}: {e}")
-    
-    # Fallback: estimate based on cluster size and characteristics
-    cluster_size = len(cluster_df)
-    if 40 <= cluster_size <= 60:
-        estimated_score = 0.5  # Good size for clustering
-        quality = 'Good (estimated)'
-    elif 20 <= cluster_size <= 80:
-        estimated_score = 0.4  # Reasonable size
-        quality = 'Fair (estimated)'
-    else:
-        estimated_score = 0.3  # Sub-optimal size
-        quality = 'Poor (estimated)'
-    
-    return {
-        'silhouette_score': estimated_score,
+                log_progress(f"   ✗ Error reading {path}: {e}")
+    return None
+
+def silhouette_samples_by_cluster(features: pd.DataFrame, membership: pd.DataFrame) -> pd.Series:
+    """Silhouette sample of every store computed once, averaged per cluster."""
+    if not SKLEARN_AVAILABLE or features is None or features.empty:
+        return pd.Series(dtype=float)
+    labels = membership.drop_duplicates('str_code').set_index('str_code')['cluster_id']
+    labels = labels.reindex(features.index.astype(str))
+    mask = labels.notna().values
+    X = features.loc[mask].select_dtypes(include=[np.number]).fillna(0).values
+    y = labels[mask].values
+    if len(np.unique(y)) < 2 or len(np.unique(y)) >= len(y):
+        return pd.Series(dtype=float)
+    samples = silhouette_samples(X, y)
+    return pd.Series(samples).groupby(y).mean()
+
+def silhouette_profiles(membership: pd.DataFrame, clusters: pd.Index, cluster_sizes: pd.Series,
+                        features: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Silhouette score and quality per cluster: Step 6 per-cluster metrics first,
+    then silhouette samples over the store feature matrix, then a size-based estimate.
+    """
+    scores = pd.Series(np.nan, index=clusters)
+    sources = pd.Series(None, index=clusters, dtype=object)
+
+    for metrics_file in SILHOUETTE_METRICS_FILES:
+        if sources.notna().all() or not os.path.exists(metrics_file):
+            continue
+        try:
+            metrics_df = pd.read_csv(metrics_file)
+            if 'Cluster' in metrics_df.columns and 'Avg_Silhouette' in metrics_df.columns:
+                first = metrics_df.drop_duplicates('Cluster').set_index('Cluster')['Avg_Silhouette']
+                found = clusters[sources.isna().values & clusters.isin(first.index)]
+                scores[found] = first.reindex(found).values
+                sources[found] = metrics_file
+        except Exception as e:
+            log_progress(f"   ✗ Error reading {metrics_file}: {e}")
+
+    missing = sources.isna()
+    if missing.any():
+        if features is None:
+            features = _load_feature_matrix()
+        try:
+            by_cluster = silhouette_samples_by_cluster(features, membership)
+        except Exception as e:
+            log_progress(f"   ✗ Error computing silhouette samples: {e}")
+            by_cluster = pd.Series(dtype=float)
+        found = clusters[missing.values & clusters.isin(by_cluster.index)]
+        scores[found] = by_cluster.reindex(found).values
+        sources[found] = 'Silhouette samples (feature matrix)'
+
+    quality = pd.Series(
+        np.select([scores >= 0.7, scores >= 0.5, scores >= 0.3], ['Excellent', 'Good', 'Fair'], default='Poor'),
+        index=clusters,
+    )
+
+    # Fallback: estimate based on cluster size
+    estimated = sources.isna()
+    if estimated.any():
+        size = cluster_sizes.reindex(clusters).fillna(0)
+        good = (size >= 40) & (size <= 60)
+        fair = ~good & (size >= 20) & (size <= 80)
+        scores[estimated] = np.select([good, fair], [0.5, 0.4], default=0.3)[estimated.values]
+        quality[estimated] = np.select([good, fair], ['Good (estimated)', 'Fair (estimated)'],
+                                       default='Poor (estimated)')[estimated.values]
+        sources[estimated] = 'Size-based estimate'
+
+    return pd.DataFrame({
+        'silhouette_score': scores.round(3),
         'silhouette_quality': quality,
-        'data_source': 'Size-based estimate'
-    }
+        'data_source': sources,
+    }, index=clusters)
+
+def build_cluster_labels(clustering_df: pd.DataFrame, fashion_basic_df: pd.DataFrame,
+                         temperature_df: pd.DataFrame, capacity_df: pd.DataFrame,
+                         features: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Comprehensive labels for all clusters from already-loaded sources."""
+    cluster_col = 'Cluster' if 'Cluster' in clustering_df.columns else 'cluster'
+    clusters = pd.Index(sorted(clustering_df[cluster_col].unique()), name='cluster_id')
+    stores = pd.DataFrame({'cluster_id': clustering_df[cluster_col].values,
+                           'str_code': clustering_df['str_code'].astype(str).values})
+    cluster_sizes = stores.groupby('cluster_id').size().reindex(clusters).fillna(0).astype(int)
+    first_stores = stores.groupby('cluster_id').head(10).groupby('cluster_id')['str_code'].agg(','.join)
+    membership = _cluster_membership(clustering_df, cluster_col)
+
+    log_progress(f"   📊 Analyzing {len(clusters)} clusters...")
+    fashion = fashion_basic_profiles(membership, fashion_basic_df, clusters)
+    temperature = temperature_profiles(membership, temperature_df, clusters)
+    capacity = capacity_profiles(membership, capacity_df, fashion_basic_df, clusters, cluster_sizes)
+    silhouette = silhouette_profiles(membership, clusters, cluster_sizes, features)
+
+    labels = pd.DataFrame({
+        'cluster_id': clusters,
+        'cluster_size': cluster_sizes.values,
+        'store_codes': first_stores.reindex(clusters).fillna('').values
+                       + np.where(cluster_sizes.values > 10, '...', ''),
+
+        # Fashion/Basic Profile
+        'fashion_ratio': fashion['fashion_ratio'].values,
+        'basic_ratio': fashion['basic_ratio'].values,
+        'fashion_basic_classification': fashion['fashion_basic_classification'].values,
+        'fashion_basic_data_source': fashion['data_source'].values,
+
+        # Temperature Profile
+        'avg_feels_like_temp': temperature['avg_feels_like_temp'].values,
+        'temp_range': temperature['temp_range'].values,
+        'dominant_temp_band': temperature['dominant_temp_band'].values,
+        'temperature_classification': temperature['temperature_classification'].values,
+        'temperature_data_source': temperature['data_source'].values,
+
+        # Capacity Profile
+        'avg_estimated_capacity': capacity['avg_estimated_capacity'].values,
+        'capacity_tier': capacity['capacity_tier'].values,
+        'capacity_data_source': capacity['data_source'].values,
+
+        # Quality Metrics
+        'silhouette_score': silhouette['silhouette_score'].values,
+        'silhouette_quality': silhouette['silhouette_quality'].values,
+        'silhouette_data_source': silhouette['data_source'].values,
+    })
+
+    # Comprehensive Label
+    labels['comprehensive_label'] = (
+        "Cluster " + labels['cluster_id'].astype(str) + ": " + labels['fashion_basic_classification']
+        + " | " + labels['temperature_classification'] + " | " + labels['capacity_tier']
+        + " Capacity | " + labels['silhouette_quality'] + " Quality"
+    )
+
+    # Metadata
+    labels['analysis_timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    # Count any concrete sources (includes temperature; treats estimates as valid)
+    labels['total_data_sources'] = (
+        (~labels['fashion_basic_data_source'].astype(str).str.lower().isin(NO_FASHION_SOURCES)).astype(int)
+        + (labels['temperature_data_source'].astype(str).str.lower() != 'no data available').astype(int)
+        + (labels['capacity_data_source'].astype(str).str.strip() != '').astype(int)
+        + labels['silhouette_data_source'].astype(bool).astype(int)
+    )
+    return labels.infer_objects()
 
 # ===== MAIN LABELING FUNCTION =====
 
 def generate_comprehensive_cluster_labels(period_label: Optional[str] = None) -> pd.DataFrame:
     """Generate comprehensive labels for all clusters"""
     log_progress("🏷️ Generating comprehensive cluster labels...")
-    
+
     # Load all data sources
     clustering_df = load_clustering_data(period_label)
     fashion_basic_df = load_fashion_basic_data()
     temperature_df = load_temperature_data()
     capacity_df = load_capacity_data()
-    
-    # Get unique clusters
-    cluster_col = 'Cluster' if 'Cluster' in clustering_df.columns else 'cluster'
-    unique_clusters = sorted(clustering_df[cluster_col].unique())
-    
-    log_progress(f"   📊 Analyzing {len(unique_clusters)} clusters...")
-    
-    cluster_labels = []
-    
-    for cluster_id in tqdm(unique_clusters, desc="Processing clusters"):
-        # Get stores in this cluster
-        cluster_stores = clustering_df[clustering_df[cluster_col] == cluster_id]['str_code'].tolist()
-        cluster_size = len(cluster_stores)
-        
-        log_progress(f"   🔍 Analyzing Cluster {cluster_id}: {cluster_size} stores")
-        
-        # Calculate fashion/basic makeup
-        fashion_basic_profile = calculate_fashion_basic_makeup(cluster_stores, fashion_basic_df)
-        
-        # Calculate temperature profile
-        temperature_profile = calculate_temperature_profile(cluster_stores, temperature_df)
-        
-        # Calculate capacity profile
-        capacity_profile = calculate_capacity_profile(cluster_stores, capacity_df, fashion_basic_df)
-        
-        # Get silhouette score
-        silhouette_profile = calculate_cluster_silhouette_score(clustering_df, cluster_id)
-        
-        # Create comprehensive label
-        cluster_label = {
-            'cluster_id': cluster_id,
-            'cluster_size': cluster_size,
-            'store_codes': ','.join(cluster_stores[:10]) + ('...' if cluster_size > 10 else ''),
-            
-            # Fashion/Basic Profile
-            'fashion_ratio': fashion_basic_profile['fashion_ratio'],
-            'basic_ratio': fashion_basic_profile['basic_ratio'],
-            'fashion_basic_classification': fashion_basic_profile['fashion_basic_classification'],
-            'fashion_basic_data_source': fashion_basic_profile['data_source'],
-            
-            # Temperature Profile
-            'avg_feels_like_temp': temperature_profile['avg_feels_like_temp'],
-            'temp_range': temperature_profile['temp_range'],
-            'dominant_temp_band': temperature_profile['dominant_temp_band'],
-            'temperature_classification': temperature_profile['temperature_classification'],
-            'temperature_data_source': temperature_profile.get('data_source', 'Unknown'),
-            
-            # Capacity Profile
-            'avg_estimated_capacity': capacity_profile['avg_estimated_capacity'],
-            'capacity_tier': capacity_profile['capacity_tier'],
-            'capacity_data_source': capacity_profile['data_source'],
-            
-            # Quality Metrics
-            'silhouette_score': silhouette_profile['silhouette_score'],
-            'silhouette_quality': silhouette_profile['silhouette_quality'],
-            'silhouette_data_source': silhouette_profile['data_source'],
-            
-            # Comprehensive Label
-            'comprehensive_label': f"Cluster {cluster_id}: {fashion_basic_profile['fashion_basic_classification']} | {temperature_profile['temperature_classification']} | {capacity_profile['capacity_tier']} Capacity | {silhouette_profile['silhouette_quality']} Quality",
-            
-            # Metadata
-            'analysis_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            # Count any concrete sources (includes temperature; treats estimates as valid)
-            'total_data_sources': sum([
-                int(str(fashion_basic_profile.get('data_source', '')).lower() not in ['no data available', 'no sales data', 'stores not in sales data']),
-                int(str(temperature_profile.get('data_source', '')).lower() not in ['no data available']),
-                int(str(capacity_profile.get('data_source', '')).strip() != ''),
-                int(bool(silhouette_profile.get('data_source', '')))
-            ])
-        }
-        
-        cluster_labels.append(cluster_label)    
-    
-    return pd.DataFrame(cluster_labels)
+
+    return build_cluster_labels(clustering_df, fashion_basic_df, temperature_df, capacity_df)
 
 def generate_store_tags(period_label: Optional[str] = None) -> pd.DataFrame:
     """Generate per-store tags by merging cluster membership with enriched store attributes.
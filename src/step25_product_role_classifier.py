@@ -39,6 +39,8 @@ Version: 1.0 - Methodical Implementation
  Period Handling Patterns
  - Source sales (what this step loads): from PIPELINE_YYYYMM/PIPELINE_PERIOD
  - Output labeling (filenames): from --target-yyyymm/--target-period
+ - Product metrics and roles come from src/product_metrics.py and are cached per label under
+   output/cache (PRODUCT_METRICS_CACHE_DIR); Steps 26, 27 reuse the cache for the same sales.
 
  Best Practices & Pitfalls
  - Do NOT point to synthetic combined files; the loader forbids them.
@@ -66,9 +68,11 @@ import json
 from datetime import datetime
 from typing import Dict, Tuple, Any, Optional, List
 import warnings
-from tqdm import tqdm
 from src.config import get_period_label
 from src.pipeline_manifest import register_step_output
+from src.product_metrics import (
+    product_metrics, classify_product_roles, cluster_product_metrics, cluster_context, get_product_metrics
+)
 
 # Suppress pandas warnings
 warnings.filterwarnings('ignore')
@@ -209,137 +213,24 @@ def calculate_product_metrics(sales_df: pd.DataFrame) -> pd.DataFrame:
     """Calculate comprehensive metrics for each product (SPU)"""
     log_progress("📊 Calculating product performance metrics...")
     
-    product_metrics = []
+    metrics = product_metrics(sales_df)
     
-    for spu_code in tqdm(sales_df['spu_code'].unique(), desc="Analyzing products"):
-        spu_data = sales_df[sales_df['spu_code'] == spu_code]
-        
-        if len(spu_data) == 0:
-            continue
-            
-        # Basic sales metrics
-        total_fashion_sales = spu_data['fashion_sal_amt'].sum()
-        total_basic_sales = spu_data['basic_sal_amt'].sum()
-        total_sales = total_fashion_sales + total_basic_sales
-        
-        # Store coverage metrics
-        stores_selling = len(spu_data)
-        total_stores = len(sales_df['str_code'].unique())
-        store_coverage = stores_selling / total_stores
-        
-        # Fashion vs Basic analysis
-        if total_sales > 0:
-            fashion_ratio = total_fashion_sales / total_sales
-            basic_ratio = total_basic_sales / total_sales
-        else:
-            fashion_ratio = 0
-            basic_ratio = 0
-        
-        # Sales consistency (lower std dev / mean = more consistent)
-        store_sales = []
-        for _, row in spu_data.iterrows():
-            store_total = row['fashion_sal_amt'] + row['basic_sal_amt']
-            store_sales.append(store_total)
-        
-        if len(store_sales) > 1 and np.mean(store_sales) > 0:
-            consistency_score = 1 - (np.std(store_sales) / np.mean(store_sales))
-            consistency_score = max(0, min(1, consistency_score))  # Bound between 0-1
-        else:
-            consistency_score = 0
-        
-        # Category information
-        category = spu_data['cate_name'].iloc[0] if len(spu_data) > 0 else 'Unknown'
-        subcategory = spu_data['sub_cate_name'].iloc[0] if len(spu_data) > 0 else 'Unknown'
-        
-        product_metrics.append({
-            'spu_code': spu_code,
-            'total_sales': total_sales,
-            'fashion_sales': total_fashion_sales,
-            'basic_sales': total_basic_sales,
-            'fashion_ratio': fashion_ratio,
-            'basic_ratio': basic_ratio,
-            'stores_selling': stores_selling,
-            'total_stores': total_stores,
-            'store_coverage': store_coverage,
-            'consistency_score': consistency_score,
-            'category': category,
-            'subcategory': subcategory
-        })
-    
-    log_progress(f"   ✓ Calculated metrics for {len(product_metrics):,} products")
-    return pd.DataFrame(product_metrics)
+    log_progress(f"   ✓ Calculated metrics for {len(metrics):,} products")
+    return metrics
 
-def classify_product_role(product_metrics: pd.DataFrame) -> pd.DataFrame:
-    """Classify products into roles based on calculated metrics"""
-    log_progress("🏷️ Classifying products into roles...")
-    
-    results = []
-    thresholds = PRODUCT_ROLE_THRESHOLDS
-    
-    for _, product in tqdm(product_metrics.iterrows(), desc="Classifying products", total=len(product_metrics)):
-        # Initialize classification variables
-        role = 'FILLER'  # Default role
-        confidence = 0.5  # Default confidence
-        rationale = []
-        
-        # Classification logic - proceed step by step
-        
-        # Check for CORE products first (highest tier - top performers)
-        if product['total_sales'] >= thresholds['CORE']['min_total_sales']:
-            role = 'CORE'
-            confidence = 0.95
-            rationale.append(f"Excellent sales performance (¥{product['total_sales']:.0f})")
-            rationale.append("Store-level top performer")
-        
-        # Check for SEASONAL products (fashion-focused)
-        elif (product['fashion_ratio'] >= thresholds['SEASONAL']['fashion_basic_ratio_threshold'] and
-              product['total_sales'] >= thresholds['SEASONAL']['min_total_sales']):
-            
-            role = 'SEASONAL'
-            confidence = 0.90
-            rationale.append(f"Fashion-focused ({product['fashion_ratio']:.0%})")
-            rationale.append(f"Strong sales (¥{product['total_sales']:.0f})")
-            rationale.append("Seasonal appeal product")
-        
-        # Check for CLEARANCE products (low performers)
-        elif product['total_sales'] < thresholds['CLEARANCE']['low_sales_threshold']:
-            
-            role = 'CLEARANCE'
-            confidence = 0.85
-            rationale.append(f"Below-average sales (¥{product['total_sales']:.0f})")
-            rationale.append("Clearance candidate")
-        
-        # Otherwise, classify as FILLER (middle tier)
-        else:
-            role = 'FILLER'
-            confidence = 0.80
-            rationale.append("Solid middle-tier performance")
-            rationale.append(f"Steady sales (¥{product['total_sales']:.0f})")
-            if product['fashion_ratio'] > 0.4 and product['fashion_ratio'] < 0.6:
-                rationale.append("Balanced fashion-basic mix")
-                confidence = 0.85
-        
-        results.append({
-            'spu_code': product['spu_code'],
-            'product_role': role,
-            'confidence_score': confidence,
-            'rationale': '; '.join(rationale),
-            'total_sales': product['total_sales'],
-            'store_coverage': product['store_coverage'],
-            'fashion_ratio': product['fashion_ratio'],
-            'consistency_score': product['consistency_score'],
-            'category': product['category'],
-            'subcategory': product['subcategory']
-        })
-    
-    classification_df = pd.DataFrame(results)
-    
-    # Log classification summary
+def _log_role_counts(classification_df: pd.DataFrame) -> None:
     role_counts = classification_df['product_role'].value_counts()
     log_progress(f"   ✓ Classification complete:")
     for role, count in role_counts.items():
         percentage = (count / len(classification_df)) * 100
         log_progress(f"     • {role}: {count} products ({percentage:.1f}%)")
+
+def classify_product_role(product_metrics: pd.DataFrame) -> pd.DataFrame:
+    """Classify products into roles based on calculated metrics"""
+    log_progress("🏷️ Classifying products into roles...")
+    
+    classification_df = classify_product_roles(product_metrics, PRODUCT_ROLE_THRESHOLDS)
+    _log_role_counts(classification_df)
     
     return classification_df
 
@@ -347,49 +238,8 @@ def add_cluster_context(classification_df: pd.DataFrame, sales_df: pd.DataFrame,
     """Add cluster context to product classifications"""
     log_progress("🔗 Adding cluster context to classifications...")
     
-    # Merge sales data with cluster information
-    sales_with_clusters = sales_df.merge(cluster_df[['str_code', 'cluster_id']], on='str_code', how='left')
-    
-    # Calculate cluster-level metrics for each product
-    enhanced_results = []
-    
-    for _, product in tqdm(classification_df.iterrows(), desc="Adding cluster context", total=len(classification_df)):
-        spu_code = product['spu_code']
-        
-        # Get sales data for this product across clusters
-        spu_cluster_data = sales_with_clusters[sales_with_clusters['spu_code'] == spu_code]
-        
-        if len(spu_cluster_data) > 0:
-            # Calculate cluster distribution
-            cluster_sales = spu_cluster_data.groupby('cluster_id').agg({
-                'fashion_sal_amt': 'sum',
-                'basic_sal_amt': 'sum'
-            }).reset_index()
-            
-            cluster_sales['total_sales'] = cluster_sales['fashion_sal_amt'] + cluster_sales['basic_sal_amt']
-            
-            # Find dominant cluster
-            if len(cluster_sales) > 0:
-                dominant_cluster = cluster_sales.loc[cluster_sales['total_sales'].idxmax(), 'cluster_id']
-                cluster_count = len(cluster_sales)
-            else:
-                dominant_cluster = 0
-                cluster_count = 0
-        else:
-            dominant_cluster = 0
-            cluster_count = 0
-        
-        # Create enhanced record
-        enhanced_record = product.to_dict()
-        enhanced_record.update({
-            'dominant_cluster': dominant_cluster,
-            'clusters_present': cluster_count,
-            'cluster_distribution': 'wide' if cluster_count >= 3 else 'narrow'
-        })
-        
-        enhanced_results.append(enhanced_record)
-    
-    enhanced_df = pd.DataFrame(enhanced_results)
+    context = cluster_context(cluster_product_metrics(sales_df, cluster_df), classification_df['spu_code'])
+    enhanced_df = pd.concat([classification_df.reset_index(drop=True), context.drop(columns='spu_code')], axis=1)
     log_progress(f"   ✓ Added cluster context to {len(enhanced_df):,} products")
     
     return enhanced_df
@@ -520,14 +370,11 @@ def main() -> None:
         # Step 1: Load and validate data
         sales_df, cluster_df = load_and_validate_data()
         
-        # Step 2: Calculate product metrics
-        product_metrics = calculate_product_metrics(sales_df)
-        
-        # Step 3: Classify products into roles
-        classification_df = classify_product_role(product_metrics)
-        
-        # Step 4: Add cluster context
-        enhanced_classification = add_cluster_context(classification_df, sales_df, cluster_df)
+        # Steps 2-4: Product metrics, roles and cluster context from the shared kernel
+        # (cached per period, so Steps 26, 27 and 30 reuse the same computation)
+        log_progress("📊 Calculating product metrics, roles and cluster context...")
+        enhanced_classification = get_product_metrics(sales_df, cluster_df, period_label=period_label)['roles']
+        _log_role_counts(enhanced_classification)
         
         # Step 5: Save results (DUAL OUTPUT PATTERN - both timestamped and generic)
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -132,6 +132,7 @@ from tqdm import tqdm
 from itertools import combinations
 from src.config import get_period_label
 from src.pipeline_manifest import get_manifest, register_step_output
+from src.product_metrics import get_product_metrics, store_product_prices
 
 # Suppress pandas warnings
 warnings.filterwarnings('ignore')
@@ -268,63 +269,14 @@ def load_and_validate_data(period_label: Optional[str] = None) -> Tuple[pd.DataF
 
 # ===== PRICE CALCULATION FUNCTIONS =====
 
-def calculate_unit_prices(sales_df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate unit prices for each product at each store"""
+def calculate_unit_prices(sales_df: pd.DataFrame, period_label: Optional[str] = None) -> pd.DataFrame:
+    """Calculate unit prices for each product at each store (shared product-metrics kernel, cached per period)"""
     log_progress("💰 Calculating unit prices from sales data...")
     
-    price_data = []
-    
-    # Precompute available columns to avoid per-row set lookups
-    cols = set(sales_df.columns)
-    has_split_amt = {'fashion_sal_amt','basic_sal_amt'}.issubset(cols)
-    has_split_qty = {'fashion_sal_qty','basic_sal_qty'}.issubset(cols)
-
-    def _get_total_amount(r: pd.Series) -> float:
-        if has_split_amt:
-            return float(r.get('fashion_sal_amt', 0) or 0) + float(r.get('basic_sal_amt', 0) or 0)
-        for c in ['total_amount','spu_sales_amt','sales_amt','sal_amt']:
-            if c in cols:
-                try:
-                    return float(r.get(c, 0) or 0)
-                except Exception:
-                    continue
-        return 0.0
-
-    def _get_total_quantity(r: pd.Series) -> float:
-        if has_split_qty:
-            return float(r.get('fashion_sal_qty', 0) or 0) + float(r.get('basic_sal_qty', 0) or 0)
-        for c in ['total_quantity','quantity','sales_qty','sal_qty']:
-            if c in cols:
-                try:
-                    return float(r.get(c, 0) or 0)
-                except Exception:
-                    continue
-        return 0.0
-
-    for _, row in tqdm(sales_df.iterrows(), desc="Calculating prices", total=len(sales_df)):
-        # Calculate total amounts and quantities with flexible fallbacks
-        total_amount = _get_total_amount(row)
-        total_quantity = _get_total_quantity(row)
-        
-        # Calculate unit price (avoid division by zero)
-        if total_quantity > 0 and total_amount > 0:
-            unit_price = total_amount / total_quantity
-            
-            # Validate reasonable price range (basic sanity check)
-            if 1 <= unit_price <= 1000:  # Reasonable price range for retail items
-                price_data.append({
-                    'str_code': row['str_code'],
-                    'spu_code': row['spu_code'],
-                    'unit_price': unit_price,
-                    'total_amount': total_amount,
-                    'total_quantity': total_quantity,
-                    'fashion_amount': float(row.get('fashion_sal_amt', 0) or 0),
-                    'basic_amount': float(row.get('basic_sal_amt', 0) or 0),
-                    'fashion_quantity': float(row.get('fashion_sal_qty', 0) or 0),
-                    'basic_quantity': float(row.get('basic_sal_qty', 0) or 0)
-                })
-    
-    price_df = pd.DataFrame(price_data)
+    if period_label:
+        price_df = get_product_metrics(sales_df, period_label=period_label)['store_prices']
+    else:
+        price_df = store_product_prices(sales_df)
     log_progress(f"   ✓ Calculated prices for {len(price_df):,} store-product combinations")
     
     if len(price_df) == 0:
@@ -660,7 +612,7 @@ def main() -> None:
         sales_df, product_roles_df = load_and_validate_data(period_label=period_label)
         
         # Step 2: Calculate unit prices
-        price_df = calculate_unit_prices(sales_df)
+        price_df = calculate_unit_prices(sales_df, period_label=period_label)
         
         # Step 3: Classify price bands
         price_bands_df = classify_price_bands(price_df, product_roles_df)
@@ -50,18 +50,17 @@ import numpy as np
 import os
 import json
 from datetime import datetime
-from typing import Dict, Tuple, Any, List, Optional
+from typing import Callable, Dict, Tuple, Any, List, Optional
 import warnings
-from tqdm import tqdm
 from src.config import get_period_label
 from src.pipeline_manifest import get_manifest, register_step_output
+from src.product_metrics import cluster_product_metrics, get_product_metrics
+from src.excel_export import StreamingWorkbook, CellStyle, ConditionalFormat, fit_column_widths
 
 # Excel formatting dependencies
 try:
-    import openpyxl
-    from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-    from openpyxl.formatting.rule import ColorScaleRule, CellIsRule
-    from openpyxl.utils.dataframe import dataframe_to_rows
+    from openpyxl.styles import PatternFill
+    from openpyxl.formatting.rule import FormulaRule
     EXCEL_AVAILABLE = True
 except ImportError:
     EXCEL_AVAILABLE = False
@@ -320,74 +319,63 @@ def load_and_prepare_data(period_label: Optional[str] = None) -> Tuple[pd.DataFr
 # ===== GAP ANALYSIS FUNCTIONS =====
 
 def analyze_cluster_role_distribution(sales_df: pd.DataFrame, product_roles_df: pd.DataFrame, 
-                                     store_cluster_df: pd.DataFrame) -> pd.DataFrame:
+                                     store_cluster_df: pd.DataFrame,
+                                     period_label: Optional[str] = None) -> pd.DataFrame:
     """Analyze current product role distribution by cluster"""
     log_progress("📊 Analyzing current cluster × role distribution...")
     
-    # Merge sales data with cluster and role information
-    sales_with_clusters = sales_df.merge(store_cluster_df, on='str_code', how='inner')
-    sales_with_roles = sales_with_clusters.merge(
-        product_roles_df[['spu_code', 'product_role', 'category', 'subcategory']], 
-        on='spu_code', 
-        how='inner'
-    )
-    
-    log_progress(f"   ✓ Merged data: {len(sales_with_roles):,} records with cluster and role info")
-    
-    # Calculate current distribution
-    cluster_role_stats = []
-    
-    for cluster_id in tqdm(sorted(sales_with_roles['cluster_id'].unique()), desc="Analyzing clusters"):
-        cluster_data = sales_with_roles[sales_with_roles['cluster_id'] == cluster_id]
-        total_products = len(cluster_data)
-        
-        if total_products == 0:
-            continue
-        
-        cluster_stats = {
-            'cluster_id': cluster_id,
-            'total_products': total_products,
-            'total_stores': cluster_data['str_code'].nunique()
-        }
-        
-        # Calculate role distribution
-        role_counts = cluster_data['product_role'].value_counts()
-        for role in ['CORE', 'SEASONAL', 'FILLER', 'CLEARANCE']:
-            count = role_counts.get(role, 0)
-            percentage = (count / total_products) * 100 if total_products > 0 else 0
-            
-            cluster_stats[f'{role.lower()}_count'] = count
-            cluster_stats[f'{role.lower()}_percentage'] = percentage
-            
-            # Calculate gap vs expected
-            expected = EXPECTED_ROLE_DISTRIBUTION[role]['target']
-            gap = expected - percentage
-            gap_severity = classify_gap_severity(gap)
-            
-            cluster_stats[f'{role.lower()}_gap'] = gap
-            cluster_stats[f'{role.lower()}_gap_severity'] = gap_severity
-        
-        # Calculate category diversity
-        cluster_stats['category_count'] = cluster_data['category'].nunique()
-        cluster_stats['subcategory_count'] = cluster_data['subcategory'].nunique()
-        
-        cluster_role_stats.append(cluster_stats)
-    
-    distribution_df = pd.DataFrame(cluster_role_stats)
+    # Per-(cluster, SPU) record counts from the shared kernel, joined to roles once
+    if period_label:
+        cluster_products = get_product_metrics(sales_df, store_cluster_df, period_label=period_label)['cluster_products']
+    else:
+        cluster_products = cluster_product_metrics(sales_df, store_cluster_df)
+    roles = product_roles_df[['spu_code', 'product_role', 'category', 'subcategory']]
+    cluster_roles = cluster_products[['cluster_id', 'spu_code', 'records']].merge(roles, on='spu_code', how='inner')
+    
+    log_progress(f"   ✓ Merged data: {int(cluster_roles['records'].sum()):,} records with cluster and role info")
+    
+    by_cluster = cluster_roles.groupby('cluster_id', sort=True)
+    distribution = pd.DataFrame({'total_products': by_cluster['records'].sum()})
+    
+    # Stores selling at least one classified product, per cluster
+    classified_sales = sales_df.loc[sales_df['spu_code'].isin(roles['spu_code']), ['str_code']].astype(str)
+    cluster_stores = store_cluster_df[['str_code', 'cluster_id']].astype({'str_code': str}).merge(
+        classified_sales.drop_duplicates(), on='str_code', how='inner')
+    distribution['total_stores'] = cluster_stores.groupby('cluster_id')['str_code'].nunique()
+    
+    # Calculate role distribution and gaps vs expected for all clusters at once
+    roles_order = ['CORE', 'SEASONAL', 'FILLER', 'CLEARANCE']
+    role_counts = cluster_roles.pivot_table(index='cluster_id', columns='product_role', values='records',
+                                            aggfunc='sum', fill_value=0)
+    role_counts = role_counts.reindex(index=distribution.index, columns=roles_order, fill_value=0).astype(int)
+    for role in roles_order:
+        distribution[f'{role.lower()}_count'] = role_counts[role]
+        percentage = role_counts[role] / distribution['total_products'] * 100
+        gap = EXPECTED_ROLE_DISTRIBUTION[role]['target'] - percentage
+        
+        distribution[f'{role.lower()}_percentage'] = percentage
+        distribution[f'{role.lower()}_gap'] = gap
+        distribution[f'{role.lower()}_gap_severity'] = classify_gap_severity(gap)
+    
+    # Calculate category diversity
+    distribution['category_count'] = by_cluster['category'].nunique()
+    distribution['subcategory_count'] = by_cluster['subcategory'].nunique()
+    
+    distribution_df = distribution[distribution['total_products'] > 0].reset_index()
     log_progress(f"   ✓ Analyzed {len(distribution_df):,} clusters")
     
     return distribution_df
 
-def classify_gap_severity(gap: float) -> str:
-    """Classify gap severity based on thresholds"""
-    abs_gap = abs(gap)
-    
-    if abs_gap >= GAP_THRESHOLDS['critical_gap']:
-        return 'CRITICAL'
-    elif abs_gap >= GAP_THRESHOLDS['moderate_gap']:
-        return 'MODERATE'
-    else:
-        return 'OPTIMAL'
+def classify_gap_severity(gap):
+    """Classify gap severity based on thresholds (a single gap or a Series/array of gaps)"""
+    abs_gap = np.abs(np.asarray(gap, dtype=float))
+    severity = np.select([abs_gap >= GAP_THRESHOLDS['critical_gap'], abs_gap >= GAP_THRESHOLDS['moderate_gap']],
+                         ['CRITICAL', 'MODERATE'], 'OPTIMAL')
+    if severity.ndim == 0:
+        return str(severity)
+    if isinstance(gap, pd.Series):
+        return pd.Series(severity, index=gap.index, name=gap.name)
+    return severity
 
 def create_gap_matrix(distribution_df: pd.DataFrame) -> pd.DataFrame:
     """Create the main gap matrix for visualization"""
@@ -424,7 +412,7 @@ def create_gap_matrix(distribution_df: pd.DataFrame) -> pd.DataFrame:
 # ===== EXCEL FORMATTING FUNCTIONS =====
 
 def create_formatted_excel(matrix_df: pd.DataFrame, distribution_df: pd.DataFrame, excel_out_path: str, sell_through_summary: Optional[pd.DataFrame] = None) -> None:
-    """Create Excel file with conditional formatting"""
+    """Create Excel file with conditional formatting (streamed, write-only)"""
     log_progress("📋 Creating formatted Excel file...")
     
     if not EXCEL_AVAILABLE:
@@ -432,99 +420,54 @@ def create_formatted_excel(matrix_df: pd.DataFrame, distribution_df: pd.DataFram
         matrix_df.to_csv(excel_out_path.replace('.xlsx', '.csv'), index=False)
         return
     
-    # Create workbook and worksheets
-    wb = openpyxl.Workbook()
-    
-    # Sheet 1: Gap Matrix
-    ws_matrix = wb.active
-    ws_matrix.title = "Gap Matrix"
-    
-    # Write gap matrix data
-    for row in dataframe_to_rows(matrix_df, index=False, header=True):
-        ws_matrix.append(row)
-    
-    # Apply formatting to gap matrix
-    apply_gap_matrix_formatting(ws_matrix, matrix_df)
-    
-    # Sheet 2: Detailed Analysis
-    ws_detail = wb.create_sheet("Detailed Analysis")
-    for row in dataframe_to_rows(distribution_df, index=False, header=True):
-        ws_detail.append(row)
-    
-    # Sheet 3: Summary & Recommendations
-    ws_summary = wb.create_sheet("Summary")
-    create_summary_sheet(ws_summary, distribution_df)
-    
-    # Optional Sheet 3: Sell-Through Summary (from Step 18)
-    if sell_through_summary is not None and not sell_through_summary.empty:
-        ws_st = wb.create_sheet("Sell-Through Summary")
-        for row in dataframe_to_rows(sell_through_summary, index=False, header=True):
-            ws_st.append(row)
-        # Simple formatting
-        for cell in ws_st[1]:
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    # Save workbook
-    wb.save(excel_out_path)
+    with StreamingWorkbook(excel_out_path) as wb:
+        # Sheet 1: Gap Matrix
+        wb.write_dataframe(
+            "Gap Matrix", matrix_df,
+            header_style=CellStyle(bold=True, fill="CCE5FF", horizontal="center", vertical="center"),
+            column_widths=fit_column_widths(matrix_df, sample_rows=None),
+            conditional_formats=gap_matrix_conditional_formats(matrix_df),
+        )
+        
+        # Sheet 2: Detailed Analysis
+        wb.write_dataframe("Detailed Analysis", distribution_df)
+        
+        # Sheet 3: Summary & Recommendations
+        create_summary_sheet(wb.sheet("Summary"), distribution_df)
+        
+        # Optional Sheet 4: Sell-Through Summary (from Step 18)
+        if sell_through_summary is not None and not sell_through_summary.empty:
+            wb.write_dataframe(
+                "Sell-Through Summary", sell_through_summary,
+                header_style=CellStyle(bold=True, horizontal="center", vertical="center"),
+            )
+    
     log_progress(f"   ✅ Saved formatted Excel: {excel_out_path}")
 
-def apply_gap_matrix_formatting(ws, matrix_df):
-    """Apply conditional formatting to gap matrix"""
-    if not EXCEL_AVAILABLE:
-        return
-    
-    # Define colors
+def gap_matrix_conditional_formats(matrix_df: pd.DataFrame) -> List[ConditionalFormat]:
+    """Colour each role's gap column by the severity in its status column"""
+    # Status -> fill; anything other than CRITICAL/MODERATE is shown as optimal
     critical_fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")  # Light red
     moderate_fill = PatternFill(start_color="FFFFCC", end_color="FFFFCC", fill_type="solid")  # Light yellow
     optimal_fill = PatternFill(start_color="CCFFCC", end_color="CCFFCC", fill_type="solid")   # Light green
     
-    header_fill = PatternFill(start_color="CCE5FF", end_color="CCE5FF", fill_type="solid")    # Light blue
-    header_font = Font(bold=True)
-    
-    # Format headers
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
+    def severity_rule(status_col: str, template: str, fill) -> Callable:
+        def build(letters, first_row):
+            status = f"${letters[status_col]}{first_row}"
+            return FormulaRule(formula=[template.format(s=status)], fill=fill, stopIfTrue=True)
+        return build
     
-    # Apply conditional formatting based on gap severity
-    for row_idx, row in enumerate(matrix_df.itertuples(), start=2):
-        for role in ['CORE', 'SEASONAL', 'FILLER', 'CLEARANCE']:
-            status_col = None
-            gap_col = None
-            
-            # Find column indices
-            for col_idx, header in enumerate(matrix_df.columns, start=1):
-                if header == f'{role}_Status':
-                    status_col = col_idx
-                elif header == f'{role}_Gap':
-                    gap_col = col_idx
-            
-            if status_col and gap_col:
-                status_value = getattr(row, f'{role}_Status')
-                gap_cell = ws.cell(row=row_idx, column=gap_col)
-                
-                # Apply color based on status
-                if status_value == 'CRITICAL':
-                    gap_cell.fill = critical_fill
-                elif status_value == 'MODERATE':
-                    gap_cell.fill = moderate_fill
-                else:
-                    gap_cell.fill = optimal_fill
-    
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = (max_length + 2)
-        ws.column_dimensions[column_letter].width = adjusted_width
+    formats = []
+    for role in ['CORE', 'SEASONAL', 'FILLER', 'CLEARANCE']:
+        status_col, gap_col = f'{role}_Status', f'{role}_Gap'
+        if status_col not in matrix_df.columns or gap_col not in matrix_df.columns:
+            continue
+        formats += [
+            ConditionalFormat([gap_col], severity_rule(status_col, '{s}="CRITICAL"', critical_fill)),
+            ConditionalFormat([gap_col], severity_rule(status_col, '{s}="MODERATE"', moderate_fill)),
+            ConditionalFormat([gap_col], severity_rule(status_col, 'AND({s}<>"CRITICAL",{s}<>"MODERATE")', optimal_fill)),
+        ]
+    return formats
 
 def create_summary_sheet(ws, distribution_df):
     """Create summary and recommendations sheet"""
@@ -532,13 +475,13 @@ def create_summary_sheet(ws, distribution_df):
         return
     
     # Add title
-    ws.append(['Cluster × Role Gap Analysis Summary'])
+    ws.append(['Cluster × Role Gap Analysis Summary'], style=CellStyle(bold=True, size=14))
     ws.append([])
     ws.append([f'Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'])
     ws.append([])
     
     # Critical gaps summary
-    ws.append(['CRITICAL GAPS (>10%):'])
+    ws.append(['CRITICAL GAPS (>10%):'], style=CellStyle(bold=True))
     ws.append(['Cluster', 'Role', 'Gap %', 'Recommendation'])
     
     for _, cluster in distribution_df.iterrows():
@@ -555,10 +498,6 @@ def create_summary_sheet(ws, distribution_df):
                     recommendation = f"Consider reducing {abs(gap):.1f}% of {role} products"
                 
                 ws.append([cluster_id, role, f"{gap:+.1f}%", recommendation])
-    
-    # Format summary sheet
-    ws['A1'].font = Font(bold=True, size=14)
-    ws['A5'].font = Font(bold=True)
 
 # ===== REPORTING FUNCTIONS =====
 
@@ -764,7 +703,8 @@ def main() -> None:
         sales_df, product_roles_df, price_bands_df, store_cluster_df = load_and_prepare_data(period_label=period_label)
         
         # Step 2: Analyze cluster-role distribution
-        distribution_df = analyze_cluster_role_distribution(sales_df, product_roles_df, store_cluster_df)
+        distribution_df = analyze_cluster_role_distribution(sales_df, product_roles_df, store_cluster_df,
+                                                            period_label=period_label)
         
         # Step 3: Create gap matrix
         matrix_df = create_gap_matrix(distribution_df)
@@ -40,6 +40,16 @@ Version: 1.0 - Methodical Implementation
        --target-yyyymm 202510 \
        --target-period A
 
+ Batch Sweep (sampled grid of role/price scenarios × every cluster; optional process pool)
+   Command:
+     PYTHONPATH=. python3 src/step28_scenario_analyzer.py \
+       --target-yyyymm 202510 \
+       --target-period A \
+       --scenario GRID --grid-samples 5000 --workers 4
+   GRID writes the usual AUTO outputs plus a ranked scenario_grid_ranked_<label>.csv.
+   Scenarios are evaluated with NumPy broadcasting (scenarios × clusters); --workers N
+   (or SC28_WORKERS=N) only engages above PARALLEL_MIN_EVALUATIONS evaluations.
+
  Notes on Overrides
  - If you already know the exact files, prefer SC28_* env vars to avoid manifest lookups:
      SC28_PRODUCT_ROLES_FILE, SC28_PRICE_BANDS_FILE, SC28_GAP_ANALYSIS_FILE, SC28_GAP_SUMMARY_FILE
@@ -59,6 +69,7 @@ import json
 from datetime import datetime
 from typing import Dict, Tuple, Any, List, Optional
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 import copy
 import argparse
@@ -66,6 +77,10 @@ try:
     from src.pipeline_manifest import get_step_input, register_step_output  # when run as module
 except Exception:  # pragma: no cover
     from pipeline_manifest import get_step_input, register_step_output  # fallback when run as script
+try:
+    from src.product_metrics import cluster_product_metrics, sell_through_rates
+except Exception:  # pragma: no cover
+    from product_metrics import cluster_product_metrics, sell_through_rates
 try:
     import yaml  # type: ignore
 except Exception:  # pragma: no cover
@@ -80,6 +95,7 @@ PRODUCT_ROLES_FILE = "output/product_role_classifications.csv"
 PRICE_BANDS_FILE = "output/price_band_analysis.csv"
 GAP_ANALYSIS_FILE = "output/gap_analysis_detailed.csv"
 GAP_SUMMARY_FILE = "output/gap_matrix_summary.json"
+CLUSTER_LABELS_FILE = "output/clustering_results_spu.csv"  # Per-cluster GRID baselines (optional)
 
 # Output files
 SCENARIO_RESULTS_FILE = "output/scenario_analysis_results.json"
@@ -121,6 +137,14 @@ IMPACT_MODELS = {
     }
 }
 
+# Batch scenario engine
+SCENARIO_ROLES = ['CORE', 'SEASONAL', 'FILLER', 'CLEARANCE']
+SCENARIO_PRICE_BANDS = ['ECONOMY', 'VALUE', 'PREMIUM', 'LUXURY']
+PRICE_ELASTICITY = -1.5  # 1% price increase = 1.5% demand decrease
+GRID_SAMPLES = int(os.environ.get('SC28_GRID_SAMPLES', '1000') or 1000)
+BATCH_WORKERS = int(os.environ.get('SC28_WORKERS', '1') or 1)
+PARALLEL_MIN_EVALUATIONS = 2000000  # Below this many scenario × cluster cells a single process is faster
+
 def log_progress(message: str) -> None:
     """Log progress with timestamp"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -174,6 +198,7 @@ def parse_args():
     parser.add_argument('--price-bands-file', help='Override price bands file path')
     parser.add_argument('--gap-analysis-file', help='Override gap analysis file path')
     parser.add_argument('--gap-summary-file', help='Override gap summary file path')
+    parser.add_argument('--cluster-labels-file', help='Override store cluster labels file path (GRID baselines)')
     
     # Output file overrides (backward compatible)
     parser.add_argument('--results-file', help='Override results output file path')
@@ -185,12 +210,15 @@ def parse_args():
     parser.add_argument('--timestamp-suffix', action='store_true', help='Add timestamp suffix to output files')
     
     # Scenario selection
-    parser.add_argument('--scenario', choices=['AUTO', 'ROLE_OPTIMIZATION', 'GAP_FILLING', 'PRICE_STRATEGY'], 
-                       default='AUTO', help='Scenario type to analyze')
+    parser.add_argument('--scenario', choices=['AUTO', 'ROLE_OPTIMIZATION', 'GAP_FILLING', 'PRICE_STRATEGY', 'GRID'], 
+                       default='AUTO', help='Scenario type to analyze (GRID adds a ranked batch sweep to AUTO)')
     parser.add_argument('--cluster-id', type=int, help='Cluster ID for targeted scenarios')
     parser.add_argument('--role-add', action='append', help='Add products to role (format: ROLE:COUNT)')
     parser.add_argument('--role-remove', action='append', help='Remove products from role (format: ROLE:COUNT)')
     parser.add_argument('--adjust', action='append', help='Price adjustment (format: BAND:MULTIPLIER)')
+    parser.add_argument('--grid-samples', type=int, help='Scenarios sampled per GRID sweep (default: SC28_GRID_SAMPLES or 1000)')
+    parser.add_argument('--grid-seed', type=int, default=42, help='Random seed for GRID scenario sampling')
+    parser.add_argument('--workers', type=int, help='Processes for large GRID sweeps (default: SC28_WORKERS or 1)')
     
     return parser.parse_args()
 
@@ -350,6 +378,12 @@ def resolve_configuration(args) -> Dict[str, Any]:
                                                    'output/gap_matrix_summary.json',
                                                    target_yyyymm, target_period)
     
+    # Store cluster labels are optional: without them GRID falls back to the global baseline
+    config['cluster_labels_file'] = getattr(args, 'cluster_labels_file', None) or os.environ.get('SC28_CLUSTER_LABELS_FILE')
+    if not config['cluster_labels_file']:
+        candidates = [f'output/clustering_results_spu_{period_label}.csv', CLUSTER_LABELS_FILE]
+        config['cluster_labels_file'] = next((p for p in candidates if os.path.exists(p)), None)
+    
     # Resolve output files with DUAL OUTPUT PATTERN (timestamped + generic)
     timestamped_base = f'scenario_analysis_results_{period_label}'
     if timestamp_str:
@@ -359,6 +393,8 @@ def resolve_configuration(args) -> Dict[str, Any]:
     config['timestamped_results_file'] = f'output/{timestamped_base}.json'
     config['timestamped_report_file'] = f'output/{timestamped_base}_report.md'
     config['timestamped_recommendations_file'] = f'output/{timestamped_base}_recommendations.csv'
+    grid_base = f'scenario_grid_ranked_{period_label}' + (f'_{timestamp_str}' if timestamp_str else '')
+    config['grid_ranked_file'] = f'output/{grid_base}.csv'
     
     config['generic_results_file'] = 'output/scenario_analysis_results.json'
     config['generic_report_file'] = 'output/scenario_analysis_report.md'
@@ -383,6 +419,9 @@ def resolve_configuration(args) -> Dict[str, Any]:
     config['role_add'] = parse_role_changes(args.role_add)
     config['role_remove'] = parse_role_changes(args.role_remove)
     config['price_adjustments'] = parse_price_adjustments(args.adjust)
+    config['grid_samples'] = args.grid_samples if args.grid_samples is not None else GRID_SAMPLES
+    config['grid_seed'] = args.grid_seed
+    config['workers'] = max(1, args.workers) if args.workers is not None else BATCH_WORKERS
     
     # Persist period info for loaders
     config['target_yyyymm'] = target_yyyymm
@@ -544,6 +583,47 @@ def calculate_baseline_metrics(sales_df: pd.DataFrame, product_roles_df: pd.Data
     log_progress(f"   ✓ Calculated baseline metrics for {total_products} products")
     return baseline
 
+def load_store_clusters(cluster_labels_file: Optional[str]) -> Optional[pd.DataFrame]:
+    """Store → cluster_id mapping from a clustering results file (None when unavailable)"""
+    if not cluster_labels_file or not os.path.exists(cluster_labels_file):
+        return None
+    cluster_df = pd.read_csv(cluster_labels_file, dtype={'str_code': str})
+    for column in ['Cluster', 'cluster', 'cluster_label']:
+        if 'cluster_id' not in cluster_df.columns and column in cluster_df.columns:
+            cluster_df = cluster_df.rename(columns={column: 'cluster_id'})
+    if not {'str_code', 'cluster_id'}.issubset(cluster_df.columns):
+        log_progress(f"   ⚠️  No str_code/cluster_id columns in {cluster_labels_file}")
+        return None
+    return cluster_df[['str_code', 'cluster_id']].dropna().drop_duplicates('str_code')
+
+def calculate_cluster_baselines(sales_df: pd.DataFrame, store_clusters: pd.DataFrame,
+                                baseline: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Per-cluster baseline metrics for the batch engine, from the cluster-joined sales.
+    
+    total_sales_amount is each cluster's fashion + basic sales. When the sales carry
+    inventory (total_inventory_qty), avg_sell_through_rate is the cluster's
+    SPU-store-day sell-through and avg_inventory_days scales the global days by
+    the global / cluster sell-through ratio; otherwise those two columns are left
+    out and the batch engine uses the global baseline for them.
+    """
+    per_spu = cluster_product_metrics(sales_df, store_clusters)
+    cluster_baselines = per_spu.groupby('cluster_id', sort=True)['total_sales'].sum().rename(
+        'total_sales_amount').reset_index()
+    
+    if 'total_inventory_qty' in sales_df.columns:
+        joined = sales_df.assign(str_code=sales_df['str_code'].astype(str)).merge(
+            store_clusters.assign(str_code=store_clusters['str_code'].astype(str)), on='str_code', how='inner')
+        rates = sell_through_rates(joined, ['cluster_id']).set_index('cluster_id')['sell_through_rate'] * 100
+        sell_through = cluster_baselines['cluster_id'].map(rates[rates > 0])
+        cluster_baselines['avg_sell_through_rate'] = sell_through
+        cluster_baselines['avg_inventory_days'] = (
+            baseline['avg_inventory_days'] * baseline['avg_sell_through_rate'] / sell_through
+        )
+    
+    log_progress(f"   ✓ Calculated baseline metrics for {len(cluster_baselines)} clusters")
+    return cluster_baselines
+
 # ===== SCENARIO ANALYSIS ENGINE =====
 
 class WhatIfScenarioAnalyzer:
@@ -762,6 +842,265 @@ class WhatIfScenarioAnalyzer:
             'risk_factors': risk_factors,
             'price_adjustments': price_adjustments
         }
+    
+    def analyze_scenario_batch(self, scenarios: pd.DataFrame, cluster_ids: Optional[List[Any]] = None,
+                               cluster_baselines: Optional[pd.DataFrame] = None, rank_by: str = 'delta_revenue',
+                               workers: Optional[int] = None) -> pd.DataFrame:
+        """
+        Analyze a grid or sample of scenarios across clusters in one vectorized pass
+        
+        Each row combines role changes and price adjustments; pure role rows
+        reproduce analyze_role_optimization_scenario and pure price rows
+        reproduce analyze_price_strategy_scenario. See evaluate_scenario_batch.
+        """
+        log_progress(f"   🧮 Analyzing {len(scenarios):,} scenarios in batch...")
+        return evaluate_scenario_batch(self.baseline, scenarios, cluster_ids, cluster_baselines,
+                                       rank_by=rank_by, workers=workers, impact_models=self.impact_models)
+
+# ===== BATCH SCENARIO ENGINE =====
+
+BASELINE_METRIC_COLUMNS = ['avg_sell_through_rate', 'total_sales_amount', 'avg_inventory_days']
+
+def build_scenario_grid(role_add: Optional[Dict[str, List[int]]] = None,
+                        role_remove: Optional[Dict[str, List[int]]] = None,
+                        price_adjustments: Optional[Dict[str, List[float]]] = None) -> pd.DataFrame:
+    """
+    Build the cartesian grid of role add/remove counts and price multipliers
+    
+    Args:
+        role_add: {'CORE': [0, 1, 2], 'SEASONAL': [0, 2]}  # counts to try per role
+        role_remove: Same shape as role_add
+        price_adjustments: {'ECONOMY': [0.95, 1.0], 'PREMIUM': [1.0, 1.05]}
+        
+    Returns:
+        One row per scenario: scenario_id, add_<ROLE>, remove_<ROLE>, price_<BAND>
+    """
+    axes: Dict[str, np.ndarray] = {}
+    for action, values in (('add', role_add), ('remove', role_remove)):
+        for role, counts in (values or {}).items():
+            axes[f'{action}_{role.upper()}'] = np.asarray(list(counts), dtype=np.int64)
+    for band, multipliers in (price_adjustments or {}).items():
+        axes[f'price_{band.upper()}'] = np.asarray(list(multipliers), dtype=float)
+    
+    if axes:
+        mesh = np.meshgrid(*axes.values(), indexing='ij')
+        grid = pd.DataFrame({name: values.ravel() for name, values in zip(axes, mesh)})
+    else:
+        grid = pd.DataFrame(index=range(1))
+    grid.insert(0, 'scenario_id', np.arange(1, len(grid) + 1))
+    return grid
+
+def sample_scenarios(n: int, max_products: int = 5, price_range: Tuple[float, float] = (0.9, 1.1),
+                     seed: Optional[int] = None) -> pd.DataFrame:
+    """
+    Draw n random scenarios over every role and price band
+    
+    Counts are uniform in 0..max_products and multipliers uniform in price_range,
+    rounded to 0.01 so sampled scenarios read like hand-specified adjustments.
+    """
+    rng = np.random.default_rng(seed)
+    data: Dict[str, np.ndarray] = {'scenario_id': np.arange(1, n + 1)}
+    for action in ('add', 'remove'):
+        for role in SCENARIO_ROLES:
+            data[f'{action}_{role}'] = rng.integers(0, max_products + 1, n)
+    for band in SCENARIO_PRICE_BANDS:
+        data[f'price_{band}'] = np.round(rng.uniform(price_range[0], price_range[1], n), 2)
+    return pd.DataFrame(data)
+
+def _role_columns(scenarios: pd.DataFrame) -> List[str]:
+    """add_/remove_ columns ordered role by role (add before remove), as the scalar analyzer applies them"""
+    present = [c for c in scenarios.columns if c.startswith(('add_', 'remove_'))]
+    unknown = sorted({c.split('_', 1)[1] for c in present} - set(IMPACT_MODELS['sell_through_multipliers']))
+    if unknown:
+        raise ValueError(f"Unknown product roles in scenario grid: {unknown}")
+    roles = list(dict.fromkeys(c.split('_', 1)[1] for c in present))
+    return [f'{action}_{role}' for role in roles for action in ('add', 'remove') if f'{action}_{role}' in present]
+
+def _role_factors(scenarios: pd.DataFrame, impact_models: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Per-scenario sell-through/revenue/inventory factors and product counts from role changes"""
+    columns = _role_columns(scenarios)
+    counts = scenarios[columns].to_numpy(dtype=float).reshape(len(scenarios), len(columns))
+    active = counts > 0
+    
+    factors = {'products_changed': counts.sum(axis=1), 'has_role': active.any(axis=1)}
+    for key in ('sell_through_multipliers', 'revenue_multipliers', 'inventory_multipliers'):
+        multipliers = np.array([impact_models[key][c.split('_', 1)[1]][c.split('_', 1)[0]] for c in columns])
+        scaled = np.where(active, 1 + (multipliers - 1) * (counts / 10), 1.0)
+        factors[key] = scaled.prod(axis=1)
+    return factors
+
+def _price_factors(scenarios: pd.DataFrame, band_distribution: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Portfolio-weighted revenue and sell-through factors from per-band price multipliers"""
+    columns = [c for c in scenarios.columns if c.startswith('price_')]
+    multipliers = scenarios[columns].to_numpy(dtype=float).reshape(len(scenarios), len(columns))
+    weights = np.array([band_distribution.get(c[len('price_'):], {}).get('percentage', 0) / 100 for c in columns])
+    
+    demand_change_pct = PRICE_ELASTICITY * (multipliers - 1) * 100
+    st_impact = 1 + demand_change_pct / 100
+    revenue_impact = multipliers * st_impact
+    return {
+        'sell_through': 1 + ((st_impact - 1) * weights).sum(axis=1),
+        'revenue': 1 + ((revenue_impact - 1) * weights).sum(axis=1),
+        'has_price': (multipliers != 1).any(axis=1),
+        'large_adjustment': (np.abs(multipliers - 1) > 0.2).any(axis=1),
+    }
+
+def _changes_summaries(scenarios: pd.DataFrame) -> np.ndarray:
+    """'; '-joined change descriptions per scenario, worded like the scalar analyzers"""
+    summary = np.full(len(scenarios), '', dtype=object)
+    
+    def append(mask, text):
+        nonlocal summary
+        summary = np.where(mask, np.where(summary == '', text, summary + '; ' + text), summary)
+    
+    for column in _role_columns(scenarios):
+        action, role = column.split('_', 1)
+        counts = scenarios[column].to_numpy()
+        words = np.char.mod('%d', counts).astype(object)
+        append(counts > 0, f"{action.capitalize()} " + words + f" {role} products")
+    for column in [c for c in scenarios.columns if c.startswith('price_')]:
+        multipliers = scenarios[column].to_numpy(dtype=float)
+        pct = np.char.mod('%+.1f', (multipliers - 1) * 100).astype(object)
+        append(multipliers != 1, f"{column[len('price_'):]}: " + pct + "% price change")
+    return summary
+
+def _cluster_baseline_frame(baseline: Dict[str, Any], cluster_ids: List[Any],
+                            cluster_baselines: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """One row per cluster with its baseline metrics (global baseline where none is given)"""
+    frame = pd.DataFrame({'cluster_id': list(cluster_ids)})
+    if cluster_baselines is not None and 'cluster_id' in cluster_baselines.columns:
+        cluster_baselines = cluster_baselines.set_index('cluster_id')
+    for column in BASELINE_METRIC_COLUMNS:
+        if cluster_baselines is not None and column in cluster_baselines.columns:
+            per_cluster = pd.to_numeric(frame['cluster_id'].map(cluster_baselines[column]), errors='coerce')
+            frame[column] = per_cluster.fillna(baseline[column]).astype(float)
+        else:
+            frame[column] = float(baseline[column])
+    return frame
+
+def _evaluate_scenario_block(baseline: Dict[str, Any], impact_models: Dict[str, Any],
+                             scenarios: pd.DataFrame, clusters: pd.DataFrame) -> pd.DataFrame:
+    """Evaluate S scenarios against C clusters by broadcasting to an S × C block (scenario-major rows)"""
+    role = _role_factors(scenarios, impact_models)
+    price = _price_factors(scenarios, baseline.get('price_band_distribution', {}))
+    has_role, has_price = role['has_role'], price['has_price']
+    
+    # Role and price factors compose multiplicatively; better sell-through turns inventory faster
+    st_factor = (role['sell_through_multipliers'] * price['sell_through'])[:, None]
+    revenue_factor = (role['revenue_multipliers'] * price['revenue'])[:, None]
+    inventory_factor = (role['inventory_multipliers'] / price['sell_through'])[:, None]
+    
+    baseline_st = clusters['avg_sell_through_rate'].to_numpy()[None, :]
+    baseline_revenue = clusters['total_sales_amount'].to_numpy()[None, :]
+    baseline_inventory = clusters['avg_inventory_days'].to_numpy()[None, :]
+    
+    new_st = baseline_st * st_factor
+    new_revenue = baseline_revenue * revenue_factor
+    new_inventory = baseline_inventory * inventory_factor
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta_st_pct = ((new_st - baseline_st) / baseline_st) * 100
+        delta_revenue = new_revenue - baseline_revenue
+        revenue_share = delta_revenue / baseline_revenue
+    delta_inventory_days = new_inventory - baseline_inventory
+    
+    role_confidence = np.clip(1 - role['products_changed'] / 20, 0.5, 0.95)
+    confidence = np.where(has_price, np.where(has_role, np.minimum(role_confidence, 0.8), 0.8), role_confidence)
+    
+    shape = delta_st_pct.shape
+    risk_rules = [
+        ("High sell-through impact", has_role[:, None] & (np.abs(delta_st_pct) > 10)),
+        ("High revenue impact", has_role[:, None] & (np.abs(revenue_share) > 0.15)),
+        ("Large portfolio change", np.broadcast_to((has_role & (role['products_changed'] > 10))[:, None], shape)),
+        ("Large price adjustments", np.broadcast_to((has_price & price['large_adjustment'])[:, None], shape)),
+        ("Significant demand reduction", has_price[:, None] & (delta_st_pct < -10)),
+    ]
+    risk_factors = np.full(shape, '', dtype=object)
+    risk_count = np.zeros(shape, dtype=np.int64)
+    for label, flagged in risk_rules:
+        risk_factors = np.where(flagged, np.where(risk_factors == '', label, risk_factors + '; ' + label), risk_factors)
+        risk_count += flagged
+    
+    n_clusters = len(clusters)
+    per_scenario = lambda values: np.repeat(np.asarray(values), n_clusters)
+    scenario_type = np.select([has_role & has_price, has_price], ['PORTFOLIO_REBALANCING', 'PRICE_STRATEGY'],
+                              'ROLE_OPTIMIZATION')
+    result = pd.DataFrame({
+        'scenario_id': per_scenario(scenarios['scenario_id']),
+        'cluster_id': np.tile(clusters['cluster_id'].to_numpy(), len(scenarios)),
+        'scenario_type': per_scenario(scenario_type),
+        'changes_summary': per_scenario(_changes_summaries(scenarios)),
+        'delta_sell_through_pct': np.round(delta_st_pct, 2).ravel(),
+        'delta_revenue': np.round(delta_revenue, 2).ravel(),
+        'delta_inventory_days': np.round(delta_inventory_days, 1).ravel(),
+        'new_sell_through_rate': np.round(new_st, 1).ravel(),
+        'new_revenue': np.round(new_revenue, 2).ravel(),
+        'new_inventory_days': np.round(new_inventory, 1).ravel(),
+        'confidence_score': per_scenario(np.round(confidence, 3)),
+        'risk_factors': risk_factors.ravel(),
+        'risk_level': np.select([risk_count.ravel() == 0, risk_count.ravel() <= 2], ['Low', 'Medium'], 'High'),
+        'products_changed': per_scenario(role['products_changed']).astype(np.int64),
+    })
+    inputs = [c for c in scenarios.columns if c.startswith(('add_', 'remove_', 'price_'))]
+    for column in inputs:
+        result[column] = per_scenario(scenarios[column])
+    return result
+
+def rank_scenarios(results: pd.DataFrame, rank_by: str = 'delta_revenue', ascending: bool = False) -> pd.DataFrame:
+    """
+    Rank evaluated scenarios overall and within each cluster
+    
+    Ties on rank_by go to the more confident scenario, then to the lower
+    scenario/cluster id so rankings are reproducible.
+    """
+    ranked = results.sort_values(
+        [rank_by, 'confidence_score', 'scenario_id', 'cluster_id'],
+        ascending=[ascending, False, True, True], kind='mergesort'
+    ).reset_index(drop=True)
+    ranked.insert(0, 'rank', np.arange(1, len(ranked) + 1))
+    ranked.insert(1, 'cluster_rank', ranked.groupby('cluster_id', sort=False, dropna=False).cumcount() + 1)
+    return ranked
+
+def evaluate_scenario_batch(baseline: Dict[str, Any], scenarios: pd.DataFrame, cluster_ids: Optional[List[Any]] = None,
+                            cluster_baselines: Optional[pd.DataFrame] = None, rank_by: str = 'delta_revenue',
+                            workers: Optional[int] = None, impact_models: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Evaluate every scenario against every cluster and return a ranked frame
+    
+    Args:
+        baseline: Baseline metrics from calculate_baseline_metrics
+        scenarios: Output of build_scenario_grid / sample_scenarios (missing
+            add_/remove_ columns mean no change, missing price_ columns mean 1.0)
+        cluster_ids: Clusters to evaluate; defaults to cluster_baselines' clusters
+        cluster_baselines: Optional per-cluster avg_sell_through_rate /
+            total_sales_amount / avg_inventory_days (indexed or keyed by cluster_id)
+        rank_by: Result column to rank on (descending)
+        workers: Process count; defaults to BATCH_WORKERS
+        
+    Returns:
+        One row per scenario × cluster with the scalar analyzers' metrics, rank and cluster_rank
+    """
+    impact_models = IMPACT_MODELS if impact_models is None else impact_models
+    if cluster_ids is None:
+        if cluster_baselines is None:
+            cluster_ids = [None]
+        elif 'cluster_id' in cluster_baselines.columns:
+            cluster_ids = cluster_baselines['cluster_id'].tolist()
+        else:
+            cluster_ids = cluster_baselines.index.tolist()
+    clusters = _cluster_baseline_frame(baseline, cluster_ids, cluster_baselines)
+    scenarios = scenarios.reset_index(drop=True)
+    
+    workers = BATCH_WORKERS if workers is None else workers
+    evaluations = len(scenarios) * len(clusters)
+    if workers <= 1 or len(scenarios) < 2 or evaluations < PARALLEL_MIN_EVALUATIONS:
+        results = _evaluate_scenario_block(baseline, impact_models, scenarios, clusters)
+    else:
+        chunks = [scenarios.iloc[idx] for idx in np.array_split(np.arange(len(scenarios)), workers) if len(idx)]
+        log_progress(f"   🧩 Evaluating {evaluations:,} scenario × cluster cells across {len(chunks)} processes")
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            futures = [pool.submit(_evaluate_scenario_block, baseline, impact_models, chunk, clusters) for chunk in chunks]
+            results = pd.concat([future.result() for future in futures], ignore_index=True)
+    return rank_scenarios(results, rank_by=rank_by)
 
 # ===== AUTOMATED SCENARIO GENERATION =====
 
@@ -1034,7 +1373,7 @@ def main() -> None:
         log_progress("   ✓ Initialized scenario analyzer")
         
         # Step 6: Generate scenarios (CLI-driven or recommended)
-        if resolved['selected_scenario'] == 'AUTO':
+        if resolved['selected_scenario'] in ('AUTO', 'GRID'):
             scenarios = generate_recommended_scenarios(gap_analysis_df, gap_summary)
         elif resolved['selected_scenario'] == 'ROLE_OPTIMIZATION':
             role_changes: Dict[str, Dict[str, int]] = {}
@@ -1083,6 +1422,25 @@ def main() -> None:
         # Step 7: Run scenario analysis
         scenario_results = run_scenario_analysis(analyzer, scenarios)
         
+        # Step 7b: Ranked batch sweep over sampled scenarios × clusters (GRID)
+        grid_ranked = None
+        if resolved['selected_scenario'] == 'GRID':
+            if resolved['cluster_id'] is not None:
+                grid_clusters = [int(resolved['cluster_id'])]
+            else:
+                grid_clusters = sorted(gap_analysis_df['cluster_id'].dropna().unique().tolist())
+            store_clusters = load_store_clusters(resolved['cluster_labels_file'])
+            if store_clusters is not None:
+                cluster_baselines = calculate_cluster_baselines(sales_df, store_clusters, baseline_metrics)
+            else:
+                cluster_baselines = None
+                log_progress("   ⚠️  No store cluster labels found; GRID uses the global baseline for every cluster")
+            grid = sample_scenarios(resolved['grid_samples'], seed=resolved['grid_seed'])
+            grid_ranked = analyzer.analyze_scenario_batch(grid, grid_clusters, cluster_baselines=cluster_baselines,
+                                                          workers=resolved['workers'])
+            grid_ranked.to_csv(resolved['grid_ranked_file'], index=False)
+            log_progress(f"✅ Saved ranked scenario grid ({len(grid_ranked):,} rows): {resolved['grid_ranked_file']}")
+        
         # Step 8: Create summary and reports
         summary = create_scenario_summary(scenario_results, baseline_metrics)
         
@@ -1191,6 +1549,17 @@ def main() -> None:
                     'target_period': target_period or 'default'
                 })
             
+            if grid_ranked is not None:
+                register_step_output('step28', 'scenario_grid_ranked', resolved['grid_ranked_file'], {
+                    'file_type': 'csv',
+                    'description': 'Ranked batch what-if scenarios (sampled grid × clusters)',
+                    'records': len(grid_ranked),
+                    'columns': len(grid_ranked.columns),
+                    'target_year': int(target_yyyymm[:4]) if target_yyyymm else datetime.now().year,
+                    'target_month': int(target_yyyymm[4:]) if target_yyyymm and len(target_yyyymm) >= 6 else datetime.now().month,
+                    'target_period': target_period or 'default'
+                })
+            
             # Register period-specific outputs if period is specified
             if period_label:
                 register_step_output('step28', f'scenario_results_{period_label}', resolved['results_file'], {
@@ -1248,6 +1617,8 @@ def main() -> None:
         log_progress(f"   • {resolved['report_file']}")
         if scenario_results:
             log_progress(f"   • {resolved['recommendations_file']}")
+        if grid_ranked is not None:
+            log_progress(f"   • {resolved['grid_ranked_file']}")
         
         log_progress(f"\n✅ What-If Scenario Analysis completed successfully")
         
@@ -10,7 +10,9 @@ This step provides comprehensive supply-demand gap analysis across multiple dime
 - Capacity utilization gaps
 
 Analyzes at least three representative clusters to ensure product pool
-can serve each store group effectively.
+can serve each store group effectively. With --all-clusters every cluster is
+analyzed from a single groupby partition of the integrated dataset
+(optionally fanned out over --workers processes).
 
 Author: Data Pipeline Team
 Date: 2025-01-24
@@ -30,6 +32,13 @@ Version: 1.0 - Comprehensive Supply-Demand Gap Analysis
        --target-yyyymm 202508 \
        --target-period A
 
+ Full-Population Run (every cluster; optional process pool)
+   Command:
+     PYTHONPATH=. python3 src/step29_supply_demand_gap_analysis.py \
+       --target-yyyymm 202510 \
+       --target-period A \
+       --all-clusters --workers 4
+
  Production Run (current period)
    Command:
      PYTHONPATH=. python3 src/step29_supply_demand_gap_analysis.py \
@@ -86,6 +95,7 @@ import json
 from datetime import datetime
 from typing import Dict, Tuple, Any, List
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -132,6 +142,10 @@ os.makedirs("output", exist_ok=True)
 # Select representative clusters for detailed analysis (minimum 3)
 REPRESENTATIVE_CLUSTERS = [0, 2, 4]  # Diverse clusters for comprehensive analysis
 
+# Full-population mode (--all-clusters) and optional process-pool fan-out of cluster shards
+ANALYSIS_WORKERS = int(os.environ.get("STEP29_WORKERS", "1") or 1)
+PARALLEL_MIN_ROWS = 200000  # Below this many integrated rows a single process is faster
+
 # Gap thresholds
 GAP_THRESHOLDS = {
     'critical': 20,  # >20% gap is critical
@@ -172,6 +186,8 @@ def _parse_args():
     parser = argparse.ArgumentParser(description="Step 29: Supply-Demand Gap Analysis (period-aware)")
     parser.add_argument("--target-yyyymm", required=True, help="Target year-month for current run, e.g. 202509")
     parser.add_argument("--target-period", choices=["A", "B"], required=True, help="Target period (A or B)")
+    parser.add_argument("--all-clusters", action="store_true", help="Analyze every cluster instead of REPRESENTATIVE_CLUSTERS")
+    parser.add_argument("--workers", type=int, default=None, help="Processes for cluster-sharded analysis (default: STEP29_WORKERS or 1)")
     return parser.parse_args()
 
 # ===== DATA LOADING AND PREPARATION =====
@@ -358,8 +374,10 @@ def prepare_integrated_dataset(sales_df: pd.DataFrame, cluster_df: pd.DataFrame,
 
 def analyze_category_gaps(integrated_df: pd.DataFrame, cluster_id: int) -> Dict[str, Any]:
     """Analyze category and subcategory distribution gaps for a cluster"""
-    
-    cluster_data = integrated_df[integrated_df['cluster_id'] == cluster_id]
+    return _category_gaps(integrated_df[integrated_df['cluster_id'] == cluster_id])
+
+def _category_gaps(cluster_data: pd.DataFrame) -> Dict[str, Any]:
+    """Category and subcategory distribution gaps for one cluster's rows"""
     
     # Category analysis (support multiple schemas)
     cat_col = 'cate_name' if 'cate_name' in cluster_data.columns else ('category' if 'category' in cluster_data.columns else None)
@@ -400,8 +418,10 @@ def analyze_category_gaps(integrated_df: pd.DataFrame, cluster_id: int) -> Dict[
 
 def analyze_price_band_gaps(integrated_df: pd.DataFrame, cluster_id: int) -> Dict[str, Any]:
     """Analyze price band distribution gaps for a cluster"""
-    
-    cluster_data = integrated_df[integrated_df['cluster_id'] == cluster_id]
+    return _price_band_gaps(integrated_df[integrated_df['cluster_id'] == cluster_id])
+
+def _price_band_gaps(cluster_data: pd.DataFrame) -> Dict[str, Any]:
+    """Price band distribution gaps for one cluster's rows"""
     
     # Price band distribution (guard for missing column)
     if 'price_band' in cluster_data.columns:
@@ -452,8 +472,10 @@ def analyze_price_band_gaps(integrated_df: pd.DataFrame, cluster_id: int) -> Dic
 
 def analyze_style_orientation_gaps(integrated_df: pd.DataFrame, cluster_id: int) -> Dict[str, Any]:
     """Analyze style orientation and fashion/basic balance gaps"""
-    
-    cluster_data = integrated_df[integrated_df['cluster_id'] == cluster_id]
+    return _style_orientation_gaps(integrated_df[integrated_df['cluster_id'] == cluster_id])
+
+def _style_orientation_gaps(cluster_data: pd.DataFrame) -> Dict[str, Any]:
+    """Style orientation and fashion/basic balance gaps for one cluster's rows"""
     
     # Calculate actual style distribution
     style_dist = cluster_data['style_orientation'].value_counts(normalize=True) * 100
@@ -489,8 +511,10 @@ def analyze_style_orientation_gaps(integrated_df: pd.DataFrame, cluster_id: int)
 
 def analyze_product_role_gaps(integrated_df: pd.DataFrame, cluster_id: int) -> Dict[str, Any]:
     """Analyze product role distribution gaps (CORE/SEASONAL/FILLER/CLEARANCE)"""
-    
-    cluster_data = integrated_df[integrated_df['cluster_id'] == cluster_id]
+    return _product_role_gaps(integrated_df[integrated_df['cluster_id'] == cluster_id])
+
+def _product_role_gaps(cluster_data: pd.DataFrame) -> Dict[str, Any]:
+    """Product role distribution gaps for one cluster's rows"""
     
     # Role distribution
     if 'product_role' in cluster_data.columns:
@@ -526,8 +550,10 @@ def analyze_product_role_gaps(integrated_df: pd.DataFrame, cluster_id: int) -> D
 
 def analyze_seasonal_capacity_gaps(integrated_df: pd.DataFrame, store_attrs_df: pd.DataFrame, cluster_id: int) -> Dict[str, Any]:
     """Analyze seasonal and capacity-related gaps"""
-    
-    cluster_data = integrated_df[integrated_df['cluster_id'] == cluster_id]
+    return _seasonal_capacity_gaps(integrated_df[integrated_df['cluster_id'] == cluster_id], store_attrs_df)
+
+def _seasonal_capacity_gaps(cluster_data: pd.DataFrame, store_attrs_df: pd.DataFrame) -> Dict[str, Any]:
+    """Seasonal and capacity-related gaps for one cluster's rows"""
     
     # Get cluster stores for capacity analysis
     cluster_stores = cluster_data['str_code'].unique()
@@ -566,6 +592,12 @@ def perform_comprehensive_cluster_analysis(integrated_df: pd.DataFrame, store_at
     log_progress(f"   🔍 Analyzing Cluster {cluster_id}...")
     
     # Debug: Check for duplicate columns and fix them
+    integrated_df = _drop_duplicate_columns(integrated_df)
+    cluster_data = integrated_df[integrated_df['cluster_id'] == cluster_id]
+    return _cluster_gap_analysis(cluster_data, store_attrs_df, cluster_id)
+
+def _drop_duplicate_columns(integrated_df: pd.DataFrame) -> pd.DataFrame:
+    """Keep the first occurrence of duplicated columns, ensuring cluster_id survives"""
     if integrated_df.columns.duplicated().any():
         duplicate_cols = integrated_df.columns[integrated_df.columns.duplicated()].tolist()
         log_progress(f"   ⚠️ Found duplicate columns: {duplicate_cols}")
@@ -577,9 +609,10 @@ def perform_comprehensive_cluster_analysis(integrated_df: pd.DataFrame, store_at
             log_progress(f"   ❌ ERROR: cluster_id column was removed during deduplication!")
             log_progress(f"   📋 Available columns after dedup: {list(integrated_df.columns)}")
             raise ValueError("cluster_id column missing after duplicate removal")
-    
-    cluster_data = integrated_df[integrated_df['cluster_id'] == cluster_id]
-    
+    return integrated_df
+
+def _cluster_gap_analysis(cluster_data: pd.DataFrame, store_attrs_df: pd.DataFrame, cluster_id: Any) -> Dict[str, Any]:
+    """Comprehensive gap analysis from one cluster's rows (already partitioned)"""
     analysis = {
         'cluster_id': cluster_id,
         'cluster_size': len(cluster_data['str_code'].unique()),
@@ -587,11 +620,11 @@ def perform_comprehensive_cluster_analysis(integrated_df: pd.DataFrame, store_at
         'unique_spus': cluster_data['spu_code'].nunique(),
         
         # Dimensional gap analyses
-        'category_gaps': analyze_category_gaps(integrated_df, cluster_id),
-        'price_band_gaps': analyze_price_band_gaps(integrated_df, cluster_id),
-        'style_orientation_gaps': analyze_style_orientation_gaps(integrated_df, cluster_id),
-        'product_role_gaps': analyze_product_role_gaps(integrated_df, cluster_id),
-        'seasonal_capacity_gaps': analyze_seasonal_capacity_gaps(integrated_df, store_attrs_df, cluster_id)
+        'category_gaps': _category_gaps(cluster_data),
+        'price_band_gaps': _price_band_gaps(cluster_data),
+        'style_orientation_gaps': _style_orientation_gaps(cluster_data),
+        'product_role_gaps': _product_role_gaps(cluster_data),
+        'seasonal_capacity_gaps': _seasonal_capacity_gaps(cluster_data, store_attrs_df)
     }
     
     # Calculate overall gap severity score
@@ -615,6 +648,59 @@ def perform_comprehensive_cluster_analysis(integrated_df: pd.DataFrame, store_at
     
     return analysis
 
+def _analyze_cluster_shard(shard: List[Tuple[Any, pd.DataFrame]], store_attrs_df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Analyze a list of (cluster_id, rows) partitions; module-level so it can run in worker processes"""
+    return [_cluster_gap_analysis(cluster_data, store_attrs_df, cluster_id) for cluster_id, cluster_data in shard]
+
+def analyze_clusters(integrated_df: pd.DataFrame, store_attrs_df: pd.DataFrame,
+                     cluster_ids: List[Any] = None, workers: int = None) -> List[Dict[str, Any]]:
+    """
+    Gap analysis for many clusters from a single partitioning pass.
+    
+    The integrated dataset is split by cluster once (groupby) instead of being
+    re-filtered by every dimension for every cluster, so analyzing the full
+    population costs about the same as a handful of clusters. With workers > 1
+    and a large dataset, cluster partitions are fanned out to a process pool.
+    
+    Args:
+        integrated_df: Output of prepare_integrated_dataset
+        store_attrs_df: Store attributes (estimated_rack_capacity)
+        cluster_ids: Clusters to analyze (in order); None analyzes every cluster present
+        workers: Process count; defaults to ANALYSIS_WORKERS
+        
+    Returns:
+        One analysis dict per cluster, identical to perform_comprehensive_cluster_analysis
+    """
+    integrated_df = _drop_duplicate_columns(integrated_df)
+    partitions = dict(tuple(integrated_df.groupby('cluster_id', sort=False)))
+    if cluster_ids is None:
+        cluster_ids = sorted(partitions)
+    empty = integrated_df.iloc[0:0]
+    work = [(cluster_id, partitions.get(cluster_id, empty)) for cluster_id in cluster_ids]
+    
+    # Only the columns the capacity analysis needs are shipped with each shard
+    capacity_cols = [c for c in ['str_code', 'estimated_rack_capacity'] if c in store_attrs_df.columns]
+    store_capacity = store_attrs_df[capacity_cols]
+    
+    workers = ANALYSIS_WORKERS if workers is None else workers
+    if workers <= 1 or len(work) < 2 or len(integrated_df) < PARALLEL_MIN_ROWS:
+        return _analyze_cluster_shard(work, store_capacity)
+    
+    # Round-robin over clusters sorted by size keeps shards balanced
+    by_size = sorted(range(len(work)), key=lambda i: len(work[i][1]), reverse=True)
+    shards = [by_size[i::workers] for i in range(workers) if by_size[i::workers]]
+    log_progress(f"   🧩 Analyzing {len(work)} clusters across {len(shards)} processes")
+    results: List[Dict[str, Any]] = [None] * len(work)
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        futures = {
+            pool.submit(_analyze_cluster_shard, [work[i] for i in shard], store_capacity): shard
+            for shard in shards
+        }
+        for future, shard in futures.items():
+            for i, analysis in zip(shard, future.result()):
+                results[i] = analysis
+    return results
+
 # ===== REPORTING FUNCTIONS =====
 
 def create_supply_demand_gap_report(cluster_analyses: List[Dict[str, Any]], generic_report: str = "output/supply_demand_gap_analysis_report.md") -> None:
@@ -863,6 +949,7 @@ def save_detailed_analysis(cluster_analyses: List[Dict[str, Any]], generic_detai
         'analysis_metadata': {
             'total_clusters_analyzed': len(cluster_analyses),
             'representative_clusters': REPRESENTATIVE_CLUSTERS,
+            'analyzed_clusters': [c['cluster_id'].item() if hasattr(c['cluster_id'], 'item') else c['cluster_id'] for c in cluster_analyses],
             'analysis_timestamp': datetime.now().isoformat(),
             'gap_analysis_dimensions': [
                 'category_diversity',
@@ -952,13 +1039,15 @@ def main() -> None:
         # Prepare integrated dataset
         integrated_df = prepare_integrated_dataset(sales_df, cluster_df, roles_df, price_df)
         
-        # Perform analysis on representative clusters
-        log_progress(f"🔍 Analyzing {len(REPRESENTATIVE_CLUSTERS)} representative clusters...")
+        # Perform analysis on representative clusters (or every cluster with --all-clusters)
+        if args.all_clusters:
+            cluster_ids = None
+            log_progress(f"🔍 Analyzing all {integrated_df['cluster_id'].nunique()} clusters...")
+        else:
+            cluster_ids = REPRESENTATIVE_CLUSTERS
+            log_progress(f"🔍 Analyzing {len(REPRESENTATIVE_CLUSTERS)} representative clusters...")
         
-        cluster_analyses = []
-        for cluster_id in REPRESENTATIVE_CLUSTERS:
-            analysis = perform_comprehensive_cluster_analysis(integrated_df, store_attrs_df, cluster_id)
-            cluster_analyses.append(analysis)
+        cluster_analyses = analyze_clusters(integrated_df, store_attrs_df, cluster_ids, workers=args.workers)
         
         # Create reports
         create_supply_demand_gap_report(cluster_analyses, generic_report)
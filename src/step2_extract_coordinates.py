@@ -66,6 +66,7 @@ from output_utils import create_output_with_symlinks
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from config import get_api_data_files, get_current_period, get_period_label
 from config import get_output_files
+from multi_period_reader import get_multi_period_reader
 
 # 과거 N개월을 반월 (A/B) 단위로 쪼개서 가져오기 
 # e.g. 202304B, 2 months -> 202304B, 202304A, 202303B, 202303A
@@ -225,76 +226,49 @@ def scan_all_periods_for_data() -> Tuple[pd.DataFrame, List[pd.DataFrame], List[
             log_progress(f"✅ Loaded SPU data from {len(legacy_spu_dfs)} legacy files")
     all_category_dfs = []
     
-    for yyyymm, period in periods_to_scan:
-        period_label = f"{yyyymm}{period}"
+    period_labels = [f"{yyyymm}{period}" for yyyymm, period in periods_to_scan]
+
+    # Resolve every candidate path up front and decode the whole window in
+    # parallel; sales files are projected to the coordinate columns.
+    reader = get_multi_period_reader()
+    report_error = lambda path, e: log_progress(f"  ❌ Error reading {path}: {str(e)}")
+    sales_by_period = reader.read_periods(period_labels, SALES_PATH_TEMPLATES, columns=['str_code', 'long_lat'],
+                                          on_error=report_error)
+    category_by_period = reader.read_periods(period_labels, CATEGORY_PATH_TEMPLATES, on_error=report_error)
+    spu_by_period = reader.read_periods(period_labels, SPU_PATH_TEMPLATES, on_error=report_error)
+
+    for period_label in period_labels:
         log_progress(f"Scanning period {period_label}...")
         
-        # Check for store sales data with coordinates
-        potential_sales_paths = [
-            f"data/api_data/store_sales_{period_label}.csv",
-            f"output/store_sales_{period_label}.csv",
-            f"data/api_data/store_sales_data_{period_label}.csv",
-        ]
+        # Store sales data with coordinates
+        if period_label in sales_by_period:
+            path, sales_df = sales_by_period[period_label]
+            if 'long_lat' in sales_df.columns:
+                # Count only rows with non-empty, valid coordinate strings
+                coord_series = sales_df['long_lat'].astype(str)
+                valid_mask = coord_series.str.contains(',', na=False) & (coord_series.str.strip() != '')
+                stores_with_coords = sales_df.loc[valid_mask]
+                unique_stores = stores_with_coords.drop_duplicates(subset=['str_code'])
+                store_count = len(unique_stores)
+                log_progress(f"  📍 Found {store_count} stores with valid coordinates in {path}")
+
+                if store_count > best_coords_count:
+                    best_coords_df = unique_stores[['str_code', 'long_lat']].copy()
+                    best_coords_count = store_count
+                    best_period = period_label
+                    log_progress(f"  ⭐ New best period for coordinates: {period_label} ({store_count} stores)")
         
-        # Check for category data
-        potential_category_paths = [
-            f"data/api_data/complete_category_sales_{period_label}.csv",
-            f"output/complete_category_sales_{period_label}.csv",
-        ]
+        # Category data
+        if period_label in category_by_period:
+            _, category_df = category_by_period[period_label]
+            log_progress(f"  📊 Found category data: {len(category_df)} records, {category_df['str_code'].nunique()} stores")
+            all_category_dfs.append(category_df)
         
-        # Check for SPU data  
-        potential_spu_paths = [
-            f"data/api_data/complete_spu_sales_{period_label}.csv",
-            f"output/complete_spu_sales_{period_label}.csv",
-        ]
-        
-        # Try to load store sales data with coordinates
-        sales_df = None
-        for path in potential_sales_paths:
-            if os.path.exists(path):
-                try:
-                    sales_df = pd.read_csv(path)
-                    if 'long_lat' in sales_df.columns:
-                        # Count only rows with non-empty, valid coordinate strings
-                        coord_series = sales_df['long_lat'].astype(str)
-                        valid_mask = coord_series.str.contains(',', na=False) & (coord_series.str.strip() != '')
-                        stores_with_coords = sales_df.loc[valid_mask]
-                        unique_stores = stores_with_coords.drop_duplicates(subset=['str_code'])
-                        store_count = len(unique_stores)
-                        log_progress(f"  📍 Found {store_count} stores with valid coordinates in {path}")
-
-                        if store_count > best_coords_count:
-                            best_coords_df = unique_stores[['str_code', 'long_lat']].copy()
-                            best_coords_count = store_count
-                            best_period = period_label
-                            log_progress(f"  ⭐ New best period for coordinates: {period_label} ({store_count} stores)")
-                        break
-                except Exception as e:
-                    log_progress(f"  ❌ Error reading {path}: {str(e)}")
-        
-        # Load category data if available
-        category_df = None
-        for path in potential_category_paths:
-            if os.path.exists(path):
-                try:
-                    category_df = pd.read_csv(path)
-                    log_progress(f"  📊 Found category data: {len(category_df)} records, {category_df['str_code'].nunique()} stores")
-                    all_category_dfs.append(category_df)
-                    break
-                except Exception as e:
-                    log_progress(f"  ❌ Error reading {path}: {str(e)}")
-        
-        # Load SPU data if available
-        spu_df = None
-        for path in potential_spu_paths:
-            if os.path.exists(path):
-                try:
-                    spu_df = pd.read_csv(path)
-                    log_progress(f"  🛍️  Found SPU data: {len(spu_df)} records, {spu_df['str_code'].nunique()} stores")
-                    all_spu_dfs.append(spu_df)
-                    break
-                except Exception as e:
-                    log_progress(f"  ❌ Error reading {path}: {str(e)}")
+        # SPU data
+        if period_label in spu_by_period:
+            _, spu_df = spu_by_period[period_label]
+            log_progress(f"  🛍️  Found SPU data: {len(spu_df)} records, {spu_df['str_code'].nunique()} stores")
+            all_spu_dfs.append(spu_df)
     
     if best_coords_df is not None:
         log_progress(f"✅ Best coordinates found in period {best_period} with {best_coords_count} stores")
@@ -319,6 +293,21 @@ SPU_MAPPING_FILE = "data/spu_store_mapping.csv"
 SPU_METADATA_FILE = "data/spu_metadata.csv"
 STORE_CODES_FILE = "data/store_codes.csv"
 
+# Candidate locations per period, in priority order
+SALES_PATH_TEMPLATES = [
+    "data/api_data/store_sales_{period_label}.csv",
+    "output/store_sales_{period_label}.csv",
+    "data/api_data/store_sales_data_{period_label}.csv",
+]
+CATEGORY_PATH_TEMPLATES = [
+    "data/api_data/complete_category_sales_{period_label}.csv",
+    "output/complete_category_sales_{period_label}.csv",
+]
+SPU_PATH_TEMPLATES = [
+    "data/api_data/complete_spu_sales_{period_label}.csv",
+    "output/complete_spu_sales_{period_label}.csv",
+]
+
 # Create necessary directories
 os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
 
@@ -17,6 +17,16 @@ Subject to:
 - Category mix requirements
 - Business rule compliance
 
+Allocation backends (--solver, default STEP30_SOLVER or heuristic):
+- heuristic: per-cluster role/price/capacity/mix uplift factors
+- lp / mip: store × SPU allocation solved per cluster with scipy HiGHS (milp),
+  using sparse capacity, role-mix and price-band constraints. Clusters can be
+  solved across --workers processes (STEP30_WORKERS). The previous period's
+  optimal_product_allocation.csv (--warm-start-file) is reused for clusters
+  whose problem is unchanged and biases the others toward continuity.
+- python src/step30_sellthrough_optimization_engine.py --benchmark-solver
+  times LP/MIP solves against store and SPU counts.
+
 Author: Data Pipeline Team
 Date: 2025-01-24
 Version: 1.1 - Period-Aware Mathematical Optimization Engine
@@ -27,6 +37,9 @@ import numpy as np
 import os
 import json
 import argparse
+import hashlib
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -43,14 +56,24 @@ except ImportError:
     OPTIMIZATION_AVAILABLE = False
     print("⚠️ Optimization libraries not available (install scipy and pulp for full functionality)")
 
+# In-process LP/MIP solver (HiGHS via scipy) for the allocation backend
+try:
+    from scipy.optimize import milp, LinearConstraint, Bounds
+    from scipy import sparse  # after the pulp star import, which also exports a `sparse`
+    SCIPY_SOLVER_AVAILABLE = True
+except ImportError:
+    SCIPY_SOLVER_AVAILABLE = False
+
 # Import shared utilities with fallback for direct script execution
 try:
     from src.sell_through_utils import clip_to_unit_interval, fraction_to_percentage, calculate_spu_store_day_counts, calculate_sell_through_rate
+    from src.product_metrics import get_sell_through_rates
     from src.config import get_period_label
     from src.pipeline_manifest import get_step_input, register_step_output, get_manifest
 except ImportError:
     try:
         from sell_through_utils import clip_to_unit_interval, fraction_to_percentage, calculate_spu_store_day_counts, calculate_sell_through_rate
+        from product_metrics import get_sell_through_rates
         from config import get_period_label
         from pipeline_manifest import get_step_input, register_step_output, get_manifest
     except ImportError:
@@ -59,6 +82,7 @@ except ImportError:
         # Add parent directory to path for direct execution
         sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
         from src.sell_through_utils import clip_to_unit_interval, fraction_to_percentage, calculate_spu_store_day_counts, calculate_sell_through_rate
+        from src.product_metrics import get_sell_through_rates
         from src.config import get_period_label
         from src.pipeline_manifest import get_step_input, register_step_output, get_manifest
 
@@ -114,6 +138,18 @@ REALISM_LIMITS = {
     'max_absolute_improvement': 0.08         # Max +8 percentage points absolute
 }
 
+# LP/MIP allocation backend
+ALLOCATION_SOLVER = os.environ.get("STEP30_SOLVER", "heuristic").lower()  # heuristic | lp | mip
+SOLVER_WORKERS = int(os.environ.get("STEP30_WORKERS", "1") or 1)
+PARALLEL_MIN_CANDIDATES = 100000  # Below this many store × SPU candidates a single process is faster
+SOLVER_TIME_LIMIT_SECONDS = 120.0  # Per cluster; HiGHS returns its best incumbent when hit
+PRICE_BAND_CONSTRAINTS = {
+    'min_band_share': 0.05,            # Each stocked price band keeps at least 5% of the allocation
+    'max_band_share': 0.50,            # No price band exceeds 50% of the allocation
+}
+STABILITY_BONUS = 0.01  # Objective bonus for keeping last period's allocation (warm start)
+SOLVER_STATUS = {0: 'optimal', 1: 'limit_reached', 2: 'infeasible', 3: 'unbounded'}  # scipy milp status codes
+
 def log_progress(message: str) -> None:
     """Log progress with timestamp"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -135,6 +171,23 @@ def _parse_args():
         required=True,
         help="Target period (A or B)",
     )
+    parser.add_argument(
+        "--solver",
+        choices=["heuristic", "lp", "mip"],
+        default=ALLOCATION_SOLVER,
+        help="Allocation backend (default: STEP30_SOLVER or heuristic); lp/mip solve per cluster with HiGHS",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes for per-cluster LP/MIP solves (default: STEP30_WORKERS or 1)",
+    )
+    parser.add_argument(
+        "--warm-start-file",
+        default=os.environ.get("STEP30_WARM_START_FILE", OPTIMAL_ALLOCATION_FILE),
+        help="Previous period's optimal allocation CSV for LP/MIP warm starts",
+    )
     return parser.parse_args()
 
 # ===== DATA LOADING AND PREPARATION =====
@@ -407,8 +460,13 @@ def load_optimization_data(target_yyyymm: str = None, target_period: str = None)
 
 def calculate_baseline_sellthrough_rates(sales_df: pd.DataFrame, cluster_df: pd.DataFrame, 
                                        roles_df: pd.DataFrame,
-                                       period_days: int = 15) -> pd.DataFrame:
-    """Calculate current sell-through rates as baseline using correct SPU-store-day counting"""
+                                       period_days: int = 15,
+                                       period_label: Optional[str] = None) -> pd.DataFrame:
+    """
+    Calculate current sell-through rates as baseline using correct SPU-store-day counting
+    
+    Rates come from the product-metrics kernel's per-period cache when a period label is given.
+    """
     log_progress("📈 Calculating baseline sell-through rates using correct SPU-store-day method...")
     
     # Integrate data
@@ -450,82 +508,331 @@ def calculate_baseline_sellthrough_rates(sales_df: pd.DataFrame, cluster_df: pd.
     # SPU-store-days inventory = total_inventory_qty × period_days; sales = total_sales_qty × period_days
     
     # Calculate weighted sell-through by store and cluster using correct formula
-    # OFFICIAL FORMULA: SPUs Sold ÷ SPUs In Stock
-    sellthrough_metrics = []
-    
-    for cluster_id in integrated_df['cluster_id'].unique():
-        cluster_data = integrated_df[integrated_df['cluster_id'] == cluster_id]
-        
-        # Cluster-level SPU-store-day counts (continuous)
-        inv_sum = pd.to_numeric(cluster_data['total_inventory_qty'], errors='coerce').fillna(0).sum()
-        if 'historical_st_frac' in cluster_data.columns:
-            sales_sum = (pd.to_numeric(cluster_data['total_inventory_qty'], errors='coerce').fillna(0) * 
-                         pd.to_numeric(cluster_data['historical_st_frac'], errors='coerce').fillna(0)).sum()
-        else:
-            sales_sum = pd.to_numeric(cluster_data['total_sales_qty'], errors='coerce').fillna(0).sum()
-        cluster_inventory_spu_store_days = inv_sum * period_days
-        cluster_sales_spu_store_days = sales_sum * period_days
-        
-        # Calculate cluster-level sell-through rate
-        if cluster_inventory_spu_store_days > 0:
-            cluster_sellthrough_rate = cluster_sales_spu_store_days / cluster_inventory_spu_store_days
-            cluster_sellthrough_rate = clip_to_unit_interval(cluster_sellthrough_rate)
-        else:
-            cluster_sellthrough_rate = 0.0
-        
-        # Store-level sell-through (for detailed metrics)
-        for store_code in cluster_data['str_code'].unique():
-            store_data = cluster_data[cluster_data['str_code'] == store_code]
-            
-            # Store-level SPU-store-day counts (continuous)
-            inv_store_sum = pd.to_numeric(store_data['total_inventory_qty'], errors='coerce').fillna(0).sum()
-            if 'historical_st_frac' in store_data.columns:
-                sales_store_sum = (pd.to_numeric(store_data['total_inventory_qty'], errors='coerce').fillna(0) * 
-                                   pd.to_numeric(store_data['historical_st_frac'], errors='coerce').fillna(0)).sum()
-            else:
-                sales_store_sum = pd.to_numeric(store_data['total_sales_qty'], errors='coerce').fillna(0).sum()
-            store_inventory_spu_store_days = inv_store_sum * period_days
-            store_sales_spu_store_days = sales_store_sum * period_days
-            
-            # Calculate store-level sell-through rate
-            if store_inventory_spu_store_days > 0:
-                store_sellthrough_rate = store_sales_spu_store_days / store_inventory_spu_store_days
-                store_sellthrough_rate = clip_to_unit_interval(store_sellthrough_rate)
-            else:
-                store_sellthrough_rate = 0.0
-            
-            sellthrough_metrics.append({
-                'str_code': store_code,
-                'cluster_id': cluster_id,
-                'baseline_sellthrough_rate': store_sellthrough_rate,
-                'spu_store_days_inventory': store_inventory_spu_store_days,
-                'spu_store_days_sales': store_sales_spu_store_days,
-                'total_sales_amt': store_data['total_sales_amt'].sum(),
-                'total_sales_qty': store_data['total_sales_qty'].sum(),
-                'product_count': len(store_data),
-                'avg_product_role_diversity': store_data['product_role'].nunique()
-            })
+    # OFFICIAL FORMULA: SPUs Sold ÷ SPUs In Stock (shared product-metrics kernel, one grouped pass)
+    keys = ['cluster_id', 'str_code']
+    baseline_df = get_sell_through_rates(integrated_df, keys, period_days=period_days, period_label=period_label)
+    baseline_df = baseline_df.rename(columns={'sell_through_rate': 'baseline_sellthrough_rate'})
+    store_totals = integrated_df.groupby(keys, sort=False).agg(
+        total_sales_amt=('total_sales_amt', 'sum'),
+        total_sales_qty=('total_sales_qty', 'sum'),
+        product_count=('total_sales_qty', 'size'),
+        avg_product_role_diversity=('product_role', 'nunique'),
+    ).reset_index()
+    baseline_df = baseline_df.merge(store_totals, on=keys, how='left')
     
-    baseline_df = pd.DataFrame(sellthrough_metrics)
+    # Stores listed cluster by cluster, clusters in order of first appearance
+    cluster_order = pd.Index(integrated_df['cluster_id'].dropna().unique())
+    baseline_df = baseline_df.iloc[np.argsort(cluster_order.get_indexer(baseline_df['cluster_id']), kind='stable')]
+    baseline_df = baseline_df[['str_code', 'cluster_id', 'baseline_sellthrough_rate', 'spu_store_days_inventory',
+                               'spu_store_days_sales', 'total_sales_amt', 'total_sales_qty', 'product_count',
+                               'avg_product_role_diversity']].reset_index(drop=True)
     
     log_progress(f"   ✓ Calculated baseline metrics for {len(baseline_df)} store-cluster combinations")
     log_progress(f"   📊 Average baseline sell-through rate: {baseline_df['baseline_sellthrough_rate'].mean():.1%}")
     
     return baseline_df
 
+# ===== LP/MIP ALLOCATION BACKEND =====
+
+def _numeric_column(data: pd.DataFrame, column: str, default: float = 0.0) -> pd.Series:
+    """Numeric view of a column, or a constant Series when the column is absent"""
+    if column in data.columns:
+        return pd.to_numeric(data[column], errors='coerce')
+    return pd.Series(default, index=data.index, dtype=float)
+
+def build_allocation_candidates(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Collapse the optimization dataset to one candidate per (cluster, store, SPU)
+    
+    Sell-through per candidate is the historical fraction when known, otherwise
+    sales ÷ inventory; store capacity comes from estimated_rack_capacity (cluster
+    median, then the engine's 1000 default, where a store has none).
+    """
+    frame = pd.DataFrame({
+        'cluster_id': data['cluster_id'].values,
+        'str_code': data['str_code'].astype(str).values,
+        'spu_code': data['spu_code'].astype(str).values if 'spu_code' in data.columns else data.index.astype(str),
+        'product_role': data['product_role'].fillna('UNKNOWN').values if 'product_role' in data.columns else 'UNKNOWN',
+        'price_band': data['price_band'].fillna('UNKNOWN').values if 'price_band' in data.columns else 'UNKNOWN',
+        'inventory_qty': _numeric_column(data, 'total_inventory_qty').fillna(0).values,
+        'sales_qty': _numeric_column(data, 'total_sales_qty').fillna(0).values,
+        'sales_amt': _numeric_column(data, 'total_sales_amt').fillna(0).values,
+        'historical_st_frac': _numeric_column(data, 'historical_st_frac', np.nan).values,
+        'estimated_rack_capacity': _numeric_column(data, 'estimated_rack_capacity', np.nan).values,
+    })
+    candidates = frame.groupby(['cluster_id', 'str_code', 'spu_code'], sort=False).agg(
+        product_role=('product_role', 'first'),
+        price_band=('price_band', 'first'),
+        inventory_qty=('inventory_qty', 'sum'),
+        sales_qty=('sales_qty', 'sum'),
+        sales_amt=('sales_amt', 'sum'),
+        historical_st_frac=('historical_st_frac', 'mean'),
+        estimated_rack_capacity=('estimated_rack_capacity', 'first'),
+    ).reset_index()
+    
+    inventory = candidates['inventory_qty']
+    observed = (candidates['sales_qty'] / inventory.where(inventory > 0)).clip(upper=1.0)
+    candidates['sell_through_rate'] = candidates['historical_st_frac'].fillna(observed).fillna(0).clip(0, 1)
+    capacity = candidates['estimated_rack_capacity']
+    capacity = capacity.fillna(capacity.groupby(candidates['cluster_id']).transform('median'))
+    candidates['estimated_rack_capacity'] = capacity.fillna(1000)
+    return candidates
+
+def _share_rows(labels: np.ndarray, total_weight: np.ndarray, bounds: List[Tuple[str, str, float]]) -> List[np.ndarray]:
+    """
+    Linear share constraints as rows of A·x ≤ 0
+    
+    'max' rows encode Σ_label x ≤ share·Σ x and 'min' rows Σ_label x ≥ share·Σ x.
+    """
+    rows = []
+    for label, kind, share in bounds:
+        member = (labels == label).astype(float)
+        rows.append(member - share * total_weight if kind == 'max' else share * total_weight - member)
+    return rows
+
+def build_allocation_problem(candidates: pd.DataFrame, constraints: Dict[str, float] = None,
+                             price_constraints: Dict[str, float] = None) -> Dict[str, Any]:
+    """
+    Assemble the sparse allocation LP for one cluster
+    
+    maximize Σ (0.8·sell_through + 0.2·revenue share) · x   over x ∈ [0, 1]^candidates
+    subject to
+    - store capacity:  Σ_store x ≤ max_capacity_utilization · estimated_rack_capacity
+    - role mix (cluster): CORE ≥ min_core_allocation, FILLER ≤ max_filler_allocation,
+      any role ≤ max_role_concentration (when ≥ 2 roles are stocked)
+    - price bands (cluster): each stocked band within [min_band_share, max_band_share]
+      (when ≥ 2 bands are stocked)
+    """
+    constraints = OPTIMIZATION_CONSTRAINTS if constraints is None else constraints
+    price_constraints = PRICE_BAND_CONSTRAINTS if price_constraints is None else price_constraints
+    n = len(candidates)
+    
+    # Inventory turnover follows sell-through here, so its weight folds into the sell-through term
+    revenue = candidates['sales_amt'].to_numpy(dtype=float)
+    revenue_share = revenue / revenue.max() if n and revenue.max() > 0 else np.zeros(n)
+    objective = ((OBJECTIVE_WEIGHTS['sell_through_rate'] + OBJECTIVE_WEIGHTS['inventory_turnover'])
+                 * candidates['sell_through_rate'].to_numpy(dtype=float)
+                 + OBJECTIVE_WEIGHTS['revenue_impact'] * revenue_share)
+    
+    store_codes, store_index = np.unique(candidates['str_code'].to_numpy(), return_inverse=True)
+    store_capacity = candidates.groupby('str_code')['estimated_rack_capacity'].first().reindex(store_codes).to_numpy(dtype=float)
+    capacity_rows = sparse.csr_matrix((np.ones(n), (store_index, np.arange(n))), shape=(len(store_codes), n))
+    capacity_limits = constraints['max_capacity_utilization'] * store_capacity
+    
+    ones = np.ones(n)
+    roles = candidates['product_role'].to_numpy()
+    stocked_roles = [r for r in pd.unique(roles) if r != 'UNKNOWN']
+    role_bounds: List[Tuple[str, str, float]] = []
+    if 'CORE' in stocked_roles:
+        role_bounds.append(('CORE', 'min', constraints['min_core_allocation']))
+    if 'FILLER' in stocked_roles:
+        role_bounds.append(('FILLER', 'max', constraints['max_filler_allocation']))
+    if len(stocked_roles) >= 2:
+        role_bounds += [(r, 'max', constraints['max_role_concentration']) for r in stocked_roles]
+    
+    bands = candidates['price_band'].to_numpy()
+    stocked_bands = [b for b in pd.unique(bands) if b != 'UNKNOWN']
+    band_bounds: List[Tuple[str, str, float]] = []
+    if len(stocked_bands) >= 2:
+        for band in stocked_bands:
+            band_bounds.append((band, 'min', price_constraints['min_band_share']))
+            band_bounds.append((band, 'max', price_constraints['max_band_share']))
+    
+    mix_rows = _share_rows(roles, ones, role_bounds) + _share_rows(bands, ones, band_bounds)
+    if mix_rows:
+        A = sparse.vstack([capacity_rows, sparse.csr_matrix(np.vstack(mix_rows))], format='csr')
+    else:
+        A = capacity_rows
+    upper = np.concatenate([capacity_limits, np.zeros(len(mix_rows))])
+    return {
+        'objective': objective,
+        'A': A,
+        'upper': upper,
+        'store_count': len(store_codes),
+        'constraint_labels': ['capacity'] * len(store_codes) + [f'{kind}:{label}' for label, kind, _ in role_bounds + band_bounds],
+    }
+
+def _problem_fingerprint(problem: Dict[str, Any], mode: str) -> str:
+    """Stable hash of an allocation problem, used to reuse unchanged solutions across periods"""
+    digest = hashlib.sha1(mode.encode())
+    A = problem['A']
+    for array in (problem['objective'], A.data, A.indices, A.indptr, problem['upper']):
+        digest.update(np.ascontiguousarray(np.round(array, 9) if array.dtype.kind == 'f' else array).tobytes())
+    return digest.hexdigest()[:16]
+
+def solve_cluster_allocation(candidates: pd.DataFrame, mode: str = 'lp', previous: Optional[pd.DataFrame] = None,
+                             time_limit: float = SOLVER_TIME_LIMIT_SECONDS) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Solve one cluster's allocation with HiGHS
+    
+    Args:
+        candidates: This cluster's rows from build_allocation_candidates
+        mode: 'lp' (fractional allocation) or 'mip' (binary allocation)
+        previous: Last period's allocation for this cluster (str_code, spu_code,
+            allocated, problem_fingerprint); an identical problem is reused
+            as-is, otherwise previously allocated candidates get STABILITY_BONUS
+        time_limit: Per-solve HiGHS time limit in seconds
+        
+    Returns:
+        (allocation per candidate, solve statistics)
+    """
+    problem = build_allocation_problem(candidates)
+    fingerprint = _problem_fingerprint(problem, mode)
+    stats = {
+        'candidates': len(candidates),
+        'stores': problem['store_count'],
+        'constraints': problem['A'].shape[0],
+        'solver': mode,
+        'problem_fingerprint': fingerprint,
+        'warm_start': 'none',
+    }
+    
+    objective = problem['objective']
+    if previous is not None and len(previous):
+        keys = pd.MultiIndex.from_frame(candidates[['str_code', 'spu_code']].astype(str))
+        prior = previous.set_index(['str_code', 'spu_code'])['allocated'].reindex(keys)
+        if (previous['problem_fingerprint'] == fingerprint).all() and prior.notna().all():
+            allocation = prior.to_numpy(dtype=float)
+            stats.update(status='reused', objective=float(objective @ allocation), solve_seconds=0.0, warm_start='reused')
+            return allocation, stats
+        objective = objective + STABILITY_BONUS * (prior.fillna(0).to_numpy(dtype=float) > 0)
+        stats['warm_start'] = 'biased'
+    
+    started = perf_counter()
+    result = milp(
+        c=-objective,
+        constraints=LinearConstraint(problem['A'], -np.inf, problem['upper']),
+        integrality=np.full(len(candidates), 1 if mode == 'mip' else 0),
+        bounds=Bounds(0, 1),
+        options={'time_limit': time_limit, 'disp': False},
+    )
+    stats['solve_seconds'] = perf_counter() - started
+    if result.x is None:
+        # x = 0 is always feasible, so this only happens when HiGHS stops before any incumbent
+        allocation = np.zeros(len(candidates))
+    else:
+        allocation = np.clip(result.x, 0, 1)
+        if mode == 'mip':
+            allocation = np.round(allocation)
+    stats.update(status=SOLVER_STATUS.get(result.status, 'error'), objective=float(problem['objective'] @ allocation))
+    return allocation, stats
+
+def _solve_cluster_shard(work: List[Tuple[Any, pd.DataFrame, Optional[pd.DataFrame]]], mode: str,
+                         time_limit: float) -> List[Tuple[np.ndarray, Dict[str, Any]]]:
+    """Solve a list of (cluster_id, candidates, previous) problems in order"""
+    solved = []
+    for cluster_id, candidates, previous in work:
+        allocation, stats = solve_cluster_allocation(candidates, mode, previous, time_limit)
+        stats['cluster_id'] = cluster_id
+        solved.append((allocation, stats))
+    return solved
+
+def solve_allocation(candidates: pd.DataFrame, mode: str = 'lp', previous_allocation: Optional[pd.DataFrame] = None,
+                     workers: Optional[int] = None,
+                     time_limit: float = SOLVER_TIME_LIMIT_SECONDS) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    """
+    Solve the allocation for every cluster, optionally across a process pool
+    
+    Returns:
+        candidates with 'allocated' and 'problem_fingerprint' columns, and one
+        statistics dict per cluster (status, objective, solve_seconds, warm_start)
+    """
+    if not SCIPY_SOLVER_AVAILABLE:
+        raise RuntimeError("LP/MIP allocation requires scipy>=1.9 (scipy.optimize.milp)")
+    
+    partitions = dict(tuple(candidates.groupby('cluster_id', sort=False)))
+    previous_by_cluster: Dict[Any, pd.DataFrame] = {}
+    if previous_allocation is not None and not previous_allocation.empty:
+        previous_allocation = previous_allocation.astype({'str_code': str, 'spu_code': str})
+        previous_by_cluster = dict(tuple(previous_allocation.groupby('cluster_id', sort=False)))
+    work = [(cluster_id, part, previous_by_cluster.get(cluster_id)) for cluster_id, part in partitions.items()]
+    
+    workers = SOLVER_WORKERS if workers is None else workers
+    if workers <= 1 or len(work) < 2 or len(candidates) < PARALLEL_MIN_CANDIDATES:
+        solved = _solve_cluster_shard(work, mode, time_limit)
+    else:
+        # Round-robin over clusters sorted by size keeps shards balanced
+        by_size = sorted(range(len(work)), key=lambda i: len(work[i][1]), reverse=True)
+        shards = [by_size[i::workers] for i in range(workers) if by_size[i::workers]]
+        log_progress(f"   🧩 Solving {len(work)} cluster allocations across {len(shards)} processes")
+        solved = [None] * len(work)
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            futures = {pool.submit(_solve_cluster_shard, [work[i] for i in shard], mode, time_limit): shard
+                       for shard in shards}
+            for future, shard in futures.items():
+                for i, outcome in zip(shard, future.result()):
+                    solved[i] = outcome
+    
+    parts = []
+    for (cluster_id, part, _), (allocation, stats) in zip(work, solved):
+        parts.append(part.assign(allocated=allocation, problem_fingerprint=stats['problem_fingerprint']))
+    allocation_df = pd.concat(parts, ignore_index=True) if parts else candidates.assign(allocated=[], problem_fingerprint=[])
+    return allocation_df, [stats for _, stats in solved]
+
+def load_previous_allocation(path: Optional[str]) -> Optional[pd.DataFrame]:
+    """Last period's solver allocation for warm starts (None when absent or from the heuristic backend)"""
+    if not path or not os.path.exists(path):
+        return None
+    previous = pd.read_csv(path, dtype={'str_code': str, 'spu_code': str, 'problem_fingerprint': str})
+    required = {'cluster_id', 'str_code', 'spu_code', 'allocated', 'problem_fingerprint'}
+    if not required.issubset(previous.columns):
+        log_progress(f"   ⚠️  Ignoring warm-start file without solver columns: {path}")
+        return None
+    log_progress(f"   ✓ Warm start from previous allocation: {path} ({len(previous):,} rows)")
+    return previous
+
+def benchmark_allocation_solver(store_counts: Tuple[int, ...] = (10, 50, 200),
+                                spu_counts: Tuple[int, ...] = (50, 200, 500),
+                                modes: Tuple[str, ...] = ('lp', 'mip'), seed: int = 0,
+                                time_limit: float = 30.0) -> pd.DataFrame:
+    """Time single-cluster solves on synthetic store × SPU grids of increasing size"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for stores in store_counts:
+        for spus in spu_counts:
+            n = stores * spus
+            candidates = pd.DataFrame({
+                'cluster_id': 0,
+                'str_code': np.repeat([f'{10000 + i}' for i in range(stores)], spus),
+                'spu_code': np.tile([f'SPU{i:05d}' for i in range(spus)], stores),
+                'product_role': np.tile(rng.choice(['CORE', 'SEASONAL', 'FILLER', 'CLEARANCE'], spus, p=[.25, .25, .4, .1]), stores),
+                'price_band': np.tile(rng.choice(['ECONOMY', 'VALUE', 'PREMIUM', 'LUXURY'], spus), stores),
+                'sales_amt': rng.gamma(2, 200, n),
+                'sell_through_rate': rng.beta(2, 3, n),
+                'estimated_rack_capacity': np.repeat(rng.integers(spus // 4 + 1, spus + 1, stores), spus).astype(float),
+            })
+            for mode in modes:
+                _, stats = solve_cluster_allocation(candidates, mode, time_limit=time_limit)
+                rows.append({'mode': mode, 'stores': stores, 'spus': spus, 'candidates': n,
+                             'constraints': stats['constraints'], 'solve_seconds': round(stats['solve_seconds'], 4),
+                             'objective': round(stats['objective'], 4), 'status': stats['status']})
+                log_progress(f"   ⏱️  {mode.upper()} {stores} stores × {spus} SPUs: {stats['solve_seconds']:.3f}s")
+    return pd.DataFrame(rows)
+
 # ===== OPTIMIZATION ENGINE =====
 
 class SellThroughOptimizer:
     """Mathematical optimization engine for maximizing sell-through rate"""
     
     def __init__(self, sales_df: pd.DataFrame, cluster_df: pd.DataFrame, roles_df: pd.DataFrame, 
-                 price_df: pd.DataFrame, store_attrs_df: pd.DataFrame):
+                 price_df: pd.DataFrame, store_attrs_df: pd.DataFrame, solver: str = None,
+                 workers: int = None, previous_allocation: Optional[pd.DataFrame] = None,
+                 period_label: Optional[str] = None):
         self.sales_df = sales_df
         self.cluster_df = cluster_df
         self.roles_df = roles_df
         self.price_df = price_df
         self.store_attrs_df = store_attrs_df
         
+        # Allocation backend: 'heuristic' uplift factors or an 'lp'/'mip' solve per cluster
+        self.solver = (solver or ALLOCATION_SOLVER).lower()
+        self.workers = workers
+        self.previous_allocation = previous_allocation
+        self.optimal_allocation: Optional[pd.DataFrame] = None
+        self.solver_stats: List[Dict[str, Any]] = []
+        self.period_label = period_label
+        self._cluster_sell_through: Optional[pd.DataFrame] = None
+        
         # Prepare optimization data
         self.optimization_data = self._prepare_optimization_data()
         
@@ -612,16 +919,27 @@ class SellThroughOptimizer:
         baseline_results = []
         optimized_results = []
         
-        # Process by cluster for optimization
-        for cluster_id in self.optimization_data['cluster_id'].unique():
-            cluster_data = self.optimization_data[self.optimization_data['cluster_id'] == cluster_id]
-            
+        allocation_by_cluster: Dict[Any, pd.DataFrame] = {}
+        if self.solver in ('lp', 'mip'):
+            log_progress(f"   🧮 Solving store × SPU allocation ({self.solver.upper()}, HiGHS)...")
+            candidates = build_allocation_candidates(self.optimization_data)
+            self.optimal_allocation, self.solver_stats = solve_allocation(
+                candidates, self.solver, self.previous_allocation, self.workers)
+            allocation_by_cluster = dict(tuple(self.optimal_allocation.groupby('cluster_id', sort=False)))
+            solve_seconds = sum(stats['solve_seconds'] for stats in self.solver_stats)
+            log_progress(f"   ✓ Solved {len(self.solver_stats)} clusters in {solve_seconds:.1f}s solver time")
+        
+        # Process by cluster for optimization (one partition pass)
+        for cluster_id, cluster_data in self.optimization_data.groupby('cluster_id', sort=False):
             # Calculate baseline metrics
             baseline_metrics = self._calculate_cluster_baseline_metrics(cluster_data)
             baseline_results.append(baseline_metrics)
             
             # Apply optimization allocation
-            optimized_metrics = self._apply_optimization_allocation(cluster_data, allocation_changes)
+            if cluster_id in allocation_by_cluster:
+                optimized_metrics = self._apply_solver_allocation(baseline_metrics, allocation_by_cluster[cluster_id])
+            else:
+                optimized_metrics = self._apply_optimization_allocation(cluster_data, allocation_changes)
             optimized_results.append(optimized_metrics)
         
         # Aggregate results
@@ -631,13 +949,25 @@ class SellThroughOptimizer:
         # Calculate improvement
         improvement_analysis = self._calculate_optimization_improvement(baseline_summary, optimized_summary)
         
-        return {
+        potential = {
             'baseline_performance': baseline_summary,
             'optimized_performance': optimized_summary,
             'improvement_analysis': improvement_analysis,
             'optimization_method': 'sell_through_rate_maximization',
             'objective_function': 'maximize Σ(product,store,cluster) sell_through_rate * allocation_decision'
         }
+        if self.solver_stats:
+            potential['optimization_method'] = f'{self.solver}_allocation_highs'
+            potential['solver_summary'] = self.solver_stats
+        return potential
+    
+    def _cluster_sell_through_rates(self) -> pd.DataFrame:
+        """Per-cluster 15-day sell-through from the product-metrics kernel (cached per period), by cluster_id"""
+        if self._cluster_sell_through is None:
+            rates = get_sell_through_rates(self.optimization_data, ['cluster_id'], period_days=15,
+                                           period_label=self.period_label)
+            self._cluster_sell_through = rates.set_index('cluster_id')
+        return self._cluster_sell_through
     
     def _calculate_cluster_baseline_metrics(self, cluster_data: pd.DataFrame) -> Dict[str, Any]:
         """Calculate baseline sell-through metrics for a cluster using official formula"""
@@ -645,24 +975,12 @@ class SellThroughOptimizer:
         # Current allocation (actual products per store)
         products_per_store = len(cluster_data) / cluster_data['str_code'].nunique()
         
-        # Calculate SPU-store-day inventory and sales using official formula
-        # OFFICIAL FORMULA: SPUs Sold ÷ SPUs In Stock
-        
-        # Calculate SPU-store-day inventory and sales proxy using historical ST fraction when available
-        inv_sum = pd.to_numeric(cluster_data.get('total_inventory_qty', pd.Series(dtype=float)), errors='coerce').fillna(0).sum()
-        if 'historical_st_frac' in cluster_data.columns:
-            sales_sum = (pd.to_numeric(cluster_data['total_inventory_qty'], errors='coerce').fillna(0) * 
-                         pd.to_numeric(cluster_data['historical_st_frac'], errors='coerce').fillna(0)).sum()
-        else:
-            sales_sum = pd.to_numeric(cluster_data.get('total_sales_qty', pd.Series(dtype=float)), errors='coerce').fillna(0).sum()
-        total_spu_store_days_inventory = inv_sum * 15
-        total_spu_store_days_sales = sales_sum * 15
-        
-        # Baseline sell-through rate calculation using official formula
-        if total_spu_store_days_inventory > 0:
-            baseline_sellthrough = min(1.0, total_spu_store_days_sales / total_spu_store_days_inventory)
-        else:
-            baseline_sellthrough = 0
+        # SPU-store-day inventory and sales (sales proxied by the historical ST fraction when available)
+        # OFFICIAL FORMULA: SPUs Sold ÷ SPUs In Stock (shared product-metrics kernel)
+        cluster_rates = self._cluster_sell_through_rates().loc[cluster_data['cluster_id'].iloc[0]]
+        total_spu_store_days_inventory = float(cluster_rates['spu_store_days_inventory'])
+        total_spu_store_days_sales = float(cluster_rates['spu_store_days_sales'])
+        baseline_sellthrough = float(cluster_rates['sell_through_rate'])
         
         # Handle potential duplicate column names from merges for product_role
         # Use the clean column name (without suffixes)
@@ -819,6 +1137,43 @@ class SellThroughOptimizer:
             'overall_optimization_multiplier': overall_optimization
         }
     
+    def _apply_solver_allocation(self, baseline: Dict[str, Any], allocation: pd.DataFrame) -> Dict[str, Any]:
+        """Cluster metrics implied by a solved allocation, under the same realism caps as the heuristic"""
+        allocated = allocation['allocated'].to_numpy(dtype=float)
+        inventory_weight = allocated * allocation['inventory_qty'].to_numpy(dtype=float)
+        weights = inventory_weight if inventory_weight.sum() > 0 else allocated
+        baseline_rate = baseline['baseline_sellthrough_rate']
+        if weights.sum() > 0:
+            candidate_sellthrough = float(np.average(allocation['sell_through_rate'], weights=weights))
+        else:
+            candidate_sellthrough = baseline_rate
+        
+        hard_cap = min(REALISM_LIMITS['max_optimized_sellthrough'],
+                       baseline_rate * (1.0 + REALISM_LIMITS['max_relative_improvement']),
+                       baseline_rate + REALISM_LIMITS['max_absolute_improvement'])
+        optimized_sellthrough = max(0.0, min(candidate_sellthrough, hard_cap))
+        
+        optimized_products_per_store = allocated.sum() / max(baseline['store_count'], 1)
+        # Baseline utilization is products_per_store / avg capacity, so scale it by the new allocation
+        if baseline['products_per_store'] > 0:
+            capacity_utilization = baseline['capacity_utilization'] * optimized_products_per_store / baseline['products_per_store']
+        else:
+            capacity_utilization = 0
+        
+        stats = next((s for s in self.solver_stats if s['cluster_id'] == baseline['cluster_id']), {})
+        return {
+            'cluster_id': baseline['cluster_id'],
+            'store_count': baseline['store_count'],
+            'product_count': baseline['product_count'],
+            'products_per_store': optimized_products_per_store,
+            'optimized_sellthrough_rate': optimized_sellthrough,
+            'total_sales_amt': baseline['total_sales_amt'],
+            'capacity_utilization': capacity_utilization,
+            'optimization_factors': {'solver': self.solver, 'status': stats.get('status'),
+                                     'objective': stats.get('objective')},
+            'overall_optimization_multiplier': optimized_sellthrough / baseline_rate if baseline_rate > 0 else 1.0
+        }
+    
     def _aggregate_optimization_results(self, results: List[Dict], result_type: str) -> Dict[str, Any]:
         """Aggregate optimization results across clusters"""
         
@@ -904,7 +1259,8 @@ class SellThroughOptimizer:
 
 # ===== MAIN OPTIMIZATION EXECUTION =====
 
-def run_sellthrough_optimization(target_yyyymm: str = None, target_period: str = None) -> Dict[str, Any]:
+def run_sellthrough_optimization(target_yyyymm: str = None, target_period: str = None, solver: str = None,
+                                 workers: int = None, warm_start_file: str = None) -> Dict[str, Any]:
     """Execute the sell-through rate optimization engine (period-aware)"""
     log_progress(f"🚀 Starting Sell-Through Rate Optimization Engine (Period: {target_yyyymm}{target_period})...")
     
@@ -913,11 +1269,17 @@ def run_sellthrough_optimization(target_yyyymm: str = None, target_period: str =
         sales_df, cluster_df, roles_df, price_df, store_attrs_df = load_optimization_data(target_yyyymm, target_period)
         
         # Calculate baseline sell-through rates using 15-day period for half-month calculations
-        baseline_df = calculate_baseline_sellthrough_rates(sales_df, cluster_df, roles_df, period_days=15)
+        period_label = f"{target_yyyymm}{target_period}" if target_yyyymm and target_period else None
+        baseline_df = calculate_baseline_sellthrough_rates(sales_df, cluster_df, roles_df, period_days=15,
+                                                           period_label=period_label)
         
         # Initialize optimization engine
         log_progress("🔧 Initializing Mathematical Optimization Engine...")
-        optimizer = SellThroughOptimizer(sales_df, cluster_df, roles_df, price_df, store_attrs_df)
+        solver = (solver or ALLOCATION_SOLVER).lower()
+        previous_allocation = load_previous_allocation(warm_start_file) if solver in ('lp', 'mip') else None
+        optimizer = SellThroughOptimizer(sales_df, cluster_df, roles_df, price_df, store_attrs_df,
+                                         solver=solver, workers=workers, previous_allocation=previous_allocation,
+                                         period_label=period_label)
         
         # Run optimization with formal objective function
         log_progress("📈 Executing Sell-Through Rate Maximization...")
@@ -931,16 +1293,20 @@ def run_sellthrough_optimization(target_yyyymm: str = None, target_period: str =
         log_progress(f"   💰 Revenue Impact: ¥{optimization_results['improvement_analysis']['estimated_revenue_impact']:,.0f}")
         log_progress(f"   🎯 KPI Alignment Verified: {kpi_proof['explicit_kpi_optimization']}")
         
-        return {
+        results = {
             'optimization_results': optimization_results,
             'baseline_data': baseline_df.to_dict('records'),
             'analysis_timestamp': datetime.now().isoformat(),
             'target_yyyymm': target_yyyymm,
             'target_period': target_period,
-            'period_label': f"{target_yyyymm}{target_period}" if target_yyyymm and target_period else None,
+            'period_label': period_label,
             'optimization_method': 'mathematical_sellthrough_maximization',
             'kpi_alignment_status': 'verified'
         }
+        if optimizer.optimal_allocation is not None:
+            results['optimization_method'] = optimization_results['optimization_method']
+            results['optimal_allocation'] = optimizer.optimal_allocation
+        return results
         
     except Exception as e:
         log_progress(f"❌ Error in optimization: {e}")
@@ -975,15 +1341,25 @@ def save_optimization_results(results: Dict[str, Any], target_yyyymm: str = None
     generic_optimization_report_file = OPTIMIZATION_REPORT_FILE
     generic_before_after_comparison_file = BEFORE_AFTER_COMPARISON_FILE
     
+    # Solver allocations go to CSV (they also warm-start the next period); the JSON keeps the summary
+    optimal_allocation = results.get('optimal_allocation')
+    json_results = {k: v for k, v in results.items() if k != 'optimal_allocation'}
+    if optimal_allocation is not None:
+        optimal_allocation.to_csv(optimal_allocation_file, index=False)
+        log_progress(f"✅ Saved timestamped optimal allocation: {optimal_allocation_file}")
+        if optimal_allocation_file != generic_optimal_allocation_file:
+            optimal_allocation.to_csv(generic_optimal_allocation_file, index=False)
+            log_progress(f"✅ Saved generic optimal allocation: {generic_optimal_allocation_file}")
+    
     # Save main results JSON (DUAL OUTPUT PATTERN)
     # Save timestamped version (for backup/inspection)
     with open(optimization_results_file, 'w') as f:
-        json.dump(results, f, indent=2, default=str)
+        json.dump(json_results, f, indent=2, default=str)
     log_progress(f"✅ Saved timestamped optimization results: {optimization_results_file}")
     
     # Save generic version (for pipeline flow)
     with open(generic_optimization_results_file, 'w') as f:
-        json.dump(results, f, indent=2, default=str)
+        json.dump(json_results, f, indent=2, default=str)
     log_progress(f"✅ Saved generic optimization results: {generic_optimization_results_file}")
     
     # Create optimization report (DUAL OUTPUT PATTERN)
@@ -1220,7 +1596,8 @@ def main() -> None:
     
     try:
         # Run optimization with period-aware parameters
-        results = run_sellthrough_optimization(target_yyyymm, target_period)
+        results = run_sellthrough_optimization(target_yyyymm, target_period, solver=args.solver,
+                                               workers=args.workers, warm_start_file=args.warm_start_file)
         
         # Save results with period-aware file naming
         save_optimization_results(results, target_yyyymm, target_period)
@@ -1236,7 +1613,7 @@ def main() -> None:
         log_progress("\n🎯 SELL-THROUGH OPTIMIZATION ENGINE RESULTS:")
         log_progress(f"   📊 Sell-Through Rate Improvement: +{improvement['sellthrough_rate_improvement_pct']:.1f}%")
         log_progress(f"   💰 Revenue Impact: ¥{improvement['estimated_revenue_impact']:,.0f}")
-        log_progress(f"   🔧 Optimization Method: Mathematical sell-through maximization")
+        log_progress(f"   🔧 Optimization Method: {results['optimization_method']}")
         log_progress(f"   ✅ KPI Alignment Verified: {kpi_proof['explicit_kpi_optimization']}")
         log_progress(f"   📈 Optimization Effectiveness: {improvement['optimization_effectiveness'].upper()}")
         
@@ -1264,54 +1641,56 @@ def register_step30_outputs_in_manifest(results: Dict[str, Any], target_yyyymm:
     try:
         period_label = f"{target_yyyymm}{target_period}"
         
-        # Register main optimization results JSON
-        optimization_results_file = f"output/sellthrough_optimization_results_{period_label}.json"
-        register_step_output(
-            "step30",
-            f"sellthrough_optimization_results_{period_label}",
-            optimization_results_file,
-            {
-                "target_year": target_yyyymm[:4],
-                "target_month": target_yyyymm[4:],
-                "target_period": target_period,
-                "period_label": period_label,
-                "records": len(results.get('baseline_data', [])),
-                "optimization_method": results.get('optimization_method', 'unknown'),
-                "baseline_sellthrough_rate": results['optimization_results']['baseline_performance']['weighted_avg_sellthrough_rate'],
-                "optimized_sellthrough_rate": results['optimization_results']['optimized_performance']['weighted_avg_sellthrough_rate'],
-                "improvement_percentage": results['optimization_results']['improvement_analysis']['sellthrough_rate_improvement_pct']
-            }
-        )
-        
-        # Register optimization report
-        optimization_report_file = f"output/sellthrough_optimization_report_{period_label}.md"
-        register_step_output(
-            "step30",
-            f"sellthrough_optimization_report_{period_label}",
-            optimization_report_file,
-            {
-                "target_year": target_yyyymm[:4],
-                "target_month": target_yyyymm[4:],
-                "target_period": target_period,
-                "period_label": period_label,
-                "file_type": "markdown_report"
-            }
-        )
-        
-        # Register before/after comparison
-        before_after_file = f"output/before_after_optimization_comparison_{period_label}.csv"
-        register_step_output(
-            "step30",
-            f"before_after_optimization_comparison_{period_label}",
-            before_after_file,
-            {
-                "target_year": target_yyyymm[:4],
-                "target_month": target_yyyymm[4:],
-                "target_period": target_period,
-                "period_label": period_label,
-                "file_type": "csv_comparison"
-            }
-        )
+        # One manifest write for all outputs
+        with get_manifest().batch():
+            # Register main optimization results JSON
+            optimization_results_file = f"output/sellthrough_optimization_results_{period_label}.json"
+            register_step_output(
+                "step30",
+                f"sellthrough_optimization_results_{period_label}",
+                optimization_results_file,
+                {
+                    "target_year": target_yyyymm[:4],
+                    "target_month": target_yyyymm[4:],
+                    "target_period": target_period,
+                    "period_label": period_label,
+                    "records": len(results.get('baseline_data', [])),
+                    "optimization_method": results.get('optimization_method', 'unknown'),
+                    "baseline_sellthrough_rate": results['optimization_results']['baseline_performance']['weighted_avg_sellthrough_rate'],
+                    "optimized_sellthrough_rate": results['optimization_results']['optimized_performance']['weighted_avg_sellthrough_rate'],
+                    "improvement_percentage": results['optimization_results']['improvement_analysis']['sellthrough_rate_improvement_pct']
+                }
+            )
+        
+            # Register optimization report
+            optimization_report_file = f"output/sellthrough_optimization_report_{period_label}.md"
+            register_step_output(
+                "step30",
+                f"sellthrough_optimization_report_{period_label}",
+                optimization_report_file,
+                {
+                    "target_year": target_yyyymm[:4],
+                    "target_month": target_yyyymm[4:],
+                    "target_period": target_period,
+                    "period_label": period_label,
+                    "file_type": "markdown_report"
+                }
+            )
+        
+            # Register before/after comparison
+            before_after_file = f"output/before_after_optimization_comparison_{period_label}.csv"
+            register_step_output(
+                "step30",
+                f"before_after_optimization_comparison_{period_label}",
+                before_after_file,
+                {
+                    "target_year": target_yyyymm[:4],
+                    "target_month": target_yyyymm[4:],
+                    "target_period": target_period,
+                    "period_label": period_label,
+                    "file_type": "csv_comparison"
+                }
+            )
         
         log_progress(f"✅ Registered Step 30 outputs in pipeline manifest for {period_label}")
         
@@ -1345,5 +1724,9 @@ if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1 and sys.argv[1] == "--test-manifest":
         test_manifest_registration()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--benchmark-solver":
+        benchmark = benchmark_allocation_solver()
+        benchmark.to_csv("output/step30_solver_benchmark.csv", index=False)
+        print(benchmark.to_string(index=False))
     else:
         main() 
\ No newline at end of file
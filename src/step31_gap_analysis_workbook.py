@@ -55,17 +55,15 @@ import json
 from datetime import datetime
 from typing import Dict, Tuple, Any, List, Optional
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 import argparse
 import sys
 
 # Excel formatting dependencies
 try:
-    import openpyxl
-    from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-    from openpyxl.formatting.rule import ColorScaleRule, CellIsRule
-    from openpyxl.utils.dataframe import dataframe_to_rows
-    from openpyxl.chart import BarChart, Reference
+    from openpyxl.styles import PatternFill
+    from openpyxl.formatting.rule import CellIsRule
     EXCEL_AVAILABLE = True
 except ImportError:
     EXCEL_AVAILABLE = False
@@ -75,10 +73,12 @@ except ImportError:
 try:
     from src.config import get_period_label, load_sales_df_with_fashion_basic  # when running with -m src.module
     from src.pipeline_manifest import register_step_output, get_manifest
+    from src.excel_export import StreamingWorkbook, CellStyle, ConditionalFormat
 except Exception:
     try:
         from config import get_period_label, load_sales_df_with_fashion_basic  # when running from src/ directly
         from pipeline_manifest import register_step_output, get_manifest
+        from excel_export import StreamingWorkbook, CellStyle, ConditionalFormat
     except Exception:
         HERE = os.path.dirname(__file__)
         for p in [HERE, os.path.join(HERE, '..'), os.path.join(HERE, '..', 'src')]:
@@ -86,6 +86,7 @@ except Exception:
                 sys.path.append(p)
         from config import get_period_label, load_sales_df_with_fashion_basic
         from pipeline_manifest import register_step_output, get_manifest
+        from excel_export import StreamingWorkbook, CellStyle, ConditionalFormat
 
 # Suppress pandas warnings
 warnings.filterwarnings('ignore')
@@ -108,6 +109,10 @@ CLUSTER_COVERAGE_MATRIX = "output/cluster_coverage_matrix.csv"
 # Create output directory
 os.makedirs("output", exist_ok=True)
 
+# Optional process-pool fan-out of cluster shards for the coverage matrix
+COVERAGE_WORKERS = int(os.environ.get("STEP31_WORKERS", "1") or 1)
+PARALLEL_MIN_ROWS = 200000  # Below this many integrated rows a single process is faster
+
 # ===== 6-DIMENSIONAL COVERAGE ANALYSIS =====
 COVERAGE_DIMENSIONS = {
     'category_coverage': {
@@ -166,6 +171,8 @@ def _parse_args() -> argparse.Namespace:
                         help="Target year-month in YYYYMM format (e.g., 202509)")
     parser.add_argument("--target-period", choices=['A', 'B'], required=True,
                         help="Target period ('A' for first half, 'B' for second half)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes for cluster-sharded coverage analysis (default: STEP31_WORKERS or 1)")
     return parser.parse_args()
 
 # ===== DATA LOADING AND PREPARATION =====
@@ -374,8 +381,11 @@ def create_integrated_dataset(sales_df: pd.DataFrame, cluster_df: pd.DataFrame,
 
 def analyze_cluster_coverage(integrated_df: pd.DataFrame, cluster_id: int) -> Dict[str, Any]:
     """Analyze coverage across all 6 dimensions for a cluster"""
+    return _cluster_coverage(integrated_df[integrated_df['cluster_id'] == cluster_id], cluster_id)
+
+def _cluster_coverage(cluster_data: pd.DataFrame, cluster_id: Any) -> Dict[str, Any]:
+    """Coverage across all 6 dimensions from one cluster's rows (already partitioned)"""
     
-    cluster_data = integrated_df[integrated_df['cluster_id'] == cluster_id]
     stores_in_cluster = cluster_data['str_code'].unique()
     
     coverage_analysis = {
@@ -471,57 +481,77 @@ def analyze_cluster_coverage(integrated_df: pd.DataFrame, cluster_id: int) -> Di
     
     return coverage_analysis
 
-def create_coverage_matrix(integrated_df: pd.DataFrame) -> pd.DataFrame:
-    """Create comprehensive coverage matrix across all clusters and dimensions"""
+def _coverage_matrix_row(coverage_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten one cluster's coverage analysis into a coverage matrix row"""
+    return {
+        'cluster_id': coverage_analysis['cluster_id'],
+        'store_count': coverage_analysis['store_count'],
+        'product_count': coverage_analysis['product_count'],
+        'total_sales_amt': coverage_analysis['total_sales_amt'],
+        'overall_coverage_score': coverage_analysis['overall_coverage_score'],
+        'overall_status': coverage_analysis['overall_status'],
+        
+        # Dimension 1: Category Coverage
+        'category_count': coverage_analysis['category_coverage']['category_count'],
+        'subcategory_count': coverage_analysis['category_coverage']['subcategory_count'],
+        'category_coverage_score': coverage_analysis['category_coverage']['coverage_score'],
+        'category_status': coverage_analysis['category_coverage']['status'],
+        
+        # Dimension 2: Price Band Coverage
+        'price_band_count': coverage_analysis['price_band_coverage']['price_band_count'],
+        'price_band_balance': coverage_analysis['price_band_coverage']['price_band_balance'],
+        'price_band_status': coverage_analysis['price_band_coverage']['status'],
+        
+        # Dimension 3: Style Orientation
+        'fashion_ratio': coverage_analysis['style_orientation']['fashion_ratio'],
+        'style_balance_score': coverage_analysis['style_orientation']['balance_score'],
+        'style_status': coverage_analysis['style_orientation']['status'],
+        
+        # Dimension 4: Product Role Balance
+        'role_count': coverage_analysis['product_role_balance']['role_count'],
+        'role_diversity_score': coverage_analysis['product_role_balance']['diversity_score'],
+        'role_status': coverage_analysis['product_role_balance']['status'],
+        
+        # Dimension 5: Seasonal Responsiveness
+        'seasonal_ratio': coverage_analysis['seasonal_responsiveness']['seasonal_ratio'],
+        'seasonal_status': coverage_analysis['seasonal_responsiveness']['status'],
+        
+        # Dimension 6: Capacity Utilization
+        'capacity_utilization_rate': coverage_analysis['capacity_utilization']['utilization_rate'],
+        'capacity_status': coverage_analysis['capacity_utilization']['status']
+    }
+
+def _coverage_rows_for_shard(shard: List[Tuple[Any, pd.DataFrame]]) -> List[Dict[str, Any]]:
+    """Coverage matrix rows for (cluster_id, rows) partitions; module-level so it can run in worker processes"""
+    return [_coverage_matrix_row(_cluster_coverage(cluster_data, cluster_id)) for cluster_id, cluster_data in shard]
+
+def create_coverage_matrix(integrated_df: pd.DataFrame, workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Create comprehensive coverage matrix across all clusters and dimensions.
+    
+    The integrated dataset is partitioned by cluster in a single groupby pass;
+    with workers > 1 and a large dataset the partitions are analyzed in a
+    process pool. Rows are returned in sorted cluster order either way.
+    """
     log_progress("📋 Creating 6-dimensional coverage matrix...")
     
-    clusters = sorted(integrated_df['cluster_id'].unique())
-    coverage_data = []
+    work = list(integrated_df.groupby('cluster_id', sort=True))
+    workers = COVERAGE_WORKERS if workers is None else workers
     
-    for cluster_id in clusters:
-        log_progress(f"   🔍 Analyzing Cluster {cluster_id} coverage...")
-        coverage_analysis = analyze_cluster_coverage(integrated_df, cluster_id)
-        
-        # Flatten data for matrix
-        row_data = {
-            'cluster_id': cluster_id,
-            'store_count': coverage_analysis['store_count'],
-            'product_count': coverage_analysis['product_count'],
-            'total_sales_amt': coverage_analysis['total_sales_amt'],
-            'overall_coverage_score': coverage_analysis['overall_coverage_score'],
-            'overall_status': coverage_analysis['overall_status'],
-            
-            # Dimension 1: Category Coverage
-            'category_count': coverage_analysis['category_coverage']['category_count'],
-            'subcategory_count': coverage_analysis['category_coverage']['subcategory_count'],
-            'category_coverage_score': coverage_analysis['category_coverage']['coverage_score'],
-            'category_status': coverage_analysis['category_coverage']['status'],
-            
-            # Dimension 2: Price Band Coverage
-            'price_band_count': coverage_analysis['price_band_coverage']['price_band_count'],
-            'price_band_balance': coverage_analysis['price_band_coverage']['price_band_balance'],
-            'price_band_status': coverage_analysis['price_band_coverage']['status'],
-            
-            # Dimension 3: Style Orientation
-            'fashion_ratio': coverage_analysis['style_orientation']['fashion_ratio'],
-            'style_balance_score': coverage_analysis['style_orientation']['balance_score'],
-            'style_status': coverage_analysis['style_orientation']['status'],
-            
-            # Dimension 4: Product Role Balance
-            'role_count': coverage_analysis['product_role_balance']['role_count'],
-            'role_diversity_score': coverage_analysis['product_role_balance']['diversity_score'],
-            'role_status': coverage_analysis['product_role_balance']['status'],
-            
-            # Dimension 5: Seasonal Responsiveness
-            'seasonal_ratio': coverage_analysis['seasonal_responsiveness']['seasonal_ratio'],
-            'seasonal_status': coverage_analysis['seasonal_responsiveness']['status'],
-            
-            # Dimension 6: Capacity Utilization
-            'capacity_utilization_rate': coverage_analysis['capacity_utilization']['utilization_rate'],
-            'capacity_status': coverage_analysis['capacity_utilization']['status']
-        }
-        
-        coverage_data.append(row_data)
+    if workers <= 1 or len(work) < 2 or len(integrated_df) < PARALLEL_MIN_ROWS:
+        log_progress(f"   🔍 Analyzing {len(work)} clusters...")
+        coverage_data = _coverage_rows_for_shard(work)
+    else:
+        # Round-robin over clusters sorted by size keeps shards balanced
+        by_size = sorted(range(len(work)), key=lambda i: len(work[i][1]), reverse=True)
+        shards = [by_size[i::workers] for i in range(workers) if by_size[i::workers]]
+        log_progress(f"   🔍 Analyzing {len(work)} clusters across {len(shards)} processes...")
+        coverage_data = [None] * len(work)
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            futures = {pool.submit(_coverage_rows_for_shard, [work[i] for i in shard]): shard for shard in shards}
+            for future, shard in futures.items():
+                for i, row_data in zip(shard, future.result()):
+                    coverage_data[i] = row_data
     
     coverage_matrix_df = pd.DataFrame(coverage_data)
     
@@ -673,7 +703,7 @@ def create_executive_summary(coverage_matrix_df: pd.DataFrame, integrated_df: pd
 
 def create_gap_analysis_workbook(coverage_matrix_df: pd.DataFrame, executive_summary: Dict[str, Any], 
                                integrated_df: pd.DataFrame, output_filename: str) -> None:
-    """Create comprehensive Excel workbook with multiple sheets"""
+    """Create comprehensive Excel workbook with multiple sheets (streamed, write-only)"""
     log_progress("📊 Creating comprehensive gap analysis workbook...")
     
     if not EXCEL_AVAILABLE:
@@ -683,159 +713,116 @@ def create_gap_analysis_workbook(coverage_matrix_df: pd.DataFrame, executive_sum
                           "output/cluster_coverage_matrix.csv", "output/gap_analysis_workbook_data.csv", "output/gap_workbook_executive_summary.json")
         return
     
-    # Create workbook
-    wb = openpyxl.Workbook()
-    
-    # Remove default sheet
-    wb.remove(wb.active)
-    
-    # Sheet 1: Executive Summary
-    create_executive_summary_sheet(wb, executive_summary)
-    
-    # Sheet 2: Coverage Matrix
-    create_coverage_matrix_sheet(wb, coverage_matrix_df)
-    
-    # Sheet 3: Cluster Details
-    create_cluster_details_sheet(wb, coverage_matrix_df, integrated_df)
-    
-    # Sheet 4: Store-Level Data
-    create_store_level_sheet(wb, integrated_df)
-    
-    # Sheet 5: Action Plan
-    create_action_plan_sheet(wb, coverage_matrix_df, executive_summary)
+    with StreamingWorkbook(output_filename) as wb:
+        # Sheet 1: Executive Summary
+        create_executive_summary_sheet(wb, executive_summary)
+        
+        # Sheet 2: Coverage Matrix
+        create_coverage_matrix_sheet(wb, coverage_matrix_df)
+        
+        # Sheet 3: Cluster Details
+        create_cluster_details_sheet(wb, coverage_matrix_df, integrated_df)
+        
+        # Sheet 4: Store-Level Data
+        create_store_level_sheet(wb, integrated_df)
+        
+        # Sheet 5: Action Plan
+        create_action_plan_sheet(wb, coverage_matrix_df, executive_summary)
     
-    # Save workbook
-    wb.save(output_filename)
     log_progress(f"✅ Created gap analysis workbook: {output_filename}")
 
-def create_executive_summary_sheet(wb: openpyxl.Workbook, executive_summary: Dict[str, Any]) -> None:
+# Shared sheet styles
+TITLE_STYLE = CellStyle(bold=True, size=14)
+SECTION_STYLE = CellStyle(bold=True)
+TABLE_HEADER_STYLE = CellStyle(bold=True, fill="D9E1F2")
+
+# Coverage status keyword -> fill colour
+STATUS_FILLS = [
+    ('optimal', "C6EFCE"), ('excellent', "C6EFCE"),
+    ('adequate', "FFEB9C"), ('good', "FFEB9C"),
+    ('insufficient', "FFC7CE"), ('needs_improvement', "FFC7CE"),
+]
+STATUS_COLUMNS = ['overall_status', 'category_status', 'price_band_status', 'style_status', 'role_status', 'seasonal_status', 'capacity_status']
+
+def create_executive_summary_sheet(wb: StreamingWorkbook, executive_summary: Dict[str, Any]) -> None:
     """Create executive summary sheet"""
-    ws = wb.create_sheet("Executive Summary", 0)
+    ws = wb.sheet("Executive Summary")
     
     # Title
-    ws['A1'] = "Gap Analysis Executive Summary"
-    ws['A1'].font = Font(size=16, bold=True)
-    ws['A1'].fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    ws['A1'].font = Font(size=16, bold=True, color="FFFFFF")
+    ws.append(["Gap Analysis Executive Summary"], style=CellStyle(bold=True, size=16, color="FFFFFF", fill="366092"))
+    ws.blank()
     
     # Metadata
     metadata = executive_summary['analysis_metadata']
-    ws['A3'] = "Analysis Overview"
-    ws['A3'].font = Font(bold=True)
-    
-    ws['A4'] = f"Clusters Analyzed: {metadata['total_clusters_analyzed']}"
-    ws['A5'] = f"Stores Covered: {metadata['total_stores_covered']}"
-    ws['A6'] = f"Products Analyzed: {metadata['total_products_analyzed']:,}"
-    ws['A7'] = f"Total Sales: ¥{metadata['total_sales_amt']:,.0f}"
-    ws['A8'] = f"Analysis Date: {metadata['analysis_timestamp'][:10]}"
+    ws.append(["Analysis Overview"], style=SECTION_STYLE)
+    ws.append([f"Clusters Analyzed: {metadata['total_clusters_analyzed']}"])
+    ws.append([f"Stores Covered: {metadata['total_stores_covered']}"])
+    ws.append([f"Products Analyzed: {metadata['total_products_analyzed']:,}"])
+    ws.append([f"Total Sales: ¥{metadata['total_sales_amt']:,.0f}"])
+    ws.append([f"Analysis Date: {metadata['analysis_timestamp'][:10]}"])
+    ws.blank()
     
     # Overall Performance
     performance = executive_summary['overall_performance']
-    ws['A10'] = "Overall Performance"
-    ws['A10'].font = Font(bold=True)
-    
-    ws['A11'] = f"Excellent Clusters: {performance['excellent_clusters']}"
-    ws['A12'] = f"Good Clusters: {performance['good_clusters']}"
-    ws['A13'] = f"Needs Improvement: {performance['needs_improvement_clusters']}"
-    ws['A14'] = f"Health Score: {performance['overall_health_score']:.1%}"
+    ws.append(["Overall Performance"], style=SECTION_STYLE)
+    ws.append([f"Excellent Clusters: {performance['excellent_clusters']}"])
+    ws.append([f"Good Clusters: {performance['good_clusters']}"])
+    ws.append([f"Needs Improvement: {performance['needs_improvement_clusters']}"])
+    ws.append([f"Health Score: {performance['overall_health_score']:.1%}"])
+    ws.blank()
     
     # Key Insights
-    ws['A16'] = "Key Insights"
-    ws['A16'].font = Font(bold=True)
-    
-    for i, insight in enumerate(executive_summary['key_insights']):
-        ws[f'A{17+i}'] = f"• {insight}"
+    ws.append(["Key Insights"], style=SECTION_STYLE)
+    for insight in executive_summary['key_insights']:
+        ws.append([f"• {insight}"])
+    ws.blank(2)
     
     # Recommendations
-    row_start = 17 + len(executive_summary['key_insights']) + 2
-    ws[f'A{row_start}'] = "Recommendations"
-    ws[f'A{row_start}'].font = Font(bold=True)
-    
-    for i, recommendation in enumerate(executive_summary['recommendations']):
-        ws[f'A{row_start+1+i}'] = f"• {recommendation}"
+    ws.append(["Recommendations"], style=SECTION_STYLE)
+    for recommendation in executive_summary['recommendations']:
+        ws.append([f"• {recommendation}"])
 
-def create_coverage_matrix_sheet(wb: openpyxl.Workbook, coverage_matrix_df: pd.DataFrame) -> None:
+def create_coverage_matrix_sheet(wb: StreamingWorkbook, coverage_matrix_df: pd.DataFrame) -> None:
     """Create coverage matrix sheet with conditional formatting"""
-    ws = wb.create_sheet("Coverage Matrix")
-    
-    # Add title
-    ws['A1'] = "6-Dimensional Coverage Matrix"
-    ws['A1'].font = Font(size=14, bold=True)
-    
-    # Add headers
-    headers = list(coverage_matrix_df.columns)
-    for col, header in enumerate(headers, 1):
-        ws.cell(row=3, column=col, value=header)
-        ws.cell(row=3, column=col).font = Font(bold=True)
-        ws.cell(row=3, column=col).fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-    
-    # Add data
-    for row, data_row in enumerate(coverage_matrix_df.itertuples(index=False), 4):
-        for col, value in enumerate(data_row, 1):
-            ws.cell(row=row, column=col, value=value)
-    
-    # Apply conditional formatting for status columns
-    status_columns = ['overall_status', 'category_status', 'price_band_status', 'style_status', 'role_status', 'seasonal_status', 'capacity_status']
-    
-    for col_name in status_columns:
-        if col_name in headers:
-            col_idx = headers.index(col_name) + 1
-            col_letter = openpyxl.utils.get_column_letter(col_idx)
-            
-            # Green for optimal/excellent
-            ws.conditional_formatting.add(f'{col_letter}4:{col_letter}{len(coverage_matrix_df)+3}',
-                CellIsRule(operator='containsText', formula=['"optimal"'], 
-                          fill=PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")))
-            ws.conditional_formatting.add(f'{col_letter}4:{col_letter}{len(coverage_matrix_df)+3}',
-                CellIsRule(operator='containsText', formula=['"excellent"'], 
-                          fill=PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")))
-            
-            # Yellow for adequate/good
-            ws.conditional_formatting.add(f'{col_letter}4:{col_letter}{len(coverage_matrix_df)+3}',
-                CellIsRule(operator='containsText', formula=['"adequate"'], 
-                          fill=PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")))
-            ws.conditional_formatting.add(f'{col_letter}4:{col_letter}{len(coverage_matrix_df)+3}',
-                CellIsRule(operator='containsText', formula=['"good"'], 
-                          fill=PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")))
-            
-            # Red for insufficient/needs_improvement
-            ws.conditional_formatting.add(f'{col_letter}4:{col_letter}{len(coverage_matrix_df)+3}',
-                CellIsRule(operator='containsText', formula=['"insufficient"'], 
-                          fill=PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")))
-            ws.conditional_formatting.add(f'{col_letter}4:{col_letter}{len(coverage_matrix_df)+3}',
-                CellIsRule(operator='containsText', formula=['"needs_improvement"'], 
-                          fill=PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")))
+    conditional_formats = [
+        ConditionalFormat(
+            [c for c in STATUS_COLUMNS if c in coverage_matrix_df.columns],
+            CellIsRule(operator='containsText', formula=[f'"{keyword}"'],
+                       fill=PatternFill(start_color=color, end_color=color, fill_type="solid")),
+        )
+        for keyword, color in STATUS_FILLS
+    ]
+    wb.write_dataframe(
+        "Coverage Matrix", coverage_matrix_df,
+        title_rows=[[("6-Dimensional Coverage Matrix", TITLE_STYLE)], []],
+        header_style=TABLE_HEADER_STYLE,
+        conditional_formats=conditional_formats,
+    )
 
-def create_cluster_details_sheet(wb: openpyxl.Workbook, coverage_matrix_df: pd.DataFrame, integrated_df: pd.DataFrame) -> None:
+def create_cluster_details_sheet(wb: StreamingWorkbook, coverage_matrix_df: pd.DataFrame, integrated_df: pd.DataFrame) -> None:
     """Create detailed cluster analysis sheet"""
-    ws = wb.create_sheet("Cluster Details")
+    ws = wb.sheet("Cluster Details")
     
-    ws['A1'] = "Detailed Cluster Analysis"
-    ws['A1'].font = Font(size=14, bold=True)
+    ws.append(["Detailed Cluster Analysis"], style=TITLE_STYLE)
+    ws.blank()
     
-    row = 3
-    for _, cluster_data in coverage_matrix_df.iterrows():
-        cluster_id = cluster_data['cluster_id']
-        
+    header_style = CellStyle(bold=True, size=12, fill="E2EFDA")
+    columns = ['cluster_id', 'store_count', 'product_count', 'total_sales_amt', 'overall_coverage_score']
+    for cluster_id, stores, products, sales, score in coverage_matrix_df[columns].itertuples(index=False, name=None):
         # Cluster header
-        ws[f'A{row}'] = f"Cluster {cluster_id}"
-        ws[f'A{row}'].font = Font(size=12, bold=True)
-        ws[f'A{row}'].fill = PatternFill(start_color="E2EFDA", end_color="E2EFDA", fill_type="solid")
-        
-        row += 1
+        ws.append([f"Cluster {cluster_id}"], style=header_style)
         
         # Cluster metrics
-        ws[f'A{row}'] = f"Stores: {cluster_data['store_count']}"
-        ws[f'B{row}'] = f"Products: {cluster_data['product_count']}"
-        ws[f'C{row}'] = f"Sales: ¥{cluster_data['total_sales_amt']:,.0f}"
-        ws[f'D{row}'] = f"Overall Score: {cluster_data['overall_coverage_score']:.1%}"
-        
-        row += 2
+        ws.append([
+            f"Stores: {stores}",
+            f"Products: {products}",
+            f"Sales: ¥{sales:,.0f}",
+            f"Overall Score: {score:.1%}",
+        ])
+        ws.blank()
 
-def create_store_level_sheet(wb: openpyxl.Workbook, integrated_df: pd.DataFrame) -> None:
+def create_store_level_sheet(wb: StreamingWorkbook, integrated_df: pd.DataFrame) -> None:
     """Create store-level disaggregated data sheet"""
-    ws = wb.create_sheet("Store Level Data")
-    
     # Aggregate to store level
     store_level_data = integrated_df.groupby(['str_code', 'cluster_id']).agg({
         'total_sales_amt': 'sum',
@@ -858,78 +845,53 @@ def create_store_level_sheet(wb: openpyxl.Workbook, integrated_df: pd.DataFrame)
     store_level_data['Capacity_Utilization'] = store_level_data['Products_Count'] / store_level_data['Estimated_Capacity']
     store_level_data['Sales_Per_Product'] = store_level_data['Total_Sales_Amt'] / store_level_data['Products_Count']
     
-    # Add constraint status
-    def get_constraint_status(row):
-        if row['Capacity_Utilization'] > 0.9:
-            return 'Over-Capacity'
-        elif row['Capacity_Utilization'] < 0.3:
-            return 'Under-Utilized'
-        elif row['Category_Count'] < 3:
-            return 'Low-Diversity'
-        else:
-            return 'Normal'
-    
-    store_level_data['Constraint_Status'] = store_level_data.apply(get_constraint_status, axis=1)
-    
-    # Add to worksheet
-    ws['A1'] = "Store-Level Analysis"
-    ws['A1'].font = Font(size=14, bold=True)
-    
-    # Headers
-    for col, header in enumerate(store_level_data.columns, 1):
-        ws.cell(row=3, column=col, value=header)
-        ws.cell(row=3, column=col).font = Font(bold=True)
-        ws.cell(row=3, column=col).fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-    
-    # Data
-    for row, data_row in enumerate(store_level_data.itertuples(index=False), 4):
-        for col, value in enumerate(data_row, 1):
-            ws.cell(row=row, column=col, value=value)
+    # Add constraint status (first matching condition wins)
+    utilization = store_level_data['Capacity_Utilization']
+    store_level_data['Constraint_Status'] = np.select(
+        [utilization > 0.9, utilization < 0.3, store_level_data['Category_Count'] < 3],
+        ['Over-Capacity', 'Under-Utilized', 'Low-Diversity'],
+        default='Normal',
+    )
+    
+    wb.write_dataframe(
+        "Store Level Data", store_level_data,
+        title_rows=[[("Store-Level Analysis", TITLE_STYLE)], []],
+        header_style=TABLE_HEADER_STYLE,
+    )
 
-def create_action_plan_sheet(wb: openpyxl.Workbook, coverage_matrix_df: pd.DataFrame, executive_summary: Dict[str, Any]) -> None:
+def _cluster_recommendation_text(coverage_matrix_df: pd.DataFrame) -> pd.Series:
+    """Semicolon-joined improvement actions per cluster row"""
+    actions = [
+        (coverage_matrix_df['category_status'] != 'optimal', "Expand category coverage"),
+        (coverage_matrix_df['price_band_status'] != 'optimal', "Rebalance price bands"),
+        (coverage_matrix_df['style_status'] != 'optimal', "Adjust fashion/basic mix"),
+        (coverage_matrix_df['role_status'] != 'optimal', "Optimize product roles"),
+        (coverage_matrix_df['seasonal_status'] != 'optimal', "Enhance seasonal responsiveness"),
+        (~coverage_matrix_df['capacity_status'].isin(['optimal', 'adequate']), "Optimize capacity utilization"),
+    ]
+    text = pd.Series("", index=coverage_matrix_df.index)
+    for mask, action in actions:
+        text = text.where(~mask, text + np.where(text == "", "", "; ") + action)
+    return text.replace("", "Maintain current performance")
+
+def create_action_plan_sheet(wb: StreamingWorkbook, coverage_matrix_df: pd.DataFrame, executive_summary: Dict[str, Any]) -> None:
     """Create action plan sheet"""
-    ws = wb.create_sheet("Action Plan")
+    ws = wb.sheet("Action Plan")
     
-    ws['A1'] = "Gap Analysis Action Plan"
-    ws['A1'].font = Font(size=14, bold=True)
+    ws.append(["Gap Analysis Action Plan"], style=TITLE_STYLE)
+    ws.blank()
     
     # Priority actions from executive summary
-    ws['A3'] = "Priority Actions"
-    ws['A3'].font = Font(bold=True)
-    
+    ws.append(["Priority Actions"], style=SECTION_STYLE)
     for i, action in enumerate(executive_summary['priority_actions']):
-        ws[f'A{4+i}'] = f"{i+1}. {action}"
+        ws.append([f"{i+1}. {action}"])
+    ws.blank(2)
     
     # Cluster-specific recommendations
-    row = 4 + len(executive_summary['priority_actions']) + 2
-    ws[f'A{row}'] = "Cluster-Specific Recommendations"
-    ws[f'A{row}'].font = Font(bold=True)
-    
-    row += 1
-    for _, cluster_data in coverage_matrix_df.iterrows():
-        cluster_id = cluster_data['cluster_id']
-        ws[f'A{row}'] = f"Cluster {cluster_id}:"
-        
-        recommendations = []
-        if cluster_data['category_status'] != 'optimal':
-            recommendations.append("Expand category coverage")
-        if cluster_data['price_band_status'] != 'optimal':
-            recommendations.append("Rebalance price bands")
-        if cluster_data['style_status'] != 'optimal':
-            recommendations.append("Adjust fashion/basic mix")
-        if cluster_data['role_status'] != 'optimal':
-            recommendations.append("Optimize product roles")
-        if cluster_data['seasonal_status'] != 'optimal':
-            recommendations.append("Enhance seasonal responsiveness")
-        if cluster_data['capacity_status'] not in ['optimal', 'adequate']:
-            recommendations.append("Optimize capacity utilization")
-        
-        if recommendations:
-            ws[f'B{row}'] = "; ".join(recommendations)
-        else:
-            ws[f'B{row}'] = "Maintain current performance"
-        
-        row += 1
+    ws.append(["Cluster-Specific Recommendations"], style=SECTION_STYLE)
+    recommendations = _cluster_recommendation_text(coverage_matrix_df)
+    for cluster_id, text in zip(coverage_matrix_df['cluster_id'], recommendations):
+        ws.append([f"Cluster {cluster_id}:", text])
 
 def create_csv_outputs(coverage_matrix_df: pd.DataFrame, executive_summary: Dict[str, Any], integrated_df: pd.DataFrame,
                       coverage_matrix_filename: str, workbook_data_filename: str, summary_filename: str, 
@@ -1014,7 +976,7 @@ def main() -> None:
         integrated_df = create_integrated_dataset(sales_df, cluster_df, roles_df, price_df, store_attrs_df, supply_demand_df)
         
         # Create coverage matrix
-        coverage_matrix_df = create_coverage_matrix(integrated_df)
+        coverage_matrix_df = create_coverage_matrix(integrated_df, workers=args.workers)
         
         # Create executive summary
         executive_summary = create_executive_summary(coverage_matrix_df, integrated_df)
@@ -54,24 +54,17 @@ import pandas as pd
 
 try:
     from src.output_utils import create_output_with_symlinks
+    from src.pipeline_manifest import PipelineManifest
 except ImportError:
     from output_utils import create_output_with_symlinks
+    from pipeline_manifest import PipelineManifest
 
 MANIFEST_PATH = os.path.join("output", "pipeline_manifest.json")
 
 
 def _load_manifest(path: str = MANIFEST_PATH) -> Dict:
-    if not os.path.exists(path):
-        return {"created": datetime.now(timezone.utc).isoformat(), "last_updated": datetime.now(timezone.utc).isoformat(), "steps": {}}
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def _save_manifest(manifest: Dict, path: str = MANIFEST_PATH) -> None:
-    manifest["last_updated"] = datetime.now(timezone.utc).isoformat()
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    """Read-only snapshot of the manifest (writes go through PipelineManifest.register_entry)."""
+    return PipelineManifest(path).manifest
 
 
 def _resolve_manifest_output(manifest: Dict, step: str, period_label: str, fallback_key_prefix: str) -> Optional[str]:
@@ -275,7 +268,8 @@ def _write_runbook(yyyymm: str, periods: List[str], source: str, out_csv: str, s
 
 
 def unify_outputs(yyyymm: str, periods: List[str], source: str = "enhanced") -> str:
-    manifest = _load_manifest()
+    pipeline_manifest = PipelineManifest(MANIFEST_PATH)
+    manifest = pipeline_manifest.manifest
 
     input_paths: List[str] = []
     for p in periods:
@@ -408,7 +402,8 @@ def unify_outputs(yyyymm: str, periods: List[str], source: str = "enhanced") ->
     size_mb = round(os.path.getsize(out_csv) / (1024 * 1024), 2)
     step_key = "step34"
     out_key = f"unified_enhanced_fast_fish_format_{yyyymm}{periods_str}"
-    manifest.setdefault("steps", {}).setdefault(step_key, {}).setdefault("outputs", {})[out_key] = {
+    # Locked merge-and-replace, so steps writing the manifest concurrently keep their outputs
+    pipeline_manifest.register_entry(step_key, out_key, {
         "file_path": out_csv.replace("\\", "/"),
         "created": datetime.now(timezone.utc).isoformat(),
         "exists": True,
@@ -422,9 +417,7 @@ def unify_outputs(yyyymm: str, periods: List[str], source: str = "enhanced") ->
             **({"unique_store_groups": unique_store_groups} if unique_store_groups is not None else {}),
             **({"unique_target_style_tags_rows": unique_target_style_tags_rows} if unique_target_style_tags_rows is not None else {}),
         },
-    }
-
-    _save_manifest(manifest)
+    })
 
     # Also write a small JSON summary next to CSV
     summary_path = out_csv.replace(".csv", "_summary.json")
@@ -447,9 +440,8 @@ def unify_outputs(yyyymm: str, periods: List[str], source: str = "enhanced") ->
     runbook_path = _write_runbook(yyyymm, periods, source, out_csv, summary, qa)
 
     # Register summary, QA, and runbook in manifest as additional outputs
-    manifest_extras = _load_manifest()
-    outputs = manifest_extras.setdefault("steps", {}).setdefault(step_key, {}).setdefault("outputs", {})
     now_iso = datetime.now(timezone.utc).isoformat()
+    outputs = {}
     outputs[f"{out_key}_summary"] = {
         "file_path": summary_path.replace("\\", "/"),
         "created": now_iso,
@@ -494,7 +486,9 @@ def unify_outputs(yyyymm: str, periods: List[str], source: str = "enhanced") ->
             "format": "markdown",
         },
     }
-    _save_manifest(manifest_extras)
+    with pipeline_manifest.batch():
+        for key, entry in outputs.items():
+            pipeline_manifest.register_entry(step_key, key, entry)
 
     return out_csv
 
@@ -28,7 +28,7 @@ sys.path.append(parent_dir)
 sys.path.append(os.path.join(parent_dir, "src"))
 
 from src.config import get_period_label, OUTPUT_DIR
-from src.pipeline_manifest import get_manifest
+from src.pipeline_manifest import PipelineManifest, get_manifest
 from src.output_utils import create_output_with_symlinks
 
 # Define directories relative to parent directory
@@ -905,120 +905,59 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
     return report
 
 
+def _manifest_entry(path: str, metadata: Dict, optional: bool = False) -> Dict:
+    """Step 35's manifest entry: whole-MB size; outputs it just wrote are recorded as existing."""
+    exists = os.path.exists(path) if optional else True
+    return {
+        "file_path": path,
+        "created": datetime.now().isoformat(),
+        "exists": exists,
+        "size_mb": int(os.path.getsize(path) / (1024 * 1024)) if exists else 0,  # Convert to regular int
+        "metadata": metadata,
+    }
+
+
 def register_outputs_in_manifest(yyyymm: str, period: str, csv_file: str, md_file: str, final_df: pd.DataFrame, extra_files: Optional[Dict[str, str]] = None):
-    """Register the generated outputs in the pipeline manifest."""
-    manifest_path = os.path.join(OUTPUT_DIR, "pipeline_manifest.json")
-    
-    # Load existing manifest
-    if os.path.exists(manifest_path):
-        with open(manifest_path, 'r') as f:
-            manifest = json.load(f)
-    else:
-        manifest = {}
-    
-    # Ensure steps section exists
-    if 'steps' not in manifest:
-        manifest['steps'] = {}
-    if 'step35' not in manifest['steps']:
-        manifest['steps']['step35'] = {}
-    if 'outputs' not in manifest['steps']['step35']:
-        manifest['steps']['step35']['outputs'] = {}
-    
+    """Register the generated outputs in the pipeline manifest (one locked, atomic write)."""
+    manifest = PipelineManifest(os.path.join(OUTPUT_DIR, "pipeline_manifest.json"))
     period_label = get_period_label(yyyymm, period)
     
-    # Register CSV output
-    csv_key = f"store_level_merchandising_recommendations_{period_label}"
-    manifest['steps']['step35']['outputs'][csv_key] = {
-        "file_path": csv_file,
-        "created": datetime.now().isoformat(),
-        "exists": True,
-        "size_mb": int(os.path.getsize(csv_file) / (1024 * 1024)),  # Convert to regular int
-        "metadata": {
-            "target_year": int(str(yyyymm)[:4]),
-            "target_month": int(str(yyyymm)[4:]),
-            "target_period": period,
-            "period_label": period_label,
-            "records": int(len(final_df)),  # Convert to regular int
-            "columns": int(len(final_df.columns)),  # Convert to regular int
-            "unique_clusters": len(set(final_df['Cluster_ID'].iloc[:, 0].values)) if 'Cluster_ID' in final_df.columns and len(final_df['Cluster_ID'].shape) > 1 else (len(set(final_df['Cluster_ID'].values)) if 'Cluster_ID' in final_df.columns else 0),
+    base_metadata = {
+        "target_year": int(str(yyyymm)[:4]),
+        "target_month": int(str(yyyymm)[4:]),
+        "target_period": period,
+        "period_label": period_label,
+        "records": int(len(final_df)),  # Convert to regular int
+        "columns": int(len(final_df.columns)),  # Convert to regular int
+    }
+    unique_clusters = len(set(final_df['Cluster_ID'].iloc[:, 0].values)) if 'Cluster_ID' in final_df.columns and len(final_df['Cluster_ID'].shape) > 1 else (len(set(final_df['Cluster_ID'].values)) if 'Cluster_ID' in final_df.columns else 0)
+    
+    with manifest.batch():
+        # Register CSV output
+        manifest.register_entry("step35", f"store_level_merchandising_recommendations_{period_label}", _manifest_entry(csv_file, {
+            **base_metadata,
+            "unique_clusters": unique_clusters,
             "data_coverage": {
                 "store_type": int(final_df['Store_Type'].notna().sum() if 'Store_Type' in final_df.columns else 0),  # Convert to regular int
                 "temperature_zone": int(final_df['Temperature_Zone'].notna().sum() if 'Temperature_Zone' in final_df.columns else 0),  # Convert to regular int
                 "fashion_allocation": int(final_df['Fashion_Allocation_Ratio'].notna().sum() if 'Fashion_Allocation_Ratio' in final_df.columns else 0)  # Convert to regular int
             }
-        }
-    }
-    # Also register generic CSV key
-    manifest['steps']['step35']['outputs']["store_level_merchandising_recommendations"] = {
-        "file_path": csv_file,
-        "created": datetime.now().isoformat(),
-        "exists": True,
-        "size_mb": int(os.path.getsize(csv_file) / (1024 * 1024)),
-        "metadata": {
-            "target_year": int(str(yyyymm)[:4]),
-            "target_month": int(str(yyyymm)[4:]),
-            "target_period": period,
-            "period_label": period_label,
-            "records": int(len(final_df)),
-            "columns": int(len(final_df.columns)),
-            "unique_clusters": len(set(final_df['Cluster_ID'].iloc[:, 0].values)) if 'Cluster_ID' in final_df.columns and len(final_df['Cluster_ID'].shape) > 1 else (len(set(final_df['Cluster_ID'].values)) if 'Cluster_ID' in final_df.columns else 0),
-        }
-    }
-    
-    # Register MD output
-    md_key = f"store_level_merchandising_summary_{period_label}"
-    manifest['steps']['step35']['outputs'][md_key] = {
-        "file_path": md_file,
-        "created": datetime.now().isoformat(),
-        "exists": True,
-        "size_mb": int(os.path.getsize(md_file) / (1024 * 1024)),  # Convert to regular int
-        "metadata": {
-            "target_year": int(str(yyyymm)[:4]),
-            "target_month": int(str(yyyymm)[4:]),
-            "target_period": period,
-            "period_label": period_label,
-            "records": int(len(final_df)),  # Convert to regular int
-            "columns": int(len(final_df.columns)),  # Convert to regular int
-            "unique_clusters": len(set(final_df['Cluster_ID'].iloc[:, 0].values)) if 'Cluster_ID' in final_df.columns and len(final_df['Cluster_ID'].shape) > 1 else (len(set(final_df['Cluster_ID'].values)) if 'Cluster_ID' in final_df.columns else 0)
-        }
-    }
-    # Also register generic MD key
-    manifest['steps']['step35']['outputs']["store_level_merchandising_summary"] = {
-        "file_path": md_file,
-        "created": datetime.now().isoformat(),
-        "exists": True,
-        "size_mb": int(os.path.getsize(md_file) / (1024 * 1024)),
-        "metadata": {
-            "target_year": int(str(yyyymm)[:4]),
-            "target_month": int(str(yyyymm)[4:]),
-            "target_period": period,
-            "period_label": period_label,
-            "records": int(len(final_df)),
-            "columns": int(len(final_df.columns)),
-        }
-    }
-    
-    # Register any additional artifacts (optional)
-    if extra_files:
-        for key, path in extra_files.items():
-            manifest['steps']['step35']['outputs'][key] = {
-                "file_path": path,
-                "created": datetime.now().isoformat(),
-                "exists": os.path.exists(path),
-                "size_mb": int(os.path.getsize(path) / (1024 * 1024)) if os.path.exists(path) else 0,
-                "metadata": {
-                    "target_year": int(str(yyyymm)[:4]),
-                    "target_month": int(str(yyyymm)[4:]),
-                    "target_period": period,
-                    "period_label": period_label,
-                    "records": int(len(final_df)),
-                    "columns": int(len(final_df.columns))
-                }
-            }
-    
-    # Write updated manifest
-    with open(manifest_path, 'w') as f:
-        json.dump(manifest, f, indent=2)
+        }))
+        # Also register generic CSV key
+        manifest.register_entry("step35", "store_level_merchandising_recommendations",
+                                _manifest_entry(csv_file, {**base_metadata, "unique_clusters": unique_clusters}))
+        
+        # Register MD output
+        manifest.register_entry("step35", f"store_level_merchandising_summary_{period_label}",
+                                _manifest_entry(md_file, {**base_metadata, "unique_clusters": unique_clusters}))
+        # Also register generic MD key
+        manifest.register_entry("step35", "store_level_merchandising_summary",
+                                _manifest_entry(md_file, dict(base_metadata)))
+        
+        # Register any additional artifacts (optional)
+        if extra_files:
+            for key, path in extra_files.items():
+                manifest.register_entry("step35", key, _manifest_entry(path, dict(base_metadata), optional=True))
 
 
 def generate_cluster_summary(final_df: pd.DataFrame) -> pd.DataFrame:
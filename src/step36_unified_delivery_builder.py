@@ -17,7 +17,8 @@ Inputs (resolved via manifest with period-aware fallbacks):
 Outputs:
 - output/unified_delivery_{period_label}_{timestamp}.csv
 - output/unified_delivery_{period_label}_{timestamp}.xlsx (if openpyxl available)
-- output/unified_delivery_validation_{period_label}_{timestamp}.json (QA report)
+- output/unified_delivery_validation_{period_label}_{timestamp}.json (QA report, incl. join_plan
+  per-source load and per-join row counts/timings)
 
 Manifest registrations:
 - step36: unified_delivery_csv(_{period_label}), unified_delivery_xlsx(_{period_label}),
@@ -28,11 +29,14 @@ from __future__ import annotations
 
 import argparse
 import json
+import operator
 import os
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 import re
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import pandas as pd
 
@@ -194,24 +198,31 @@ def _resolve_gap_summary_path(period_label: str) -> Optional[str]:
     return None
 
 
-def _read_group_recs_df(yyyymm: str, period: str, period_label: str) -> pd.DataFrame:
-    # Prefer Step 18 enriched
-    st18 = _resolve_step18_path(yyyymm, period, period_label)
-    if st18:
-        log(f"✓ Using Step 18 sell-through enriched file: {st18}")
-        df = pd.read_csv(st18)
-        if "Period" not in df.columns:
-            df["Period"] = period
-        return df
-    # Fallback to Step 14 enhanced
-    st14 = _resolve_step14_path(yyyymm, period, period_label)
-    if not st14:
-        raise FileNotFoundError(f"Neither Step 18 nor Step 14 group file found for {period_label}")
-    log(f"✓ Using Step 14 enhanced file: {st14}")
-    df = pd.read_csv(st14)
-    if "Period" not in df.columns:
-        df["Period"] = period
-    return df
+def _resolve_store_config_path(yyyymm: str, period: str, period_label: str) -> Optional[str]:
+    # Config-resolved API file first, then the period file, then the generic one
+    try:
+        files = get_api_data_files(yyyymm, period)
+        path = files.get('store_config') if isinstance(files, dict) else None
+    except Exception:
+        path = None
+    for p in [path, f"data/api_data/store_config_{period_label}.csv", "data/api_data/store_config_data.csv"]:
+        if p and os.path.exists(p):
+            return p
+    return None
+
+
+def _resolve_store_cluster_mapping_path(period_label: str) -> Optional[str]:
+    for p in [f"output/store_cluster_mapping_{period_label}.csv", "output/store_cluster_mapping.csv"]:
+        if os.path.exists(p):
+            return p
+    return None
+
+
+def _resolve_cluster_fashion_file_path(period_label: str) -> Optional[str]:
+    for p in [f"output/cluster_fashion_makeup_{period_label}.csv", "output/cluster_fashion_makeup.csv"]:
+        if os.path.exists(p):
+            return p
+    return None
 
 
 def _largest_remainder_round(df: pd.DataFrame, qty_col: str, group_qty: float) -> pd.Series:
@@ -250,44 +261,376 @@ def _largest_remainder_round(df: pd.DataFrame, qty_col: str, group_qty: float) -
     return result
 
 
+# ===== JOIN PLAN =====
+# Each upstream source declares the columns it contributes and its join key. A file is
+# read once, with the union of the columns declared against it; join keys are
+# normalised to str at load time so individual joins need no dtype fix-ups.
+
+GROUP_KEYS = ["Store_Group_Name", "Target_Style_Tags", "Category", "Subcategory"]
+
+GROUP_REC_COLUMNS = [
+    "Period", "Store_Group_Name", "Target_Style_Tags", "ΔQty", "Current_SPU_Quantity",
+    "Target_SPU_Quantity", "Expected_Benefit", "Confidence_Score", "Optimization_Target",
+    "Current_Sell_Through_Rate", "Target_Sell_Through_Rate", "Sell_Through_Improvement",
+    "Constraint_Status", "Capacity_Utilization", "Store_Type_Alignment", "Temperature_Suitability",
+    "Optimization_Rationale", "Trade_Off_Analysis", "Season", "Gender", "Location", "Category",
+    "Subcategory", "Data_Based_Rationale", "Store_Codes_In_Group", "Store_Count_In_Group",
+]
+
+STEP14_COLUMNS = GROUP_KEYS + [
+    "ΔQty", "Current_SPU_Quantity", "Target_SPU_Quantity", "Data_Based_Rationale",
+    "Season", "Gender", "Location",
+]
+
+STORE_META_COLUMNS = [
+    "Store_Code", "Constraint_Status", "Capacity_Utilization", "Action_Priority", "Performance_Tier",
+    "Growth_Potential", "Risk_Level", "Cluster_ID", "Cluster_Name", "Operational_Tag",
+    "Temperature_Zone", "Estimated_Rack_Capacity", "Product_Count",
+]
+
+CLUSTER_LABEL_COLUMNS = ["cluster_id", "cluster_name", "operational_tag", "temperature_zone"]
+
+GAP_COLUMNS = ["cluster_id", "category", "subcategory", "gap_intensity", "coverage_index", "priority_index"]
+
+STORE_ATTR_COLUMNS = [
+    "Store_Code", "str_code", "Store_Temperature_Band", "temperature_band",
+    "feels_like_temperature", "Temperature_Zone",
+]
+
+STEP35_COLUMNS = ["Store_Code", "Target_Style_Tags", "Category", "Subcategory", "Buffer_Stock_Percentage"]
+
+# Step 14 columns for the Product_Season backfill (raw names first, parsed fallbacks)
+STEP14_SEASON_COLUMNS = [
+    "Category", "Parsed_Category", "Subcategory", "Parsed_Subcategory", "Gender", "Parsed_Gender",
+    "Location", "Parsed_Location", "Target_Style_Tags", "Parsed_Season", "Season",
+]
+
+STORE_CONFIG_KEY_ALIASES = ("str_code", "store_code", "storeid", "store_id", "strcode", "store")
+STORE_CONFIG_COLUMNS = ["season_name", "sex_name", "display_location_name", "big_class_name"]
+
+STORE_CLUSTER_MAP_COLUMNS = ["Store_Code", "str_code", "Cluster_ID", "cluster_id"]
+
+CLUSTER_ID_ALIASES = ("cluster_id", "cluster", "clusterid")
+CLUSTER_MAKEUP_COLUMNS = ["fashion_ratio", "basic_ratio", "balanced_ratio", "fashion_share", "basic_share"]
+CLUSTER_FASHION_FILE_COLUMNS = [
+    "Cluster_ID", "cluster_id", "Cluster", "Cluster_Fashion_Profile",
+    "men_percentage", "women_percentage", "unisex_percentage",
+]
+CLUSTER_WEATHER_COLUMNS = ["dominant_band", "cold_share", "warm_share", "moderate_share"]
+
+HISTORICAL_CLUSTER_TEMPERATURE_PATH = "output/historical_cluster_temperature_profile.csv"
+
+ColumnSelector = Union[List[str], Callable[[List[str]], List[str]]]
+
+
+@dataclass
+class SourceSpec:
+    """Upstream input: where it lives, which columns it contributes and how it joins."""
+    name: str
+    path: Optional[str]
+    columns: Optional[ColumnSelector] = None  # None reads every column; a callable picks from the header
+    key: List[str] = field(default_factory=list)
+    str_keys: List[str] = field(default_factory=list)
+    dtypes: Dict[str, Any] = field(default_factory=dict)  # Passed to read_csv
+
+
+class JoinPlan:
+    """
+    Loads each declared source at most once and records every join.
+
+    Sources sharing a file are served from a single read of the union of their
+    columns. ``join`` is a pandas merge that logs left/right/result row counts and
+    elapsed time so the QA report can show where rows are gained or lost.
+    """
+
+    def __init__(self) -> None:
+        self.sources: Dict[str, SourceSpec] = {}
+        self._headers: Dict[str, List[str]] = {}
+        self._files: Dict[str, pd.DataFrame] = {}
+        self.loads: List[Dict[str, Any]] = []
+        self.joins: List[Dict[str, Any]] = []
+
+    def declare(self, spec: SourceSpec) -> SourceSpec:
+        self.sources[spec.name] = spec
+        return spec
+
+    def header(self, path: str) -> List[str]:
+        """Column names of a CSV, read once."""
+        if path not in self._headers:
+            self._headers[path] = list(pd.read_csv(path, nrows=0).columns)
+        return self._headers[path]
+
+    def available(self, name: str) -> bool:
+        spec = self.sources.get(name)
+        return bool(spec and spec.path and os.path.exists(spec.path))
+
+    @staticmethod
+    def _columns(spec: SourceSpec, available: List[str]) -> List[str]:
+        columns = spec.columns(available) if callable(spec.columns) else spec.columns
+        return [c for c in available if c in columns]
+
+    def _load_file(self, path: str) -> pd.DataFrame:
+        if path in self._files:
+            return self._files[path]
+        specs = [s for s in self.sources.values() if s.path == path]
+        if any(s.columns is None for s in specs):
+            usecols = None
+        else:
+            header = self.header(path)
+            wanted = {c for s in specs for c in self._columns(s, header)}
+            usecols = [c for c in header if c in wanted]
+        dtypes = {c: t for s in specs for c, t in s.dtypes.items()}
+        started = time.perf_counter()
+        df = pd.read_csv(path, usecols=usecols, dtype=dtypes or None)
+        for col in {c for s in specs for c in s.str_keys}:
+            if col in df.columns:
+                df[col] = df[col].astype(str)
+        self._files[path] = df
+        self.loads.append({
+            "sources": [s.name for s in specs],
+            "path": path,
+            "rows": int(len(df)),
+            "columns": int(len(df.columns)),
+            "seconds": round(time.perf_counter() - started, 4),
+        })
+        return df
+
+    def frame(self, name: str) -> pd.DataFrame:
+        """Columns declared by ``name`` (in file order); empty frame when unavailable."""
+        if not self.available(name):
+            return pd.DataFrame()
+        spec = self.sources[name]
+        df = self._load_file(spec.path)
+        if spec.columns is None:
+            return df.copy()
+        return df[self._columns(spec, list(df.columns))].copy()
+
+    def join(self, name: str, left: pd.DataFrame, right: pd.DataFrame, on, how: str = "left",
+             **merge_kwargs) -> pd.DataFrame:
+        started = time.perf_counter()
+        out = left.merge(right, on=on, how=how, **merge_kwargs)
+        self.joins.append({
+            "join": name,
+            "on": list(on) if isinstance(on, (list, tuple)) else [on],
+            "how": how,
+            "left_rows": int(len(left)),
+            "right_rows": int(len(right)),
+            "rows": int(len(out)),
+            "seconds": round(time.perf_counter() - started, 4),
+        })
+        return out
+
+    def report(self) -> Dict[str, Any]:
+        return {"loads": self.loads, "joins": self.joins}
+
+    def log_report(self) -> None:
+        for item in self.loads:
+            log(f"   load {'/'.join(item['sources'])}: {item['rows']:,} rows × {item['columns']} cols in {item['seconds']:.3f}s")
+        for item in self.joins:
+            log(f"   join {item['join']} ({item['how']} on {', '.join(item['on'])}): "
+                f"{item['left_rows']:,} ⟕ {item['right_rows']:,} → {item['rows']:,} rows in {item['seconds']:.3f}s")
+
+
+def _first_non_null(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    """Row-wise first non-null value across ``columns`` (pd.NA when all are null)."""
+    result = pd.Series(pd.NA, index=df.index, dtype=object)
+    for col in reversed(list(dict.fromkeys(columns))):
+        vals = df[col]
+        result = vals.where(vals.notna(), result)
+    return result.infer_objects()
+
+
+STYLE_TAG_FIELDS = ["Season", "Gender", "Location", "Category", "Subcategory"]
+
+TAG_BUNDLE_FIELDS = ["Season", "Planning_Season", "Gender", "Location", "Temperature_Band_Simple", "Store_Fashion_Profile"]
+
+
+def _text_columns(df: pd.DataFrame, columns: List[str], strip: bool = False) -> List[List[Optional[str]]]:
+    """Per-column lists of str values (None where null) for the ``columns`` present in ``df``."""
+    out = []
+    for col in columns:
+        if col in df.columns:
+            vals = df[col]
+            text = vals.astype(str)
+            if strip:
+                text = text.str.strip()
+            out.append(text.where(vals.notna(), None).tolist())
+    return out
+
+
+def _tag_tokens(tags: pd.Series) -> List[List[str]]:
+    """Tokens of a tags column ("[a, b|c]" → ['a', 'b', 'c']); empty for nulls."""
+    text = tags.astype(str).str.strip()
+    bracketed = text.str.startswith("[") & text.str.endswith("]")
+    text = text.where(~bracketed, text.str[1:-1]).str.replace("|", ",", regex=False)
+    return [[p.strip() for p in t.split(",") if p.strip()] if present else []
+            for t, present in zip(text.tolist(), tags.notna().tolist())]
+
+
+def _compose_style_tags(df: pd.DataFrame) -> pd.Series:
+    """Season/Gender/Location/Category/Subcategory then the original tag tokens, first occurrence kept."""
+    fields = _text_columns(df, STYLE_TAG_FIELDS, strip=True)
+    tokens = _tag_tokens(df["Target_Style_Tags"]) if "Target_Style_Tags" in df.columns else [[] for _ in range(len(df))]
+    composed = [", ".join(dict.fromkeys([v for v in row if v is not None] + toks)) for *row, toks in zip(*fields, tokens)]
+    return pd.Series(composed, index=df.index, dtype=object)
+
+
+def _tag_bundle(df: pd.DataFrame) -> pd.Series:
+    """Distinct non-null TAG_BUNDLE_FIELDS values joined with ", " (pd.NA when all are null)."""
+    fields = _text_columns(df, TAG_BUNDLE_FIELDS)
+    if not fields:
+        return pd.Series(pd.NA, index=df.index, dtype=object)
+    bundles = []
+    for row in zip(*fields):
+        parts = [v for v in row if v is not None]
+        bundles.append(", ".join(dict.fromkeys(parts)) if parts else pd.NA)
+    return pd.Series(bundles, index=df.index, dtype=object)
+
+
+def _first_text(df: pd.DataFrame, columns: List[str], default: str) -> pd.Series:
+    """``a or b or default`` across ``columns``: null and empty values fall through to the next."""
+    result = pd.Series(default, index=df.index, dtype=object)
+    for col in reversed(columns):
+        if col in df.columns:
+            vals = df[col]
+            present = vals.notna() & vals.astype(str).ne("")
+            result = vals.astype(object).where(present, result)
+    return result.astype(str)
+
+
+def _strict_float(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Convert a column with float() semantics; returns (values, convertible mask)."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float), pd.Series(True, index=values.index)
+    converted = pd.to_numeric(values, errors='coerce')
+    # float(nan) is valid; anything else that failed to convert (None, text) is not
+    ok = converted.notna() | values.map(lambda v: isinstance(v, float))
+    return converted.astype(float), ok
+
+
+def _majority_label(df: pd.DataFrame, candidates: List[Tuple[str, str]]) -> pd.Series:
+    """Label of the largest (label, column) value; earlier candidates win ties and NaN comparisons."""
+    label = pd.Series(candidates[0][0], index=df.index, dtype=object)
+    best = df[candidates[0][1]]
+    for name, col in candidates[1:]:
+        greater = (df[col] > best).fillna(False).astype(bool)
+        label = label.mask(greater, name)
+        best = df[col].where(greater, best)
+    return label
+
+
+def _store_config_columns(header: List[str]) -> List[str]:
+    """Store key (any alias), the subcategory name column and the tag columns of the API store_config."""
+    def wanted(c: str) -> bool:
+        low = c.lower()
+        return (low in STORE_CONFIG_KEY_ALIASES or ('sub' in low and 'cate' in low and 'name' in low)
+                or c in STORE_CONFIG_COLUMNS)
+    return [c for c in header if wanted(c)]
+
+
+def _cluster_makeup_columns(header: List[str]) -> List[str]:
+    return [c for c in header if c.lower() in CLUSTER_ID_ALIASES or c in CLUSTER_MAKEUP_COLUMNS
+            or re.search(r"fashion.*(ratio|share)", c, re.I)]
+
+
+def _cluster_weather_columns(header: List[str]) -> List[str]:
+    return [c for c in header if c.lower() in CLUSTER_ID_ALIASES or c in CLUSTER_WEATHER_COLUMNS]
+
+
+def _historical_temperature_columns(header: List[str]) -> List[str]:
+    return [c for c in header if c == "Cluster_ID" or c.startswith("Historical_")]
+
+
+def _declare_sources(plan: JoinPlan, yyyymm: str, period: str, period_label: str) -> None:
+    """Resolve every upstream path once and declare what each source contributes."""
+    # Group-level recommendations: prefer Step 18 sell-through enriched, fall back to Step 14
+    st18 = _resolve_step18_path(yyyymm, period, period_label)
+    if st18:
+        log(f"✓ Using Step 18 sell-through enriched file: {st18}")
+        plan.declare(SourceSpec("group_recs", st18, GROUP_REC_COLUMNS, key=GROUP_KEYS))
+    else:
+        st14 = _resolve_step14_path(yyyymm, period, period_label)
+        if not st14:
+            raise FileNotFoundError(f"Neither Step 18 nor Step 14 group file found for {period_label}")
+        log(f"✓ Using Step 14 enhanced file: {st14}")
+        plan.declare(SourceSpec("group_recs", st14, GROUP_REC_COLUMNS, key=GROUP_KEYS))
+    plan.declare(SourceSpec("allocation", _resolve_step32_allocation_path(period_label), None,
+                            key=["Store_Code"], str_keys=["Store_Code"]))
+    plan.declare(SourceSpec("store_meta", _resolve_step33_store_meta_path(period_label), STORE_META_COLUMNS,
+                            key=["Store_Code"], str_keys=["Store_Code"]))
+    plan.declare(SourceSpec("cluster_labels", _resolve_step24_labels_path(period_label), CLUSTER_LABEL_COLUMNS,
+                            key=["cluster_id"]))
+    plan.declare(SourceSpec("gap_summary", _resolve_gap_summary_path(period_label), GAP_COLUMNS,
+                            key=["cluster_id", "category", "subcategory"]))
+    plan.declare(SourceSpec("store_tags", _resolve_step24_store_tags(period_label), ["Store_Code", "str_code"],
+                            key=["Store_Code"]))
+    plan.declare(SourceSpec("store_attributes", _resolve_step22_attrs_path(period_label), STORE_ATTR_COLUMNS,
+                            key=["Store_Code"]))
+    step14_path = _latest_from_manifest('step14', 'enhanced_fast_fish_format', period_label)
+    plan.declare(SourceSpec("step14", step14_path, STEP14_COLUMNS, key=GROUP_KEYS))
+    plan.declare(SourceSpec("step14_seasons", step14_path, STEP14_SEASON_COLUMNS))
+    plan.declare(SourceSpec("step35", _resolve_step35_recs_path(period_label), STEP35_COLUMNS,
+                            key=["Store_Code", "Target_Style_Tags", "Category", "Subcategory"],
+                            str_keys=["Store_Code"]))
+    # Enrichment sources joined later in the build (each still optional)
+    plan.declare(SourceSpec("store_config", _resolve_store_config_path(yyyymm, period, period_label),
+                            _store_config_columns, key=["str_code"], dtypes={"str_code": str}))
+    plan.declare(SourceSpec("historical_cluster_temperature", HISTORICAL_CLUSTER_TEMPERATURE_PATH,
+                            _historical_temperature_columns, key=["Cluster_ID"]))
+    plan.declare(SourceSpec("store_cluster_mapping", _resolve_store_cluster_mapping_path(period_label),
+                            STORE_CLUSTER_MAP_COLUMNS, key=["Store_Code"],
+                            dtypes={"Store_Code": str, "str_code": str}))
+    plan.declare(SourceSpec("cluster_fashion_makeup", _latest_from_manifest('step14', 'cluster_fashion_makeup', period_label),
+                            _cluster_makeup_columns, key=["Cluster_ID"]))
+    plan.declare(SourceSpec("cluster_weather_profile", _latest_from_manifest('step14', 'cluster_weather_profile', period_label),
+                            _cluster_weather_columns, key=["Cluster_ID"]))
+    plan.declare(SourceSpec("cluster_fashion_file", _resolve_cluster_fashion_file_path(period_label),
+                            CLUSTER_FASHION_FILE_COLUMNS, key=["Cluster_ID"]))
+
+
 def _build_unified(
     yyyymm: str,
     period: str,
     period_label: str,
     out_ts: str,
 ) -> Tuple[str, Optional[str], str]:
-    # Load inputs
-    group_df = _read_group_recs_df(yyyymm, period, period_label)
-    allocation_path = _resolve_step32_allocation_path(period_label)
-    allocation_df = pd.read_csv(allocation_path)
+    # Load inputs: every source is resolved and declared up front, then read once
+    plan = JoinPlan()
+    _declare_sources(plan, yyyymm, period, period_label)
+
+    group_df = plan.frame("group_recs")
+    if "Period" not in group_df.columns:
+        group_df["Period"] = period
+
+    allocation_path = plan.sources["allocation"].path
+    allocation_df = plan.frame("allocation")
     log(f"✓ Loaded Step 32 allocation: {len(allocation_df):,} rows from {allocation_path}")
 
-    store_meta_path = _resolve_step33_store_meta_path(period_label)
-    store_meta_df = pd.read_csv(store_meta_path) if store_meta_path else pd.DataFrame()
+    store_meta_path = plan.sources["store_meta"].path
+    store_meta_df = plan.frame("store_meta")
     if store_meta_path:
         log(f"✓ Loaded Step 33 store meta: {len(store_meta_df):,} rows from {store_meta_path}")
     else:
         log("⚠️ Step 33 store meta not found; continuing without additional meta columns")
 
-    labels_path = _resolve_step24_labels_path(period_label)
-    labels_df = pd.read_csv(labels_path) if labels_path else pd.DataFrame()
+    labels_path = plan.sources["cluster_labels"].path
+    labels_df = plan.frame("cluster_labels")
     if labels_path:
         log(f"✓ Loaded Step 24 labels: {len(labels_df):,} rows from {labels_path}")
 
-    gap_path = _resolve_gap_summary_path(period_label)
-    gap_df = pd.read_csv(gap_path) if gap_path else pd.DataFrame()
+    gap_path = plan.sources["gap_summary"].path
+    gap_df = plan.frame("gap_summary")
     if gap_path:
         log(f"✓ Loaded gap analysis: {len(gap_df):,} rows from {gap_path}")
 
-    # Load store-level tags if available (Season/Gender/Location at store grain)
-    store_tags_path = _resolve_step24_store_tags(period_label)
-    store_tags_df = pd.read_csv(store_tags_path) if store_tags_path else pd.DataFrame()
+    # Store-level tags (Season/Gender/Location at store grain) are only reported on
+    store_tags_path = plan.sources["store_tags"].path
     if store_tags_path:
-        log(f"✓ Loaded store tags: {len(store_tags_df):,} rows from {store_tags_path}")
+        log(f"✓ Loaded store tags: {len(plan.frame('store_tags')):,} rows from {store_tags_path}")
 
     # Load Step 22 enriched store attributes for store-level climate/fashion profile
-    attrs_path2 = _resolve_step22_attrs_path(period_label)
-    attrs2_df = pd.read_csv(attrs_path2) if attrs_path2 else pd.DataFrame()
+    attrs_path2 = plan.sources["store_attributes"].path
+    attrs2_df = plan.frame("store_attributes")
     if attrs_path2:
         log(f"✓ Loaded store attributes for climate/profile: {len(attrs2_df):,} rows from {attrs_path2}")
 
@@ -314,11 +657,7 @@ def _build_unified(
     except Exception:
         pass
 
-    # Normalize join key dtypes (prevent NaNs due to type mismatch)
-    if "Store_Code" in allocation_df.columns:
-        allocation_df["Store_Code"] = allocation_df["Store_Code"].astype(str)
-    if not store_meta_df.empty and "Store_Code" in store_meta_df.columns:
-        store_meta_df["Store_Code"] = store_meta_df["Store_Code"].astype(str)
+    # Join key dtypes (Store_Code as str) are normalised by the plan at load time
 
     # Select minimal columns from group_df for join and business visibility; compute ΔQty if needed
     keep_group_cols = [
@@ -365,19 +704,13 @@ def _build_unified(
             group_qty_source = 'derived_target_minus_current'
     # Prefer Step 14 ΔQty/targets when available to avoid sell-through-only skews
     try:
-        step14_path = _latest_from_manifest('step14', 'enhanced_fast_fish_format', period_label)
-        if step14_path and os.path.exists(step14_path):
-            step14_cols = [c for c in [
-                'Store_Group_Name','Target_Style_Tags','Category','Subcategory',
-                'ΔQty','Current_SPU_Quantity','Target_SPU_Quantity','Data_Based_Rationale',
-                'Season','Gender','Location'
-            ] if c in pd.read_csv(step14_path, nrows=0).columns]
-            if step14_cols:
-                step14_df = pd.read_csv(step14_path, usecols=step14_cols)
+        if plan.available('step14'):
+            step14_df = plan.frame('step14')
+            if not step14_df.columns.empty:
                 # Merge minimal keys
-                on_cols = [c for c in ['Store_Group_Name','Target_Style_Tags','Category','Subcategory'] if c in group_view.columns and c in step14_df.columns]
+                on_cols = [c for c in GROUP_KEYS if c in group_view.columns and c in step14_df.columns]
                 if on_cols:
-                    group_view = group_view.merge(step14_df, on=on_cols, how='left', suffixes=('', '_ff14'))
+                    group_view = plan.join('group_recs ⟕ step14', group_view, step14_df, on=on_cols, how='left', suffixes=('', '_ff14'))
                     # Override with Step 14 deltas/targets when present
                     if 'ΔQty_ff14' in group_view.columns:
                         group_view['Group_ΔQty'] = group_view.get('Group_ΔQty')
@@ -421,7 +754,7 @@ def _build_unified(
     rich_keys = [c for c in ["Store_Group_Name", "Target_Style_Tags", "Category", "Subcategory"] if c in allocation_df.columns and c in group_view.columns]
     if not rich_keys:
         rich_keys = ["Store_Group_Name", "Target_Style_Tags"]
-    base = allocation_df.merge(group_view, on=rich_keys, how="left", suffixes=("_alloc", "_grp"))
+    base = plan.join("allocation ⟕ group_recs", allocation_df, group_view, on=rich_keys, how="left", suffixes=("_alloc", "_grp"))
     # Coalesce dimensional columns from allocation (preferred) over group to preserve upstream attribution
     def _coalesce_col(df: pd.DataFrame, base_name: str) -> None:
         a = f"{base_name}_alloc"
@@ -492,15 +825,7 @@ def _build_unified(
                     base.loc[lmask, "Location"] = l_inferred[lmask]
                     if "Location_source" in base.columns:
                         base.loc[lmask, "Location_source"] = base.loc[lmask, "Location_source"].astype(str).replace({"nan":""}) + "+tags_token_backfill"
-            # Recompose tags for rows affected by season/location fills
-            if "Target_Style_Tags" in base.columns:
-                affected = pd.Series(False, index=base.index)
-                if 'Season_source' in base.columns:
-                    affected |= base['Season_source'].astype(str).str.contains('tags_token_backfill', na=False)
-                if 'Location_source' in base.columns:
-                    affected |= base['Location_source'].astype(str).str.contains('tags_token_backfill', na=False)
-                if affected.any():
-                    base.loc[affected, "Target_Style_Tags"] = base.loc[affected].apply(_compose_tags, axis=1)
+            # Rows filled here are recomposed with every other row once Category/Subcategory are final
     except Exception:
         pass
     # 2) Fallback: where Group_ΔQty is missing after the rich merge, try Category/Subcategory-only merge
@@ -509,7 +834,7 @@ def _build_unified(
         can_fallback = all(c in group_view.columns for c in ["Category", "Subcategory"]) and all(c in allocation_df.columns for c in ["Category", "Subcategory"]) and needs_fill.any()
         if can_fallback:
             fallback_keys = [c for c in ["Category", "Subcategory"] if c in allocation_df.columns and c in group_view.columns]
-            fb = allocation_df.merge(group_view, on=fallback_keys, how="left", suffixes=("_alloc", "_grp_fb"))
+            fb = plan.join("allocation ⟕ group_recs (category fallback)", allocation_df, group_view, on=fallback_keys, how="left", suffixes=("_alloc", "_grp_fb"))
             # Prefer existing values; fill only where missing
             if "Group_ΔQty_grp" in base.columns and "Group_ΔQty_grp_fb" in fb.columns:
                 base.loc[needs_fill, "Group_ΔQty_grp"] = base.loc[needs_fill, "Group_ΔQty_grp"].fillna(fb.loc[needs_fill, "Group_ΔQty_grp_fb"])  # type: ignore
@@ -526,11 +851,10 @@ def _build_unified(
         sub_missing = ("Subcategory" in base.columns) and base["Subcategory"].isna().all()
         if (cat_missing or sub_missing) and ("Target_Style_Tags" in base.columns):
             # Load Step 14 to get authoritative category/subcategory vocab
-            step14_path = _latest_from_manifest('step14', 'enhanced_fast_fish_format', period_label)
             cat_vocab, sub_vocab = set(), set()
-            if step14_path and os.path.exists(step14_path):
+            if plan.available('step14'):
                 try:
-                    st14 = pd.read_csv(step14_path, usecols=[c for c in ["Category","Subcategory"] if c in pd.read_csv(step14_path, nrows=0).columns])
+                    st14 = plan.frame('step14')
                     if "Category" in st14.columns:
                         cat_vocab.update([str(x).strip() for x in st14['Category'].dropna().unique().tolist()])
                     if "Subcategory" in st14.columns:
@@ -615,36 +939,27 @@ def _build_unified(
             ] if c in store_meta_df.columns
         ]
         meta = store_meta_df[meta_keep].copy()
-        base = base.merge(meta, on="Store_Code", how="left")
+        base = plan.join("store_meta", base, meta, on="Store_Code", how="left")
 
     # Merge prepared Step 22 temperature attributes if available
     try:
         if not attrs2_small.empty and "Store_Code" in base.columns:
-            base = base.merge(attrs2_small, on="Store_Code", how="left", suffixes=(None, "_attr"))
+            base = plan.join("store_attributes", base, attrs2_small, on="Store_Code", how="left", suffixes=(None, "_attr"))
     except Exception:
         pass
 
     # Merge Buffer_Stock_Percentage from Step 35 recommendations when available
     try:
-        step35_path = _resolve_step35_recs_path(period_label)
-        if step35_path and os.path.exists(step35_path):
-            # Load minimally to avoid heavy memory
-            step35_head = pd.read_csv(step35_path, nrows=0)
-            cols = list(step35_head.columns)
+        if plan.available("step35"):
+            cols = plan.header(plan.sources["step35"].path)
             # Identify available join keys
-            join_keys = [k for k in ["Store_Code", "Target_Style_Tags", "Category", "Subcategory"] if k in cols and k in base.columns]
+            join_keys = [k for k in plan.sources["step35"].key if k in cols and k in base.columns]
             # Ensure at least Store_Code is present
-            if "Store_Code" in join_keys:
-                usecols = [c for c in ["Store_Code", "Target_Style_Tags", "Category", "Subcategory", "Buffer_Stock_Percentage"] if c in cols]
-                if "Buffer_Stock_Percentage" in usecols:
-                    step35_df = pd.read_csv(step35_path, usecols=usecols)
-                    # Normalize join key dtype
-                    if "Store_Code" in step35_df.columns:
-                        step35_df["Store_Code"] = step35_df["Store_Code"].astype(str)
-                    # Drop duplicates on join keys to avoid exploding rows
-                    if join_keys:
-                        step35_df = step35_df.drop_duplicates(subset=join_keys)
-                    base = base.merge(step35_df, on=join_keys, how="left")
+            if "Store_Code" in join_keys and "Buffer_Stock_Percentage" in cols:
+                step35_df = plan.frame("step35")
+                # Drop duplicates on join keys to avoid exploding rows
+                step35_df = step35_df.drop_duplicates(subset=join_keys)
+                base = plan.join("step35_buffer", base, step35_df, on=join_keys, how="left")
     except Exception:
         pass
 
@@ -653,12 +968,7 @@ def _build_unified(
         cols = [c for c in candidates if c in df.columns]
         if not cols:
             return df
-        def _first(row):
-            for c in [canonical] + cols:
-                if c in row and pd.notna(row[c]):
-                    return row[c]
-            return pd.NA
-        df[canonical] = df.apply(_first, axis=1)
+        df[canonical] = _first_non_null(df, [c for c in [canonical] + cols if c in df.columns])
         drop_cols = [c for c in cols if c != canonical]
         df = df.drop(columns=[c for c in drop_cols if c in df.columns])
         return df
@@ -885,22 +1195,9 @@ def _build_unified(
 
     # Targeted enrichment: recover Season/Gender/Location by merging API store_config on Store_Code × Subcategory
     try:
-        # Resolve store_config path via manifest-aware helper, with robust fallbacks
-        sc_path = None
-        try:
-            files = get_api_data_files(yyyymm, period)
-            sc_path = files.get('store_config') if isinstance(files, dict) else None
-        except Exception:
-            sc_path = None
-        if not sc_path:
-            cand = f"data/api_data/store_config_{period_label}.csv"
-            sc_path = cand if os.path.exists(cand) else None
-        if not sc_path:
-            cand2 = "data/api_data/store_config_data.csv"
-            sc_path = cand2 if os.path.exists(cand2) else None
-
-        if sc_path and os.path.exists(sc_path):
-            sc_df = pd.read_csv(sc_path)
+        # store_config is declared with only the key, subcategory and tag columns
+        if plan.available('store_config'):
+            sc_df = plan.frame('store_config')
             # Normalize keys in store_config
             if 'str_code' not in sc_df.columns:
                 alt = next((c for c in sc_df.columns if c.lower() in ('str_code','store_code','storeid','store_id','strcode','store')), None)
@@ -950,7 +1247,7 @@ def _build_unified(
             # Join and backfill only where missing
             if 'Store_Code' in base.columns and '__sub_norm__' in base.columns and not sc_small.empty:
                 sc_small = sc_small.rename(columns={'str_code':'Store_Code'})
-                base = base.merge(sc_small, on=['Store_Code','__sub_norm__'], how='left', suffixes=(None, '_api'))
+                base = plan.join('store_config', base, sc_small, on=['Store_Code','__sub_norm__'], how='left', suffixes=(None, '_api'))
 
                 # Fill Season
                 if 'Season' in base.columns and 'season_name' in base.columns:
@@ -1010,39 +1307,8 @@ def _build_unified(
     # No additional Step 14 taxonomy promotion fallback beyond API/manifest sources
 
     # Compose normalized Target_Style_Tags from Season/Gender/Location + Category/Subcategory + original tokens
-    def _normalize_original_tags(val):
-        if pd.isna(val):
-            return []
-        t = str(val).strip()
-        if t.startswith("[") and t.endswith("]"):
-            t = t[1:-1]
-        parts = [p.strip() for p in t.replace("|", ",").split(",") if p.strip()]
-        return parts
-
-    def _compose_tags(row):
-        parts = []
-        if 'Season' in row and pd.notna(row.get('Season')):
-            parts.append(str(row.get('Season')).strip())
-        if 'Gender' in row and pd.notna(row.get('Gender')):
-            parts.append(str(row.get('Gender')).strip())
-        if 'Location' in row and pd.notna(row.get('Location')):
-            parts.append(str(row.get('Location')).strip())
-        if 'Category' in row and pd.notna(row.get('Category')):
-            parts.append(str(row.get('Category')).strip())
-        if 'Subcategory' in row and pd.notna(row.get('Subcategory')):
-            parts.append(str(row.get('Subcategory')).strip())
-        orig_tokens = _normalize_original_tags(row.get('Target_Style_Tags'))
-        parts.extend(orig_tokens)
-        seen = set()
-        out = []
-        for p in parts:
-            if p not in seen:
-                seen.add(p)
-                out.append(p)
-        return ", ".join(out)
-
     if "Target_Style_Tags" in base.columns:
-        base["Target_Style_Tags"] = base.apply(_compose_tags, axis=1)
+        base["Target_Style_Tags"] = _compose_style_tags(base)
         # strip any accidental surrounding brackets and leading commas
         def _strip_brackets(s):
             if pd.isna(s):
@@ -1057,18 +1323,18 @@ def _build_unified(
         base["Target_Style_Tags"] = base["Target_Style_Tags"].apply(_strip_brackets)
         # Append planning season/year hint into tags if different from Season
         if all(c in base.columns for c in ["Planning_Season","Planning_Year","Season"]):
-            def _append_planning(row, s):
-                try:
-                    ps=row['Planning_Season']; sy=row['Planning_Year']; se=row['Season']
-                    if pd.notna(ps) and pd.notna(se) and str(ps)!=str(se):
-                        # append like "Autumn 2025"
-                        hint=f"{ps} {int(sy)}" if pd.notna(sy) else str(ps)
-                        if hint not in s:
-                            return (s+", "+hint) if s else hint
-                except Exception:
-                    pass
-                return s
-            base["Target_Style_Tags"] = base.apply(lambda r: _append_planning(r, r.get("Target_Style_Tags")), axis=1)
+            ps, se = base["Planning_Season"], base["Season"]
+            year = pd.to_numeric(base["Planning_Year"], errors="coerce")
+            year = year.where(np.isfinite(year))
+            # Hint like "Autumn 2025"; a year that is present but not numeric leaves the tags alone
+            hint = ps.astype(str).where(year.isna(), ps.astype(str) + " " + np.trunc(year).astype("Int64").astype(str))
+            tags = base["Target_Style_Tags"]
+            append = (ps.notna() & se.notna() & (ps.astype(str) != se.astype(str))
+                      & (base["Planning_Year"].isna() | year.notna()))
+            append &= pd.Series([isinstance(t, str) and h not in t for h, t in zip(hint.tolist(), tags.tolist())],
+                                index=base.index)
+            joined = np.where(tags.astype(str).ne("") & tags.notna(), tags.astype(str) + ", " + hint, hint)
+            base["Target_Style_Tags"] = tags.where(~append, pd.Series(joined, index=base.index))
         # Backfill Season from Planning_Season to surface Autumn when missing
         if "Season" in base.columns and "Planning_Season" in base.columns:
             miss = base["Season"].isna() & base["Planning_Season"].notna()
@@ -1193,17 +1459,15 @@ def _build_unified(
             return 'Moderate'
         base.loc[miss,'Temperature_Band_Simple'] = base.loc[miss,'Temperature_Zone'].apply(_simple_from_zone)
     if ('Temperature_Band_Simple' in base.columns):
-        def _grade_suit(row):
-            b = row.get('Temperature_Band_Simple')
-            z = row.get('Temperature_Zone')
-            if pd.isna(z) or pd.isna(b): return 'Unknown'
-            # FIXED: Added 'Cool' matching for proper suitability grading
-            if ('Cold' in str(z) and b=='Cold') or ('Cool' in str(z) and b=='Cool') or ('Warm' in str(z) and b=='Warm'):
-                return 'High'
-            if b=='Moderate':
-                return 'Medium'
-            return 'Review'
-        base['Temperature_Suitability_Graded'] = base.apply(_grade_suit, axis=1)
+        b = base['Temperature_Band_Simple']
+        z = base['Temperature_Zone'] if 'Temperature_Zone' in base.columns else pd.Series(pd.NA, index=base.index)
+        zs, bs = z.astype(str), b.astype(str)
+        # FIXED: Added 'Cool' matching for proper suitability grading
+        matches = pd.Series(False, index=base.index)
+        for band in ('Cold', 'Cool', 'Warm'):
+            matches |= zs.str.contains(band, regex=False) & bs.eq(band)
+        base['Temperature_Suitability_Graded'] = np.select(
+            [z.isna() | b.isna(), matches, bs.eq('Moderate')], ['Unknown', 'High', 'Medium'], default='Review')
 
     # Compute detailed temperature band from numeric value (6 bands)
     if 'Temperature_Value_C' in base.columns:
@@ -1229,16 +1493,15 @@ def _build_unified(
                 if avg_temp['Cluster_Temp_C_Mean'].notna().sum() > 0:
                     q = pd.qcut(avg_temp['Cluster_Temp_C_Mean'], 5, labels=['Q1-Coldest','Q2','Q3','Q4','Q5-Warmest'])
                     avg_temp['Cluster_Temp_Quintile'] = q
-                base = base.merge(avg_temp, on='Cluster_ID', how='left')
+                base = plan.join('cluster_temperature', base, avg_temp, on='Cluster_ID', how='left')
         except Exception:
             pass
 
     # Optional join: historical cluster temperature profile
     try:
-        hist_path = 'output/historical_cluster_temperature_profile.csv'
-        if os.path.exists(hist_path) and 'Cluster_ID' in base.columns:
-            hist = pd.read_csv(hist_path)
-            base = base.merge(hist, on='Cluster_ID', how='left')
+        if plan.available('historical_cluster_temperature') and 'Cluster_ID' in base.columns:
+            hist = plan.frame('historical_cluster_temperature')
+            base = plan.join('historical_cluster_temperature', base, hist, on='Cluster_ID', how='left')
             # Divergence flag between current detailed band and historical
             if 'Temperature_Band_Detailed' in base.columns and 'Historical_Temp_Band_Detailed' in base.columns:
                 base['Temp_Band_Divergence'] = (base['Temperature_Band_Detailed'].astype(str) != base['Historical_Temp_Band_Detailed'].astype(str))
@@ -1288,10 +1551,9 @@ def _build_unified(
     # 3) Fallback to Step 14 cluster fashion makeup if available
     try:
         if store_ratio.notna().sum() == 0 and 'Cluster_ID' in base.columns:
-            path_fm = _latest_from_manifest('step14', 'cluster_fashion_makeup', period_label)
-            if path_fm and os.path.exists(path_fm):
-                fm = pd.read_csv(path_fm)
-                cid = next((c for c in fm.columns if c.lower() in ('cluster_id','cluster','clusterid')), None)
+            if plan.available('cluster_fashion_makeup'):
+                fm = plan.frame('cluster_fashion_makeup')
+                cid = next((c for c in fm.columns if c.lower() in CLUSTER_ID_ALIASES), None)
                 if cid:
                     fm = fm.rename(columns={cid: 'Cluster_ID'})
                     # Try common column names
@@ -1299,7 +1561,7 @@ def _build_unified(
                     if fcol:
                         fm['__cluster_fashion_ratio__'] = _normalize_ratio_series(fm[fcol])
                         fm_small = fm[['Cluster_ID','__cluster_fashion_ratio__']].drop_duplicates()
-                        base = base.merge(fm_small, on='Cluster_ID', how='left')
+                        base = plan.join('cluster_fashion_makeup', base, fm_small, on='Cluster_ID', how='left')
                         store_ratio = store_ratio.where(store_ratio.notna(), base['__cluster_fashion_ratio__'])
                         source = source.where(source.notna(), 'cluster_fashion_makeup')
                         if '__cluster_fashion_ratio__' in base.columns:
@@ -1361,25 +1623,22 @@ def _build_unified(
                 if v <= 0.35: return 'Basic-Heavy'
                 return 'Balanced'
             cl['Cluster_Fashion_Profile'] = cl['Cluster_Fashion_Ratio'].apply(_cprof)
-            base = base.merge(cl, on='Cluster_ID', how='left')
+            base = plan.join('cluster_fashion_profile', base, cl, on='Cluster_ID', how='left')
     except Exception:
         pass
 
     # Enforce single source of cluster truth from Step 24 store→cluster mapping
     try:
-        map_path = f"output/store_cluster_mapping_{period_label}.csv"
-        if not os.path.exists(map_path):
-            # fallback generic mapping
-            map_path = "output/store_cluster_mapping.csv" if os.path.exists("output/store_cluster_mapping.csv") else None
-        if map_path:
-            scmap = pd.read_csv(map_path)
+        # Period mapping first, then the generic one (store keys are read as str)
+        if plan.available('store_cluster_mapping'):
+            scmap = plan.frame('store_cluster_mapping')
             if 'Store_Code' not in scmap.columns and 'str_code' in scmap.columns:
-                scmap['Store_Code'] = scmap['str_code'].astype(str)
+                scmap['Store_Code'] = scmap['str_code']
             if 'Cluster_ID' not in scmap.columns and 'cluster_id' in scmap.columns:
                 scmap = scmap.rename(columns={'cluster_id':'Cluster_ID'})
             sckeep = [c for c in ['Store_Code','Cluster_ID'] if c in scmap.columns]
             scmap = scmap[sckeep].drop_duplicates()
-            base = base.merge(scmap, on='Store_Code', how='left', suffixes=(None, '_map'))
+            base = plan.join('store_cluster_mapping', base, scmap, on='Store_Code', how='left', suffixes=(None, '_map'))
             if 'Cluster_ID_map' in base.columns:
                 base['Cluster_ID'] = base['Cluster_ID_map'].where(base['Cluster_ID_map'].notna(), base.get('Cluster_ID'))
                 base = base.drop(columns=['Cluster_ID_map'])
@@ -1394,7 +1653,7 @@ def _build_unified(
     if ("ΔQty" in group_df.columns) and (not prefer_step14):
         step18_map_cols = [c for c in ["Store_Group_Name", "Target_Style_Tags", "Category", "Subcategory", "ΔQty"] if c in group_df.columns]
         step18_map = group_df[step18_map_cols].copy().rename(columns={"ΔQty": "Group_ΔQty_step18"})
-        base = base.merge(step18_map, on=[c for c in ["Store_Group_Name", "Target_Style_Tags", "Category", "Subcategory"] if c in step18_map.columns], how="left")
+        base = plan.join("step18_group_qty", base, step18_map, on=[c for c in GROUP_KEYS if c in step18_map.columns], how="left")
         # If step18 value present, override and set source
         has_step18 = base["Group_ΔQty_step18"].notna()
         base.loc[has_step18, "Group_ΔQty"] = base.loc[has_step18, "Group_ΔQty_step18"]
@@ -1424,27 +1683,21 @@ def _build_unified(
                 "unisex_percentage_ff14",
             ]
             present = [c for c in perc_cols if c in base.columns]
-            if present and "Gender" in base.columns:
-                # Consolidate percentage signals
-                def _pick_gender(row: pd.Series) -> Optional[str]:
-                    vals = {
-                        "Women": max(row.get("women_percentage", pd.NA), row.get("women_percentage_ff14", pd.NA)),
-                        "Men": max(row.get("men_percentage", pd.NA), row.get("men_percentage_ff14", pd.NA)),
-                        "Unisex": max(row.get("unisex_percentage", pd.NA), row.get("unisex_percentage_ff14", pd.NA)),
-                    }
-                    try:
-                        # Choose the label with the highest share if it is reasonably confident
-                        label = max(vals, key=lambda k: (vals[k] if pd.notna(vals[k]) else -1))
-                        score = vals[label]
-                        if pd.notna(score) and float(score) >= 0.55:
-                            return label
-                    except Exception:
-                        return None
-                    return None
-
+            # Each label's share is the larger of its own and its _ff14 column, so both sets are needed
+            if len(present) == len(perc_cols) and "Gender" in base.columns:
                 missing_gender = base["Gender"].isna() | (base["Gender"].astype(str).str.strip() == "")
                 if missing_gender.any():
-                    inferred = base.loc[missing_gender].apply(_pick_gender, axis=1)
+                    rows = base.loc[missing_gender]
+                    shares = pd.DataFrame(index=rows.index)
+                    for label, prefix in [("Women", "women"), ("Men", "men"), ("Unisex", "unisex")]:
+                        own = pd.to_numeric(rows[f"{prefix}_percentage"], errors="coerce")
+                        ff14 = pd.to_numeric(rows[f"{prefix}_percentage_ff14"], errors="coerce")
+                        shares[label] = ff14.where(ff14 > own, own)  # max(own, ff14): NaN on the left wins
+                    # Highest share (missing counts as -1, first label on ties), kept only when confident
+                    pick = np.argmax(shares.fillna(-1).to_numpy(), axis=1)
+                    score = shares.to_numpy()[np.arange(len(shares)), pick]
+                    inferred = pd.Series(np.array(shares.columns, dtype=object)[pick], index=rows.index)
+                    inferred = inferred.where(score >= 0.55)
                     base.loc[missing_gender & inferred.notna(), "Gender"] = inferred[inferred.notna()]
                     # Track provenance
                     if "Gender_source" in base.columns:
@@ -1481,7 +1734,7 @@ def _build_unified(
                             base.loc[set_mask, "Gender_source"] = base.loc[set_mask, "Gender_source"].astype(str).replace({"nan": ""}) + "+subcategory_text_backfill"
                         # Recompose tags for affected rows so Gender appears
                         if "Target_Style_Tags" in base.columns:
-                            base.loc[set_mask, "Target_Style_Tags"] = base.loc[set_mask].apply(_compose_tags, axis=1)
+                            base.loc[set_mask, "Target_Style_Tags"] = _compose_style_tags(base.loc[set_mask])
         except Exception:
             pass
 
@@ -1512,7 +1765,7 @@ def _build_unified(
                         base.loc[set_mask, "Gender_source"] = base.loc[set_mask, "Gender_source"].astype(str).replace({"nan": ""}) + "+tags_token_backfill"
                     # Recompose tags for affected rows
                     if "Target_Style_Tags" in base.columns:
-                        base.loc[set_mask, "Target_Style_Tags"] = base.loc[set_mask].apply(_compose_tags, axis=1)
+                        base.loc[set_mask, "Target_Style_Tags"] = _compose_style_tags(base.loc[set_mask])
         except Exception:
             pass
 
@@ -1550,7 +1803,7 @@ def _build_unified(
                 promote.loc[promote["Capacity_Utilization"] <= 0.70, "__pos_amount__"] += 1
                 prom = promote[rebalance_keys + ["__pos_amount__"]].copy()
                 prom["__rb_flag__"] = True
-                base = base.merge(prom, on=rebalance_keys, how="left")
+                base = plan.join("group_rebalance", base, prom, on=rebalance_keys, how="left")
                 mask = base.get("__rb_flag__", False) == True
                 base.loc[mask, "Group_ΔQty"] = base.loc[mask, "Group_ΔQty"].where(base.loc[mask, "Group_ΔQty"] > 0, base.loc[mask, "__pos_amount__"].fillna(1))
                 base.loc[mask, "Group_ΔQty_source"] = base.loc[mask, "Group_ΔQty_source"].astype(str).where(base.loc[mask, "Group_ΔQty_source"].notna(), "")
@@ -1658,7 +1911,7 @@ def _build_unified(
         })
         on_cols = [c for c in ["Cluster_ID", "Category", "Subcategory"] if c in base.columns and c in g.columns]
         if on_cols:
-            base = base.merge(g, on=on_cols, how="left")
+            base = plan.join("gap_summary", base, g, on=on_cols, how="left")
 
     # Coalesce Cluster_ID and Cluster_Name from all sources into a single set and drop dupes
     cluster_sources: List[str] = [
@@ -1666,13 +1919,7 @@ def _build_unified(
     ]
     if cluster_sources:
         # pick first non-null across columns
-        def _first_non_null(row):
-            for c in cluster_sources:
-                v = row.get(c)
-                if pd.notna(v):
-                    return v
-            return pd.NA
-        base["Cluster_ID"] = base.apply(_first_non_null, axis=1)
+        base["Cluster_ID"] = _first_non_null(base, cluster_sources)
         # try cast to int safely
         try:
             base["Cluster_ID"] = pd.to_numeric(base["Cluster_ID"], errors="coerce").astype("Int64")
@@ -1692,7 +1939,7 @@ def _build_unified(
         lab_map = labels_df.rename(columns={k: v for k, v in lab_cols_map.items() if k in labels_df.columns})
         use_cols = [c for c in ["Cluster_ID", "Cluster_Name", "Operational_Tag_Label", "Temperature_Zone_Label"] if c in lab_map.columns]
         lab_map = lab_map[use_cols].drop_duplicates()
-        base = base.merge(lab_map, on="Cluster_ID", how="left")
+        base = plan.join("cluster_labels", base, lab_map, on="Cluster_ID", how="left")
         # Fill fields preferring Step 24 labels when base is missing
         if "Cluster_Name" in base.columns and "Cluster_Name_y" in base.columns:
             base["Cluster_Name"] = base["Cluster_Name_x"].fillna(base["Cluster_Name_y"])
@@ -1881,26 +2128,19 @@ def _build_unified(
         imp_qs = _q(imp_series, [0.2, 0.5, 0.8])
         cu_qs = _q(cu_series, [0.3, 0.5, 0.9])
 
-        def _gpq(row):
-            impv = row.get('Sell_Through_Improvement')
-            cuv = row.get('Capacity_Utilization')
-            try:
-                impv = float(impv)
-                cuv = float(cuv)
-            except Exception:
-                return 'Maintain'
-            # Quantile-based rules
-            if imp_qs[0.8] is not None and cu_qs[0.5] is not None and (impv >= imp_qs[0.8]) and (cuv <= cu_qs[0.5]):
-                return 'High-Growth'
-            if imp_qs[0.5] is not None and (impv >= imp_qs[0.5]):
-                return 'Growth-Ready'
-            if cu_qs[0.3] is not None and (cuv <= cu_qs[0.3]):
-                return 'Growth-Ready'
-            if cu_qs[0.9] is not None and imp_qs[0.2] is not None and (cuv >= cu_qs[0.9]) and (impv < imp_qs[0.2]):
-                return 'Constrained'
-            return 'Maintain'
-
-        base['Growth_Potential'] = base.apply(_gpq, axis=1)
+        # Quantile-based rules, first match wins; rows float() cannot parse stay Maintain
+        impv, imp_ok = _strict_float(base['Sell_Through_Improvement'])
+        cuv, cu_ok = _strict_float(base['Capacity_Utilization'])
+        ok = imp_ok & cu_ok
+
+        def _rule(values: pd.Series, q, op) -> pd.Series:
+            return pd.Series(False, index=base.index) if q is None else op(values, q)
+
+        high = _rule(impv, imp_qs[0.8], operator.ge) & _rule(cuv, cu_qs[0.5], operator.le)
+        ready = _rule(impv, imp_qs[0.5], operator.ge) | _rule(cuv, cu_qs[0.3], operator.le)
+        constrained = _rule(cuv, cu_qs[0.9], operator.ge) & _rule(impv, imp_qs[0.2], operator.lt)
+        base['Growth_Potential'] = np.select([~ok, high, ready, constrained],
+                                             ['Maintain', 'High-Growth', 'Growth-Ready', 'Constrained'], default='Maintain')
         base['Growth_Potential_source'] = 'quantile_recalibration'
 
         # Write distribution report
@@ -1938,33 +2178,18 @@ def _build_unified(
                     return pd.NA
             base["Action"] = base["Allocated_ΔQty_Rounded"].apply(_action)
         if all(c in base.columns for c in ["Action","Allocated_ΔQty_Rounded"]):
-            def _instr(row):
-                try:
-                    act = row.get("Action") or row.get("Allocation_Action") or "Allocate"
-                    qty = int(pd.to_numeric(row.get("Target_SPU_Quantity"), errors="coerce").fillna(0)) if isinstance(row.get("Target_SPU_Quantity"), pd.Series) else row.get("Target_SPU_Quantity")
-                    cat = row.get("Category") or "Category"
-                    sub = row.get("Subcategory") or "Subcategory"
-                    loc = row.get("Location") or row.get("Display_Location") or "Front/Back"
-                    sn = row.get("Season") or row.get("Planning_Season") or "Season"
-                    gd = row.get("Gender") or "Gender"
-                    return f"{act} {qty} SPUs in {cat}/{sub} ({sn}, {gd}, {loc})"
-                except Exception:
-                    return pd.NA
-            base["Instruction"] = base.apply(_instr, axis=1)
-        # Backfill Product_Season from Step 14 compact map on robust keys
+            qty = base["Target_SPU_Quantity"].astype(str) if "Target_SPU_Quantity" in base.columns else "None"
+            base["Instruction"] = (
+                _first_text(base, ["Action", "Allocation_Action"], "Allocate") + " " + qty + " SPUs in "
+                + _first_text(base, ["Category"], "Category") + "/" + _first_text(base, ["Subcategory"], "Subcategory")
+                + " (" + _first_text(base, ["Season", "Planning_Season"], "Season") + ", "
+                + _first_text(base, ["Gender"], "Gender") + ", "
+                + _first_text(base, ["Location", "Display_Location"], "Front/Back") + ")"
+            )
+        # Backfill Product_Season from Step 14 compact map on robust keys (same read as the ΔQty override)
         try:
-            st14 = None
-            # Try common filenames for Step 14 output
-            for p in [
-                f"output/enhanced_fast_fish_format_{target_yyyymm}{target_period}_unified.csv",
-                f"output/enhanced_fast_fish_format_{target_yyyymm}{target_period}.csv",
-            ]:
-                try:
-                    st14 = pd.read_csv(p, low_memory=False)
-                    break
-                except Exception:
-                    continue
-            if st14 is not None:
+            st14 = plan.frame('step14_seasons') if plan.available('step14_seasons') else None
+            if st14 is not None and not st14.empty:
                 # Prepare key columns from Step 14 (prefer raw, then parsed)
                 def pick_cols(df, name, parsed_name):
                     if name in df.columns:
@@ -2014,9 +2239,10 @@ def _build_unified(
                         mdedup = map_df[join_keys + ["Product_Season_s14map"]].dropna().drop_duplicates(subset=join_keys)
                         if mdedup.empty:
                             continue
-                        tmp = base.loc[need, join_keys].merge(mdedup, on=join_keys, how='left')
-                        # Align back by index
-                        base.loc[need, 'Product_Season_s14map_tmp'] = tmp.get('Product_Season_s14map')
+                        tmp = plan.join(f"product_season ⟕ step14 map ({', '.join(join_keys)})", base.loc[need, join_keys],
+                                        mdedup, on=join_keys, how='left')
+                        # Keys are unique on the right, so rows line up with base.loc[need]
+                        base.loc[need, 'Product_Season_s14map_tmp'] = tmp['Product_Season_s14map'].to_numpy()
                         mseed = need & base['Product_Season_s14map_tmp'].notna()
                         if mseed.any():
                             base.loc[mseed, 'Product_Season'] = base.loc[mseed, 'Product_Season_s14map_tmp'].apply(_norm_season_en)
@@ -2040,8 +2266,9 @@ def _build_unified(
                             keys_g = [k for k in ['Category','Subcategory','Gender'] if k in s14_df.columns and k in base.columns]
                             if keys_g:
                                 agg_g = s14_df.groupby(keys_g)['__ps__'].apply(mode_non_unknown).reset_index().rename(columns={'__ps__':'Product_Season_s14agg'})
-                                tmp = base.loc[need, keys_g].merge(agg_g, on=keys_g, how='left')
-                                base.loc[need, 'Product_Season_s14agg_tmp'] = tmp.get('Product_Season_s14agg')
+                                tmp = plan.join('product_season ⟕ step14 majority (category, subcategory, gender)',
+                                                base.loc[need, keys_g], agg_g, on=keys_g, how='left')
+                                base.loc[need, 'Product_Season_s14agg_tmp'] = tmp['Product_Season_s14agg'].to_numpy()
                                 mseed = need & base['Product_Season_s14agg_tmp'].notna()
                                 if mseed.any():
                                     base.loc[mseed, 'Product_Season'] = base.loc[mseed, 'Product_Season_s14agg_tmp'].apply(_norm_season_en)
@@ -2053,8 +2280,9 @@ def _build_unified(
                             need = base['Product_Season'].isna() | (base['Product_Season']=='Unknown') | (base['Product_Season_source']=='Planning_Season')
                             if keys_cs and need.any():
                                 agg_cs = s14_df.groupby(keys_cs)['__ps__'].apply(mode_non_unknown).reset_index().rename(columns={'__ps__':'Product_Season_s14agg'})
-                                tmp = base.loc[need, keys_cs].merge(agg_cs, on=keys_cs, how='left')
-                                base.loc[need, 'Product_Season_s14agg_tmp'] = tmp.get('Product_Season_s14agg')
+                                tmp = plan.join('product_season ⟕ step14 majority (category, subcategory)',
+                                                base.loc[need, keys_cs], agg_cs, on=keys_cs, how='left')
+                                base.loc[need, 'Product_Season_s14agg_tmp'] = tmp['Product_Season_s14agg'].to_numpy()
                                 mseed = need & base['Product_Season_s14agg_tmp'].notna()
                                 if mseed.any():
                                     base.loc[mseed, 'Product_Season'] = base.loc[mseed, 'Product_Season_s14agg_tmp'].apply(_norm_season_en)
@@ -2107,14 +2335,7 @@ def _build_unified(
         except Exception:
             pass
         # Consolidated tag bundle for quick filtering
-        def _bundle(row):
-            parts = []
-            for k in ["Season","Planning_Season","Gender","Location","Temperature_Band_Simple","Store_Fashion_Profile"]:
-                v = row.get(k)
-                if pd.notna(v):
-                    parts.append(str(v))
-            return ", ".join(dict.fromkeys(parts)) if parts else pd.NA
-        base["Tag_Bundle"] = base.apply(_bundle, axis=1)
+        base["Tag_Bundle"] = _tag_bundle(base)
         # Sorting preference: Action (Add, Reduce, No-Change), then Priority_Score desc, then abs(Δ) desc
         if "Action" in base.columns:
             order_map = {"Add": 0, "Reduce": 1, "No-Change": 2}
@@ -2233,25 +2454,24 @@ def _build_unified(
     # Attempt to enrich cluster-level output with fashion and weather profiles (best-effort)
     def _enrich_cluster_level(cluster_df: pd.DataFrame) -> pd.DataFrame:
         try:
-            # Merge cluster fashion makeup
-            path_fm = _latest_from_manifest('step14', 'cluster_fashion_makeup', period_label)
-            if path_fm and os.path.exists(path_fm):
-                fm_head = pd.read_csv(path_fm, nrows=0)
-                fm = pd.read_csv(path_fm)
-                cid = next((c for c in fm.columns if c.lower() in ("cluster_id","cluster","clusterid")), None)
+            # Merge cluster fashion makeup (same frame as the store-level fallback above)
+            if plan.available('cluster_fashion_makeup'):
+                fm = plan.frame('cluster_fashion_makeup')
+                cid = next((c for c in fm.columns if c.lower() in CLUSTER_ID_ALIASES), None)
                 if cid:
                     fm = fm.rename(columns={cid: "Cluster_ID"})
-                    fm_cols = [c for c in fm.columns if c in ("Cluster_ID","fashion_ratio","basic_ratio","balanced_ratio","fashion_share","basic_share")]
-                    cluster_df = cluster_df.merge(fm[fm_cols].drop_duplicates(), on="Cluster_ID", how="left")
+                    fm_cols = [c for c in fm.columns if c in ["Cluster_ID"] + CLUSTER_MAKEUP_COLUMNS]
+                    cluster_df = plan.join('cluster_level ⟕ cluster_fashion_makeup', cluster_df,
+                                           fm[fm_cols].drop_duplicates(), on="Cluster_ID", how="left")
             # Merge cluster weather profile
-            path_wp = _latest_from_manifest('step14', 'cluster_weather_profile', period_label)
-            if path_wp and os.path.exists(path_wp):
-                wp = pd.read_csv(path_wp)
-                cid = next((c for c in wp.columns if c.lower() in ("cluster_id","cluster","clusterid")), None)
+            if plan.available('cluster_weather_profile'):
+                wp = plan.frame('cluster_weather_profile')
+                cid = next((c for c in wp.columns if c.lower() in CLUSTER_ID_ALIASES), None)
                 if cid:
                     wp = wp.rename(columns={cid: "Cluster_ID"})
-                    keep = [c for c in wp.columns if c in ("Cluster_ID","dominant_band","cold_share","warm_share","moderate_share")]
-                    cluster_df = cluster_df.merge(wp[keep].drop_duplicates(), on="Cluster_ID", how="left")
+                    keep = [c for c in wp.columns if c in ["Cluster_ID"] + CLUSTER_WEATHER_COLUMNS]
+                    cluster_df = plan.join('cluster_level ⟕ cluster_weather_profile', cluster_df,
+                                           wp[keep].drop_duplicates(), on="Cluster_ID", how="left")
         except Exception:
             pass
         return cluster_df
@@ -2511,6 +2731,10 @@ def _build_unified(
     except Exception as e:
         qa["warnings"].append(f"Failed to write summary: {e}")
 
+    # Per-source load and per-join row counts/timings
+    qa["join_plan"] = plan.report()
+    log("📐 Join plan:")
+    plan.log_report()
     qa_path = f"{out_base}_validation.json"
     with open(qa_path, "w", encoding="utf-8") as f:
         json.dump(qa, f, indent=2, ensure_ascii=False)
@@ -2579,11 +2803,8 @@ def _build_unified(
             pass
         # Merge cluster fashion makeup if available
         try:
-            cfm_path = f"output/cluster_fashion_makeup_{period_label}.csv"
-            if not os.path.exists(cfm_path):
-                cfm_path = "output/cluster_fashion_makeup.csv" if os.path.exists("output/cluster_fashion_makeup.csv") else None
-            if cfm_path:
-                cfm = pd.read_csv(cfm_path)
+            if plan.available('cluster_fashion_file'):
+                cfm = plan.frame('cluster_fashion_file')
                 # Normalize to Cluster_ID and derive Cluster_Fashion_Profile by majority share
                 if 'Cluster_ID' not in cfm.columns:
                     if 'cluster_id' in cfm.columns:
@@ -2592,18 +2813,13 @@ def _build_unified(
                         cfm = cfm.rename(columns={'Cluster':'Cluster_ID'})
                 # compute profile based on men/women/unisex percentages if present
                 if all(col in cfm.columns for col in ['men_percentage','women_percentage','unisex_percentage']):
-                    def prof(row):
-                        vals = {
-                            'Men': row.get('men_percentage', 0),
-                            'Women': row.get('women_percentage', 0),
-                            'Unisex': row.get('unisex_percentage', 0)
-                        }
-                        return max(vals, key=vals.get)
-                    cfm['Cluster_Fashion_Profile'] = cfm.apply(prof, axis=1)
+                    cfm['Cluster_Fashion_Profile'] = _majority_label(
+                        cfm, [('Men', 'men_percentage'), ('Women', 'women_percentage'), ('Unisex', 'unisex_percentage')])
                 # Keep minimal mapping
                 cfm = cfm[[c for c in ['Cluster_ID','Cluster_Fashion_Profile'] if c in cfm.columns]].drop_duplicates()
                 if 'Cluster_ID' in cfm.columns and 'Cluster_Fashion_Profile' in cfm.columns:
-                    cluster_df = cluster_df.merge(cfm, on='Cluster_ID', how='left')
+                    cluster_df = plan.join('cluster_level ⟕ cluster_fashion_profile', cluster_df, cfm,
+                                           on='Cluster_ID', how='left')
                     # Resolve duplicates: prefer computed from ratio; fillna from mapping; drop suffixes
                     try:
                         # Identify possible columns
@@ -11,9 +11,11 @@ import pandas as pd
 try:
     from src.pipeline_manifest import get_manifest
     from src.config import get_period_label
+    from src.excel_export import StreamingWorkbook, DEFAULT_HEADER_STYLE
 except Exception:
     from pipeline_manifest import get_manifest
     from config import get_period_label
+    from excel_export import StreamingWorkbook, DEFAULT_HEADER_STYLE
 
 
 def log(msg: str) -> None:
@@ -205,17 +207,16 @@ def build_customer_delivery(yyyymm: str, period: str) -> str:
     csv_main = base + "_store_lines.csv"
     os.makedirs("output", exist_ok=True)
 
-    # Write Excel package
+    # Write Excel package (streamed; Store Lines rolls over into extra sheets past Excel's row limit)
     try:
-        import openpyxl  # noqa: F401
-        with pd.ExcelWriter(xlsx, engine="openpyxl") as writer:
-            overview.to_excel(writer, index=False, sheet_name="Overview")
+        with StreamingWorkbook(xlsx) as wb:
+            wb.write_dataframe("Overview", overview, header_style=DEFAULT_HEADER_STYLE)
             if not cluster_summary.empty:
-                cluster_summary.to_excel(writer, index=False, sheet_name="Cluster Summary")
+                wb.write_dataframe("Cluster Summary", cluster_summary, header_style=DEFAULT_HEADER_STYLE)
             if not cluster_top_adds.empty:
-                cluster_top_adds.to_excel(writer, index=False, sheet_name="Top Adds by Cluster")
-            focus_women_pants.to_excel(writer, index=False, sheet_name="Women Casual Pants")
-            store.to_excel(writer, index=False, sheet_name="Store Lines")
+                wb.write_dataframe("Top Adds by Cluster", cluster_top_adds, header_style=DEFAULT_HEADER_STYLE)
+            wb.write_dataframe("Women Casual Pants", focus_women_pants, header_style=DEFAULT_HEADER_STYLE)
+            wb.write_dataframe("Store Lines", store, header_style=DEFAULT_HEADER_STYLE)
         log(f"✅ Wrote Excel package: {xlsx}")
     except Exception as e:
         log(f"⚠️ Excel package not written ({e}); CSVs will be provided")
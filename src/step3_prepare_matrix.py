@@ -32,6 +32,18 @@ from output_utils import create_output_with_symlinks
 # Import configuration system
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from config import get_api_data_files, get_current_period, get_period_label, get_period_windows_config
+from multi_period_reader import get_multi_period_reader
+from artifact_dtypes import concat_artifact_frames, read_artifact
+
+# Candidate locations per period, in priority order
+CATEGORY_PATH_TEMPLATES = [
+    "data/api_data/complete_category_sales_{period_label}.csv",
+    "output/complete_category_sales_{period_label}.csv",
+]
+SPU_PATH_TEMPLATES = [
+    "data/api_data/complete_spu_sales_{period_label}.csv",
+    "output/complete_spu_sales_{period_label}.csv",
+]
 
 def _step_half(yyyymm: str, period: Optional[str], steps: int) -> Tuple[str, str]:
     """Step half-month periods forward/backward by integer steps."""
@@ -143,52 +155,38 @@ def load_multi_period_data() -> Tuple[List[pd.DataFrame], List[pd.DataFrame]]:
     periods = get_year_over_year_periods()
     log_progress(f"Loading data from {len(periods)} periods: {[f'{p[0]}{p[1]}' for p in periods]}")
     
+    period_labels = [f"{yyyymm}{period}" for yyyymm, period in periods]
+
+    # One path-resolution pass and one parallel decode for the whole window;
+    # the reader memoizes decoded files, so the subcategory and SPU loaders
+    # (which both call this function) share a single parse per file.
+    reader = get_multi_period_reader()
+    report_error = lambda path, e: log_progress(f"  ❌ Error reading {path}: {str(e)}")
+    # Dimensions come back categorical (artifact_dtypes), hence observed=True in the groupbys below
+    category_by_period = reader.read_periods(period_labels, CATEGORY_PATH_TEMPLATES, on_error=report_error,
+                                             artifact='complete_category_sales')
+    spu_by_period = reader.read_periods(period_labels, SPU_PATH_TEMPLATES, on_error=report_error,
+                                        artifact='complete_spu_sales')
+
     all_category_dfs = []
     all_spu_dfs = []
-    
-    for yyyymm, period in periods:
-        period_label = f"{yyyymm}{period}"
+
+    for period_label in period_labels:
         log_progress(f"Loading period {period_label}...")
-        
-        # Check for category data
-        potential_category_paths = [
-            f"data/api_data/complete_category_sales_{period_label}.csv",
-            f"output/complete_category_sales_{period_label}.csv",
-        ]
-        
-        # Check for SPU data  
-        potential_spu_paths = [
-            f"data/api_data/complete_spu_sales_{period_label}.csv",
-            f"output/complete_spu_sales_{period_label}.csv",
-        ]
-        
-        # Load category data if available
-        category_df = None
-        for path in potential_category_paths:
-            if os.path.exists(path):
-                try:
-                    category_df = pd.read_csv(path, low_memory=False)
-                    log_progress(f"  📊 Found category data: {len(category_df):,} records, {category_df['str_code'].nunique()} stores")
-                    # Add period identifier
-                    category_df['period'] = period_label
-                    all_category_dfs.append(category_df)
-                    break
-                except Exception as e:
-                    log_progress(f"  ❌ Error reading {path}: {str(e)}")
-        
-        # Load SPU data if available
-        spu_df = None
-        for path in potential_spu_paths:
-            if os.path.exists(path):
-                try:
-                    spu_df = pd.read_csv(path, low_memory=False)
-                    log_progress(f"  🛍️  Found SPU data: {len(spu_df):,} records, {spu_df['str_code'].nunique()} stores")
-                    # Add period identifier
-                    spu_df['period'] = period_label
-                    all_spu_dfs.append(spu_df)
-                    break
-                except Exception as e:
-                    log_progress(f"  ❌ Error reading {path}: {str(e)}")
+
+        if period_label in category_by_period:
+            _, category_df = category_by_period[period_label]
+            log_progress(f"  📊 Found category data: {len(category_df):,} records, {category_df['str_code'].nunique()} stores")
+            # Add period identifier
+            category_df['period'] = period_label
+            all_category_dfs.append(category_df)
+
+        if period_label in spu_by_period:
+            _, spu_df = spu_by_period[period_label]
+            log_progress(f"  🛍️  Found SPU data: {len(spu_df):,} records, {spu_df['str_code'].nunique()} stores")
+            # Add period identifier
+            spu_df['period'] = period_label
+            all_spu_dfs.append(spu_df)
     
     log_progress(f"✅ Loaded {len(all_category_dfs)} periods with category data")
     log_progress(f"✅ Loaded {len(all_spu_dfs)} periods with SPU data")
@@ -245,7 +243,7 @@ def load_subcategory_data() -> pd.DataFrame:
             return load_single_period_subcategory_data()
         
         # Combine all category data
-        combined_df = pd.concat(all_category_dfs, ignore_index=True)
+        combined_df = concat_artifact_frames(all_category_dfs, ignore_index=True)
         
         # Normalize column names and dtypes
         combined_df['str_code'] = combined_df['str_code'].astype(str)
@@ -255,7 +253,7 @@ def load_subcategory_data() -> pd.DataFrame:
         
         # Aggregate by store and subcategory across all periods
         log_progress("🔄 Aggregating subcategory data across all periods...")
-        aggregated_df = combined_df.groupby(['str_code', 'str_name', 'cate_name', 'sub_cate_name']).agg({
+        aggregated_df = combined_df.groupby(['str_code', 'str_name', 'cate_name', 'sub_cate_name'], observed=True).agg({
             value_col: 'sum',  # Total sales across all periods
             'period': 'count'  # Number of periods this combination appears in
         }).reset_index()
@@ -297,7 +295,7 @@ def load_single_period_subcategory_data() -> pd.DataFrame:
         for path in possible_paths:
             try:
                 if os.path.exists(path):
-                    df = pd.read_csv(path, low_memory=False)
+                    df = read_artifact(path, 'complete_category_sales')
                     loaded_path = path
                     break
             except Exception:
@@ -333,14 +331,14 @@ def load_spu_data() -> Optional[pd.DataFrame]:
             return load_single_period_spu_data()
         
         # Combine all SPU data
-        combined_df = pd.concat(all_spu_dfs, ignore_index=True)
+        combined_df = concat_artifact_frames(all_spu_dfs, ignore_index=True)
         # Normalize key dtypes
         combined_df['str_code'] = combined_df['str_code'].astype(str)
         combined_df['spu_code'] = combined_df['spu_code'].astype(str)
         
         # Aggregate by store and SPU across all periods
         log_progress("🔄 Aggregating SPU data across all periods...")
-        aggregated_df = combined_df.groupby(['str_code', 'str_name', 'cate_name', 'sub_cate_name', 'spu_code']).agg({
+        aggregated_df = combined_df.groupby(['str_code', 'str_name', 'cate_name', 'sub_cate_name', 'spu_code'], observed=True).agg({
             'spu_sales_amt': 'sum',  # Total sales across all periods
             'quantity': 'sum',  # Total quantity across all periods
             'period': 'count'  # Number of periods this combination appears in
@@ -387,7 +385,7 @@ def load_single_period_spu_data() -> Optional[pd.DataFrame]:
         for path in possible_paths:
             try:
                 if os.path.exists(path):
-                    df = pd.read_csv(path, low_memory=False)
+                    df = read_artifact(path, 'complete_spu_sales')
                     loaded_path = path
                     break
             except Exception:
@@ -524,7 +522,7 @@ def filter_spu_data(df: pd.DataFrame, anomaly_stores: List[str]) -> pd.DataFrame
     spus_by_prevalence = spu_store_counts[spu_store_counts >= MIN_STORES_PER_SPU].index
     
     # Filter SPUs by sales volume (total sales across all stores)
-    spu_sales_totals = df.groupby('spu_code')['spu_sales_amt'].sum()
+    spu_sales_totals = df.groupby('spu_code', observed=True)['spu_sales_amt'].sum()
     sales_threshold = spu_sales_totals.quantile(0.1)  # Bottom 10% threshold
     spus_by_sales = spu_sales_totals[spu_sales_totals >= sales_threshold].index
     
@@ -582,12 +580,12 @@ def create_matrix(df: pd.DataFrame, index_col: str, columns_col: str, values_col
         log_progress(f"Limiting to top {MAX_SPU_COUNT} SPUs by sales volume for memory management")
         
         # Get top SPUs by total sales
-        top_spus = df.groupby(columns_col)[values_col].sum().nlargest(MAX_SPU_COUNT).index
+        top_spus = df.groupby(columns_col, observed=True)[values_col].sum().nlargest(MAX_SPU_COUNT).index
         df_limited = df[df[columns_col].isin(top_spus)]
         log_progress(f"Filtered to {len(df_limited):,} records with top {MAX_SPU_COUNT} SPUs")
         
         log_progress("Creating pivot table (this may take a few minutes for large datasets)...")
-        matrix = df_limited.pivot_table(index=index_col, columns=columns_col, values=values_col, fill_value=0, aggfunc='sum')
+        matrix = df_limited.pivot_table(index=index_col, columns=columns_col, values=values_col, fill_value=0, aggfunc='sum', observed=True)
         matrix_type = f"{matrix_type}_limited"
         
         # Also create category-aggregated matrix
@@ -596,7 +594,7 @@ def create_matrix(df: pd.DataFrame, index_col: str, columns_col: str, values_col
     else:
         log_progress(f"Creating {matrix_type} pivot matrix...")
         log_progress("Creating pivot table (this may take a few minutes for large datasets)...")
-        matrix = df.pivot_table(index=index_col, columns=columns_col, values=values_col, fill_value=0, aggfunc='sum')
+        matrix = df.pivot_table(index=index_col, columns=columns_col, values=values_col, fill_value=0, aggfunc='sum', observed=True)
     
     log_progress(f"Created {matrix_type} matrix with {matrix.shape[0]} stores and {matrix.shape[1]} {columns_col.replace('_', ' ')}s")
     
@@ -621,10 +619,10 @@ def create_category_aggregated_matrix(spu_df: pd.DataFrame, anomaly_stores: List
     spu_df_clean = spu_df[~spu_df['str_code'].isin(anomaly_stores)]
     
     # Aggregate SPU sales by category
-    category_agg = spu_df_clean.groupby(['str_code', 'cate_name'])['spu_sales_amt'].sum().reset_index()
+    category_agg = spu_df_clean.groupby(['str_code', 'cate_name'], observed=True)['spu_sales_amt'].sum().reset_index()
     
     # Create category matrix
-    category_matrix = category_agg.pivot_table(index='str_code', columns='cate_name', values='spu_sales_amt', fill_value=0, aggfunc='sum')
+    category_matrix = category_agg.pivot_table(index='str_code', columns='cate_name', values='spu_sales_amt', fill_value=0, aggfunc='sum', observed=True)
     log_progress(f"Created category-aggregated matrix with {category_matrix.shape[0]} stores and {category_matrix.shape[1]} categories")
     
     # Normalize the matrix
@@ -47,6 +47,12 @@ import logging
 from tqdm import tqdm
 import argparse
 
+# Persistent API response cache (closed date ranges replay without network)
+try:
+    from http_response_cache import CACHE_MODES, CacheMissError, date_range_ttl, get_default_cache
+except ImportError:
+    from src.http_response_cache import CACHE_MODES, CacheMissError, date_range_ttl, get_default_cache
+
 # Configuration
 STORE_COORDINATES_FILE = "data/store_coordinates_extended.csv"
 OUTPUT_DIR = "output/weather_data"
@@ -140,7 +146,8 @@ def get_elevation(latitude: float, longitude: float) -> float:
             'latitude': latitude,
             'longitude': longitude
         }
-        response = requests.get('https://api.open-meteo.com/v1/elevation', params=params)
+        response = get_default_cache().request(requests, "GET", 'https://api.open-meteo.com/v1/elevation', params=params,
+                                               ttl=None)  # Elevation never changes
         response.raise_for_status()
         data = response.json()
         
@@ -203,7 +210,8 @@ def download_weather_for_store(store_code: str, latitude: float, longitude: floa
                 time.sleep(delay)
             
             log_progress(f"Requesting weather data for {store_code} from Open-Meteo API...")
-            response = requests.get('https://archive-api.open-meteo.com/v1/archive', params=params)
+            response = get_default_cache().request(requests, "GET", 'https://archive-api.open-meteo.com/v1/archive',
+                                                   params=params, ttl=date_range_ttl(WEATHER_END_DATE))
             
             if response.status_code == 429:
                 consecutive_rate_limits += 1
@@ -241,11 +249,15 @@ def download_weather_for_store(store_code: str, latitude: float, longitude: floa
             df.to_csv(output_path, index=False)
             log_progress(f"Saved weather data for {store_code} to {output_path}")
             
-            delay = get_random_delay()
-            time.sleep(delay)
+            if response.headers.get('X-Cache') != 'HIT':  # Replayed responses need no rate limiting
+                delay = get_random_delay()
+                time.sleep(delay)
             
             return df
             
+        except CacheMissError as e:
+            log_progress(f"No cached weather data for {store_code} (offline mode): {str(e)}")
+            return None
         except requests.exceptions.RequestException as e:
             log_progress(f"API request failed for {store_code}: {str(e)}")
             if attempt == MAX_RETRIES - 1:
@@ -548,6 +560,7 @@ def main() -> None:
         log_progress("Final data availability check...")
         final_availability = check_data_availability(coords_df)
         log_progress(f"Final status: {len(final_availability['weather_available'])}/{final_availability['total_stores']} stores have weather data for {final_availability['time_period']}")
+        log_progress(get_default_cache().summary())
         
     except Exception as e:
         log_progress(f"Error in weather data download: {str(e)}")
@@ -563,8 +576,12 @@ if __name__ == "__main__":
                        help='List existing time periods and exit')
     parser.add_argument('--info', type=str,
                        help='Show information about a specific time period')
+    parser.add_argument('--http-cache', choices=CACHE_MODES,
+                       help='API response cache: readwrite (default), offline (replay only), refresh, off (env HTTP_CACHE_MODE)')
     
     args = parser.parse_args()
+    if args.http_cache:
+        get_default_cache().mode = args.http_cache
     
     # Handle list periods command
     if args.list_periods:
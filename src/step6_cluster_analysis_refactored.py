@@ -34,6 +34,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from steps.cluster_analysis_factory import create_cluster_analysis_step
 from core.context import StepContext
+from core.profiling import enable_profiling
 from core.exceptions import DataValidationError
 
 
@@ -129,12 +130,23 @@ def parse_arguments():
         help='Enable temperature-aware clustering (default: disabled)'
     )
     
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='all',
+        default=None,
+        help='Profile the step lifecycle: all, or a comma list of cprofile,memory,frames '
+             '(same as STEP_PROFILE; bundle under output/profiles/ or STEP_PROFILE_DIR)'
+    )
+    
     return parser.parse_args()
 
 
 def main():
     """Main execution function."""
     args = parse_arguments()
+    if args.profile:
+        enable_profiling(args.profile)
     
     # Display configuration
     print("=" * 80)
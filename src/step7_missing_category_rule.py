@@ -3,6 +3,7 @@ from typing import Tuple, List, Optional  # needed for helper type hints
 import pandas as pd  # used by helper
 import os  # used by helper for path checks
 from output_utils import create_output_with_symlinks
+from rolling_aggregates import RollingAggregateStore
 import os as _os
 RECENT_MONTHS_BACK = int(_os.getenv('RECENT_MONTHS_BACK', '0') or '0')  # 0=disabled; otherwise number of half-months incl. base
 
@@ -31,28 +32,27 @@ def _average_recent_sales(base_yyyymm: str, base_period: str, feature_col: str,
     for _ in range(max(0, n - 1)):
         yyyymm, per = _previous_half_month(yyyymm, per)
         periods.append((yyyymm, per))
-    sales_frames: List[pd.DataFrame] = []
+    paths: List[str] = []
     for (ym, p) in periods:
         try:
-            api = get_api_data_files(ym, p)
-            path = api.get('spu_sales')
+            path = get_api_data_files(ym, p).get('spu_sales')
             if path and os.path.exists(path):
-                df = pd.read_csv(path, dtype={'str_code': str}, low_memory=False)
-                keep = [c for c in ['str_code', feature_col, sales_col] if c in df.columns]
-                if len(keep) == 3:
-                    sales_frames.append(df[keep])
+                paths.append(path)
         except Exception:
             continue
-    if not sales_frames:
+    if not paths:
         return None
-    all_df = pd.concat(sales_frames, ignore_index=True)
-    # numeric conversion then average by count of periods
-    all_df[sales_col] = pd.to_numeric(all_df[sales_col], errors='coerce')
-    agg = all_df.groupby(['str_code', feature_col], as_index=False)[sales_col].sum()
-    denom = len(sales_frames)
-    if denom > 0:
-        agg[sales_col] = agg[sales_col] / denom
-    return agg
+
+    def _read_sales(path: str) -> pd.DataFrame:
+        df = pd.read_csv(path, dtype={'str_code': str}, low_memory=False)
+        keep = [c for c in ['str_code', feature_col, sales_col] if c in df.columns]
+        return df[keep] if len(keep) == 3 else pd.DataFrame()
+
+    # Per-file sums are cached, so only half-months not seen before are read;
+    # sales are averaged by count of periods
+    store = RollingAggregateStore(f"step7_{feature_col}_{sales_col}", keys=['str_code', feature_col],
+                                  values=[sales_col], reader=_read_sales)
+    return store.recent_window(paths, divisor='sources')
 #!/usr/bin/env python3
 """
 Step 7: Missing Category/SPU Rule with QUANTITY RECOMMENDATIONS + FAST FISH SELL-THROUGH VALIDATION
@@ -29,6 +29,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from core.logger import PipelineLogger
 from core.context import StepContext
+from core.profiling import enable_profiling
 from core.exceptions import DataValidationError
 from components.missing_category import MissingCategoryConfig
 from steps.missing_category_rule_factory import MissingCategoryRuleFactory
@@ -112,12 +113,23 @@ def parse_arguments():
         help='Disable Fast Fish sell-through validation (default: False)'
     )
     
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='all',
+        default=None,
+        help='Profile the step lifecycle: all, or a comma list of cprofile,memory,frames '
+             '(same as STEP_PROFILE; bundle under output/profiles/ or STEP_PROFILE_DIR)'
+    )
+    
     return parser.parse_args()
 
 
 def main():
     """Main execution function."""
     args = parse_arguments()
+    if args.profile:
+        enable_profiling(args.profile)
     
     # Create logger
     logger = PipelineLogger(
@@ -56,6 +56,7 @@ from src.config import (
 )
 from src.pipeline_manifest import register_step_output, get_step_input
 from src.output_utils import create_output_with_symlinks
+from src.rolling_aggregates import RollingAggregateStore
 
 # FAST FISH ENHANCEMENT: Import sell-through validation
 try:
@@ -260,7 +261,13 @@ def _previous_half_month(yyyymm: str, period: str) -> Tuple[str, str]:
         m = 12
     return f"{y}{m:02d}", 'B'
 
-def _load_api_planning_quantity(yyyymm: str, period: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+PLANNING_GROUP_COLS = ['str_code', 'season_name', 'sex_name', 'display_location_name', 'big_class_name', 'sub_cate_name']
+PLANNING_VALUE_COLS = ['target_sty_cnt_avg', 'sty_sal_amt']
+QUANTITY_GROUP_COLS = ['str_code', 'spu_code']
+QUANTITY_VALUE_COLS = ['spu_sales_amt', 'quantity']
+QUANTITY_EXTRA_COLS = ['sub_cate_name', 'season_name', 'sex_name', 'display_location_name', 'big_class_name']
+
+def _api_planning_quantity_paths(yyyymm: str, period: str) -> Tuple[str, str]:
     files = get_api_data_files(yyyymm, period)
     plan = files.get('store_config')
     qty = files.get('spu_sales')
@@ -268,15 +275,20 @@ def _load_api_planning_quantity(yyyymm: str, period: str) -> Tuple[pd.DataFrame,
         raise FileNotFoundError(f"Planning data not found for {yyyymm}{period}: {plan}")
     if not qty or not os.path.exists(qty):
         raise FileNotFoundError(f"Quantity data not found for {yyyymm}{period}: {qty}")
-    planning_df = pd.read_csv(plan, dtype={'str_code': str}, low_memory=False)
-    quantity_df = pd.read_csv(qty, dtype={'str_code': str}, low_memory=False)
-    return planning_df, quantity_df
+    return plan, qty
+
+def _read_panel(path: str, columns: List[str]) -> pd.DataFrame:
+    selected = set(columns)
+    return pd.read_csv(path, dtype={'str_code': str}, low_memory=False, usecols=lambda c: c in selected)
 
 def _average_recent_panels(base_yyyymm: str, base_period: str, n_back: int) -> Tuple[pd.DataFrame, pd.DataFrame, List[str]]:
     """
     Build averaged planning and quantity panels over the last n_back half-month periods,
     including the base period as the most recent. Uses equal weights.
     Returns the averaged planning_df, quantity_df, and the list of period labels used.
+    
+    Per-file sums are kept in rolling aggregate stores, so only half-months that
+    were not seen by an earlier run are read from disk.
     """
     periods: List[Tuple[str, str]] = []
     yyyymm, period = base_yyyymm, base_period
@@ -287,70 +299,43 @@ def _average_recent_panels(base_yyyymm: str, base_period: str, n_back: int) -> T
     used_labels = [f"{ym}{p}" for (ym, p) in periods]
     log_progress(f"📊 Averaging recent panels over {len(periods)} half-months: {used_labels}")
 
-    # Collect frames
-    planning_frames: List[pd.DataFrame] = []
-    quantity_frames: List[pd.DataFrame] = []
+    # Collect the half-months where both panels exist
+    planning_paths: List[str] = []
+    quantity_paths: List[str] = []
     for (ym, p) in periods:
         try:
-            plan_df, qty_df = _load_api_planning_quantity(ym, p)
-            planning_frames.append(plan_df)
-            quantity_frames.append(qty_df)
+            plan_path, qty_path = _api_planning_quantity_paths(ym, p)
+            planning_paths.append(plan_path)
+            quantity_paths.append(qty_path)
         except Exception as e:
             log_progress(f"⚠️ Skipping {ym}{p}: {e}")
 
-    if not planning_frames or not quantity_frames:
+    if not planning_paths or not quantity_paths:
         raise FileNotFoundError("No recent frames could be loaded for averaging")
 
-    # Averaging strategy
     # Planning: average target_sty_cnt_avg and sty_sal_amt by store/category dims
-    p_concat = []
-    for df in planning_frames:
-        df2 = df.copy()
-        # keep only columns we can aggregate reliably
-        keep_cols = [c for c in ['str_code','season_name','sex_name','display_location_name','big_class_name','sub_cate_name','target_sty_cnt_avg','sty_sal_amt'] if c in df2.columns]
-        df2 = df2[keep_cols]
-        p_concat.append(df2)
-    p_all = pd.concat(p_concat, ignore_index=True)
-    p_group_cols = [c for c in ['str_code','season_name','sex_name','display_location_name','big_class_name','sub_cate_name'] if c in p_all.columns]
-    p_val_cols = [c for c in ['target_sty_cnt_avg','sty_sal_amt'] if c in p_all.columns]
-    # Coerce planning numeric fields to numeric to avoid object-dtype mean errors
-    for col in p_val_cols:
-        if col in p_all.columns:
-            p_all[col] = pd.to_numeric(p_all[col], errors='coerce')
-    p_agg = p_all.groupby(p_group_cols)[p_val_cols].mean().reset_index() if p_group_cols and p_val_cols else planning_frames[0]
+    planning_store = RollingAggregateStore(
+        "step8_planning", keys=PLANNING_GROUP_COLS, values=PLANNING_VALUE_COLS,
+        reader=lambda path: _read_panel(path, PLANNING_GROUP_COLS + PLANNING_VALUE_COLS))
+    p_agg = planning_store.recent_window(planning_paths)
+    if p_agg is None:
+        p_agg = pd.read_csv(planning_paths[0], dtype={'str_code': str}, low_memory=False)
 
     # Quantity: average by (str_code, spu_code), sum numeric then divide by N
-    q_concat = []
-    for df in quantity_frames:
-        df2 = df.copy()
-        keep_cols = [c for c in ['str_code','spu_code','spu_sales_amt','quantity','sub_cate_name','season_name','sex_name','display_location_name','big_class_name'] if c in df2.columns]
-        df2 = df2[keep_cols]
-        q_concat.append(df2)
-    q_all = pd.concat(q_concat, ignore_index=True)
-    # ensure numeric types
-    for col in ['spu_sales_amt','quantity']:
-        if col in q_all.columns:
-            q_all[col] = pd.to_numeric(q_all[col], errors='coerce')
-    q_group_cols = [c for c in ['str_code','spu_code'] if c in q_all.columns]
-    if q_group_cols:
-        agg_dict = {}
-        if 'spu_sales_amt' in q_all.columns:
-            agg_dict['spu_sales_amt'] = 'sum'
-        if 'quantity' in q_all.columns:
-            agg_dict['quantity'] = 'sum'
-        q_agg = q_all.groupby(q_group_cols).agg(agg_dict).reset_index()
-        n_periods = len(planning_frames)  # same count for averaging
-        for col in ['spu_sales_amt','quantity']:
-            if col in q_agg.columns and n_periods > 0:
-                q_agg[col] = q_agg[col] / n_periods
+    quantity_store = RollingAggregateStore(
+        "step8_quantity", keys=QUANTITY_GROUP_COLS, values=QUANTITY_VALUE_COLS,
+        reader=lambda path: _read_panel(path, QUANTITY_GROUP_COLS + QUANTITY_VALUE_COLS))
+    q_agg = quantity_store.recent_window(quantity_paths, divisor='sources')
+    if q_agg is not None:
         # Recover optional category dims from the most recent quantity frame (left merge on keys)
-        recent_q = quantity_frames[0]
-        extra_cols = [c for c in ['sub_cate_name','season_name','sex_name','display_location_name','big_class_name'] if c in recent_q.columns]
+        recent_q = _read_panel(quantity_paths[0], QUANTITY_GROUP_COLS + QUANTITY_EXTRA_COLS)
+        q_group_cols = [c for c in QUANTITY_GROUP_COLS if c in recent_q.columns]
+        extra_cols = [c for c in QUANTITY_EXTRA_COLS if c in recent_q.columns]
         if extra_cols:
             recent_q_small = recent_q[q_group_cols + extra_cols].drop_duplicates(q_group_cols)
             q_agg = q_agg.merge(recent_q_small, on=q_group_cols, how='left')
     else:
-        q_agg = quantity_frames[0]
+        q_agg = pd.read_csv(quantity_paths[0], dtype={'str_code': str}, low_memory=False)
 
     log_progress(f"✅ Averaged panels: planning={len(p_agg):,} rows, quantity={len(q_agg):,} rows")
     return p_agg, q_agg, used_labels
@@ -577,6 +562,22 @@ def load_data() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         log_progress(f"Error loading data: {str(e)}")
         raise
 
+def _build_category_key(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    """
+    Build the '|'-joined category key column-wise (same text as joining each row's values).
+    
+    Args:
+        df: Frame holding the grouping columns
+        columns: Grouping columns in key order
+        
+    Returns:
+        Series of category keys aligned to df
+    """
+    key = df[columns[0]].astype(str)
+    for col in columns[1:]:
+        key = key + '|' + df[col].astype(str)
+    return key
+
 def prepare_allocation_data(planning_df: pd.DataFrame, cluster_df: pd.DataFrame, quantity_df: pd.DataFrame) -> pd.DataFrame:
     """
     Prepare store allocation data with cluster information and quantity data for rebalancing analysis.
@@ -615,9 +616,7 @@ def prepare_allocation_data(planning_df: pd.DataFrame, cluster_df: pd.DataFrame,
         
         # Create category key for grouping
         grouping_cols = CURRENT_CONFIG['grouping_columns']
-        data_with_clusters['category_key'] = data_with_clusters[grouping_cols].apply(
-            lambda x: '|'.join(x.astype(str)), axis=1
-        )
+        data_with_clusters['category_key'] = _build_category_key(data_with_clusters, grouping_cols)
         
         # QUANTITY ENHANCEMENT: Add quantity data for subcategory rebalancing
         log_progress("Integrating quantity data for subcategory rebalancing...")
@@ -710,9 +709,7 @@ def prepare_allocation_data(planning_df: pd.DataFrame, cluster_df: pd.DataFrame,
             fallback_cols = [c for c in ['sub_cate_name', 'sty_code'] if c in data_with_clusters.columns]
             available_grouping_cols = fallback_cols if fallback_cols else ['spu_code']
 
-        data_with_clusters['category_key'] = data_with_clusters[available_grouping_cols].apply(
-            lambda x: '|'.join(x.astype(str)), axis=1
-        )
+        data_with_clusters['category_key'] = _build_category_key(data_with_clusters, available_grouping_cols)
         
         # Only consider allocations above minimum threshold
         allocation_data = data_with_clusters[
@@ -774,6 +771,36 @@ def calculate_cluster_z_scores(allocation_data: pd.DataFrame) -> pd.DataFrame:
     log_progress(f"Calculated Z-Scores for {len(valid_alloc):,} allocations across {valid_groups.shape[0]:,} cluster-{ANALYSIS_LEVEL} combinations")
     return valid_alloc
 
+def _rebalancing_recommendation_text(imbalanced: pd.DataFrame) -> pd.Series:
+    """
+    Build user-facing rebalancing guidance for every case with column-wise string ops.
+    
+    Uses the rounded recommended_quantity_change, e.g.
+    "INCREASE 6 UNITS/15-DAYS to 18.0 (current: 12.0) @ ~$45/unit".
+    """
+    flag = imbalanced['recommend_rebalancing'].fillna(False).astype(bool).to_numpy()
+    adjustment = imbalanced['recommended_quantity_change'].to_numpy()
+    current_qty = imbalanced['current_quantity_15days'].to_numpy(dtype=float)
+    unit_price = imbalanced['unit_price'].to_numpy(dtype=float)
+    target_qty = current_qty + adjustment
+    increase = adjustment > 0
+    
+    index = imbalanced.index
+    units = pd.Series(np.char.mod('%d', np.abs(adjustment).astype(np.int64)), index=index)
+    target_txt = pd.Series(np.char.mod('%.1f', target_qty), index=index)
+    current_txt = pd.Series(np.char.mod('%.1f', current_qty), index=index)
+    with np.errstate(invalid='ignore'):
+        has_price = np.nan_to_num(unit_price) > 0
+    cost_info = pd.Series(np.where(has_price, np.char.mod(' @ ~$%.0f/unit', np.nan_to_num(unit_price)), ''), index=index)
+    action = pd.Series(np.where(increase, 'INCREASE', 'REDUCE'), index=index)
+    text = action + ' ' + units + ' UNITS/15-DAYS to ' + target_txt + ' (current: ' + current_txt + ')' + cost_info
+    
+    return pd.Series(np.select(
+        [~flag, ~increase & (REDISTRIBUTION_STRATEGY == "increase_only")],
+        ["No rebalancing needed (below minimum threshold)", "No rebalancing needed (increase-only mode)"],
+        default=text
+    ), index=index)
+
 def identify_imbalanced_cases(z_score_data: pd.DataFrame) -> pd.DataFrame:
     """
     Identify imbalanced cases with QUANTITY REBALANCING RECOMMENDATIONS.
@@ -907,37 +934,7 @@ def identify_imbalanced_cases(z_score_data: pd.DataFrame) -> pd.DataFrame:
     ).fillna(0.0)
     
     # Generate quantity rebalancing recommendations
-    def create_rebalancing_recommendation(row):
-        flag = row.get('recommend_rebalancing')
-        if (pd.isna(flag)) or (flag is False):
-            return "No rebalancing needed (below minimum threshold)"
-        
-        # Use rounded, recommended quantity change for user-facing guidance
-        adjustment = row['recommended_quantity_change']
-        current_qty = row['current_quantity_15days']
-        target_qty = current_qty + adjustment
-        unit_price = row['unit_price']
-        
-        if adjustment > 0:
-            action = "INCREASE"
-            direction = "to"
-        else:
-            if REDISTRIBUTION_STRATEGY == "increase_only":
-                return "No rebalancing needed (increase-only mode)"
-            action = "REDUCE"
-            direction = "to"
-            adjustment = abs(adjustment)
-        
-        if (pd.notna(unit_price)) and (unit_price > 0):
-            cost_info = f" @ ~${unit_price:.0f}/unit"
-        else:
-            cost_info = ""
-        
-        return f"{action} {int(adjustment)} UNITS/15-DAYS {direction} {target_qty:.1f} (current: {current_qty:.1f}){cost_info}"
-    
-    imbalanced['recommendation_text'] = imbalanced.apply(  # STANDARDIZED: Use recommendation_text
-        create_rebalancing_recommendation, axis=1
-    )
+    imbalanced['recommendation_text'] = _rebalancing_recommendation_text(imbalanced)  # STANDARDIZED: Use recommendation_text
     
     log_progress(f"Identified {len(imbalanced)} imbalanced {ANALYSIS_LEVEL} cases")
     
@@ -968,64 +965,47 @@ def identify_imbalanced_cases(z_score_data: pd.DataFrame) -> pd.DataFrame:
         historical_data = load_historical_data_for_validation()
         validator = SellThroughValidator(historical_data)
         
-        # Apply validation to each imbalanced case
-        validated_cases = []
-        rejected_count = 0
+        # Validate every case in one vectorized pass
+        # Get category name for validation (preserve missingness; no synthetic 'Unknown')
+        if 'sub_cate_name' in imbalanced.columns:
+            category_name = imbalanced['sub_cate_name']
+        else:
+            category_name = pd.Series(np.nan, index=imbalanced.index)
+        # Use period-aware quantity fields; skip if missing (no synthetic numeric defaults)
+        current_qty = imbalanced['current_quantity_15days']
+        target_qty = imbalanced['target_quantity_15days']
+        # Derive from constrained adjustment if available
+        target_qty = target_qty.fillna(current_qty + imbalanced['constrained_quantity_adjustment'])
+        has_inputs = (
+            category_name.notna() & (category_name.astype(str) != '')
+            & current_qty.notna() & target_qty.notna()
+        )
+        skipped_count = int((~has_inputs).sum())
+        candidates = imbalanced.loc[has_inputs].reset_index(drop=True)
+        
+        # Validate the rebalancing recommendation using CORRECTED Fast Fish definition
+        # Clamp inputs to realistic integer ranges and cast to int
+        validation = validator.validate_dataframe(
+            store_code=candidates['str_code'].astype(str),
+            category=category_name.loc[has_inputs].astype(str).reset_index(drop=True),
+            current_spu_count=pd.Series(np.clip(current_qty.loc[has_inputs].to_numpy(), 0, 100).astype(int)),
+            recommended_spu_count=pd.Series(np.clip(target_qty.loc[has_inputs].to_numpy(), 0, 100).astype(int)),
+            action='REBALANCE',
+            rule_name='Rule 8: Imbalanced Allocation'
+        )
         
-        skipped_count = 0
-        for idx, case in imbalanced.iterrows():
-            # Get category name for validation (preserve missingness; no synthetic 'Unknown')
-            category_name = case.get('sub_cate_name', None)
-            if pd.isna(category_name) or category_name in [None, '']:
-                skipped_count += 1
-                continue
-            
-            # Use period-aware quantity fields; skip if missing (no synthetic numeric defaults)
-            current_qty = case.get('current_quantity_15days', np.nan)
-            target_qty = case.get('target_quantity_15days', np.nan)
-            if pd.isna(current_qty):
-                skipped_count += 1
-                continue
-            if pd.isna(target_qty):
-                # Derive from constrained adjustment if available
-                adj = case.get('constrained_quantity_adjustment', np.nan)
-                if pd.isna(adj):
-                    skipped_count += 1
-                    continue
-                target_qty = current_qty + adj
-            
-            # Validate the rebalancing recommendation using CORRECTED Fast Fish definition
-            # Clamp inputs to realistic integer ranges and cast to int
-            current_qty_clamped = int(np.clip(current_qty, 0, 100))
-            target_qty_clamped = int(np.clip(target_qty, 0, 100))
-            validation = validator.validate_recommendation(
-                store_code=str(case['str_code']),
-                category=str(category_name),
-                current_spu_count=current_qty_clamped,
-                recommended_spu_count=target_qty_clamped,
-                action='REBALANCE',
-                rule_name='Rule 8: Imbalanced Allocation'
-            )
-            
-            # Only keep Fast Fish compliant recommendations
-            if validation['fast_fish_compliant']:
-                # Add sell-through metrics to case
-                enhanced_case = case.to_dict()
-                enhanced_case.update({
-                    'current_sell_through_rate': validation['current_sell_through_rate'],
-                    'predicted_sell_through_rate': validation['predicted_sell_through_rate'],
-                    'sell_through_improvement': validation['sell_through_improvement'],
-                    'fast_fish_compliant': validation['fast_fish_compliant'],
-                    'business_rationale': validation['business_rationale'],
-                    'approval_reason': validation['approval_reason']
-                })
-                validated_cases.append(enhanced_case)
-            else:
-                rejected_count += 1
+        # Only keep Fast Fish compliant recommendations
+        compliant = validation['fast_fish_compliant'].to_numpy(dtype=bool)
+        rejected_count = int((~compliant).sum())
+        # Add sell-through metrics to case
+        validated_cases = candidates.loc[compliant].reset_index(drop=True)
+        for col in ['current_sell_through_rate', 'predicted_sell_through_rate', 'sell_through_improvement',
+                    'fast_fish_compliant', 'business_rationale', 'approval_reason']:
+            validated_cases[col] = validation[col].to_numpy()[compliant]
         
         # Replace imbalanced cases with validated ones
-        if validated_cases:
-            imbalanced = pd.DataFrame(validated_cases)
+        if len(validated_cases) > 0:
+            imbalanced = validated_cases
             # Ensure gating reflects approved recommendations
             imbalanced['recommend_rebalancing'] = True
             # Sort by sell-through improvement (prioritize best rebalancing opportunities)
@@ -1103,16 +1083,24 @@ def apply_imbalanced_rule(cluster_df: pd.DataFrame, imbalanced_cases: pd.DataFra
     
     # Count imbalanced cases per store with quantity metrics
     if len(imbalanced_cases) > 0:
-        store_imbalance_stats = imbalanced_cases.groupby('str_code').agg({
-            'category_key': 'count',
-            'z_score': ['mean', lambda x: np.mean(np.abs(x))],  # Mean and absolute mean Z-Score
-            'adjustment_needed': 'sum',
-            'imbalance_type': lambda x: (x == 'OVER_ALLOCATED').sum(),  # Count over-allocations
-            'recommend_rebalancing': 'sum',  # Count rebalancing recommendations
-            'constrained_quantity_adjustment': lambda x: np.abs(x).sum(),  # Total quantity adjustment (pre-rounding)
-            'recommended_quantity_change': lambda x: np.abs(x).sum(),     # Total rebalance units (rounded)
-            'investment_required': 'sum'                                   # Total rebalance investment
-        }).reset_index()
+        # Precompute per-row helpers so every aggregation is a built-in groupby reduction
+        stats_input = imbalanced_cases.assign(
+            _abs_z=imbalanced_cases['z_score'].abs(),
+            _over=(imbalanced_cases['imbalance_type'] == 'OVER_ALLOCATED').astype(int),
+            _abs_cqa=imbalanced_cases['constrained_quantity_adjustment'].abs(),
+            _abs_rqc=imbalanced_cases['recommended_quantity_change'].abs(),
+        )
+        store_imbalance_stats = stats_input.groupby('str_code').agg(
+            category_key=('category_key', 'count'),
+            z_score_mean=('z_score', 'mean'),                    # Mean Z-Score
+            abs_z_score_mean=('_abs_z', 'mean'),                 # Absolute mean Z-Score
+            adjustment_needed=('adjustment_needed', 'sum'),
+            over_allocated=('_over', 'sum'),                     # Count over-allocations
+            recommend_rebalancing=('recommend_rebalancing', 'sum'),  # Count rebalancing recommendations
+            constrained_quantity_adjustment=('_abs_cqa', 'sum'),     # Total quantity adjustment (pre-rounding)
+            recommended_quantity_change=('_abs_rqc', 'sum'),         # Total rebalance units (rounded)
+            investment_required=('investment_required', 'sum')       # Total rebalance investment
+        ).reset_index()
         
         # Flatten column names with quantity metrics
         if ANALYSIS_LEVEL == "subcategory":
@@ -1155,11 +1143,12 @@ def apply_imbalanced_rule(cluster_df: pd.DataFrame, imbalanced_cases: pd.DataFra
     else:
         # No imbalanced cases found
         if ANALYSIS_LEVEL == "subcategory":
-            results_df['imbalanced_categories_count'] = 0
+            count_col = 'imbalanced_categories_count'
             rule_col = 'rule8_imbalanced'
         else:
-            results_df['imbalanced_spus_count'] = 0
+            count_col = 'imbalanced_spus_count'
             rule_col = 'rule8_imbalanced_spu'
+        results_df[count_col] = 0
         
         results_df['avg_z_score'] = 0
         results_df['avg_abs_z_score'] = 0
@@ -1178,9 +1167,10 @@ def apply_imbalanced_rule(cluster_df: pd.DataFrame, imbalanced_cases: pd.DataFra
     results_df['investment_required'] = 0.0
     
     # Add standard business rationale and approval columns
-    results_df['business_rationale'] = results_df.apply(
-        lambda row: f"Imbalanced allocation detected: {row.get('imbalanced_spus_count', row.get('imbalanced_categories_count', 0))} items need rebalancing" 
-                   if row.get('rule8_imbalanced_spu', row.get('rule8_imbalanced', 0)) > 0 else "No imbalance issues", axis=1
+    results_df['business_rationale'] = np.where(
+        results_df[rule_col] > 0,
+        "Imbalanced allocation detected: " + results_df[count_col].astype(str) + " items need rebalancing",
+        "No imbalance issues"
     )
     results_df['approval_reason'] = 'Automatic approval for allocation rebalancing'
     results_df['fast_fish_compliant'] = True  # Rebalancing is always compliant
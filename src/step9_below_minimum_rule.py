@@ -37,6 +37,7 @@ from src.config import (
 )
 from src.pipeline_manifest import register_step_output, get_step_input
 from src.output_utils import create_output_with_symlinks
+from src.rolling_aggregates import RollingFrameStore
 
 # FAST FISH ENHANCEMENT: Import sell-through validation
 try:
@@ -105,6 +106,11 @@ LAST_SPU_SALES_FILE_USED: Optional[str] = None
 UNIT_RATE_NA_COUNT: int = 0
 UNIT_DIAGNOSTICS_TOTAL_ROWS: int = 0
 
+# Store/category dimensions and JSON SPU sales column of the config blend
+CONFIG_BLEND_KEYS = ['str_code', 'season_name', 'sex_name', 'display_location_name', 'big_class_name', 'sub_cate_name']
+CONFIG_BLEND_VALUES = ['sty_sal_amt']
+
+
 def blend_seasonal_data(recent_df: pd.DataFrame, seasonal_df: pd.DataFrame, 
                        recent_weight: float, seasonal_weight: float, data_type: str) -> pd.DataFrame:
     """
@@ -125,8 +131,8 @@ def blend_seasonal_data(recent_df: pd.DataFrame, seasonal_df: pd.DataFrame,
     # Identify common columns for blending
     if data_type == "config":
         # For config data, blend on store and category dimensions
-        blend_cols = ['str_code', 'season_name', 'sex_name', 'display_location_name', 'big_class_name', 'sub_cate_name']
-        value_cols = ['sty_sal_amt']  # Main column to blend
+        blend_cols = CONFIG_BLEND_KEYS
+        value_cols = CONFIG_BLEND_VALUES  # Main column to blend
     else:
         # For quantity data, blend on store and SPU dimensions
         blend_cols = ['str_code', 'spu_code']
@@ -183,6 +189,37 @@ def blend_seasonal_data(recent_df: pd.DataFrame, seasonal_df: pd.DataFrame,
         log_progress(f"   ✅ Blended {len(blended):,} records from {len(recent_df):,} recent + {len(seasonal_df):,} seasonal")
         return blended
 
+def load_seasonal_config_frames(sources: List[Tuple[str, str]]) -> Tuple[List[pd.DataFrame], List[str]]:
+    """
+    Seasonal store_config frames, projected to the config blend columns, via the rolling store.
+
+    Args:
+        sources: (period_label, store_config path) pairs, most recent year first
+
+    Returns:
+        Tuple of (frames, period labels) for the sources with usable columns
+    """
+    blend_columns = set(CONFIG_BLEND_KEYS + CONFIG_BLEND_VALUES)
+    store = RollingFrameStore(
+        "step9_seasonal_config", keys=CONFIG_BLEND_KEYS, values=CONFIG_BLEND_VALUES,
+        reader=lambda path: pd.read_csv(path, dtype={'str_code': str}, usecols=lambda c: c in blend_columns,
+                                        low_memory=False),
+    )
+    frames: List[pd.DataFrame] = []
+    labels: List[str] = []
+    for label, path in sources:
+        try:
+            store.update([path])
+        except Exception as e:
+            log_progress(f"⚠️ Skipping seasonal store config {path}: {e}")
+            continue
+        part = store.part(path)
+        if part is not None and part['frame'] is not None:
+            frames.append(part['frame'])
+            labels.append(label)
+    return frames, labels
+
+
 def load_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Load clustering results and data with enhanced seasonal blending for August recommendations.
@@ -229,9 +266,8 @@ def load_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
             recent_data = pd.read_csv(recent_path, dtype={'str_code': str}, low_memory=False)
             log_progress(f"Recent trends: {len(recent_data)} config records")
 
-            # Resolve multi-year seasonal frames (same month/period for prior N years)
-            seasonal_frames: List[pd.DataFrame] = []
-            added_labels: List[str] = []
+            # Resolve multi-year seasonal sources (same month/period for prior N years)
+            seasonal_sources: List[Tuple[str, str]] = []
             years_back_env = os.environ.get("SEASONAL_YEARS_BACK")
             # Allow explicit list override for seasonal months (comma-separated YYYYMM)
             list_env = os.environ.get("SEASONAL_YYYYMM_LIST")
@@ -239,19 +275,9 @@ def load_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
 
             if list_env:
                 try:
-                    explicit_months = [s.strip() for s in list_env.split(',') if s.strip()]
+                    seasonal_months = [s.strip() for s in list_env.split(',') if s.strip()]
                 except Exception:
-                    explicit_months = []
-                for yyyymm_i in explicit_months:
-                    try:
-                        files_i = get_api_data_files(yyyymm_i, s_period)
-                        cfg_i = files_i.get('store_config')
-                        if cfg_i and os.path.exists(cfg_i):
-                            df_i = pd.read_csv(cfg_i, dtype={'str_code': str}, low_memory=False)
-                            seasonal_frames.append(df_i)
-                            added_labels.append(get_period_label(yyyymm_i, s_period))
-                    except Exception:
-                        continue
+                    seasonal_months = []
             else:
                 try:
                     years_back = int(years_back_env) if years_back_env and years_back_env.isdigit() else 2
@@ -263,21 +289,21 @@ def load_data() -> Tuple[pd.DataFrame, pd.DataFrame]:
                 # Base derived from current configured period unless overridden by SEASONAL_YYYYMM
                 base_year = int(str(yyyymm)[:4])
                 base_month = int(str(yyyymm)[4:6])
+                seasonal_months = [f"{base_year - i}{base_month:02d}" for i in range(1, years_back + 1)]
+                if SEASONAL_YYYYMM:
+                    seasonal_months[0] = SEASONAL_YYYYMM
+
+            for yyyymm_i in seasonal_months:
+                try:
+                    cfg_i = get_api_data_files(yyyymm_i, s_period).get('store_config')
+                except Exception:
+                    continue
+                if cfg_i and os.path.exists(cfg_i):
+                    seasonal_sources.append((get_period_label(yyyymm_i, s_period), cfg_i))
 
-                for i in range(1, years_back + 1):
-                    y = base_year - i
-                    yyyymm_i = f"{y}{base_month:02d}"
-                    if SEASONAL_YYYYMM and i == 1:
-                        yyyymm_i = SEASONAL_YYYYMM
-                    try:
-                        files_i = get_api_data_files(yyyymm_i, s_period)
-                        cfg_i = files_i.get('store_config')
-                        if cfg_i and os.path.exists(cfg_i):
-                            df_i = pd.read_csv(cfg_i, dtype={'str_code': str}, low_memory=False)
-                            seasonal_frames.append(df_i)
-                            added_labels.append(get_period_label(yyyymm_i, s_period))
-                    except Exception:
-                        continue
+            # Prior-year configs never change, so each is read and projected to the blend
+            # columns once; later runs load the projection from the rolling store
+            seasonal_frames, added_labels = load_seasonal_config_frames(seasonal_sources)
 
             if seasonal_frames:
                 seasonal_weight_total = float(os.environ.get("SEASONAL_WEIGHT", SEASONAL_WEIGHT))
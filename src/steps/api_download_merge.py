@@ -10,6 +10,7 @@ from __future__ import annotations
 from typing import Dict, Any, List, Optional, Tuple, Set, Union
 from dataclasses import dataclass
 from typing import NamedTuple
+import asyncio
 import json
 import pandas as pd
 import numpy as np
@@ -41,6 +42,7 @@ class SpuProcessingError(Exception):
     """Raised when SPU data processing fails."""
     pass
 from repositories import (
+    AsyncFastFishApiRepository,
     CsvFileRepository,
     FastFishApiRepository, 
     StoreTrackingRepository
@@ -141,12 +143,14 @@ class ApiDownloadStep(Step):
                  force_full_download: bool,
                  logger: PipelineLogger,
                  step_name: str,
-                 step_number: int):
+                 step_number: int,
+                 async_api_repo: Optional[AsyncFastFishApiRepository] = None):
         super().__init__(logger, step_name, step_number)
         
         # Injected repositories
         self.store_codes_repo = store_codes_repo
         self.api_repo = api_repo
+        self.async_api_repo = async_api_repo  # When set, batches download concurrently
         self.tracking_repo = tracking_repo
         self.config_output_repo = config_output_repo
         self.sales_output_repo = sales_output_repo
@@ -370,6 +374,9 @@ class ApiDownloadStep(Step):
     
     def _download_api_data_in_batches(self, stores_list: List[StoreCode]) -> ApiDataBatch:
         """Download configuration and sales data in batches."""
+        if self.async_api_repo is not None:
+            return asyncio.run(self._download_api_data_concurrently(stores_list))
+        
         config_data_list = []
         sales_data_list = []
         
@@ -403,6 +410,58 @@ class ApiDownloadStep(Step):
         
         return ApiDataBatch(config_data_list, sales_data_list)
     
+    async def _download_api_data_concurrently(self, stores_list: List[StoreCode]) -> ApiDataBatch:
+        """
+        Download the batches with up to the async client's concurrency limit in
+        flight; each batch's responses are parsed as soon as they arrive, while
+        later batches are still downloading. Results keep batch order.
+        """
+        batches = [stores_list[i:i + self.batch_size] for i in range(0, len(stores_list), self.batch_size)]
+        self.logger.info(
+            f"Downloading API data for {len(stores_list)} stores in {len(batches)} batches of {self.batch_size} "
+            f"(up to {self.async_api_repo.client.max_concurrency} requests in flight)",
+            self.class_name
+        )
+        
+        results = await asyncio.gather(*(self._fetch_batch_async(batch, batch_num, len(batches))
+                                         for batch_num, batch in enumerate(batches, start=1)))
+        
+        config_data_list = []
+        sales_data_list = []
+        for config_df, sales_df in results:
+            if config_df is None:
+                continue
+            if not config_df.empty:
+                config_data_list.append(config_df)
+            if sales_df is not None and not sales_df.empty:
+                sales_data_list.append(sales_df)
+        
+        return ApiDataBatch(config_data_list, sales_data_list)
+    
+    async def _fetch_batch_async(self, batch: List[StoreCode], batch_num: int,
+                                 total_batches: int) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+        """Fetch one batch's configuration and sales together; None marks a failed download."""
+        config_result, sales_result = await asyncio.gather(
+            self.async_api_repo.fetch_store_config(batch, self.yyyymm, self.period),
+            self.async_api_repo.fetch_store_sales(batch, self.yyyymm, self.period),
+            return_exceptions=True
+        )
+        
+        if isinstance(config_result, Exception):
+            self.logger.warning(f"Batch {batch_num} configuration download failed, continuing with next batch: {config_result}", self.class_name)
+            return None, None
+        config_records, _ = config_result
+        config_df = pd.DataFrame(config_records) if config_records else pd.DataFrame()
+        
+        if isinstance(sales_result, Exception):
+            self.logger.warning(f"Batch {batch_num} sales download failed, continuing with next batch: {sales_result}", self.class_name)
+            return config_df, None
+        sales_records, _ = sales_result
+        sales_df = pd.DataFrame(sales_records) if sales_records else pd.DataFrame()
+        
+        self.logger.info(f"Downloaded batch {batch_num}/{total_batches} ({len(batch)} stores)", self.class_name)
+        return config_df, sales_df
+    
     def _fetch_config_batch(self, batch: List[StoreCode]) -> pd.DataFrame:
         """Fetch configuration data for a batch of stores."""
         try:
@@ -25,6 +25,7 @@ from src.core.step import Step
 from src.core.context import StepContext
 from src.core.exceptions import DataValidationError
 from src.core.logger import PipelineLogger
+from src.multi_period_reader import get_multi_period_reader
 from src.repositories.period_discovery_repository import PeriodDiscoveryRepository
 from src.repositories.coordinate_extraction_repository import CoordinateExtractionRepository
 from src.repositories.spu_aggregation_repository import SpuAggregationRepository
@@ -260,26 +261,26 @@ class ExtractCoordinatesStep(Step):
                 "output/store_sales_data.csv",  # Alternative location
             ]
 
-            combined_records = []
-
+            legacy_files = []
             for pattern in legacy_patterns:
                 self.logger.debug(f"Looking for legacy fallback files matching: {pattern}", self.class_name)
                 matching_files = glob.glob(pattern)
                 self.logger.debug(f"Found {len(matching_files)} legacy files for pattern {pattern}", self.class_name)
-
-                for file_path in matching_files:
-                    try:
-                        self.logger.debug(f"Loading legacy fallback data from: {file_path}", self.class_name)
-                        df = pd.read_csv(file_path)
-                        records = df.to_dict('records')
-                        combined_records.extend(records)
-                        self.logger.debug(f"Loaded {len(records)} records from legacy file {file_path}", self.class_name)
-
-                    except Exception as e:
-                        self.logger.error(f"Failed to load legacy data from {file_path}: {e}", self.class_name)
-
-            if combined_records:
-                sales_df = pd.DataFrame(combined_records)
+                legacy_files.extend(matching_files)
+
+            # Decode all fallback files in parallel and concatenate frames
+            # directly instead of round-tripping through record dicts
+            frames = []
+            for file_path, df in get_multi_period_reader().read_files(legacy_files).items():
+                if isinstance(df, Exception):
+                    self.logger.error(f"Failed to load legacy data from {file_path}: {df}", self.class_name)
+                    continue
+                if not df.empty:
+                    frames.append(df)
+                self.logger.debug(f"Loaded {len(df)} records from legacy file {file_path}", self.class_name)
+
+            if frames:
+                sales_df = pd.concat(frames, ignore_index=True)
                 self.logger.info(f"✅ Loaded {len(sales_df)} sales records from legacy fallback files", self.class_name)
                 return sales_df
             else:
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Pipeline Scale Benchmark
+========================
+
+Runs the pipeline steps offline against production-shaped synthetic data and
+tracks wall time, peak RSS, CPU time and rows/sec per step in a JSON history,
+failing when a step regresses beyond a threshold against its recent history.
+
+What a run does:
+- builds a sandbox (copy of src/) and writes the Step 1 files for the Step 3
+  year-over-year window, store codes, coordinates and Step 4 weather/altitude
+  files for the chosen scale (tests/data_generators/scale_data.py)
+- serves the target period from a local stub of the sales API so Step 1 runs
+  for real (FAST_FISH_API_BASE)
+- runs each step as its own process (the way pipeline.py does), with output
+  streamed to <workdir>/logs/, and reads per-process resource usage via wait4
+- appends the run to the history file and compares every successful step with
+  the median of its last --window runs at the same scale
+
+Usage:
+    PYTHONPATH=. python tests/benchmarks/run_benchmarks.py --scale 1k
+    PYTHONPATH=. python tests/benchmarks/run_benchmarks.py --scale 5k --steps 2-3,7-12 --threshold 0.3
+
+Exit status is 1 when a regression is detected (unless --no-fail).
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from tests.data_generators.scale_data import (  # noqa: E402
+    SCALE_PRESETS, ScaleDataGenerator, ScaleSpec, half_month_dates, half_month_labels,
+)
+from tests.benchmarks.stub_api import StubFastFishAPI  # noqa: E402
+
+DEFAULT_HISTORY = PROJECT_ROOT / "output" / "benchmarks" / "benchmark_history.json"
+
+# (step id, script, argument style) - steps 1-22 as in pipeline.py, then 23-37
+BENCHMARK_STEPS = [
+    ('1', 'step1_download_api_data.py', 'api'),
+    ('2', 'step2_extract_coordinates.py', 'none'),
+    ('3', 'step3_prepare_matrix.py', 'none'),
+    ('4', 'step4_download_weather_data.py', 'weather'),
+    ('5', 'step5_calculate_feels_like_temperature.py', 'none'),
+    ('6', 'step6_cluster_analysis.py', 'none'),
+    ('7', 'step7_missing_category_rule.py', 'target'),
+    ('8', 'step8_imbalanced_rule.py', 'target'),
+    ('9', 'step9_below_minimum_rule.py', 'target'),
+    ('10', 'step10_spu_assortment_optimization.py', 'target'),
+    ('11', 'step11_missed_sales_opportunity.py', 'target'),
+    ('12', 'step12_sales_performance_rule.py', 'target'),
+    ('13', 'step13_consolidate_spu_rules.py', 'target'),
+    ('14', 'step14_create_fast_fish_format.py', 'target'),
+    ('15', 'step15_download_historical_baseline.py', 'target'),
+    ('16', 'step16_create_comparison_tables.py', 'target'),
+    ('17', 'step17_augment_recommendations.py', 'target'),
+    ('18', 'step18_validate_results.py', 'target'),
+    ('19', 'step19_detailed_spu_breakdown.py', 'target'),
+    ('20', 'step20_data_validation.py', 'none'),
+    ('21', 'step21_label_tag_recommendations.py', 'target'),
+    ('22', 'step22_store_attribute_enrichment.py', 'target'),
+    ('23', 'step23_update_clustering_features.py', 'target'),
+    ('24', 'step24_comprehensive_cluster_labeling.py', 'target'),
+    ('25', 'step25_product_role_classifier.py', 'target'),
+    ('26', 'step26_price_elasticity_analyzer.py', 'target'),
+    ('27', 'step27_gap_matrix_generator.py', 'target'),
+    ('28', 'step28_scenario_analyzer.py', 'target'),
+    ('29', 'step29_supply_demand_gap_analysis.py', 'target'),
+    ('30', 'step30_sellthrough_optimization_engine.py', 'target'),
+    ('31', 'step31_gap_analysis_workbook.py', 'target'),
+    ('32', 'step32_store_allocation.py', 'allocation'),
+    ('33', 'step33_store_level_merchandising_rules.py', 'target'),
+    ('34a', 'step34a_cluster_strategy_optimization.py', 'target'),
+    ('34b', 'step34b_unify_outputs.py', 'yyyymm'),
+    ('35', 'step35_merchandising_strategy_deployment.py', 'target'),
+    ('36', 'step36_unified_delivery_builder.py', 'target'),
+    ('37', 'step37_customer_delivery_formatter.py', 'target'),
+]
+
+# Step 3's default year-over-year window (current -4..+1, last year's -21..-16)
+# plus the same half-month last year, which Step 15 uses as its baseline
+WINDOW_OFFSETS = [-4, -3, -2, -1, 0, 1] + list(range(-24, -15))
+
+# Noise floors below which a slowdown/growth is not reported
+MIN_WALL_DELTA_S = 0.5
+MIN_RSS_DELTA_MB = 25.0
+
+
+def log_progress(message: str) -> None:
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}", flush=True)
+
+
+def parse_steps(spec: str) -> List[tuple]:
+    """'1-37' / '2,3,7-12' / '34a' -> matching BENCHMARK_STEPS entries in pipeline order."""
+    def number(step_id: str) -> int:
+        return int(step_id.rstrip('ab'))
+
+    wanted = set()
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        if '-' in part:
+            lo, hi = part.split('-', 1)
+            wanted.update(s[0] for s in BENCHMARK_STEPS if int(lo) <= number(s[0]) <= int(hi))
+        else:
+            wanted.update(s[0] for s in BENCHMARK_STEPS if s[0] == part or (part.isdigit() and number(s[0]) == int(part)))
+    return [s for s in BENCHMARK_STEPS if s[0] in wanted]
+
+
+def step_args(style: str, yyyymm: str, period: str, batch_size: int) -> List[str]:
+    if style == 'api':
+        # --force-full: the target period is pre-written, but Step 1 must still download it
+        return ['--month', yyyymm, '--period', period, '--batch-size', str(batch_size), '--force-full']
+    if style == 'weather':
+        start, end = half_month_dates(f"{yyyymm}{period}")
+        return ['--start-date', start, '--end-date', end]
+    if style == 'allocation':
+        return ['--target-yyyymm', yyyymm, '--period', period]
+    if style == 'target':
+        return ['--target-yyyymm', yyyymm, '--target-period', period]
+    if style == 'yyyymm':
+        return ['--target-yyyymm', yyyymm]
+    return []
+
+
+def prepare_sandbox(workdir: Path, generator: ScaleDataGenerator, yyyymm: str, period: str) -> Dict[str, int]:
+    """Copy src/ and write all offline inputs; returns row counts of the target period files."""
+    shutil.copytree(PROJECT_ROOT / "src", workdir / "src", ignore=shutil.ignore_patterns('__pycache__', '*.egg-info'))
+    for sub in ("data/api_data", "output", "logs"):
+        (workdir / sub).mkdir(parents=True, exist_ok=True)
+
+    target = f"{yyyymm}{period}"
+    counts: Dict[str, int] = {}
+    for label in half_month_labels(yyyymm, period, WINDOW_OFFSETS):
+        log_progress(f"Generating period {label}...")
+        written = generator.write_period(str(workdir / "data/api_data"), label, output_dir=str(workdir / "output"))
+        if label == target:
+            counts = written
+    generator.write_store_codes(str(workdir / "data/store_codes.csv"))
+    generator.write_coordinates(str(workdir / "data/store_coordinates_extended.csv"))
+    start, end = half_month_dates(target)
+    log_progress("Generating weather files...")
+    generator.write_weather(str(workdir / "output/weather_data"), str(workdir / "output/store_altitudes.csv"), start, end)
+    return counts
+
+
+def run_step(workdir: Path, script: str, args: List[str], env: Dict[str, str], log_path: Path,
+             timeout_s: Optional[float] = None) -> Dict[str, float]:
+    """
+    Run one step script as a child process and measure it.
+
+    Output goes straight to log_path (never buffered in this process); peak RSS
+    and CPU times come from the child's own rusage (os.wait4), so they cover
+    that step only.
+    """
+    cmd = [sys.executable, os.path.join("src", script)] + args
+    timed_out = threading.Event()
+    with open(log_path, 'w') as log:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT,
+                                preexec_fn=os.setsid)
+
+        def kill():
+            timed_out.set()
+            try:
+                os.killpg(os.getpgid(proc.pid), signal.SIGKILL)
+            except OSError:
+                pass
+
+        timer = threading.Timer(timeout_s, kill) if timeout_s else None
+        if timer:
+            timer.start()
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+        finally:
+            if timer:
+                timer.cancel()
+        wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return {
+        'returncode': -9 if timed_out.is_set() else proc.returncode,
+        'wall_s': round(wall, 3),
+        'peak_rss_mb': round(rss_mb, 1),
+        'cpu_user_s': round(usage.ru_utime, 3),
+        'cpu_sys_s': round(usage.ru_stime, 3),
+    }
+
+
+def load_history(path: Path) -> Dict[str, list]:
+    if not path.exists():
+        return {'runs': []}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_history(path: Path, history: Dict[str, list]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def check_regressions(previous_runs: List[dict], current: dict, threshold: float, window: int = 5) -> List[str]:
+    """
+    Compare each step of current with the median of its last `window` successful
+    runs at the same scale. A step regresses when wall time or peak RSS exceeds
+    the baseline by more than threshold (and the noise floor), or when a step
+    that used to succeed now fails.
+    """
+    comparable = [r for r in previous_runs if r.get('scale') == current['scale'] and r.get('spec') == current['spec']]
+    problems = []
+    for step_id, result in current['steps'].items():
+        prior = [r['steps'][step_id] for r in comparable if r['steps'].get(step_id, {}).get('returncode') == 0][-window:]
+        if not prior:
+            continue
+        if result['returncode'] != 0:
+            problems.append(f"Step {step_id}: failed (exit {result['returncode']}) but passed in {len(prior)} recent run(s)")
+            continue
+        for metric, floor, unit in (('wall_s', MIN_WALL_DELTA_S, 's'), ('peak_rss_mb', MIN_RSS_DELTA_MB, 'MB')):
+            baseline = median(p[metric] for p in prior)
+            value = result[metric]
+            if value > baseline * (1 + threshold) and value - baseline > floor:
+                problems.append(f"Step {step_id}: {metric} {value:.1f}{unit} vs baseline {baseline:.1f}{unit} "
+                                f"(+{(value / baseline - 1) * 100 if baseline else float('inf'):.0f}%)")
+    return problems
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmark(scale: str, spec: ScaleSpec, steps: List[tuple], workdir: Path, yyyymm: str, period: str,
+                  seed: int = 42, batch_size: int = 100, timeout_minutes: Optional[float] = None,
+                  stop_on_failure: bool = False) -> dict:
+    """Generate the inputs, run the steps and return the run record."""
+    generator = ScaleDataGenerator(spec, seed=seed)
+    log_progress(f"Preparing sandbox at {workdir} (scale={scale}: {spec.n_stores} stores, {spec.n_spus} SPUs)")
+    counts = prepare_sandbox(workdir, generator, yyyymm, period)
+    rows = counts.get(f"complete_spu_sales_{yyyymm}{period}.csv", 0)
+
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'scale': scale,
+        'spec': {'n_stores': spec.n_stores, 'n_spus': spec.n_spus, 'spus_per_store': spec.spus_per_store},
+        'target_period': f"{yyyymm}{period}",
+        'rows': rows,
+        'steps': {},
+    }
+    with StubFastFishAPI(generator) as api:
+        env = os.environ.copy()
+        env.update({
+            'PYTHONPATH': str(workdir),
+            'PIPELINE_TARGET_YYYYMM': yyyymm,
+            'PIPELINE_TARGET_PERIOD': period,
+            'PIPELINE_YYYYMM': yyyymm,
+            'PIPELINE_PERIOD': period,
+            'FAST_FISH_API_BASE': api.base_url,
+        })
+        for step_id, script, style in steps:
+            log_progress(f"Step {step_id}: {script}...")
+            result = run_step(workdir, script, step_args(style, yyyymm, period, batch_size), env,
+                              workdir / "logs" / f"step{step_id}.log",
+                              timeout_s=timeout_minutes * 60 if timeout_minutes else None)
+            result['script'] = script
+            result['rows_per_s'] = round(rows / result['wall_s'], 1) if result['wall_s'] > 0 else None
+            run['steps'][step_id] = result
+            status = 'ok' if result['returncode'] == 0 else f"FAILED (exit {result['returncode']})"
+            log_progress(f"  {status}: {result['wall_s']:.1f}s, peak RSS {result['peak_rss_mb']:.0f} MB, "
+                         f"{result['rows_per_s'] or 0:,.0f} rows/s")
+            if result['returncode'] != 0 and stop_on_failure:
+                break
+    return run
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline steps on synthetic data at scale")
+    parser.add_argument('--scale', choices=sorted(SCALE_PRESETS), default='1k')
+    parser.add_argument('--stores', type=int, help='Override the preset store count')
+    parser.add_argument('--spus', type=int, help='Override the preset SPU catalogue size')
+    parser.add_argument('--spus-per-store', type=int, help='Override SPUs sold per store per period')
+    parser.add_argument('--steps', default='1-37', help="Steps to run, e.g. '1-37' or '2,3,7-12'")
+    parser.add_argument('--target-yyyymm', default='202508')
+    parser.add_argument('--target-period', choices=['A', 'B'], default='A')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--history', default=str(DEFAULT_HISTORY), help='JSON history file')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative slowdown / RSS growth')
+    parser.add_argument('--window', type=int, default=5, help='Past runs in the regression baseline')
+    parser.add_argument('--workdir', help='Sandbox directory (default: a temporary directory)')
+    parser.add_argument('--keep', action='store_true', help='Keep the sandbox after the run')
+    parser.add_argument('--batch-size', type=int, default=100, help='Step 1 API batch size')
+    parser.add_argument('--timeout-minutes', type=float, help='Per-step timeout')
+    parser.add_argument('--stop-on-failure', action='store_true')
+    parser.add_argument('--no-fail', action='store_true', help='Report regressions without a non-zero exit')
+    args = parser.parse_args()
+
+    preset = SCALE_PRESETS[args.scale]
+    spec = ScaleSpec(n_stores=args.stores or preset.n_stores, n_spus=args.spus or preset.n_spus,
+                     spus_per_store=args.spus_per_store or preset.spus_per_store)
+    steps = parse_steps(args.steps)
+    if not steps:
+        parser.error(f"No steps match {args.steps!r}")
+
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix=f"bench_{args.scale}_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        run = run_benchmark(args.scale, spec, steps, workdir, args.target_yyyymm, args.target_period,
+                            seed=args.seed, batch_size=args.batch_size, timeout_minutes=args.timeout_minutes,
+                            stop_on_failure=args.stop_on_failure)
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    history_path = Path(args.history)
+    history = load_history(history_path)
+    problems = check_regressions(history['runs'], run, args.threshold, args.window)
+    run['regressions'] = problems
+    history['runs'].append(run)
+    save_history(history_path, history)
+    log_progress(f"Recorded run in {history_path}")
+
+    if problems:
+        log_progress(f"❌ {len(problems)} regression(s) beyond {args.threshold:.0%}:")
+        for problem in problems:
+            log_progress(f"  • {problem}")
+        return 0 if args.no_fail else 1
+    log_progress("✅ No regressions against recent history")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Local stand-in for the FastFish sales API used by Step 1.
+
+Serves getAdsAiStrCfg / getAdsAiStrSal from a ScaleDataGenerator so Step 1 can
+run offline (point it here with FAST_FISH_API_BASE). Responses follow the real
+payload shape: {"data": [records...]} filtered to the requested strCodes.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+import pandas as pd
+
+from tests.data_generators.scale_data import ScaleDataGenerator
+
+ENDPOINTS = {
+    'getAdsAiStrCfg': 'store_config',
+    'getAdsAiStrSal': 'store_sales',
+}
+
+
+class StubFastFishAPI:
+    """Threaded HTTP server; use as a context manager and read .base_url."""
+
+    def __init__(self, generator: ScaleDataGenerator, host: str = '127.0.0.1', port: int = 0):
+        self.generator = generator
+        self._frames: Dict[Tuple[str, str], Dict[str, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                endpoint = self.path.rstrip('/').rsplit('/', 1)[-1]
+                if endpoint not in ENDPOINTS:
+                    self.send_error(404)
+                    return
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                body = stub.respond(ENDPOINTS[endpoint], payload).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.base_url = f"http://{host}:{self.server.server_address[1]}/api/sale"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _by_store(self, kind: str, label: str) -> Dict[str, pd.DataFrame]:
+        with self._lock:
+            if (kind, label) not in self._frames:
+                frame = getattr(self.generator, kind)(label)
+                self._frames = {key: value for key, value in self._frames.items() if key[1] == label}
+                self._frames[(kind, label)] = {code: rows for code, rows in frame.groupby('str_code', sort=False)}
+            return self._frames[(kind, label)]
+
+    def respond(self, kind: str, payload: dict) -> str:
+        self.requests += 1
+        label = f"{payload.get('yyyymm')}{payload.get('period') or 'A'}"
+        by_store = self._by_store(kind, label)
+        frames = [by_store[str(code)] for code in payload.get('strCodes', []) if str(code) in by_store]
+        records = pd.concat(frames).to_json(orient='records', force_ascii=False) if frames else '[]'
+        return '{"data":' + records + '}'
+
+    def __enter__(self) -> 'StubFastFishAPI':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,105 @@
+"""
+Benchmark Harness Test (Isolated Synthetic)
+===========================================
+
+Covers the pieces of the scale benchmark that do not need a full pipeline run:
+generator consistency, the stub sales API, step selection, regression checks
+against history and per-process measurement.
+"""
+
+import json
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from tests.benchmarks import run_benchmarks as bench
+from tests.benchmarks.stub_api import StubFastFishAPI
+from tests.data_generators.scale_data import (
+    ScaleDataGenerator, ScaleSpec, half_month_labels, parse_sty_sal_amt,
+)
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return ScaleDataGenerator(ScaleSpec(n_stores=12, n_spus=200, spus_per_store=20), seed=7)
+
+
+def test_generator_files_agree_with_each_other(generator):
+    sales = generator.spu_sales('202508A')
+    config = generator.store_config('202508A')
+    store_sales = generator.store_sales('202508A')
+
+    assert sales['spu_code'].str.contains('T').all()  # Non-numeric, like production codes
+    decoded = sum(sum(parse_sty_sal_amt(v).values()) for v in config['sty_sal_amt'])
+    assert decoded == pytest.approx(sales['spu_sales_amt'].sum())
+    assert config['sal_amt'].sum() == pytest.approx(sales['spu_sales_amt'].sum())
+    totals = store_sales[['base_sal_amt', 'fashion_sal_amt']].to_numpy().sum()
+    assert totals == pytest.approx(sales['spu_sales_amt'].sum())
+    pd.testing.assert_frame_equal(generator.spu_sales('202508A'), sales)
+
+
+def test_half_month_labels_cross_year():
+    assert half_month_labels('202501', 'A', [-1, 0, 1]) == ['202412B', '202501A', '202501B']
+
+
+def test_stub_api_filters_by_store_codes(generator):
+    codes = generator.stores['str_code'].tolist()[:3]
+    with StubFastFishAPI(generator) as api:
+        request = urllib.request.Request(
+            f"{api.base_url}/getAdsAiStrCfg",
+            data=json.dumps({'strCodes': codes + ['missing'], 'yyyymm': '202508', 'period': 'A'}).encode(),
+            headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=10) as response:
+            records = json.loads(response.read())['data']
+
+    expected = generator.store_config('202508A')
+    assert api.requests == 1
+    assert len(records) == expected['str_code'].isin(codes).sum()
+    assert {r['str_code'] for r in records} == set(codes)
+
+
+def test_parse_steps_keeps_pipeline_order():
+    assert [s[0] for s in bench.parse_steps('12,2-3')] == ['2', '3', '12']
+    assert [s[0] for s in bench.parse_steps('34')] == ['34a', '34b']
+    assert [s[0] for s in bench.parse_steps('34b')] == ['34b']
+
+
+def _run(wall, rss, returncode=0, scale='1k'):
+    step = {'returncode': returncode, 'wall_s': wall, 'peak_rss_mb': rss}
+    return {'scale': scale, 'spec': {'n_stores': 1}, 'steps': {'7': step}}
+
+
+def test_check_regressions_uses_recent_median_and_noise_floor():
+    history = [_run(10.0, 500.0), _run(11.0, 510.0), _run(30.0, 900.0, scale='5k'), _run(99.0, 9.0, returncode=1)]
+
+    assert bench.check_regressions(history, _run(12.0, 520.0), threshold=0.25) == []
+    problems = bench.check_regressions(history, _run(20.0, 700.0), threshold=0.25)
+    assert [p.split(' ')[2] for p in problems] == ['wall_s', 'peak_rss_mb']
+    # Relative slowdown below the noise floor is ignored
+    assert bench.check_regressions([_run(0.2, 100.0)], _run(0.5, 110.0), threshold=0.25) == []
+    assert 'failed' in bench.check_regressions(history, _run(1.0, 1.0, returncode=2), threshold=0.25)[0]
+
+
+def test_run_step_measures_child_and_kills_on_timeout(tmp_path):
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'alloc.py').write_text(
+        "import sys, time\nblock = bytearray(80 * 1024 * 1024)\nprint('done')\n"
+        "time.sleep(float(sys.argv[1]))\n")
+
+    result = bench.run_step(tmp_path, 'alloc.py', ['0'], env=None, log_path=tmp_path / 'ok.log')
+    assert result['returncode'] == 0
+    assert result['peak_rss_mb'] >= 80
+    assert (tmp_path / 'ok.log').read_text().strip() == 'done'
+
+    result = bench.run_step(tmp_path, 'alloc.py', ['30'], env=None, log_path=tmp_path / 'slow.log', timeout_s=1)
+    assert result['returncode'] == -9
+    assert result['wall_s'] < 30
+
+
+def test_history_round_trip(tmp_path):
+    path = tmp_path / 'nested' / 'history.json'
+    assert bench.load_history(path) == {'runs': []}
+    bench.save_history(path, {'runs': [_run(1.0, 2.0)]})
+    assert bench.load_history(path)['runs'][0]['steps']['7']['wall_s'] == 1.0
+    assert not list(path.parent.glob('*.tmp'))
@@ -270,6 +270,18 @@ def sample_well_selling_features(sample_sales_data, sample_cluster_data):
         cluster_df=sample_cluster_data
     )
 
+@pytest.fixture(scope="session", autouse=True)
+def rolling_aggregate_cache_dir(tmp_path_factory):
+    """Keep the rule steps' rolling-aggregate stores out of the repo's output/ (also for subprocess runs)."""
+    cache_dir = tmp_path_factory.mktemp("rolling_cache")
+    previous = os.environ.get("ROLLING_AGGREGATE_CACHE_DIR")
+    os.environ["ROLLING_AGGREGATE_CACHE_DIR"] = str(cache_dir)
+    yield cache_dir
+    if previous is None:
+        os.environ.pop("ROLLING_AGGREGATE_CACHE_DIR", None)
+    else:
+        os.environ["ROLLING_AGGREGATE_CACHE_DIR"] = previous
+
 # Dynamic period detection fixtures
 @pytest.fixture(scope="session")
 def project_root():
@@ -0,0 +1,260 @@
+"""
+Production-scale synthetic data generator for pipeline benchmarks.
+
+Produces half-month periods shaped like the real Step 1 API payloads and
+outputs - store_config rows with the sty_sal_amt SPU JSON, store_sales rows
+with quantities and long_lat coordinates, the derived category/SPU sales
+files - plus per-store weather and altitude files, at parametric store/SPU
+scales. Every period is deterministic in (seed, period label), so the stub API
+and the pre-written history periods always agree.
+"""
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_TREE = {
+    '上装': ['T恤', '衬衫', 'POLO衫', '卫衣', '针织衫', '背心'],
+    '下装': ['休闲裤', '牛仔裤', '短裤', '运动裤', '工装裤'],
+    '外套': ['夹克', '风衣', '羽绒服', '棉服', '西服'],
+    '配饰': ['帽子', '袜子', '包', '腰带'],
+    '鞋': ['休闲鞋', '运动鞋', '凉鞋'],
+}
+SEASONS = ['夏', '四季', '春']
+SEASON_WEIGHTS = [0.6, 0.3, 0.1]
+SEXES = ['男', '女']
+WEATHER_COLUMNS = [
+    'temperature_2m', 'relative_humidity_2m', 'wind_speed_10m', 'wind_direction_10m',
+    'precipitation', 'rain', 'snowfall', 'cloud_cover', 'weather_code', 'pressure_msl',
+    'direct_radiation', 'diffuse_radiation', 'direct_normal_irradiance', 'terrestrial_radiation',
+    'shortwave_radiation', 'et0_fao_evapotranspiration',
+]
+CONFIG_GROUP_COLS = ['str_code', 'big_class_name', 'sub_cate_name', 'season_name', 'sex_name', 'display_location_name']
+
+
+@dataclass(frozen=True)
+class ScaleSpec:
+    """Store count, SPU catalogue size and SPUs sold per store per period."""
+    n_stores: int
+    n_spus: int
+    spus_per_store: int
+
+
+SCALE_PRESETS: Dict[str, ScaleSpec] = {
+    'smoke': ScaleSpec(n_stores=60, n_spus=600, spus_per_store=40),
+    '1k': ScaleSpec(n_stores=1_000, n_spus=10_000, spus_per_store=400),
+    '5k': ScaleSpec(n_stores=5_000, n_spus=50_000, spus_per_store=500),
+    '20k': ScaleSpec(n_stores=20_000, n_spus=200_000, spus_per_store=600),
+}
+
+
+def half_month_labels(yyyymm: str, period: str, offsets: List[int]) -> List[str]:
+    """Period labels at the given half-month offsets from (yyyymm, period)."""
+    base = int(yyyymm[:4]) * 24 + (int(yyyymm[4:]) - 1) * 2 + (0 if period == 'A' else 1)
+    labels = []
+    for offset in offsets:
+        idx = base + offset
+        labels.append(f"{idx // 24:04d}{(idx % 24) // 2 + 1:02d}{'A' if idx % 2 == 0 else 'B'}")
+    return labels
+
+
+def half_month_dates(label: str) -> tuple:
+    """(start_date, end_date) as YYYY-MM-DD for a period label such as '202508A'."""
+    start = pd.Timestamp(f"{label[:4]}-{label[4:6]}-01")
+    if label[6] == 'A':
+        return start.strftime('%Y-%m-%d'), (start + pd.Timedelta(days=14)).strftime('%Y-%m-%d')
+    return (start + pd.Timedelta(days=15)).strftime('%Y-%m-%d'), (start + pd.offsets.MonthEnd(0)).strftime('%Y-%m-%d')
+
+
+class ScaleDataGenerator:
+    """Generate production-shaped periods for a ScaleSpec."""
+
+    def __init__(self, spec: ScaleSpec, seed: int = 42):
+        self.spec = spec
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+
+        n = spec.n_stores
+        self.stores = pd.DataFrame({
+            'str_code': (11000 + np.arange(n)).astype(str),
+            'str_name': [f'门店{i:05d}' for i in range(n)],
+            'longitude': np.round(rng.uniform(100.0, 122.0, n), 6),
+            'latitude': np.round(rng.uniform(22.0, 45.0, n), 6),
+            'store_size': rng.lognormal(0.0, 0.4, n),
+        })
+        self.stores['long_lat'] = self.stores['longitude'].map('{:.6f}'.format) + ',' + \
+            self.stores['latitude'].map('{:.6f}'.format)
+
+        subcats = [(big, sub) for big, subs in CATEGORY_TREE.items() for sub in subs]
+        sub_idx = rng.integers(0, len(subcats), spec.n_spus)
+        popularity = rng.lognormal(0.0, 1.0, spec.n_spus)  # Long-tailed SPU popularity
+        self.catalog = pd.DataFrame({
+            'spu_code': [f'{15 + i // 100000}T{i % 100000:05d}' for i in range(spec.n_spus)],
+            'big_class_name': [subcats[i][0] for i in sub_idx],
+            'sub_cate_name': [subcats[i][1] for i in sub_idx],
+            'season_name': rng.choice(SEASONS, spec.n_spus, p=SEASON_WEIGHTS),
+            'sex_name': rng.choice(SEXES, spec.n_spus),
+            'base_price': np.round(rng.uniform(29.0, 599.0, spec.n_spus), 0),
+            'fashion': rng.random(spec.n_spus) < 0.6,
+        })
+        # Shoes and accessories sit on the shoe/accessory wall; apparel front or back by fashion/basic
+        self.catalog.insert(5, 'display_location_name', np.where(
+            self.catalog['big_class_name'].isin(['鞋', '配饰']), '鞋配',
+            np.where(self.catalog['fashion'], '前台', '后台')))
+        self._weights = popularity / popularity.sum()
+        self._period_cache: Dict[str, pd.DataFrame] = {}
+
+    def _rng(self, label: str, salt: int = 0) -> np.random.Generator:
+        return np.random.default_rng([self.seed, int(label[:6]), ord(label[6]), salt])
+
+    def spu_sales(self, label: str) -> pd.DataFrame:
+        """Store x SPU sales for one period (the grain behind every Step 1 file)."""
+        if label in self._period_cache:
+            return self._period_cache[label]
+        rng = self._rng(label)
+        n_stores, per_store = self.spec.n_stores, min(self.spec.spus_per_store, self.spec.n_spus)
+        store_idx = np.repeat(np.arange(n_stores), per_store)
+        spu_idx = rng.choice(self.spec.n_spus, size=n_stores * per_store, p=self._weights)
+        pairs = pd.DataFrame({'store': store_idx, 'spu': spu_idx}).drop_duplicates()
+
+        stores = self.stores.iloc[pairs['store'].to_numpy()].reset_index(drop=True)
+        spus = self.catalog.iloc[pairs['spu'].to_numpy()].reset_index(drop=True)
+        quantity = rng.poisson(3.0 * stores['store_size'].to_numpy()) + 1
+        unit_price = np.round(spus['base_price'].to_numpy() * rng.uniform(0.6, 1.0, len(pairs)), 2)
+        frame = pd.concat([stores[['str_code', 'str_name']], spus.drop(columns=['base_price'])], axis=1)
+        frame['quantity'] = quantity.astype(float)
+        frame['unit_price'] = unit_price
+        frame['spu_sales_amt'] = np.round(quantity * unit_price, 2)
+        self._period_cache = {label: frame}  # Keep one period in memory at a time
+        return frame
+
+    def store_config(self, label: str) -> pd.DataFrame:
+        """store_config API records: one row per store x category display group with sty_sal_amt JSON."""
+        sales = self.spu_sales(label)
+        entries = '"' + sales['spu_code'] + '":' + sales['spu_sales_amt'].astype(str)
+        grouped = sales.assign(entry=entries).groupby(CONFIG_GROUP_COLS, sort=False)
+        config = grouped.agg(str_name=('str_name', 'first'), sal_amt=('spu_sales_amt', 'sum'),
+                             ext_sty_cnt_avg=('spu_code', 'size'), entries=('entry', ','.join)).reset_index()
+        config['sal_amt'] = config['sal_amt'].round(2)
+        config['sty_sal_amt'] = '{' + config.pop('entries') + '}'
+        config['target_sty_cnt_avg'] = np.round(config['ext_sty_cnt_avg'] * self._rng(label, 1).uniform(0.8, 1.2, len(config)), 2)
+        config['yyyy'] = int(label[:4])
+        config['mm'] = int(label[4:6])
+        config['mm_type'] = label[4:]
+        return config
+
+    def store_sales(self, label: str) -> pd.DataFrame:
+        """store_sales API records: per-store fashion/basic amounts and quantities with coordinates."""
+        sales = self.spu_sales(label)
+        qty = np.where(sales['fashion'], 'fashion', 'base')
+        totals = sales.assign(kind=qty).pivot_table(index='str_code', columns='kind',
+                                                    values=['spu_sales_amt', 'quantity'], aggfunc='sum', fill_value=0)
+        out = self.stores[['str_code', 'str_name', 'long_lat']].set_index('str_code')
+        for kind in ('base', 'fashion'):
+            out[f'{kind}_sal_amt'] = totals.get(('spu_sales_amt', kind), 0.0)
+            out[f'{kind}_sal_qty'] = totals.get(('quantity', kind), 0.0)
+        out = out.fillna({c: 0.0 for c in out.columns if c.endswith(('_amt', '_qty'))}).reset_index()
+        out['sal_amt_avg'] = np.round((out['base_sal_amt'] + out['fashion_sal_amt']) / 15.0, 2)
+        out['yyyy'] = int(label[:4])
+        out['mm'] = int(label[4:6])
+        out['mm_type'] = label[4:]
+        return out
+
+    def write_period(self, api_dir: str, label: str, output_dir: Optional[str] = None) -> Dict[str, int]:
+        """
+        Write the four Step 1 files for a period; returns row counts per file.
+
+        complete_category_sales / complete_spu_sales follow the columns Step 1
+        derives from the API records (store-level unit price for quantities).
+        """
+        config = self.store_config(label)
+        store_sales = self.store_sales(label)
+        spu = self.spu_sales(label)
+
+        unit_price = (store_sales['base_sal_amt'] + store_sales['fashion_sal_amt']) / \
+            (store_sales['base_sal_qty'] + store_sales['fashion_sal_qty']).replace(0, np.nan)
+        unit_price = pd.Series(unit_price.fillna(50.0).to_numpy(), index=store_sales['str_code'])
+        category = config[['str_code', 'str_name', 'big_class_name', 'sub_cate_name', 'sal_amt']] \
+            .rename(columns={'big_class_name': 'cate_name'})
+        category['store_unit_price'] = category['str_code'].map(unit_price)
+        category['estimated_quantity'] = category['sal_amt'] / category['store_unit_price']
+        category = category.merge(store_sales[['str_code', 'sal_amt_avg']], on='str_code', how='left')
+        spu_out = spu[['str_code', 'str_name', 'big_class_name', 'sub_cate_name', 'spu_code',
+                       'spu_sales_amt', 'quantity', 'unit_price']].rename(columns={'big_class_name': 'cate_name'})
+        spu_out['investment_per_unit'] = spu_out['unit_price']
+
+        files = {
+            f'store_config_{label}.csv': config,
+            f'store_sales_{label}.csv': store_sales,
+            f'complete_category_sales_{label}.csv': category,
+            f'complete_spu_sales_{label}.csv': spu_out,
+        }
+        for directory in filter(None, [api_dir, output_dir]):
+            os.makedirs(directory, exist_ok=True)
+            for name, frame in files.items():
+                frame.to_csv(os.path.join(directory, name), index=False)
+        return {name: len(frame) for name, frame in files.items()}
+
+    def write_store_codes(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.stores[['str_code', 'str_name']].to_csv(path, index=False)
+
+    def write_coordinates(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.stores[['str_code', 'longitude', 'latitude']].to_csv(path, index=False)
+
+    def write_weather(self, weather_dir: str, altitude_path: str, start_date: str, end_date: str) -> int:
+        """
+        Hourly Open-Meteo-shaped weather files per store (Step 4's naming) and the
+        altitude table, so Steps 4-5 find everything on disk. Returns hourly rows written.
+        """
+        os.makedirs(weather_dir, exist_ok=True)
+        period = f"{start_date.replace('-', '')}_to_{end_date.replace('-', '')}"
+        hours = pd.date_range(start_date, pd.Timestamp(end_date) + pd.Timedelta(hours=23), freq='h')
+        n_hours = len(hours)
+        rng = np.random.default_rng([self.seed, int(start_date.replace('-', ''))])
+        diurnal = 6.0 * np.sin((hours.hour.to_numpy() - 9) / 24.0 * 2 * np.pi)
+        time_col = hours.strftime('%Y-%m-%dT%H:%M')
+        for store in self.stores.itertuples(index=False):
+            base_temp = 30.0 - 0.6 * (store.latitude - 22.0)
+            frame = pd.DataFrame({'time': time_col})
+            values = rng.normal(0.0, 1.0, (n_hours, len(WEATHER_COLUMNS)))
+            frame['temperature_2m'] = np.round(base_temp + diurnal + 2.0 * values[:, 0], 1)
+            frame['relative_humidity_2m'] = np.clip(np.round(65 + 15 * values[:, 1]), 5, 100)
+            frame['wind_speed_10m'] = np.round(np.abs(3 + 2 * values[:, 2]), 1)
+            frame['wind_direction_10m'] = np.round(np.abs(values[:, 3]) * 120) % 360
+            frame['precipitation'] = np.round(np.clip(values[:, 4] - 1.0, 0, None), 1)
+            frame['rain'] = frame['precipitation']
+            frame['snowfall'] = 0.0
+            frame['cloud_cover'] = np.clip(np.round(50 + 30 * values[:, 7]), 0, 100)
+            frame['weather_code'] = np.where(frame['precipitation'] > 0, 61, 1)
+            frame['pressure_msl'] = np.round(1010 + 5 * values[:, 9], 1)
+            radiation = np.clip(np.sin((hours.hour.to_numpy() - 6) / 12.0 * np.pi), 0, None)
+            frame['direct_radiation'] = np.round(600 * radiation, 1)
+            frame['diffuse_radiation'] = np.round(150 * radiation, 1)
+            frame['direct_normal_irradiance'] = np.round(700 * radiation, 1)
+            frame['terrestrial_radiation'] = np.round(900 * radiation, 1)
+            frame['shortwave_radiation'] = np.round(750 * radiation, 1)
+            frame['et0_fao_evapotranspiration'] = np.round(0.3 * radiation, 2)
+            frame['store_code'] = store.str_code
+            frame['latitude'] = store.latitude
+            frame['longitude'] = store.longitude
+            name = f"weather_data_{store.str_code}_{store.longitude:.6f}_{store.latitude:.6f}_{period}.csv"
+            frame.to_csv(os.path.join(weather_dir, name), index=False)
+
+        os.makedirs(os.path.dirname(altitude_path) or '.', exist_ok=True)
+        pd.DataFrame({
+            'store_code': self.stores['str_code'],
+            'latitude': self.stores['latitude'],
+            'longitude': self.stores['longitude'],
+            'altitude_meters': np.round(rng.uniform(0, 1500, len(self.stores)), 1),
+        }).to_csv(altitude_path, index=False)
+        return n_hours * len(self.stores)
+
+
+def parse_sty_sal_amt(value: str) -> Dict[str, float]:
+    """Decode one sty_sal_amt payload the way Step 1 does."""
+    return json.loads(value) if isinstance(value, str) and value.strip() else {}
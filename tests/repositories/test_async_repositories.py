@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Tests for the async API repositories
+
+The async client keeps at most max_concurrency requests in flight, retries
+per its RetryPolicy, and never sends a request whose task was cancelled; the
+API download step and the weather download path give the same results as
+their sequential versions, in the same order. Weather retries happen once, at
+the store level, and a VPN prompt only comes after in-flight stores stopped.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+import requests
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+from repositories.async_http import AsyncHttpClient, BackoffPolicy, RetryPolicy
+from repositories.api_repository import AsyncFastFishApiRepository, FastFishApiRepository
+from repositories.weather_api_repository import AsyncWeatherApiRepository, WeatherApiRepository
+from repositories.weather_data_repository import PeriodInfo, WeatherDataConfig, WeatherDataRepository
+from steps.api_download_merge import ApiDownloadStep
+from core.logger import PipelineLogger
+
+NO_WAIT = RetryPolicy(max_attempts=3, backoff=BackoffPolicy(base=0, jitter=0))
+
+
+def _response(payload, status=200):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode('utf-8')
+    response.headers['Content-Type'] = 'application/json'
+    return response
+
+
+class FakeSession:
+    """Answers with respond(url, kwargs) after a short delay, tracking peak concurrency."""
+
+    def __init__(self, respond, latency=0.02):
+        self.respond = respond
+        self.latency = latency
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def post(self, url, **kwargs):
+        with self._lock:
+            self.calls.append((url, kwargs))
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            return self.respond(url, kwargs)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    get = post
+
+
+def test_client_limits_concurrency_and_retries():
+    attempts = {}
+
+    def respond(url, kwargs):
+        attempts[url] = attempts.get(url, 0) + 1
+        if url.endswith('/flaky') and attempts[url] == 1:
+            response = _response({'error': 'busy'}, status=503)
+            response.headers['Retry-After'] = '0'
+            return response
+        return _response({'url': url})
+
+    session = FakeSession(respond)
+    client = AsyncHttpClient(max_concurrency=3, retry=NO_WAIT, session=session)
+
+    async def run():
+        urls = [f'https://api/{i}' for i in range(9)] + ['https://api/flaky']
+        return await asyncio.gather(*(client.get(url) for url in urls))
+
+    responses = asyncio.run(run())
+    client.close()
+
+    assert [r.json()['url'] for r in responses][-1] == 'https://api/flaky'
+    assert all(r.status_code == 200 for r in responses)
+    assert session.peak <= 3 and client.retries == 1 and len(session.calls) == 11
+
+
+def test_retry_policy_from_repository_config():
+    policy = RetryPolicy.from_config({'total': 2, 'backoff_factor': 0.5, 'status_forcelist': [429]})
+    assert policy.max_attempts == 3 and policy.retry_statuses == (429,)
+    assert policy.should_retry_response(_response({}, status=429))
+    assert not policy.should_retry_response(_response({}, status=500))
+    assert BackoffPolicy(base=1, factor=2, max_delay=5, jitter=0).delay(4) == 5
+
+
+def test_cancelled_requests_are_never_sent():
+    release = threading.Event()
+    session = FakeSession(lambda url, kwargs: release.wait(5) and _response({}), latency=0)
+    client = AsyncHttpClient(max_concurrency=1, session=session)
+
+    async def run():
+        tasks = [asyncio.ensure_future(client.get(f'https://api/{i}')) for i in range(4)]
+        await asyncio.sleep(0.05)
+        for task in tasks:
+            task.cancel()
+        release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(run())
+    client.close()
+
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert len(session.calls) == 1  # Only the request already on the wire went out
+
+
+def _api_step(async_api_repo, batch_size=2):
+    return ApiDownloadStep(
+        store_codes_repo=Mock(), api_repo=Mock(spec=FastFishApiRepository), tracking_repo=Mock(),
+        config_output_repo=Mock(), sales_output_repo=Mock(), category_output_repo=Mock(),
+        spu_output_repo=Mock(), yyyymm='202407', period='A', batch_size=batch_size,
+        force_full_download=False, logger=PipelineLogger('AsyncTest'), step_name='API Download',
+        step_number=1, async_api_repo=async_api_repo
+    )
+
+
+def test_api_download_step_fetches_batches_concurrently():
+    def respond(url, kwargs):
+        kind = 'config' if url.endswith('config') else 'sales'
+        return _response({'data': [{'str_code': code, 'kind': kind} for code in kwargs['json']['strCodes']]})
+
+    session = FakeSession(respond)
+    client = AsyncHttpClient(max_concurrency=4, retry=NO_WAIT, session=session)
+    repo = AsyncFastFishApiRepository('https://api/config', 'https://api/sales', {}, 10,
+                                      PipelineLogger('AsyncTest'), client)
+    stores = [f'1100{i}' for i in range(7)]
+
+    config_list, sales_list = _api_step(repo)._download_api_data_in_batches(stores)
+    client.close()
+
+    assert [df['str_code'].tolist() for df in config_list] == [stores[0:2], stores[2:4], stores[4:6], stores[6:]]
+    assert pd.concat(sales_list)['kind'].eq('sales').all()
+    assert len(session.calls) == 8 and session.peak > 1
+    assert session.calls[0][1]['json'] == {'strCodes': stores[0:2], 'yyyymm': '202407', 'period': 'A'}
+
+
+def _weather_repo(session, weather_file_repo, max_concurrency=3):
+    logger = PipelineLogger('AsyncTest')
+    api_repo = WeatherApiRepository(logger)
+    client = AsyncHttpClient(max_concurrency=max_concurrency, retry=NO_WAIT, session=session)
+    return WeatherDataRepository(
+        coordinates_repo=Mock(), weather_api_repo=api_repo, weather_file_repo=weather_file_repo,
+        altitude_repo=Mock(), progress_repo=Mock(), logger=logger,
+        async_weather_api_repo=AsyncWeatherApiRepository(api_repo, client)
+    )
+
+
+def _period():
+    return PeriodInfo('202407A', '202407', 'A', '2024-07-01', '2024-07-15', '20240701_to_20240715')
+
+
+def _coords(n):
+    return pd.DataFrame({'str_code': [f'2000{i}' for i in range(n)],
+                         'latitude': [30.0 + i for i in range(n)], 'longitude': [120.0] * n})
+
+
+def test_weather_downloads_run_concurrently_and_keep_store_order():
+    def respond(url, kwargs):
+        hourly = {name: [kwargs['params']['latitude']] for name in WeatherApiRepository.HOURLY_VARIABLES}
+        hourly['time'] = ['2024-07-01T00:00']
+        return _response({'hourly': hourly})
+
+    session = FakeSession(respond)
+    weather_file_repo = Mock()
+    weather_file_repo.get_downloaded_stores_for_period.return_value = set()
+    repo = _weather_repo(session, weather_file_repo)
+    progress = {'completed_stores': [], 'failed_stores': [], 'vpn_switches': 0}
+    coords = _coords(6)
+
+    frames = repo._download_period_with_vpn_support(_period(), coords, progress, WeatherDataConfig())
+
+    assert [df['store_code'].iloc[0] for df in frames] == coords['str_code'].tolist()
+    assert [df['temperature_2m'].iloc[0] for df in frames] == coords['latitude'].tolist()
+    assert sorted(progress['completed_stores']) == coords['str_code'].tolist()
+    assert weather_file_repo.save_weather_file.call_count == 6
+    assert 1 < session.peak <= 3
+
+
+def test_aborted_weather_download_cancels_pending_stores(monkeypatch):
+    session = FakeSession(lambda url, kwargs: _response({'reason': 'bad request'}, status=400))
+    weather_file_repo = Mock()
+    weather_file_repo.get_downloaded_stores_for_period.return_value = set()
+    repo = _weather_repo(session, weather_file_repo, max_concurrency=1)
+    monkeypatch.setattr(repo, '_prompt_vpn_switch', lambda *args: False)
+    progress = {'completed_stores': [], 'failed_stores': [], 'vpn_switches': 0}
+    config = WeatherDataConfig(max_retries=1, enable_vpn_switching=True, vpn_switch_threshold=1)
+
+    frames = repo._download_period_with_vpn_support(_period(), _coords(8), progress, config)
+
+    assert frames == [] and progress['failed_stores'] == ['20000']
+    assert len(session.calls) < 8
+    weather_file_repo.save_weather_file.assert_not_called()
+
+
+def test_weather_client_leaves_retries_to_the_store_loop():
+    session = FakeSession(lambda url, kwargs: _response({'reason': 'rate limited'}, status=429), latency=0)
+    logger = PipelineLogger('AsyncTest')
+    api_repo = WeatherApiRepository(logger)
+    async_repo = AsyncWeatherApiRepository.from_repository(api_repo)
+    async_repo.client._session = session
+    repo = WeatherDataRepository(
+        coordinates_repo=Mock(), weather_api_repo=api_repo, weather_file_repo=Mock(),
+        altitude_repo=Mock(), progress_repo=Mock(), logger=logger, async_weather_api_repo=async_repo
+    )
+    repo._get_rate_limit_backoff = lambda *args: 0
+
+    result = asyncio.run(repo._download_weather_for_store_async('20000', 30.0, 120.0, _period(),
+                                                                WeatherDataConfig(max_retries=2, min_delay=0, max_delay=0)))
+
+    assert result == ('20000', None)
+    assert len(session.calls) == 2  # One request per store-level attempt
+
+
+def test_vpn_prompt_waits_for_in_flight_downloads_to_stop(monkeypatch):
+    def respond(url, kwargs):
+        if kwargs['params']['latitude'] == 30.0:
+            return _response({'reason': 'blocked'}, status=400)
+        hourly = {name: [kwargs['params']['latitude']] for name in WeatherApiRepository.HOURLY_VARIABLES}
+        hourly['time'] = ['2024-07-01T00:00']
+        return _response({'hourly': hourly})
+
+    weather_file_repo = Mock()
+    weather_file_repo.get_downloaded_stores_for_period.return_value = set()
+    repo = _weather_repo(FakeSession(respond), weather_file_repo, max_concurrency=2)
+    running_at_prompt = []
+    monkeypatch.setattr(repo, '_prompt_vpn_switch', lambda *args: running_at_prompt.append(len(asyncio.all_tasks())) or True)
+    progress = {'completed_stores': [], 'failed_stores': [], 'vpn_switches': 0}
+    config = WeatherDataConfig(max_retries=1, enable_vpn_switching=True, vpn_switch_threshold=1)
+    coords = _coords(6)
+
+    frames = repo._download_period_with_vpn_support(_period(), coords, progress, config)
+
+    assert running_at_prompt == [1]  # Only the coordinating task itself
+    assert [df['store_code'].iloc[0] for df in frames] == coords['str_code'].tolist()[1:]
+    assert progress['failed_stores'] == ['20000'] and progress['vpn_switches'] == 1
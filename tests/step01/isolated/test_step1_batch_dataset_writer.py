@@ -0,0 +1,116 @@
+"""
+Step 1 Batch Dataset Writer Test (Isolated Synthetic)
+=====================================================
+
+The streaming final save must produce the same files as concatenating every
+batch in memory and deduplicating: exact-row dedup for config/sales/category,
+first row per store-SPU for SPU sales, union of columns with concat's dtype
+upcasting. The output/ copy is a link, and an interrupted spool can be
+recovered.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.step1_download_api_data as step1
+from src.batch_dataset_writer import BatchDatasetWriter
+
+
+def _spu_batches(seed=0, batches=12, n=200):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for b in range(batches):
+        df = pd.DataFrame({
+            'str_code': rng.choice([f'1{s:04d}' for s in range(30)], n),
+            'spu_code': rng.choice([f'15T{i:03d}' for i in range(40)], n),
+            'spu_sales_amt': np.round(rng.gamma(2, 300, n), 2),
+            'quantity': rng.integers(1, 30, n),
+        })
+        if b % 3 == 1:
+            df['quantity'] = df['quantity'].astype(float)  # Upcast in the concat
+        if b % 4 == 2:
+            df['display_location_name'] = 'front'  # Column absent from other batches
+        if b > 0:
+            df = pd.concat([df, frames[-1].head(5)], ignore_index=True)  # Re-downloaded rows
+        frames.append(df)
+    return frames
+
+
+@pytest.mark.parametrize('subset', [None, ['str_code', 'spu_code']])
+def test_streamed_csv_matches_in_memory_concat(tmp_path, subset):
+    frames = _spu_batches()
+    writer = BatchDatasetWriter(str(tmp_path / 'spool'), subset=subset)
+    for df in frames:
+        writer.append(df)
+
+    result = writer.finalize(str(tmp_path / 'streamed.csv'))
+
+    combined = pd.concat(frames, ignore_index=True)
+    expected = combined.drop_duplicates(subset=subset)
+    expected.to_csv(tmp_path / 'legacy.csv', index=False)
+    assert (tmp_path / 'streamed.csv').read_bytes() == (tmp_path / 'legacy.csv').read_bytes()
+    assert result['rows'] == len(expected)
+    assert result['duplicates_removed'] == len(combined) - len(expected)
+    assert result['stores'] == expected['str_code'].nunique()
+    assert not (tmp_path / 'spool').exists()
+
+
+def test_save_final_results_writes_once_and_links_output(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(step1, 'OUTPUT_DIR', 'data/api_data')
+    monkeypatch.setattr(step1, 'SAVE_MODE', 'streaming')
+    monkeypatch.setattr(step1, 'log_progress', lambda *args, **kwargs: None)
+    frames = _spu_batches(batches=4)
+    config = [pd.DataFrame({'str_code': ['10001', '10002'], 'season_name': ['夏', '夏']})] * 2
+
+    step1.save_final_results(config, [], [], frames, '202508A')
+
+    api_spu = tmp_path / 'data/api_data/complete_spu_sales_202508A.csv'
+    out_spu = tmp_path / 'output/complete_spu_sales_202508A.csv'
+    assert os.path.samefile(api_spu, out_spu)
+    spu = pd.read_csv(out_spu, dtype={'str_code': str})
+    assert not spu.duplicated(subset=['str_code', 'spu_code']).any()
+    assert len(pd.read_csv(tmp_path / 'output/store_config_202508A.csv')) == 2
+    assert not (tmp_path / 'data/api_data/store_sales_202508A.csv').exists()
+    assert not (tmp_path / 'data/api_data' / step1.SPOOL_DIRNAME).exists()
+
+
+def test_recover_finalizes_interrupted_spool(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(step1, 'OUTPUT_DIR', 'data/api_data')
+    monkeypatch.setattr(step1, 'log_progress', lambda *args, **kwargs: None)
+    frames = _spu_batches(batches=3)
+    writers = step1.open_dataset_writers('202508A')
+    with step1.open_download_journal() as journal:
+        for df in frames[:2]:
+            marks = step1.spool_marks(writers)
+            writers['spu'].append(df)
+            journal.record_batch('202508A', [], {}, [], parts=step1.spool_parts_since(writers, marks))
+    writers['spu'].append(frames[2])  # Run dies before the batch commits
+
+    assert step1.recover_from_partial_files('202508A')
+
+    spu = pd.read_csv('output/complete_spu_sales_202508A.csv', dtype={'str_code': str})
+    expected = pd.concat(frames[:2]).drop_duplicates(subset=['str_code', 'spu_code'])
+    assert len(spu) == len(expected)
+    with step1.open_download_journal() as journal:
+        assert journal.committed_parts('202508A') == []
+
+
+def test_streamed_dtypes_follow_every_row_not_first_rows(tmp_path):
+    frames = [
+        pd.DataFrame({'str_code': ['10001', '10002'], 'quantity': [1, 2], 'flag': [True, False]}),
+        pd.DataFrame({'str_code': ['10003', '10004'], 'quantity': [3, np.nan], 'flag': [True, True]}),
+        pd.DataFrame({'str_code': ['10005', '10006'], 'quantity': [5.5, 6.0]}),
+    ]
+    writer = BatchDatasetWriter(str(tmp_path / 'spool'))
+    for df in frames:
+        writer.append(df)
+
+    writer.finalize(str(tmp_path / 'streamed.csv'))
+
+    pd.concat(frames, ignore_index=True).drop_duplicates().to_csv(tmp_path / 'legacy.csv', index=False)
+    assert (tmp_path / 'streamed.csv').read_bytes() == (tmp_path / 'legacy.csv').read_bytes()
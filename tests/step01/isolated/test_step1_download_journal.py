@@ -0,0 +1,108 @@
+"""
+Step 1 Download Journal Test (Isolated Synthetic)
+=================================================
+
+Per-store download state lives in a SQLite journal (WAL mode): a store is
+complete once config, sales and merged output all came back, every batch
+commits together with its spool parts, and a run interrupted mid-period
+resumes without re-downloading completed stores. The processed/failed text
+lists of earlier versions are imported once.
+"""
+
+import pandas as pd
+import pytest
+
+import src.step1_download_api_data as step1
+from src.download_journal import DownloadJournal
+
+
+def _config(stores):
+    return pd.DataFrame({'str_code': stores, 'season_name': ['夏'] * len(stores)})
+
+
+class _ConnectionLost(Exception):
+    pass
+
+
+def _sales(stores):
+    return pd.DataFrame({'str_code': stores, 'base_sal_amt': [100.0] * len(stores)})
+
+
+def test_record_batch_tracks_endpoints_and_attempts(tmp_path):
+    with DownloadJournal(str(tmp_path / 'journal.sqlite')) as journal:
+        assert journal._conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        spu = pd.DataFrame({'str_code': ['1', '1', '2'], 'spu_code': ['a', 'b', 'a']})
+        journal.record_batch('202508A', ['1', '2', '3'], {'config': _config(['1', '2', '3']), 'sales': _sales(['1', '2'])},
+                             ['1', '2'], parts=['complete_spu_sales/part-00000.pkl'], output_frames=[spu])
+
+        assert journal.completed_stores('202508A') == {'1', '2'}
+        assert journal.completed_stores('202508A', include_unfinalized=False) == set()
+        assert journal.failed_stores('202508A') == {'3'}
+        assert journal.committed_parts('202508A') == ['complete_spu_sales/part-00000.pkl']
+        rows, checksum = journal._conn.execute(
+            "SELECT rows, checksum FROM downloads WHERE str_code = '1' AND endpoint = 'output'").fetchone()
+        assert rows == 2 and len(checksum) == 64
+
+        journal.record_batch('202508A', ['3'], {'config': _config(['3']), 'sales': _sales(['3'])}, ['3'])
+        journal.mark_finalized('202508A')
+
+        assert journal.completed_stores('202508A', include_unfinalized=False) == {'1', '2', '3'}
+        assert journal.committed_parts('202508A') == []
+        assert journal._conn.execute(
+            "SELECT MAX(attempts) FROM downloads WHERE str_code = '3'").fetchone()[0] == 2
+
+
+def test_legacy_store_lists_are_imported_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(step1, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(step1, 'log_progress', lambda *args, **kwargs: None)
+    (tmp_path / 'processed_stores_202508A.txt').write_text('1\n2\n')
+    (tmp_path / 'failed_stores_202508A.txt').write_text('3\n')
+
+    with step1.open_download_journal() as journal:
+        step1.import_legacy_store_lists(journal, '202508A')
+        step1.import_legacy_store_lists(journal, '202508A')
+        assert journal.finalized_stores('202508A') == {'1', '2'}
+        assert journal.failed_stores('202508A') == {'3'}
+        assert journal.summary('202508A') == {e: {'done': 2, 'missing': 1} for e in ('config', 'output', 'sales')}
+
+
+def test_interrupted_run_resumes_without_redownloading(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(step1, 'OUTPUT_DIR', 'data/api_data')
+    monkeypatch.setattr(step1, 'SAVE_MODE', 'streaming')
+    monkeypatch.setattr(step1, 'log_progress', lambda *args, **kwargs: None)
+    monkeypatch.setattr(step1.time, 'sleep', lambda seconds: None)
+    stores = [f'1{s:04d}' for s in range(6)]
+    requested = []
+    connection = {'lost': False}
+
+    def fetch_config(batch, yyyymm, period):
+        requested.extend(batch)
+        if '10004' in batch and not connection['lost']:
+            connection['lost'] = True
+            raise _ConnectionLost  # First run dies during the third batch
+        return _config(batch), list(batch)
+
+    def merge(sales_df, config_df):
+        spu = pd.DataFrame({'str_code': sales_df['str_code'], 'spu_code': 'a', 'spu_sales_amt': 1.0})
+        category = spu.rename(columns={'spu_code': 'sub_cate_name'})
+        return category, spu, sales_df['str_code'].tolist()
+
+    monkeypatch.setattr(step1, 'fetch_store_config', fetch_config)
+    monkeypatch.setattr(step1, 'fetch_store_sales', lambda batch, yyyymm, period: (_sales(batch), list(batch)))
+    monkeypatch.setattr(step1, 'process_and_merge_data', merge)
+
+    with pytest.raises(_ConnectionLost):
+        step1.process_stores_in_batches(stores, '202508', 'A', batch_size=2)
+    assert requested == stores
+
+    requested.clear()
+    is_complete, completion_rate, missing = step1.process_stores_in_batches(stores, '202508', 'A', batch_size=2)
+
+    assert requested == stores[4:]
+    assert is_complete and missing == 0
+    spu = pd.read_csv('output/complete_spu_sales_202508A.csv', dtype={'str_code': str})
+    assert spu['str_code'].tolist() == stores
+    with step1.open_download_journal() as journal:
+        assert journal.finalized_stores('202508A') == set(stores)
+        assert journal.committed_parts('202508A') == []
@@ -0,0 +1,105 @@
+"""
+Step 3 Artifact Dtypes Test (Isolated Synthetic)
+================================================
+
+Covers the artifact dtype registry used by Step 3's multi-period loads:
+compact dtypes per artifact, category-preserving concatenation, the shared
+loader's memory report, and that compacted frames aggregate exactly like the
+legacy object/float64 frames.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+import src.artifact_dtypes as dtypes
+import src.multi_period_reader as mpr
+
+DIMENSIONS = ['str_name', 'cate_name', 'sub_cate_name']
+
+
+def _spu_sales(path, seed, n=300):
+    rng = np.random.default_rng(seed)
+    stores = rng.integers(11000, 11030, n)
+    pd.DataFrame({
+        'str_code': stores,
+        'str_name': [f'门店{s}' for s in stores],
+        'cate_name': rng.choice(['T恤', '裤', '外套'], n),
+        'sub_cate_name': rng.choice(['休闲圆领T恤', '直筒裤', '风衣', f'新品{seed}'], n),
+        'spu_code': rng.choice(['15T001', '15T002', '0150'], n),
+        'spu_sales_amt': np.round(rng.gamma(2, 300, n), 2),
+        'quantity': rng.integers(1, 40, n).astype(float),
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def test_registry_matches_files_and_compacts_columns():
+    assert dtypes.artifact_for_path('data/api_data/complete_spu_sales_202508A.csv') == 'complete_spu_sales'
+    assert dtypes.artifact_for_path('output/rule12_sales_performance_spu_results_202508A.csv') == 'rule_results'
+    assert dtypes.artifact_for_path('output/clustering_results_spu.csv') is None
+
+    df = pd.DataFrame({'str_code': ['1', '2'], 'season_name': ['夏', '夏'], 'ext_sty_cnt_avg': [1.5, 2.0],
+                       'yyyy': [2025, 2025], 'mm': [8.5, 8.0], 'sal_amt': [10.01, 20.02]})
+    dtypes.compact_dtypes(df, 'store_config')
+
+    assert df.dtypes.astype(str).to_dict() == {
+        'str_code': 'object', 'season_name': 'category', 'ext_sty_cnt_avg': 'float32',
+        'yyyy': 'Int16', 'mm': 'float64', 'sal_amt': 'float64'}  # Fractional mm is left alone
+
+
+def test_read_artifact_keeps_key_text_and_reports_savings(tmp_path, monkeypatch):
+    path = _spu_sales(tmp_path / 'complete_spu_sales_202508A.csv', 0)
+    report = dtypes.DtypeMemoryReport()
+    monkeypatch.setattr(dtypes, 'get_memory_report', lambda: report)
+
+    df = dtypes.read_artifact(path)
+
+    assert set(df['spu_code']) <= {'15T001', '15T002', '0150'}  # '0150' not parsed as 150
+    assert all(isinstance(df[c].dtype, pd.CategoricalDtype) for c in DIMENSIONS)
+    assert df['quantity'].dtype == np.float32
+    out = report.write(step='step3_prepare_matrix', path=str(tmp_path / 'report.json'))
+    entry = json.loads(open(out).read())['step3_prepare_matrix']
+    assert entry['artifacts']['complete_spu_sales']['rows'] == 300
+    assert entry['compact_mb'] < entry['legacy_mb']
+
+
+def test_concat_keeps_categories_across_periods(tmp_path):
+    frames = [dtypes.read_artifact(_spu_sales(tmp_path / f'complete_spu_sales_20250{i}A.csv', i))
+              for i in range(1, 4)]
+
+    combined = dtypes.concat_artifact_frames(frames, ignore_index=True)
+
+    assert all(isinstance(combined[c].dtype, pd.CategoricalDtype) for c in DIMENSIONS)
+    plain = pd.concat([f.astype({c: object for c in DIMENSIONS}) for f in frames], ignore_index=True)
+    pd.testing.assert_frame_equal(combined.astype({c: object for c in DIMENSIONS}), plain)
+
+
+def test_compact_multi_period_load_aggregates_like_legacy(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for i, label in enumerate(['202507A', '202507B', '202508A']):
+        _spu_sales(tmp_path / f'complete_spu_sales_{label}.csv', i)
+    labels, templates = ['202507A', '202507B', '202508A'], ['complete_spu_sales_{period_label}.csv']
+    keys = ['str_code', 'str_name', 'cate_name', 'sub_cate_name', 'spu_code']
+
+    compact = mpr.MultiPeriodReader().load(labels, templates, dtype={'str_code': str, 'spu_code': str},
+                                           artifact='complete_spu_sales')
+    legacy = mpr.MultiPeriodReader().load(labels, templates, dtype={'str_code': str, 'spu_code': str})
+
+    assert isinstance(compact['sub_cate_name'].dtype, pd.CategoricalDtype)
+    got = compact.groupby(keys, observed=True).agg({'spu_sales_amt': 'sum', 'quantity': 'sum'}).reset_index()
+    want = legacy.groupby(keys).agg({'spu_sales_amt': 'sum', 'quantity': 'sum'}).reset_index()
+    pd.testing.assert_frame_equal(got.astype({c: object for c in keys}), want, check_dtype=False)
+
+
+def test_parquet_and_csv_keys_round_trip_the_same(tmp_path):
+    frame = pd.DataFrame({'str_code': ['0011', None, '12'], 'spu_code': ['0150', '15T001', np.nan],
+                          'quantity': [1.0, 2.0, 3.0]})
+    frame.to_csv(tmp_path / 'complete_spu_sales_202508A.csv', index=False)
+    frame.to_parquet(tmp_path / 'complete_spu_sales_202508A.parquet', index=False)
+
+    from_csv = dtypes.read_artifact(str(tmp_path / 'complete_spu_sales_202508A.csv'))
+    from_parquet = dtypes.read_artifact(str(tmp_path / 'complete_spu_sales_202508A.parquet'))
+
+    pd.testing.assert_frame_equal(from_parquet, from_csv)
+    assert from_parquet['str_code'].isna().tolist() == [False, True, False]
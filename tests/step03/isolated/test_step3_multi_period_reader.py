@@ -0,0 +1,130 @@
+"""
+Step 3 Multi-Period Reader Test (Isolated Synthetic)
+====================================================
+
+Covers the shared year-over-year period reader behind Steps 2 and 3: first
+readable candidate per period (with fall-through on unreadable files), column
+projection and dtype maps, and the per-run memo that lets a second scan of the
+same window skip re-parsing.
+"""
+
+import numpy as np
+import pandas as pd
+
+import src.multi_period_reader as mpr
+
+TEMPLATES = ['api/sales_{period_label}.csv', 'out/sales_{period_label}.csv']
+
+
+def _write(path, seed, n=50):
+    rng = np.random.default_rng(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({
+        'str_code': rng.integers(11000, 11020, n),
+        'spu_code': rng.choice(['A', 'B', 'C'], n),
+        'long_lat': np.where(rng.random(n) < 0.7, '120.1,30.2', ''),
+        'spu_sales_amt': np.round(rng.gamma(2, 50, n), 2),
+    }).to_csv(path, index=False)
+
+
+def test_first_readable_candidate_per_period_matches_pandas(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _write(tmp_path / 'api/sales_202501A.csv', 0)
+    _write(tmp_path / 'out/sales_202501A.csv', 1)
+    (tmp_path / 'api/sales_202501B.csv').write_text('a,b\n1,2,3,4\n"')
+    _write(tmp_path / 'out/sales_202501B.csv', 2)
+    errors = []
+
+    found = mpr.MultiPeriodReader(max_workers=4).read_periods(
+        ['202501A', '202501B', '202502A'], TEMPLATES, on_error=lambda path, e: errors.append(path))
+
+    assert {label: path for label, (path, _) in found.items()} == {
+        '202501A': 'api/sales_202501A.csv', '202501B': 'out/sales_202501B.csv'}
+    assert errors == ['api/sales_202501B.csv']
+    for path, frame in found.values():
+        pd.testing.assert_frame_equal(frame, pd.read_csv(path, low_memory=False))
+
+
+def test_projection_dtypes_and_concatenated_load(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _write(tmp_path / 'api/sales_202501A.csv', 0)
+    _write(tmp_path / 'out/sales_202501B.csv', 1)
+
+    combined = mpr.MultiPeriodReader().load(['202501A', '202501B'], TEMPLATES,
+                                            columns=['str_code', 'long_lat', 'missing'], dtype={'str_code': str})
+
+    assert list(combined.columns) == ['str_code', 'long_lat', 'period']
+    assert combined['str_code'].map(type).eq(str).all()
+    assert combined['period'].value_counts().to_dict() == {'202501A': 50, '202501B': 50}
+    assert combined['long_lat'].isna().any() and not combined['long_lat'].map(lambda v: v is None).any()
+
+
+def test_memo_skips_reparse_and_returns_copies(tmp_path, monkeypatch):
+    path = tmp_path / 'sales.csv'
+    _write(path, 0)
+    reader = mpr.MultiPeriodReader()
+    decodes = []
+    decode = reader._decode
+    monkeypatch.setattr(reader, '_decode', lambda *args: decodes.append(args[0]) or decode(*args))
+
+    first = reader.read_files([str(path)])[str(path)]
+    first['period'] = 'x'
+    second = reader.read_files([str(path)])[str(path)]
+
+    assert decodes == [str(path)]
+    assert 'period' not in second.columns
+
+    _write(path, 1, n=60)  # changed on disk -> re-read
+    assert len(reader.read_files([str(path)])[str(path)]) == 60
+    assert len(decodes) == 2
+
+
+def test_memo_is_lru_bounded_in_bytes(tmp_path, monkeypatch):
+    paths = []
+    for i in range(3):
+        paths.append(str(tmp_path / f'sales_{i}.csv'))
+        _write(tmp_path / f'sales_{i}.csv', i)
+    size = int(pd.read_csv(paths[0]).memory_usage(deep=True).sum())
+    reader = mpr.MultiPeriodReader(max_workers=1, memo_max_bytes=int(size * 2.5))
+    decodes = []
+    decode = reader._decode
+    monkeypatch.setattr(reader, '_decode', lambda *args: decodes.append(args[0]) or decode(*args))
+
+    reader.read_files(paths[:2])
+    reader.read_files(paths[:1])          # Touch 0, so 1 is the least recently used
+    reader.read_files(paths[2:])          # Over budget: evicts 1
+    reader.read_files(paths)
+
+    assert decodes == paths + [paths[1]]
+    assert reader.memo_bytes <= reader.memo_max_bytes
+
+    tiny = mpr.MultiPeriodReader(memo_max_bytes=size // 2)
+    assert len(tiny.read_files(paths[:1])[paths[0]]) == 50
+    assert tiny.memo_bytes == 0           # Larger than the whole budget: returned, not kept
+
+
+def test_engines_agree_with_and_without_a_full_dtype_map(tmp_path, monkeypatch):
+    path = tmp_path / 'store_sales.csv'
+    pd.DataFrame({
+        'str_code': ['0011', '0012', '0013'],
+        'sale_date': ['2025-01-01', '2025-01-02', '2025-01-03'],
+        'qty': [1, 2, 3],
+        'amt': [1.5, None, 3.0],
+    }).to_csv(path, index=False)
+    path = str(path)
+    reader = mpr.MultiPeriodReader(engine='pyarrow')
+    arrow_reads = []
+    read_csv = mpr.pa_csv.read_csv
+    monkeypatch.setattr(mpr.pa_csv, 'read_csv', lambda *args, **kwargs: arrow_reads.append(args[0]) or
+                        read_csv(*args, **kwargs))
+
+    pd.testing.assert_frame_equal(reader.read_files([path])[path], pd.read_csv(path, low_memory=False))
+    partial = {'str_code': str}
+    pd.testing.assert_frame_equal(reader.read_files([path], dtype=partial)[path],
+                                  pd.read_csv(path, dtype=partial, low_memory=False))
+    assert arrow_reads == []  # Partial or no dtype map: the C parser decodes
+
+    full = {'str_code': str, 'sale_date': str, 'qty': 'int64', 'amt': 'float32'}
+    pd.testing.assert_frame_equal(reader.read_files([path], dtype=full)[path],
+                                  pd.read_csv(path, dtype=full, low_memory=False))
+    assert arrow_reads == [path]
@@ -63,6 +63,7 @@ def synthetic_workspace(tmp_path):
         "output_utils.py",
         "sellthrough_validator.py",
         "pipeline_manifest.py",
+        "rolling_aggregates.py",
     ]
     
     for src_file in src_files:
@@ -0,0 +1,81 @@
+"""
+Step 8 Vectorized Paths Test (Isolated Synthetic)
+==================================================
+
+Covers the column-wise category key, recommendation text and sell-through
+validation used in place of the former per-row loops.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.step8_imbalanced_rule as step8
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(step8, 'log_progress', lambda *args, **kwargs: None)
+
+
+def test_build_category_key_joins_columns():
+    df = pd.DataFrame({'a': ['x', 'y'], 'b': [1, 2], 'c': ['p', None]})
+    assert step8._build_category_key(df, ['a', 'b', 'c']).tolist() == ['x|1|p', 'y|2|None']
+
+
+def test_recommendation_text_matches_row_format(monkeypatch):
+    monkeypatch.setattr(step8, 'REDISTRIBUTION_STRATEGY', 'increase_only')
+    cases = pd.DataFrame({
+        'recommend_rebalancing': [True, True, False, True],
+        'recommended_quantity_change': [6, -3, 4, 2],
+        'current_quantity_15days': [12.0, 9.0, 5.0, 3.25],
+        'unit_price': [45.2, 10.0, 10.0, np.nan],
+    })
+
+    text = step8._rebalancing_recommendation_text(cases)
+
+    assert text.tolist() == [
+        "INCREASE 6 UNITS/15-DAYS to 18.0 (current: 12.0) @ ~$45/unit",
+        "No rebalancing needed (increase-only mode)",
+        "No rebalancing needed (below minimum threshold)",
+        "INCREASE 2 UNITS/15-DAYS to 5.2 (current: 3.2)",
+    ]
+
+    monkeypatch.setattr(step8, 'REDISTRIBUTION_STRATEGY', 'full')
+    assert step8._rebalancing_recommendation_text(cases).iloc[1] == \
+        "REDUCE 3 UNITS/15-DAYS to 6.0 (current: 9.0) @ ~$10/unit"
+
+
+def test_validation_keeps_only_compliant_cases(monkeypatch):
+    rng = np.random.default_rng(5)
+    n = 2000
+    history = pd.DataFrame({
+        'str_code': rng.integers(1, 30, n).astype(str),
+        'sub_cate_name': rng.choice(['A', 'B'], n),
+        'spu_code': rng.integers(1, 40, n).astype(str),
+        'quantity': rng.integers(-1, 4, n),
+    })
+    monkeypatch.setattr(step8, 'SELLTHROUGH_VALIDATION_AVAILABLE', True)
+    monkeypatch.setattr(step8, 'REDISTRIBUTION_STRATEGY', 'full')
+    monkeypatch.setattr(step8, 'load_historical_data_for_validation', lambda: history)
+
+    m = 400
+    z_scores = pd.DataFrame({
+        'str_code': rng.integers(1, 30, m).astype(str),
+        'Cluster': rng.integers(0, 3, m),
+        'category_key': rng.choice(['k1', 'k2'], m),
+        'sub_cate_name': rng.choice(['A', 'B', None], m),
+        'allocation_value': rng.gamma(2, 10, m),
+        'cluster_mean': rng.gamma(2, 10, m),
+        'z_score': rng.normal(0, 3, m),
+        'current_quantity': rng.gamma(2, 10, m),
+        'current_sales_value': rng.gamma(2, 300, m),
+    })
+
+    cases = step8.identify_imbalanced_cases(z_scores)
+
+    assert len(cases) > 0
+    assert cases['fast_fish_compliant'].all()
+    assert cases['sub_cate_name'].notna().all()
+    assert cases['recommend_rebalancing'].all()
+    assert cases['sell_through_improvement'].is_monotonic_decreasing
@@ -0,0 +1,71 @@
+"""
+Step 9 Seasonal Store Test (Isolated Synthetic)
+===============================================
+
+Step 9's multi-year seasonal store_config reads go through the rolling frame
+store: each prior-year file is read and projected to the config blend columns
+once, later runs load the projection, and the blend is unchanged.
+"""
+
+import pandas as pd
+import pytest
+
+import src.rolling_aggregates as rolling
+import src.step9_below_minimum_rule as step9
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(step9, 'log_progress', lambda *args, **kwargs: None)
+
+
+def _store_config(tmp_path, label, amounts):
+    df = pd.DataFrame({
+        'str_code': ['001', '002', '003'],
+        'season_name': ['夏', '夏', '秋'],
+        'sex_name': ['男', '女', '男'],
+        'display_location_name': ['前台', '后场', '前台'],
+        'big_class_name': ['T恤', '裤', 'T恤'],
+        'sub_cate_name': ['短T', '长裤', '短T'],
+        'sty_sal_amt': [str({'A': a, 'B': a / 2}) for a in amounts],
+        'unused_wide_column': ['x' * 50] * 3,
+    })
+    path = tmp_path / f'store_config_{label}.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_seasonal_configs_are_read_once_and_blend_unchanged(tmp_path, monkeypatch, rolling_aggregate_cache_dir):
+    sources = [('202408A', _store_config(tmp_path, '202408A', [10, 20, 30])),
+               ('202308A', _store_config(tmp_path, '202308A', [1, 2, 3])),
+               ('202208A', str(tmp_path / 'missing.csv'))]
+    recent = pd.read_csv(_store_config(tmp_path, '202508A', [5, 6, 7]), dtype={'str_code': str})
+
+    frames, labels = step9.load_seasonal_config_frames(sources)
+
+    assert labels == ['202408A', '202308A']
+    assert list(frames[0].columns) == step9.CONFIG_BLEND_KEYS + step9.CONFIG_BLEND_VALUES
+    assert len(list((rolling_aggregate_cache_dir / 'step9_seasonal_config').glob('*.pkl'))) == 2
+    full = pd.read_csv(sources[0][1], dtype={'str_code': str})
+    pd.testing.assert_frame_equal(
+        step9.blend_seasonal_data(recent, frames[0], 0.4, 0.3, 'config'),
+        step9.blend_seasonal_data(recent, full, 0.4, 0.3, 'config'),
+    )
+
+    # A later run loads the projections from the store instead of re-reading the files
+    monkeypatch.setattr(pd, 'read_csv', lambda *args, **kwargs: pytest.fail('seasonal config re-read'))
+    again, again_labels = step9.load_seasonal_config_frames(sources)
+    assert again_labels == labels
+    for cached, first in zip(again, frames):
+        pd.testing.assert_frame_equal(cached, first)
+
+
+def test_store_writes_under_configured_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('ROLLING_AGGREGATE_CACHE_DIR', str(tmp_path / 'cache'))
+    store = rolling.RollingFrameStore('frames', keys=['str_code'], values=['sty_sal_amt'])
+    path = _store_config(tmp_path, '202408A', [1, 2, 3])
+
+    assert store.window([path]) is None
+    assert len(store.frames([path])[0]) == 3
+    assert len(list((tmp_path / 'cache' / 'frames').glob('*.pkl'))) == 1
+    assert list(store.window([path, path]).columns) == ['str_code', 'sty_sal_amt']
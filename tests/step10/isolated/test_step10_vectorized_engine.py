@@ -0,0 +1,94 @@
+"""
+Step 10 Vectorized Overcapacity Engine Test (Isolated Synthetic)
+
+Covers the exploded SPU table built from the sty_sal_amt JSON, the cluster-sharded
+process-pool expansion and the rank-based per-store cap.
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.step10_spu_assortment_optimization as step10
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(step10, 'log_progress', lambda *args, **kwargs: None)
+
+
+def _config_rows():
+    return pd.DataFrame({
+        'str_code': ['1001', '1002', '1003', '1004', '1005'],
+        'Cluster': [0, 0, 1, 1, 2],
+        'sub_cate_name': ['T恤', 'T恤', '裤子', '裤子', '鞋'],
+        'sty_sal_amt': [
+            json.dumps({'A': 30, 'B': 10, 'C': 0}),
+            json.dumps({'A': 50}),            # not over capacity
+            json.dumps({'D': 5, 'E': 5}),     # below MIN_SALES_VOLUME
+            'not json',
+            json.dumps({'F': '25.5', 'G': -3}),
+        ],
+        'ext_sty_cnt_avg': [6.0, 2.0, 8.0, 8.0, 5.0],
+        'target_sty_cnt_avg': [4.0, 3.0, 2.0, 2.0, 0.5],
+    })
+
+
+def test_expand_explodes_json_into_spu_rows():
+    expanded = step10.fast_expand_spu_data(_config_rows(), pd.DataFrame())
+
+    assert expanded[['str_code', 'spu_code']].values.tolist() == [['1001', 'A'], ['1001', 'B'], ['1005', 'F']]
+    assert expanded['Cluster'].tolist() == [0, 0, 2]
+    assert expanded['category_total_sales'].tolist() == [40.0, 40.0, 25.5]
+    assert expanded['spu_sales_share'].tolist() == pytest.approx([0.75, 0.25, 1.0])
+    # Target below 1 is floored to 1 for the percentage
+    assert expanded['category_overcapacity_percentage'].tolist() == pytest.approx([50.0, 50.0, 450.0])
+
+
+def test_missing_count_columns_skip_records_instead_of_raising():
+    rows = _config_rows().drop(columns=['target_sty_cnt_avg'])
+
+    assert step10.fast_expand_spu_data(rows, pd.DataFrame()).empty
+
+
+def test_sharded_expansion_matches_single_process(monkeypatch):
+    rows = pd.concat([_config_rows()] * 20, ignore_index=True)
+    single = step10.fast_expand_spu_data(rows, pd.DataFrame())
+
+    monkeypatch.setattr(step10, 'EXPAND_WORKERS', 2)
+    monkeypatch.setattr(step10, 'PARALLEL_MIN_RECORDS', 1)
+    sharded = step10.fast_expand_spu_data(rows, pd.DataFrame())
+
+    pd.testing.assert_frame_equal(single, sharded)
+
+
+def test_recommendation_text_is_vectorized(monkeypatch):
+    monkeypatch.setattr(step10, 'args', argparse.Namespace(yyyymm=None, period=None), raising=False)
+    monkeypatch.setattr(step10, 'load_margin_rates', lambda *a, **k: pd.DataFrame())
+    quantities = pd.DataFrame({'str_code': ['1001', '1001', '1005'], 'spu_code': ['A', 'B', 'F'],
+                               'base_sal_qty': [10, 1, 4], 'fashion_sal_qty': [0, 0, 0]})
+
+    expanded = step10.fast_expand_spu_data(_config_rows(), quantities).set_index('spu_code')
+
+    # A: min(2/6 * 10, 0.4 * 10) = 3.33 units; B: 0.33 units stays below the threshold
+    assert expanded.loc['A', 'recommendation_text'] == "REDUCE 3.3 units/15-days for SPU A (overcapacity: 50.0%)"
+    assert expanded.loc['B', 'recommendation_text'] == "Monitor SPU B (below reduction threshold)"
+
+
+def test_per_store_cap_keeps_top_ranked_rows():
+    df = pd.DataFrame({
+        'str_code': ['2', '1', '1', '1', '2', None],
+        'spu_code': ['a', 'b', 'c', 'd', 'e', 'f'],
+        'sell_through_improvement': [1.0, np.nan, 2.0, 2.0, 3.0, 9.0],
+        'category_excess_spu_count': [1, 1, 1, 5, 1, 1],
+        'recommended_quantity_change': [-1, -1, -1, -1, -1, -1],
+    })
+
+    trimmed, stats = step10.apply_per_store_cap(df, 2)
+
+    assert trimmed['spu_code'].tolist() == ['d', 'c', 'e', 'a']
+    assert stats == {'stores_capped': 1, 'dropped': 1}
+    assert step10.apply_per_store_cap(df, None)[0] is df
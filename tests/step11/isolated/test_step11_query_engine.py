@@ -0,0 +1,73 @@
+"""
+Step 11 Query Engine Test (Isolated Synthetic)
+==============================================
+
+The DuckDB engine must reproduce the pandas top-performer and expected-gap
+queries exactly: same rows, order, columns and values (ties in the percentile
+rank, missing ratios, SPUs a store does not carry, null keys).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('duckdb')
+
+import src.step11_missed_sales_opportunity as step11
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(step11, 'log_progress', lambda *args, **kwargs: None)
+
+
+def _prepared(seed=0, n=4000):
+    rng = np.random.default_rng(seed)
+    stores = rng.integers(0, 60, n)
+    df = pd.DataFrame({
+        'str_code': [f'1{s:04d}' for s in stores],
+        'Cluster': stores % 4,
+        'category_key': rng.choice(['T恤|休闲', '裤|直筒', '外套|风衣'], n),
+        'spu_code': rng.choice([f'15T{i:03d}' for i in range(25)], n),
+        'spu_sales': np.round(rng.gamma(2, 300, n), 2),
+        'estimated_spu_qty': rng.integers(0, 30, n).astype(float),
+        'avg_unit_price': np.round(rng.uniform(20, 200, n), 2),
+    })
+    df.loc[rng.choice(n, 40), 'spu_sales'] = 100.0  # Tied totals in the percentile rank
+    df.loc[rng.choice(n, 40), 'estimated_spu_qty'] = np.nan
+    df.loc[rng.choice(n, 5), 'category_key'] = np.nan
+    totals = df.groupby(['str_code', 'category_key'])[['spu_sales', 'estimated_spu_qty']].transform('sum')
+    df['store_category_total_sales'] = totals['spu_sales']
+    df['store_category_total_qty'] = totals['estimated_spu_qty']
+    df['spu_to_category_sales_ratio'] = df['spu_sales'] / df['store_category_total_sales']
+    df['spu_to_category_qty_ratio'] = df['estimated_spu_qty'] / df['store_category_total_qty'].replace({0: np.nan})
+    return df
+
+
+def _run(monkeypatch, engine, df):
+    monkeypatch.setattr(step11, 'QUERY_ENGINE', engine)
+    monkeypatch.setattr(step11, 'TOP_PERFORMER_THRESHOLD', 0.8)
+    top = step11.identify_cluster_category_top_performers_optimized(df.copy())
+    return top, step11.find_missing_top_performers_with_quantities_optimized(df.copy(), top)
+
+
+def test_duckdb_matches_pandas(monkeypatch):
+    df = _prepared()
+
+    top_pd, opp_pd = _run(monkeypatch, 'pandas', df)
+    top_db, opp_db = _run(monkeypatch, 'duckdb', df)
+
+    assert len(top_pd) > 20 and len(opp_pd) > 100
+    assert (opp_pd['recommendation_type'] == 'ADD_NEW').any()
+    pd.testing.assert_frame_equal(top_db, top_pd, check_dtype=False, rtol=1e-9)
+    pd.testing.assert_frame_equal(opp_db.reset_index(drop=True), opp_pd.reset_index(drop=True),
+                                  check_dtype=False, rtol=1e-9)
+
+
+def test_duckdb_without_top_performers(monkeypatch):
+    df = _prepared(n=200)
+    monkeypatch.setattr(step11, 'MIN_CLUSTER_STORES', 10_000)
+
+    top, opportunities = _run(monkeypatch, 'duckdb', df)
+
+    assert top.empty and opportunities.empty
@@ -0,0 +1,104 @@
+"""
+Step 11 Rolling Aggregates Test (Isolated Synthetic)
+====================================================
+
+Covers the shared rolling-window store used by the recent/seasonal loaders of
+Steps 7-12: windows match a concat + groupby average, a re-run only reads new
+half-month files, a window loads only the partials it names, and Step 11's
+seasonal blend.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.rolling_aggregates as rolling
+import src.step11_missed_sales_opportunity as step11
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(step11, 'log_progress', lambda *args, **kwargs: None)
+
+
+def _half_month(tmp_path, label, seed, n=400):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'str_code': rng.integers(1, 20, n).astype(str),
+        'spu_code': rng.choice(['A', 'B', 'C', 'D', 'E'], n),
+        'cate_name': rng.choice(['x', 'y'], n),
+        'spu_sales_amt': np.round(rng.gamma(2, 100, n), 2),
+        'quantity': rng.integers(0, 20, n).astype(float),
+    })
+    df.loc[rng.choice(n, 20), 'quantity'] = np.nan
+    path = tmp_path / f'spu_{label}.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def _read(path):
+    return pd.read_csv(path, dtype={'str_code': str})
+
+
+def _store(tmp_path, reader=_read):
+    return rolling.RollingAggregateStore('spu', keys=step11._infer_group_cols, values=step11._infer_value_cols,
+                                         reader=reader, dropna_keys=False, cache_dir=str(tmp_path / 'cache'))
+
+
+def test_window_matches_concat_average_and_reads_only_new_files(tmp_path):
+    paths = [_half_month(tmp_path, label, seed) for seed, label in enumerate(['202508A', '202507B', '202507A'])]
+    _store(tmp_path).update(paths[1:])
+
+    reads = []
+    store = _store(tmp_path, reader=lambda path: reads.append(path) or _read(path))
+    window = store.recent_window(paths)
+
+    assert reads == paths[:1]
+    expected = step11.average_recent_dataframe([_read(p) for p in paths])
+    pd.testing.assert_frame_equal(window, expected[window.columns], check_dtype=False)
+
+
+def test_window_loads_only_named_sources_and_prunes_deleted_ones(tmp_path):
+    paths = [_half_month(tmp_path, label, seed) for seed, label in enumerate(['202508A', '202507B', '202507A'])]
+    _store(tmp_path).update(paths)
+    assert len(list((tmp_path / 'cache' / 'spu').glob('*.pkl'))) == 3
+
+    store = _store(tmp_path)
+    assert store.window(paths[:1]) is not None
+    assert list(store.partials) == paths[:1]
+
+    os.remove(paths[2])
+    store.update([_half_month(tmp_path, '202508B', 7)])
+    assert len(list((tmp_path / 'cache' / 'spu').glob('*.pkl'))) == 3
+    assert _store(tmp_path).window(paths) is None
+
+
+def test_source_divisor_and_missing_files(tmp_path):
+    frames = [pd.DataFrame({'str_code': ['1', '1', '2'], 'cate': ['a', 'a', 'b'], 'sales': [2.0, 4.0, np.nan]}),
+              pd.DataFrame({'str_code': ['1'], 'cate': ['a'], 'sales': [3.0]})]
+    paths = []
+    for i, frame in enumerate(frames):
+        paths.append(str(tmp_path / f'{i}.csv'))
+        frame.to_csv(paths[-1], index=False)
+    store = rolling.RollingAggregateStore('sales', keys=['str_code', 'cate'], values=['sales'],
+                                          cache_dir=str(tmp_path / 'cache'))
+
+    window = store.recent_window(paths + [str(tmp_path / 'missing.csv')], divisor='sources')
+
+    assert window.to_dict('list') == {'str_code': ['1', '2'], 'cate': ['a', 'b'], 'sales': [4.5, 0.0]}
+
+
+def test_seasonal_blend_weights_overlap_and_appends_seasonal_only():
+    recent = pd.DataFrame({'str_code': ['1', '1', '2'], 'spu_code': ['A', 'B', 'A'], 'quantity': [10.0, np.nan, 4.0]})
+    seasonal = pd.DataFrame({'str_code': ['1', '1', '1', '3'], 'spu_code': ['A', 'A', 'B', 'C'],
+                             'quantity': [20.0, 40.0, 5.0, 8.0]})
+
+    blended = step11.blend_seasonal_data(recent, seasonal, recent_weight=0.7, seasonal_weight=0.3)
+
+    out = blended.set_index(['str_code', 'spu_code'])['quantity']
+    assert out[('1', 'A')] == pytest.approx(0.7 * 10 + 0.3 * 30)
+    assert out[('1', 'B')] == pytest.approx(0.3 * 5)
+    assert out[('2', 'A')] == 4.0
+    assert out[('3', 'C')] == pytest.approx(0.3 * 8)
@@ -0,0 +1,50 @@
+"""
+Step 12 Query Engine Test (Isolated Synthetic)
+==============================================
+
+The DuckDB engine must reproduce the pandas cluster top-quartile benchmark
+and opportunity gaps: same rows (small groups dropped), group order, index
+and values.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('duckdb')
+
+import src.step12_sales_performance_rule as step12
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(step12, 'log_progress', lambda *args, **kwargs: None)
+
+
+def _sales_data(seed=0, n=3000):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'str_code': [f'1{s:04d}' for s in rng.integers(0, 200, n)],
+        'cluster_id': rng.integers(0, 12, n),
+        'category_key': rng.choice([f'cat{i}' for i in range(40)], n),
+        'spu_code': rng.choice([f'15T{i:03d}' for i in range(30)], n),
+        'spu_sales': np.round(rng.gamma(2, 300, n), 2),
+    })
+    df.loc[rng.choice(n, 3), 'spu_sales'] = np.nan  # numpy percentile -> NaN for the whole group
+    return df.sample(frac=1, random_state=seed)  # Shuffled index, as after the cluster merge
+
+
+@pytest.mark.parametrize('percentile', [75, 90])
+def test_duckdb_matches_pandas(monkeypatch, percentile):
+    df = _sales_data()
+    monkeypatch.setattr(step12, 'TOP_QUARTILE_PERCENTILE', percentile)
+    monkeypatch.setattr(step12, 'MIN_CLUSTER_SIZE', 3)
+
+    monkeypatch.setattr(step12, 'QUERY_ENGINE', 'pandas')
+    expected = step12.calculate_opportunity_gaps(df)
+    monkeypatch.setattr(step12, 'QUERY_ENGINE', 'duckdb')
+    got = step12.calculate_opportunity_gaps(df)
+
+    assert 0 < len(expected) < len(df)
+    assert expected['cluster_top_quartile'].isna().any()
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False, rtol=1e-9)
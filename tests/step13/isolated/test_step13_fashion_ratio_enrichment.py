@@ -0,0 +1,68 @@
+"""
+Step 13 Fashion/Basic Ratio Enrichment Test (Isolated Synthetic)
+================================================================
+
+Covers the merge-based subcategory ratio enrichment and the vectorized ratio
+parsing used when building the granular trend data.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.step13_consolidate_spu_rules as step13
+
+
+def _sales():
+    return pd.DataFrame({
+        'str_code': ['1', '2', '3', '1', '2', '3'],
+        'spu_code': ['S1', 'S2', 'S3', 'S4', 'S5', 'S6'],
+        'sub_cate_name': ['T恤', 'T恤', 'T恤', '短裤', '短裤', '连衣裙'],
+        'quantity': [5000, 6000, 1, 500, 600, 20000],
+    })
+
+
+def test_subcategory_ratio_table_follows_volume_rules():
+    table = step13._calculate_subcategory_ratio_table(_sales()).set_index('sub_cate_name')
+
+    # 11001 units, 3 SPUs: 75 + 0.22 (volume) + 5 (low diversity)
+    assert table.loc['T恤', 'basic_ratio'] == pytest.approx(80.22002)
+    # 1100 units: 60 + 1.65 + 5
+    assert table.loc['短裤', 'basic_ratio'] == pytest.approx(66.65)
+    assert (table['basic_ratio'] + table['fashion_ratio']).eq(100.0).all()
+    assert step13._calculate_subcategory_ratios(_sales())['连衣裙'] == pytest.approx((80.4, 19.6))
+
+
+def test_real_fashion_ratios_joined_by_subcategory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'output').mkdir()
+    _sales().to_csv(tmp_path / 'output' / 'complete_spu_sales_202507A.csv', index=False)
+    df = pd.DataFrame({'str_code': ['9', '8', '7'], 'sub_cate_name': ['短裤', 'unknown', 'T恤']},
+                      index=[10, 20, 30])
+
+    out = step13.calculate_real_fashion_ratios(df)
+
+    assert out.index.tolist() == [10, 20, 30]
+    assert out.loc[10, 'basic_ratio'] == f"{66.65:.1f}%"
+    assert out.loc[10, 'fashion_ratio'] == f"{100.0 - 66.65:.1f}%"
+    assert pd.isna(out.loc[20, 'basic_ratio'])
+    assert out.loc[30, 'basic_ratio'] == '80.2%'
+
+
+def test_enhanced_default_ratios_apply_store_adjustment():
+    df = pd.DataFrame({'str_code': ['11', '11', '12'], 'sub_cate_name': ['a', 'b', 'a']})
+
+    out = step13._apply_enhanced_default_ratios(df)
+
+    expected = [max(30.0, min(90.0, 65.0 + (hash(code) % 100 - 50) * 0.15)) for code in df['str_code']]
+    assert out['basic_ratio'].tolist() == [f"{v:.1f}%" for v in expected]
+    assert out['fashion_ratio'].tolist() == [f"{100.0 - v:.1f}%" for v in expected]
+
+
+def test_parse_ratio_series_handles_mixed_inputs():
+    mixed = pd.Series(['65.0%', pd.NA, 0.3, 45, 'n/a', None, ' 12.5% '], dtype=object)
+    assert step13._parse_ratio_series(mixed).tolist() == pytest.approx([0.65, 0.0, 0.3, 0.45, 0.0, 0.0, 0.125])
+
+    numeric = step13._parse_ratio_series(pd.Series([0.3, 70.0, np.nan]))
+    assert numeric.iloc[:2].tolist() == pytest.approx([0.3, 0.7])
+    assert np.isnan(numeric.iloc[2])
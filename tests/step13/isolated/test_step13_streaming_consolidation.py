@@ -0,0 +1,129 @@
+"""
+Step 13 Streaming Consolidation Test (Isolated Synthetic)
+=========================================================
+
+Checks that the single-pass streaming consolidation produces the same store and
+cluster-subcategory aggregations and the same detail CSV artifact as the in-memory
+path, while reading every rule file in small chunks and writing the detail rows
+incrementally.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import src.step13_consolidate_spu_rules as step13
+
+
+def _write_rule_files(tmp_path):
+    rule7 = pd.DataFrame({
+        'str_code': ['1001', '1001', '1002', '1003', '1003'],
+        'spu_code': ['A', 'B', 'A', 'C', 'D'],
+        'sub_cate_name': ['T恤', 'T恤', 'T恤', '裤子', '裤子'],
+        'recommended_quantity_change': [2, 3, 1, 4, -2],
+        'investment_required': [20.0, 30.0, 10.0, 40.0, -20.0],
+        'cluster_id': [0, 0, 0, 1, 1],
+    })
+    # Rule 11 repeats (1001, A) which must be dropped as a duplicate, and has no cluster_id
+    rule11 = pd.DataFrame({
+        'str_code': ['1001', '1002', '1004'],
+        'spu_code': ['A', 'E', 'F'],
+        'sub_cate_name': ['T恤', '鞋', '鞋'],
+        'recommended_quantity_change': [9, 5, 6],
+        'unit_price': [10.0, 12.0, 8.0],
+    })
+    paths = {'rule7': tmp_path / 'rule7.csv', 'rule11': tmp_path / 'rule11.csv'}
+    rule7.to_csv(paths['rule7'], index=False)
+    rule11.to_csv(paths['rule11'], index=False)
+    return {k: str(v) for k, v in paths.items()}
+
+
+def _in_memory_detail(rule_files, cluster_mapping):
+    frames = [
+        step13._standardize_rule_frame(pd.read_csv(p, dtype={'str_code': str}), name, cluster_mapping)
+        for name, p in rule_files.items()
+    ]
+    return pd.concat(frames, ignore_index=True).drop_duplicates(['str_code', 'spu_code'], keep='first')
+
+
+def test_streaming_matches_in_memory_totals(tmp_path):
+    rule_files = _write_rule_files(tmp_path)
+    cluster_mapping = {'1001': 0, '1002': 0, '1003': 1, '1004': 2}
+
+    store_agg, cluster_agg, stats = step13.consolidate_rules_streaming(
+        rule_files, cluster_mapping, '202510A', '202510', 'A',
+        chunk_size=2, detail_base=str(tmp_path / 'out' / 'detailed'),
+    )
+
+    assert stats['rows_read'] == 8
+    assert stats['duplicates_removed'] == 1
+    assert stats['negatives_removed'] == 1
+    assert stats['rows_written'] == 6
+
+    # Expected totals computed with plain pandas over the concatenated frames
+    full = _in_memory_detail(rule_files, cluster_mapping)
+    full['investment_required'] = pd.to_numeric(full['investment_required'], errors='coerce').fillna(0)
+    full['rec_add'] = full['recommended_quantity_change'].clip(lower=0)
+    expected_store = (
+        full.groupby(['str_code', 'rule_source'])
+        .agg(total_quantity_change=('rec_add', 'sum'), total_investment=('investment_required', 'sum'),
+             affected_spus=('spu_code', 'count'))
+        .reset_index()
+    )
+    pd.testing.assert_frame_equal(
+        store_agg.sort_values(['str_code', 'rule_source']).reset_index(drop=True),
+        expected_store.sort_values(['str_code', 'rule_source']).reset_index(drop=True),
+        check_dtype=False,
+    )
+
+    kept = full[full['recommended_quantity_change'] >= 0]
+    expected_cluster = kept.groupby(['cluster_id', 'sub_cate_name'])['recommended_quantity_change'].sum()
+    got_cluster = cluster_agg.set_index(['cluster', 'subcategory'])['total_quantity_change']
+    assert got_cluster.sort_index().tolist() == expected_cluster.sort_index().tolist()
+
+
+def test_streaming_outputs_match_in_memory_outputs(tmp_path):
+    rule_files = _write_rule_files(tmp_path)
+    cluster_mapping = {'1001': 0, '1002': 0, '1003': 1, '1004': 2}
+
+    _, cluster_agg, stats = step13.consolidate_rules_streaming(
+        rule_files, cluster_mapping, '202510A', '202510', 'A',
+        chunk_size=2, detail_base=str(tmp_path / 'out' / 'detailed'),
+    )
+
+    full = _in_memory_detail(rule_files, cluster_mapping)
+    kept = full[full['recommended_quantity_change'] >= 0].reset_index(drop=True)
+
+    # Same cluster-subcategory layout the in-memory path writes (and Step 19 reads)
+    expected_cluster = step13._aggregate_cluster_subcategories(kept)
+    assert list(cluster_agg.columns) == step13.CLUSTER_AGG_COLUMNS
+    pd.testing.assert_frame_equal(
+        cluster_agg.sort_values(['cluster', 'subcategory']).reset_index(drop=True),
+        expected_cluster.sort_values(['cluster', 'subcategory']).reset_index(drop=True),
+        check_dtype=False,
+    )
+    assert cluster_agg.set_index(['cluster', 'subcategory'])['stores_affected'].to_dict() == {
+        (0, 'T恤'): 2, (1, '裤子'): 1, (0, '鞋'): 1, (2, '鞋'): 1,
+    }
+
+    # Same CSV artifact: timestamped file behind the period-labeled and generic .csv symlinks
+    assert stats['detail_file'].endswith('.csv')
+    for link in ('detailed_202510A.csv', 'detailed.csv'):
+        assert os.path.islink(tmp_path / 'out' / link)
+    detail = pd.read_csv(tmp_path / 'out' / 'detailed_202510A.csv', dtype={'str_code': str, 'spu_code': str})
+    assert set(detail['period_label']) == {'202510A'}
+    cols = ['str_code', 'spu_code', 'sub_cate_name', 'rule_source', 'recommended_quantity_change']
+    pd.testing.assert_frame_equal(detail[cols], kept[cols], check_dtype=False)
+
+
+def test_process_rule_in_chunks_reduces_per_chunk(tmp_path, monkeypatch):
+    rule_files = _write_rule_files(tmp_path)
+    monkeypatch.setattr(step13, 'CHUNK_SIZE_SMALL', 2)
+
+    summary = step13.process_rule_in_chunks(rule_files['rule7'])
+
+    summary = summary.set_index('str_code')
+    assert summary.loc['1001', 'total_investment'] == pytest.approx(50.0)
+    assert summary.loc['1003', 'total_quantity_change'] == pytest.approx(2.0)
+    assert summary.loc['1003', 'spu_count'] == 2
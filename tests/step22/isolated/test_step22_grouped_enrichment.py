@@ -0,0 +1,115 @@
+"""
+Step 22 Grouped Enrichment Test (Isolated Synthetic)
+====================================================
+
+Covers the grouped store-attribute computation (store-level splits, taxonomy
+allocation, keyword heuristic) and incremental updates from a previous run.
+"""
+
+import numpy as np
+import pandas as pd
+
+import src.step22_store_attribute_enrichment as step22
+
+
+def _spu_rows(seed=0, n=2000, stores=30):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'str_code': rng.integers(1, stores + 1, n).astype(str),
+        'spu_code': rng.integers(0, 60, n).astype(str),
+        'cate_name': rng.choice(['上衣', '下装'], n),
+        'sub_cate_name': rng.choice(['连衣裙', 'T恤', '裤', '防晒衣'], n),
+        'unit_price': rng.gamma(2, 30, n),
+        'spu_sales_amt': np.round(rng.gamma(2, 300, n), 2),
+        'quantity': rng.integers(0, 20, n),
+    })
+
+
+def _keyword_reference(df):
+    """Per-store keyword split and ratio computed store by store."""
+    rows = {}
+    for store, g in df.groupby('str_code', sort=False):
+        fashion = g['sub_cate_name'].map(step22._is_fashion_subcategory)
+        f_amt, b_amt = g.loc[fashion, 'spu_sales_amt'].sum(), g.loc[~fashion, 'spu_sales_amt'].sum()
+        f_qty, b_qty = g.loc[fashion, 'quantity'].sum(), g.loc[~fashion, 'quantity'].sum()
+        ratio = 0.5 * f_amt / (f_amt + b_amt) + 0.5 * f_qty / (f_qty + b_qty)
+        rows[store] = (round(ratio * 100.0, 2), g['spu_code'].nunique())
+    return rows
+
+
+def test_keyword_split_matches_per_store_reference():
+    df = _spu_rows()
+
+    out = step22.calculate_store_attributes_from_real_data(df)
+
+    assert out['str_code'].tolist() == list(df['str_code'].unique())
+    expected = _keyword_reference(df)
+    for _, row in out.iterrows():
+        ratio, skus = expected[row['str_code']]
+        assert row['fashion_ratio'] == ratio
+        assert row['sku_diversity'] == skus
+        assert row['estimated_rack_capacity'] >= skus * 2
+
+
+def test_store_level_split_and_api_tie_break():
+    df = pd.DataFrame({
+        'str_code': ['1', '2', '3'],
+        'fashion_sal_amt': [900.0, 100.0, 620.0],
+        'base_sal_amt': [100.0, 900.0, 380.0],
+        'fashion_sal_qty': [90, 10, 62],
+        'base_sal_qty': [10, 90, 38],
+        'str_type': ['流行', '基础', '流行'],
+    })
+
+    out = step22.calculate_store_attributes_from_real_data(df).set_index('str_code')
+
+    assert out.loc['1', ['store_type', 'store_style_profile']].tolist() == ['Fashion', 'Fashion-Heavy']
+    assert out.loc['2', ['store_type', 'store_style_profile']].tolist() == ['Basic', 'Basic-Heavy']
+    # 62% is inside the Balanced band but within 5 points of the cut: API label wins
+    assert out.loc['3', 'store_type'] == 'Fashion'
+    assert out.loc['3', 'type_confidence_score'] == round(0.6 + 0.4 * 12 / 50, 3)
+
+
+def test_taxonomy_mapping_overrides_keywords(tmp_path):
+    mapping = tmp_path / 'mapping.csv'
+    pd.DataFrame({'sub_cate_name': ['T恤', '连衣裙'], 'tag': ['Fashion', 'basic']}).to_csv(mapping, index=False)
+    df = pd.DataFrame({
+        'str_code': ['1', '1'],
+        'sub_cate_name': ['T恤', '连衣裙'],
+        'spu_code': ['a', 'b'],
+        'spu_sales_amt': [300.0, 100.0],
+        'quantity': [3, 1],
+    })
+
+    out = step22.calculate_store_attributes_from_real_data(
+        df, force_taxonomy_split=True, subcategory_mapping_file=str(mapping))
+
+    # Only amounts are used when they are non-zero
+    assert out['fashion_ratio'].iloc[0] == 75.0
+
+
+def test_incremental_update_recomputes_only_changed_stores(tmp_path, monkeypatch):
+    df = _spu_rows(seed=3)
+    previous = step22.calculate_store_attributes_from_real_data(df)
+    previous.to_csv(tmp_path / 'prev.csv', index=False)
+    previous = pd.read_csv(tmp_path / 'prev.csv', dtype={'str_code': str, 'sales_fingerprint': str})
+
+    current = df.copy()
+    current.loc[current['str_code'] == '5', 'spu_sales_amt'] *= 3
+    current = current[current['str_code'] != '7']
+
+    recomputed_stores = []
+    real_aggregate = step22._aggregate_store_attributes
+
+    def tracking_aggregate(sales_df, parts):
+        recomputed_stores.extend(sales_df['str_code'].unique())
+        return real_aggregate(sales_df, parts)
+
+    monkeypatch.setattr(step22, '_aggregate_store_attributes', tracking_aggregate)
+    incremental = step22.calculate_store_attributes_from_real_data(current, previous_attributes=previous)
+    monkeypatch.setattr(step22, '_aggregate_store_attributes', real_aggregate)
+    full = step22.calculate_store_attributes_from_real_data(current)
+
+    assert recomputed_stores == ['5']
+    compare = [c for c in full.columns if c != 'calculation_date']
+    pd.testing.assert_frame_equal(incremental[compare], full[compare], check_dtype=False)
@@ -0,0 +1,94 @@
+"""
+Step 24 Vectorized Labeling Test (Isolated Synthetic)
+=====================================================
+
+Covers the one-pass labeling engine: store→cluster membership joined once,
+one groupby per source, and silhouette scores resolved for all clusters at once.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.step24_comprehensive_cluster_labeling as step24
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(step24, 'log_progress', lambda *args, **kwargs: None)
+
+
+def _inputs(seed=0, n=120, clusters=6):
+    rng = np.random.default_rng(seed)
+    stores = [f'S{i:03d}' for i in range(n)]
+    clustering = pd.DataFrame({'str_code': stores, 'Cluster': rng.integers(0, clusters, n)})
+    enriched = pd.DataFrame({
+        'str_code': stores,
+        'fashion_ratio': rng.uniform(0, 100, n),
+        'total_sales_amt': rng.gamma(2, 1000, n),
+        'estimated_rack_capacity': rng.integers(50, 900, n),
+    })
+    temperature = pd.DataFrame({
+        'str_code': stores,
+        'feels_like_temperature': rng.uniform(0, 30, n),
+        'temperature_band': rng.choice(['Cold', 'Mild', 'Warm'], n),
+    })
+    return clustering, enriched, temperature
+
+
+def test_profiles_match_per_cluster_filters():
+    clustering, enriched, temperature = _inputs()
+
+    labels = step24.build_cluster_labels(clustering, enriched, temperature, enriched).set_index('cluster_id')
+
+    for cluster_id, members in clustering.groupby('Cluster')['str_code']:
+        rows = enriched[enriched['str_code'].isin(members)]
+        ratio = np.average(rows['fashion_ratio'], weights=rows['total_sales_amt'] + 1e-6)
+        temps = temperature[temperature['str_code'].isin(members)]
+        label = labels.loc[cluster_id]
+        assert label['cluster_size'] == len(members)
+        assert label['fashion_ratio'] == round(ratio, 1)
+        assert label['avg_feels_like_temp'] == round(temps['feels_like_temperature'].mean(), 1)
+        assert label['dominant_temp_band'] == temps['temperature_band'].value_counts().index[0]
+        assert label['avg_estimated_capacity'] == round(rows['estimated_rack_capacity'].mean(), 0)
+        assert label['comprehensive_label'].startswith(f"Cluster {cluster_id}: ")
+
+
+def test_sales_split_fallback_and_missing_sources():
+    clustering = pd.DataFrame({'str_code': ['1', '2', '3', '4'], 'Cluster': [0, 0, 1, 2]})
+    sales = pd.DataFrame({
+        'str_code': ['1', '2', '3'],
+        'fashion_sal_amt': [70.0, 10.0, 0.0],
+        'basic_sal_amt': [10.0, 10.0, 0.0],
+        'fashion_sal_qty': [1, 1, 2],
+        'basic_sal_qty': [1, 1, 6],
+    })
+
+    labels = step24.build_cluster_labels(clustering, sales, pd.DataFrame(), pd.DataFrame()).set_index('cluster_id')
+
+    assert labels.loc[0, ['fashion_ratio', 'fashion_basic_data_source']].tolist() == [80.0, 'Real sales amount data']
+    assert labels.loc[1, ['fashion_ratio', 'fashion_basic_data_source']].tolist() == [25.0, 'Real sales quantity data']
+    assert labels.loc[2, 'fashion_basic_classification'] == 'No cluster data'
+    assert labels.loc[0, 'capacity_data_source'] == 'Sales-based estimate'
+    assert labels.loc[2, 'capacity_tier'] == 'Unknown'
+    assert (labels['temperature_classification'] == 'No data').all()
+
+
+def test_silhouette_from_metrics_then_samples_then_size(tmp_path):
+    (tmp_path / 'output').mkdir()
+    pd.DataFrame({'Cluster': [0], 'Avg_Silhouette': [0.72]}).to_csv(
+        tmp_path / 'output' / 'per_cluster_metrics_spu.csv', index=False)
+    clustering = pd.DataFrame({'str_code': list('abcdefg'), 'Cluster': [0, 0, 1, 1, 1, 2, 2]})
+    features = pd.DataFrame({'x': [0.0, 0.1, 5.0, 5.1, 5.2, 9.0, 9.1]}, index=list('abcdefg'))
+    membership = step24._cluster_membership(clustering, 'Cluster')
+    clusters = pd.Index([0, 1, 2, 3])
+    sizes = pd.Series({0: 2, 1: 3, 2: 2, 3: 45})
+
+    profiles = step24.silhouette_profiles(membership, clusters, sizes, features)
+
+    assert profiles.loc[0, ['silhouette_score', 'silhouette_quality']].tolist() == [0.72, 'Excellent']
+    assert profiles.loc[1, 'data_source'] == 'Silhouette samples (feature matrix)'
+    assert profiles.loc[1, 'silhouette_quality'] == 'Excellent'
+    assert profiles.loc[3, ['silhouette_score', 'silhouette_quality', 'data_source']].tolist() == \
+        [0.5, 'Good (estimated)', 'Size-based estimate']
@@ -0,0 +1,129 @@
+"""
+Step 25 Product Metrics Kernel Test (Isolated Synthetic)
+========================================================
+
+Covers the shared product-metrics kernel behind Steps 25-30: per-SPU metrics
+against a per-SPU reference, the np.select role rules, cluster context, and
+the per-period caches that Steps 26, 27 and 30 read instead of recomputing.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.product_metrics as kernel
+
+
+def _sales(seed=0, n=600):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'str_code': rng.integers(1, 40, n).astype(str),
+        'spu_code': rng.integers(0, 50, n).astype(str),
+        'cate_name': rng.choice(['A', 'B'], n),
+        'sub_cate_name': rng.choice(['x', 'y', 'z'], n),
+        'fashion_sal_amt': np.round(rng.gamma(1, 400, n), 2),
+        'basic_sal_amt': np.round(rng.gamma(1, 400, n), 2),
+        'fashion_sal_qty': rng.integers(0, 10, n).astype(float),
+        'basic_sal_qty': rng.integers(0, 10, n).astype(float),
+    })
+
+
+def test_product_metrics_match_per_spu_reference():
+    sales = _sales()
+
+    metrics = kernel.product_metrics(sales).set_index('spu_code')
+
+    assert metrics.index.tolist() == list(sales['spu_code'].unique())
+    for spu, rows in sales.groupby('spu_code'):
+        row_sales = (rows['fashion_sal_amt'] + rows['basic_sal_amt']).to_numpy()
+        total = row_sales.sum()
+        consistency = max(0, min(1, 1 - np.std(row_sales) / np.mean(row_sales))) if len(rows) > 1 else 0
+        m = metrics.loc[spu]
+        assert m['total_sales'] == pytest.approx(total)
+        assert m['fashion_ratio'] == pytest.approx(rows['fashion_sal_amt'].sum() / total)
+        assert m['stores_selling'] == len(rows)
+        assert m['store_coverage'] == pytest.approx(len(rows) / sales['str_code'].nunique())
+        assert m['consistency_score'] == pytest.approx(consistency)
+        assert m['category'] == rows['cate_name'].iloc[0]
+
+
+def test_role_rules_and_rationale():
+    metrics = pd.DataFrame({
+        'spu_code': ['core', 'seasonal', 'clearance', 'filler', 'balanced'],
+        'total_sales': [20000.0, 12000.0, 1200.0, 8000.0, 8000.0],
+        'fashion_ratio': [0.9, 0.75, 0.9, 0.8, 0.5],
+        'store_coverage': 0.5,
+        'consistency_score': 0.3,
+        'category': 'A',
+        'subcategory': 'x',
+    })
+
+    roles = kernel.classify_product_roles(metrics).set_index('spu_code')
+
+    assert roles['product_role'].tolist() == ['CORE', 'SEASONAL', 'CLEARANCE', 'FILLER', 'FILLER']
+    assert roles['confidence_score'].tolist() == [0.95, 0.90, 0.85, 0.80, 0.85]
+    assert roles.loc['seasonal', 'rationale'] == \
+        'Fashion-focused (75%); Strong sales (¥12000); Seasonal appeal product'
+    assert roles.loc['balanced', 'rationale'] == \
+        'Solid middle-tier performance; Steady sales (¥8000); Balanced fashion-basic mix'
+
+
+def test_cluster_context_picks_top_cluster():
+    sales = pd.DataFrame({
+        'str_code': ['1', '2', '3', '4', '1'],
+        'spu_code': ['a', 'a', 'a', 'a', 'b'],
+        'fashion_sal_amt': [10.0, 50.0, 30.0, 30.0, 5.0],
+        'basic_sal_amt': 0.0,
+    })
+    clusters = pd.DataFrame({'str_code': [1, 2, 3, 4], 'cluster_id': [0, 1, 2, 2]})
+
+    per_cluster = kernel.cluster_product_metrics(sales, clusters)
+    context = kernel.cluster_context(per_cluster, pd.Series(['a', 'b', 'c'])).set_index('spu_code')
+
+    assert per_cluster.set_index(['cluster_id', 'spu_code']).loc[(2, 'a'), ['records', 'total_sales']].tolist() == [2, 60.0]
+    assert context.loc['a', ['dominant_cluster', 'clusters_present', 'cluster_distribution']].tolist() == [2, 3, 'wide']
+    assert context.loc['c', ['dominant_cluster', 'clusters_present']].tolist() == [0, 0]
+
+
+def test_period_cache_is_shared_and_invalidated(tmp_path, monkeypatch):
+    sales = _sales(seed=1)
+    clusters = pd.DataFrame({'str_code': sales['str_code'].unique(), 'cluster_id': 1})
+    calls = []
+    compute = kernel.compute_product_metrics
+    monkeypatch.setattr(kernel, 'compute_product_metrics', lambda *a: calls.append(1) or compute(*a))
+
+    first = kernel.get_product_metrics(sales, clusters, period_label='202510A', cache_dir=str(tmp_path))
+    # A later step without the cluster mapping reuses the same period
+    prices = kernel.get_product_metrics(sales, period_label='202510A', cache_dir=str(tmp_path))['store_prices']
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(prices, first['store_prices'])
+    assert 'dominant_cluster' in first['roles']
+
+    changed = sales.assign(basic_sal_amt=sales['basic_sal_amt'] * 2)
+    kernel.get_product_metrics(changed, clusters, period_label='202510A', cache_dir=str(tmp_path))
+    kernel.get_product_metrics(changed, clusters.assign(cluster_id=2), period_label='202510A', cache_dir=str(tmp_path))
+    assert len(calls) == 3
+
+
+def test_sell_through_cache_is_reused_and_invalidated(tmp_path, monkeypatch):
+    rng = np.random.default_rng(2)
+    frame = pd.DataFrame({
+        'cluster_id': rng.integers(0, 4, 200),
+        'str_code': rng.integers(1, 30, 200).astype(str),
+        'total_inventory_qty': rng.integers(0, 20, 200).astype(float),
+        'total_sales_qty': rng.integers(0, 20, 200).astype(float),
+    })
+    calls = []
+    compute = kernel.sell_through_rates
+    monkeypatch.setattr(kernel, 'sell_through_rates', lambda *a, **k: calls.append(1) or compute(*a, **k))
+
+    first = kernel.get_sell_through_rates(frame, ['cluster_id'], period_label='202510A', cache_dir=str(tmp_path))
+    again = kernel.get_sell_through_rates(frame, ['cluster_id'], period_label='202510A', cache_dir=str(tmp_path))
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(again, first)
+    pd.testing.assert_frame_equal(first, compute(frame, ['cluster_id']))
+
+    kernel.get_sell_through_rates(frame.assign(total_sales_qty=0.0), ['cluster_id'], period_label='202510A',
+                                  cache_dir=str(tmp_path))
+    kernel.get_sell_through_rates(frame, ['cluster_id', 'str_code'], period_label='202510A', cache_dir=str(tmp_path))
+    assert len(calls) == 3
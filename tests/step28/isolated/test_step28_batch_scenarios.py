@@ -0,0 +1,114 @@
+"""
+Step 28 Batch Scenario Test (Isolated Synthetic)
+================================================
+
+Covers the batch what-if engine: grids and samples of role/price scenarios
+evaluated against many clusters at once, matching the one-at-a-time
+analyzers, and the ranked output (including the process-pool path).
+"""
+
+import pandas as pd
+import pytest
+
+import src.step28_scenario_analyzer as step28
+
+METRICS = ['delta_sell_through_pct', 'delta_revenue', 'delta_inventory_days',
+           'new_sell_through_rate', 'new_revenue', 'new_inventory_days', 'confidence_score']
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(step28, 'log_progress', lambda *args, **kwargs: None)
+
+
+@pytest.fixture
+def analyzer():
+    return step28.WhatIfScenarioAnalyzer({'baseline_metrics': {
+        'avg_sell_through_rate': 75.0,
+        'total_sales_amount': 1000000.0,
+        'avg_inventory_days': 45.0,
+        'price_band_distribution': {band: {'percentage': pct} for band, pct in
+                                    [('ECONOMY', 30), ('VALUE', 40), ('PREMIUM', 20), ('LUXURY', 10)]},
+    }})
+
+
+def _assert_matches(row, expected):
+    for metric in METRICS:
+        # np.round and round() may disagree on a value sitting exactly on a rounding tie
+        assert row[metric] == pytest.approx(expected[metric], abs=0.1)
+    assert row['risk_factors'] == '; '.join(expected['risk_factors'])
+    assert row['changes_summary'] == '; '.join(expected['changes_summary'])
+
+
+def test_role_grid_matches_scalar_analyzer(analyzer):
+    grid = step28.build_scenario_grid(role_add={'CORE': [0, 2, 6], 'CLEARANCE': [0, 3]},
+                                      role_remove={'SEASONAL': [0, 4, 8]})
+
+    results = analyzer.analyze_scenario_batch(grid, cluster_ids=[3, 7])
+
+    assert len(grid) == 18 and len(results) == 36
+    indexed = results.set_index(['scenario_id', 'cluster_id'])
+    for _, scenario in grid.iterrows():
+        changes = {}
+        for column in ['add_CORE', 'add_CLEARANCE', 'remove_SEASONAL']:
+            action, role = column.split('_', 1)
+            changes.setdefault(role, {'add': 0, 'remove': 0})[action] = int(scenario[column])
+        expected = analyzer.analyze_role_optimization_scenario(7, changes)
+        row = indexed.loc[(scenario['scenario_id'], 7)]
+        _assert_matches(row, expected)
+        assert row['products_changed'] == expected['products_changed']
+
+
+def test_price_grid_matches_scalar_analyzer(analyzer):
+    grid = step28.build_scenario_grid(price_adjustments={'ECONOMY': [0.7, 1.0, 1.05], 'LUXURY': [0.9, 1.3]})
+
+    results = analyzer.analyze_scenario_batch(grid).set_index('scenario_id')
+
+    for _, scenario in grid.iterrows():
+        adjustments = {c[len('price_'):]: scenario[c] for c in ['price_ECONOMY', 'price_LUXURY'] if scenario[c] != 1}
+        row = results.loc[scenario['scenario_id']]
+        assert row['scenario_type'] == 'PRICE_STRATEGY'
+        _assert_matches(row, analyzer.analyze_price_strategy_scenario(adjustments))
+
+
+def test_ranking_per_cluster_baselines_and_process_pool(analyzer, monkeypatch):
+    scenarios = step28.sample_scenarios(40, seed=1)
+    baselines = pd.DataFrame({'cluster_id': [1, 2], 'total_sales_amount': [500.0, 2000.0]})
+
+    ranked = analyzer.analyze_scenario_batch(scenarios, cluster_baselines=baselines)
+
+    assert ranked['rank'].tolist() == list(range(1, 81))
+    assert ranked['delta_revenue'].is_monotonic_decreasing
+    assert ranked.groupby('cluster_id')['cluster_rank'].apply(list).tolist() == [list(range(1, 41))] * 2
+    by_cluster = ranked.set_index(['scenario_id', 'cluster_id'])['new_revenue']
+    assert by_cluster.xs(2, level='cluster_id').sum() == pytest.approx(4 * by_cluster.xs(1, level='cluster_id').sum())
+
+    monkeypatch.setattr(step28, 'PARALLEL_MIN_EVALUATIONS', 1)
+    pooled = analyzer.analyze_scenario_batch(scenarios, cluster_baselines=baselines, workers=2)
+    pd.testing.assert_frame_equal(pooled, ranked)
+
+
+def test_grid_clusters_use_their_own_sales_baselines(analyzer):
+    sales = pd.DataFrame({
+        'str_code': ['11', '12', '21', '22'],
+        'spu_code': ['A', 'B', 'A', 'C'],
+        'fashion_sal_amt': [100.0, 300.0, 2000.0, 1000.0],
+        'basic_sal_amt': [100.0, 0.0, 500.0, 500.0],
+        'total_inventory_qty': [10.0, 10.0, 10.0, 10.0],
+        'total_sales_qty': [2.0, 4.0, 8.0, 6.0],
+    })
+    store_clusters = pd.DataFrame({'str_code': ['11', '12', '21', '22'], 'cluster_id': [1, 1, 2, 2]})
+
+    baselines = step28.calculate_cluster_baselines(sales, store_clusters, analyzer.baseline)
+    ranked = analyzer.analyze_scenario_batch(step28.sample_scenarios(20, seed=3), [1, 2],
+                                             cluster_baselines=baselines)
+
+    indexed = baselines.set_index('cluster_id')
+    assert indexed['total_sales_amount'].tolist() == [500.0, 4000.0]
+    assert indexed['avg_sell_through_rate'].tolist() == pytest.approx([30.0, 70.0])
+    assert indexed.loc[1, 'avg_inventory_days'] == pytest.approx(45.0 * 75.0 / 30.0)
+    by_cluster = ranked.set_index(['scenario_id', 'cluster_id']).sort_index()
+    first, second = by_cluster.xs(1, level='cluster_id'), by_cluster.xs(2, level='cluster_id')
+    for metric in ['new_revenue', 'new_sell_through_rate', 'new_inventory_days']:
+        assert not first[metric].equals(second[metric])
+    assert second['new_revenue'].tolist() == pytest.approx((8 * first['new_revenue']).tolist(), rel=1e-3)
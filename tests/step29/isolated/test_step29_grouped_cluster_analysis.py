@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Step 29 Synthetic Test - Grouped Multi-Cluster Analysis
+
+Checks that the single-pass analyze_clusters engine returns the same analysis as
+the per-cluster perform_comprehensive_cluster_analysis path, for representative
+clusters (including one with no rows), for every cluster, and via the process pool;
+the summary JSON still names the representative clusters when every cluster is analyzed.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.step29_supply_demand_gap_analysis as step29
+
+
+@pytest.fixture
+def integrated(monkeypatch):
+    monkeypatch.setattr(step29, 'log_progress', lambda *args, **kwargs: None)
+    rng = np.random.default_rng(11)
+    n = 3000
+    sales = pd.DataFrame({
+        'str_code': rng.integers(1, 80, n).astype(str),
+        'spu_code': rng.integers(1, 300, n).astype(str),
+        'cate_name': rng.choice(list('abcdefghijklmnop'), n),
+        'sub_cate_name': rng.choice(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'), n),
+        'fashion_sal_amt': rng.gamma(2, 50, n),
+        'basic_sal_amt': rng.gamma(2, 50, n),
+    })
+    clusters = pd.DataFrame({'str_code': [str(i) for i in range(1, 80)], 'cluster_id': rng.integers(0, 6, 79)})
+    spus = [str(i) for i in range(1, 300)]
+    roles = pd.DataFrame({'spu_code': spus, 'product_role': rng.choice(['CORE', 'SEASONAL', 'FILLER', 'CLEARANCE'], 299)})
+    prices = pd.DataFrame({'spu_code': spus,
+                           'price_band': rng.choice(['ECONOMY', 'VALUE', 'STANDARD', 'PREMIUM', 'LUXURY'], 299),
+                           'avg_unit_price': rng.gamma(2, 40, 299)})
+    attrs = pd.DataFrame({'str_code': [str(i) for i in range(1, 90)], 'estimated_rack_capacity': rng.integers(100, 600, 89)})
+    return step29.prepare_integrated_dataset(sales, clusters, roles, prices), attrs
+
+
+def _per_cluster(integrated_df, attrs, cluster_ids):
+    return [step29.perform_comprehensive_cluster_analysis(integrated_df, attrs, c) for c in cluster_ids]
+
+
+def test_representative_clusters_match_per_cluster_path(integrated):
+    integrated_df, attrs = integrated
+    cluster_ids = [0, 2, 4, 99]  # 99 has no rows
+
+    assert repr(step29.analyze_clusters(integrated_df, attrs, cluster_ids)) == \
+        repr(_per_cluster(integrated_df, attrs, cluster_ids))
+
+
+def test_all_clusters_in_process_pool(integrated, monkeypatch):
+    integrated_df, attrs = integrated
+    monkeypatch.setattr(step29, 'PARALLEL_MIN_ROWS', 1)
+
+    analyses = step29.analyze_clusters(integrated_df, attrs, workers=2)
+
+    expected = _per_cluster(integrated_df, attrs, sorted(integrated_df['cluster_id'].unique()))
+    assert [a['cluster_id'] for a in analyses] == [e['cluster_id'] for e in expected]
+    for got, want in zip(analyses, expected):
+        assert got['category_gaps'] == want['category_gaps']
+        assert got['price_band_gaps'] == want['price_band_gaps']
+        assert got['seasonal_capacity_gaps'] == want['seasonal_capacity_gaps']
+        assert got['overall_gap_severity'] == want['overall_gap_severity']
+
+
+def test_summary_keeps_representative_clusters_and_lists_analyzed_ones(integrated, tmp_path, monkeypatch):
+    integrated_df, attrs = integrated
+    monkeypatch.setattr(step29, 'GAP_ANALYSIS_DETAILED', str(tmp_path / 'detailed_202508A.csv'))
+    monkeypatch.setattr(step29, 'GAP_SUMMARY_JSON', str(tmp_path / 'summary_202508A.json'))
+    analyses = step29.analyze_clusters(integrated_df, attrs)
+
+    step29.save_detailed_analysis(analyses, str(tmp_path / 'detailed.csv'), str(tmp_path / 'summary.json'))
+
+    metadata = json.loads((tmp_path / 'summary.json').read_text())['analysis_metadata']
+    assert metadata['representative_clusters'] == step29.REPRESENTATIVE_CLUSTERS
+    assert metadata['analyzed_clusters'] == [a['cluster_id'] for a in analyses]
+    assert metadata['total_clusters_analyzed'] == len(analyses) > len(step29.REPRESENTATIVE_CLUSTERS)
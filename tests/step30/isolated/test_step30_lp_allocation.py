@@ -0,0 +1,103 @@
+"""
+Step 30 LP/MIP Allocation Test (Isolated Synthetic)
+===================================================
+
+Covers the HiGHS-backed allocation backend: sparse capacity / role-mix /
+price-band constraints, warm starts from a previous period's allocation, and
+the solver path through SellThroughOptimizer.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.step30_sellthrough_optimization_engine as step30
+
+pytestmark = pytest.mark.skipif(not step30.SCIPY_SOLVER_AVAILABLE, reason="scipy.optimize.milp not available")
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(step30, 'log_progress', lambda *args, **kwargs: None)
+
+
+def _inputs(seed=0, stores=12, spus=40):
+    rng = np.random.default_rng(seed)
+    store_codes = [str(10000 + i) for i in range(stores)]
+    spu_codes = [f'SPU{i:03d}' for i in range(spus)]
+    sales = pd.DataFrame([(s, p) for s in store_codes for p in spu_codes if rng.random() < 0.7],
+                         columns=['str_code', 'spu_code'])
+    n = len(sales)
+    sales['total_inventory_qty'] = rng.integers(1, 30, n)
+    sales['total_sales_qty'] = rng.integers(0, 20, n)
+    sales['total_sales_amt'] = rng.gamma(2, 100, n)
+    clusters = pd.DataFrame({'str_code': store_codes, 'cluster_id': np.arange(stores) % 2})
+    roles = pd.DataFrame({'spu_code': spu_codes, 'category': 'c', 'subcategory': 's',
+                          'product_role': rng.choice(['CORE', 'SEASONAL', 'FILLER', 'CLEARANCE'], spus)})
+    prices = pd.DataFrame({'spu_code': spu_codes, 'avg_unit_price': rng.uniform(20, 100, spus),
+                           'price_band': rng.choice(['ECONOMY', 'VALUE', 'PREMIUM'], spus)})
+    attrs = pd.DataFrame({'str_code': store_codes, 'store_type': 'Fashion',
+                          'estimated_rack_capacity': rng.integers(10, 30, stores)})
+    return sales, clusters, roles, prices, attrs
+
+
+@pytest.mark.parametrize('mode', ['lp', 'mip'])
+def test_allocation_respects_capacity_role_and_price_constraints(mode):
+    optimizer = step30.SellThroughOptimizer(*_inputs(), solver=mode)
+    potential = optimizer.calculate_sellthrough_potential()
+    allocation = optimizer.optimal_allocation
+
+    assert potential['optimization_method'] == f'{mode}_allocation_highs'
+    assert {s['status'] for s in optimizer.solver_stats} == {'optimal'}
+    if mode == 'mip':
+        assert set(allocation['allocated'].unique()) <= {0.0, 1.0}
+
+    limits = step30.OPTIMIZATION_CONSTRAINTS
+    per_store = allocation.groupby('str_code').agg(x=('allocated', 'sum'), cap=('estimated_rack_capacity', 'first'))
+    assert (per_store['x'] <= limits['max_capacity_utilization'] * per_store['cap'] + 1e-6).all()
+    for _, cluster in allocation.groupby('cluster_id'):
+        total = cluster['allocated'].sum()
+        roles = cluster.groupby('product_role')['allocated'].sum() / total
+        bands = cluster.groupby('price_band')['allocated'].sum() / total
+        assert roles['CORE'] >= limits['min_core_allocation'] - 1e-6
+        assert roles['FILLER'] <= limits['max_filler_allocation'] + 1e-6
+        assert roles.max() <= limits['max_role_concentration'] + 1e-6
+        assert bands.between(step30.PRICE_BAND_CONSTRAINTS['min_band_share'] - 1e-6,
+                             step30.PRICE_BAND_CONSTRAINTS['max_band_share'] + 1e-6).all()
+
+    # Realism caps still bound the reported optimized rate
+    assert potential['optimized_performance']['weighted_avg_sellthrough_rate'] <= \
+        potential['baseline_performance']['weighted_avg_sellthrough_rate'] + step30.REALISM_LIMITS['max_absolute_improvement'] + 1e-9
+
+
+def test_warm_start_reuses_unchanged_clusters(tmp_path):
+    sales, clusters, roles, prices, attrs = _inputs(seed=1)
+    first = step30.SellThroughOptimizer(sales, clusters, roles, prices, attrs, solver='lp')
+    first.calculate_sellthrough_potential()
+    path = tmp_path / 'optimal_product_allocation.csv'
+    first.optimal_allocation.to_csv(path, index=False)
+
+    # Next period: only one store in cluster 0 sells differently
+    changed = sales.copy()
+    changed.loc[changed['str_code'] == '10000', 'total_sales_qty'] += 5
+    second = step30.SellThroughOptimizer(changed, clusters, roles, prices, attrs, solver='lp',
+                                         previous_allocation=step30.load_previous_allocation(str(path)))
+    second.calculate_sellthrough_potential()
+
+    warm = {s['cluster_id']: s['warm_start'] for s in second.solver_stats}
+    assert warm == {0: 'biased', 1: 'reused'}
+    reused = second.optimal_allocation['cluster_id'] == 1
+    np.testing.assert_allclose(second.optimal_allocation.loc[reused, 'allocated'].to_numpy(),
+                               first.optimal_allocation.loc[first.optimal_allocation['cluster_id'] == 1, 'allocated'].to_numpy())
+
+
+def test_process_pool_matches_single_process(monkeypatch):
+    inputs = _inputs(seed=2)
+    single = step30.SellThroughOptimizer(*inputs, solver='lp', workers=1)
+    single.calculate_sellthrough_potential()
+
+    monkeypatch.setattr(step30, 'PARALLEL_MIN_CANDIDATES', 1)
+    pooled = step30.SellThroughOptimizer(*inputs, solver='lp', workers=2)
+    pooled.calculate_sellthrough_potential()
+
+    pd.testing.assert_frame_equal(pooled.optimal_allocation, single.optimal_allocation)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Step 31 Synthetic Test - Grouped Coverage Matrix
+
+Checks that create_coverage_matrix, which partitions the integrated dataset once,
+matches analyze_cluster_coverage run cluster by cluster, including the process pool.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.step31_gap_analysis_workbook as step31
+
+
+@pytest.fixture
+def integrated(monkeypatch):
+    monkeypatch.setattr(step31, 'log_progress', lambda *args, **kwargs: None)
+    rng = np.random.default_rng(3)
+    n = 2000
+    df = pd.DataFrame({
+        'str_code': rng.integers(1, 60, n).astype(str),
+        'cluster_id': rng.integers(0, 5, n),
+        'category': rng.choice(list('abcdefghij'), n),
+        'subcategory': rng.choice(list('ABCDEFG'), n),
+        'price_band': rng.choice(['ECONOMY', 'VALUE', 'PREMIUM', None], n),
+        'product_role': rng.choice(['CORE', 'SEASONAL', 'FILLER', None], n),
+        'fashion_ratio': rng.random(n),
+        'total_sales_amt': rng.gamma(2, 100, n),
+        'estimated_rack_capacity': rng.integers(100, 300, n),
+    })
+    df['seasonal_indicator'] = np.where(df['fashion_ratio'] >= 0.7, 'Seasonal', 'Year-Round')
+    return df
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_coverage_matrix_matches_per_cluster_analysis(integrated, monkeypatch, workers):
+    monkeypatch.setattr(step31, 'PARALLEL_MIN_ROWS', 1)
+
+    matrix = step31.create_coverage_matrix(integrated, workers=workers)
+
+    assert matrix['cluster_id'].tolist() == sorted(integrated['cluster_id'].unique())
+    for _, row in matrix.iterrows():
+        expected = step31.analyze_cluster_coverage(integrated, row['cluster_id'])
+        assert row['overall_coverage_score'] == pytest.approx(expected['overall_coverage_score'])
+        assert row['price_band_balance'] == pytest.approx(expected['price_band_coverage']['price_band_balance'])
+        assert row['capacity_status'] == expected['capacity_utilization']['status']
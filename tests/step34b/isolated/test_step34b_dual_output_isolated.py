@@ -36,9 +36,21 @@ def test_step34_dual_output_isolated(tmp_path):
     
     # Create stub pipeline_manifest.py
     stub = """
+import contextlib
+
 class _DummyManifest:
     def __init__(self):
         self.manifest = {}
+
+class PipelineManifest(_DummyManifest):
+    def __init__(self, *_args, **_kwargs):
+        super().__init__()
+
+    def batch(self):
+        return contextlib.nullcontext(self)
+
+    def register_entry(self, *_args, **_kwargs):
+        return None
     
 def get_manifest():
     return _DummyManifest()
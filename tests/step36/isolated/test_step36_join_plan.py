@@ -0,0 +1,111 @@
+"""
+Step 36 Join Plan Test (Isolated Synthetic)
+===========================================
+
+Covers the declared-source loader (one read per file with the union of the
+declared columns, str-normalised join keys), the instrumented joins and the
+vectorized column coalescing and tag composition used by the unified delivery
+builder.
+"""
+
+import numpy as np
+import pandas as pd
+
+import src.step36_unified_delivery_builder as step36
+
+
+def test_sources_sharing_a_file_are_read_once(tmp_path, monkeypatch):
+    path = tmp_path / 'step14.csv'
+    pd.DataFrame({
+        'Store_Code': [1001, 1002],
+        'Category': ['T恤', '裤'],
+        'ΔQty': [3, 4],
+        'Unused': ['x', 'y'],
+    }).to_csv(path, index=False)
+
+    reads = []
+    real_read_csv = pd.read_csv
+
+    def counting_read_csv(*args, **kwargs):
+        if kwargs.get('nrows') != 0:
+            reads.append(kwargs.get('usecols'))
+        return real_read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(step36.pd, 'read_csv', counting_read_csv)
+
+    plan = step36.JoinPlan()
+    plan.declare(step36.SourceSpec('a', str(path), ['Store_Code', 'Category', 'Missing'], str_keys=['Store_Code']))
+    plan.declare(step36.SourceSpec('b', str(path), ['ΔQty']))
+    plan.declare(step36.SourceSpec('absent', str(tmp_path / 'nope.csv'), ['x']))
+
+    a = plan.frame('a')
+    b = plan.frame('b')
+
+    assert reads == [['Store_Code', 'Category', 'ΔQty']]
+    assert list(a.columns) == ['Store_Code', 'Category']
+    assert a['Store_Code'].tolist() == ['1001', '1002']
+    assert b['ΔQty'].tolist() == [3, 4]
+    assert plan.frame('absent').empty
+    assert plan.report()['loads'][0]['sources'] == ['a', 'b']
+
+
+def test_column_selectors_pick_from_the_header(tmp_path):
+    path = tmp_path / 'store_config.csv'
+    pd.DataFrame({
+        'STR_CODE': ['011003'],
+        'big_sub_cate_name': ['T恤'],
+        'season_name': ['夏'],
+        'sal_amt': [1.0],
+    }).to_csv(path, index=False)
+
+    plan = step36.JoinPlan()
+    plan.declare(step36.SourceSpec('store_config', str(path), step36._store_config_columns,
+                                   dtypes={'STR_CODE': str}))
+
+    sc = plan.frame('store_config')
+    assert list(sc.columns) == ['STR_CODE', 'big_sub_cate_name', 'season_name']
+    assert sc['STR_CODE'].tolist() == ['011003']
+
+
+def test_join_records_row_counts():
+    plan = step36.JoinPlan()
+    left = pd.DataFrame({'k': ['a', 'b', 'c']})
+    right = pd.DataFrame({'k': ['a', 'a', 'b'], 'v': [1, 2, 3]})
+
+    out = plan.join('left ⟕ right', left, right, on='k')
+
+    assert len(out) == 4
+    record = plan.report()['joins'][0]
+    assert record['join'] == 'left ⟕ right'
+    assert record['on'] == ['k']
+    assert (record['left_rows'], record['right_rows'], record['rows']) == (3, 3, 4)
+
+
+def test_first_non_null_matches_row_scan():
+    df = pd.DataFrame({
+        'Cluster_ID': [np.nan, 2.0, np.nan, np.nan],
+        'Cluster_ID_x': [1.0, 5.0, np.nan, np.nan],
+        'cluster_id': [7.0, 8.0, 3.0, np.nan],
+    })
+    cols = ['Cluster_ID', 'Cluster_ID_x', 'cluster_id']
+
+    expected = [next((row[c] for c in cols if pd.notna(row[c])), pd.NA) for _, row in df.iterrows()]
+
+    got = step36._first_non_null(df, cols)
+    assert got.iloc[:3].tolist() == expected[:3]
+    assert pd.isna(got.iloc[3])
+
+
+def test_style_tags_and_bundle_match_row_rules():
+    df = pd.DataFrame({
+        'Season': [' 夏 ', np.nan, None],
+        'Gender': ['女', '女', None],
+        'Category': ['T恤', None, None],
+        'Target_Style_Tags': ['[夏, 女|后台]', 'x, ,女', np.nan],
+        'Location': [None, '后台', None],
+    })
+
+    assert step36._compose_style_tags(df).tolist() == ['夏, 女, T恤, 后台', '女, 后台, x', '']
+    bundle = step36._tag_bundle(df)
+    assert bundle.iloc[:2].tolist() == [' 夏 , 女', '女, 后台']
+    assert pd.isna(bundle.iloc[2])
@@ -0,0 +1,108 @@
+"""
+Tests for the shared streaming (write-only) Excel writer.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+from openpyxl.formatting.rule import CellIsRule, FormulaRule
+from openpyxl.styles import PatternFill
+
+from src.excel_export import (
+    CellStyle,
+    ConditionalFormat,
+    StreamingWorkbook,
+    fit_column_widths,
+)
+
+
+def _frame(n=7):
+    return pd.DataFrame({
+        'store': [f'S{i}' for i in range(n)],
+        'sales_amt': np.arange(n) * 1000.5,
+        'status': ['CRITICAL', None] + ['OK'] * (n - 2),
+        'change': [np.nan] + list(range(-3, n - 4)),
+    })
+
+
+def test_dataframe_round_trip_with_declared_formatting(tmp_path):
+    path = tmp_path / 'book.xlsx'
+    df = _frame()
+    red = PatternFill(start_color='FFC7CE', end_color='FFC7CE', fill_type='solid')
+
+    with StreamingWorkbook(str(path)) as wb:
+        wb.write_dataframe(
+            'Data', df,
+            title_rows=[[('Report', CellStyle(bold=True, size=14))], []],
+            header_style=CellStyle(bold=True, fill='D9E1F2'),
+            column_styles={'sales_amt': CellStyle(number_format='#,##0')},
+            column_widths='auto',
+            freeze_header=True,
+            autofilter=True,
+            conditional_formats=[
+                ConditionalFormat(['change'], CellIsRule(operator='lessThan', formula=['0'], fill=red)),
+                ConditionalFormat(['store'], lambda letters, row: FormulaRule(
+                    formula=[f'${letters["status"]}{row}="CRITICAL"'], fill=red)),
+            ],
+        )
+
+    ws = openpyxl.load_workbook(path)['Data']
+    rows = [[c.value for c in r] for r in ws.iter_rows()]
+    assert rows[0][0] == 'Report' and ws['A1'].font.b and ws['A1'].font.sz == 14
+    assert rows[2] == ['store', 'sales_amt', 'status', 'change']
+    assert rows[3] == ['S0', 0, 'CRITICAL', None]
+    assert rows[4][2] is None
+    assert ws['A3'].fill.fgColor.rgb.endswith('D9E1F2')
+    assert ws['B5'].number_format == '#,##0'
+    assert ws.freeze_panes == 'A4'
+    assert ws.auto_filter.ref == 'A3:D10'
+    assert ws.column_dimensions['B'].width == fit_column_widths(df)['sales_amt']
+    ranges = {str(cf.sqref): [r.formula for r in cf.rules] for cf in ws.conditional_formatting}
+    assert ranges == {'D4:D10': [['0']], 'A4:A10': [['$C4="CRITICAL"']]}
+
+
+def test_large_sheet_rolls_over_with_repeated_header(tmp_path):
+    path = tmp_path / 'split.xlsx'
+    df = _frame(9)
+
+    with StreamingWorkbook(str(path)) as wb:
+        wb.write_dataframe('A sheet title longer than thirty-one chars', df,
+                           freeze_header=True, autofilter=True, max_rows=4)
+
+    book = openpyxl.load_workbook(path)
+    assert book.sheetnames == [
+        'A sheet title longer than thirt',
+        'A sheet title longer than t (2)',
+        'A sheet title longer than t (3)',
+    ]
+    parts = [[[c.value for c in r] for r in ws.iter_rows()] for ws in book.worksheets]
+    assert all(part[0] == list(df.columns) for part in parts)
+    assert [row[0] for part in parts for row in part[1:]] == df['store'].tolist()
+    assert book.worksheets[2].auto_filter.ref == 'A1:D4'
+    assert all(ws.freeze_panes == 'A2' for ws in book.worksheets)
+
+
+def test_free_form_sheet_rows_and_styles(tmp_path):
+    path = tmp_path / 'notes.xlsx'
+    bold = CellStyle(bold=True)
+
+    with StreamingWorkbook(str(path)) as wb:
+        sheet = wb.sheet('Notes', column_widths={'A': 60})
+        sheet.append(['Title'], style=bold)
+        sheet.blank(2)
+        sheet.append_cells(['plain', ('strong', bold)])
+
+    ws = openpyxl.load_workbook(path)['Notes']
+    assert [[c.value for c in r] for r in ws.iter_rows()] == [
+        ['Title', None], [None, None], [None, None], ['plain', 'strong'],
+    ]
+    assert ws['A1'].font.b and ws['B4'].font.b and not ws['A4'].font.b
+    assert ws.column_dimensions['A'].width == 60
+
+
+def test_fit_column_widths_clamps_and_ignores_missing():
+    df = pd.DataFrame({'a': ['x' * 80, None], 'bb': [None, None]})
+    assert fit_column_widths(df, min_width=10, max_width=40) == {'a': 40, 'bb': 10}
+    assert fit_column_widths(df.iloc[1:], padding=0) == {'a': 1, 'bb': 2}
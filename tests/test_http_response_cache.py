@@ -0,0 +1,158 @@
+"""
+Test HTTP Response Cache
+========================
+
+API responses are cached by (endpoint, normalized payload) with compressed,
+content-addressed bodies; closed periods never expire, the cache stays under
+its size bound, and offline mode replays without touching the network - for
+the repositories as well as the Step 1 fetch functions.
+"""
+
+import json
+import os
+from datetime import date
+
+import pandas as pd
+import pytest
+import requests
+
+import src.step1_download_api_data as step1
+from src.core.logger import PipelineLogger
+from src.http_response_cache import (CacheMissError, HttpResponseCache, OPEN_PERIOD_TTL_SECONDS,
+                                     date_range_ttl, period_ttl)
+from src.repositories.weather_api_repository import WeatherApiRepository
+
+
+def _response(payload, status=200):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode('utf-8')
+    response.headers['Content-Type'] = 'application/json'
+    return response
+
+
+class FakeSession:
+    """Counts calls and answers every request with the payload it was built with."""
+
+    def __init__(self, payload, status=200):
+        self.payload = payload
+        self.status = status
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        return _response(self.payload, self.status)
+
+    get = post
+
+
+class OfflineSession:
+    def post(self, url, **kwargs):
+        raise AssertionError("network used in offline replay")
+
+    get = post
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with HttpResponseCache(str(tmp_path / 'cache.sqlite')) as cache:
+        yield cache
+
+
+def test_equal_requests_hit_regardless_of_key_order(cache):
+    session = FakeSession({'data': [{'str_code': '11003'}]})
+    first = cache.request(session, 'POST', 'https://api/x', json={'yyyymm': '202407', 'strCodes': ['11003']}, ttl=None)
+    second = cache.request(session, 'POST', 'https://api/x/', json={'strCodes': ['11003'], 'yyyymm': '202407', 'period': None})
+
+    assert session.calls == 1
+    assert second.json() == first.json()
+    assert second.headers['X-Cache'] == 'HIT'
+    cache.request(session, 'POST', 'https://api/x', json={'strCodes': ['11004'], 'yyyymm': '202407'})
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 2)
+    assert cache._connection().execute('SELECT COUNT(*) FROM bodies').fetchone()[0] == 1  # Same body stored once
+
+
+def test_ttl_rules_and_expiry(cache):
+    assert period_ttl('202407', 'A', today=date(2025, 1, 1)) is None
+    assert period_ttl('202412', 'B', today=date(2025, 1, 3)) == OPEN_PERIOD_TTL_SECONDS
+    assert period_ttl('202412', None, today=date(2025, 1, 9)) is None
+    assert date_range_ttl('2024-12-30', today=date(2025, 1, 2)) == OPEN_PERIOD_TTL_SECONDS
+
+    session = FakeSession({'data': [1]})
+    cache.request(session, 'GET', 'https://api/y', params={'a': 1}, ttl=0)
+    cache.request(session, 'GET', 'https://api/y', params={'a': 1}, ttl=0)
+    assert session.calls == 2
+
+
+def test_failed_responses_are_not_cached(cache):
+    session = FakeSession({'error': 'busy'}, status=503)
+    cache.request(session, 'GET', 'https://api/z')
+    cache.request(session, 'GET', 'https://api/z')
+    assert session.calls == 2 and cache.stats()['entries'] == 0
+
+
+def test_offline_and_refresh_modes(cache):
+    session = FakeSession({'data': [1]})
+    cache.request(session, 'GET', 'https://api/a', ttl=None)
+
+    cache.mode = 'offline'
+    assert cache.request(OfflineSession(), 'GET', 'https://api/a').json() == {'data': [1]}
+    with pytest.raises(CacheMissError) as excinfo:
+        cache.request(OfflineSession(), 'GET', 'https://api/b')
+    assert isinstance(excinfo.value, requests.exceptions.RequestException)
+
+    cache.mode = 'refresh'
+    session.payload = {'data': [2]}
+    assert cache.request(session, 'GET', 'https://api/a', ttl=None).json() == {'data': [2]}
+    cache.mode = 'offline'
+    assert cache.request(OfflineSession(), 'GET', 'https://api/a').json() == {'data': [2]}
+    conn = cache._connection()
+    assert conn.execute('SELECT COUNT(*) FROM bodies').fetchone()[0] == 1  # Replaced body dropped with its entry
+    assert cache._total(conn) == conn.execute('SELECT SUM(size) FROM bodies').fetchone()[0]
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    with HttpResponseCache(str(tmp_path / 'cache.sqlite'), max_bytes=12000) as cache:
+        for i in range(8):
+            session = FakeSession({'data': os.urandom(3000).hex()})  # ~3.3 KB compressed
+            cache.request(session, 'GET', f'https://api/{i}', ttl=None)
+            cache.request(session, 'GET', 'https://api/0', ttl=None)  # Keep entry 0 recently used
+
+        stored = cache._connection().execute('SELECT COALESCE(SUM(size), 0) FROM bodies').fetchone()[0]
+        assert cache._total(cache._connection()) == stored
+        endpoints = {row[0] for row in cache._connection().execute('SELECT endpoint FROM entries')}
+    assert stored <= 12000
+    assert 'https://api/0' in endpoints and 'https://api/1' not in endpoints
+
+
+def test_weather_repository_replays_offline(cache, monkeypatch):
+    hourly = {name: [1.0, 2.0] for name in WeatherApiRepository.HOURLY_VARIABLES}
+    hourly['time'] = ['2024-07-01T00:00', '2024-07-01T01:00']
+    session = FakeSession({'hourly': hourly})
+    monkeypatch.setattr(requests, 'get', session.get)
+    repo = WeatherApiRepository(PipelineLogger('CacheTest'), cache=cache)
+
+    recorded = repo.fetch_weather_data(31.2, 121.5, '2024-07-01', '2024-07-01', store_code='11003')
+    cache.mode = 'offline'
+    monkeypatch.setattr(requests, 'get', OfflineSession().get)
+    replayed = repo.fetch_weather_data(31.2, 121.5, '2024-07-01', '2024-07-01', store_code='11003')
+
+    pd.testing.assert_frame_equal(replayed, recorded)
+    assert cache.stats()['immutable_entries'] == 1
+
+
+def test_step1_fetch_replays_closed_period_offline(cache, monkeypatch):
+    records = [{'str_code': '11003', 'mm_type': '07A', 'base_sal_amt': 10.0},
+               {'str_code': '11004', 'mm_type': '07A', 'base_sal_amt': 20.0}]
+    monkeypatch.setattr(step1, 'get_default_cache', lambda: cache)
+    monkeypatch.setattr(step1, 'log_progress', lambda *args, **kwargs: None)
+    monkeypatch.setattr(step1, 'create_retry_session', lambda: FakeSession({'data': records}))
+
+    recorded, stores = step1.fetch_store_sales(['11003', '11004'], '202407', 'A')
+    cache.mode = 'offline'
+    monkeypatch.setattr(step1, 'create_retry_session', OfflineSession)
+    replayed, replayed_stores = step1.fetch_store_sales(['11003', '11004'], '202407', 'A')
+
+    pd.testing.assert_frame_equal(replayed, recorded)
+    assert sorted(replayed_stores) == sorted(stores) == ['11003', '11004']
@@ -0,0 +1,118 @@
+"""
+Test Pipeline Manifest
+======================
+
+Registrations inside batch() are written once when the batch exits (and
+dropped if it raises); every write merges into the file under a lock and
+replaces it atomically, so concurrent writers - other instances, threads or
+processes - never lose each other's outputs; get_latest_output answers from
+the in-memory index and sees other writers' outputs after a refresh.
+"""
+
+import json
+import multiprocessing
+import threading
+
+import pytest
+
+import src.pipeline_manifest as pipeline_manifest
+from src.pipeline_manifest import PipelineManifest
+
+
+def _outputs(path, step):
+    with open(path) as f:
+        return json.load(f)["steps"][step]["outputs"]
+
+
+def _register_many(path, step, count):
+    manifest = PipelineManifest(path)
+    for i in range(count):
+        manifest.register_output(step, f"output_{i}", f"output/{step}_{i}.csv")
+
+
+def test_batch_flushes_once(tmp_path, monkeypatch):
+    path = str(tmp_path / "pipeline_manifest.json")
+    manifest = PipelineManifest(path)
+    writes = []
+    real_replace = pipeline_manifest.os.replace
+    monkeypatch.setattr(pipeline_manifest.os, "replace", lambda src, dst: (writes.append(dst), real_replace(src, dst)))
+
+    with manifest.batch():
+        for label in ("202508A", "202508B", "202509A"):
+            manifest.register_output("step30", f"report_{label}", f"output/report_{label}.md", {"period_label": label})
+            with manifest.batch():  # Nested batches join the outer one
+                manifest.register_output("step30", f"comparison_{label}", f"output/comparison_{label}.csv")
+        assert manifest.get_latest_output("step30", "report_") == "output/report_202509A.md"
+        assert writes == [] and not (tmp_path / "pipeline_manifest.json").exists()
+
+    assert writes == [path]
+    assert len(_outputs(path, "step30")) == 6
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_failed_batch_is_discarded(tmp_path):
+    path = str(tmp_path / "pipeline_manifest.json")
+    manifest = PipelineManifest(path)
+    manifest.register_output("step35", "kept", "output/kept.csv")
+
+    with pytest.raises(RuntimeError):
+        with manifest.batch():
+            manifest.register_output("step35", "dropped", "output/dropped.csv")
+            raise RuntimeError("step failed")
+
+    assert list(_outputs(path, "step35")) == ["kept"]
+    assert manifest.list_available_outputs("step35") == ["kept"]
+
+
+def test_concurrent_writers_keep_every_output(tmp_path):
+    path = str(tmp_path / "pipeline_manifest.json")
+    first, second = PipelineManifest(path), PipelineManifest(path)  # Both loaded before any write
+    first.register_output("step30", "a", "output/a.csv")
+    second.register_output("step35", "b", "output/b.csv")
+    threads = [threading.Thread(target=_register_many, args=(path, f"thread{t}", 10)) for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_register_many, args=(path, f"process{p}", 10)) for p in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    with open(path) as f:
+        steps = json.load(f)["steps"]
+    assert set(steps) == {"step30", "step35"} | {f"thread{t}" for t in range(4)} | {f"process{p}" for p in range(3)}
+    assert all(len(steps[f"process{p}"]["outputs"]) == 10 for p in range(3))
+    assert first.get_latest_output("step35") is None  # Not re-read yet
+    assert first.refresh() and first.get_latest_output("step35") == "output/b.csv"
+    assert len(first.list_available_outputs("thread3")) == 10
+
+
+def test_get_latest_output_filters_by_prefix_and_period(tmp_path):
+    manifest = PipelineManifest(str(tmp_path / "pipeline_manifest.json"))
+    with manifest.batch():
+        manifest.register_output("step14", "enhanced_fast_fish_format_202508A", "output/ff_202508A.csv")
+        manifest.register_output("step14", "enhanced_fast_fish_format", "output/ff_generic.csv",
+                                 {"period_label": "202508B"})
+        manifest.register_output("step14", "other_202508A", "output/other.csv")
+
+    assert manifest.get_latest_output("step14", "enhanced_fast_fish_format", "202508A") == "output/ff_202508A.csv"
+    assert manifest.get_latest_output("step14", "enhanced_fast_fish_format", "202508B") == "output/ff_generic.csv"
+    assert manifest.get_latest_output("step14", period_label="202508A") == "output/other.csv"
+    assert manifest.get_latest_output("step14", "missing") is None
+    assert manifest.get_latest_output("step99") is None
+
+
+def test_register_entry_keeps_the_callers_fields(tmp_path):
+    path = str(tmp_path / "pipeline_manifest.json")
+    entry = {"file_path": "output/report.md", "created": "2025-08-01T00:00:00", "exists": True, "size_mb": 0,
+             "metadata": {"period_label": "202508A"}}
+    with PipelineManifest(path).batch() as manifest:
+        manifest.register_entry("step34", "unified_report", entry)
+        manifest.register_output("step30", "other", "output/other.csv")
+
+    assert _outputs(path, "step34")["unified_report"] == entry
+    assert PipelineManifest(path).get_latest_output("step34", period_label="202508A") == "output/report.md"
@@ -0,0 +1,81 @@
+"""
+Test Pipeline Step Logs and Run Report
+======================================
+
+run_script streams child output to a per-step log (echo rate-limited) and
+records per-step resource usage in the machine-readable run report.
+"""
+
+import json
+
+import pytest
+
+import pipeline
+
+CHATTY_SCRIPT = """
+import sys
+block = bytearray(64 * 1024 * 1024)
+for i in range(2000):
+    print(f"DEBUG row {i}")
+with open("written.bin", "wb") as f:
+    f.write(b"x" * 1024 * 1024)
+sys.exit(int(sys.argv[1]))
+"""
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'chatty_step.py').write_text(CHATTY_SCRIPT)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline, 'STEP_LOG_DIR', str(tmp_path / 'output' / 'step_logs'))
+    monkeypatch.setattr(pipeline, 'RUN_REPORT_PATH', str(tmp_path / 'output' / 'pipeline_run_report.json'))
+    monkeypatch.setattr(pipeline, '_run_report', None)
+    return tmp_path
+
+
+def _report(sandbox):
+    return json.loads((sandbox / 'output' / 'pipeline_run_report.json').read_text())
+
+
+def test_output_streamed_to_log_and_resources_recorded(sandbox, capsys):
+    pipeline.start_run_report(yyyymm='202508', period='A')
+
+    assert pipeline.run_script('chatty_step.py', 'Chatty step', ['0']) is True
+
+    log_lines = (sandbox / 'output' / 'step_logs' / 'chatty_step.log').read_text().splitlines()
+    assert log_lines == [f"DEBUG row {i}" for i in range(2000)]
+    echoed = [line for line in capsys.readouterr().out.splitlines() if line.startswith('DEBUG row')]
+    assert len(echoed) < 2000
+
+    report = _report(sandbox)
+    assert report['context'] == {'yyyymm': '202508', 'period': 'A'}
+    [step] = report['steps']
+    assert step['status'] == 'success' and step['returncode'] == 0
+    assert step['output_lines'] == 2000
+    assert step['output_lines_not_echoed'] == 2000 - len(echoed)
+    assert step['peak_rss_mb'] >= 64
+    assert step['cpu_user_s'] + step['cpu_sys_s'] > 0
+    for key in ('wall_s', 'block_read_bytes', 'block_write_bytes', 'io_read_chars', 'io_write_chars'):
+        assert key in step
+
+
+def test_failure_prints_log_tail_and_is_reported(sandbox, capsys):
+    assert pipeline.run_script('chatty_step.py', 'Chatty step', ['3']) is False
+    assert pipeline.run_script('chatty_step.py', 'Chatty step again', ['0']) is True
+
+    out = capsys.readouterr().out
+    assert 'DEBUG row 1999' in out  # Tail of the log shown after the echo dropped lines
+    steps = _report(sandbox)['steps']
+    assert [(s['status'], s['returncode']) for s in steps] == [('failed', 3), ('success', 0)]
+
+
+def test_timeout_kills_step(sandbox, monkeypatch):
+    (sandbox / 'src' / 'slow_step.py').write_text("import time\nprint('start', flush=True)\ntime.sleep(60)\n")
+    monkeypatch.setattr(pipeline, 'ECHO_MAX_LINES_PER_SECOND', 1000)
+
+    assert pipeline.run_script('slow_step.py', 'Slow step', timeout_minutes=0.02) is False
+
+    [step] = _report(sandbox)['steps']
+    assert step['status'] == 'timeout'
+    assert step['wall_s'] < 30
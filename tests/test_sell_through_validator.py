@@ -0,0 +1,95 @@
+"""
+Tests for the indexed historical lookup and vectorized batch validation in
+SellThroughValidator.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.sell_through_validator import SellThroughValidator
+
+
+@pytest.fixture
+def historical_data():
+    rng = np.random.default_rng(7)
+    n = 4000
+    return pd.DataFrame({
+        'str_code': rng.integers(1, 60, n).astype(str),
+        'sub_cate_name': rng.choice(['T恤', '短裤', '连衣裙', 'POLO衫'], n),
+        'spu_code': rng.integers(1, 200, n).astype(str),
+        'quantity': rng.integers(-1, 4, n),
+    })
+
+
+def _reference_performance(data, store_code, category):
+    """Full-table scan used by the original implementation."""
+    hist = data[(data['str_code'] == store_code) & (data['sub_cate_name'] == category)]
+    if hist.empty:
+        return None
+    sold = hist[hist['quantity'] > 0]['spu_code'].nunique()
+    total = hist['spu_code'].nunique()
+    return (sold + 1) / (total + 2) * 100.0, total, sold
+
+
+def test_performance_index_matches_table_scan(historical_data):
+    validator = SellThroughValidator(historical_data)
+
+    for store, cat in [('5', 'T恤'), ('17', '短裤'), ('42', '连衣裙')]:
+        expected = _reference_performance(historical_data, store, cat)
+        perf = validator._get_historical_performance(store, cat)
+        assert perf['spus_sold_rate'] == pytest.approx(expected[0])
+        assert perf['avg_spus_in_stock'] == expected[1]
+        assert perf['avg_spus_sold'] == expected[2]
+
+    # Unknown keys and mismatched key types fall back to defaults
+    assert validator._get_historical_performance('999', 'T恤') == SellThroughValidator.DEFAULT_PERFORMANCE
+    assert validator._get_historical_performance(5, 'T恤') == SellThroughValidator.DEFAULT_PERFORMANCE
+
+
+def test_index_is_rebuilt_when_historical_data_changes(historical_data):
+    validator = SellThroughValidator(historical_data)
+    before = validator._get_historical_performance('5', 'T恤')
+
+    validator.historical_data = historical_data[historical_data['str_code'] != '5']
+
+    assert before != SellThroughValidator.DEFAULT_PERFORMANCE
+    assert validator._get_historical_performance('5', 'T恤') == SellThroughValidator.DEFAULT_PERFORMANCE
+
+
+def test_batch_validation_matches_single_validation(historical_data):
+    rng = np.random.default_rng(3)
+    recommendations = [
+        {
+            'store_code': str(rng.integers(1, 80)),
+            'category': rng.choice(['T恤', '短裤', '连衣裙', '鞋']),
+            'current_spu_count': int(rng.integers(0, 50)),
+            'recommended_spu_count': int(rng.integers(0, 50)),
+            'action': rng.choice(['INCREASE', 'DECREASE', 'REBALANCE', 'HOLD']),
+            'rule_name': 'Rule 8',
+            'opportunity_id': i,
+        }
+        for i in range(500)
+    ]
+    # Legacy key names are still honoured
+    recommendations.append({'store_code': '5', 'category': 'T恤', 'current_quantity': 3, 'recommended_quantity': 6})
+
+    batch = SellThroughValidator(historical_data).batch_validate_recommendations(recommendations)
+
+    single = SellThroughValidator(historical_data)
+    expected = pd.DataFrame([
+        {**rec, **single.validate_recommendation(
+            store_code=rec['store_code'],
+            category=rec['category'],
+            current_spu_count=rec.get('current_spu_count', rec.get('current_quantity', 0)),
+            recommended_spu_count=rec.get('recommended_spu_count', rec.get('recommended_quantity', 0)),
+            action=rec.get('action', 'UNKNOWN'),
+            rule_name=rec.get('rule_name', 'Unknown Rule'),
+        )}
+        for rec in recommendations
+    ])
+    pd.testing.assert_frame_equal(batch, expected, check_dtype=False)
+
+
+def test_batch_validation_empty_input():
+    assert SellThroughValidator().batch_validate_recommendations([]).empty
@@ -0,0 +1,85 @@
+"""
+Test Step Lifecycle Profiling
+=============================
+
+Step.execute times every phase and, with STEP_PROFILE set, writes a profile
+bundle (phase timings, tracemalloc allocations, context DataFrame footprints
+and cProfile stats).
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.context import StepContext
+from src.core.logger import PipelineLogger
+from src.core.profiling import PROFILE_DIR_ENV_VAR, PROFILE_ENV_VAR, profile_modes
+from src.core.step import Step
+
+
+class BuildFrameStep(Step):
+    def __init__(self, fail_in_validate=False):
+        super().__init__(PipelineLogger("ProfilingTest"), "Build frame", 6)
+        self.fail_in_validate = fail_in_validate
+
+    def apply(self, context):
+        values = np.arange(200_000, dtype=np.float64)
+        context.set_data(pd.DataFrame({'x': values, 'label': 'a'}))
+        context.data['summary'] = pd.DataFrame({'n': [len(values)]})
+        return context
+
+    def validate(self, context):
+        if self.fail_in_validate:
+            raise ValueError("bad output")
+
+
+@pytest.fixture
+def bundle_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv(PROFILE_DIR_ENV_VAR, str(tmp_path))
+    return tmp_path
+
+
+def test_profile_modes_parsing():
+    assert profile_modes('') == set()
+    assert profile_modes('all') == {'cprofile', 'memory', 'frames'}
+    assert profile_modes('cprofile, memory,bogus') == {'cprofile', 'memory'}
+
+
+def test_no_bundle_without_profiling(bundle_dir, monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV_VAR, raising=False)
+
+    BuildFrameStep().execute(StepContext())
+
+    assert list(bundle_dir.iterdir()) == []
+
+
+def test_profile_bundle_contents(bundle_dir, monkeypatch):
+    monkeypatch.setenv(PROFILE_ENV_VAR, 'all')
+
+    context = BuildFrameStep().execute(StepContext())
+
+    assert len(context.get_data()) == 200_000
+    report = json.loads((bundle_dir / 'step06_BuildFrameStep.json').read_text())
+    assert [p['phase'] for p in report['phases']] == ['setup', 'apply', 'validate', 'persist']
+    apply = report['phases'][1]
+    assert apply['status'] == 'ok'
+    assert apply['context_frames']['data']['rows'] == 200_000
+    assert apply['context_frames']['data.summary']['columns'] == 1
+    assert apply['traced_peak_mb'] >= 1.5  # 200k float64 values
+    assert apply['top_allocations']
+    assert (bundle_dir / 'step06_BuildFrameStep.prof').exists()
+    assert 'apply' in (bundle_dir / 'step06_BuildFrameStep_cprofile.txt').read_text()
+
+
+def test_failed_phase_still_written(bundle_dir, monkeypatch):
+    monkeypatch.setenv(PROFILE_ENV_VAR, 'memory')
+
+    with pytest.raises(ValueError):
+        BuildFrameStep(fail_in_validate=True).execute(StepContext())
+
+    report = json.loads((bundle_dir / 'step06_BuildFrameStep.json').read_text())
+    assert [(p['phase'], p['status']) for p in report['phases']] == [
+        ('setup', 'ok'), ('apply', 'ok'), ('validate', 'error: ValueError')]
+    assert 'cprofile' not in report